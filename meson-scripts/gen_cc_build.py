@@ -33,7 +33,7 @@ inc += headers
 core_lib = library('core',
     sources: sources,
     include_directories: inc,
-    cpp_args: ['-fPIC', '-std=c++11'],
+    cpp_args: ['-fPIC', '-std=c++14'],
     install: false,
 
 )
@@ -41,8 +41,9 @@ class ParticleIdNumber:
             b.addPartAttr("ParticleIdNumber")
 
         if fixedidnumber >= 0:
-            for i in range(part_ind, b.getSize()):
-                b.partAttrValue("ParticleIdNumber", i, 0, fixedidnumber)
+            with b.partAttrColumn("ParticleIdNumber") as ids:
+                for i in range(part_ind, b.getSize()):
+                    ids[i] = float(fixedidnumber)
 
         else:
             istart = 0
@@ -52,6 +53,6 @@ class ParticleIdNumber:
                 for i in range(rank):
                     istart = istart + nparts_arr[i]
 
-            for i in range(b.getSize()):
-                idnumber = istart + i
-                b.partAttrValue("ParticleIdNumber", i, 0, idnumber)
+            with b.partAttrColumn("ParticleIdNumber") as ids:
+                for i in range(b.getSize()):
+                    ids[i] = float(istart + i)
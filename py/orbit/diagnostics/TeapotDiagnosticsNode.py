@@ -24,6 +24,7 @@ from ..teapot import DriftTEAPOT
 from orbit.core import bunch
 
 BunchTuneAnalysis = bunch.BunchTuneAnalysis
+BunchTrajectoryRecorder = bunch.BunchTrajectoryRecorder
 
 
 class TeapotStatLatsNode(DriftTEAPOT):
@@ -215,6 +216,54 @@ class TeapotTuneAnalysisNode(DriftTEAPOT):
         self.bunchtune.assignTwiss(betax, alphax, etax, etapx, betay, alphay)
 
 
+class TeapotTrajectoryRecorderNode(DriftTEAPOT):
+    """
+    The node records the 6D coordinates of the particles with the selected
+    ParticleIdNumber values every time the bunch passes it. The records are
+    written to the binary file in batches. The file can be read by the
+    readTrajectoryFile(fileName) function from the orbit.diagnostics package.
+    The turn is the TurnNumber bunch attribute if the bunch has it, otherwise
+    it is the number of the previous passes through the node.
+    """
+
+    def __init__(self, fileName, particleIds, batchSize=100, name="trajectory recorder no name"):
+        """
+        Constructor. Creates the trajectory recorder TEAPOT element.
+        """
+        DriftTEAPOT.__init__(self, name)
+        self.recorder = BunchTrajectoryRecorder(fileName, batchSize)
+        self.recorder.setParticleIds(particleIds)
+        self.setType("trajectory recorder teapot")
+        self.setLength(0.0)
+        self.turn = 0
+
+    def track(self, paramsDict):
+        """
+        The trajectory recorder class implementation of the AccNodeBunchTracker class track(probe) method.
+        """
+        bunch = paramsDict["bunch"]
+        turn = self.turn
+        if bunch.hasBunchAttrInt("TurnNumber") != 0:
+            turn = bunch.bunchAttrInt("TurnNumber")
+        self.recorder.recordBunch(bunch, turn)
+        self.turn += 1
+
+    def getParticleIds(self):
+        return self.recorder.getParticleIds()
+
+    def flush(self):
+        """
+        Writes the buffered records to the file. It should be called on all CPUs.
+        """
+        self.recorder.flush()
+
+    def close(self):
+        """
+        Writes the rest of the records to the file. It should be called on all CPUs.
+        """
+        self.recorder.close()
+
+
 class TeapotBPMSignalNode(DriftTEAPOT):
     def __init__(self, name="BPMSignal no name"):
         """
@@ -5,6 +5,7 @@
 
 from .diagnostics import StatLats, StatLatsSetMember
 from .diagnostics import Moments, MomentsSetMember
+from .diagnostics import readTrajectoryFile
 from .profiles import profiles
 from .diagnosticsLatticeModifications import addTeapotDiagnosticsNode
 from .diagnosticsLatticeModifications import addTeapotDiagnosticsNodeAsChild
@@ -13,6 +14,7 @@ from .diagnosticsLatticeModifications import addTeapotMomentsNodeSet
 from .TeapotDiagnosticsNode import TeapotStatLatsNode, TeapotStatLatsNodeSetMember
 from .TeapotDiagnosticsNode import TeapotMomentsNode, TeapotMomentsNodeSetMember
 from .TeapotDiagnosticsNode import TeapotTuneAnalysisNode
+from .TeapotDiagnosticsNode import TeapotTrajectoryRecorderNode
 
 
 __all__ = []
@@ -29,4 +31,6 @@ __all__.append("addTeapotDiagnosticsNodeAsChild")
 __all__.append("addTeapotStatLatsNodeSet")
 __all__.append("addTeapotMomentsNodeSet")
 __all__.append("TeapotTuneAnalysisNode")
+__all__.append("TeapotTrajectoryRecorderNode")
+__all__.append("readTrajectoryFile")
 __all__.append("profiles")
@@ -10,6 +10,7 @@ from orbit.core.orbit_mpi import mpi_comm, mpi_datatype, mpi_op
 
 import math
 import random
+import struct
 import sys
 from orbit.core import bunch
 
@@ -286,3 +287,26 @@ class BPMSignal:
 
     def getSignalYP(self):
         return self.ypAvg
+
+
+def readTrajectoryFile(fileName):
+    """
+    Reads the binary file written by the BunchTrajectoryRecorder and returns
+    the dictionary {ParticleIdNumber:[(turn,(x,xp,y,yp,z,dE)),...]} with the
+    records of each particle sorted by turn.
+    """
+    trajectories = {}
+    with open(fileName, "rb") as file_in:
+        header = file_in.read(64)
+        if len(header) < 64 or header[0:8] != b"ORBITTRJ":
+            raise ValueError("File " + fileName + " is not a trajectory file.")
+        order = "<"
+        if struct.unpack("<i", header[24:28])[0] != 0x01020304:
+            order = ">"
+        (version, recordSize, nRecords) = struct.unpack(order + "iiq", header[8:24])
+        data = file_in.read(nRecords * recordSize)
+    for turn, partId, x, xp, y, yp, z, dE in struct.iter_unpack(order + "ii6d", data):
+        trajectories.setdefault(partId, []).append((turn, (x, xp, y, yp, z, dE)))
+    for partId in trajectories:
+        trajectories[partId].sort(key=lambda record: record[0])
+    return trajectories
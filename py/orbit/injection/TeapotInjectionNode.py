@@ -60,3 +60,15 @@ class TeapotInjectionNode(DriftTEAPOT):
 
     def setnparts(self, nparts):
         self.injectparts.setnparts(nparts)
+
+    def getCheckpointState(self):
+        """
+        Returns the state of the injection that is changed during the tracking.
+        """
+        return self.injectparts.getState()
+
+    def setCheckpointState(self, state):
+        """
+        Restores the state of the injection.
+        """
+        self.injectparts.setState(state)
@@ -91,6 +91,7 @@ class InjectParts:
         z_local = []
         dE_local = []
         ninjectedlocal = 0
+        lost_coords = ([], [], [], [], [], [])
 
         if rank == 0:
             for i in range(int(self.nparts)):
@@ -107,7 +108,9 @@ class InjectParts:
                     z_rank0.append(z)
                     dE_rank0.append(dE)
                 else:
-                    self.addLostParticle(self.bunch, self.lostbunch, x, px, y, py, z, dE)
+                    for coords, value in zip(lost_coords, (x, px, y, py, z, dE)):
+                        coords.append(value)
+            self.addLostParticles(self.bunch, self.lostbunch, *lost_coords)
 
         nPartsLostGlobal = self.lostbunch.getSizeGlobal()
         nPartsTotalGlobal = nPartsGlobal + nPartsLostGlobal
@@ -126,18 +129,16 @@ class InjectParts:
         # ---- inject the equal number of particles on each CPU
         i_start = rank * n_inj_local
         i_stop = (rank + 1) * n_inj_local
-        for i in range(i_start, i_stop):
-            particleId = nPartsTotalGlobal + i
-            self.addInjectedParticle(
-                self.bunch,
-                x_local[i],
-                xp_local[i],
-                y_local[i],
-                yp_local[i],
-                z_local[i],
-                dE_local[i],
-                particleId,
-            )
+        self.addInjectedParticles(
+            self.bunch,
+            x_local[i_start:i_stop],
+            xp_local[i_start:i_stop],
+            y_local[i_start:i_stop],
+            yp_local[i_start:i_stop],
+            z_local[i_start:i_stop],
+            dE_local[i_start:i_stop],
+            nPartsTotalGlobal + i_start,
+        )
 
         # ---- inject the reminder of the particles
         n_max_index = numprocs * n_inj_local
@@ -146,23 +147,23 @@ class InjectParts:
         nPartsLostGlobal = self.lostbunch.getSizeGlobal()
         nPartsTotalGlobal = nPartsGlobal + nPartsLostGlobal
 
-        for i in range(n_remainder):
-            i_cpu = random.randint(0, numprocs - 1)
-            i_cpu = orbit_mpi.MPI_Bcast(i_cpu, mpi_datatype.MPI_INT, 0, comm)
-            if rank == i_cpu:
-                particleId = nPartsTotalGlobal + i
-                self.addInjectedParticle(
-                    self.bunch,
-                    x_local[i + n_max_index],
-                    xp_local[i + n_max_index],
-                    y_local[i + n_max_index],
-                    yp_local[i + n_max_index],
-                    z_local[i + n_max_index],
-                    dE_local[i + n_max_index],
-                    particleId,
-                )
-                # ---- here n_inj_local is just for information for debugging
-                n_inj_local = n_inj_local + 1
+        # ---- the CPUs for all remaining particles are chosen by rank 0 at once
+        i_cpus = [random.randint(0, numprocs - 1) for i in range(n_remainder)]
+        if n_remainder > 0:
+            i_cpus = orbit_mpi.MPI_Bcast(i_cpus, mpi_datatype.MPI_INT, 0, comm)
+        inds = [i for i in range(n_remainder) if i_cpus[i] == rank]
+        self.addInjectedParticles(
+            self.bunch,
+            [x_local[i + n_max_index] for i in inds],
+            [xp_local[i + n_max_index] for i in inds],
+            [y_local[i + n_max_index] for i in inds],
+            [yp_local[i + n_max_index] for i in inds],
+            [z_local[i + n_max_index] for i in inds],
+            [dE_local[i + n_max_index] for i in inds],
+            [nPartsTotalGlobal + i for i in inds],
+        )
+        # ---- here n_inj_local is just for information for debugging
+        n_inj_local = n_inj_local + len(inds)
 
         self.bunch.compress()
         self.lostbunch.compress()
@@ -174,6 +175,59 @@ class InjectParts:
         self.nparts = nparts
         self.npartsfloat = float(nparts)
 
+    def getState(self):
+        """
+        Returns the dictionary with the number of injected particles and
+        the numerical parameters of the distribution functions. Some of the
+        distribution functions change their parameters during the injection.
+        """
+        state = {"nparts": self.nparts, "npartsfloat": self.npartsfloat}
+        for key, distFunc in (("xDistFunc", self.xDistFunc), ("yDistFunc", self.yDistFunc), ("lDistFunc", self.lDistFunc)):
+            params = {}
+            for name, value in vars(distFunc).items():
+                if isinstance(value, (int, float)):
+                    params[name] = value
+            state[key] = params
+        return state
+
+    def setState(self, state):
+        """
+        Restores the state returned by the getState() method.
+        """
+        self.nparts = state["nparts"]
+        self.npartsfloat = state["npartsfloat"]
+        for key, distFunc in (("xDistFunc", self.xDistFunc), ("yDistFunc", self.yDistFunc), ("lDistFunc", self.lDistFunc)):
+            for name, value in state[key].items():
+                setattr(distFunc, name, value)
+
+    def addInjectedParticles(self, bunch, x, px, y, py, z, dE, particleId):
+        """
+        This method adds the list of injected particles to the bunch at once.
+        The particles' Ids start from particleId, or particleId is the list
+        of the Ids of all particles. The particles' attributes are assigned
+        the same way as in the addInjectedParticle method.
+        """
+        if len(x) == 0:
+            return
+        import numpy as np
+
+        ind_start = bunch.addParticles(x, px, y, py, z, dE)
+        ind_stop = ind_start + len(x)
+        # the attributes' columns are filled by the slices for all particles
+        if bunch.hasPartAttr("ParticleIdNumber") != 0:
+            if np.ndim(particleId) == 0:
+                particleId = particleId + np.arange(len(x))
+            with bunch.partAttrColumn("ParticleIdNumber") as ids:
+                np.asarray(ids)[ind_start:ind_stop] = particleId
+        if bunch.hasPartAttr("ParticleInitialCoordinates") != 0:
+            for j, coords in enumerate((x, px, y, py, z, dE)):
+                with bunch.partAttrColumn("ParticleInitialCoordinates", j) as init_coords:
+                    np.asarray(init_coords)[ind_start:ind_stop] = coords
+        if bunch.hasPartAttr("TurnNumber") != 0 and bunch.hasBunchAttrInt("TurnNumber") != 0:
+            turn = 1.0 * bunch.bunchAttrInt("TurnNumber")
+            with bunch.partAttrColumn("TurnNumber") as turns:
+                np.asarray(turns)[ind_start:ind_stop] = turn
+
     def addInjectedParticle(self, bunch, x, px, y, py, z, dE, particleId):
         """
         This method adds the injected particle to the bunch.
@@ -182,22 +236,7 @@ class InjectParts:
         If bunch has InitailCoords attributes they will be assigned
         as well.
         """
-        bunch.addParticle(x, px, y, py, z, dE)
-        if bunch.hasPartAttr("ParticleIdNumber") != 0:
-            particle_index = bunch.getSize() - 1
-            bunch.partAttrValue("ParticleIdNumber", particle_index, 0, particleId)
-        if bunch.hasPartAttr("ParticleInitialCoordinates") != 0:
-            particle_index = bunch.getSize() - 1
-            bunch.partAttrValue("ParticleInitialCoordinates", particle_index, 0, x)
-            bunch.partAttrValue("ParticleInitialCoordinates", particle_index, 1, px)
-            bunch.partAttrValue("ParticleInitialCoordinates", particle_index, 2, y)
-            bunch.partAttrValue("ParticleInitialCoordinates", particle_index, 3, py)
-            bunch.partAttrValue("ParticleInitialCoordinates", particle_index, 4, z)
-            bunch.partAttrValue("ParticleInitialCoordinates", particle_index, 5, dE)
-        if bunch.hasPartAttr("TurnNumber") != 0 and bunch.hasBunchAttrInt("TurnNumber") != 0:
-            particle_index = bunch.getSize() - 1
-            turn = 1.0 * bunch.bunchAttrInt("TurnNumber")
-            bunch.partAttrValue("TurnNumber", particle_index, 0, turn)
+        self.addInjectedParticles(bunch, [x], [px], [y], [py], [z], [dE], particleId)
 
     def addLostParticle(self, bunch, lostbunch, x, px, y, py, z, dE):
         """
@@ -207,6 +246,18 @@ class InjectParts:
         If bunch has InitailCoords attributes they will be assigned
         as well.
         """
+        self.addLostParticles(bunch, lostbunch, [x], [px], [y], [py], [z], [dE])
+
+    def addLostParticles(self, bunch, lostbunch, x, px, y, py, z, dE):
+        """
+        This method adds the list of lost particles to the lost particles
+        bunch at once. The particles' attributes are assigned the same way
+        as in the addLostParticle method.
+        """
+        if len(x) == 0:
+            return
+        import numpy as np
+
         # ---- check bunch for particle attributes
         if bunch.hasPartAttr("ParticleIdNumber") != 0 and lostbunch.hasPartAttr("ParticleIdNumber") == 0:
             lostbunch.addPartAttr("ParticleIdNumber")
@@ -216,23 +267,19 @@ class InjectParts:
             lostbunch.addPartAttr("TurnNumber")
         # ----------------------------------------------------
 
-        lostbunch.addParticle(x, px, y, py, z, dE)
+        ind_start = lostbunch.addParticles(x, px, y, py, z, dE)
+        ind_stop = ind_start + len(x)
 
         if lostbunch.hasPartAttr("ParticleIdNumber") != 0:
-            particle_index = lostbunch.getSize() - 1
-            particleId = -1
-            lostbunch.partAttrValue("ParticleIdNumber", particle_index, 0, particleId)
+            with lostbunch.partAttrColumn("ParticleIdNumber") as ids:
+                np.asarray(ids)[ind_start:ind_stop] = -1.0
 
         if lostbunch.hasPartAttr("ParticleInitialCoordinates") != 0:
-            particle_index = lostbunch.getSize() - 1
-            lostbunch.partAttrValue("ParticleInitialCoordinates", particle_index, 0, x)
-            lostbunch.partAttrValue("ParticleInitialCoordinates", particle_index, 1, px)
-            lostbunch.partAttrValue("ParticleInitialCoordinates", particle_index, 2, y)
-            lostbunch.partAttrValue("ParticleInitialCoordinates", particle_index, 3, py)
-            lostbunch.partAttrValue("ParticleInitialCoordinates", particle_index, 4, z)
-            lostbunch.partAttrValue("ParticleInitialCoordinates", particle_index, 5, dE)
+            for j, coords in enumerate((x, px, y, py, z, dE)):
+                with lostbunch.partAttrColumn("ParticleInitialCoordinates", j) as init_coords:
+                    np.asarray(init_coords)[ind_start:ind_stop] = coords
 
         if lostbunch.hasPartAttr("TurnNumber") != 0 and bunch.hasBunchAttrInt("TurnNumber") != 0:
-            particle_index = lostbunch.getSize() - 1
             turn = 1.0 * bunch.bunchAttrInt("TurnNumber")
-            lostbunch.partAttrValue("TurnNumber", particle_index, 0, turn)
+            with lostbunch.partAttrColumn("TurnNumber") as turns:
+                np.asarray(turns)[ind_start:ind_stop] = turn
@@ -31,6 +31,11 @@ class AccLattice(NamedObject, TypedObject):
         self.__isInitialized = False
         self.__children = []
         self.__childPositions = {}
+        # the flat schedules of the trackActions steps for the nodes of the first level
+        self.__actionSchedules = {}
+        # the counter of the changes in the structures of the nodes of this lattice
+        self.__structureEpoch = 0
+        self.__scheduleEpoch = -1
 
     def initialize(self):
         """
@@ -52,6 +57,10 @@ class AccLattice(NamedObject, TypedObject):
                 res_dict[node] = None
             node.initialize()
         del res_dict
+        self.__actionSchedules = {}
+        self.__scheduleEpoch = self.__structureEpoch
+        for node in self.__children:
+            self.getActionSchedule(node)
 
         paramsDict = {}
         actions = AccActionsContainer()
@@ -96,6 +105,7 @@ class AccLattice(NamedObject, TypedObject):
             else:
                 self.__children.insert(index, node)
             self.__isInitialized = False
+            self.__scheduleEpoch = -1
 
     def getNodes(self):
         """
@@ -110,6 +120,7 @@ class AccLattice(NamedObject, TypedObject):
         of the first level in the lattice.
         """
         self.__children = childrenNodes
+        self.__scheduleEpoch = -1
 
     def getNodeForName(self, name):
         """
@@ -245,9 +256,62 @@ class AccLattice(NamedObject, TypedObject):
         """
         return self._getSubLattice(AccLattice(), index_start, index_stop)
 
+    def saveCheckpoint(self, dir_name, bunch, lostbunch=None, user_state=None):
+        """
+        Saves the bunch, the lost bunch, the random generators, and the states
+        of the lattice nodes into the checkpoint directory.
+        The tracking can be continued later by loadCheckpoint(...).
+        """
+        from ..utils.checkpoint import saveCheckpoint
+
+        saveCheckpoint(dir_name, self, bunch, lostbunch, user_state)
+
+    def loadCheckpoint(self, dir_name, bunch, lostbunch=None):
+        """
+        Restores the state saved by saveCheckpoint(...) and returns the user_state.
+        The lattice should be the same, and the number of CPUs should be the same.
+        """
+        from ..utils.checkpoint import loadCheckpoint
+
+        return loadCheckpoint(dir_name, self, bunch, lostbunch)
+
+    def getActionSchedule(self, node):
+        """
+        Method. Returns the flat schedule of the trackActions steps for the node
+        of the first level. The schedules are kept until the structure of any node
+        of this lattice or the lattice itself is changed. The child nodes should be changed
+        by the addChildNode, insertChildNode, and removeChildNode methods of the nodes.
+        """
+        if self.__scheduleEpoch != self.__structureEpoch:
+            self.__actionSchedules = {}
+            self.__scheduleEpoch = self.__structureEpoch
+        schedule = self.__actionSchedules.get(node)
+        if schedule == None:
+            schedule = []
+            node.addToActionSchedule(schedule, self)
+            self.__actionSchedules[node] = schedule
+        return schedule
+
+    def getStructureEpoch(self):
+        """
+        Method. Returns the counter of the changes in the structures of the nodes
+        of this lattice. The changes are counted after the action schedules of the
+        nodes are built, because the nodes know their lattice only after that.
+        """
+        return self.__structureEpoch
+
+    def _structureChanged(self):
+        """
+        Method. It is called by the nodes of this lattice after the changes
+        in their structures. The action schedules will be built again.
+        """
+        self.__structureEpoch += 1
+
     def trackActions(self, actionsContainer, paramsDict={}, index_start=-1, index_stop=-1):
         """
         Method. Tracks the actions through all nodes in the lattice. The indexes are inclusive.
+        The steps are the same as for the trackActions(...) method of the nodes, but they
+        are taken from the flat schedules of the nodes.
         """
         paramsDict["lattice"] = self
         paramsDict["actions"] = actionsContainer
@@ -257,7 +321,25 @@ class AccLattice(NamedObject, TypedObject):
             index_start = 0
         if index_stop < 0:
             index_stop = len(self.__children) - 1
+        # the steps without actions only change the active parts and the path length
+        hasActions = [len(actionsContainer.getActions(place)) > 0 for place in (AccNode.ENTRANCE, AccNode.BODY, AccNode.EXIT)]
         for node in self.__children[index_start : index_stop + 1]:
-            paramsDict["node"] = node
-            paramsDict["parentNode"] = self
-            node.trackActions(actionsContainer, paramsDict)
+            for step in self.getActionSchedule(node):
+                (stepNode, parentNode, place, partIndex, parentPartIndex, length) = step
+                if place == None:
+                    # the node with its own trackActions(...) method
+                    if parentPartIndex != None:
+                        parentNode.setActivePartIndex(parentPartIndex)
+                    paramsDict["node"] = stepNode
+                    paramsDict["parentNode"] = parentNode
+                    stepNode.trackActions(actionsContainer, paramsDict)
+                    continue
+                stepNode.setActivePartIndex(partIndex)
+                if parentPartIndex != None:
+                    parentNode.setActivePartIndex(parentPartIndex)
+                if hasActions[place]:
+                    paramsDict["node"] = stepNode
+                    paramsDict["parentNode"] = parentNode
+                    actionsContainer.performActions(paramsDict, place)
+                if length != 0.0:
+                    paramsDict["path_length"] += length
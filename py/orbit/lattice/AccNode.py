@@ -1,6 +1,7 @@
 import sys
 import os
 import math
+import weakref
 
 from ..utils import orbitFinalize
 from ..utils import NamedObject
@@ -30,6 +31,12 @@ class AccNode(NamedObject, TypedObject, ParamsDictObject):
         TypedObject.__init__(self, type_in)
         ParamsDictObject.__init__(self)
         # ------------------------------------------------
+        # The parent nodes and lattices are notified about
+        # the changes in the structure of this node. They
+        # are kept as weak references.
+        # ------------------------------------------------
+        self.__parents = weakref.WeakSet()
+        # ------------------------------------------------
         # nParts - number of parts in the body of node
         # ------------------------------------------------
         self.__nParts = 1
@@ -82,6 +89,7 @@ class AccNode(NamedObject, TypedObject, ParamsDictObject):
         L = float(L)
         if math.fabs(L) < 1.0e-36:
             L = 0.0
+        self._structureChanged()
         if index >= 0:
             self.__lengthArr[index] = L
             return
@@ -132,6 +140,7 @@ class AccNode(NamedObject, TypedObject, ParamsDictObject):
             msg = msg + "N body children=" + n_body_children
             msg = msg + os.linesep
             orbitFinalize(msg)
+        self._structureChanged()
         self.__lengthArr = []
         self.__childNodesArr[AccNode.BODY] = []
         for i in range(self.__nParts):
@@ -145,6 +154,20 @@ class AccNode(NamedObject, TypedObject, ParamsDictObject):
         """
         pass
 
+    def getCheckpointState(self):
+        """
+        Returns the picklable state of the node that is changed during
+        the tracking and is needed to continue the tracking after
+        the restart. The base node has no such state and returns None.
+        """
+        return None
+
+    def setCheckpointState(self, state):
+        """
+        Restores the state of the node returned by getCheckpointState().
+        """
+        pass
+
     def getNumberOfChildren(self):
         """
         Returns the total number of direct children
@@ -175,29 +198,38 @@ class AccNode(NamedObject, TypedObject, ParamsDictObject):
         The action of the child occurs after the action of the
         parent at the entrance and before at the exit.
         """
-        nodes = None
-        if place == AccNode.ENTRANCE or place == AccNode.EXIT:
-            nodes = self.__childNodesArr[place]
-        else:
-            if place != AccNode.BODY:
-                msg = "The Class AccNode: error in method addChildNode(node,place,part_index,place_in_part)!"
-                msg = msg + os.linesep
-                msg = msg + "place parameter should be AccNode.ENTRANCE, AccNode.BODY, or AccNode.EXIT!"
-                msg = msg + os.linesep
-                msg = msg + "You specified place=" + place
-                msg = msg + os.linesep
-                msg = msg + "(part_index,place_in_part) =" + (part_index, place_in_part)
-                msg = msg + os.linesep
-                msg = msg + "Fix it!"
-                msg = msg + os.linesep
-                orbitFinalize(msg)
-            nodes = self.__childNodesArr[place][part_index][place_in_part]
+        nodes = self._getChildNodesList(place, part_index, place_in_part, "addChildNode")
         nodes.append(node)
+        self._structureChanged()
+
+    def insertChildNode(self, index, node, place, part_index=0, place_in_part=AccActionsContainer.BEFORE):
+        """
+        Method. Inserts a child node at the index position of the list
+        defined by place and (maybe) part index and place in the part
+        (before or after).
+        """
+        nodes = self._getChildNodesList(place, part_index, place_in_part, "insertChildNode")
+        nodes.insert(index, node)
+        self._structureChanged()
+
+    def removeChildNode(self, node, place, part_index=0, place_in_part=AccActionsContainer.BEFORE):
+        """
+        Method. Removes a child node from the list defined by place and
+        (maybe) part index and place in the part (before or after).
+        The removed node keeps the reference to this node as a parent,
+        so its later changes may only rebuild the action schedules once more.
+        """
+        nodes = self._getChildNodesList(place, part_index, place_in_part, "removeChildNode")
+        nodes.remove(node)
+        self._structureChanged()
 
     def getChildNodes(self, place, part_index=0, place_in_part=AccActionsContainer.BEFORE):
         """
         Method. Returns a list of all children specified by place and
         (maybe) part index and place in the part (before or after).
+        The children should be changed by the addChildNode, insertChildNode,
+        and removeChildNode methods. If the returned list is changed directly,
+        the lattice should be initialized again to update the action schedules.
         """
         nodes = None
         if place == AccNode.ENTRANCE or place == AccNode.EXIT:
@@ -206,6 +238,43 @@ class AccNode(NamedObject, TypedObject, ParamsDictObject):
             nodes = self.__childNodesArr[place][part_index][place_in_part]
         return nodes
 
+    def _addParent(self, parent):
+        """
+        Method. Adds the parent node or lattice that should be notified
+        about the changes in the structure of this node. The parents are
+        added when the action schedules are built.
+        """
+        self.__parents.add(parent)
+
+    def _structureChanged(self):
+        """
+        Method. Notifies the parent nodes and lattices that the structure
+        of this node was changed and the action schedules are obsolete.
+        """
+        for parent in list(self.__parents):
+            parent._structureChanged()
+
+    def _getChildNodesList(self, place, part_index, place_in_part, method_name):
+        """
+        Method. Returns the internal list of children specified by place and
+        (maybe) part index and place in the part (before or after).
+        """
+        if place == AccNode.ENTRANCE or place == AccNode.EXIT:
+            return self.__childNodesArr[place]
+        if place != AccNode.BODY:
+            msg = "The Class AccNode: error in method " + method_name + "(node,place,part_index,place_in_part)!"
+            msg = msg + os.linesep
+            msg = msg + "place parameter should be AccNode.ENTRANCE, AccNode.BODY, or AccNode.EXIT!"
+            msg = msg + os.linesep
+            msg = msg + "You specified place=" + str(place)
+            msg = msg + os.linesep
+            msg = msg + "(part_index,place_in_part) =" + str((part_index, place_in_part))
+            msg = msg + os.linesep
+            msg = msg + "Fix it!"
+            msg = msg + os.linesep
+            orbitFinalize(msg)
+        return self.__childNodesArr[place][part_index][place_in_part]
+
     def getBodyChildren(self):
         """
         Returns the array of direct childrens of this
@@ -240,6 +309,7 @@ class AccNode(NamedObject, TypedObject, ParamsDictObject):
         distribution etc. Here this node specific reversal method should
         be empty.
         """
+        self._structureChanged()
         self.__lengthArr.reverse()
         self.__childNodesArr.reverse()
         self.__childNodesArr[AccNode.ENTRANCE].reverse()
@@ -301,6 +371,40 @@ class AccNode(NamedObject, TypedObject, ParamsDictObject):
         txt += os.linesep
         return txt
 
+    def addToActionSchedule(self, schedule, parentNode=None, parentPartIndex=None):
+        """
+        Method. Appends the steps of the trackActions(...) method for this node
+        and its children to the flat schedule list. The step is the tuple
+        (node, parentNode, place, partIndex, parentPartIndex, length), where
+        the length is added to the path length after the actions of the step.
+        The parentPartIndex is None if the parent is not an accelerator node.
+        The node with its own trackActions(...) method is added as one step
+        with the place None, and this method is called for it during the tracking.
+        """
+        if parentNode != None:
+            self._addParent(parentNode)
+        if type(self).trackActions is not AccNode.trackActions:
+            schedule.append((self, parentNode, None, -1, parentPartIndex, 0.0))
+            return
+        has_length = False
+        if self.getLength() > 0.0:
+            has_length = True
+        schedule.append((self, parentNode, AccNode.ENTRANCE, -1, parentPartIndex, 0.0))
+        for node in self.__childNodesArr[AccNode.ENTRANCE]:
+            node.addToActionSchedule(schedule, self, -1)
+        for i in range(self.__nParts):
+            for node in self.__childNodesArr[AccNode.BODY][i][AccNode.BEFORE]:
+                node.addToActionSchedule(schedule, self, i)
+            length = 0.0
+            if has_length:
+                length = self.getLength(i)
+            schedule.append((self, parentNode, AccNode.BODY, i, parentPartIndex, length))
+            for node in self.__childNodesArr[AccNode.BODY][i][AccNode.AFTER]:
+                node.addToActionSchedule(schedule, self, i)
+        for node in self.__childNodesArr[AccNode.EXIT]:
+            node.addToActionSchedule(schedule, self, -1)
+        schedule.append((self, parentNode, AccNode.EXIT, -1, parentPartIndex, 0.0))
+
     def trackActions(self, actionsContainer, paramsDict={}):
         """
         Method. Tracks the actions through the accelerator node.
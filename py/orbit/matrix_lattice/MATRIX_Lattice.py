@@ -11,6 +11,8 @@ The  This class cannot calculate chromaticities.
 import os
 import math
 
+import numpy as np
+
 
 # import bunch
 from orbit.core.bunch import Bunch
@@ -43,6 +45,13 @@ class MATRIX_Lattice(AccLattice):
         self.Matrix = Matrix(7, 7)
         self.Matrix.unit()
 
+        # the cached list of the matrix nodes and the numpy arrays of their lengths and matrices
+        self.__matrixNodes = None
+        self.__matrixArrays = None
+        # the segment tree of the matrix products, the level 0 is the array of
+        # the node matrices, and the last level is the one turn matrix
+        self.__productTree = None
+
     def initialize(self):
         """
         Method. Initializes the matrix lattice, child node structures, and calculates
@@ -51,24 +60,74 @@ class MATRIX_Lattice(AccLattice):
         AccLattice.initialize(self)
         self.makeOneTurnMatrix()
 
-    def makeOneTurnMatrix(self):
+    def addNode(self, node, index=-1):
         """
-        Calculates the one turn matrix.
+        Method. Adds a child node into the lattice. The cached arrays of the matrices are not valid anymore.
         """
-        self.oneTurnMatrix.unit()
-        eps_length = 0.00001  # 10^-6 meter
+        AccLattice.addNode(self, node, index)
+        self.__matrixNodes = None
+        self.__matrixArrays = None
 
-        position = 0.0
-        position_old = position
-        for matrixNode in self.getNodes():
-            if isinstance(matrixNode, BaseMATRIX) == True:
-                self.oneTurnMatrix = matrixNode.getMatrix().mult(self.oneTurnMatrix)
-                """
-				if(abs(position_old-position) > eps_length):
-					print position, self.oneTurnMatrix.get(0,6)
-				position_old = position
-				position = position + matrixNode.getLength()
-				"""
+    def setNodes(self, childrenNodes):
+        """
+        Method. Sets up a new list of all children of the first level in the lattice.
+        The cached arrays of the matrices are not valid anymore.
+        """
+        AccLattice.setNodes(self, childrenNodes)
+        self.__matrixNodes = None
+        self.__matrixArrays = None
+
+    def makeOneTurnMatrix(self):
+        """
+        Calculates the one turn matrix. The matrices of all BaseMATRIX nodes are
+        collected again, and the segment tree of their products is built.
+        """
+        # the nodes could be changed, so the cached arrays are not valid anymore
+        self.__matrixNodes = None
+        self.__matrixArrays = None
+        (lengths, matrices) = self.getMatrixArrays()
+        n_leaves = 1
+        while n_leaves < len(lengths):
+            n_leaves *= 2
+        leaves = np.empty((n_leaves, 7, 7))
+        leaves[: len(lengths)] = matrices
+        leaves[len(lengths) :] = np.eye(7)
+        tree = [leaves]
+        while tree[-1].shape[0] > 1:
+            level = tree[-1]
+            tree.append(np.matmul(level[1::2], level[0::2]))
+        self.__productTree = tree
+        return self.__setOneTurnMatrix()
+
+    def updateOneTurnMatrix(self, indices):
+        """
+        Updates the one turn matrix after the changes of the matrices or lengths of
+        the BaseMATRIX nodes with these indices in the getMatrixArrays() order.
+        Only the products of the segment tree that include these nodes are
+        recalculated. The set of the nodes in the lattice should be the same.
+        """
+        if self.__productTree == None:
+            return self.makeOneTurnMatrix()
+        (lengths, matrices) = self.getMatrixArrays()
+        indices = np.unique(np.array(indices, dtype=int))
+        if len(indices) == 0:
+            return self.oneTurnMatrix
+        tree = self.__productTree
+        tree[0][indices] = matrices[indices]
+        for level in range(1, len(tree)):
+            indices = np.unique(indices // 2)
+            tree[level][indices] = np.matmul(tree[level - 1][2 * indices + 1], tree[level - 1][2 * indices])
+        return self.__setOneTurnMatrix()
+
+    def __setOneTurnMatrix(self):
+        """
+        Makes the new one turn Matrix instance from the root of the segment tree.
+        """
+        root = self.__productTree[-1][0]
+        self.oneTurnMatrix = Matrix(7, 7)
+        for i in range(7):
+            for j in range(7):
+                self.oneTurnMatrix.set(i, j, root[i, j])
         return self.oneTurnMatrix
 
     def makeMatrix(self, pos):
@@ -204,78 +263,14 @@ class MATRIX_Lattice(AccLattice):
         The tracking starts from the values specified as the initial parameters.
         The possible values for direction parameter "x" or "y".
         """
-        if direction.lower() != "x" and direction.lower() != "y":
-            orbitFinalize("Class orbit.matrix_lattice.MATRIX_Lattice, method trackTwissData(...): direction should be x or y.")
-        # track twiss
-        eps_length = 0.00001  # 10^-6 meter
-        dir_ind = 0
-        if direction.lower() == "y":
-            dir_ind = 2
-        gamma = (1.0 + alpha * alpha) / beta
-        track_m = Matrix(3, 3)
-        track_m.unit()
-        track_v = PhaseVector(3)
-        track_v.set(0, alpha)
-        track_v.set(1, beta)
-        track_v.set(2, gamma)
-        position = 0.0
-        pos_arr = []
-        alpha_arr = []
-        beta_arr = []
-        # phi is for tune accumulation
-        phi = 0.0
-        # phase advance
-        mu_arr = []
-        # count = 0
-        pos_arr.append(position)
-        mu_arr.append(phi)
-        alpha_arr.append(track_v.get(0))
-        beta_arr.append(track_v.get(1))
-        for matrixNode in self.getNodes():
-            if isinstance(matrixNode, BaseMATRIX) == True:
-                # only the main nodes are used, the or-cases deal with markers with zero length
-                mt = matrixNode.getMatrix()
-                ind0 = 0 + dir_ind
-                ind1 = 1 + dir_ind
-                track_m.set(
-                    0,
-                    0,
-                    mt.get(ind0, ind0) * mt.get(ind1, ind1) + mt.get(ind0, ind1) * mt.get(ind1, ind0),
-                )
-                track_m.set(0, 1, -mt.get(ind0, ind0) * mt.get(ind1, ind0))
-                track_m.set(0, 2, -mt.get(ind0, ind1) * mt.get(ind1, ind1))
-                track_m.set(1, 0, -2 * mt.get(ind0, ind0) * mt.get(ind0, ind1))
-                track_m.set(1, 1, mt.get(ind0, ind0) * mt.get(ind0, ind0))
-                track_m.set(1, 2, mt.get(ind0, ind1) * mt.get(ind0, ind1))
-                track_m.set(2, 0, -2 * mt.get(ind1, ind0) * mt.get(ind1, ind1))
-                track_m.set(2, 1, mt.get(ind1, ind0) * mt.get(ind1, ind0))
-                track_m.set(2, 2, mt.get(ind1, ind1) * mt.get(ind1, ind1))
-                alpha_0 = track_v.get(0)
-                beta_0 = track_v.get(1)
-                delta_phi = math.atan(mt.get(ind0, ind1) / (beta_0 * mt.get(ind0, ind0) - alpha_0 * mt.get(ind0, ind1)))
-                phi = phi + delta_phi
-                track_v = track_m.mult(track_v)
-                position = position + matrixNode.getLength()
-                # print position, matrixNode.getParam("matrix_parent_node_active_index") == 1
-                # print position, matrixNode.getName(), track_v.get(1)
-
-                if matrixNode.getLength() > 0:
-                    # print position, matrixNode.getName(), track_v.get(1)
-                    pos_arr.append(position)
-                    alpha_arr.append(track_v.get(0))
-                    beta_arr.append(track_v.get(1))
-                    mu_arr.append(phi / (2 * math.pi))
-            # count = count + 1
-        # pack the resulting tuple
-        tune = phi / (2 * math.pi)
-        graph_alpha_arr = []
-        graph_beta_arr = []
-        graph_mu_arr = []
-        # print count, len(pos_arr)
-        for i in range(len(pos_arr)):
-            graph_mu_arr.append((pos_arr[i], mu_arr[i]))
-            graph_alpha_arr.append((pos_arr[i], alpha_arr[i]))
-            graph_beta_arr.append((pos_arr[i], beta_arr[i]))
+        (pos_arr, mu_arr, alpha_arr, beta_arr) = self.getTwissArrays(alpha, beta, direction)
+        # only the nodes with non-zero length are used, it excludes markers
+        (lengths, matrices) = self.getMatrixArrays()
+        indices = np.concatenate(([0], np.nonzero(lengths > 0.0)[0] + 1))
+        pos_arr = pos_arr[indices].tolist()
+        graph_mu_arr = list(zip(pos_arr, mu_arr[indices].tolist()))
+        graph_alpha_arr = list(zip(pos_arr, alpha_arr[indices].tolist()))
+        graph_beta_arr = list(zip(pos_arr, beta_arr[indices].tolist()))
         return (graph_mu_arr, graph_alpha_arr, graph_beta_arr)
 
     def getRingDispersionDataX(self, momentum, mass):
@@ -302,61 +297,11 @@ class MATRIX_Lattice(AccLattice):
         The tracking starts from the values specified as the initial parameters.
         The possible values for direction parameter "x" or "y".
         """
-        if direction.lower() != "x" and direction.lower() != "y":
-            orbitFinalize("Class orbit.matrix_lattice.MATRIX_Lattice, method trackDispersionData(...): direction should be x or y.")
-        # track dispersion
-        eps_length = 0.00001  # 10^-6 meter
-        dir_ind = 0
-        if direction.lower() == "y":
-            dir_ind = 2
-        track_m = Matrix(3, 3)
-        track_m.unit()
-        track_m.set(2, 0, 0.0)
-        track_m.set(2, 1, 0.0)
-        track_m.set(2, 2, 1.0)
-        track_v = PhaseVector(3)
-        # kinematics coefficient calculation
-        Etotal = math.sqrt(momentum**2 + mass**2)
-        beta = momentum / Etotal
-        gamma = Etotal / mass
-        Ekin = Etotal - mass
-        m_coeff = momentum * momentum / (mass + Ekin)
-        track_v.set(0, disp)
-        track_v.set(1, disp_p)
-        track_v.set(2, 1.0)
-        position = 0.0
-        pos_arr = []
-        disp_arr = []
-        disp_p_arr = []
-        # put in array the initial dispersions
-        # count = 0
-        pos_arr.append(position)
-        disp_arr.append(track_v.get(0))
-        disp_p_arr.append(track_v.get(1))
-        for matrixNode in self.getNodes():
-            if isinstance(matrixNode, BaseMATRIX) == True:
-                mt = matrixNode.getMatrix()
-                ind0 = 0 + dir_ind
-                ind1 = 1 + dir_ind
-                track_m.set(0, 0, mt.get(ind0, ind0))
-                track_m.set(0, 1, mt.get(ind0, ind1))
-                track_m.set(1, 0, mt.get(ind1, ind0))
-                track_m.set(1, 1, mt.get(ind1, ind1))
-                track_m.set(0, 2, mt.get(ind0, 5) * m_coeff)
-                track_m.set(1, 2, mt.get(ind1, 5) * m_coeff)
-                track_v = track_m.mult(track_v)
-                position = position + matrixNode.getLength()
-                # only the main nodes are used, the or-cases deal with markers with zero length
-                if isinstance(matrixNode, BaseMATRIX) == True:
-                    pos_arr.append(position)
-                    disp_arr.append(track_v.get(0))
-                    disp_p_arr.append(track_v.get(1))
+        (pos_arr, disp_arr, disp_p_arr) = self.getDispersionArrays(momentum, mass, disp, disp_p, direction)
         # pack the resulting tuple
-        graph_disp_arr = []
-        graph_disp_p_arr = []
-        for i in range(len(pos_arr)):
-            graph_disp_arr.append((pos_arr[i], disp_arr[i]))
-            graph_disp_p_arr.append((pos_arr[i], disp_p_arr[i]))
+        pos_arr = pos_arr.tolist()
+        graph_disp_arr = list(zip(pos_arr, disp_arr.tolist()))
+        graph_disp_p_arr = list(zip(pos_arr, disp_p_arr.tolist()))
         return (graph_disp_arr, graph_disp_p_arr)
 
     def getRingOrbit(self, z0):
@@ -371,71 +316,146 @@ class MATRIX_Lattice(AccLattice):
         The tracking starts from the values specified as the initial parameters.
         z0 fulfill: z0 = Mz0 with M as one turn matrix
         """
-
         eps_length = 0.00001  # 10^-6 meter
+        (pos_arr, coords_arr) = self.getOrbitArrays(z0)
+        # the orbit is not repeated for the nodes with zero length
+        n_nodes = len(pos_arr) - 1
+        steps = np.abs(pos_arr[1:n_nodes] - pos_arr[0 : n_nodes - 1]) > eps_length
+        indices = np.concatenate(([0], np.nonzero(steps)[0] + 1, [n_nodes]))
+        # pack the resulting tuple
+        pos_arr = pos_arr[indices].tolist()
+        coords_arr = coords_arr[indices].T.tolist()
+        graph_orbitX_arr = list(zip(pos_arr, coords_arr[0], coords_arr[1]))
+        graph_orbitY_arr = list(zip(pos_arr, coords_arr[2], coords_arr[3]))
+        return (graph_orbitX_arr, graph_orbitY_arr)
 
-        pos_arr = []
-        orbitX_arr = []
-        orbitY_arr = []
-        orbitXP_arr = []
-        orbitYP_arr = []
-
-        position = 0.0
-        pos_arr.append(position)
-
-        track_o = Matrix(6, 6)
-
-        track_ov = PhaseVector(6)
-        track_ov.set(0, z0[0])
-        track_ov.set(1, z0[1])
-        track_ov.set(2, z0[2])
-        track_ov.set(3, z0[3])
-        track_ov.set(4, z0[4])
-        track_ov.set(5, z0[5])
-
-        orbitX_arr.append(track_ov.get(0))
-        orbitY_arr.append(track_ov.get(2))
-        orbitXP_arr.append(track_ov.get(1))
-        orbitYP_arr.append(track_ov.get(3))
-
-        position_old = position
-
-        for matrixNode in self.getNodes():
-            if isinstance(matrixNode, BaseMATRIX) == True:
-                if abs(position_old - position) > eps_length:
-                    pos_arr.append(position)
-                    orbitX_arr.append(track_ov.get(0))
-                    orbitY_arr.append(track_ov.get(2))
-                    orbitXP_arr.append(track_ov.get(1))
-                    orbitYP_arr.append(track_ov.get(3))
-
-                mt = matrixNode.getMatrix()
-
-                for i in range(6):
-                    for j in range(6):
-                        track_o.set(i, j, mt.get(i, j))
-                track_ov = track_o.mult(track_ov)
-
-                for i in range(6):
-                    tmp = track_ov.get(i)
-                    track_ov.set(i, tmp + mt.get(i, 6))
-
-                position_old = position
-                position = position + matrixNode.getLength()
+    def getMatrixArrays(self):
+        """
+        Returns the tuple (lengths, matrices) with the numpy arrays of the lengths [N]
+        and the 7x7 transport matrices [N][7][7] of the BaseMATRIX nodes. The list of the
+        nodes is cached until the nodes of the lattice are changed, and the values are read
+        again from the nodes at each call. After changes in the matrices the one turn matrix
+        should be recalculated by makeOneTurnMatrix() or updateOneTurnMatrix(indices).
+        """
+        if self.__matrixArrays == None:
+            matrixNodes = [node for node in self.getNodes() if isinstance(node, BaseMATRIX)]
+            self.__matrixNodes = matrixNodes
+            self.__matrixArrays = (np.empty(len(matrixNodes)), np.empty((len(matrixNodes), 7, 7)))
+        (lengths, matrices) = self.__matrixArrays
+        for ind, matrixNode in enumerate(self.__matrixNodes):
+            matrixNode.getMatrix().getValues(matrices[ind])
+            lengths[ind] = matrixNode.getLength()
+        return self.__matrixArrays
+
+    def getPositionArray(self):
+        """
+        Returns the numpy array [N+1] of the positions at the entrance of the lattice
+        and after each BaseMATRIX node.
+        """
+        (lengths, matrices) = self.getMatrixArrays()
+        return np.concatenate(([0.0], np.cumsum(lengths)))
 
-        pos_arr.append(position)
-        orbitX_arr.append(track_ov.get(0))
-        orbitY_arr.append(track_ov.get(2))
-        orbitXP_arr.append(track_ov.get(1))
-        orbitYP_arr.append(track_ov.get(3))
-        # pack the resulting tuple
-        graph_orbitX_arr = []
-        graph_orbitY_arr = []
-        for i in range(len(pos_arr)):
-            graph_orbitX_arr.append((pos_arr[i], orbitX_arr[i], orbitXP_arr[i]))
-            graph_orbitY_arr.append((pos_arr[i], orbitY_arr[i], orbitYP_arr[i]))
+    def getCumulativeMatrices(self):
+        """
+        Returns the numpy array [N+1][7][7] of the transport matrices from the entrance
+        of the lattice to the entrance and to the exit of each BaseMATRIX node.
+        """
+        (lengths, matrices) = self.getMatrixArrays()
+        return _getCumulativeProducts(matrices)
 
-        return (graph_orbitX_arr, graph_orbitY_arr)
+    def getTwissArrays(self, alpha, beta, direction="x"):
+        """
+        Returns the tuple of the numpy arrays (positions, phase advances/2/pi, alphas, betas)
+        at the entrance of the lattice and after each BaseMATRIX node. The tracking starts
+        from the values specified as the initial parameters. The possible values for
+        direction parameter "x" or "y".
+        """
+        if direction.lower() != "x" and direction.lower() != "y":
+            orbitFinalize("Class orbit.matrix_lattice.MATRIX_Lattice, method getTwissArrays(...): direction should be x or y.")
+        dir_ind = 0
+        if direction.lower() == "y":
+            dir_ind = 2
+        (lengths, matrices) = self.getMatrixArrays()
+        blocks = matrices[:, dir_ind : dir_ind + 2, dir_ind : dir_ind + 2]
+        cum_m = _getCumulativeProducts(blocks)
+        gamma = (1.0 + alpha * alpha) / beta
+        m00 = cum_m[:, 0, 0]
+        m01 = cum_m[:, 0, 1]
+        m10 = cum_m[:, 1, 0]
+        m11 = cum_m[:, 1, 1]
+        beta_arr = m00 * m00 * beta - 2 * m00 * m01 * alpha + m01 * m01 * gamma
+        alpha_arr = -m00 * m10 * beta + (m00 * m11 + m01 * m10) * alpha - m01 * m11 * gamma
+        # the phase advance of each node for the Twiss parameters at its entrance
+        with np.errstate(divide="ignore"):
+            delta_phi = np.arctan(blocks[:, 0, 1] / (beta_arr[:-1] * blocks[:, 0, 0] - alpha_arr[:-1] * blocks[:, 0, 1]))
+        mu_arr = np.concatenate(([0.0], np.cumsum(delta_phi))) / (2 * math.pi)
+        return (self.getPositionArray(), mu_arr, alpha_arr, beta_arr)
+
+    def getDispersionArrays(self, momentum, mass, disp, disp_p, direction="x"):
+        """
+        Returns the tuple of the numpy arrays (positions, disp, disp_p) at the entrance
+        of the lattice and after each BaseMATRIX node. The tracking starts from the values
+        specified as the initial parameters. The possible values for direction parameter "x" or "y".
+        """
+        if direction.lower() != "x" and direction.lower() != "y":
+            orbitFinalize("Class orbit.matrix_lattice.MATRIX_Lattice, method getDispersionArrays(...): direction should be x or y.")
+        dir_ind = 0
+        if direction.lower() == "y":
+            dir_ind = 2
+        # kinematics coefficient calculation
+        Etotal = math.sqrt(momentum**2 + mass**2)
+        Ekin = Etotal - mass
+        m_coeff = momentum * momentum / (mass + Ekin)
+        (lengths, matrices) = self.getMatrixArrays()
+        blocks = np.zeros((len(lengths), 3, 3))
+        blocks[:, 0:2, 0:2] = matrices[:, dir_ind : dir_ind + 2, dir_ind : dir_ind + 2]
+        blocks[:, 0:2, 2] = matrices[:, dir_ind : dir_ind + 2, 5] * m_coeff
+        blocks[:, 2, 2] = 1.0
+        vectors = _getCumulativeProducts(blocks).dot(np.array([disp, disp_p, 1.0]))
+        return (self.getPositionArray(), vectors[:, 0], vectors[:, 1])
+
+    def getOrbitArrays(self, z0):
+        """
+        Returns the tuple of the numpy arrays (positions, coordinates [N+1][6]) at the entrance
+        of the lattice and after each BaseMATRIX node. The tracking starts from the 6D
+        coordinates z0. The 7th column of the matrices is the shift of the coordinates.
+        """
+        (lengths, matrices) = self.getMatrixArrays()
+        blocks = matrices.copy()
+        blocks[:, 6, :] = 0.0
+        blocks[:, 6, 6] = 1.0
+        z = np.ones(7)
+        z[:6] = [z0[i] for i in range(6)]
+        coords = _getCumulativeProducts(blocks).dot(z)
+        return (self.getPositionArray(), coords[:, :6])
+
+    def getRingOpticsArrays(self, momentum, mass):
+        """
+        Returns the dictionary with the numpy arrays of the periodic Twiss parameters,
+        phase advances/2/pi, and dispersions at the entrance of the lattice and after
+        each BaseMATRIX node. The keys are "position", "phase x", "alpha x", "beta x",
+        "dispersion x", "dispersion prime x", and the same for y. The initial values
+        are found from the one turn matrix, and the dictionary is empty if the motion
+        is not stable.
+        """
+        res_dict = MATRIX_Lattice.getRingParametersDict(self, momentum, mass)
+        arrays_dict = {}
+        if res_dict["beta x [m]"] == None:
+            return arrays_dict
+        arrays_dict["position"] = self.getPositionArray()
+        for direction in ("x", "y"):
+            alpha = res_dict["alpha " + direction]
+            beta = res_dict["beta " + direction + " [m]"]
+            disp = res_dict["dispersion " + direction + " [m]"]
+            disp_p = res_dict["dispersion prime " + direction]
+            (pos_arr, mu_arr, alpha_arr, beta_arr) = self.getTwissArrays(alpha, beta, direction)
+            (pos_arr, disp_arr, disp_p_arr) = self.getDispersionArrays(momentum, mass, disp, disp_p, direction)
+            arrays_dict["phase " + direction] = mu_arr
+            arrays_dict["alpha " + direction] = alpha_arr
+            arrays_dict["beta " + direction] = beta_arr
+            arrays_dict["dispersion " + direction] = disp_arr
+            arrays_dict["dispersion prime " + direction] = disp_p_arr
+        return arrays_dict
 
     def getSubLattice(
         self,
@@ -463,3 +483,35 @@ class MATRIX_Lattice(AccLattice):
         actionContainer.addAction(track, AccActionsContainer.BODY)
         self.trackActions(actionContainer, paramsDict)
         actionContainer.removeAction(track, AccActionsContainer.BODY)
+
+
+def _getCumulativeProducts(matrices):
+    """
+    Returns the array [N+1][n][n] of the products M[k-1]*...*M[0] of the
+    first k matrices of the array [N][n][n]. The matrices are divided into
+    sqrt(N) blocks, the products inside all blocks are found simultaneously,
+    and then they are multiplied by the products of the previous blocks.
+    """
+    (n_matrices, n) = (matrices.shape[0], matrices.shape[1])
+    products = np.empty((n_matrices + 1, n, n))
+    products[0] = np.eye(n)
+    if n_matrices == 0:
+        return products
+    block = int(math.ceil(math.sqrt(n_matrices)))
+    n_blocks = (n_matrices + block - 1) // block
+    padded = np.empty((n_blocks * block, n, n))
+    padded[:n_matrices] = matrices
+    padded[n_matrices:] = np.eye(n)
+    padded = padded.reshape((n_blocks, block, n, n))
+    # the products inside the blocks
+    local = np.empty((n_blocks, block, n, n))
+    local[:, 0] = padded[:, 0]
+    for ind in range(1, block):
+        local[:, ind] = np.matmul(padded[:, ind], local[:, ind - 1])
+    # the products of all matrices before the block
+    starts = np.empty((n_blocks, n, n))
+    starts[0] = np.eye(n)
+    for ind in range(1, n_blocks):
+        starts[ind] = local[ind - 1, block - 1].dot(starts[ind - 1])
+    products[1:] = np.matmul(local, starts[:, np.newaxis]).reshape((n_blocks * block, n, n))[:n_matrices]
+    return products
@@ -341,7 +341,7 @@ class BaseErrorController(NamedObject, TypedObject, ParamsDictObject):
         """
         self.entranceErrorAccNodeParent = entranceAccNodeParent
         self.entranceErrorAccNode.setName("ErrNode:" + self.short_type_name + ":Entr:" + entranceAccNodeParent.getName())
-        self.entranceErrorAccNodeParent.getChildNodes(AccNode.ENTRANCE).insert(0, self.entranceErrorAccNode)
+        self.entranceErrorAccNodeParent.insertChildNode(0, self.entranceErrorAccNode, AccNode.ENTRANCE)
 
     def setExitNodeParent(self, exitAccNodeParent):
         """
@@ -375,9 +375,9 @@ class BaseErrorController(NamedObject, TypedObject, ParamsDictObject):
         Removes children representing error nodes from the parent node or nodes.
         """
         if self.entranceErrorAccNodeParent != None and self.entranceErrorAccNode != None:
-            self.entranceErrorAccNodeParent.getChildNodes(AccNode.ENTRANCE).remove(self.entranceErrorAccNode)
+            self.entranceErrorAccNodeParent.removeChildNode(self.entranceErrorAccNode, AccNode.ENTRANCE)
         if self.exitErrorAccNodeParent != None and self.exitErrorAccNode != None:
-            self.exitErrorAccNodeParent.getChildNodes(AccNode.EXIT).remove(self.exitErrorAccNode)
+            self.exitErrorAccNodeParent.removeChildNode(self.exitErrorAccNode, AccNode.EXIT)
 
 
 class ErrorCntrlLongitudinalDisplacement(BaseErrorController):
@@ -177,7 +177,7 @@ class LinacMagnetNode(LinacNode):
         self.__fringeFieldIN.setName(name + "_fringe_in")
         self.__fringeFieldOUT.setName(name + "_fringe_out")
         self.addChildNode(self.__fringeFieldIN, AccNode.ENTRANCE)
-        self.getChildNodes(AccNode.EXIT).insert(0, self.__fringeFieldOUT)
+        self.insertChildNode(0, self.__fringeFieldOUT, AccNode.EXIT)
         self.setType("linacMagnet")
 
     def getField(self):
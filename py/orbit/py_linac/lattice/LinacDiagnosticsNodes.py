@@ -136,31 +136,21 @@ class LinacBPM(BaseLinacNode):
         self.fourier_amp = 0.0
         self.fourier_phase = 0.0  # in deg
         self.amp = 0.0
-        nPartsGlobal = bunch.getSizeGlobal()
+        # ---- the global count and moments are calculated by one MPI reduction
+        stats = bunch.getStatistics()
+        nPartsGlobal = stats["count"]
         if nPartsGlobal == 0:
             return
-        x_avg = 0.0
-        y_avg = 0.0
-        phase_avg = 0.0
         beta = bunch.getSyncParticle().beta()
         z_to_phase = -360.0 * self.frequency / (speed_of_light * beta)
         synch_phase = 360.0 * bunch.getSyncParticle().time() * self.frequency
         self.synch_pahse = phaseNearTargetPhaseDeg(synch_phase, 0.0)
         nParts = bunch.getSize()
-        for ind in range(nParts):
-            x_avg += bunch.x(ind)
-            y_avg += bunch.y(ind)
-            phase_avg += z_to_phase * bunch.z(ind)
-        # ---- for parallel case
-        (x_avg, y_avg, phase_avg) = MPI_Allreduce((x_avg, y_avg, phase_avg), mpi_datatype.MPI_DOUBLE, mpi_op.MPI_SUM, comm)
-        x_avg /= nPartsGlobal
-        y_avg /= nPartsGlobal
-        phase_avg /= nPartsGlobal
-        phase2_avg = 0.0
-        for ind in range(nParts):
-            phase2_avg += (z_to_phase * bunch.z(ind) - phase_avg) ** 2
-        phase2_avg /= nPartsGlobal
-        self.rms_phase = math.sqrt(phase2_avg)
+        x_avg = stats["avg"][0]
+        y_avg = stats["avg"][2]
+        phase_avg = z_to_phase * stats["avg"][4]
+        z2_avg = stats["moments"][4][4] - stats["avg"][4] ** 2
+        self.rms_phase = abs(z_to_phase) * math.sqrt(max(z2_avg, 0.0))
         self.x_avg = x_avg
         self.y_avg = y_avg
         phase_avg += synch_phase
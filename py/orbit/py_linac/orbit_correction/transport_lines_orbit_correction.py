@@ -333,7 +333,7 @@ class TrajectoryCorrection:
                     transvBPM = child
                     break
             if transvBPM != None:
-                child_arr.remove(transvBPM)
+                bpm.removeChildNode(transvBPM, AccNode.ENTRANCE)
         self.transvBPM_arr = []
 
     def cleanQuad_Nodes(self):
@@ -349,7 +349,7 @@ class TrajectoryCorrection:
                         transvBPM = child
                         break
                 if transvBPM != None:
-                    child_arr.remove(transvBPM)
+                    node.removeChildNode(transvBPM, place)
         self.quad_transvBPM_arr = []
 
     def correctTrajectory(self, bunch_initial):
@@ -0,0 +1,330 @@
+"""
+The truncated power series (TPSA) maps of the 6D phase space coordinates.
+The map keeps the coefficients of the polynomials of the coordinates up
+to the particular order. The maps can be evaluated for the arrays of points,
+composed, and transformed into the generating function form that is used
+for the symplectic tracking.
+"""
+
+import os
+
+import numpy as np
+
+# import the function that finalizes the execution
+from ..utils import orbitFinalize
+
+
+class MonomialTable:
+    """
+    The table of the monomials of nVars variables up to the particular order.
+    The monomials are sorted by the degree, so the table of the lower order
+    is the beginning of the table of the higher order. The monomial k is
+    the product of the monomial parents[k] and the variable variables[k].
+    The monomial 0 is 1.
+    """
+
+    def __init__(self, nVars, order):
+        self.nVars = nVars
+        self.order = order
+        exponents = []
+        for degree in range(order + 1):
+            exponents += _getExponents(nVars, degree)
+        self.exponents = np.array(exponents, dtype=int).reshape((len(exponents), nVars))
+        self.degrees = self.exponents.sum(axis=1)
+        self.indexDict = {}
+        for ind, exps in enumerate(exponents):
+            self.indexDict[exps] = ind
+        nMonomials = len(exponents)
+        self.parents = np.zeros(nMonomials, dtype=int)
+        self.variables = np.zeros(nMonomials, dtype=int)
+        self.parents[0] = -1
+        self.variables[0] = -1
+        for ind in range(1, nMonomials):
+            exps = list(exponents[ind])
+            var = [v for v in range(nVars) if exps[v] > 0][0]
+            exps[var] -= 1
+            self.parents[ind] = self.indexDict[tuple(exps)]
+            self.variables[ind] = var
+        # the monomials are numbered by the keys with the exponents as the digits
+        # of the base (order+1), so the key of the product is the sum of the keys
+        keys = self.exponents.dot((order + 1) ** np.arange(nVars))
+        keyOrder = np.argsort(keys)
+        # the product table of the pairs of monomials with the degree up to the order
+        (prodI, prodJ) = ([], [])
+        for ind in range(nMonomials):
+            nPairs = np.count_nonzero(self.degrees <= order - self.degrees[ind])
+            prodI.append(np.full(nPairs, ind))
+            prodJ.append(np.arange(nPairs))
+        self.prodI = np.concatenate(prodI)
+        self.prodJ = np.concatenate(prodJ)
+        self.prodK = keyOrder[np.searchsorted(keys[keyOrder], keys[self.prodI] + keys[self.prodJ])]
+        # the derivative tables (source monomial, result monomial, factor) for each variable
+        self.derivatives = []
+        for var in range(nVars):
+            (src, dst, fac) = ([], [], [])
+            for ind in range(nMonomials):
+                exps = list(self.exponents[ind])
+                if exps[var] > 0:
+                    src.append(ind)
+                    fac.append(float(exps[var]))
+                    exps[var] -= 1
+                    dst.append(self.indexDict[tuple(exps)])
+            self.derivatives.append((np.array(src, dtype=int), np.array(dst, dtype=int), np.array(fac)))
+
+    def getNumberOfMonomials(self):
+        """
+        Returns the number of monomials in the table.
+        """
+        return len(self.parents)
+
+    def evaluate(self, points):
+        """
+        Returns the array [nPoints][nMonomials] of the monomial values for the array
+        of points [nPoints][nVars].
+        """
+        points = np.asarray(points, dtype=float)
+        values = np.empty((points.shape[0], self.getNumberOfMonomials()))
+        values[:, 0] = 1.0
+        for ind in range(1, self.getNumberOfMonomials()):
+            values[:, ind] = values[:, self.parents[ind]] * points[:, self.variables[ind]]
+        return values
+
+    def mult(self, coeffs0, coeffs1):
+        """
+        Returns the coefficients of the product of two polynomials truncated at the order.
+        """
+        return np.bincount(self.prodK, weights=coeffs0[self.prodI] * coeffs1[self.prodJ], minlength=self.getNumberOfMonomials())
+
+    def derivative(self, coeffs, var):
+        """
+        Returns the coefficients of the derivative of the polynomial over the variable.
+        """
+        (src, dst, fac) = self.derivatives[var]
+        res = np.zeros(self.getNumberOfMonomials())
+        res[dst] = coeffs[src] * fac
+        return res
+
+
+# the cache of the monomial tables for (nVars, order)
+_monomialTablesDict = {}
+
+
+def getMonomialTable(nVars, order):
+    """
+    Returns the MonomialTable instance for the number of variables and the order.
+    """
+    key = (nVars, order)
+    if key not in _monomialTablesDict:
+        _monomialTablesDict[key] = MonomialTable(nVars, order)
+    return _monomialTablesDict[key]
+
+
+def _getExponents(nVars, degree):
+    """
+    Returns the list of the exponent tuples of the monomials of the particular degree.
+    """
+    if nVars == 1:
+        return [(degree,)]
+    exponents = []
+    for exp in range(degree, -1, -1):
+        for rest in _getExponents(nVars - 1, degree - exp):
+            exponents.append((exp,) + rest)
+    return exponents
+
+
+class TaylorMap:
+    """
+    The truncated power series map of the 6D coordinates (x, xp, y, yp, z, dE).
+    The coefficients are kept in the array [nMonomials][6], and the component j
+    of the map is the sum of coeffs[k][j] times the monomial k of the table.
+    A new map is the identity map.
+    """
+
+    def __init__(self, order=1):
+        if order < 1:
+            msg = "The order of the TaylorMap should be 1 or more!"
+            msg = msg + os.linesep
+            msg = msg + "order =" + str(order)
+            orbitFinalize(msg)
+        self.__table = getMonomialTable(6, order)
+        self.__coeffs = np.zeros((self.__table.getNumberOfMonomials(), 6))
+        self.unit()
+
+    def unit(self):
+        """
+        Sets the identity map.
+        """
+        self.__coeffs[:, :] = 0.0
+        self.__coeffs[1:7, :] = np.eye(6)
+
+    def getOrder(self):
+        """
+        Returns the order of the map.
+        """
+        return self.__table.order
+
+    def getMonomialTable(self):
+        """
+        Returns the table of the monomials.
+        """
+        return self.__table
+
+    def getExponents(self):
+        """
+        Returns the array [nMonomials][6] of the monomial exponents.
+        """
+        return self.__table.exponents
+
+    def getCoefficients(self):
+        """
+        Returns the array [nMonomials][6] of the map coefficients.
+        """
+        return self.__coeffs
+
+    def setCoefficients(self, coeffs):
+        """
+        Sets the array [nMonomials][6] of the map coefficients.
+        """
+        coeffs = np.asarray(coeffs, dtype=float)
+        if coeffs.shape != self.__coeffs.shape:
+            msg = "TaylorMap.setCoefficients(coeffs) - the shape of the array is wrong!"
+            msg = msg + os.linesep
+            msg = msg + "shape =" + str(coeffs.shape) + " should be " + str(self.__coeffs.shape)
+            orbitFinalize(msg)
+        self.__coeffs[:, :] = coeffs
+
+    def getConstant(self):
+        """
+        Returns the constant part of the map - the image of the zero point.
+        """
+        return self.__coeffs[0].copy()
+
+    def getLinearMatrix(self):
+        """
+        Returns the 6x6 matrix of the linear part of the map.
+        """
+        return self.__coeffs[1:7].T.copy()
+
+    def track(self, points):
+        """
+        Returns the array [nPoints][6] of the images of the points [nPoints][6].
+        """
+        return self.__table.evaluate(points).dot(self.__coeffs)
+
+    def compose(self, taylorMap):
+        """
+        Returns the composition of this map and the argument map. The argument
+        map is applied first. The order is the lowest of the two orders.
+        """
+        order = min(self.getOrder(), taylorMap.getOrder())
+        res = TaylorMap(order)
+        monomials = _composeMonomials(res.getMonomialTable(), taylorMap.getCoefficients())
+        nMonomials = res.getMonomialTable().getNumberOfMonomials()
+        res.setCoefficients(monomials.T.dot(self.__coeffs[:nMonomials]))
+        return res
+
+    def getSymplecticError(self, weights=(1.0, 1.0, 1.0)):
+        """
+        Returns the maximal element of abs(M^T*J*M - J) for the linear matrix M
+        of the map. The weights of the canonical pairs (x,xp), (y,yp), (z,dE) are
+        the coefficients of the symplectic form J.
+        """
+        jMatrix = _getSymplecticForm(weights)
+        matrix = self.getLinearMatrix()
+        return np.abs(matrix.T.dot(jMatrix).dot(matrix) - jMatrix).max()
+
+
+def _getSymplecticForm(weights=(1.0, 1.0, 1.0)):
+    """
+    Returns the 6x6 symplectic form for the canonical pairs with the weights.
+    """
+    jMatrix = np.zeros((6, 6))
+    for ind in range(3):
+        jMatrix[2 * ind, 2 * ind + 1] = weights[ind]
+        jMatrix[2 * ind + 1, 2 * ind] = -weights[ind]
+    return jMatrix
+
+
+def _composeMonomials(table, coeffs):
+    """
+    Returns the array [nMonomials][nMonomials] of the coefficients of all monomials of
+    the table for the variables substituted by the polynomials coeffs[:,var].
+    """
+    nMonomials = table.getNumberOfMonomials()
+    comps = np.zeros((nMonomials, table.nVars))
+    nRows = min(nMonomials, coeffs.shape[0])
+    comps[:nRows] = coeffs[:nRows]
+    monomials = np.zeros((nMonomials, nMonomials))
+    monomials[0, 0] = 1.0
+    for ind in range(1, nMonomials):
+        monomials[ind] = table.mult(monomials[table.parents[ind]], comps[:, table.variables[ind]])
+    return monomials
+
+
+def getSymplecticLinearMatrix(matrix):
+    """
+    Returns the symplectic 6x6 matrix that is the closest to the matrix
+    in the sense of the Cayley transform. The Cayley image of the matrix is
+    projected on the Hamiltonian matrices and transformed back.
+    """
+    jMatrix = _getSymplecticForm()
+    unit = np.eye(6)
+    hMatrix = (matrix - unit).dot(np.linalg.inv(matrix + unit))
+    sMatrix = jMatrix.dot(hMatrix)
+    hMatrix = -jMatrix.dot((sMatrix + sMatrix.T) / 2.0)
+    return (unit + hMatrix).dot(np.linalg.inv(unit - hMatrix))
+
+
+def getGeneratingFunction(taylorMap, nIterations=None):
+    """
+    Returns the coefficients of the generating function F2(q,P) of the near
+    identity map in the canonical coordinates (q0,p0,q1,p1,q2,p2). The function
+    is the polynomial of (q0,P0,q1,P1,q2,P2) with the order of the map plus one,
+    and p = dF/dq, Q = dF/dP. The old momenta p(q,P) are found by the fixed-point
+    iterations in the truncated power series algebra, and the function is
+    the integral of the gradient (p(q,P), Q(q,P)) along the ray from zero. The
+    function of the truncated map that is not exactly symplectic gives the
+    symplectic map that agrees with it up to the order of the map.
+    """
+    order = taylorMap.getOrder()
+    table = taylorMap.getMonomialTable()
+    nMonomials = table.getNumberOfMonomials()
+    coeffs = taylorMap.getCoefficients()
+    if nIterations == None:
+        nIterations = 4 * order + 10
+    # h(q,p) = P(q,p) - p for the momenta components
+    hCoeffs = coeffs.copy()
+    for ind in range(3):
+        hCoeffs[2 * ind + 2, 2 * ind + 1] -= 1.0
+    # the variables (q,P) of the generating function as the polynomials
+    identity = np.zeros((nMonomials, 6))
+    identity[1:7] = np.eye(6)
+    subst = identity.copy()
+    for iteration in range(nIterations):
+        monomials = _composeMonomials(table, subst)
+        hValues = monomials.T.dot(hCoeffs)
+        substNew = identity.copy()
+        for ind in range(3):
+            substNew[:, 2 * ind + 1] -= hValues[:, 2 * ind + 1]
+        if np.abs(substNew - subst).max() == 0.0:
+            subst = substNew
+            break
+        subst = substNew
+    monomials = _composeMonomials(table, subst)
+    values = monomials.T.dot(coeffs)
+    # the gradient of F: dF/dq_i = p_i(q,P) and dF/dP_i = Q_i(q,P)
+    gradient = np.zeros((nMonomials, 6))
+    for ind in range(3):
+        gradient[:, 2 * ind] = subst[:, 2 * ind + 1]
+        gradient[:, 2 * ind + 1] = values[:, 2 * ind]
+    tableF = getMonomialTable(6, order + 1)
+    nMonomialsF = tableF.getNumberOfMonomials()
+    fCoeffs = np.zeros(nMonomialsF)
+    for var in range(6):
+        grad = np.zeros(nMonomialsF)
+        grad[:nMonomials] = gradient[:, var]
+        wVar = np.zeros(nMonomialsF)
+        wVar[1 + var] = 1.0
+        fCoeffs += tableF.mult(wVar, grad)
+    fCoeffs[1:] /= tableF.degrees[1:]
+    return fCoeffs
@@ -0,0 +1,268 @@
+"""
+The generator of the truncated power series (Taylor) maps for the lattices
+of the TEAPOT elements. The TEAPOT nodes of the lattice or its segment are
+recorded into the element program, and the truncated power series of the
+coordinates are tracked through the same teapot_base functions as the
+particles (see ElementProgram.trackTaylorMap(...)). The coefficients of the
+map are the exact derivatives of the tracking functions at the reference
+particle.
+
+The lattices with the nodes that cannot be recorded (see isDifferentiableNode(node))
+are tracked as the probe bunch of the points around the reference particle by
+the usual trackBunch(...) method, and the polynomial coefficients of the map are
+fitted to the final coordinates of the probe particles by the least squares method.
+The fitted polynomial has the higher order than the map, and its terms above
+the order of the map are dropped. The fitted coefficients of the degree n have
+the relative errors of the order of step^(order + fitOrderIncrease + 1 - n),
+so the highest order coefficients are the least accurate ones. They depend on
+the steps and the random seed of the probe points.
+"""
+
+import os
+
+import numpy as np
+
+# import bunch
+from orbit.core.bunch import Bunch
+
+# import the function that finalizes the execution
+from ..utils import orbitFinalize
+
+# import general accelerator elements
+from ..lattice import AccActionsContainer
+
+# import the C++ element program
+from ..teapot_base import TPB
+
+from ..teapot import BaseTEAPOT
+from ..teapot.teapot_element_program import isDifferentiableNode
+
+from .TaylorMap import TaylorMap, getMonomialTable
+from .TaylorMapNode import TaylorMapNode
+
+
+class TaylorMapGenerator:
+    """
+    The generator of the Taylor map of the particular order. The map is tracked
+    through the recorded TEAPOT nodes, or it is fitted to the tracking of the probe
+    bunch if the analytic mode is switched off or some nodes cannot be recorded.
+    The probe points are in the 6D box with the half-sizes equal to the steps.
+    The dE step is relative to the kinetic energy as in the MatrixGenerator.
+    """
+
+    def __init__(self, order=3):
+        self.__order = order
+        self.__program = TPB.ElementProgram()
+        self.__analytic = True
+        self.__lastAnalytic = False
+        self.__steps = [1.0e-3, 1.0e-4, 1.0e-3, 1.0e-4, 1.0e-2, 1.0e-3]
+        # the fitted polynomial has the higher order than the map to reduce the
+        # contribution of the truncated terms into the coefficients of the map
+        self.__fitOrderIncrease = 2
+        # the number of probe points per monomial of the fitted polynomial
+        self.__pointsPerMonomial = 3
+        self.__seed = 1
+
+    def setOrder(self, order):
+        """
+        Sets the order of the map.
+        """
+        self.__order = order
+
+    def getOrder(self):
+        """
+        Returns the order of the map.
+        """
+        return self.__order
+
+    def setAnalytic(self, analytic):
+        """
+        Switches on or off the tracking of the map through the recorded TEAPOT nodes.
+        """
+        self.__analytic = analytic
+
+    def isAnalytic(self):
+        """
+        Returns True if the map is tracked through the recorded TEAPOT nodes if possible.
+        """
+        return self.__analytic
+
+    def isLastMapAnalytic(self):
+        """
+        Returns True if the last map was tracked through the recorded TEAPOT nodes,
+        and False if it was fitted to the tracking of the probe bunch.
+        """
+        return self.__lastAnalytic
+
+    def setStep(self, index, step):
+        """
+        Sets the step of the probe for the coordinate with this index.
+        """
+        self.__steps[index] = step
+
+    def getStep(self, index):
+        """
+        Returns the step of the probe for the coordinate with this index.
+        """
+        return self.__steps[index]
+
+    def setFitOrderIncrease(self, increase):
+        """
+        Sets the difference between the orders of the fitted polynomial and the map.
+        """
+        self.__fitOrderIncrease = increase
+
+    def getFitOrderIncrease(self):
+        """
+        Returns the difference between the orders of the fitted polynomial and the map.
+        """
+        return self.__fitOrderIncrease
+
+    def setPointsPerMonomial(self, nPoints):
+        """
+        Sets the number of probe points per monomial of the fitted polynomial.
+        """
+        self.__pointsPerMonomial = nPoints
+
+    def getPointsPerMonomial(self):
+        """
+        Returns the number of probe points per monomial of the fitted polynomial.
+        """
+        return self.__pointsPerMonomial
+
+    def setSeed(self, seed):
+        """
+        Sets the seed of the random generator of the probe points.
+        """
+        self.__seed = seed
+
+    def getSeed(self):
+        """
+        Returns the seed of the random generator of the probe points.
+        """
+        return self.__seed
+
+    def getTaylorMap(self, lattice, bunch, index_start=-1, index_stop=-1):
+        """
+        Returns the Taylor map of the lattice nodes from index_start to index_stop
+        (inclusive) for the synchronous particle of the bunch.
+        """
+        return self.__makeTaylorMap(lattice, bunch, index_start, index_stop)[0]
+
+    def getTaylorMapNode(self, lattice, bunch, index_start=-1, index_stop=-1, symplectic=True, name="taylor map"):
+        """
+        Returns the TaylorMapNode instance that replaces the lattice nodes from
+        index_start to index_stop (inclusive). The node has the length of these nodes
+        and changes the time and the energy of the synchronous particle in the same way.
+        If symplectic is True, the node tracks the bunch through the generating function.
+        """
+        (taylorMap, timeShift, kinEnergyIn, kinEnergyOut, length) = self.__makeTaylorMap(lattice, bunch, index_start, index_stop)
+        node = TaylorMapNode(taylorMap, name)
+        node.setLength(length)
+        node.setSyncParticleParameters(kinEnergyIn, kinEnergyOut, timeShift)
+        # the dE coordinate is scaled into dp/p to get the canonical pair with z
+        syncPart = bunch.getSyncParticle()
+        scales = [1.0, 1.0, 1.0, 1.0, 1.0, 1.0 / (syncPart.momentum() * syncPart.beta())]
+        node.setSymplectic(symplectic, scales)
+        return node
+
+    def __makeTaylorMap(self, lattice, bunch, index_start, index_stop):
+        """
+        Tracks the map through the recorded nodes or fits it to the tracking of the
+        probe bunch. Returns the tuple (taylorMap, timeShift, kinEnergyIn, kinEnergyOut, length).
+        """
+        if not lattice.isInitialized():
+            msg = "The TaylorMapGenerator class needs the initialized lattice!"
+            msg = msg + os.linesep
+            msg = msg + "Name of lattice=" + lattice.getName()
+            orbitFinalize(msg)
+        probe = Bunch()
+        bunch.copyEmptyBunchTo(probe)
+        syncPart = probe.getSyncParticle()
+        kinEnergyIn = syncPart.kinEnergy()
+        time = syncPart.time()
+        self.__lastAnalytic = self.__analytic and self.__recordNodes(lattice, probe, index_start, index_stop)
+        if self.__lastAnalytic:
+            taylorMap = self.__trackTaylorMap(probe)
+        else:
+            taylorMap = self.__fitTaylorMap(lattice, probe, index_start, index_stop)
+        nodes = lattice.getNodes()
+        if index_start < 0:
+            index_start = 0
+        if index_stop < 0:
+            index_stop = len(nodes) - 1
+        length = sum([node.getLength() for node in nodes[index_start : index_stop + 1]])
+        return (taylorMap, syncPart.time() - time, kinEnergyIn, syncPart.kinEnergy(), length)
+
+    def __recordNodes(self, lattice, bunch, index_start, index_stop):
+        """
+        Records the nodes from index_start to index_stop (inclusive) with their child
+        nodes into the element program. Returns False if some node cannot be recorded.
+        """
+        program = self.__program
+        program.clear()
+        recordable = [True]
+
+        def recordAction(paramsDict):
+            node = paramsDict["node"]
+            if not recordable[0]:
+                return
+            if isinstance(node, BaseTEAPOT) == False or not isDifferentiableNode(node):
+                recordable[0] = False
+                return
+            node.track(paramsDict)
+
+        accContainer = AccActionsContainer()
+        accContainer.addAction(recordAction, AccActionsContainer.BODY)
+        paramsDict = {}
+        paramsDict["bunch"] = bunch
+        paramsDict["tpb"] = program
+        if hasattr(lattice, "getUseRealCharge"):
+            paramsDict["useCharge"] = lattice.getUseRealCharge()
+        lattice.trackActions(accContainer, paramsDict, index_start, index_stop)
+        return recordable[0]
+
+    def __trackTaylorMap(self, probe):
+        """
+        Returns the map of the recorded element program. The synchronous particle
+        of the probe bunch is changed as by the tracking.
+        """
+        taylorMap = TaylorMap(self.__order)
+        table = taylorMap.getMonomialTable()
+        coeffs = self.__program.trackTaylorMap(
+            probe, table.prodI.tolist(), table.prodJ.tolist(), table.prodK.tolist(), taylorMap.getCoefficients().reshape(-1).tolist()
+        )
+        taylorMap.setCoefficients(np.array(coeffs).reshape(taylorMap.getCoefficients().shape))
+        return taylorMap
+
+    def __fitTaylorMap(self, lattice, probe, index_start, index_stop):
+        """
+        Tracks the probe bunch and fits the map. The synchronous particle of the
+        probe bunch is changed as by the tracking.
+        """
+        taylorMap = TaylorMap(self.__order)
+        nMonomials = taylorMap.getMonomialTable().getNumberOfMonomials()
+        table = getMonomialTable(6, self.__order + max(self.__fitOrderIncrease, 0))
+        steps = np.array(self.__steps)
+        steps[5] *= probe.getSyncParticle().kinEnergy()
+        # the scaled points are in the [-1,1] box, the first point is the reference particle
+        rng = np.random.default_rng(self.__seed)
+        nPoints = max(self.__pointsPerMonomial, 1) * table.getNumberOfMonomials()
+        scaledPoints = rng.uniform(-1.0, 1.0, size=(nPoints, 6))
+        scaledPoints[0] = 0.0
+        probe.addParticles(scaledPoints * steps)
+        lattice.trackBunch(probe, {}, None, index_start, index_stop)
+        if probe.getSize() != nPoints:
+            msg = "TaylorMapGenerator - the probe particles are lost in the lattice!"
+            msg = msg + os.linesep
+            msg = msg + "Name of lattice=" + lattice.getName()
+            msg = msg + os.linesep
+            msg = msg + "Reduce the steps of the probe."
+            orbitFinalize(msg)
+        finalPoints = np.array(probe.coordArr())
+        # the fitting of the scaled monomials is well conditioned
+        scaledMonomials = table.evaluate(scaledPoints)
+        (coeffs, residuals, rank, sv) = np.linalg.lstsq(scaledMonomials, finalPoints, rcond=None)
+        monomialScales = np.prod(steps**table.exponents, axis=1)
+        taylorMap.setCoefficients(coeffs[:nMonomials] / monomialScales[:nMonomials, np.newaxis])
+        return taylorMap
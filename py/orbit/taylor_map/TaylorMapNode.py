@@ -0,0 +1,159 @@
+"""
+The AccNode subclass that tracks the bunch through the truncated power
+series (Taylor) map. The node can replace the segment of the lattice or
+the whole ring for the tracking without the collective effects.
+"""
+
+import os
+
+import numpy as np
+
+# import the function that finalizes the execution
+from ..utils import orbitFinalize
+
+# import general accelerator elements and lattice
+from ..lattice import AccNodeBunchTracker
+
+# import the C++ map tracker
+from ..teapot_base import TPB
+
+from .TaylorMap import TaylorMap, getMonomialTable, getGeneratingFunction, getSymplecticLinearMatrix
+
+
+class TaylorMapNode(AccNodeBunchTracker):
+    """
+    The node tracks the bunch through the Taylor map. In the explicit mode the
+    polynomials of the map are evaluated for each particle. The truncated map is
+    not symplectic, so for the long term tracking the symplectic mode should be
+    used. In this mode the linear part of the map is made symplectic, and the
+    rest of the map is applied through the generating function F2(q,P) with
+    the Newton solution for the new momenta. The synchronous particle gets the
+    time shift and the kinetic energy of the tracking that created the map.
+    """
+
+    def __init__(self, taylorMap, name="taylor map"):
+        """
+        Constructor. Creates the node for the Taylor map.
+        """
+        AccNodeBunchTracker.__init__(self, name)
+        self.setType("taylor map")
+        self.__taylorMap = taylorMap
+        self.__tracker = TPB.TaylorMapTracker()
+        self.__scales = [1.0] * 6
+        self.__symplectic = False
+        self.__kinEnergyIn = None
+        self.__kinEnergyOut = None
+        self.__timeShift = 0.0
+        self.__updateTracker()
+
+    def getTaylorMap(self):
+        """
+        Returns the Taylor map of the node.
+        """
+        return self.__taylorMap
+
+    def setSyncParticleParameters(self, kinEnergyIn, kinEnergyOut, timeShift):
+        """
+        Sets the kinetic energies of the synchronous particle before and after
+        the node and the time shift. The node can track only the bunches with
+        the kinEnergyIn energy. If kinEnergyIn is None, the energy is not checked.
+        """
+        self.__kinEnergyIn = kinEnergyIn
+        self.__kinEnergyOut = kinEnergyOut
+        self.__timeShift = timeShift
+
+    def getSyncParticleParameters(self):
+        """
+        Returns the tuple (kinEnergyIn, kinEnergyOut, timeShift).
+        """
+        return (self.__kinEnergyIn, self.__kinEnergyOut, self.__timeShift)
+
+    def setSymplectic(self, symplectic=True, scales=None):
+        """
+        Switches on or off the symplectic mode. The coordinates multiplied by
+        the scales should be the canonical pairs (x,px), (y,py), (z,pz).
+        """
+        if scales != None:
+            self.__scales = list(scales)
+        if symplectic and self.__kinEnergyIn != None and self.__kinEnergyOut != self.__kinEnergyIn:
+            msg = "The TaylorMapNode cannot be symplectic if the energy is changed!"
+            msg = msg + os.linesep
+            msg = msg + "Name of node=" + self.getName()
+            orbitFinalize(msg)
+        self.__symplectic = symplectic
+        self.__updateTracker()
+
+    def isSymplectic(self):
+        """
+        Returns True if the node uses the generating function.
+        """
+        return self.__symplectic
+
+    def setNewtonParameters(self, maxIterations=20, tolerance=1.0e-15):
+        """
+        Sets the maximal number of the Newton iterations and the relative tolerance
+        for the new momenta in the symplectic mode.
+        """
+        self.__tracker.setNewtonParameters(maxIterations, tolerance)
+
+    def __updateTracker(self):
+        """
+        Transfers the map or the generating function to the C++ tracker.
+        """
+        taylorMap = self.__taylorMap
+        order = taylorMap.getOrder()
+        coeffs = taylorMap.getCoefficients()
+        if not self.__symplectic:
+            table = taylorMap.getMonomialTable()
+            self.__tracker.setMonomials(table.parents.tolist(), table.variables.tolist())
+            self.__tracker.setMap(coeffs.ravel().tolist())
+            unit = np.eye(6).ravel().tolist()
+            self.__tracker.setMatrices(unit, unit)
+            return
+        # the map in the canonical coordinates u = S*x
+        scales = np.array(self.__scales)
+        exponents = taylorMap.getExponents()
+        canonicalCoeffs = coeffs * scales[np.newaxis, :] / np.prod(scales**exponents, axis=1)[:, np.newaxis]
+        # the symplectic linear part L and the near identity map N = L^-1 * map
+        linearMatrix = getSymplecticLinearMatrix(canonicalCoeffs[1:7].T)
+        nearIdentityMap = TaylorMap(order)
+        nearIdentityMap.setCoefficients(canonicalCoeffs.dot(np.linalg.inv(linearMatrix).T))
+        fCoeffs = getGeneratingFunction(nearIdentityMap)
+        # the derivatives dF/dq, dF/dP, d2F/dq/dP over the (q0,P0,q1,P1,q2,P2) variables
+        tableF = getMonomialTable(6, order + 1)
+        columns = []
+        for ind in range(3):
+            columns.append(tableF.derivative(fCoeffs, 2 * ind))
+        for ind in range(3):
+            columns.append(tableF.derivative(fCoeffs, 2 * ind + 1))
+        for ind0 in range(3):
+            for ind1 in range(3):
+                columns.append(tableF.derivative(columns[ind0], 2 * ind1 + 1))
+        genCoeffs = np.array(columns).T
+        # the near identity map is the initial guess of the new momenta
+        guessCoeffs = np.zeros((tableF.getNumberOfMonomials(), 6))
+        guessCoeffs[: coeffs.shape[0]] = nearIdentityMap.getCoefficients()
+        self.__tracker.setMonomials(tableF.parents.tolist(), tableF.variables.tolist())
+        self.__tracker.setMap(guessCoeffs.ravel().tolist())
+        self.__tracker.setGeneratingFunction(genCoeffs.ravel().tolist())
+        outMatrix = np.diag(1.0 / scales).dot(linearMatrix)
+        self.__tracker.setMatrices(np.diag(scales).ravel().tolist(), outMatrix.ravel().tolist())
+
+    def track(self, paramsDict):
+        """
+        The TaylorMapNode class implementation of the AccNodeBunchTracker class track(probe) method.
+        """
+        bunch = paramsDict["bunch"]
+        syncPart = bunch.getSyncParticle()
+        if self.__kinEnergyIn != None:
+            if abs(syncPart.kinEnergy() - self.__kinEnergyIn) > 1.0e-12 * self.__kinEnergyIn:
+                msg = "The TaylorMapNode was created for the other energy of the synchronous particle!"
+                msg = msg + os.linesep
+                msg = msg + "Name of node=" + self.getName()
+                msg = msg + os.linesep
+                msg = msg + "Energy of map=" + str(self.__kinEnergyIn) + " bunch energy=" + str(syncPart.kinEnergy())
+                orbitFinalize(msg)
+        self.__tracker.track(bunch)
+        syncPart.time(syncPart.time() + self.__timeShift)
+        if self.__kinEnergyOut != None and self.__kinEnergyOut != self.__kinEnergyIn:
+            syncPart.kinEnergy(self.__kinEnergyOut)
@@ -0,0 +1,18 @@
+## \namespace orbit::taylor_map
+## \brief Python classes for the truncated power series (Taylor) maps
+##
+## The maps are extracted from the TEAPOT lattices and track the bunch
+## explicitly or symplectically through the generating function.
+from .TaylorMap import TaylorMap, MonomialTable, getMonomialTable
+from .TaylorMap import getGeneratingFunction, getSymplecticLinearMatrix
+from .TaylorMapNode import TaylorMapNode
+from .TaylorMapGenerator import TaylorMapGenerator
+
+__all__ = []
+__all__.append("TaylorMap")
+__all__.append("MonomialTable")
+__all__.append("getMonomialTable")
+__all__.append("getGeneratingFunction")
+__all__.append("getSymplecticLinearMatrix")
+__all__.append("TaylorMapNode")
+__all__.append("TaylorMapGenerator")
@@ -6,6 +6,7 @@
 from .teapot import TEAPOT_Lattice
 from .teapot import TEAPOT_Ring
 from .teapot import BaseTEAPOT
+from .teapot import BunchRebalanceTEAPOT
 from .teapot import BendTEAPOT
 from .teapot import DriftTEAPOT
 from .teapot import FringeFieldTEAPOT
@@ -21,10 +22,20 @@ from .teapot import TPB
 
 from .teapot_matrix_lattice import TEAPOT_MATRIX_Lattice
 
+from .teapot_element_program import FusedSegmentTEAPOT
+from .teapot_element_program import getFusedLattice
+from .teapot_element_program import isFusableNode
+from .teapot_element_program import TransferMatrixGenerator
+
+from .teapot_lattice_executor import TEAPOT_LatticeExecutor
+
+from .teapot_momentum_scan import TEAPOT_MomentumScan
+
 __all__ = []
 __all__.append("TEAPOT_Lattice")
 __all__.append("TEAPOT_Ring")
 __all__.append("BaseTEAPOT")
+__all__.append("BunchRebalanceTEAPOT")
 __all__.append("DriftTEAPOT")
 __all__.append("BunchWrapTEAPOT")
 __all__.append("BendTEAPOT")
@@ -38,3 +49,9 @@ __all__.append("TiltTEAPOT")
 __all__.append("NodeTEAPOT")
 __all__.append("TPB")
 __all__.append("TEAPOT_MATRIX_Lattice")
+__all__.append("FusedSegmentTEAPOT")
+__all__.append("getFusedLattice")
+__all__.append("isFusableNode")
+__all__.append("TransferMatrixGenerator")
+__all__.append("TEAPOT_LatticeExecutor")
+__all__.append("TEAPOT_MomentumScan")
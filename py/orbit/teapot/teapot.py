@@ -182,6 +182,17 @@ class TEAPOT_Ring(TEAPOT_Lattice):
         turn_counter = TurnCounterTEAPOT()
         self.getNodes().append(turn_counter)
 
+    def addBunchRebalanceNode(self, nTurns=1, tolerance=0.1):
+        """
+        Adds the node at the end of the ring that moves macro-particles between
+        CPUs every nTurns turns if the load imbalance is larger than the tolerance.
+        Returns the node.
+        """
+        rebalance_node = BunchRebalanceTEAPOT(nTurns, tolerance)
+        self.addNode(rebalance_node)
+        self.initialize()
+        return rebalance_node
+
 
 class _teapotFactory:
     """
@@ -414,6 +425,11 @@ class _teapotFactory:
 class BaseTEAPOT(AccNodeBunchTracker):
     """The base abstract class of the TEAPOT accelerator elements hierarchy."""
 
+    # the counter of the changes of the parameters of all TEAPOT nodes
+    _paramsEpoch = 0
+    # the value of the counter after the last change of this node
+    __nodeParamsEpoch = 0
+
     def __init__(self, name="no name"):
         """
         Constructor. Creates the base TEAPOT element. This is a superclass for all TEAPOT elements.
@@ -421,6 +437,64 @@ class BaseTEAPOT(AccNodeBunchTracker):
         AccNodeBunchTracker.__init__(self, name)
         self.setType("base teapot")
 
+    def markDirty(self):
+        """
+        Marks the node as changed. The parameters setters call this method, but
+        after the in-place changes of the parameters (e.g. the elements of the
+        "kls" list) it should be called by the user.
+        """
+        BaseTEAPOT._paramsEpoch += 1
+        self.__nodeParamsEpoch = BaseTEAPOT._paramsEpoch
+
+    def getParamsEpoch(self):
+        """
+        Returns the value of the changes counter after the last change of the node.
+        The nodes with the same epoch as before have not been changed.
+        """
+        return self.__nodeParamsEpoch
+
+    def addParam(self, key, value):
+        """
+        Method. Adds a parameter to the node and marks the node as changed.
+        """
+        AccNodeBunchTracker.addParam(self, key, value)
+        self.markDirty()
+
+    def setParam(self, key, value):
+        """
+        Method. Sets a parameter of the node and marks the node as changed.
+        """
+        AccNodeBunchTracker.setParam(self, key, value)
+        self.markDirty()
+
+    def removeParam(self, key):
+        """
+        Method. Removes a parameter and marks the node as changed.
+        """
+        AccNodeBunchTracker.removeParam(self, key)
+        self.markDirty()
+
+    def setParamsDict(self, params):
+        """
+        Method. Sets an external parameters dictionary and marks the node as changed.
+        """
+        AccNodeBunchTracker.setParamsDict(self, params)
+        self.markDirty()
+
+    def updateParamsDict(self, params):
+        """
+        Method. Updates the parameters dictionary and marks the node as changed.
+        """
+        AccNodeBunchTracker.updateParamsDict(self, params)
+        self.markDirty()
+
+    def setLength(self, L=0.0, index=-1):
+        """
+        Method. Sets the length of the node or the part and marks the node as changed.
+        """
+        AccNodeBunchTracker.setLength(self, L, index)
+        self.markDirty()
+
 
 class TurnCounterTEAPOT(BaseTEAPOT):
     def __init__(self, name="TurnCounter"):
@@ -440,6 +514,105 @@ class TurnCounterTEAPOT(BaseTEAPOT):
             bunch.bunchAttrInt("TurnNumber", turn + 1)
 
 
+class BunchRebalanceTEAPOT(BaseTEAPOT):
+    def __init__(self, nTurns=1, tolerance=0.1, name="BunchRebalance"):
+        """
+        Constructor. Creates the TEAPOT node that moves macro-particles between CPUs
+        every nTurns passes if the load imbalance is larger than the tolerance.
+        """
+        BaseTEAPOT.__init__(self, name)
+        self.setType("bunch rebalance")
+        self.addParam("nTurns", nTurns)
+        self.addParam("tolerance", tolerance)
+        self.addParam("count", 0)
+
+    def track(self, paramsDict):
+        """
+        The Bunch Rebalance class implementation of the AccNodeBunchTracker class track(probe) method.
+        """
+        # the counter does not change the node, so it is not marked as changed
+        count = self.getParam("count") + 1
+        self.getParamsDict()["count"] = count
+        if count % self.getParam("nTurns") != 0:
+            return
+        bunch = paramsDict["bunch"]
+        bunch.rebalance(self.getParam("tolerance"))
+
+    def getCheckpointState(self):
+        """
+        Returns the number of passes.
+        """
+        return self.getParam("count")
+
+    def setCheckpointState(self, state):
+        """
+        Restores the number of passes.
+        """
+        self.setParam("count", state)
+
+
+# the coefficients of the symmetric splitting steps for the integrator orders
+_splittingCoefficientsDict = {}
+
+
+def getSplittingCoefficients(order=2):
+    """
+    Returns the tuple (drifts, kicks) of the coefficients of the symmetric
+    splitting step of the thick TEAPOT elements for the integrator order 2, 4, or 6.
+    The step of the length h is drift(drifts[0]*h) kick(kicks[0]*h) ...
+    kick(kicks[-1]*h) drift(drifts[-1]*h). The 2nd order step is the usual
+    drift-kick-drift step. The 4th and 6th order steps are the Yoshida
+    compositions of the three steps of the lower order ("triple jump").
+    """
+    if order in _splittingCoefficientsDict:
+        return _splittingCoefficientsDict[order]
+    if order not in (2, 4, 6):
+        msg = "The integrator order of the TEAPOT elements should be 2, 4, or 6!"
+        msg = msg + os.linesep
+        msg = msg + "Function getSplittingCoefficients(order):"
+        msg = msg + os.linesep
+        msg = msg + "order =" + str(order)
+        orbitFinalize(msg)
+    drifts = [0.5, 0.5]
+    kicks = [1.0]
+    for stepOrder in range(2, order, 2):
+        w1 = 1.0 / (2.0 - 2.0 ** (1.0 / (stepOrder + 1)))
+        w0 = 1.0 - 2.0 * w1
+        composedDrifts = [0.0]
+        composedKicks = []
+        for w in (w1, w0, w1):
+            composedDrifts[-1] += w * drifts[0]
+            composedDrifts += [w * drift for drift in drifts[1:]]
+            composedKicks += [w * kick for kick in kicks]
+        drifts = composedDrifts
+        kicks = composedKicks
+    _splittingCoefficientsDict[order] = (drifts, kicks)
+    return (drifts, kicks)
+
+
+def _trackSplittingPart(node, driftStep, kickStep):
+    """
+    Tracks the bunch through the active part of the thick TEAPOT node with the
+    integrator order from the "integrator_order" parameter. The parts of the node
+    are the same as for the 2nd order. The first part is the first drift of the
+    first step, and each of the other parts tracks the rest of one step and the
+    first drift of the next step. The driftStep(coeff) and kickStep(coeff) functions
+    track through the drift and the kick with the coeff fraction of the step.
+    """
+    nParts = node.getnParts()
+    index = node.getActivePartIndex()
+    (drifts, kicks) = getSplittingCoefficients(node.getParam("integrator_order"))
+    if index == 0:
+        driftStep(drifts[0])
+        return
+    for ind in range(len(kicks)):
+        kickStep(kicks[ind])
+        coeff = drifts[ind + 1]
+        if ind == len(kicks) - 1 and index < (nParts - 1):
+            coeff += drifts[0]
+        driftStep(coeff)
+
+
 class NodeTEAPOT(BaseTEAPOT):
     def __init__(self, name="no name"):
         """
@@ -576,7 +749,8 @@ class DriftTEAPOT(NodeTEAPOT):
         """
         length = self.getLength(self.getActivePartIndex())
         bunch = paramsDict["bunch"]
-        TPB.drift(bunch, length)
+        tpb = paramsDict.get("tpb", TPB)
+        tpb.drift(bunch, length)
 
 
 class ApertureTEAPOT(NodeTEAPOT):
@@ -633,10 +807,12 @@ class MonitorTEAPOT(NodeTEAPOT):
         length = self.getLength(self.getActivePartIndex())
         bunch = paramsDict["bunch"]
         self.twiss.analyzeBunch(bunch)
-        self.addParam("xAvg", self.twiss.getAverage(0))
-        self.addParam("xpAvg", self.twiss.getAverage(1))
-        self.addParam("yAvg", self.twiss.getAverage(2))
-        self.addParam("ypAvg", self.twiss.getAverage(3))
+        # the results of the analysis do not change the transport through the node
+        params = self.getParamsDict()
+        params["xAvg"] = self.twiss.getAverage(0)
+        params["xpAvg"] = self.twiss.getAverage(1)
+        params["yAvg"] = self.twiss.getAverage(2)
+        params["ypAvg"] = self.twiss.getAverage(3)
 
 
 class BunchWrapTEAPOT(NodeTEAPOT):
@@ -658,8 +834,9 @@ class BunchWrapTEAPOT(NodeTEAPOT):
         """
         length = self.getLength(self.getActivePartIndex())
         bunch = paramsDict["bunch"]
+        tpb = paramsDict.get("tpb", TPB)
         length = self.getParam("ring_length")
-        TPB.wrapbunch(bunch, length)
+        tpb.wrapbunch(bunch, length)
 
 
 class SolenoidTEAPOT(NodeTEAPOT):
@@ -688,16 +865,18 @@ class SolenoidTEAPOT(NodeTEAPOT):
             strength = self.waveform.getStrength()
         B = strength * self.getParam("B")
         bunch = paramsDict["bunch"]
+        tpb = paramsDict.get("tpb", TPB)
         useCharge = 1
         if "useCharge" in paramsDict:
             useCharge = paramsDict["useCharge"]
-        TPB.soln(bunch, length, B, useCharge)
+        tpb.soln(bunch, length, B, useCharge)
 
     def setWaveform(self, waveform):
         """
         Sets the time dependent waveform function
         """
         self.waveform = waveform
+        self.markDirty()
 
 
 class MultipoleTEAPOT(NodeTEAPOT):
@@ -714,6 +893,7 @@ class MultipoleTEAPOT(NodeTEAPOT):
         self.addParam("poles", [])
         self.addParam("kls", [])
         self.addParam("skews", [])
+        self.addParam("integrator_order", 2)
         self.setnParts(2)
         self.waveform = None
 
@@ -731,6 +911,7 @@ class MultipoleTEAPOT(NodeTEAPOT):
             klArr = node.getParam("kls")
             skewArr = node.getParam("skews")
             bunch = paramsDict["bunch"]
+            tpb = paramsDict.get("tpb", TPB)
             useCharge = 1
             if "useCharge" in paramsDict:
                 useCharge = paramsDict["useCharge"]
@@ -738,7 +919,7 @@ class MultipoleTEAPOT(NodeTEAPOT):
                 pole = poleArr[i]
                 kl = strength * klArr[i]
                 skew = skewArr[i]
-                TPB.multpfringeIN(bunch, pole, kl / length, skew, useCharge)
+                tpb.multpfringeIN(bunch, pole, kl / length, skew, useCharge)
 
         def fringeOUT(node, paramsDict):
             usageOUT = node.getUsage()
@@ -754,6 +935,7 @@ class MultipoleTEAPOT(NodeTEAPOT):
             klArr = node.getParam("kls")
             skewArr = node.getParam("skews")
             bunch = paramsDict["bunch"]
+            tpb = paramsDict.get("tpb", TPB)
             useCharge = 1
             if "useCharge" in paramsDict:
                 useCharge = paramsDict["useCharge"]
@@ -761,7 +943,7 @@ class MultipoleTEAPOT(NodeTEAPOT):
                 pole = poleArr[i]
                 kl = strength * klArr[i]
                 skew = skewArr[i]
-                TPB.multpfringeOUT(bunch, pole, kl / length, skew, useCharge)
+                tpb.multpfringeOUT(bunch, pole, kl / length, skew, useCharge)
 
         self.setFringeFieldFunctionIN(fringeIN)
         self.setFringeFieldFunctionOUT(fringeOUT)
@@ -785,6 +967,7 @@ class MultipoleTEAPOT(NodeTEAPOT):
             msg = msg + os.linesep
             msg = msg + "nParts =" + str(self.getnParts())
             orbitFinalize(msg)
+        getSplittingCoefficients(self.getParam("integrator_order"))
         lengthIN = (self.getLength() / (nParts - 1)) / 2.0
         lengthOUT = (self.getLength() / (nParts - 1)) / 2.0
         lengthStep = lengthIN + lengthOUT
@@ -809,27 +992,41 @@ class MultipoleTEAPOT(NodeTEAPOT):
         klArr = self.getParam("kls")
         skewArr = self.getParam("skews")
         bunch = paramsDict["bunch"]
+        tpb = paramsDict.get("tpb", TPB)
         useCharge = 1
         if "useCharge" in paramsDict:
             useCharge = paramsDict["useCharge"]
+        if self.getParam("integrator_order") != 2:
+            step = self.getLength() / (nParts - 1)
+
+            def driftStep(coeff):
+                tpb.drift(bunch, coeff * step)
+
+            def kickStep(coeff):
+                for i in range(len(poleArr)):
+                    kl = coeff * strength * klArr[i] / (nParts - 1)
+                    tpb.multp(bunch, poleArr[i], kl, skewArr[i], useCharge)
+
+            _trackSplittingPart(self, driftStep, kickStep)
+            return
         if index == 0:
-            TPB.drift(bunch, length)
+            tpb.drift(bunch, length)
             return
         if index > 0 and index < (nParts - 1):
             for i in range(len(poleArr)):
                 pole = poleArr[i]
                 kl = strength * klArr[i] / (nParts - 1)
                 skew = skewArr[i]
-                TPB.multp(bunch, pole, kl, skew, useCharge)
-            TPB.drift(bunch, length)
+                tpb.multp(bunch, pole, kl, skew, useCharge)
+            tpb.drift(bunch, length)
             return
         if index == (nParts - 1):
             for i in range(len(poleArr)):
                 pole = poleArr[i]
                 kl = strength * klArr[i] / (nParts - 1)
                 skew = skewArr[i]
-                TPB.multp(bunch, pole, kl, skew, useCharge)
-            TPB.drift(bunch, length)
+                tpb.multp(bunch, pole, kl, skew, useCharge)
+            tpb.drift(bunch, length)
         return
 
     def setWaveform(self, waveform):
@@ -837,6 +1034,7 @@ class MultipoleTEAPOT(NodeTEAPOT):
         Sets the time dependent waveform function
         """
         self.waveform = waveform
+        self.markDirty()
 
 
 class QuadTEAPOT(NodeTEAPOT):
@@ -855,6 +1053,7 @@ class QuadTEAPOT(NodeTEAPOT):
         self.addParam("poles", [])
         self.addParam("kls", [])
         self.addParam("skews", [])
+        self.addParam("integrator_order", 2)
         self.setnParts(2)
         self.waveform = None
 
@@ -871,17 +1070,18 @@ class QuadTEAPOT(NodeTEAPOT):
             skewArr = node.getParam("skews")
             length = paramsDict["parentNode"].getLength()
             bunch = paramsDict["bunch"]
+            tpb = paramsDict.get("tpb", TPB)
             useCharge = 1
             if "useCharge" in paramsDict:
                 useCharge = paramsDict["useCharge"]
-            TPB.quadfringeIN(bunch, kq, useCharge)
+            tpb.quadfringeIN(bunch, kq, useCharge)
             if length == 0.0:
                 return
             for i in range(len(poleArr)):
                 pole = poleArr[i]
                 kl = strength * klArr[i]
                 skew = skewArr[i]
-                TPB.multpfringeIN(bunch, pole, kl / length, skew, useCharge)
+                tpb.multpfringeIN(bunch, pole, kl / length, skew, useCharge)
 
         def fringeOUT(node, paramsDict):
             usageOUT = node.getUsage()
@@ -896,17 +1096,18 @@ class QuadTEAPOT(NodeTEAPOT):
             skewArr = node.getParam("skews")
             length = paramsDict["parentNode"].getLength()
             bunch = paramsDict["bunch"]
+            tpb = paramsDict.get("tpb", TPB)
             useCharge = 1
             if "useCharge" in paramsDict:
                 useCharge = paramsDict["useCharge"]
-            TPB.quadfringeOUT(bunch, kq, useCharge)
+            tpb.quadfringeOUT(bunch, kq, useCharge)
             if length == 0.0:
                 return
             for i in range(len(poleArr)):
                 pole = poleArr[i]
                 kl = strength * klArr[i]
                 skew = skewArr[i]
-                TPB.multpfringeOUT(bunch, pole, kl / length, skew, useCharge)
+                tpb.multpfringeOUT(bunch, pole, kl / length, skew, useCharge)
 
         self.setFringeFieldFunctionIN(fringeIN)
         self.setFringeFieldFunctionOUT(fringeOUT)
@@ -934,6 +1135,7 @@ class QuadTEAPOT(NodeTEAPOT):
             msg = msg + os.linesep
             msg = msg + "nParts =" + str(nParts)
             orbitFinalize(msg)
+        getSplittingCoefficients(self.getParam("integrator_order"))
         lengthIN = (self.getLength() / (nParts - 1)) / 2.0
         lengthOUT = (self.getLength() / (nParts - 1)) / 2.0
         lengthStep = lengthIN + lengthOUT
@@ -958,31 +1160,47 @@ class QuadTEAPOT(NodeTEAPOT):
         klArr = self.getParam("kls")
         skewArr = self.getParam("skews")
         bunch = paramsDict["bunch"]
+        tpb = paramsDict.get("tpb", TPB)
         useCharge = 1
         if "useCharge" in paramsDict:
             useCharge = paramsDict["useCharge"]
+        if self.getParam("integrator_order") != 2:
+            step = self.getLength() / (nParts - 1)
+
+            def driftStep(coeff):
+                tpb.quad1(bunch, coeff * step, kq, useCharge)
+
+            def kickStep(coeff):
+                tpb.quad2(bunch, coeff * step / 2.0)
+                for i in range(len(poleArr)):
+                    kl = coeff * strength * klArr[i] / (nParts - 1)
+                    tpb.multp(bunch, poleArr[i], kl, skewArr[i], useCharge)
+                tpb.quad2(bunch, coeff * step / 2.0)
+
+            _trackSplittingPart(self, driftStep, kickStep)
+            return
         if index == 0:
-            TPB.quad1(bunch, length, kq, useCharge)
+            tpb.quad1(bunch, length, kq, useCharge)
             return
         if index > 0 and index < (nParts - 1):
-            TPB.quad2(bunch, length / 2.0)
+            tpb.quad2(bunch, length / 2.0)
             for i in range(len(poleArr)):
                 pole = poleArr[i]
                 kl = strength * klArr[i] / (nParts - 1)
                 skew = skewArr[i]
-                TPB.multp(bunch, pole, kl, skew, useCharge)
-            TPB.quad2(bunch, length / 2.0)
-            TPB.quad1(bunch, length, kq, useCharge)
+                tpb.multp(bunch, pole, kl, skew, useCharge)
+            tpb.quad2(bunch, length / 2.0)
+            tpb.quad1(bunch, length, kq, useCharge)
             return
         if index == (nParts - 1):
-            TPB.quad2(bunch, length)
+            tpb.quad2(bunch, length)
             for i in range(len(poleArr)):
                 pole = poleArr[i]
                 kl = strength * klArr[i] / (nParts - 1)
                 skew = skewArr[i]
-                TPB.multp(bunch, pole, kl, skew, useCharge)
-            TPB.quad2(bunch, length)
-            TPB.quad1(bunch, length, kq, useCharge)
+                tpb.multp(bunch, pole, kl, skew, useCharge)
+            tpb.quad2(bunch, length)
+            tpb.quad1(bunch, length, kq, useCharge)
         return
 
     def setWaveform(self, waveform):
@@ -990,6 +1208,7 @@ class QuadTEAPOT(NodeTEAPOT):
         Sets the time dependent waveform function
         """
         self.waveform = waveform
+        self.markDirty()
 
 
 class BendTEAPOT(NodeTEAPOT):
@@ -1010,6 +1229,7 @@ class BendTEAPOT(NodeTEAPOT):
         self.addParam("ea2", 0.0)
         self.addParam("rho", 0.0)
         self.addParam("theta", 1.0e-36)
+        self.addParam("integrator_order", 2)
 
         self.setnParts(2)
 
@@ -1022,26 +1242,27 @@ class BendTEAPOT(NodeTEAPOT):
             skewArr = node.getParam("skews")[:]
             length = paramsDict["parentNode"].getLength()
             bunch = paramsDict["bunch"]
+            tpb = paramsDict.get("tpb", TPB)
             useCharge = 1
             if "useCharge" in paramsDict:
                 useCharge = paramsDict["useCharge"]
             nParts = paramsDict["parentNode"].getnParts()
             if e != 0.0:
                 inout = 0
-                TPB.wedgedrift(bunch, e, inout)
+                tpb.wedgedrift(bunch, e, inout)
                 if usageIN:
                     frinout = 0
-                    TPB.wedgerotate(bunch, e, frinout)
-                    TPB.bendfringeIN(bunch, rho)
+                    tpb.wedgerotate(bunch, e, frinout)
+                    tpb.bendfringeIN(bunch, rho)
                     if length != 0.0:
                         for i in range(len(poleArr)):
                             pole = poleArr[i]
                             kl = klArr[i] / length
                             skew = skewArr[i]
-                            TPB.multpfringeIN(bunch, pole, kl, skew, useCharge)
+                            tpb.multpfringeIN(bunch, pole, kl, skew, useCharge)
                     frinout = 1
-                    TPB.wedgerotate(bunch, e, frinout)
-                TPB.wedgebendCF(
+                    tpb.wedgerotate(bunch, e, frinout)
+                tpb.wedgebendCF(
                     bunch,
                     e,
                     inout,
@@ -1055,13 +1276,13 @@ class BendTEAPOT(NodeTEAPOT):
                 )
             else:
                 if usageIN:
-                    TPB.bendfringeIN(bunch, rho)
+                    tpb.bendfringeIN(bunch, rho)
                     if length != 0.0:
                         for i in range(len(poleArr)):
                             pole = poleArr[i]
                             kl = klArr[i] / length
                             skew = skewArr[i]
-                            TPB.multpfringeIN(bunch, pole, kl, skew, useCharge)
+                            tpb.multpfringeIN(bunch, pole, kl, skew, useCharge)
 
         def fringeOUT(node, paramsDict):
             usageOUT = node.getUsage()
@@ -1072,13 +1293,14 @@ class BendTEAPOT(NodeTEAPOT):
             skewArr = node.getParam("skews")[:]
             length = paramsDict["parentNode"].getLength()
             bunch = paramsDict["bunch"]
+            tpb = paramsDict.get("tpb", TPB)
             useCharge = 1
             if "useCharge" in paramsDict:
                 useCharge = paramsDict["useCharge"]
             nParts = paramsDict["parentNode"].getnParts()
             if e != 0.0:
                 inout = 1
-                TPB.wedgebendCF(
+                tpb.wedgebendCF(
                     bunch,
                     e,
                     inout,
@@ -1092,26 +1314,26 @@ class BendTEAPOT(NodeTEAPOT):
                 )
                 if usageOUT:
                     frinout = 0
-                    TPB.wedgerotate(bunch, -e, frinout)
-                    TPB.bendfringeOUT(bunch, rho)
+                    tpb.wedgerotate(bunch, -e, frinout)
+                    tpb.bendfringeOUT(bunch, rho)
                     if length != 0.0:
                         for i in range(len(poleArr)):
                             pole = poleArr[i]
                             kl = klArr[i] / length
                             skew = skewArr[i]
-                            TPB.multpfringeOUT(bunch, pole, kl, skew, useCharge)
+                            tpb.multpfringeOUT(bunch, pole, kl, skew, useCharge)
                     frinout = 1
-                    TPB.wedgerotate(bunch, -e, frinout)
-                TPB.wedgedrift(bunch, e, inout)
+                    tpb.wedgerotate(bunch, -e, frinout)
+                tpb.wedgedrift(bunch, e, inout)
             else:
                 if usageOUT:
-                    TPB.bendfringeOUT(bunch, rho)
+                    tpb.bendfringeOUT(bunch, rho)
                     if length != 0.0:
                         for i in range(len(poleArr)):
                             pole = poleArr[i]
                             kl = klArr[i] / length
                             skew = skewArr[i]
-                            TPB.multpfringeOUT(bunch, pole, kl, skew, useCharge)
+                            tpb.multpfringeOUT(bunch, pole, kl, skew, useCharge)
 
         self.setFringeFieldFunctionIN(fringeIN)
         self.setFringeFieldFunctionOUT(fringeOUT)
@@ -1135,6 +1357,7 @@ class BendTEAPOT(NodeTEAPOT):
             msg = msg + os.linesep
             msg = msg + "nParts =" + str(nParts)
             orbitFinalize(msg)
+        getSplittingCoefficients(self.getParam("integrator_order"))
         rho = self.getLength() / self.getParam("theta")
         self.addParam("rho", rho)
         lengthIN = (self.getLength() / (nParts - 1)) / 2.0
@@ -1157,40 +1380,60 @@ class BendTEAPOT(NodeTEAPOT):
         klArr = self.getParam("kls")
         skewArr = self.getParam("skews")
         bunch = paramsDict["bunch"]
+        tpb = paramsDict.get("tpb", TPB)
         useCharge = 1
         if "useCharge" in paramsDict:
             useCharge = paramsDict["useCharge"]
         theta = self.getParam("theta") / (nParts - 1)
+        if self.getParam("integrator_order") != 2:
+            step = self.getLength() / (nParts - 1)
+
+            def driftStep(coeff):
+                tpb.bend1(bunch, coeff * step, coeff * theta)
+
+            def kickStep(coeff):
+                tpb.bend2(bunch, coeff * step / 2.0)
+                tpb.bend3(bunch, coeff * theta / 2.0)
+                tpb.bend4(bunch, coeff * theta / 2.0)
+                for i in range(len(poleArr)):
+                    kl = coeff * klArr[i] / (nParts - 1)
+                    tpb.multp(bunch, poleArr[i], kl, skewArr[i], useCharge)
+                tpb.bend4(bunch, coeff * theta / 2.0)
+                tpb.bend3(bunch, coeff * theta / 2.0)
+                tpb.bend2(bunch, coeff * step / 2.0)
+
+            _trackSplittingPart(self, driftStep, kickStep)
+            return
         if index == 0:
-            TPB.bend1(bunch, length, theta / 2.0)
+            tpb.bend1(bunch, length, theta / 2.0)
             return
         if index > 0 and index < (nParts - 1):
-            TPB.bend2(bunch, length / 2.0)
-            TPB.bend3(bunch, theta / 2.0)
-            TPB.bend4(bunch, theta / 2.0)
+            tpb.bend2(bunch, length / 2.0)
+            tpb.bend3(bunch, theta / 2.0)
+            tpb.bend4(bunch, theta / 2.0)
             for i in range(len(poleArr)):
                 pole = poleArr[i]
                 kl = klArr[i] / (nParts - 1)
                 skew = skewArr[i]
-                TPB.multp(bunch, pole, kl, skew, useCharge)
-            TPB.bend4(bunch, theta / 2.0)
-            TPB.bend3(bunch, theta / 2.0)
-            TPB.bend2(bunch, length / 2.0)
-            TPB.bend1(bunch, length, theta)
+                tpb.multp(bunch, pole, kl, skew, useCharge)
+            tpb.bend4(bunch, theta / 2.0)
+            tpb.bend3(bunch, theta / 2.0)
+            tpb.bend2(bunch, length / 2.0)
+            tpb.bend1(bunch, length, theta)
             return
         if index == (nParts - 1):
-            TPB.bend2(bunch, length)
-            TPB.bend3(bunch, theta / 2.0)
-            TPB.bend4(bunch, theta / 2.0)
+            tpb.bend2(bunch, length)
+            tpb.bend3(bunch, theta / 2.0)
+            tpb.bend4(bunch, theta / 2.0)
             for i in range(len(poleArr)):
                 pole = poleArr[i]
                 kl = klArr[i] / (nParts - 1)
                 skew = skewArr[i]
-                TPB.multp(bunch, pole, kl, skew, useCharge)
-            TPB.bend4(bunch, theta / 2.0)
-            TPB.bend3(bunch, theta / 2.0)
-            TPB.bend2(bunch, length)
-            TPB.bend1(bunch, length, theta / 2.0)
+                tpb.multp(bunch, pole, kl, skew, useCharge)
+            tpb.bend4(bunch, theta / 2.0)
+            tpb.bend3(bunch, theta / 2.0)
+            tpb.bend2(bunch, length)
+            tpb.bend1(bunch, length, theta / 2.0)
         return
 
 
@@ -1254,6 +1497,7 @@ class RingRFTEAPOT(NodeTEAPOT):
         phaseArr = self.getParam("phases")
         ring_length = self.getParam("ring_length")
         bunch = paramsDict["bunch"]
+        tpb = paramsDict.get("tpb", TPB)
         useCharge = 1
         if "useCharge" in paramsDict:
             useCharge = paramsDict["useCharge"]
@@ -1261,7 +1505,7 @@ class RingRFTEAPOT(NodeTEAPOT):
         for i in range(len(harmArr)):
             # print "debug rl=",ring_length," harm=",harmArr[i]," v=",voltArr[i],
             # print " ph0=",phaseArr[i]," L=",self.getLength()
-            TPB.RingRF(bunch, ring_length, harmArr[i], voltArr[i], phaseArr[i], useCharge)
+            tpb.RingRF(bunch, ring_length, harmArr[i], voltArr[i], phaseArr[i], useCharge)
 
 
 class KickTEAPOT(NodeTEAPOT):
@@ -1321,19 +1565,20 @@ class KickTEAPOT(NodeTEAPOT):
         ky = strength * self.getParam("ky") / (nParts - 1)
         dE = self.getParam("dE") / (nParts - 1)
         bunch = paramsDict["bunch"]
+        tpb = paramsDict.get("tpb", TPB)
         useCharge = 1
         if "useCharge" in paramsDict:
             useCharge = paramsDict["useCharge"]
         if index == 0:
-            TPB.drift(bunch, length)
-            TPB.kick(bunch, kx, ky, dE, useCharge)
+            tpb.drift(bunch, length)
+            tpb.kick(bunch, kx, ky, dE, useCharge)
             return
         if index > 0 and index < (nParts - 1):
-            TPB.drift(bunch, length)
-            TPB.kick(bunch, kx, ky, dE, useCharge)
+            tpb.drift(bunch, length)
+            tpb.kick(bunch, kx, ky, dE, useCharge)
             return
         if index == (nParts - 1):
-            TPB.drift(bunch, length)
+            tpb.drift(bunch, length)
         return
 
     def setWaveform(self, waveform):
@@ -1341,6 +1586,7 @@ class KickTEAPOT(NodeTEAPOT):
         Sets the time dependent waveform function
         """
         self.waveform = waveform
+        self.markDirty()
 
 
 class TiltTEAPOT(BaseTEAPOT):
@@ -1361,6 +1607,7 @@ class TiltTEAPOT(BaseTEAPOT):
         Sets the tilt angle for the tilt operation.
         """
         self.__angle = angle
+        self.markDirty()
 
     def getTiltAngle(self):
         """
@@ -1375,7 +1622,8 @@ class TiltTEAPOT(BaseTEAPOT):
         """
         if self.__angle != 0.0:
             bunch = paramsDict["bunch"]
-            TPB.rotatexy(bunch, self.__angle)
+            tpb = paramsDict.get("tpb", TPB)
+            tpb.rotatexy(bunch, self.__angle)
 
 
 class FringeFieldTEAPOT(BaseTEAPOT):
@@ -1406,6 +1654,7 @@ class FringeFieldTEAPOT(BaseTEAPOT):
         Sets the fringe field function that will track the bunch through the fringe.
         """
         self.__trackFunc = trackFunction
+        self.markDirty()
 
     def getFringeFieldFunction(self):
         """
@@ -1419,6 +1668,7 @@ class FringeFieldTEAPOT(BaseTEAPOT):
         field will be used in calculation.
         """
         self.__usage = usage
+        self.markDirty()
 
     def getUsage(self):
         """
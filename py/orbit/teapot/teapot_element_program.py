@@ -0,0 +1,344 @@
+"""
+The fused TEAPOT segments. The TEAPOT nodes of a lattice segment record their
+teapot_base tracking functions into the ElementProgram C++ instance, and the
+program pushes blocks of particles through all functions of the segment in one
+pass over the bunch. The results are the same as for the usual tracking.
+The segment should not include the nodes that do anything except the teapot_base
+calls: space charge, diagnostics, apertures, or the nodes with waveforms.
+The recorded programs also give the exact transport matrices of the nodes
+(see TransferMatrixGenerator).
+"""
+
+import os
+
+# import bunch
+from orbit.core.bunch import Bunch
+
+# import the function that finalizes the execution
+from ..utils import orbitFinalize
+
+# import general accelerator elements and lattice
+from ..lattice import AccActionsContainer
+
+# import the C++ element program and the finite difference matrix generator
+from ..teapot_base import TPB, MatrixGenerator
+
+from .teapot import TEAPOT_Lattice, BaseTEAPOT, NodeTEAPOT
+from .teapot import DriftTEAPOT, QuadTEAPOT, MultipoleTEAPOT, BendTEAPOT, KickTEAPOT, SolenoidTEAPOT
+from .teapot import RingRFTEAPOT, BunchWrapTEAPOT, TiltTEAPOT, FringeFieldTEAPOT
+from .teapot import MonitorTEAPOT, TurnCounterTEAPOT, BunchRebalanceTEAPOT
+
+# the exact types of the nodes that can be recorded in the element program
+_fusableNodeTypes = (
+    NodeTEAPOT,
+    DriftTEAPOT,
+    QuadTEAPOT,
+    MultipoleTEAPOT,
+    BendTEAPOT,
+    KickTEAPOT,
+    SolenoidTEAPOT,
+    RingRFTEAPOT,
+    BunchWrapTEAPOT,
+    TiltTEAPOT,
+    FringeFieldTEAPOT,
+)
+
+# the exact types of the diagnostics nodes that do not change the coordinates,
+# so their transport matrices are the unit matrices of the empty programs
+_passiveNodeTypes = (
+    MonitorTEAPOT,
+    TurnCounterTEAPOT,
+    BunchRebalanceTEAPOT,
+)
+
+# the code of the default fringe field functions of the TEAPOT nodes
+_defaultFringeCodes = []
+
+
+def _isDefaultFringeFunction(fringeFunction):
+    """
+    Returns True if the fringe field function is one of the functions
+    set by the constructors of the TEAPOT nodes.
+    """
+    if fringeFunction == None:
+        return True
+    if len(_defaultFringeCodes) == 0:
+        for node in (QuadTEAPOT(), MultipoleTEAPOT(), BendTEAPOT()):
+            _defaultFringeCodes.append(node.getFringeFieldFunctionIN().__code__)
+            _defaultFringeCodes.append(node.getFringeFieldFunctionOUT().__code__)
+    return getattr(fringeFunction, "__code__", None) in _defaultFringeCodes
+
+
+def isRecordableNode(node):
+    """
+    Returns True if the track(...) method of the node only calls the teapot_base
+    tracking functions, so it can be recorded into the element program.
+    The child nodes are not checked.
+    """
+    if type(node) not in _fusableNodeTypes:
+        return False
+    if getattr(node, "waveform", None) != None:
+        return False
+    if isinstance(node, FringeFieldTEAPOT) and not _isDefaultFringeFunction(node.getFringeFieldFunction()):
+        return False
+    return True
+
+
+def isDifferentiableNode(node):
+    """
+    Returns True if the track(...) method of the node only calls the teapot_base
+    tracking functions for the current parameters of the node, so the transport
+    matrix of the node can be calculated from the recorded element program.
+    Unlike the fused segments, the nodes with waveforms and the diagnostics
+    nodes that do not change the coordinates are included.
+    The child nodes are not checked.
+    """
+    if type(node) in _passiveNodeTypes:
+        return True
+    if type(node) not in _fusableNodeTypes:
+        return False
+    if isinstance(node, FringeFieldTEAPOT) and not _isDefaultFringeFunction(node.getFringeFieldFunction()):
+        return False
+    return True
+
+
+def isFusableNode(node):
+    """
+    Returns True if the node and all its child nodes only call the teapot_base
+    tracking functions, so they can be recorded into the element program.
+    """
+    if not isRecordableNode(node):
+        return False
+    for childNode in node.getAllChildren():
+        if not isFusableNode(childNode):
+            return False
+    return True
+
+
+def getRecordingEpochs(owner):
+    """
+    Returns the changes counters of the TEAPOT nodes parameters and of the structure
+    of the nodes in the owner lattice or fused segment. The recorded element programs
+    are obsolete if they are changed.
+    """
+    return (BaseTEAPOT._paramsEpoch, owner.getStructureEpoch())
+
+
+class FusedSegmentTEAPOT(BaseTEAPOT):
+    """
+    The TEAPOT node that replaces the nodes of the lattice with indexes between
+    index_start and index_stop inclusive. It tracks the bunch through the
+    element program of these nodes. The program keeps the parameters of the nodes
+    at the moment of the recording, and it is recorded again if any TEAPOT node
+    or the structure of the nodes has been changed since then.
+    """
+
+    # the counter of the changes in the structure of the nodes of the segment
+    __structureEpoch = 0
+
+    def __init__(self, lattice, index_start=-1, index_stop=-1, name=None):
+        """
+        Constructor. Records the nodes of the TEAPOT lattice segment into the element program.
+        """
+        if isinstance(lattice, TEAPOT_Lattice) != True:
+            orbitFinalize("Constructor orbit.teapot.FusedSegmentTEAPOT needs the TEAPOT_Lattice instance.")
+        if index_start < 0:
+            index_start = 0
+        if index_stop < 0:
+            index_stop = len(lattice.getNodes()) - 1
+        nodes = lattice.getNodes()[index_start : index_stop + 1]
+        if name == None:
+            name = "fused:" + nodes[0].getName() + ":" + nodes[-1].getName()
+        BaseTEAPOT.__init__(self, name)
+        self.setType("fused segment teapot")
+        for node in nodes:
+            if not isFusableNode(node):
+                msg = "The FusedSegmentTEAPOT class instance cannot include the node!"
+                msg = msg + os.linesep
+                msg = msg + "Name of node=" + node.getName()
+                msg = msg + os.linesep
+                msg = msg + "Type of node=" + node.getType()
+                orbitFinalize(msg)
+        self.__lattice = lattice
+        self.__nodes = nodes
+        self.setLength(sum([node.getLength() for node in nodes]))
+        self.program = TPB.ElementProgram()
+        self.rebuild()
+
+    def getNodes(self):
+        """
+        Returns the list of the lattice nodes in this segment.
+        """
+        return self.__nodes
+
+    def getStructureEpoch(self):
+        """
+        Returns the counter of the changes in the structure of the nodes of the segment.
+        """
+        return self.__structureEpoch
+
+    def _structureChanged(self):
+        """
+        Counts the changes in the structure of the nodes of the segment, and notifies
+        the parents of the segment.
+        """
+        self.__structureEpoch += 1
+        BaseTEAPOT._structureChanged(self)
+
+    def getElementProgram(self):
+        """
+        Returns the ElementProgram instance. The program is recorded again if it is obsolete.
+        """
+        if self.__epochs != getRecordingEpochs(self):
+            self.rebuild()
+        return self.program
+
+    def rebuild(self):
+        """
+        Records the tracking functions of the nodes into the element program again.
+        """
+        self.program.clear()
+        paramsDict = {}
+        # the functions are not called for this bunch, the nodes give it to the program
+        paramsDict["bunch"] = Bunch()
+        paramsDict["useCharge"] = self.__lattice.getUseRealCharge()
+        paramsDict["tpb"] = self.program
+        paramsDict["lattice"] = self.__lattice
+        actionContainer = AccActionsContainer("Element Program")
+
+        def record(paramsDict):
+            node = paramsDict["node"]
+            node.track(paramsDict)
+
+        actionContainer.addAction(record, AccActionsContainer.BODY)
+        for node in self.__nodes:
+            # the nodes notify the segment about the changes in their structures
+            node.addToActionSchedule([], self)
+            paramsDict["node"] = node
+            paramsDict["parentNode"] = self.__lattice
+            node.trackActions(actionContainer, paramsDict)
+        self.__epochs = getRecordingEpochs(self)
+
+    def track(self, paramsDict):
+        """
+        The fused segment implementation of the AccNodeBunchTracker class track(probe) method.
+        """
+        bunch = paramsDict["bunch"]
+        self.getElementProgram().track(bunch)
+
+
+def getFusedLattice(lattice, minNodes=2):
+    """
+    Returns the new TEAPOT_Lattice with the nodes of the lattice, where each run
+    of at least minNodes fusable nodes is replaced by one FusedSegmentTEAPOT node.
+    The other nodes are the same instances as in the initial lattice.
+    """
+    if isinstance(lattice, TEAPOT_Lattice) != True:
+        orbitFinalize("Function orbit.teapot.getFusedLattice needs the TEAPOT_Lattice instance.")
+    fusedLattice = TEAPOT_Lattice(lattice.getName())
+    fusedLattice.setUseRealCharge(lattice.getUseRealCharge())
+    nodes = lattice.getNodes()
+    index = 0
+    while index < len(nodes):
+        index_stop = index
+        while index_stop < len(nodes) and isFusableNode(nodes[index_stop]):
+            index_stop += 1
+        if index_stop - index >= minNodes:
+            fusedLattice.addNode(FusedSegmentTEAPOT(lattice, index, index_stop - 1))
+            index = index_stop
+        else:
+            fusedLattice.addNode(nodes[index])
+            index += 1
+    fusedLattice.initialize()
+    return fusedLattice
+
+
+class TransferMatrixGenerator:
+    """
+    The generator of the transport matrices of the TEAPOT nodes. The node records
+    its teapot_base tracking functions into the element program, and the matrix
+    is the derivative of these functions calculated by the forward automatic
+    differentiation in the ElementProgram.trackMatrix(...) method. The matrix is
+    exact, and it does not depend on the steps as the finite difference matrix of
+    the MatrixGenerator. The derivatives of the matrix over the dE coordinate give
+    the chromatic terms. The MatrixGenerator is used for the nodes that cannot be
+    recorded (see isDifferentiableNode(node)) or if the analytic mode is switched off.
+    """
+
+    def __init__(self):
+        self.program = TPB.ElementProgram()
+        self.matrixGenerator = MatrixGenerator()
+        self.analytic = True
+
+    def setAnalytic(self, analytic):
+        """
+        Switches on or off the automatic differentiation of the recorded nodes.
+        """
+        self.analytic = analytic
+
+    def isAnalytic(self):
+        """
+        Returns True if the matrices of the recorded nodes are calculated by the automatic differentiation.
+        """
+        return self.analytic
+
+    def getElementProgram(self):
+        """
+        Returns the element program where the nodes are recorded.
+        """
+        return self.program
+
+    def getMatrixGenerator(self):
+        """
+        Returns the MatrixGenerator instance used for the nodes that cannot be recorded.
+        """
+        return self.matrixGenerator
+
+    def isAnalyticNode(self, node):
+        """
+        Returns True if the matrix of the node is calculated by the automatic differentiation.
+        """
+        return self.analytic and isDifferentiableNode(node)
+
+    def trackMatrix(self, node, paramsDict, matrix, derivativeMatrix=None):
+        """
+        Tracks the 7x7 (or 6x6) matrix and its derivatives over dE through the
+        active part of the node. The last column of the 7x7 matrix is the point
+        where the node is linearized. The paramsDict is the dictionary of the
+        node.track(paramsDict) method, and the synchronous particle of its bunch
+        is changed as by the usual tracking. The node should be analytic.
+        """
+        if not self.isAnalyticNode(node):
+            msg = "The TransferMatrixGenerator cannot differentiate the node!"
+            msg = msg + os.linesep
+            msg = msg + "Name of node=" + node.getName()
+            msg = msg + os.linesep
+            msg = msg + "Type of node=" + node.getType()
+            orbitFinalize(msg)
+        bunch = paramsDict["bunch"]
+        self.program.clear()
+        paramsDict["tpb"] = self.program
+        try:
+            node.track(paramsDict)
+        finally:
+            del paramsDict["tpb"]
+        self.program.trackMatrix(bunch, matrix, derivativeMatrix)
+
+    def calculateMatrix(self, node, paramsDict, matrix, derivativeMatrix=None):
+        """
+        Calculates the transport matrix of the active part of the node at the origin.
+        If derivativeMatrix is not None, it will have the derivatives of the matrix
+        elements over dE, and the node should be analytic. For the other nodes
+        the particles of the bunch in paramsDict are replaced by the probe particles
+        of the MatrixGenerator.
+        """
+        bunch = paramsDict["bunch"]
+        if not self.isAnalyticNode(node) and derivativeMatrix == None:
+            self.matrixGenerator.initBunch(bunch)
+            node.track(paramsDict)
+            self.matrixGenerator.calculateMatrix(bunch, matrix)
+            return
+        matrix.unit()
+        if derivativeMatrix != None:
+            derivativeMatrix.zero()
+        self.trackMatrix(node, paramsDict, matrix, derivativeMatrix)
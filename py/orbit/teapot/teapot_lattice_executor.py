@@ -0,0 +1,187 @@
+"""
+The native executor for the multi-turn tracking through the TEAPOT lattice.
+The node tree of the lattice is flattened once into the schedule of steps.
+The TEAPOT nodes are recorded into the element programs, the turn counter is
+a native step, and the other nodes (space charge, diagnostics, apertures, the
+nodes with waveforms etc.) are called back from C++ as Python steps.
+The turns are tracked by the C++ loop over this schedule.
+"""
+
+import os
+
+# import bunch
+from orbit.core.bunch import Bunch
+
+# import the function that finalizes the execution
+from ..utils import orbitFinalize
+
+# import general accelerator elements and lattice
+from ..lattice import AccActionsContainer, AccNode
+
+# import the C++ element program and executor
+from ..teapot_base import TPB
+
+from .teapot import TEAPOT_Lattice, TurnCounterTEAPOT
+from .teapot_element_program import FusedSegmentTEAPOT, isRecordableNode, getRecordingEpochs
+
+
+class _ScheduleIsObsolete(Exception):
+    """
+    Stops the C++ loop over the turns after the turn where the schedule became obsolete.
+    """
+
+    pass
+
+
+class TEAPOT_LatticeExecutor(TPB.LatticeExecutor):
+    """
+    The executor tracks the bunch through the TEAPOT lattice for many turns.
+    The results are the same as for the trackBunch(...) method of the lattice
+    called once per turn. The schedule keeps the parameters of the TEAPOT nodes
+    at the moment of the recording. It is built again if any TEAPOT node or
+    the structure of the nodes has been changed. The changes made by the Python
+    steps or the turn function are used from the next turn.
+    """
+
+    def __init__(self, lattice):
+        """
+        Constructor. Builds the schedule of the steps for the TEAPOT lattice.
+        """
+        TPB.LatticeExecutor.__init__(self)
+        if isinstance(lattice, TEAPOT_Lattice) != True:
+            orbitFinalize("Constructor orbit.teapot.TEAPOT_LatticeExecutor needs the TEAPOT_Lattice instance.")
+        self.__lattice = lattice
+        self.__programs = []
+        self.__pythonSteps = []
+        self.__paramsDict = {}
+        self.__turnFunction = None
+        self.__turnOffset = 0
+        self.__nTurns = 0
+        self.__epochs = None
+        self.rebuild()
+
+    def getLattice(self):
+        """
+        Returns the lattice.
+        """
+        return self.__lattice
+
+    def getElementPrograms(self):
+        """
+        Returns the list of the element programs in the schedule.
+        """
+        return self.__programs
+
+    def getPythonNodes(self):
+        """
+        Returns the list of the nodes that are tracked as the Python steps.
+        A node is included once for each of its parts.
+        """
+        return [step[0] for step in self.__pythonSteps]
+
+    def rebuild(self):
+        """
+        Builds the schedule of the steps again.
+        """
+        if not self.__lattice.isInitialized():
+            msg = "The TEAPOT_LatticeExecutor class instance needs the initialized lattice!"
+            msg = msg + os.linesep
+            msg = msg + "Name of lattice=" + self.__lattice.getName()
+            orbitFinalize(msg)
+        self.clear()
+        self.__programs = []
+        self.__pythonSteps = []
+        # the current program collects the TEAPOT nodes until the next non-native step
+        programs = [None]
+        paramsDict = {}
+        # the functions are not called for this bunch, the nodes give it to the programs
+        paramsDict["bunch"] = Bunch()
+        paramsDict["useCharge"] = self.__lattice.getUseRealCharge()
+        actionContainer = AccActionsContainer("Lattice Executor")
+
+        def record(paramsDict):
+            node = paramsDict["node"]
+            if isRecordableNode(node):
+                if programs[0] == None:
+                    programs[0] = TPB.ElementProgram()
+                    self.__programs.append(programs[0])
+                    self.addElementProgram(programs[0])
+                paramsDict["tpb"] = programs[0]
+                node.track(paramsDict)
+                del paramsDict["tpb"]
+                return
+            programs[0] = None
+            if type(node) == FusedSegmentTEAPOT:
+                self.__programs.append(node.getElementProgram())
+                self.addElementProgram(node.getElementProgram())
+            elif type(node) == TurnCounterTEAPOT:
+                self.addTurnCounter()
+            else:
+                # the child nodes can use the active part of the parent node
+                parentNode = paramsDict["parentNode"]
+                parentPartIndex = None
+                if isinstance(parentNode, AccNode):
+                    parentPartIndex = parentNode.getActivePartIndex()
+                step = (node, node.getActivePartIndex(), parentNode, parentPartIndex, paramsDict["path_length"])
+                self.__pythonSteps.append(step)
+                self.addPythonStep()
+
+        actionContainer.addAction(record, AccActionsContainer.BODY)
+        self.__lattice.trackActions(actionContainer, paramsDict)
+        self.__epochs = getRecordingEpochs(self.__lattice)
+
+    def trackBunch(self, bunch, nTurns=1, paramsDict={}, turnFunction=None):
+        """
+        Tracks the bunch for nTurns turns. The Python steps get the paramsDict
+        dictionary as in the trackBunch(...) method of the lattice. If the
+        turnFunction(bunch, turn) function is defined, it is called after each
+        turn with the turn index starting from 0.
+        """
+        paramsDict["bunch"] = bunch
+        paramsDict["useCharge"] = self.__lattice.getUseRealCharge()
+        paramsDict["lattice"] = self.__lattice
+        self.__paramsDict = paramsDict
+        self.__turnFunction = turnFunction
+        self.__turnOffset = 0
+        self.__nTurns = nTurns
+        try:
+            while self.__turnOffset < nTurns:
+                if self.__epochs != getRecordingEpochs(self.__lattice):
+                    self.rebuild()
+                # only the Python code can change the nodes between the turns
+                self.turnEndCall(int(turnFunction != None or len(self.__pythonSteps) > 0))
+                try:
+                    self.track(bunch, nTurns - self.__turnOffset)
+                    break
+                except _ScheduleIsObsolete:
+                    pass
+        finally:
+            self.__turnFunction = None
+            self.__paramsDict = {}
+
+    def trackStep(self, bunch, index):
+        """
+        Tracks the bunch through the part of the node for the Python step with this index.
+        It is called by the C++ executor.
+        """
+        (node, partIndex, parentNode, parentPartIndex, path_length) = self.__pythonSteps[index]
+        paramsDict = self.__paramsDict
+        paramsDict["node"] = node
+        paramsDict["parentNode"] = parentNode
+        paramsDict["path_length"] = path_length
+        node.setActivePartIndex(partIndex)
+        if parentPartIndex != None:
+            parentNode.setActivePartIndex(parentPartIndex)
+        node.track(paramsDict)
+
+    def trackTurnEnd(self, bunch, turn):
+        """
+        Calls the turn function after the turn, and stops the C++ loop if the schedule
+        is obsolete. It is called by the C++ executor.
+        """
+        if self.__turnFunction != None:
+            self.__turnFunction(bunch, self.__turnOffset + turn)
+        if self.__epochs != getRecordingEpochs(self.__lattice):
+            self.__turnOffset += turn + 1
+            if self.__turnOffset < self.__nTurns:
+                raise _ScheduleIsObsolete()
@@ -1,8 +1,9 @@
 """
 The TEAPOT MATRIX_Lattice is a subclass of a MAXTRIX_Lattice class. The Matrix lattice is generated
 by using the TEAPOT lattice. The matrices are the linear part of the TEAPOT elements
-tracking. The number of transport matrices in the lattice is equal to the sum of
-all parts of TEAPOT elements. The RF cavities in the Matrix lattice are the
+tracking, and they are calculated by the automatic differentiation of the TEAPOT
+functions (see TransferMatrixGenerator). The number of transport matrices in the
+lattice is equal to the sum of all parts of TEAPOT elements. The RF cavities in the Matrix lattice are the
 TEAPOT RF Cavity class instances.
 """
 
@@ -19,13 +20,16 @@ from ..utils import orbitFinalize
 from ..lattice import AccLattice, AccNode, AccActionsContainer
 
 # import C++ matrix, phase vector, and generator classes
-from ..teapot_base import MatrixGenerator
+from orbit.core.orbit_utils import Matrix
 
 from ..matrix_lattice import MATRIX_Lattice, BaseMATRIX
 
 # import the MAD parser to construct lattices of TEAPOT elements.
 from ..teapot import TEAPOT_Lattice, RingRFTEAPOT, BaseTEAPOT
 
+# import the generator of the transport matrices of the TEAPOT nodes
+from .teapot_element_program import TransferMatrixGenerator
+
 
 class TEAPOT_MATRIX_Lattice(MATRIX_Lattice):
     """
@@ -49,26 +53,30 @@ class TEAPOT_MATRIX_Lattice(MATRIX_Lattice):
         self.lost_bunch = Bunch()
         bunch.copyEmptyBunchTo(self.bunch)
         bunch.copyEmptyBunchTo(self.lost_bunch)
-        self.matrixGenerator = MatrixGenerator()
+        self.transferMatrixGenerator = TransferMatrixGenerator()
+        self.matrixGenerator = self.transferMatrixGenerator.getMatrixGenerator()
 
         # ----------make MATRIX lattice from TEAPOT
         def twissAction(paramsDict):
             node = paramsDict["node"]
-            bunch = paramsDict["bunch"]
             active_index = node.getActivePartIndex()
             n_parts = node.getnParts()
             length = node.getLength(active_index)
             if isinstance(node, BaseTEAPOT) == True and isinstance(node, RingRFTEAPOT) == False:
-                self.matrixGenerator.initBunch(bunch)
-                node.track(paramsDict)
-                # bunch is ready
+                # the tilt and fringe field nodes use the parameters of the TEAPOT element
+                teapotNode = node
+                if isinstance(paramsDict.get("parentNode"), BaseTEAPOT) == True:
+                    teapotNode = paramsDict["parentNode"]
                 matrixNode = BaseMATRIX(node.getName() + "_" + str(active_index))
+                self.transferMatrixGenerator.calculateMatrix(node, paramsDict, matrixNode.getMatrix())
                 matrixNode.addParam("matrix_parent_node", node)
                 matrixNode.addParam("matrix_parent_node_type", node.getType())
                 matrixNode.addParam("matrix_parent_node_n_nodes", n_parts)
                 matrixNode.addParam("matrix_parent_node_active_index", active_index)
+                matrixNode.addParam("matrix_parent_teapot_node", teapotNode)
+                # the state after the tracking, because some nodes change the parameters
+                matrixNode.addParam("matrix_parent_node_state", _getNodeState(node, teapotNode))
                 matrixNode.setLength(length)
-                self.matrixGenerator.calculateMatrix(bunch, matrixNode.getMatrix())
                 # print "============= name=",matrixNode.getName(),
                 # print " type=",matrixNode.getParam("matrix_parent_node_type"),
                 # print " L=",matrixNode.getLength()
@@ -86,18 +94,36 @@ class TEAPOT_MATRIX_Lattice(MATRIX_Lattice):
         paramsDict["position"] = 0.0
         paramsDict["useCharge"] = self.teapot_lattice.getUseRealCharge()
         self.teapot_lattice.trackActions(accContainer, paramsDict)
-        self.makeOneTurnMatrix()
+        self.__kinEnergy = self.bunch.getSyncParticle().kinEnergy()
         self.initialize()
 
     def getKinEnergy(self):
         return self.bunch.getSyncParticle().kinEnergy()
 
-    def rebuild(self, Ekin=-1.0):
+    def rebuild(self, Ekin=-1.0, onlyChanged=True):
+        """
+        Calculates again the matrices of the lattice and the one turn matrix.
+        If onlyChanged is True, only the matrices of the TEAPOT nodes that have
+        been changed (see BaseTEAPOT.markDirty()), have the new values of the
+        parameters (also changed in-place), or have the waveforms with the new
+        strength are calculated, and the one turn matrix is updated through the
+        segment tree of the matrix products. All matrices are calculated if the
+        energy is changed.
+        """
         if Ekin > 0.0:
             self.bunch.getSyncParticle().kinEnergy(Ekin)
+        if self.bunch.getSyncParticle().kinEnergy() != self.__kinEnergy:
+            onlyChanged = False
+        self.__kinEnergy = self.bunch.getSyncParticle().kinEnergy()
+        changed_indices = []
+        matrix_index = -1
         for matrixNode in self.getNodes():
             if isinstance(matrixNode, BaseMATRIX) == True:
+                matrix_index += 1
                 node = matrixNode.getParam("matrix_parent_node")
+                teapotNode = matrixNode.getParam("matrix_parent_teapot_node")
+                if onlyChanged and _getNodeState(node, teapotNode) == matrixNode.getParam("matrix_parent_node_state"):
+                    continue
                 active_index = matrixNode.getParam("matrix_parent_node_active_index")
                 n_parts = matrixNode.getParam("matrix_parent_node_n_nodes")
                 if n_parts != node.getnParts():
@@ -107,14 +133,22 @@ class TEAPOT_MATRIX_Lattice(MATRIX_Lattice):
                     msg = msg + "  has been changed!" + os.linesep
                     msg = msg + "  Stop!" + os.linesep
                     orbitFinalize(msg)
-                self.matrixGenerator.initBunch(self.bunch)
                 paramsDict = {}
                 paramsDict["bunch"] = self.bunch
+                paramsDict["lostbunch"] = self.lost_bunch
                 paramsDict["node"] = node
+                paramsDict["parentNode"] = teapotNode
+                paramsDict["useCharge"] = self.teapot_lattice.getUseRealCharge()
                 node.setActivePartIndex(active_index)
-                node.track(paramsDict)
-                self.matrixGenerator.calculateMatrix(self.bunch, matrixNode.getMatrix())
-        self.makeOneTurnMatrix()
+                self.transferMatrixGenerator.calculateMatrix(node, paramsDict, matrixNode.getMatrix())
+                if matrixNode.getLength() != node.getLength(active_index):
+                    matrixNode.setLength(node.getLength(active_index))
+                matrixNode.setParam("matrix_parent_node_state", _getNodeState(node, teapotNode))
+                changed_indices.append(matrix_index)
+        if onlyChanged:
+            self.updateOneTurnMatrix(changed_indices)
+        else:
+            self.makeOneTurnMatrix()
 
     def getRingParametersDict(self):
         """
@@ -166,6 +200,16 @@ class TEAPOT_MATRIX_Lattice(MATRIX_Lattice):
         beta_y = res_dict["beta y [m]"]
         return self.trackTwissData(alpha_y, beta_y, "y")
 
+    def getRingOpticsArrays(self):
+        """
+        Returns the dictionary with the numpy arrays of the periodic Twiss parameters,
+        phase advances, and dispersions after each matrix node. It overloads the
+        getRingOpticsArrays(p,m) method from the parent MATRIX_Lattice class.
+        """
+        momentum = self.bunch.getSyncParticle().momentum()
+        mass = self.bunch.getSyncParticle().mass()
+        return MATRIX_Lattice.getRingOpticsArrays(self, momentum, mass)
+
     def getRingDispersionDataX(self):
         """
         Returns the tuple  ([(position, dispX),...],[(position,disp_pX),...] ).
@@ -232,14 +276,49 @@ class TEAPOT_MATRIX_Lattice(MATRIX_Lattice):
         mass = res_dict["mass [GeV]"]
         return self.trackDispersionData(momentum, mass, disp, disp_p, "y")
 
-    def getChromaticitiesXY(self):
+    def getTransferMatrixGenerator(self):
         """
-        Calculates chromaticities for X,Y planes for the whole ring
+        Returns the TransferMatrixGenerator instance that calculates the matrices of the TEAPOT nodes.
+        """
+        return self.transferMatrixGenerator
+
+    def getChromaticityCoefficients(self):
+        """
+        Returns the tuple (coeff_x_dE, coeff_xp_dE, coeff_y_dE, coeff_yp_dE) with the
+        derivatives of the (x,x), (xp,xp), (y,y), and (yp,yp) elements of the ring
+        transport matrix over dE. The RF cavities are not included. If the matrices
+        of all TEAPOT nodes are analytic, the derivatives are calculated by the
+        automatic differentiation. Otherwise, the probe bunch of the MatrixGenerator
+        is tracked through the TEAPOT lattice, and the finite differences are used.
         """
-        (tuneX, tmp0, tmp1) = self.getRingTwissDataX()
-        (tuneY, tmp0, tmp1) = self.getRingTwissDataY()
-        tuneX = tuneX[1][-1]
-        tuneY = tuneY[1][-1]
+        generator = self.transferMatrixGenerator
+        # all nodes are recorded into one program, and the matrix is tracked once
+        program = generator.getElementProgram()
+        program.clear()
+        analytic = [generator.isAnalytic()]
+
+        def recordAction(paramsDict):
+            node = paramsDict["node"]
+            if analytic[0] and isinstance(node, BaseTEAPOT) == True and isinstance(node, RingRFTEAPOT) == False:
+                if not generator.isAnalyticNode(node):
+                    analytic[0] = False
+                    return
+                node.track(paramsDict)
+
+        accContainer = AccActionsContainer()
+        accContainer.addAction(recordAction, AccActionsContainer.BODY)
+        paramsDict = {}
+        paramsDict["bunch"] = self.bunch
+        paramsDict["useCharge"] = self.teapot_lattice.getUseRealCharge()
+        paramsDict["tpb"] = program
+        self.teapot_lattice.trackActions(accContainer, paramsDict)
+        if analytic[0]:
+            matrix = Matrix(7, 7)
+            matrix.unit()
+            derivativeMatrix = Matrix(7, 7)
+            derivativeMatrix.zero()
+            program.trackMatrix(self.bunch, matrix, derivativeMatrix)
+            return tuple([derivativeMatrix.get(ind, ind) for ind in range(4)])
         self.matrixGenerator.initBunchChromCoeff(self.bunch)
 
         # track bunch through the TEAPOT nodes
@@ -253,9 +332,16 @@ class TEAPOT_MATRIX_Lattice(MATRIX_Lattice):
         paramsDict = {}
         paramsDict["bunch"] = self.bunch
         self.teapot_lattice.trackActions(accContainer, paramsDict)
+        return self.matrixGenerator.calcChromCoeff(self.bunch)
 
-        res_coeff = self.matrixGenerator.calcChromCoeff(self.bunch)
-        (coeff_x_dE, coeff_xp_dE, coeff_y_dE, coeff_yp_dE) = res_coeff
+    def getChromaticitiesXY(self):
+        """
+        Calculates chromaticities for X,Y planes for the whole ring
+        """
+        res_dict = self.getRingParametersDict()
+        tuneX = res_dict["fractional tune x"]
+        tuneY = res_dict["fractional tune y"]
+        (coeff_x_dE, coeff_xp_dE, coeff_y_dE, coeff_yp_dE) = self.getChromaticityCoefficients()
         momentum = self.bunch.getSyncParticle().momentum()
         mass = self.bunch.getSyncParticle().mass()
         Ekin = self.bunch.getSyncParticle().kinEnergy()
@@ -264,3 +350,32 @@ class TEAPOT_MATRIX_Lattice(MATRIX_Lattice):
         chromY = -(momentum / (2 * math.sin(2 * math.pi * tuneY))) * (coeff_y_dE + coeff_yp_dE)
         chromY = (momentum / (mass + Ekin)) * chromY
         return (chromX / (2 * math.pi), chromY / (2 * math.pi))
+
+
+def _getNodeState(node, teapotNode):
+    """
+    Returns the tuple that changes when the matrix of the node should be calculated
+    again. It includes the changes counters of the node and its TEAPOT element, the
+    copies of their parameters, and the strength of the waveform of the element.
+    The copies of the parameters find the in-place changes like node.getParam("kls")[i] = ...
+    """
+    state = (node.getParamsEpoch(), teapotNode.getParamsEpoch())
+    state = state + (_getParamsCopy(node.getParamsDict()), _getParamsCopy(teapotNode.getParamsDict()))
+    waveform = getattr(teapotNode, "waveform", None)
+    if waveform:
+        state = state + (waveform.getStrength(),)
+    return state
+
+
+def _getParamsCopy(value):
+    """
+    Returns the copy of the parameter value that can be compared with the
+    copy made before. The lists and dictionaries become the tuples.
+    """
+    if isinstance(value, (list, tuple)):
+        return tuple([_getParamsCopy(item) for item in value])
+    if isinstance(value, dict):
+        return tuple([(key, _getParamsCopy(item)) for (key, item) in value.items()])
+    if hasattr(value, "tolist"):
+        return _getParamsCopy(value.tolist())
+    return value
@@ -0,0 +1,292 @@
+"""
+The optics scan of the TEAPOT ring over the momentum offsets dp/p. The probe
+bunch has the particles of the finite difference one turn matrices for all
+momentum offsets, and it is tracked through the lattice by the bunch-wide loops
+of the TEAPOT functions. The off-momentum closed orbits are found by the Newton
+iterations, and each iteration is one pass of the whole probe bunch through the
+lattice, so the number of passes does not depend on the number of the momentum
+offsets. The tunes, Twiss parameters, and dispersions are calculated from the
+one turn matrices around the closed orbits.
+"""
+
+import os
+import math
+
+import numpy as np
+
+# import bunch
+from orbit.core.bunch import Bunch
+
+# import the function that finalizes the execution
+from ..utils import orbitFinalize
+
+# import general accelerator elements and lattice
+from ..lattice import AccActionsContainer
+
+# import the C++ element program
+from ..teapot_base import TPB
+
+from .teapot import TEAPOT_Lattice, RingRFTEAPOT, BaseTEAPOT
+from .teapot_element_program import isDifferentiableNode
+
+
+class TEAPOT_MomentumScan:
+    """
+    The scan of the closed orbit, tunes, Twiss parameters, and dispersions
+    of the TEAPOT ring over the momentum offsets. As in the TEAPOT_MATRIX_Lattice,
+    only the TEAPOT nodes are used, and the RF cavities are not included.
+    The Bunch instance specifies the particle's energy and other parameters.
+    """
+
+    def __init__(self, teapot_lattice, bunch):
+        if isinstance(teapot_lattice, TEAPOT_Lattice) != True:
+            orbitFinalize("Constructor orbit.teapot.TEAPOT_MomentumScan needs the TEAPOT_Lattice instance.")
+        self.teapot_lattice = teapot_lattice
+        self.bunch = Bunch()
+        bunch.copyEmptyBunchTo(self.bunch)
+        self.program = TPB.ElementProgram()
+        # the steps of the finite differences for x, xp, y, yp, z, and dp/p
+        self.__steps = [1.0e-6, 1.0e-6, 1.0e-6, 1.0e-6, 0.0, 1.0e-6]
+        self.__maxIterations = 20
+        self.__tolerance = 1.0e-10
+        self.__nPasses = 0
+
+    def getLattice(self):
+        """
+        Returns the TEAPOT lattice.
+        """
+        return self.teapot_lattice
+
+    def getKinEnergy(self):
+        """
+        Returns the kinetic energy of the reference particle.
+        """
+        return self.bunch.getSyncParticle().kinEnergy()
+
+    def setKinEnergy(self, Ekin):
+        """
+        Sets the kinetic energy of the reference particle.
+        """
+        self.bunch.getSyncParticle().kinEnergy(Ekin)
+
+    def setStep(self, index, step):
+        """
+        Sets the step of the finite differences for the coordinate with this index.
+        The step for the index 5 is the step of dp/p.
+        """
+        self.__steps[index] = step
+
+    def getStep(self, index):
+        """
+        Returns the step of the finite differences for the coordinate with this index.
+        """
+        return self.__steps[index]
+
+    def setMaxIterations(self, maxIterations):
+        """
+        Sets the maximal number of the Newton iterations for the closed orbits.
+        """
+        self.__maxIterations = maxIterations
+
+    def getMaxIterations(self):
+        """
+        Returns the maximal number of the Newton iterations for the closed orbits.
+        """
+        return self.__maxIterations
+
+    def setTolerance(self, tolerance):
+        """
+        Sets the maximal difference between the closed orbit coordinates after one turn.
+        """
+        self.__tolerance = tolerance
+
+    def getTolerance(self):
+        """
+        Returns the maximal difference between the closed orbit coordinates after one turn.
+        """
+        return self.__tolerance
+
+    def getNumberOfPasses(self):
+        """
+        Returns the number of the passes of the probe bunch through the lattice in the last scan.
+        """
+        return self.__nPasses
+
+    def scan(self, dp_p_arr):
+        """
+        Returns the dictionary with the numpy arrays of the ring parameters at the
+        entrance of the lattice for the momentum offsets dp_p_arr. The keys are
+        "dp/p", "stable", "closed orbit x", "closed orbit xp", "fractional tune x",
+        "alpha x", "beta x", "gamma x", "dispersion x", "dispersion prime x", and the
+        same for y. The dispersions are the derivatives of the closed orbit over dp/p.
+        The values are NaN for the momentum offsets where the closed orbit is not
+        found or the motion is not stable.
+        """
+        dp_p_arr = np.array(dp_p_arr, dtype=float).reshape(-1)
+        nMomenta = len(dp_p_arr)
+        syncPart = self.bunch.getSyncParticle()
+        # the dE coordinate of TEAPOT is dp/p*momentum*beta
+        dE_coeff = syncPart.momentum() * syncPart.beta()
+        track = self.__makeTracker()
+        # the probe of each momentum: the orbit point, and the pairs of points
+        # for the central differences over x, xp, y, yp, and dp/p
+        steps = np.array([self.__steps[ind] for ind in (0, 1, 2, 3)])
+        dp_p_step = self.__steps[5]
+        offsets = np.zeros((11, 6))
+        for ind in range(4):
+            offsets[1 + 2 * ind, ind] = steps[ind]
+            offsets[2 + 2 * ind, ind] = -steps[ind]
+        offsets[9, 5] = dp_p_step * dE_coeff
+        offsets[10, 5] = -dp_p_step * dE_coeff
+        orbits = np.zeros((nMomenta, 4))
+        unit = np.eye(4)
+        self.__nPasses = 0
+        while True:
+            points = np.zeros((nMomenta, 11, 6))
+            points[:, :, :4] = orbits[:, np.newaxis, :]
+            points[:, :, 5] = (dp_p_arr * dE_coeff)[:, np.newaxis]
+            points = points + offsets
+            final = track(points.reshape((-1, 6))).reshape((nMomenta, 11, 6))
+            self.__nPasses += 1
+            residuals = final[:, 0, :4] - orbits
+            # matrices[k][i][j] is the derivative of the coordinate i over the coordinate j
+            matrices = (final[:, 1:9:2, :4] - final[:, 2:9:2, :4]) / (2 * steps[np.newaxis, :, np.newaxis])
+            matrices = np.transpose(matrices, (0, 2, 1))
+            derivatives = (final[:, 9, :4] - final[:, 10, :4]) / (2 * dp_p_step)
+            with np.errstate(invalid="ignore"):
+                converged = np.abs(residuals).max(axis=1) < self.__tolerance
+                finite = np.all(np.isfinite(matrices), axis=(1, 2)) & np.all(np.isfinite(derivatives), axis=1)
+            active = finite & ~converged
+            if not np.any(active) or self.__nPasses >= self.__maxIterations:
+                break
+            orbits[active] = orbits[active] + _solve(unit - matrices[active], residuals[active])
+        return _getOpticsDict(dp_p_arr, converged & finite, orbits, matrices, derivatives)
+
+    def getChromaticitiesXY(self, dp_p_step=1.0e-4):
+        """
+        Returns the tuple (chromX, chromY) with the derivatives of the tunes over dp/p
+        calculated by the scan for the -dp_p_step and +dp_p_step momentum offsets.
+        Unlike the TEAPOT_MATRIX_Lattice.getChromaticitiesXY(), the tunes are the tunes
+        around the off-momentum closed orbits, so the sextupoles are included.
+        """
+        res_dict = self.scan([-dp_p_step, dp_p_step])
+        chromaticities = []
+        for direction in ("x", "y"):
+            tunes = res_dict["fractional tune " + direction]
+            delta = tunes[1] - tunes[0]
+            delta = delta - round(delta)
+            chromaticities.append(delta / (2 * dp_p_step))
+        return tuple(chromaticities)
+
+    def __makeTracker(self):
+        """
+        Returns the function that tracks the array of the coordinates [n][6]
+        through the lattice and returns the final coordinates. The coordinates
+        of the lost particles are NaN. The TEAPOT nodes are recorded into one
+        element program if possible.
+        """
+        program = self.program
+        program.clear()
+        recordable = [True]
+
+        def recordAction(paramsDict):
+            node = paramsDict["node"]
+            if recordable[0] and isinstance(node, BaseTEAPOT) == True and isinstance(node, RingRFTEAPOT) == False:
+                if not isDifferentiableNode(node):
+                    recordable[0] = False
+                    return
+                node.track(paramsDict)
+
+        accContainer = AccActionsContainer()
+        accContainer.addAction(recordAction, AccActionsContainer.BODY)
+        paramsDict = {}
+        # the functions are not called for this bunch, the nodes give it to the program
+        paramsDict["bunch"] = Bunch()
+        paramsDict["useCharge"] = self.teapot_lattice.getUseRealCharge()
+        paramsDict["tpb"] = program
+        self.teapot_lattice.trackActions(accContainer, paramsDict)
+
+        def twissAction(paramsDict):
+            node = paramsDict["node"]
+            if isinstance(node, BaseTEAPOT) == True and isinstance(node, RingRFTEAPOT) == False:
+                node.track(paramsDict)
+
+        def track(coords):
+            bunch = Bunch()
+            self.bunch.copyEmptyBunchTo(bunch)
+            bunch.addParticles(coords)
+            bunch.addPartAttr("ParticleIdNumber")
+            with bunch.partAttrColumn("ParticleIdNumber") as ids:
+                np.asarray(ids)[:] = np.arange(len(coords))
+            if recordable[0]:
+                program.track(bunch)
+            else:
+                lostbunch = Bunch()
+                self.bunch.copyEmptyBunchTo(lostbunch)
+                accContainer = AccActionsContainer()
+                accContainer.addAction(twissAction, AccActionsContainer.BODY)
+                paramsDict = {}
+                paramsDict["bunch"] = bunch
+                paramsDict["lostbunch"] = lostbunch
+                paramsDict["useCharge"] = self.teapot_lattice.getUseRealCharge()
+                self.teapot_lattice.trackActions(accContainer, paramsDict)
+            final = np.full((len(coords), 6), np.nan)
+            with bunch.partAttrColumn("ParticleIdNumber") as ids:
+                final[np.round(np.asarray(ids)).astype(int)] = np.array(bunch)
+            return final
+
+        return track
+
+
+def _solve(matrices, vectors):
+    """
+    Returns the solutions [n][4] of the linear systems with the matrices [n][4][4]
+    and the right hand sides [n][4]. The solutions for the singular matrices are NaN.
+    """
+    solutions = np.full(vectors.shape, np.nan)
+    for ind in range(len(vectors)):
+        try:
+            solutions[ind] = np.linalg.solve(matrices[ind], vectors[ind])
+        except np.linalg.LinAlgError:
+            pass
+    return solutions
+
+
+def _getOpticsDict(dp_p_arr, found, orbits, matrices, derivatives):
+    """
+    Returns the dictionary with the arrays of the ring parameters calculated from the
+    closed orbits, the 4x4 one turn matrices, and their derivatives over dp/p.
+    """
+    res_dict = {}
+    res_dict["dp/p"] = dp_p_arr
+    stable = found.copy()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for ind in (0, 2):
+            cos_phi = (matrices[:, ind, ind] + matrices[:, ind + 1, ind + 1]) / 2.0
+            stable = stable & (np.abs(cos_phi) < 1.0)
+        unstable = ~stable
+        # the dispersion is the derivative of the closed orbit
+        dispersions = _solve(np.eye(4) - matrices, derivatives)
+        for direction, ind in (("x", 0), ("y", 2)):
+            m00 = matrices[:, ind, ind]
+            m01 = matrices[:, ind, ind + 1]
+            m10 = matrices[:, ind + 1, ind]
+            m11 = matrices[:, ind + 1, ind + 1]
+            cos_phi = (m00 + m11) / 2.0
+            sign = np.where(m01 < 0.0, -1.0, 1.0)
+            sin_phi = np.sqrt(1.0 - cos_phi * cos_phi) * sign
+            values = {}
+            values["closed orbit " + direction] = orbits[:, ind]
+            values["closed orbit " + direction + "p"] = orbits[:, ind + 1]
+            values["fractional tune " + direction] = np.arccos(cos_phi) / (2 * math.pi) * sign
+            values["alpha " + direction] = (m00 - m11) / (2 * sin_phi)
+            values["beta " + direction] = m01 / sin_phi
+            values["gamma " + direction] = -m10 / sin_phi
+            values["dispersion " + direction] = dispersions[:, ind]
+            values["dispersion prime " + direction] = dispersions[:, ind + 1]
+            for key in values:
+                array = np.array(values[key], dtype=float)
+                array[unstable] = np.nan
+                res_dict[key] = array
+    res_dict["stable"] = stable
+    return res_dict
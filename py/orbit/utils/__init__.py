@@ -8,6 +8,8 @@
 ## - NamedObject      - Class. Represents an object with a name.
 ## - TypedObject      - Class. Represents an object with a type.
 ## - ParamsDictObject - Class. Represents an object that has a parameters dictionary.
+## - saveCheckpoint   - Method. Saves the bunch, random generators, and lattice states for a restart.
+## - loadCheckpoint   - Method. Restores the tracking state saved by saveCheckpoint.
 
 from .multiDimArray import multiDimDoubleArray
 from .multiDimArray import multiDimIntArray
@@ -18,6 +20,7 @@ from .ParamsDictObject import ParamsDictObject
 
 from .phaseOperations import phaseNearTargetPhase, phaseNearTargetPhaseDeg
 from .consts import speed_of_light
+from .checkpoint import saveCheckpoint, loadCheckpoint
 
 __all__ = []
 __all__.append("multiDimDoubleArray")
@@ -29,3 +32,5 @@ __all__.append("ParamsDictObject")
 __all__.append("phaseNearTargetPhase")
 __all__.append("phaseNearTargetPhaseDeg")
 __all__.append("speed_of_light")
+__all__.append("saveCheckpoint")
+__all__.append("loadCheckpoint")
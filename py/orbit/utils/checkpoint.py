@@ -0,0 +1,131 @@
+"""
+The checkpoint (restart) files for the long tracking runs.
+
+The checkpoint is a directory with the bunch and the lost bunch in
+the binary bunch files (written in parallel with MPI-IO) and one state
+file for each CPU. The state file keeps the states of the random
+generators (C++ orbit_utils.random, Python random, and numpy.random),
+the mutable states of the lattice nodes (see AccNode.getCheckpointState()),
+the numbers of particles on the CPU, and the user's data.
+The restart should be done with the same number of CPUs and the same
+lattice. After the restart the tracking will continue exactly the same
+way as without the interruption.
+"""
+
+import os
+import pickle
+import random
+
+from orbit.core import orbit_mpi
+from orbit.core.orbit_utils import random as orbit_random
+
+from .orbitFinalize import orbitFinalize
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+CHECKPOINT_VERSION = 1
+
+
+def _getLatticeNodes(lattice):
+    """
+    Returns the list of all nodes of the lattice including children
+    nodes in the fixed order.
+    """
+    nodes = []
+
+    def addNodes(node_arr):
+        for node in node_arr:
+            nodes.append(node)
+            addNodes(node.getAllChildren())
+
+    addNodes(lattice.getNodes())
+    return nodes
+
+
+def _getRankAndSize(bunch):
+    comm = bunch.getMPIComm()
+    rank = orbit_mpi.MPI_Comm_rank(comm)
+    size = orbit_mpi.MPI_Comm_size(comm)
+    return (comm, rank, size)
+
+
+def saveCheckpoint(dir_name, lattice, bunch, lostbunch=None, user_state=None):
+    """
+    Saves the bunch, the lost bunch, the random generators, and the lattice
+    nodes states into the checkpoint directory. The user_state should be
+    a picklable object, it will be returned by the loadCheckpoint(...).
+    """
+    (comm, rank, size) = _getRankAndSize(bunch)
+    if rank == 0 and not os.path.isdir(dir_name):
+        os.makedirs(dir_name)
+    orbit_mpi.MPI_Barrier(comm)
+
+    bunch.dumpBunch(os.path.join(dir_name, "bunch.bin"))
+    nparts_lost = -1
+    if lostbunch != None:
+        lostbunch.dumpBunch(os.path.join(dir_name, "lostbunch.bin"))
+        nparts_lost = lostbunch.getSize()
+
+    nodes_states = []
+    for ind, node in enumerate(_getLatticeNodes(lattice)):
+        state = node.getCheckpointState()
+        if state != None:
+            nodes_states.append((ind, node.getName(), state))
+
+    state_dict = {}
+    state_dict["version"] = CHECKPOINT_VERSION
+    state_dict["size"] = size
+    state_dict["nparts"] = bunch.getSize()
+    state_dict["nparts_lost"] = nparts_lost
+    state_dict["orbit_random"] = orbit_random.getState()
+    state_dict["python_random"] = random.getstate()
+    if numpy != None:
+        state_dict["numpy_random"] = numpy.random.get_state()
+    state_dict["nodes"] = nodes_states
+    state_dict["user_state"] = user_state
+
+    file_name = os.path.join(dir_name, "state_" + str(rank) + ".pkl")
+    with open(file_name + ".tmp", "wb") as fl:
+        pickle.dump(state_dict, fl)
+    os.replace(file_name + ".tmp", file_name)
+    orbit_mpi.MPI_Barrier(comm)
+
+
+def loadCheckpoint(dir_name, lattice, bunch, lostbunch=None):
+    """
+    Restores the bunch, the lost bunch, the random generators, and the
+    lattice nodes states from the checkpoint directory.
+    Returns the user_state object saved by saveCheckpoint(...).
+    """
+    (comm, rank, size) = _getRankAndSize(bunch)
+    file_name = os.path.join(dir_name, "state_" + str(rank) + ".pkl")
+    if not os.path.isfile(file_name):
+        orbitFinalize("loadCheckpoint: cannot find the checkpoint state file=" + file_name)
+    with open(file_name, "rb") as fl:
+        state_dict = pickle.load(fl)
+    if state_dict["size"] != size:
+        msg = "loadCheckpoint: the checkpoint was saved with different number of CPUs."
+        msg += " Checkpoint=" + str(state_dict["size"]) + " now=" + str(size)
+        orbitFinalize(msg)
+
+    # each CPU gets the same particles as before
+    bunch.deleteAllParticles()
+    bunch.readBunch(os.path.join(dir_name, "bunch.bin"), -1, state_dict["nparts"])
+    if lostbunch != None and state_dict["nparts_lost"] >= 0:
+        lostbunch.deleteAllParticles()
+        lostbunch.readBunch(os.path.join(dir_name, "lostbunch.bin"), -1, state_dict["nparts_lost"])
+
+    nodes = _getLatticeNodes(lattice)
+    for ind, name, state in state_dict["nodes"]:
+        if ind >= len(nodes) or nodes[ind].getName() != name:
+            orbitFinalize("loadCheckpoint: the lattice is different. Cannot find the node=" + name)
+        nodes[ind].setCheckpointState(state)
+
+    orbit_random.setState(state_dict["orbit_random"])
+    random.setstate(state_dict["python_random"])
+    if numpy != None and "numpy_random" in state_dict:
+        numpy.random.set_state(state_dict["numpy_random"])
+    return state_dict["user_state"]
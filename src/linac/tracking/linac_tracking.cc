@@ -30,6 +30,7 @@
 #include "OrbitConst.hh"
 #include "Bunch.hh"
 #include "SyncPart.hh"
+#include "simd_clones.hh"
 
 #include <complex>
 
@@ -52,29 +53,16 @@ namespace linac_tracking
     //
     ///////////////////////////////////////////////////////////////////////////
 
-    void linac_drift(Bunch* bunch, double length)
+    template<class CoordRows>
+    ORBIT_SIMD_CLONES
+    static void linac_drift_block(CoordRows arr, int nParts, double mass, double Ekin_s,
+                                  double p_s, double beta_s, double delta_tc)
     {
-        SyncPart* syncPart = bunch->getSyncPart();
-
-        double beta_s = syncPart->getBeta();
-        double v_s = OrbitConst::c * beta_s;
-        double beta1_s = 1.0/beta_s;
-        if(length <= 0.) return;
-
-        double delta_t = length / v_s;
-        double delta_tc = delta_t*OrbitConst::c;
-
-        syncPart->setTime(syncPart->getTime() + delta_t);
-
-        double mass = syncPart->getMass();
-        double Ekin_s = syncPart->getEnergy();
-        double p_s = syncPart->getMomentum();
         double p2_s = p_s*p_s;
         double p2 = 0.;
         double dE = 0.;
         double xp = 0.;
         double yp = 0.;
-        double coeff = 0.;
         double Ekin = 0.;
         double Etotal = 0.;
         double p_z2 = 0.;
@@ -85,8 +73,8 @@ namespace linac_tracking
         //coordinate array [part. index][x,xp,y,yp,z,dE]
         //sqrt(fabs(p_z2)) - fabs function is a protection for case when xp and yp are too big for dE
         //It means the particles are nonphysical and simulations do not make sense
-        double** arr = bunch->coordArr();
-        for(int i = 0; i < bunch->getSize(); i++)
+        ORBIT_SIMD_IVDEP
+        for(int i = 0; i < nParts; i++)
         {
             dE = arr[i][5];
             xp = arr[i][1];
@@ -104,6 +92,32 @@ namespace linac_tracking
         }
     }
 
+    template<class CoordRows>
+    static void linac_drift_rows(Bunch* bunch, CoordRows arr, double length)
+    {
+        SyncPart* syncPart = bunch->getSyncPart();
+
+        double beta_s = syncPart->getBeta();
+        double v_s = OrbitConst::c * beta_s;
+        if(length <= 0.) return;
+
+        double delta_t = length / v_s;
+        double delta_tc = delta_t*OrbitConst::c;
+
+        syncPart->setTime(syncPart->getTime() + delta_t);
+
+        linac_drift_block(arr, bunch->getSize(), syncPart->getMass(), syncPart->getEnergy(),
+                          syncPart->getMomentum(), beta_s, delta_tc);
+    }
+
+    void linac_drift(Bunch* bunch, double length)
+    {
+        dispatchCoordRows(bunch, [&](auto arr)
+        {
+            linac_drift_rows(bunch, arr, length);
+        });
+    }
+
     ////////////////////////////
     // NAME
     //   linac_quad1
@@ -123,7 +137,8 @@ namespace linac_tracking
     //
     ///////////////////////////////////////////////////////////////////////////
 
-    void linac_quad1(Bunch* bunch, double length, double kq, int useCharge)
+    template<class CoordRows>
+    static void linac_quad1_rows(Bunch* bunch, CoordRows arr, double length, double kq, int useCharge)
     {
     if(kq == 0. || bunch->getCharge() == 0.)
     {
@@ -168,7 +183,6 @@ namespace linac_tracking
         double beta_z = 0.;
 
     //coordinate array [part. index][x,xp,y,yp,z,dE]
-    double** arr = bunch->coordArr();
     int nParts = bunch->getSize();
 
     double kqc = 0.;
@@ -233,6 +247,14 @@ namespace linac_tracking
     }
   }
 
+    void linac_quad1(Bunch* bunch, double length, double kq, int useCharge)
+    {
+        dispatchCoordRows(bunch, [&](auto arr)
+        {
+            linac_quad1_rows(bunch, arr, length, kq, useCharge);
+        });
+    }
+
   ///////////////////////////////////////////////////////////////////////////
   // NAME
   //  linac_ quad2
@@ -276,7 +298,8 @@ namespace linac_tracking
     //
     ///////////////////////////////////////////////////////////////////////////
 
-    void linac_quad3(Bunch* bunch, double length, double dB_dz)
+    template<class CoordRows>
+    static void linac_quad3_rows(Bunch* bunch, CoordRows arr, double length, double dB_dz)
     {
     double charge = bunch->getCharge();
 
@@ -291,7 +314,6 @@ namespace linac_tracking
     double kick_coeff = 0.299792458*charge*dB_dz*length/momentum;
 
     //coordinate array [part. index][x,xp,y,yp,z,dE]
-    double** arr = bunch->coordArr();
     int nParts = bunch->getSize();
 
     double coef_xy = 0.;
@@ -303,6 +325,14 @@ namespace linac_tracking
     }
   }
 
+    void linac_quad3(Bunch* bunch, double length, double dB_dz)
+    {
+        dispatchCoordRows(bunch, [&](auto arr)
+        {
+            linac_quad3_rows(bunch, arr, length, dB_dz);
+        });
+    }
+
 ///////////////////////////////////////////////////////////////////////////
 // NAME
 //   kick
@@ -321,13 +351,11 @@ namespace linac_tracking
 //
 ///////////////////////////////////////////////////////////////////////////
 
-    void kick(Bunch* bunch, double kx, double ky, double kE, int useCharge)
+    template<class CoordRows>
+    ORBIT_SIMD_CLONES
+    static void kick_block(CoordRows arr, int nParts, double mass, double Ekin_s, double p_s,
+                           double kx, double ky, double kE)
     {
-        SyncPart* syncPart = bunch->getSyncPart();
-
-        double mass = syncPart->getMass();
-        double Ekin_s = syncPart->getEnergy();
-        double p_s = syncPart->getMomentum();
         double p2_s = p_s*p_s;
         double dE = 0.;
         double p2 = 0.;
@@ -336,10 +364,10 @@ namespace linac_tracking
         double coeff = 0.;
 
         //coordinate array [part. index][x,xp,y,yp,z,dE]
-        double** arr = bunch->coordArr();
         if(kx != 0.)
         {
-            for(int i = 0; i < bunch->getSize(); i++)
+            ORBIT_SIMD_IVDEP
+            for(int i = 0; i < nParts; i++)
             {
                 dE = arr[i][5];
                 Ekin = Ekin_s+dE;
@@ -351,7 +379,8 @@ namespace linac_tracking
         }
         if(ky != 0.)
         {
-            for(int i = 0; i < bunch->getSize(); i++)
+            ORBIT_SIMD_IVDEP
+            for(int i = 0; i < nParts; i++)
             {
                 dE = arr[i][5];
                 Ekin = Ekin_s+dE;
@@ -363,11 +392,28 @@ namespace linac_tracking
         }
         if(kE != 0.)
         {
-            for(int i = 0; i < bunch->getSize(); i++)
+            ORBIT_SIMD_IVDEP
+            for(int i = 0; i < nParts; i++)
             {
                 arr[i][5] += kE;
             }
         }
     }
 
+    template<class CoordRows>
+    static void kick_rows(Bunch* bunch, CoordRows arr, double kx, double ky, double kE, int useCharge)
+    {
+        SyncPart* syncPart = bunch->getSyncPart();
+        kick_block(arr, bunch->getSize(), syncPart->getMass(), syncPart->getEnergy(),
+                   syncPart->getMomentum(), kx, ky, kE);
+    }
+
+    void kick(Bunch* bunch, double kx, double ky, double kE, int useCharge)
+    {
+        dispatchCoordRows(bunch, [&](auto arr)
+        {
+            kick_rows(bunch, arr, kx, ky, kE, useCharge);
+        });
+    }
+
 }  //end of namespace linac_tracking
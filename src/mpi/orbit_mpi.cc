@@ -4,6 +4,12 @@
 #include <cstring>
 #include <iostream>
 #include <ctime>
+#include <vector>
+
+#if USE_MPI == 0
+#include <cstdio>
+#include <unistd.h>
+#endif
 
 /** A C wrapper around MPI_Init. */
 int ORBIT_MPI_Init(){
@@ -45,6 +51,18 @@ int ORBIT_MPI_Init(){
   return res;
 }
 
+/** The functions that free the MPI objects of the modules before MPI_Finalize. */
+static std::vector<void (*)()>& orbit_mpi_finalize_functions(){
+  static std::vector<void (*)()> functions;
+  return functions;
+}
+
+/** Registers the function called by ORBIT_MPI_Finalize before MPI_Finalize. */
+int ORBIT_MPI_Add_finalize_function(void (*func)()){
+  orbit_mpi_finalize_functions().push_back(func);
+  return MPI_SUCCESS;
+}
+
 /** A C wrapper around MPI_Initialized. */
 int ORBIT_MPI_Initialized(int *init){
  int res = 0;
@@ -75,6 +93,12 @@ int ORBIT_MPI_Finalize(const char* message){
   ORBIT_MPI_Comm_rank(MPI_COMM_WORLD, &rank);
   int init;
   ORBIT_MPI_Initialized(&init);
+  //each function is called once even if the finalize is called again
+  std::vector<void (*)()> functions;
+  functions.swap(orbit_mpi_finalize_functions());
+  for(int i = (int) functions.size() - 1; i >= 0; i--){
+    functions[i]();
+  }
 #if USE_MPI > 0
   if(init > 0){
     res = MPI_Finalize();
@@ -573,6 +597,18 @@ int ORBIT_MPI_Bcast(void* ar, int n1, MPI_Datatype data, int n2, MPI_Comm comm )
   return res;
 }
 
+/** A C wrapper around MPI_Alltoallv. */
+int ORBIT_MPI_Alltoallv(void* ar1, int* n1, int* d1, MPI_Datatype data1,
+                        void* ar2, int* n2, int* d2, MPI_Datatype data2, MPI_Comm comm){
+  int res = 0;
+#if USE_MPI > 0
+  res = MPI_Alltoallv(ar1, n1, d1, data1, ar2, n2, d2, data2, comm);
+#else
+  res  = MPI_SUCCESS;
+#endif
+  return res;
+}
+
 /** A C wrapper around MPI_Send. */
 int ORBIT_MPI_Send(void* ar, int n1, MPI_Datatype data, int n2, int n3, MPI_Comm comm){
   int res = 0;
@@ -620,3 +656,194 @@ int ORBIT_MPI_Get_count(MPI_Status *status, MPI_Datatype datatype, int *count){
 #endif
   return res;
 }
+
+/** A C wrapper around MPI_Type_contiguous. */
+int ORBIT_MPI_Type_contiguous(int count, MPI_Datatype data, MPI_Datatype* data_out){
+  int res = 0;
+#if USE_MPI > 0
+  res = MPI_Type_contiguous(count, data, data_out);
+#else
+  *data_out = data;
+  res  = MPI_SUCCESS;
+#endif
+  return res;
+}
+
+/** A C wrapper around MPI_Type_commit. */
+int ORBIT_MPI_Type_commit(MPI_Datatype* data){
+  int res = 0;
+#if USE_MPI > 0
+  res = MPI_Type_commit(data);
+#else
+  res  = MPI_SUCCESS;
+#endif
+  return res;
+}
+
+/** A C wrapper around MPI_Op_create. */
+int ORBIT_MPI_Op_create(MPI_User_function* func, int commute, MPI_Op* op){
+  int res = 0;
+#if USE_MPI > 0
+  res = MPI_Op_create(func, commute, op);
+#else
+  *op = MPI_OP_NULL;
+  res  = MPI_SUCCESS;
+#endif
+  return res;
+}
+
+/** A C wrapper around MPI_Type_free. */
+int ORBIT_MPI_Type_free(MPI_Datatype* data){
+  int res = 0;
+#if USE_MPI > 0
+  res = MPI_Type_free(data);
+#else
+  *data = MPI_DATATYPE_NULL;
+  res  = MPI_SUCCESS;
+#endif
+  return res;
+}
+
+/** A C wrapper around MPI_Op_free. */
+int ORBIT_MPI_Op_free(MPI_Op* op){
+  int res = 0;
+#if USE_MPI > 0
+  res = MPI_Op_free(op);
+#else
+  *op = MPI_OP_NULL;
+  res  = MPI_SUCCESS;
+#endif
+  return res;
+}
+
+#if USE_MPI == 0
+/** Returns the size of the MPI data type in bytes for the non-MPI MPI-IO functions. */
+static size_t orbit_mpi_datatype_size(MPI_Datatype data){
+  switch(data){
+    case MPI_CHAR: case MPI_UNSIGNED_CHAR: case MPI_BYTE: return 1;
+    case MPI_SHORT: case MPI_UNSIGNED_SHORT: return sizeof(short);
+    case MPI_INT: case MPI_UNSIGNED: return sizeof(int);
+    case MPI_LONG: case MPI_UNSIGNED_LONG: return sizeof(long);
+    case MPI_FLOAT: return sizeof(float);
+    case MPI_DOUBLE: return sizeof(double);
+    case MPI_LONG_DOUBLE: return sizeof(long double);
+    case MPI_LONG_LONG_INT: return sizeof(long long);
+  }
+  return 1;
+}
+#endif
+
+/** A C wrapper around MPI_File_open. */
+int ORBIT_MPI_File_open(MPI_Comm comm, const char* fileName, int amode, MPI_File* fh){
+  int res = 0;
+#if USE_MPI > 0
+  res = MPI_File_open(comm, fileName, amode, MPI_INFO_NULL, fh);
+#else
+  const char* mode = "rb";
+  if(amode & MPI_MODE_WRONLY) mode = "wb";
+  if(amode & MPI_MODE_RDWR){
+    mode = "r+b";
+    if(amode & MPI_MODE_CREATE){
+      FILE* f_tmp = fopen(fileName, "ab");
+      if(f_tmp != NULL) fclose(f_tmp);
+    }
+  }
+  *fh = fopen(fileName, mode);
+  res = MPI_SUCCESS;
+  if(*fh == NULL) res = MPI_ERR_FILE;
+#endif
+  return res;
+}
+
+/** A C wrapper around MPI_File_close. */
+int ORBIT_MPI_File_close(MPI_File* fh){
+  int res = 0;
+#if USE_MPI > 0
+  res = MPI_File_close(fh);
+#else
+  res = MPI_SUCCESS;
+  if(*fh != NULL) fclose(*fh);
+  *fh = MPI_FILE_NULL;
+#endif
+  return res;
+}
+
+/** A C wrapper around MPI_File_set_size. */
+int ORBIT_MPI_File_set_size(MPI_File fh, MPI_Offset size){
+  int res = 0;
+#if USE_MPI > 0
+  res = MPI_File_set_size(fh, size);
+#else
+  res = MPI_SUCCESS;
+  fflush(fh);
+  if(ftruncate(fileno(fh), (off_t) size) != 0) res = MPI_ERR_FILE;
+#endif
+  return res;
+}
+
+/** A C wrapper around MPI_File_get_size. */
+int ORBIT_MPI_File_get_size(MPI_File fh, MPI_Offset* size){
+  int res = 0;
+#if USE_MPI > 0
+  res = MPI_File_get_size(fh, size);
+#else
+  res = MPI_SUCCESS;
+  fseeko(fh, 0, SEEK_END);
+  *size = (MPI_Offset) ftello(fh);
+#endif
+  return res;
+}
+
+/** A C wrapper around MPI_File_write_at. */
+int ORBIT_MPI_File_write_at(MPI_File fh, MPI_Offset offset, void* buf, int count, MPI_Datatype data, MPI_Status* status){
+  int res = 0;
+#if USE_MPI > 0
+  res = MPI_File_write_at(fh, offset, buf, count, data, status);
+#else
+  res = MPI_SUCCESS;
+  if(count > 0){
+    fseeko(fh, (off_t) offset, SEEK_SET);
+    size_t n = fwrite(buf, orbit_mpi_datatype_size(data), count, fh);
+    if(n != (size_t) count) res = MPI_ERR_FILE;
+  }
+#endif
+  return res;
+}
+
+/** A C wrapper around MPI_File_write_at_all. */
+int ORBIT_MPI_File_write_at_all(MPI_File fh, MPI_Offset offset, void* buf, int count, MPI_Datatype data, MPI_Status* status){
+  int res = 0;
+#if USE_MPI > 0
+  res = MPI_File_write_at_all(fh, offset, buf, count, data, status);
+#else
+  res = ORBIT_MPI_File_write_at(fh, offset, buf, count, data, status);
+#endif
+  return res;
+}
+
+/** A C wrapper around MPI_File_read_at. */
+int ORBIT_MPI_File_read_at(MPI_File fh, MPI_Offset offset, void* buf, int count, MPI_Datatype data, MPI_Status* status){
+  int res = 0;
+#if USE_MPI > 0
+  res = MPI_File_read_at(fh, offset, buf, count, data, status);
+#else
+  res = MPI_SUCCESS;
+  if(count > 0){
+    fseeko(fh, (off_t) offset, SEEK_SET);
+    size_t n = fread(buf, orbit_mpi_datatype_size(data), count, fh);
+    if(n != (size_t) count) res = MPI_ERR_FILE;
+  }
+#endif
+  return res;
+}
+
+/** A C wrapper around MPI_File_read_at_all. */
+int ORBIT_MPI_File_read_at_all(MPI_File fh, MPI_Offset offset, void* buf, int count, MPI_Datatype data, MPI_Status* status){
+  int res = 0;
+#if USE_MPI > 0
+  res = MPI_File_read_at_all(fh, offset, buf, count, data, status);
+#else
+  res = ORBIT_MPI_File_read_at(fh, offset, buf, count, data, status);
+#endif
+  return res;
+}
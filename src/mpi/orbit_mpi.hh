@@ -65,6 +65,9 @@
  // Request ( handler)
  typedef int MPI_Request;
 
+ // User-defined reduction operation
+ typedef void (MPI_User_function)(void* invec, void* inoutvec, int* len, MPI_Datatype* datatype);
+
  /* Define some null objects */
  #define MPI_COMM_NULL      ((MPI_Comm)0)
  #define MPI_OP_NULL        ((MPI_Op)0)
@@ -93,6 +96,16 @@
  #define MPI_ANY_SOURCE         (-2)
  #define MPI_ANY_TAG            (-1)
 
+ /* MPI-IO. Without MPI the files are accessed by C standard I/O */
+ typedef FILE* MPI_File;
+ typedef long long MPI_Offset;
+ #define MPI_FILE_NULL      ((MPI_File)0)
+ #define MPI_MODE_CREATE    1
+ #define MPI_MODE_RDONLY    2
+ #define MPI_MODE_WRONLY    4
+ #define MPI_MODE_RDWR      8
+ #define MPI_ERR_FILE       27
+
 #endif
 //-------------------------------------------------------------
 //END the case when USE_MPI is defined or not.
@@ -148,6 +161,10 @@ int ORBIT_MPI_Init();
 int ORBIT_MPI_Initialized(int *init);
 void ORBIT_MPI_Finalize();
 int ORBIT_MPI_Finalize(const char* message);
+
+//the function is called by ORBIT_MPI_Finalize before MPI_Finalize, it
+//should free the MPI objects (data types, operations) of its module
+int ORBIT_MPI_Add_finalize_function(void (*func)());
 int ORBIT_MPI_Get_processor_name(char *name, int* len);
 double ORBIT_MPI_Wtime(void);
 double ORBIT_MPI_Wtick();
@@ -207,10 +224,34 @@ int ORBIT_MPI_Barrier(MPI_Comm comm);
 int ORBIT_MPI_Wait(MPI_Request  *request, MPI_Status *status);
 int ORBIT_MPI_Allreduce(void* buf_in, void* buf_out, int count, MPI_Datatype, MPI_Op, MPI_Comm);
 int ORBIT_MPI_Bcast(void* buf, int count, MPI_Datatype, int rank, MPI_Comm);
+int ORBIT_MPI_Alltoallv(void* buf_send, int* counts_send, int* displs_send, MPI_Datatype,
+                        void* buf_recv, int* counts_recv, int* displs_recv, MPI_Datatype, MPI_Comm);
 int ORBIT_MPI_Send(void* buf, int count, MPI_Datatype, int dest,   int tag, MPI_Comm);
 int ORBIT_MPI_Recv(void* buf, int count, MPI_Datatype, int source, int tag, MPI_Comm, MPI_Status *);
 int ORBIT_MPI_Probe(int source, int tag, MPI_Comm comm, MPI_Status *status);
 int ORBIT_MPI_Get_count(MPI_Status *status, MPI_Datatype datatype, int *count);
 
+//--------------------------------------------------------
+// MPI functions related to the derived data types and
+// user-defined reduction operations
+//--------------------------------------------------------
+int ORBIT_MPI_Type_contiguous(int count, MPI_Datatype data, MPI_Datatype* data_out);
+int ORBIT_MPI_Type_commit(MPI_Datatype* data);
+int ORBIT_MPI_Op_create(MPI_User_function* func, int commute, MPI_Op* op);
+int ORBIT_MPI_Type_free(MPI_Datatype* data);
+int ORBIT_MPI_Op_free(MPI_Op* op);
+
+//--------------------------------------------------------
+// MPI-IO functions. The _all versions are collective.
+//--------------------------------------------------------
+int ORBIT_MPI_File_open(MPI_Comm comm, const char* fileName, int amode, MPI_File* fh);
+int ORBIT_MPI_File_close(MPI_File* fh);
+int ORBIT_MPI_File_set_size(MPI_File fh, MPI_Offset size);
+int ORBIT_MPI_File_get_size(MPI_File fh, MPI_Offset* size);
+int ORBIT_MPI_File_write_at(MPI_File fh, MPI_Offset offset, void* buf, int count, MPI_Datatype, MPI_Status *);
+int ORBIT_MPI_File_write_at_all(MPI_File fh, MPI_Offset offset, void* buf, int count, MPI_Datatype, MPI_Status *);
+int ORBIT_MPI_File_read_at(MPI_File fh, MPI_Offset offset, void* buf, int count, MPI_Datatype, MPI_Status *);
+int ORBIT_MPI_File_read_at_all(MPI_File fh, MPI_Offset offset, void* buf, int count, MPI_Datatype, MPI_Status *);
+
 
 #endif   //end of ---ifndef ORBIT_MPI_INCLUDE---
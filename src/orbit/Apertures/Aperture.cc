@@ -56,7 +56,6 @@ void Aperture::checkBunch(Bunch* bunch, Bunch* lostbunch){
 	if(lostbunch != NULL) lostbunch->compress();
 	double m_size = 0.;
 	int nParts = bunch->getSize();
-	double** coord = bunch->coordArr();
 
 
 	ParticleAttributes* lostPartAttr = NULL;
@@ -120,89 +119,93 @@ void Aperture::checkBunch(Bunch* bunch, Bunch* lostbunch){
 		lostbunch->setMacroSize(bunch->getMacroSize());
 	}
 
-	// shape = 1              ===circular aperture===
-	if(shape == 1){
-	  for (int count = 0; count < nParts; count++){
-	  	if((pow((coord[count][0]-c), 2) + pow((coord[count][2]-d), 2)) >= pow(a, 2)){
-	  		if(lostbunch != NULL) {
-	  			lostbunch->addParticle(coord[count][0], coord[count][1], coord[count][2], coord[count][3], coord[count][4], coord[count][5]);
-	  			//pos_ is a position in lattice where particle is lost
-	  			lostPartAttr->attValue(lostbunch->getSize() - 1, 0) = pos_;
-	  			if(partIdNumbAttr != NULL){
-	  				partIdNumbAttr->attValue(lostbunch->getSize() - 1, 0) = partIdNumbInitAttr->attValue(count,0);
-	  			}
-	  			if(partInitCoordsAttr != NULL){
-	  				for(int j=0; j < 6; ++j){
-	  					partInitCoordsAttr->attValue(lostbunch->getSize() - 1, j) = partInitCoordsInitAttr->attValue(count,j);
-	  				}
-	  			}
-	  			if(partMacroAttr != NULL){
-	  				partMacroAttr->attValue(lostbunch->getSize() - 1, 0) = partMacroInitAttr->attValue(count,0);
-	  			}
-					if(partTurnNumberAttr != NULL){
-						partTurnNumberAttr->attValue(lostbunch->getSize() - 1, 0) = turn;
-					}
-	  		}
-	  		bunch->deleteParticleFast(count);
-	  	}
-	  }
-	}
+	//the loss check does not convert the float32 or SoA coordinates
+	readCoordRows(bunch, [&](auto coord)
+	{
+		// shape = 1              ===circular aperture===
+		if(shape == 1){
+		  for (int count = 0; count < nParts; count++){
+		  	if((pow((coord[count][0]-c), 2) + pow((coord[count][2]-d), 2)) >= pow(a, 2)){
+		  		if(lostbunch != NULL) {
+		  			lostbunch->addParticle(coord[count][0], coord[count][1], coord[count][2], coord[count][3], coord[count][4], coord[count][5]);
+		  			//pos_ is a position in lattice where particle is lost
+		  			lostPartAttr->attValue(lostbunch->getSize() - 1, 0) = pos_;
+		  			if(partIdNumbAttr != NULL){
+		  				partIdNumbAttr->attValue(lostbunch->getSize() - 1, 0) = partIdNumbInitAttr->attValue(count,0);
+		  			}
+		  			if(partInitCoordsAttr != NULL){
+		  				for(int j=0; j < 6; ++j){
+		  					partInitCoordsAttr->attValue(lostbunch->getSize() - 1, j) = partInitCoordsInitAttr->attValue(count,j);
+		  				}
+		  			}
+		  			if(partMacroAttr != NULL){
+		  				partMacroAttr->attValue(lostbunch->getSize() - 1, 0) = partMacroInitAttr->attValue(count,0);
+		  			}
+						if(partTurnNumberAttr != NULL){
+							partTurnNumberAttr->attValue(lostbunch->getSize() - 1, 0) = turn;
+						}
+		  		}
+		  		bunch->deleteParticleFast(count);
+		  	}
+		  }
+		}
 
-	// shape = 2              ===elipital aperture===
-	if(shape == 2){
-	  for (int count = 0; count < nParts; count++){
-	  	if((pow((coord[count][0]-c), 2)/pow(a,2) + pow((coord[count][2]-d), 2)/pow(b,2)) >= 1){
-	  		if(lostbunch != NULL) {
-	  			lostbunch->addParticle(coord[count][0], coord[count][1], coord[count][2], coord[count][3], coord[count][4], coord[count][5]);
-	  			//pos_ is a position in lattice where particle is lost
-	  			lostPartAttr->attValue(lostbunch->getSize() - 1, 0) = pos_;
-	  			if(partIdNumbAttr != NULL){
-	  				partIdNumbAttr->attValue(lostbunch->getSize() - 1, 0) = partIdNumbInitAttr->attValue(count,0);
-	  			}
-	  			if(partInitCoordsAttr != NULL){
-	  				for(int j=0; j < 6; ++j){
-	  					partInitCoordsAttr->attValue(lostbunch->getSize() - 1, j) = partInitCoordsInitAttr->attValue(count,j);
-	  				}
-	  			}
-	  			if(partMacroAttr != NULL){
-	  				partMacroAttr->attValue(lostbunch->getSize() - 1, 0) = partMacroInitAttr->attValue(count,0);
-	  			}
-					if(partTurnNumberAttr != NULL){
-						partTurnNumberAttr->attValue(lostbunch->getSize() - 1, 0) = turn;
-					}
-	  		}
-	  		bunch->deleteParticleFast(count);
-	  	}
-	  }
-	}
+		// shape = 2              ===elipital aperture===
+		if(shape == 2){
+		  for (int count = 0; count < nParts; count++){
+		  	if((pow((coord[count][0]-c), 2)/pow(a,2) + pow((coord[count][2]-d), 2)/pow(b,2)) >= 1){
+		  		if(lostbunch != NULL) {
+		  			lostbunch->addParticle(coord[count][0], coord[count][1], coord[count][2], coord[count][3], coord[count][4], coord[count][5]);
+		  			//pos_ is a position in lattice where particle is lost
+		  			lostPartAttr->attValue(lostbunch->getSize() - 1, 0) = pos_;
+		  			if(partIdNumbAttr != NULL){
+		  				partIdNumbAttr->attValue(lostbunch->getSize() - 1, 0) = partIdNumbInitAttr->attValue(count,0);
+		  			}
+		  			if(partInitCoordsAttr != NULL){
+		  				for(int j=0; j < 6; ++j){
+		  					partInitCoordsAttr->attValue(lostbunch->getSize() - 1, j) = partInitCoordsInitAttr->attValue(count,j);
+		  				}
+		  			}
+		  			if(partMacroAttr != NULL){
+		  				partMacroAttr->attValue(lostbunch->getSize() - 1, 0) = partMacroInitAttr->attValue(count,0);
+		  			}
+						if(partTurnNumberAttr != NULL){
+							partTurnNumberAttr->attValue(lostbunch->getSize() - 1, 0) = turn;
+						}
+		  		}
+		  		bunch->deleteParticleFast(count);
+		  	}
+		  }
+		}
 
-	// shape = 3              ===rectangular aperture===
-	if(shape == 3){
-	  for (int count = 0; count < nParts; count++){
-	  	if((abs((coord[count][0])-c)>=a)||(abs((coord[count][2]-d))>=b)){
-	  		if(lostbunch != NULL) {
-	  			lostbunch->addParticle(coord[count][0], coord[count][1], coord[count][2], coord[count][3], coord[count][4], coord[count][5]);
-	  			//pos_ is a position in lattice where particle is lost
-	  			lostPartAttr->attValue(lostbunch->getSize() - 1, 0) = pos_;
-	  			if(partIdNumbAttr != NULL){
-	  				partIdNumbAttr->attValue(lostbunch->getSize() - 1, 0) = partIdNumbInitAttr->attValue(count,0);
-	  			}
-	  			if(partInitCoordsAttr != NULL){
-	  				for(int j=0; j < 6; ++j){
-	  					partInitCoordsAttr->attValue(lostbunch->getSize() - 1, j) = partInitCoordsInitAttr->attValue(count,j);
-	  				}
-	  			}
-	  			if(partMacroAttr != NULL){
-	  				partMacroAttr->attValue(lostbunch->getSize() - 1, 0) = partMacroInitAttr->attValue(count,0);
-	  			}
-					if(partTurnNumberAttr != NULL){
-						partTurnNumberAttr->attValue(lostbunch->getSize() - 1, 0) = turn;
-					}
-	  		}
-	  		bunch->deleteParticleFast(count);
-	  	}
-	  }
-	}
+		// shape = 3              ===rectangular aperture===
+		if(shape == 3){
+		  for (int count = 0; count < nParts; count++){
+		  	if((abs((coord[count][0])-c)>=a)||(abs((coord[count][2]-d))>=b)){
+		  		if(lostbunch != NULL) {
+		  			lostbunch->addParticle(coord[count][0], coord[count][1], coord[count][2], coord[count][3], coord[count][4], coord[count][5]);
+		  			//pos_ is a position in lattice where particle is lost
+		  			lostPartAttr->attValue(lostbunch->getSize() - 1, 0) = pos_;
+		  			if(partIdNumbAttr != NULL){
+		  				partIdNumbAttr->attValue(lostbunch->getSize() - 1, 0) = partIdNumbInitAttr->attValue(count,0);
+		  			}
+		  			if(partInitCoordsAttr != NULL){
+		  				for(int j=0; j < 6; ++j){
+		  					partInitCoordsAttr->attValue(lostbunch->getSize() - 1, j) = partInitCoordsInitAttr->attValue(count,j);
+		  				}
+		  			}
+		  			if(partMacroAttr != NULL){
+		  				partMacroAttr->attValue(lostbunch->getSize() - 1, 0) = partMacroInitAttr->attValue(count,0);
+		  			}
+						if(partTurnNumberAttr != NULL){
+							partTurnNumberAttr->attValue(lostbunch->getSize() - 1, 0) = turn;
+						}
+		  		}
+		  		bunch->deleteParticleFast(count);
+		  	}
+		  }
+		}
+	});
 
 	//Update synchronous particle, compress bunch
 	bunch->compress();
@@ -88,7 +88,6 @@ void BaseAperture::checkBunch(Bunch* bunch, Bunch* lostbunch){
 	if(lostbunch != NULL) lostbunch->compress();
 	double m_size = 0.;
 	int nParts = bunch->getSize();
-	double** coord = bunch->coordArr();
 
 
 	int nPartsGlobal = bunch->getSizeGlobal();
@@ -159,7 +158,10 @@ void BaseAperture::checkBunch(Bunch* bunch, Bunch* lostbunch){
 		//if particle is not inside the shape we remove it from bunch
 		if(apertureShape->inside(bunch,count) != 1){
 			if(lostbunch != NULL) {
-				lostbunch->addParticle(coord[count][0], coord[count][1], coord[count][2], coord[count][3], coord[count][4], coord[count][5]);
+				//the shape can be a Python class, so the coordinates are read for each particle
+				lostbunch->addParticle(bunch->currentCoordVal(count,0), bunch->currentCoordVal(count,1),
+				                       bunch->currentCoordVal(count,2), bunch->currentCoordVal(count,3),
+				                       bunch->currentCoordVal(count,4), bunch->currentCoordVal(count,5));
 				//pos_ is a position in lattice where particle is lost
 				lostPartAttr->attValue(lostbunch->getSize() - 1, 0) = pos_;
 				if(partIdNumbAttr != NULL){
@@ -35,10 +35,8 @@ CircleApertureShape::~CircleApertureShape()
 /** Return 1 if the particular macro-particle is inside this shape */
 int CircleApertureShape::inside(Bunch* bunch, int count){
 
-	double** coord = bunch->coordArr();
-
-	double x = coord[count][0] - x_center;
-	double y = coord[count][2] - y_center;
+	double x = bunch->currentCoordVal(count,0) - x_center;
+	double y = bunch->currentCoordVal(count,2) - y_center;
 	double r2 = x*x + y*y;
 	if(r2 <= radius2){
 		return 1;
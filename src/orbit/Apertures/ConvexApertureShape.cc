@@ -36,10 +36,8 @@ ConvexApertureShape::~ConvexApertureShape()
 /** Return 1 if the particular macro-particle is inside this shape */
 int ConvexApertureShape::inside(Bunch* bunch, int count){
 
-	double** coord = bunch->coordArr();
-
-	double x = coord[count][0] - x_center;
-	double y = coord[count][2] - y_center;
+	double x = bunch->currentCoordVal(count,0) - x_center;
+	double y = bunch->currentCoordVal(count,2) - y_center;
 
 	int nPoints = convexX.size();
 	for(int ind = 0; ind < (nPoints-1); ind++){
@@ -39,10 +39,8 @@ int EllipseApertureShape::inside(Bunch* bunch, int count){
 		return 0;
 	}
 
-	double** coord = bunch->coordArr();
-
-	double x = (coord[count][0] - x_center)/x_half_axis;
-	double y = (coord[count][2] - y_center)/y_half_axis;
+	double x = (bunch->currentCoordVal(count,0) - x_center)/x_half_axis;
+	double y = (bunch->currentCoordVal(count,2) - y_center)/y_half_axis;
 	double r2 = x*x + y*y;
 	if(r2 <= 1.0){
 		return 1;
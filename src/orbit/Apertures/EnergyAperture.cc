@@ -86,7 +86,6 @@ void EnergyAperture::checkBunch(Bunch* bunch, Bunch* lostbunch){
 	if(lostbunch != NULL) lostbunch->compress();
 	double m_size = 0.;
 	int nParts = bunch->getSize();
-	double** coord = bunch->coordArr();
 
 	ParticleAttributes* lostPartAttr = NULL;
 
@@ -138,28 +137,31 @@ void EnergyAperture::checkBunch(Bunch* bunch, Bunch* lostbunch){
 	}
 
 	double dE = 0.;
-	for (int count = 0; count < nParts; count++){
-		dE = coord[count][5];
-		if(dE < minEnergy_ || dE > maxEnergy_){
-			if(lostbunch != NULL) {
-				lostbunch->addParticle(coord[count][0], coord[count][1], coord[count][2], coord[count][3], coord[count][4], coord[count][5]);
-				//pos_ is a position in lattice where particle is lost
-				lostPartAttr->attValue(lostbunch->getSize() - 1, 0) = pos_;
-				if(partIdNumbAttr != NULL){
-					partIdNumbAttr->attValue(lostbunch->getSize() - 1, 0) = partIdNumbInitAttr->attValue(count,0);
-				}
-	  		if(partInitCoordsAttr != NULL){
-	  			for(int j=0; j < 6; ++j){
-	  				partInitCoordsAttr->attValue(lostbunch->getSize() - 1, j) = partInitCoordsInitAttr->attValue(count,j);
-	  			}
-	  		}
-				if(partMacroAttr != NULL){
-					partMacroAttr->attValue(lostbunch->getSize() - 1, 0) = partMacroInitAttr->attValue(count,0);
+	readCoordRows(bunch, [&](auto coord)
+	{
+		for (int count = 0; count < nParts; count++){
+			dE = coord[count][5];
+			if(dE < minEnergy_ || dE > maxEnergy_){
+				if(lostbunch != NULL) {
+					lostbunch->addParticle(coord[count][0], coord[count][1], coord[count][2], coord[count][3], coord[count][4], coord[count][5]);
+					//pos_ is a position in lattice where particle is lost
+					lostPartAttr->attValue(lostbunch->getSize() - 1, 0) = pos_;
+					if(partIdNumbAttr != NULL){
+						partIdNumbAttr->attValue(lostbunch->getSize() - 1, 0) = partIdNumbInitAttr->attValue(count,0);
+					}
+		  		if(partInitCoordsAttr != NULL){
+		  			for(int j=0; j < 6; ++j){
+		  				partInitCoordsAttr->attValue(lostbunch->getSize() - 1, j) = partInitCoordsInitAttr->attValue(count,j);
+		  			}
+		  		}
+					if(partMacroAttr != NULL){
+						partMacroAttr->attValue(lostbunch->getSize() - 1, 0) = partMacroInitAttr->attValue(count,0);
+					}
 				}
+				bunch->deleteParticleFast(count);
 			}
-			bunch->deleteParticleFast(count);
 		}
-	}
+	});
 
 	//Update synchronous particle, compress bunch
 	bunch->compress();
@@ -103,7 +103,6 @@ void PhaseAperture::checkBunch(Bunch* bunch, Bunch* lostbunch){
 	if(lostbunch != NULL) lostbunch->compress();
 	double m_size = 0.;
 	int nParts = bunch->getSize();
-	double** coord = bunch->coordArr();
 
 	ParticleAttributes* lostPartAttr = NULL;
 
@@ -173,32 +172,35 @@ void PhaseAperture::checkBunch(Bunch* bunch, Bunch* lostbunch){
 	double z = 0.;
 	double phase = 0.;
 
-	for (int count = 0; count < nParts; count++){
-		z = coord[count][4];
-		phase = z*z_to_phase_coeff;
-		if(phase < minPhase_ || phase > maxPhase_){
-			if(lostbunch != NULL) {
-				lostbunch->addParticle(coord[count][0], coord[count][1], coord[count][2], coord[count][3], coord[count][4], coord[count][5]);
-				//pos_ is a position in lattice where particle is lost
-				lostPartAttr->attValue(lostbunch->getSize() - 1, 0) = pos_;
-				if(partIdNumbAttr != NULL){
-					partIdNumbAttr->attValue(lostbunch->getSize() - 1, 0) = partIdNumbInitAttr->attValue(count,0);
-				}
-				if(partMacroAttr != NULL){
-					partMacroAttr->attValue(lostbunch->getSize() - 1, 0) = partMacroInitAttr->attValue(count,0);
-				}
-				if(partInitCoordsInitAttr != NULL){
-					for(int init_ind = 0; init_ind < 6; init_ind++){
-					  partInitCoordsAttr->attValue(lostbunch->getSize() - 1,init_ind) = partInitCoordsInitAttr->attValue(count,init_ind);
+	readCoordRows(bunch, [&](auto coord)
+	{
+		for (int count = 0; count < nParts; count++){
+			z = coord[count][4];
+			phase = z*z_to_phase_coeff;
+			if(phase < minPhase_ || phase > maxPhase_){
+				if(lostbunch != NULL) {
+					lostbunch->addParticle(coord[count][0], coord[count][1], coord[count][2], coord[count][3], coord[count][4], coord[count][5]);
+					//pos_ is a position in lattice where particle is lost
+					lostPartAttr->attValue(lostbunch->getSize() - 1, 0) = pos_;
+					if(partIdNumbAttr != NULL){
+						partIdNumbAttr->attValue(lostbunch->getSize() - 1, 0) = partIdNumbInitAttr->attValue(count,0);
+					}
+					if(partMacroAttr != NULL){
+						partMacroAttr->attValue(lostbunch->getSize() - 1, 0) = partMacroInitAttr->attValue(count,0);
+					}
+					if(partInitCoordsInitAttr != NULL){
+						for(int init_ind = 0; init_ind < 6; init_ind++){
+						  partInitCoordsAttr->attValue(lostbunch->getSize() - 1,init_ind) = partInitCoordsInitAttr->attValue(count,init_ind);
+						}
+					}
+					if(partTurnNumberAttr != NULL){
+						partTurnNumberAttr->attValue(lostbunch->getSize() - 1, 0) = turn;
 					}
 				}
-				if(partTurnNumberAttr != NULL){
-					partTurnNumberAttr->attValue(lostbunch->getSize() - 1, 0) = turn;
-				}
+				bunch->deleteParticleFast(count);
 			}
-			bunch->deleteParticleFast(count);
 		}
-	}
+	});
 
 	//Update synchronous particle, compress bunch
 	bunch->compress();
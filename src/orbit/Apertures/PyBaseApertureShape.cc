@@ -36,8 +36,6 @@ PyBaseApertureShape::~PyBaseApertureShape()
 /** Return 1 if the particular macro-particle is inside this shape */
 int PyBaseApertureShape::inside(Bunch* bunch, int count){
 
-	double** coord = bunch->coordArr();
-
 	PyObject* py_wrp = getPyWrapper();
 	PyObject* py_bunch = bunch->getPyWrapper();
 
@@ -39,10 +39,8 @@ int RectangularApertureShape::inside(Bunch* bunch, int count){
 		return 0;
 	}
 
-	double** coord = bunch->coordArr();
-
-	double x = fabs((coord[count][0] - x_center));
-	double y = fabs((coord[count][2] - y_center));
+	double x = fabs((bunch->currentCoordVal(count,0) - x_center));
+	double y = fabs((bunch->currentCoordVal(count,2) - y_center));
 	if(x <= x_half_size && y < y_half_size){
 		return 1;
 	}
@@ -15,6 +15,7 @@
 ///////////////////////////////////////////////////////////////////////////
 
 #include "Bunch.hh"
+#include "BunchStatistics.hh"
 
 #include "ParticleAttributesFactory.hh"
 #include "OrbitConst.hh"
@@ -22,7 +23,18 @@
 #include "BufferStore.hh"
 
 #include <iomanip>
+#include <sstream>
 #include <string>
+#include <cstring>
+#include <cstdio>
+#include <algorithm>
+#include <climits>
+
+//memory-mapped files
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <fcntl.h>
+#include <unistd.h>
 
 using namespace OrbitUtils;
 
@@ -50,11 +62,34 @@ Bunch::Bunch(): CppPyWrapper(NULL)
   sizeGlobal = 0;
 
   arrFlag = new int[nTotalSize];
+  arrCoordSlab = new double[(size_t) nTotalSize*nDim];
   arrCoord = new double*[nTotalSize];
   for(int i=0; i < nTotalSize; i++){
-    arrCoord[i] = new double[nDim];
+    arrCoord[i] = arrCoordSlab + (size_t) i*nDim;
   }
 
+  coordLayout = 0;
+  arrCoordSoA = NULL;
+  coordSoAIsActive = 0;
+
+  coordPrecision = 64;
+  arrCoordFloat = NULL;
+  coordFloatIsActive = 0;
+
+  nCoordConversions = 0;
+  nCoordToAoS = 0;
+
+  nBufferExports = 0;
+
+  coordEpoch = 0;
+  statistics = NULL;
+
+  mapPtr = NULL;
+  mapSize = 0;
+  mapDataOffset = 0;
+  mapPtrNew = NULL;
+  mapSizeNew = 0;
+
   //for MPI
     pyComm_Local = wrap_orbit_mpi_comm::newMPI_Comm();
   rank_MPI = 0;
@@ -71,6 +106,7 @@ Bunch::Bunch(): CppPyWrapper(NULL)
   attrCntrSize = 0;
   attributesSize = 0;
   arrAttr = NULL;
+  arrAttrSlab = NULL;
 
   //we do not need compress in the beginning
   needOfCompress = 0;
@@ -78,17 +114,23 @@ Bunch::Bunch(): CppPyWrapper(NULL)
 
 Bunch::~Bunch()
 {
-  for(int i=0; i < nTotalSize; i++){
-    delete [] arrCoord[i];
+  //the memory-mapped file keeps the last state of the bunch
+  if(mapPtr != NULL){
+    syncMappedFile();
   }
+  releaseSlabs(arrCoordSlab,arrAttrSlab);
+
   delete [] arrFlag;
   delete [] arrCoord;
+  if(arrCoordSoA != NULL){
+    delete [] arrCoordSoA;
+  }
+  if(arrCoordFloat != NULL){
+    delete [] arrCoordFloat;
+  }
 
-  if(attrCntrSize > 0 && attributesSize>0 ){
-        for(int i=0; i < nTotalSize; i++){
-            delete [] arrAttr[i];
-        }
-        delete [] arrAttr;
+  if(arrAttr != NULL){
+    delete [] arrAttr;
   }
 
   //delete controllers of particle attributes
@@ -100,6 +142,10 @@ Bunch::~Bunch()
   //delete bunch attributes
   delete bunchAttr;
 
+  if(statistics != NULL){
+    delete statistics;
+  }
+
     //delete synchronous particle instance
     delete syncPart;
 
@@ -294,6 +340,8 @@ void Bunch::initBunchAttributes(const char* fileName){
 void Bunch::copyEmptyBunchTo(Bunch* bunch){
     bunch->setMPI_Comm_Local(this->getMPI_Comm_Local());
     bunch->deleteAllParticles();
+    bunch->setCoordLayout(this->getCoordLayout());
+    bunch->setCoordPrecision(this->getCoordPrecision());
 
     //copy bunch attributes
     //the Attribute backet direct copy cannot be used
@@ -440,24 +488,253 @@ void Bunch::init(){
 //
 // RETURNS
 //   arrCoord[index][number of corresponding element]
+//   or the same element of the SoA copy if it is active
 //
 ///////////////////////////////////////////////////////////////////////////
-double& Bunch::x(int index){    return arrCoord[index][0];}
-double& Bunch::px(int index){   return arrCoord[index][1];}
-double& Bunch::xp(int index){   return arrCoord[index][1];}
+double& Bunch::coordVal(int index, int component){
+  coordEpoch++;
+  if(coordFloatIsActive > 0) expandCoordToDouble();
+  if(coordSoAIsActive > 0) return arrCoordSoA[(size_t) component*nTotalSize + index];
+  return arrCoord[index][component];
+}
+
+double Bunch::currentCoordVal(int index, int component){
+  if(coordFloatIsActive > 0) return arrCoordFloat[(size_t) index*nDim + component];
+  if(coordSoAIsActive > 0) return arrCoordSoA[(size_t) component*nTotalSize + index];
+  return arrCoord[index][component];
+}
+
+double& Bunch::x(int index){    return coordVal(index,0);}
+double& Bunch::px(int index){   return coordVal(index,1);}
+double& Bunch::xp(int index){   return coordVal(index,1);}
 
-double& Bunch::y(int index){    return arrCoord[index][2];}
-double& Bunch::py(int index){   return arrCoord[index][3];}
-double& Bunch::yp(int index){   return arrCoord[index][3];}
+double& Bunch::y(int index){    return coordVal(index,2);}
+double& Bunch::py(int index){   return coordVal(index,3);}
+double& Bunch::yp(int index){   return coordVal(index,3);}
 
-double& Bunch::z(int index){    return arrCoord[index][4];}
-double& Bunch::pz(int index){   return arrCoord[index][5];}
-double& Bunch::dE(int index){   return arrCoord[index][5];}
+double& Bunch::z(int index){    return coordVal(index,4);}
+double& Bunch::pz(int index){   return coordVal(index,5);}
+double& Bunch::dE(int index){   return coordVal(index,5);}
 
 int Bunch::flag(int index){   return arrFlag[index];}
 
-double* Bunch::coordPartArr(int index){ return arrCoord[index];}
-double** Bunch::coordArr(){ return arrCoord;}
+double* Bunch::coordPartArr(int index){
+  coordEpoch++;
+  if(coordFloatIsActive > 0) expandCoordToDouble();
+  if(coordSoAIsActive > 0) syncCoordToAoS();
+  return arrCoord[index];
+}
+
+double** Bunch::coordArr(){
+  coordEpoch++;
+  if(coordFloatIsActive > 0) expandCoordToDouble();
+  if(coordSoAIsActive > 0) syncCoordToAoS();
+  return arrCoord;
+}
+
+double* Bunch::coordSlab(){
+  coordEpoch++;
+  if(coordFloatIsActive > 0) expandCoordToDouble();
+  if(coordSoAIsActive > 0) syncCoordToAoS();
+  return arrCoordSlab;
+}
+
+int* Bunch::flagArr(){
+  coordEpoch++;
+  return arrFlag;
+}
+
+///////////////////////////////////////////////////////////////////////////
+//
+// NAME
+//   Bunch::setCoordLayout, Bunch::coordComponentArr
+//
+// DESCRIPTION
+//   The coordinates are always available as the AoS [index][6D] array.
+//   In the SoA layout the bunch keeps the additional [6D][Capacity]
+//   array where each coordinate component is contiguous. Only one copy
+//   keeps the current values at any time, and the data are transposed
+//   when the other copy is requested. The SoA copy cannot be activated
+//   while the bunch memory is exported to Python buffers, in this case
+//   the components are returned from the AoS array with the stride 6.
+//   The nodes that work on the bunch through coordArr() transpose the
+//   whole bunch twice per call, so the warning is printed once when
+//   the number of the SoA to AoS transpositions reaches the limit.
+//
+///////////////////////////////////////////////////////////////////////////
+
+void Bunch::setCoordLayout(int layout){
+  if(layout != 0 && layout != 1){
+    if(rank_MPI == 0){
+      std::cerr << "Bunch::setCoordLayout(int layout)" << std::endl;
+      std::cerr << "layout should be 0 (AoS) or 1 (SoA). layout = " << layout << std::endl;
+    }
+    ORBIT_MPI_Finalize("Bunch::setCoordLayout - wrong layout. Stop.");
+  }
+  if(layout == coordLayout) return;
+  if(layout == 1 && coordPrecision == 32){
+    if(rank_MPI == 0){
+      std::cerr << "Bunch::setCoordLayout(int layout)" << std::endl;
+      std::cerr << "The SoA layout can not be used with the float32 coordinates." << std::endl;
+    }
+    ORBIT_MPI_Finalize("Bunch::setCoordLayout - SoA layout for float32 coordinates. Stop.");
+  }
+  coordLayout = layout;
+  if(coordLayout == 1){
+    arrCoordSoA = new double[(size_t) nTotalSize*nDim];
+    coordSoAIsActive = 0;
+  }
+  else{
+    syncCoordToAoS();
+    delete [] arrCoordSoA;
+    arrCoordSoA = NULL;
+  }
+}
+
+int Bunch::getCoordLayout(){ return coordLayout;}
+
+double* Bunch::coordComponentArr(int component){
+  coordEpoch++;
+  if(coordFloatIsActive > 0) expandCoordToDouble();
+  if(coordLayout == 1 && nBufferExports == 0) syncCoordToSoA();
+  if(coordSoAIsActive > 0) return arrCoordSoA + (size_t) component*nTotalSize;
+  return arrCoordSlab + component;
+}
+
+int Bunch::getCoordComponentStride(){
+  if(coordSoAIsActive > 0) return 1;
+  return nDim;
+}
+
+int Bunch::coordComponentsAreCurrent(){ return coordSoAIsActive;}
+
+void Bunch::syncCoordToAoS(){
+  if(coordSoAIsActive == 0) return;
+  for(int j = 0; j < nDim; j++){
+    double* arr_j = arrCoordSoA + (size_t) j*nTotalSize;
+    for(int i = 0; i < nNew; i++){
+      arrCoordSlab[(size_t) i*nDim + j] = arr_j[i];
+    }
+  }
+  coordSoAIsActive = 0;
+  nCoordConversions++;
+  nCoordToAoS++;
+}
+
+void Bunch::syncCoordToSoA(){
+  if(coordSoAIsActive > 0) return;
+  for(int j = 0; j < nDim; j++){
+    double* arr_j = arrCoordSoA + (size_t) j*nTotalSize;
+    for(int i = 0; i < nNew; i++){
+      arr_j[i] = arrCoordSlab[(size_t) i*nDim + j];
+    }
+  }
+  coordSoAIsActive = 1;
+  nCoordConversions++;
+}
+
+///////////////////////////////////////////////////////////////////////////
+//
+// NAME
+//   Bunch::setCoordPrecision, Bunch::coordFloatSlab
+//
+// DESCRIPTION
+//   In the 32 bits precision mode the coordinates are kept in the float
+//   [Capacity][6D] array, and the double arrays are released. It halves
+//   the memory for the coordinates and the memory traffic of the kernels
+//   that use the float array directly (TEAPOT and linac tracking). These
+//   kernels do all arithmetic in double, so the only error is the rounding
+//   of the coordinates to float after each kernel. The double arrays are
+//   restored when any of the double accessors is called, and the float array
+//   is restored at the next call of coordFloatSlab(). The space charge,
+//   aperture, and diagnostics nodes, the particles' deletion, sorting,
+//   and memory reallocation work with the float array directly.
+//
+///////////////////////////////////////////////////////////////////////////
+
+void Bunch::setCoordPrecision(int bits){
+  if(bits != 64 && bits != 32){
+    if(rank_MPI == 0){
+      std::cerr << "Bunch::setCoordPrecision(int bits)" << std::endl;
+      std::cerr << "bits should be 64 (double) or 32 (float). bits = " << bits << std::endl;
+    }
+    ORBIT_MPI_Finalize("Bunch::setCoordPrecision - wrong precision. Stop.");
+  }
+  if(bits == coordPrecision) return;
+  coordEpoch++;
+  if(bits == 32 && (coordLayout != 0 || mapFileName.size() != 0)){
+    if(rank_MPI == 0){
+      std::cerr << "Bunch::setCoordPrecision(int bits)" << std::endl;
+      std::cerr << "The float32 coordinates can be used only with the AoS layout" << std::endl;
+      std::cerr << "and without the memory-mapped file." << std::endl;
+    }
+    ORBIT_MPI_Finalize("Bunch::setCoordPrecision - float32 is not possible. Stop.");
+  }
+  coordPrecision = bits;
+  if(coordPrecision == 64){
+    expandCoordToDouble();
+  }
+  else if(nBufferExports == 0){
+    //the values are rounded to float right away
+    compactCoordToFloat();
+  }
+}
+
+int Bunch::getCoordPrecision(){ return coordPrecision;}
+
+float* Bunch::coordFloatSlab(){
+  if(coordPrecision != 32) return NULL;
+  coordEpoch++;
+  if(coordFloatIsActive == 0){
+    if(nBufferExports > 0) return NULL;
+    compactCoordToFloat();
+  }
+  return arrCoordFloat;
+}
+
+float* Bunch::currentCoordFloatSlab(){
+  if(coordFloatIsActive == 0) return NULL;
+  return arrCoordFloat;
+}
+
+double** Bunch::currentCoordArr(){
+  if(coordFloatIsActive > 0 || coordSoAIsActive > 0) return NULL;
+  return arrCoord;
+}
+
+long long Bunch::getCoordConversionCount(){ return nCoordConversions;}
+
+long long Bunch::getCoordToAoSCount(){ return nCoordToAoS;}
+
+void Bunch::compactCoordToFloat(){
+  if(coordFloatIsActive > 0) return;
+  arrCoordFloat = new float[(size_t) nTotalSize*nDim];
+  for(size_t i = 0, n = (size_t) nNew*nDim; i < n; i++){
+    arrCoordFloat[i] = (float) arrCoordSlab[i];
+  }
+  delete [] arrCoordSlab;
+  delete [] arrCoord;
+  arrCoordSlab = NULL;
+  arrCoord = NULL;
+  coordFloatIsActive = 1;
+  nCoordConversions++;
+}
+
+void Bunch::expandCoordToDouble(){
+  if(coordFloatIsActive == 0) return;
+  arrCoordSlab = new double[(size_t) nTotalSize*nDim];
+  for(size_t i = 0, n = (size_t) nNew*nDim; i < n; i++){
+    arrCoordSlab[i] = arrCoordFloat[i];
+  }
+  arrCoord = new double*[nTotalSize];
+  for(int i = 0; i < nTotalSize; i++){
+    arrCoord[i] = arrCoordSlab + (size_t) i*nDim;
+  }
+  delete [] arrCoordFloat;
+  arrCoordFloat = NULL;
+  coordFloatIsActive = 0;
+  nCoordConversions++;
+}
 
 ///////////////////////////////////////////////////////////////////////////
 // NAME
@@ -477,15 +754,20 @@ double** Bunch::coordArr(){ return arrCoord;}
 ///////////////////////////////////////////////////////////////////////////
 
 void Bunch::ringwrap(double ring_length){
-    //coordinate array [part. index][x,xp,y,yp,z,dE]
+  //coordinate rows [part. index][x,xp,y,yp,z,dE] in the current storage
   double ring_length2 = ring_length/2.0;
-    for(int i = 0, n = nSize; i < n; i++){
-        if(fabs(arrCoord[i][4]) > ring_length2)
+  int n = nSize;
+  dispatchCoordRows(this, [&](auto arr)
+  {
+    for(int i = 0; i < n; i++){
+        double z = arr[i][4];
+        if(fabs(z) > ring_length2)
         {
-            double sign = -arrCoord[i][4] / fabs(arrCoord[i][4]);
-            arrCoord[i][4] = ring_length2 * sign + fmod(arrCoord[i][4],ring_length2);
+            double sign = -z / fabs(z);
+            arr[i][4] = ring_length2 * sign + fmod(z,ring_length2);
         }
     }
+  });
 }
 
 ///////////////////////////////////////////////////////////////////////////
@@ -497,6 +779,8 @@ void Bunch::ringwrap(double ring_length){
 //   Expands the size of arrFlag,arrCoord,
 //   when the number of macroparticles reaches nTotalSize. It should be
 //   used in Bunch::addParticle.
+//   If the memory is exported to Python buffers it cannot be reallocated,
+//   so the capacity will not be reduced in this case.
 //
 // RETURNS
 //   Nothing.
@@ -508,80 +792,263 @@ void Bunch::resize()
 
   if (nNew <= (nTotalSize - nChunk/3) && nNew >= (nTotalSize - nChunk)) return;
 
+  if(nBufferExports > 0){
+    if(nNew < nTotalSize) return;
+    checkBufferExports("Bunch::resize()");
+  }
+
   //chunk should be big enough to avoid frequently changing size
   nChunk = (int) (nNew*0.2);
   if(nChunk < nChunkMin) nChunk = nChunkMin;
 
   int nOldTotalSize = nTotalSize;
-  nTotalSize = (((int)(nNew/nChunk)) + 1)*nChunk;
+  int nNewTotalSize = (((int)(nNew/nChunk)) + 1)*nChunk;
 
-  int* tmp_arrFlag     = new int    [nTotalSize];
-  double** tmp_arrCoord    = new double*[nTotalSize];
+  int nCopy = nOldTotalSize;
+  if(nCopy > nNewTotalSize) nCopy = nNewTotalSize;
 
-  if(nOldTotalSize <= nTotalSize){
-    for(int i = nOldTotalSize; i < nTotalSize; i++){
-      tmp_arrCoord[i]    = new double[nDim];
-    }
+  reallocateMemory(nNewTotalSize,attributesSize,attributesSize,attributesSize);
 
-    for(int i=0; i < nOldTotalSize; i++){
-      tmp_arrFlag[i]     = arrFlag[i];
-      tmp_arrCoord[i]    = arrCoord[i];
+  //the SoA copy of the coordinates
+  if(arrCoordSoA != NULL){
+    double* tmp_arrCoordSoA = new double[(size_t) nTotalSize*nDim];
+    if(coordSoAIsActive > 0){
+      for(int j = 0; j < nDim; j++){
+        std::memcpy(tmp_arrCoordSoA + (size_t) j*nTotalSize, arrCoordSoA + (size_t) j*nOldTotalSize, nCopy*sizeof(double));
+      }
     }
+    delete [] arrCoordSoA;
+    arrCoordSoA = tmp_arrCoordSoA;
   }
-  else{
-    for(int i=0; i < nTotalSize; i++){
-      tmp_arrFlag[i] = arrFlag[i];
-      tmp_arrCoord[i]    = arrCoord[i];
-    }
-    for(int i = nTotalSize; i < nOldTotalSize; i++){
-      delete [] arrCoord[i];
+
+  //attributes of the new particles' slots
+  if(attrCntrSize > 0 && attributesSize > 0 && nOldTotalSize < nTotalSize){
+    std::map<std::string,ParticleAttributes*>::iterator pos;
+    for (pos = attrCntrMap.begin(); pos != attrCntrMap.end(); ++pos) {
+      ParticleAttributes* attrCntrl = pos->second;
+      for(int i = nOldTotalSize; i < nTotalSize; i++){
+        attrCntrl->init(i);
+      }
     }
   }
+}
 
+///////////////////////////////////////////////////////////////////////////
+//
+// NAME
+//   Bunch::resizeAttributes
+//
+// DESCRIPTION
+//   Reallocates the particle attributes array to the new number of
+//   attributes values per particle. The values with indexes between
+//   lowInd (inclusive) and uppInd (exclusive) are removed from the
+//   records. The new values (if any) at the end of the records
+//   are not initialized. The coordinates stay in place unless
+//   the bunch is kept in the memory-mapped file.
+//
+// RETURNS
+//   Nothing.
+//
+///////////////////////////////////////////////////////////////////////////
+
+void Bunch::resizeAttributes(int newAttributesSize, int lowInd, int uppInd)
+{
+  checkBufferExports("Bunch::resizeAttributes(...)");
+  if(mapFileName.size() > 0 || mapPtr != NULL){
+    //the coordinates and attributes are in the same file
+    reallocateMemory(nTotalSize,newAttributesSize,lowInd,uppInd);
+    return;
+  }
+
+  //the coordinates stay in place, so the coordArr() pointers are still valid
+  double* tmp_arrAttrSlab = NULL;
+  if(newAttributesSize > 0) tmp_arrAttrSlab = new double[(size_t) nTotalSize*newAttributesSize];
+  copyAttributes(tmp_arrAttrSlab,newAttributesSize,lowInd,uppInd,nTotalSize);
+  if(arrAttrSlab != NULL) delete [] arrAttrSlab;
+  arrAttrSlab = tmp_arrAttrSlab;
+  setAttrRecordsPointers(newAttributesSize);
+}
+
+///////////////////////////////////////////////////////////////////////////
+//
+// NAME
+//   Bunch::reallocateMemory
+//
+// DESCRIPTION
+//   Reallocates the flags, coordinates, and attributes arrays for the new
+//   capacity and the new number of attributes values per particle.
+//   The attributes values with indexes between lowInd (inclusive) and
+//   uppInd (exclusive) are removed from the records.
+//   The coordinates and attributes of all particles are kept in
+//   contiguous arrays (slabs) on the heap or in the memory-mapped file,
+//   and the arrCoord and arrAttr arrays keep pointers to the beginning
+//   of the particle's records.
+//
+// RETURNS
+//   Nothing.
+//
+///////////////////////////////////////////////////////////////////////////
+
+void Bunch::reallocateMemory(int newCapacity, int newAttributesSize, int lowInd, int uppInd)
+{
+  int nCopy = nTotalSize;
+  if(nCopy > newCapacity) nCopy = newCapacity;
+
+  int* tmp_arrFlag = new int[newCapacity];
+  std::memcpy(tmp_arrFlag,arrFlag,nCopy*sizeof(int));
+
+  //the float32 coordinates are reallocated without the double arrays,
+  //the bunch with float32 coordinates is never in the memory-mapped file
+  if(coordFloatIsActive > 0){
+    float* tmp_arrCoordFloat = new float[(size_t) newCapacity*nDim];
+    std::memcpy(tmp_arrCoordFloat,arrCoordFloat,(size_t) nCopy*nDim*sizeof(float));
+    double* tmp_arrAttrSlab = NULL;
+    if(newAttributesSize > 0) tmp_arrAttrSlab = new double[(size_t) newCapacity*newAttributesSize];
+    copyAttributes(tmp_arrAttrSlab,newAttributesSize,lowInd,uppInd,nCopy);
+
+    delete [] arrCoordFloat;
+    if(arrAttrSlab != NULL) delete [] arrAttrSlab;
+    delete [] arrFlag;
+
+    arrFlag       = tmp_arrFlag;
+    arrCoordFloat = tmp_arrCoordFloat;
+    arrAttrSlab   = tmp_arrAttrSlab;
+    nTotalSize    = newCapacity;
+
+    setAttrRecordsPointers(newAttributesSize);
+    return;
+  }
+
+  double* tmp_arrCoordSlab = NULL;
+  double* tmp_arrAttrSlab = NULL;
+  allocateSlabs(newCapacity,newAttributesSize,tmp_arrCoordSlab,tmp_arrAttrSlab);
+
+  std::memcpy(tmp_arrCoordSlab,arrCoordSlab,(size_t) nCopy*nDim*sizeof(double));
+  copyAttributes(tmp_arrAttrSlab,newAttributesSize,lowInd,uppInd,nCopy);
+
+  releaseSlabs(arrCoordSlab,arrAttrSlab);
   delete [] arrFlag;
-  delete [] arrCoord;
 
-  arrFlag     = tmp_arrFlag;
-  arrCoord    = tmp_arrCoord;
+  arrFlag      = tmp_arrFlag;
+  arrCoordSlab = tmp_arrCoordSlab;
+  arrAttrSlab  = tmp_arrAttrSlab;
+  nTotalSize   = newCapacity;
 
-  //attributes resize
-  if(attrCntrSize > 0 && attributesSize > 0){
+  setRecordsPointers(newAttributesSize);
+}
 
-    double** tmp_arrAttr    = new double*[nTotalSize];
-    if(nOldTotalSize <= nTotalSize){
-      for(int i = nOldTotalSize; i < nTotalSize; i++){
-                tmp_arrAttr[i]    = new double[attributesSize];
-      }
-      for(int i=0; i < nOldTotalSize; i++){
-                tmp_arrAttr[i]    = arrAttr[i];
-      }
-      delete [] arrAttr;
-      arrAttr   = tmp_arrAttr;
-
-      std::map<std::string,ParticleAttributes*>::iterator pos;
-      for (pos = attrCntrMap.begin(); pos != attrCntrMap.end(); ++pos) {
-                string name = pos->first;
-                ParticleAttributes* attrCntrl = pos->second;
-                for(int i = nOldTotalSize; i < nTotalSize; i++){
-                    attrCntrl->init(i);
-                }
-      }
+///////////////////////////////////////////////////////////////////////////
+//
+// NAME
+//   Bunch::copyAttributes, Bunch::setRecordsPointers
+//
+// DESCRIPTION
+//   copyAttributes copies the attributes records of nCopy particles into
+//   the new slab without the values between lowInd and uppInd.
+//   setRecordsPointers creates the arrCoord and arrAttr arrays with pointers
+//   to the beginning of the particle's records in the coordinates and
+//   attributes slabs.
+//
+// RETURNS
+//   Nothing.
+//
+///////////////////////////////////////////////////////////////////////////
 
+void Bunch::copyAttributes(double* attrSlabNew, int newAttributesSize, int lowInd, int uppInd, int nCopy)
+{
+  if(newAttributesSize == 0 || attributesSize == 0) return;
+  if(newAttributesSize == attributesSize && lowInd == uppInd){
+    std::memcpy(attrSlabNew,arrAttrSlab,(size_t) nCopy*attributesSize*sizeof(double));
+    return;
+  }
+  for(int i = 0; i < nCopy; i++){
+    double* attr_in  = arrAttrSlab + (size_t) i*attributesSize;
+    double* attr_out = attrSlabNew + (size_t) i*newAttributesSize;
+    int aInd = 0;
+    for(int j = 0; j < lowInd && aInd < newAttributesSize; j++){
+      attr_out[aInd] = attr_in[j];
+      aInd++;
+    }
+    for(int j = uppInd; j < attributesSize && aInd < newAttributesSize; j++){
+      attr_out[aInd] = attr_in[j];
+      aInd++;
     }
-    else{
-      for(int i=0; i < nTotalSize; i++){
-                tmp_arrAttr[i]    = arrAttr[i];
-      }
-      for(int i = nTotalSize; i < nOldTotalSize; i++){
-                delete [] arrAttr[i];
-      }
+  }
+}
+
+void Bunch::setRecordsPointers(int attrSize)
+{
+  delete [] arrCoord;
+  arrCoord = new double*[nTotalSize];
+  for(int i=0; i < nTotalSize; i++){
+    arrCoord[i] = arrCoordSlab + (size_t) i*nDim;
+  }
+  setAttrRecordsPointers(attrSize);
+}
 
-      delete [] arrAttr;
-      arrAttr   = tmp_arrAttr;
+void Bunch::setAttrRecordsPointers(int attrSize)
+{
+  if(arrAttr != NULL){
+    delete [] arrAttr;
+    arrAttr = NULL;
+  }
+  if(attrSize > 0){
+    arrAttr = new double*[nTotalSize];
+    for(int i=0; i < nTotalSize; i++){
+      arrAttr[i] = arrAttrSlab + (size_t) i*attrSize;
     }
   }
 }
 
+///////////////////////////////////////////////////////////////////////////
+//
+// NAME
+//   Bunch::checkBufferExports, Bunch::canAddParticles
+//
+// DESCRIPTION
+//   Stops the execution if the bunch memory is exported to the Python
+//   buffers (memoryview, numpy arrays etc.) and it should be reallocated.
+//   The Python wrappers check the exports before the call and raise
+//   BufferError, so the stop is the last resort for the C++ callers.
+//   canAddParticles tells if the particles can be added to the bunch
+//   without the reallocation.
+//
+// RETURNS
+//   Nothing.
+//
+///////////////////////////////////////////////////////////////////////////
+
+void Bunch::checkBufferExports(const char* method_name)
+{
+  if(nBufferExports == 0) return;
+  if(rank_MPI == 0){
+    std::cerr << "Method: "<< method_name << std::endl;
+    std::cerr << "The bunch memory should be reallocated, but it is used by Python buffers."<< std::endl;
+    std::cerr << "Number of buffers (memoryview, numpy arrays etc.) = "<< nBufferExports << std::endl;
+    std::cerr << "Release them before adding particles or particles' attributes."<< std::endl;
+  }
+  ORBIT_MPI_Finalize("Bunch memory is exported to Python buffers. Stop.");
+}
+
+void Bunch::addBufferExport(){
+  nBufferExports++;
+}
+
+void Bunch::releaseBufferExport(){
+  if(nBufferExports > 0) nBufferExports--;
+}
+
+int Bunch::getBufferExportsCount(){
+  return nBufferExports;
+}
+
+int Bunch::canAddParticles(int nParts){
+  if(nBufferExports == 0 || nParts <= 0) return 1;
+  //see Bunch::resize() and Bunch::appendParticleSlots(...)
+  if(nNew + nParts <= nTotalSize) return 1;
+  return 0;
+}
+
 ///////////////////////////////////////////////////////////////////////////
 //
 // NAME
@@ -604,14 +1071,27 @@ int Bunch::addParticle(double x, double px,
   int n = nNew;
   resize();
 
-  arrCoord[n][0] = x;
-  arrCoord[n][1] = px;
+  if(coordFloatIsActive > 0){
+    //the float32 coordinates are rounded right away
+    coordEpoch++;
+    float* coords = arrCoordFloat + (size_t) n*nDim;
+    coords[0] = (float) x;
+    coords[1] = (float) px;
+    coords[2] = (float) y;
+    coords[3] = (float) py;
+    coords[4] = (float) z;
+    coords[5] = (float) pz_dE;
+  }
+  else{
+    coordVal(n,0) = x;
+    coordVal(n,1) = px;
 
-  arrCoord[n][2] = y;
-  arrCoord[n][3] = py;
+    coordVal(n,2) = y;
+    coordVal(n,3) = py;
 
-  arrCoord[n][4] = z;
-  arrCoord[n][5] = pz_dE;
+    coordVal(n,4) = z;
+    coordVal(n,5) = pz_dE;
+  }
 
   arrFlag[n] = 1; //alive
 
@@ -653,6 +1133,7 @@ void Bunch::attrInit(int particle_index){
 
 void Bunch::deleteParticleFast(int index)
 {
+  coordEpoch++;
   arrFlag[index] = 0; //dead
 
   //we need compress in the future
@@ -661,6 +1142,7 @@ void Bunch::deleteParticleFast(int index)
 
 void Bunch::recoverParticle(int index)
 {
+  coordEpoch++;
   arrFlag[index] = 1; //alive
 
 }
@@ -705,61 +1187,499 @@ void Bunch::compress()
 {
 
   if(needOfCompress == 0) return;
+  coordEpoch++;
 
-  int lowInd = 0;
-  int uppInd = lowInd;
+  //the "alive" particles are moved to the beginning of the arrays
+  //keeping their order
   int count = 0;
+  for(int ind = 0; ind < nNew; ind++){
+    if(arrFlag[ind] == 0) continue;
+    if(ind != count){
+      if(coordSoAIsActive > 0){
+        for(int j = 0; j < nDim; j++){
+          arrCoordSoA[(size_t) j*nTotalSize + count] = arrCoordSoA[(size_t) j*nTotalSize + ind];
+        }
+      }
+      else if(coordFloatIsActive > 0){
+        std::memcpy(arrCoordFloat + (size_t) count*nDim,arrCoordFloat + (size_t) ind*nDim,nDim*sizeof(float));
+      }
+      else{
+        std::memcpy(arrCoord[count],arrCoord[ind],nDim*sizeof(double));
+      }
+      if(attributesSize > 0){
+        std::memcpy(arrAttr[count],arrAttr[ind],attributesSize*sizeof(double));
+      }
+      arrFlag[count] = arrFlag[ind];
+      arrFlag[ind] = 0;
+    }
+    count++;
+  }
+  nSize=count;
+  nNew=count;
 
-  double* tmp;
-  int tmp_flag = 0;
+  //compression is done
+  needOfCompress = 0;
 
-  int lowIndChanged = 0;
+  resize();
+}
 
-  while( uppInd < nNew){
+///////////////////////////////////////////////////////////////////////////
+//
+// NAME
+//    Bunch::addParticles, Bunch::deleteParticles
+//
+// DESCRIPTION
+//    Bulk versions of addParticle and deleteParticleFast + compress.
+//    addParticles reallocates the bunch memory only once for all new
+//    particles. deleteParticles removes all masked particles in one
+//    compression pass and can move them with their attributes into
+//    the lost bunch. The lost bunch gets the particles attributes of
+//    this bunch if it does not have them yet.
+//
+// RETURNS
+//    The index of the first new particle or the number of removed
+//    particles.
+//
+///////////////////////////////////////////////////////////////////////////
+
+int Bunch::appendParticleSlots(int nParts)
+{
+  int nStart = nNew;
+  if(nParts <= 0) return nStart;
+  coordEpoch++;
+
+  //resize() keeps the capacity larger than nNew
+  nNew = nStart + nParts - 1;
+  resize();
+  nNew = nStart + nParts;
 
-    lowIndChanged = 0;
+  for(int i = nStart; i < nNew; i++){
+    arrFlag[i] = 1; //alive
+    attrInit(i);
+  }
+
+  if(needOfCompress == 0){
+    nSize = nNew;
+  }
+  return nStart;
+}
+
+int Bunch::addParticles(int nParts, const double* coords)
+{
+  int nStart = appendParticleSlots(nParts);
+  if(nParts <= 0) return nStart;
+  if(coordFloatIsActive > 0){
+    for(size_t i = 0, n = (size_t) nParts*nDim; i < n; i++){
+      arrCoordFloat[(size_t) nStart*nDim + i] = (float) coords[i];
+    }
+  }
+  else if(coordSoAIsActive > 0){
+    for(int i = 0; i < nParts; i++){
+      for(int j = 0; j < nDim; j++){
+        arrCoordSoA[(size_t) j*nTotalSize + nStart + i] = coords[(size_t) i*nDim + j];
+      }
+    }
+  }
+  else{
+    std::memcpy(arrCoord[nStart],coords,(size_t) nParts*nDim*sizeof(double));
+  }
+  return nStart;
+}
+
+int Bunch::addParticles(int nParts, const double* const* coordComponents)
+{
+  int nStart = appendParticleSlots(nParts);
+  for(int j = 0; j < nDim; j++){
+    const double* arr = coordComponents[j];
+    if(coordFloatIsActive > 0){
+      for(int i = 0; i < nParts; i++){
+        arrCoordFloat[(size_t) (nStart + i)*nDim + j] = (float) arr[i];
+      }
+      continue;
+    }
+    for(int i = 0; i < nParts; i++){
+      coordVal(nStart + i,j) = arr[i];
+    }
+  }
+  return nStart;
+}
+
+int Bunch::deleteParticles(const int* mask, Bunch* lostBunch)
+{
+  int nLost = 0;
+  for(int ind = 0; ind < nNew; ind++){
+    if(arrFlag[ind] != 0 && mask[ind] != 0) nLost++;
+  }
+  if(nLost == 0 && needOfCompress == 0) return 0;
+  coordEpoch++;
+
+  //the lost bunch is prepared for all removed particles at once
+  std::vector<ParticleAttributes*> attr_source;
+  std::vector<ParticleAttributes*> attr_target;
+  int nLostStart = 0;
+  if(lostBunch != NULL && nLost > 0){
+    std::vector<std::string> names;
+    this->getParticleAttributesNames(names);
+    for(int i = 0, n = names.size(); i < n; i++){
+      ParticleAttributes* part_attr = this->getParticleAttributes(names[i]);
+      if(lostBunch->hasParticleAttributes(names[i]) <= 0){
+        lostBunch->addParticleAttributes(names[i],part_attr->parameterDict);
+      }
+      ParticleAttributes* part_attr_lost = lostBunch->getParticleAttributes(names[i]);
+      if(part_attr_lost->getAttSize() == part_attr->getAttSize()){
+        attr_source.push_back(part_attr);
+        attr_target.push_back(part_attr_lost);
+      }
+    }
+    nLostStart = lostBunch->appendParticleSlots(nLost);
+  }
+
+  //one pass: the lost particles are copied to the lost bunch and
+  //the rest of particles are moved to the beginning of the arrays
+  int count = 0;
+  int countLost = nLostStart;
+  for(int ind = 0; ind < nNew; ind++){
+    if(arrFlag[ind] == 0) continue;
+    if(mask[ind] != 0){
+      if(lostBunch != NULL){
+        for(int j = 0; j < nDim; j++){
+          lostBunch->coordVal(countLost,j) = currentCoordVal(ind,j);
+        }
+        for(int k = 0, kn = attr_source.size(); k < kn; k++){
+          std::memcpy(attr_target[k]->attArr(countLost),attr_source[k]->attArr(ind),
+                      attr_source[k]->getAttSize()*sizeof(double));
+        }
+        countLost++;
+      }
+      arrFlag[ind] = 0;
+      continue;
+    }
+    if(ind != count){
+      if(coordSoAIsActive > 0){
+        for(int j = 0; j < nDim; j++){
+          arrCoordSoA[(size_t) j*nTotalSize + count] = arrCoordSoA[(size_t) j*nTotalSize + ind];
+        }
+      }
+      else if(coordFloatIsActive > 0){
+        std::memcpy(arrCoordFloat + (size_t) count*nDim,arrCoordFloat + (size_t) ind*nDim,nDim*sizeof(float));
+      }
+      else{
+        std::memcpy(arrCoord[count],arrCoord[ind],nDim*sizeof(double));
+      }
+      if(attributesSize > 0){
+        std::memcpy(arrAttr[count],arrAttr[ind],attributesSize*sizeof(double));
+      }
+      arrFlag[count] = arrFlag[ind];
+      arrFlag[ind] = 0;
+    }
+    count++;
+  }
+  nSize = count;
+  nNew = count;
+  needOfCompress = 0;
+
+  resize();
+  return nLost;
+}
+
+///////////////////////////////////////////////////////////////////////////
+//
+// NAME
+//    Bunch::rebalance
+//
+// DESCRIPTION
+//    Equalizes the numbers of macro-particles on the CPUs of the bunch
+//    communicator. The particles of all CPUs are considered as one array
+//    ordered by ranks, and this array is divided evenly between CPUs.
+//    Each particle is sent directly to its new CPU, so the particles that
+//    do not belong to the overlap of the old and new index ranges stay
+//    where they are. The order of particles is kept.
+//    The particles are sent to the higher ranks first, and then to the
+//    lower ranks. In each phase the CPU receives all its particles before
+//    sending its own, so the blocking send/receive cannot deadlock.
+//    Nothing is done if (max(n)-<n>)/<n> <= tolerance.
+//    Nothing is done on all CPUs if the memory of the bunch on one of
+//    them is exported to Python buffers and should be reallocated.
+//    The MPI counts are int, so the particles are sent in the messages
+//    of at most INT_MAX doubles.
+//
+// RETURNS
+//    The global number of moved particles or -1 if the exported memory
+//    prevents the rebalancing.
+//
+///////////////////////////////////////////////////////////////////////////
+
+//the number of particles moved from CPU i to CPU j
+static long long rebalanceOverlap(const std::vector<long long>& oldStart,
+                                  const std::vector<long long>& newStart,
+                                  int i, int j)
+{
+  long long ind_min = std::max(oldStart[i],newStart[j]);
+  long long ind_max = std::min(oldStart[i+1],newStart[j+1]);
+  if(ind_max > ind_min) return (ind_max - ind_min);
+  return 0;
+}
+
+int Bunch::rebalance(double tolerance)
+{
+  compress();
+  if(size_MPI < 2) return 0;
+  coordEpoch++;
+
+  int buff_index0 = 0;
+  int buff_index1 = 0;
+  int* nSizeArr     = BufferStore::getBufferStore()->getFreeIntArr(buff_index0,size_MPI);
+  int* nSizeArr_MPI = BufferStore::getBufferStore()->getFreeIntArr(buff_index1,size_MPI);
+  for(int i = 0; i < size_MPI; i++){
+    nSizeArr[i] = 0;
+    if(i == rank_MPI){nSizeArr[i] = nSize;}
+  }
+  ORBIT_MPI_Allreduce(nSizeArr,nSizeArr_MPI,size_MPI,MPI_INT,MPI_SUM,pyComm_Local->comm);
+
+  //old and new start indexes of the CPUs' slices in the global array
+  std::vector<long long> oldStart(size_MPI + 1,0);
+  std::vector<long long> newStart(size_MPI + 1,0);
+  int nMax = 0;
+  for(int i = 0; i < size_MPI; i++){
+    oldStart[i+1] = oldStart[i] + nSizeArr_MPI[i];
+    if(nMax < nSizeArr_MPI[i]) nMax = nSizeArr_MPI[i];
+  }
+  BufferStore::getBufferStore()->setUnusedIntArr(buff_index0);
+  BufferStore::getBufferStore()->setUnusedIntArr(buff_index1);
+
+  long long nTotal = oldStart[size_MPI];
+  if(nTotal == 0) return 0;
+  double nAvg = ((double) nTotal)/size_MPI;
+  if((nMax - nAvg)/nAvg <= tolerance) return 0;
+
+  for(int i = 0; i < size_MPI; i++){
+    long long nLocal = nTotal/size_MPI;
+    if(i < nTotal % size_MPI) nLocal++;
+    newStart[i+1] = newStart[i] + nLocal;
+  }
+
+  //the exported memory of the bunch on any CPU stops the rebalancing on all of them
+  int nNewLocal = (int) (newStart[rank_MPI+1] - newStart[rank_MPI]);
+  int blocked = 0;
+  int blocked_MPI = 0;
+  if(nBufferExports > 0 && nNewLocal > nTotalSize) blocked = 1;
+  ORBIT_MPI_Allreduce(&blocked,&blocked_MPI,1,MPI_INT,MPI_MAX,pyComm_Local->comm);
+  if(blocked_MPI > 0) return -1;
+
+  long long nMoved = 0;
+  for(int i = 0; i < size_MPI; i++){
+    nMoved += (oldStart[i+1] - oldStart[i]) - rebalanceOverlap(oldStart,newStart,i,i);
+  }
+
+  int nRecord = nDim + attributesSize;
+  //the number of particles in one message, so its size is not more than INT_MAX doubles
+  long long nMessageParts = INT_MAX/nRecord;
+  std::vector<double> sendBuff;
+  std::vector<double> recvLower;
+  std::vector<double> recvUpper;
+  MPI_Status statusMPI;
+
+  //phase 0 - moving up, phase 1 - moving down
+  for(int phase = 0; phase < 2; phase++){
+    int step = (phase == 0) ? 1 : -1;
+    //receiving from the CPUs on the other side
+    std::vector<double>& recvBuff = (phase == 0) ? recvLower : recvUpper;
+    for(int i = rank_MPI - step; i >= 0 && i < size_MPI; i -= step){
+      long long nRecv = rebalanceOverlap(oldStart,newStart,i,rank_MPI);
+      if(nRecv == 0) continue;
+      std::vector<double> buff(nRecv*nRecord);
+      for(long long ind0 = 0; ind0 < nRecv; ind0 += nMessageParts){
+        int count = (int) (std::min(nMessageParts,nRecv - ind0)*nRecord);
+        ORBIT_MPI_Recv(buff.data() + ind0*nRecord,count,MPI_DOUBLE,i,1112,pyComm_Local->comm,&statusMPI);
+      }
+      //the particles from the far CPUs are placed further from the kept ones
+      if(phase == 0){
+        recvBuff.insert(recvBuff.begin(),buff.begin(),buff.end());
+      }
+      else{
+        recvBuff.insert(recvBuff.end(),buff.begin(),buff.end());
+      }
+    }
+    //sending to the CPUs in the direction of the phase
+    for(int j = rank_MPI + step; j >= 0 && j < size_MPI; j += step){
+      long long nSend = rebalanceOverlap(oldStart,newStart,rank_MPI,j);
+      if(nSend == 0) continue;
+      int indStart = (int) (std::max(oldStart[rank_MPI],newStart[j]) - oldStart[rank_MPI]);
+      sendBuff.resize(nSend*nRecord);
+      for(int i = 0; i < nSend; i++){
+        for(int k = 0; k < nDim; k++){
+          sendBuff[i*nRecord + k] = coordVal(indStart + i,k);
+        }
+        for(int k = 0; k < attributesSize; k++){
+          sendBuff[i*nRecord + nDim + k] = arrAttr[indStart + i][k];
+        }
+      }
+      for(long long ind0 = 0; ind0 < nSend; ind0 += nMessageParts){
+        int count = (int) (std::min(nMessageParts,nSend - ind0)*nRecord);
+        ORBIT_MPI_Send(sendBuff.data() + ind0*nRecord,count,MPI_DOUBLE,j,1112,pyComm_Local->comm);
+      }
+    }
+  }
+
+  //the local particles that stay on this CPU
+  long long nKeep = rebalanceOverlap(oldStart,newStart,rank_MPI,rank_MPI);
+  int keepStart = (int) (std::max(oldStart[rank_MPI],newStart[rank_MPI]) - oldStart[rank_MPI]);
+  std::vector<double> keepBuff(nKeep*nRecord);
+  for(int i = 0; i < nKeep; i++){
+    for(int k = 0; k < nDim; k++){
+      keepBuff[i*nRecord + k] = coordVal(keepStart + i,k);
+    }
+    for(int k = 0; k < attributesSize; k++){
+      keepBuff[i*nRecord + nDim + k] = arrAttr[keepStart + i][k];
+    }
+  }
+
+  //new content of the bunch: [from lower ranks][kept][from upper ranks]
+  for(int i = 0; i < nSize; i++){
+    arrFlag[i] = 0;
+  }
+  nSize = 0;
+  nNew = 0;
+  appendParticleSlots(nNewLocal);
+  const std::vector<double>* parts[3] = {&recvLower,&keepBuff,&recvUpper};
+  int ind = 0;
+  for(int p = 0; p < 3; p++){
+    int nParts = parts[p]->size()/nRecord;
+    const double* arr = parts[p]->data();
+    for(int i = 0; i < nParts; i++){
+      for(int k = 0; k < nDim; k++){
+        coordVal(ind,k) = arr[i*nRecord + k];
+      }
+      for(int k = 0; k < attributesSize; k++){
+        arrAttr[ind][k] = arr[i*nRecord + nDim + k];
+      }
+      ind++;
+    }
+  }
+
+  return (int) nMoved;
+}
+
+///////////////////////////////////////////////////////////////////////////
+//
+// NAME
+//    Bunch::reorderParticles
+//
+// DESCRIPTION
+//    Changes the order of macro-particles in the bunch. After this call
+//    the particle with index i is the particle that had index order[i]
+//    before. The order array should be a permutation of 0...(getSize()-1)
+//    of the compressed bunch. The particles' attributes are moved together
+//    with the coordinates.
+//
+///////////////////////////////////////////////////////////////////////////
+
+void Bunch::reorderParticles(const int* order)
+{
+  compress();
+  if(nSize < 2) return;
+  coordEpoch++;
+
+  std::vector<char> used(nSize,0);
+  for(int i = 0; i < nSize; i++){
+    if(order[i] < 0 || order[i] >= nSize || used[order[i]] != 0){
+      if(rank_MPI == 0){
+        std::cerr << "Bunch::reorderParticles(order)" << std::endl
+                  << "The order array is not a permutation of particles' indices!" << std::endl
+                  << "index=" << i << " order[index]=" << order[i] << " nParts=" << nSize << std::endl
+                  << "Stop." << std::endl;
+      }
+      ORBIT_MPI_Finalize("Bunch::reorderParticles(order). Stop.");
+    }
+    used[order[i]] = 1;
+  }
+
+  std::vector<double> arr((size_t) nSize*nDim);
+  if(coordFloatIsActive > 0){
+    std::vector<float> arrFloat((size_t) nSize*nDim);
+    for(int i = 0; i < nSize; i++){
+      std::memcpy(&arrFloat[(size_t) i*nDim],arrCoordFloat + (size_t) order[i]*nDim,nDim*sizeof(float));
+    }
+    std::memcpy(arrCoordFloat,arrFloat.data(),(size_t) nSize*nDim*sizeof(float));
+  }
+  else if(coordSoAIsActive > 0){
+    for(int j = 0; j < nDim; j++){
+      double* comp_arr = arrCoordSoA + (size_t) j*nTotalSize;
+      for(int i = 0; i < nSize; i++){
+        arr[i] = comp_arr[order[i]];
+      }
+      std::memcpy(comp_arr,arr.data(),nSize*sizeof(double));
+    }
+  }
+  else{
+    for(int i = 0; i < nSize; i++){
+      std::memcpy(&arr[(size_t) i*nDim],arrCoord[order[i]],nDim*sizeof(double));
+    }
+    for(int i = 0; i < nSize; i++){
+      std::memcpy(arrCoord[i],&arr[(size_t) i*nDim],nDim*sizeof(double));
+    }
+  }
+
+  if(attributesSize > 0){
+    arr.resize((size_t) nSize*attributesSize);
+    for(int i = 0; i < nSize; i++){
+      std::memcpy(&arr[(size_t) i*attributesSize],arrAttr[order[i]],attributesSize*sizeof(double));
+    }
+    for(int i = 0; i < nSize; i++){
+      std::memcpy(arrAttr[i],&arr[(size_t) i*attributesSize],attributesSize*sizeof(double));
+    }
+  }
+}
+
+///////////////////////////////////////////////////////////////////////////
+//
+// NAME
+//    Bunch::sortParticles
+//
+// DESCRIPTION
+//    Sorts the macro-particles of the compressed bunch by the keys.
+//    The sorting is stable. If the range of keys is not much larger than
+//    the number of particles (e.g. the indices of grid cells), the counting
+//    sort is used. Otherwise the indices are sorted by the keys.
+//
+///////////////////////////////////////////////////////////////////////////
 
-    while( arrFlag[lowInd] != 0 && lowInd < nNew){
-      count++;
-      lowInd++;
-      lowIndChanged = 1;
-    }
-    if(lowInd == (nNew -1)) break;
+void Bunch::sortParticles(const unsigned long long* keys)
+{
+  compress();
+  if(nSize < 2) return;
+
+  unsigned long long key_min = keys[0];
+  unsigned long long key_max = keys[0];
+  int isSorted = 1;
+  for(int i = 1; i < nSize; i++){
+    if(keys[i] < keys[i-1]) isSorted = 0;
+    key_min = std::min(key_min,keys[i]);
+    key_max = std::max(key_max,keys[i]);
+  }
+  if(isSorted == 1) return;
 
-    if(lowIndChanged > 0){
-      uppInd = lowInd + 1;
+  std::vector<int> order(nSize);
+  if(key_max - key_min < 4*((unsigned long long) nSize)){
+    std::vector<int> count(key_max - key_min + 2,0);
+    for(int i = 0; i < nSize; i++){
+      count[keys[i] - key_min + 1]++;
     }
-    else{
-      uppInd++;
+    for(int k = 1, nk = count.size(); k < nk; k++){
+      count[k] += count[k-1];
     }
-
-    while( arrFlag[uppInd] == 0 && uppInd < nNew){
-      uppInd++;
+    for(int i = 0; i < nSize; i++){
+      order[count[keys[i] - key_min]++] = i;
     }
-
-    if(uppInd < nNew){
-      count++;
-      tmp = arrCoord[lowInd];
-      arrCoord[lowInd] = arrCoord[uppInd];
-      arrCoord[uppInd] = tmp;
-      tmp_flag = arrFlag[lowInd];
-      arrFlag[lowInd] = arrFlag[uppInd];
-      arrFlag[uppInd] = tmp_flag;
-      if(attributesSize > 0){
-        tmp = arrAttr[lowInd];
-        arrAttr[lowInd] = arrAttr[uppInd];
-        arrAttr[uppInd] = tmp;
-      }
-      lowInd++;
+  }
+  else{
+    for(int i = 0; i < nSize; i++){
+      order[i] = i;
     }
+    std::stable_sort(order.begin(),order.end(),
+                     [keys](int i, int j){ return keys[i] < keys[j];});
   }
-  nSize=count;
-  nNew=count;
-
-  //compression is done
-  needOfCompress = 0;
-
-  resize();
+  reorderParticles(order.data());
 }
 
 ///////////////////////////////////////////////////////////////////////////
@@ -811,6 +1731,7 @@ void Bunch::updateClassicalRadius(){
 }
 
 double  Bunch::setMacroSize(double val){
+  coordEpoch++;
   macroSizeForAll = val;
   bunchAttr->doubleVal("macro_size",val);
   return macroSizeForAll;
@@ -869,6 +1790,28 @@ int Bunch::getSizeGlobalFromMemory()
 }
 
 
+long long Bunch::getCoordEpoch()
+{
+  return coordEpoch;
+}
+
+BunchStatistics* Bunch::getStatistics()
+{
+  if(statistics == NULL){
+    statistics = new BunchStatistics(this);
+  }
+  statistics->update();
+  return statistics;
+}
+
+BunchStatistics* Bunch::getStatisticsFromMemory()
+{
+  if(statistics == NULL){
+    return getStatistics();
+  }
+  return statistics;
+}
+
 //returns total number of macro particles, alive and dead
 int Bunch::getTotalCount()
 {
@@ -880,6 +1823,75 @@ int Bunch::getCapacity(){
   return nTotalSize;
 }
 
+///////////////////////////////////////////////////////////////////////////
+//
+// NAME
+//    Bunch::printHeader
+//
+// DESCRIPTION
+//    prints the header of the bunch file: particle attributes controllers,
+//    bunch attributes, sync. particle, and the columns description.
+//    All lines start with "%". It should be called on rank 0 only.
+//
+///////////////////////////////////////////////////////////////////////////
+
+void Bunch::printHeader(std::ostream& Out)
+{
+  //print particle attributes controllers names
+  Out << "% PARTICLE_ATTRIBUTES_CONTROLLERS_NAMES ";
+  std::vector<ParticleAttributes*>::iterator pos;
+  for (pos = attrCntrVect.begin(); pos != attrCntrVect.end(); ++pos) {
+    ParticleAttributes* attrCntr = *pos;
+    Out << attrCntr->name()<<" ";
+  }
+  Out << std::endl;
+
+  //the dictionaries are read as integers, so they are printed in the default format
+  std::ios_base::fmtflags out_flags = Out.flags();
+  Out.unsetf(std::ios_base::floatfield);
+  for (pos = attrCntrVect.begin(); pos != attrCntrVect.end(); ++pos) {
+    ParticleAttributes* attrCntr = *pos;
+          std::map<std::string,double>  params_dict = attrCntr->parameterDict;
+          if(params_dict.size() > 0){
+              std::map<std::string,double>::iterator params_pos;
+              Out <<"% PARTICLE_ATTRIBUTES_CONTROLLER_DICT "<< attrCntr->name() <<" ";
+              for (params_pos = params_dict.begin(); params_pos != params_dict.end(); ++params_pos) {
+                  std::string name = params_pos->first;
+                  double val = params_pos->second;
+                  Out << name <<" " << val << " ";
+              }
+              Out << std::endl;
+          }
+      }
+  Out.flags(out_flags);
+
+  //print bunch attributes
+  std::vector<std::string> bunch_attr_names;
+  bunchAttr->getIntAttributeNames(bunch_attr_names);
+  for(int i = 0, n = bunch_attr_names.size(); i < n; i++){
+    Out << "% BUNCH_ATTRIBUTE_INT "<<bunch_attr_names[i]<<"   ";
+    Out << bunchAttr->intVal(bunch_attr_names[i]) <<" "<< std::endl;
+  }
+  bunch_attr_names.clear();
+  bunchAttr->getDoubleAttributeNames(bunch_attr_names);
+  for(int i = 0, n = bunch_attr_names.size(); i < n; i++){
+    Out << "% BUNCH_ATTRIBUTE_DOUBLE "<<bunch_attr_names[i]<<"   ";
+    Out << bunchAttr->doubleVal(bunch_attr_names[i]) <<" "<< std::endl;
+  }
+
+      //print synchronous particle parameters to the stream
+    syncPart->print(Out);
+
+  Out << "% x[m] px[rad] y[m] py[rad] z[m]  (pz or dE [GeV]) ";
+
+  for (pos = attrCntrVect.begin(); pos != attrCntrVect.end(); ++pos) {
+    ParticleAttributes* attrCntr = *pos;
+    Out << attrCntr->attrDescription()<<" ";
+  }
+
+  Out << std::endl;
+}
+
 ///////////////////////////////////////////////////////////////////////////
 //
 // NAME
@@ -898,55 +1910,8 @@ void Bunch::print(std::ostream& Out)
   //single CPU case
   if(rank_MPI == 0){
 
-    //print particle attributes controllers names
-    Out << "% PARTICLE_ATTRIBUTES_CONTROLLERS_NAMES ";
-    std::vector<ParticleAttributes*>::iterator pos;
-    for (pos = attrCntrVect.begin(); pos != attrCntrVect.end(); ++pos) {
-      ParticleAttributes* attrCntr = *pos;
-      Out << attrCntr->name()<<" ";
-    }
-    Out << std::endl;
-
-    for (pos = attrCntrVect.begin(); pos != attrCntrVect.end(); ++pos) {
-      ParticleAttributes* attrCntr = *pos;
-            std::map<std::string,double>  params_dict = attrCntr->parameterDict;
-            if(params_dict.size() > 0){
-                std::map<std::string,double>::iterator params_pos;
-                Out <<"% PARTICLE_ATTRIBUTES_CONTROLLER_DICT "<< attrCntr->name() <<" ";
-                for (params_pos = params_dict.begin(); params_pos != params_dict.end(); ++params_pos) {
-                    std::string name = params_pos->first;
-                    double val = params_pos->second;
-                    Out << name <<" " << val << " ";
-                }
-                Out << std::endl;
-            }
-        }
-
-    //print bunch attributes
-    std::vector<std::string> bunch_attr_names;
-    bunchAttr->getIntAttributeNames(bunch_attr_names);
-    for(int i = 0, n = bunch_attr_names.size(); i < n; i++){
-      Out << "% BUNCH_ATTRIBUTE_INT "<<bunch_attr_names[i]<<"   ";
-      Out << bunchAttr->intVal(bunch_attr_names[i]) <<" "<< std::endl;
-    }
-    bunch_attr_names.clear();
-    bunchAttr->getDoubleAttributeNames(bunch_attr_names);
-    for(int i = 0, n = bunch_attr_names.size(); i < n; i++){
-      Out << "% BUNCH_ATTRIBUTE_DOUBLE "<<bunch_attr_names[i]<<"   ";
-      Out << bunchAttr->doubleVal(bunch_attr_names[i]) <<" "<< std::endl;
-    }
-
-        //print synchronous particle parameters to the stream
-      syncPart->print(Out);
-
-    Out << "% x[m] px[rad] y[m] py[rad] z[m]  (pz or dE [GeV]) ";
-
-    for (pos = attrCntrVect.begin(); pos != attrCntrVect.end(); ++pos) {
-      ParticleAttributes* attrCntr = *pos;
-      Out << attrCntr->attrDescription()<<" ";
-    }
-
-    Out << std::endl;
+    //print the bunch, particle attributes, and sync. particle info
+    printHeader(Out);
 
     Out <<std::setprecision(8); //<< std::setiosflags(ios::scientific);
 
@@ -1270,8 +2235,542 @@ int Bunch::readBunchCoords(const char* fileName)
     return nMax;
 }
 
+///////////////////////////////////////////////////////////////////////////
+//
+// NAME
+//    Bunch::dumpBunchBinary, Bunch::readBunchCoordsBinary
+//
+// DESCRIPTION
+//    The binary bunch file starts with the text header that has the same
+//    "%" lines as the text bunch file, but the floating point values are
+//    in the hexadecimal format to keep them exact. The line
+//    "% BINARY_DATA nParts nDim attrSize dataOffset endianMarker capacity"
+//    describes the data. The header is finished by the END_OF_HEADER line
+//    and padded with spaces up to the dataOffset position which is
+//    aligned to BUNCH_BINARY_ALIGNMENT bytes. The data are the raw
+//    [capacity][6] coordinates array followed by the [capacity][attrSize]
+//    particles' attributes array, only the first nParts records are used.
+//    For the dumped bunch the capacity is equal to nParts.
+//    Every CPU writes and reads its own slice of these arrays by
+//    collective MPI-IO operations. The particles are read evenly by all
+//    CPUs, or each CPU reads nLocalParts particles in the order of ranks
+//    if nLocalParts >= 0.
+//    The header can be read by initBunchAttributes(...) and
+//    readParticleAttributes(...) methods as for the text file.
+//
+// REMARKS
+//    The dead particles are removed (compress) before dumping.
+//
+///////////////////////////////////////////////////////////////////////////
+
+static const int BUNCH_BINARY_VERSION = 1;
+static const int BUNCH_BINARY_ALIGNMENT = 4096;
+static const int BUNCH_BINARY_ENDIAN_MARKER = 0x01020304;
+//the number of doubles in one MPI-IO call, the MPI count is int
+static const long long BUNCH_BINARY_CHUNK = 1 << 26;
+
+//Writes (write = 1) or reads (write = 0) count doubles at the offset by the
+//collective MPI-IO calls in chunks, so the MPI count does not overflow for
+//the large bunches. All CPUs make the same number of calls, the CPUs with
+//less data make calls with zero count.
+static int accessBunchBinaryData(MPI_File fh, MPI_Offset offset, double* buff, long long count,
+                                 int write, MPI_Comm comm, int size_MPI)
+{
+  long long nChunks = (count + BUNCH_BINARY_CHUNK - 1)/BUNCH_BINARY_CHUNK;
+  long long nChunks_MPI = nChunks;
+  if(size_MPI > 1){
+    ORBIT_MPI_Allreduce(&nChunks,&nChunks_MPI,1,MPI_LONG_LONG_INT,MPI_MAX,comm);
+  }
+  MPI_Status statusMPI;
+  int res = MPI_SUCCESS;
+  for(long long iChunk = 0; iChunk < nChunks_MPI; iChunk++){
+    long long indStart = std::min(iChunk*BUNCH_BINARY_CHUNK,count);
+    int n = (int) std::min(count - indStart,BUNCH_BINARY_CHUNK);
+    MPI_Offset chunkOffset = offset + ((MPI_Offset) indStart)*sizeof(double);
+    int res_chunk = MPI_SUCCESS;
+    if(write == 1){
+      res_chunk = ORBIT_MPI_File_write_at_all(fh,chunkOffset,buff + indStart,n,MPI_DOUBLE,&statusMPI);
+    }
+    else{
+      res_chunk = ORBIT_MPI_File_read_at_all(fh,chunkOffset,buff + indStart,n,MPI_DOUBLE,&statusMPI);
+    }
+    if(res_chunk != MPI_SUCCESS) res = res_chunk;
+  }
+  return res;
+}
+
+//Reads the BINARY_DATA line from the header of the binary bunch file.
+//params = [nParts, nDim, attrSize, endianMarker, capacity]
+//Returns 0 if the line was found.
+static int readBunchBinaryDataParams(const char* fileName, int* params, long long& dataOffset)
+{
+  ifstream is;
+  is.open(fileName, std::ios::in | std::ios::binary);
+  if(!is.is_open()) return 1;
+  int error_ind = 1;
+  std::string  str;
+  std::vector<std::string> v_str;
+  while(!is.eof()){
+    getline(is,str);
+    if(strlen(str.c_str()) == 0  || str.c_str()[0] != '%') break;
+    int nT = StringUtils::Tokenize(str,v_str);
+    if(nT > 6 && v_str[1] == "BINARY_DATA"){
+      sscanf(v_str[2].c_str(),"%d",&params[0]);
+      sscanf(v_str[3].c_str(),"%d",&params[1]);
+      sscanf(v_str[4].c_str(),"%d",&params[2]);
+      sscanf(v_str[5].c_str(),"%lld",&dataOffset);
+      sscanf(v_str[6].c_str(),"%d",&params[3]);
+      params[4] = params[0];
+      if(nT > 7) sscanf(v_str[7].c_str(),"%d",&params[4]);
+      error_ind = 0;
+    }
+  }
+  is.close();
+  return error_ind;
+}
+
+std::string Bunch::makeBinaryHeader(int nParts, int capacity, long long& dataOffset)
+{
+  std::ostringstream Out;
+  Out << std::hexfloat;
+  Out << "% PYORBIT_BUNCH_BINARY_FILE VERSION " << BUNCH_BINARY_VERSION << std::endl;
+  printHeader(Out);
+  std::string header = Out.str();
+  long long minDataOffset = ((header.size() + 256)/BUNCH_BINARY_ALIGNMENT + 1)*BUNCH_BINARY_ALIGNMENT;
+  if(dataOffset < minDataOffset) dataOffset = minDataOffset;
+  std::ostringstream OutData;
+  OutData << "% BINARY_DATA " << nParts << " " << nDim << " " << attributesSize << " ";
+  OutData << dataOffset << " " << BUNCH_BINARY_ENDIAN_MARKER << " " << capacity << std::endl;
+  OutData << "END_OF_HEADER" << std::endl;
+  header += OutData.str();
+  header.resize(dataOffset - 1,' ');
+  header += "\n";
+  return header;
+}
+
+void Bunch::dumpBunchBinary(const char* fileName)
+{
+  compress();
+
+  //the global number of particles and the global index of the first local one
+  int nPartsGlobal = nSize;
+  int indStart = 0;
+  if(size_MPI > 1){
+    int buff_index0 = 0;
+    int buff_index1 = 0;
+    int* nSizeArr     = BufferStore::getBufferStore()->getFreeIntArr(buff_index0,size_MPI);
+    int* nSizeArr_MPI = BufferStore::getBufferStore()->getFreeIntArr(buff_index1,size_MPI);
+    for(int i = 0; i < size_MPI; i++){
+      nSizeArr[i] = 0;
+      if(i == rank_MPI){nSizeArr[i] = nSize;}
+    }
+    ORBIT_MPI_Allreduce(nSizeArr,nSizeArr_MPI,size_MPI,MPI_INT,MPI_SUM,pyComm_Local->comm);
+    nPartsGlobal = 0;
+    for(int i = 0; i < size_MPI; i++){
+      if(i < rank_MPI) indStart += nSizeArr_MPI[i];
+      nPartsGlobal += nSizeArr_MPI[i];
+    }
+    BufferStore::getBufferStore()->setUnusedIntArr(buff_index0);
+    BufferStore::getBufferStore()->setUnusedIntArr(buff_index1);
+  }
+
+  //the header is prepared by rank 0
+  std::string header;
+  long long dataOffset = 0;
+  if(rank_MPI == 0){
+    header = makeBinaryHeader(nPartsGlobal,nPartsGlobal,dataOffset);
+  }
+  if(size_MPI > 1){
+    ORBIT_MPI_Bcast(&dataOffset,1,MPI_LONG_LONG_INT,0,pyComm_Local->comm);
+  }
+
+  MPI_File fh;
+  MPI_Status statusMPI;
+  int res = ORBIT_MPI_File_open(pyComm_Local->comm,fileName,MPI_MODE_WRONLY | MPI_MODE_CREATE,&fh);
+  if(res != MPI_SUCCESS){
+    if(rank_MPI == 0){
+      std::cerr << "The Bunch::dumpBunchBinary(const char* fileName)"<< std::endl;
+      std::cerr << "Can not open file:"<< fileName<< std::endl;
+    }
+    ORBIT_MPI_Finalize("The Bunch::dumpBunchBinary. Stop.");
+  }
+  ORBIT_MPI_File_set_size(fh,0);
+
+  if(rank_MPI == 0){
+    ORBIT_MPI_File_write_at(fh,0,(void*) header.data(),(int) dataOffset,MPI_CHAR,&statusMPI);
+  }
+
+  //the collective calls are made on all CPUs even after an error on one of them
+  MPI_Offset offset = dataOffset + ((MPI_Offset) indStart)*nDim*sizeof(double);
+  res = accessBunchBinaryData(fh,offset,coordSlab(),((long long) nSize)*nDim,1,pyComm_Local->comm,size_MPI);
+
+  if(attributesSize > 0){
+    offset = dataOffset + ((MPI_Offset) nPartsGlobal)*nDim*sizeof(double);
+    offset += ((MPI_Offset) indStart)*attributesSize*sizeof(double);
+    int res_attr = accessBunchBinaryData(fh,offset,arrAttrSlab,((long long) nSize)*attributesSize,1,
+                                         pyComm_Local->comm,size_MPI);
+    if(res_attr != MPI_SUCCESS) res = res_attr;
+  }
+
+  ORBIT_MPI_File_close(&fh);
+
+  if(res != MPI_SUCCESS){
+    if(rank_MPI == 0){
+      std::cerr << "The Bunch::dumpBunchBinary(const char* fileName)"<< std::endl;
+      std::cerr << "Can not write to file:"<< fileName<< std::endl;
+    }
+    ORBIT_MPI_Finalize("The Bunch::dumpBunchBinary. Stop.");
+  }
+}
+
+int Bunch::readBunchCoordsBinary(const char* fileName, int nParts, int nLocalParts)
+{
+  //parameters of the binary data
+  //nPartsFile, nDimFile, attrSizeFile, endianMarker, capacity, error_ind
+  int params_arr[6] = {0,0,0,0,0,0};
+  long long dataOffset = 0;
+
+  if(rank_MPI == 0){
+    if(readBunchBinaryDataParams(fileName,params_arr,dataOffset) != 0){
+      std::cerr << "The Bunch::readBunchCoordsBinary(const char* fileName, int nParts)"<< std::endl;
+      std::cerr << "File:"<< fileName << " can not be opened or it is not a binary bunch file."<< std::endl;
+      params_arr[5] = 1;
+    }
+    if(params_arr[5] == 0 && params_arr[3] != BUNCH_BINARY_ENDIAN_MARKER){
+      std::cerr << "The Bunch::readBunchCoordsBinary(const char* fileName, int nParts)"<< std::endl;
+      std::cerr << "File:"<< fileName << " was written on the computer with another byte order."<< std::endl;
+      params_arr[5] = 1;
+    }
+    if(params_arr[5] == 0 && (params_arr[1] != nDim || params_arr[2] != attributesSize)){
+      std::cerr << "The Bunch::readBunchCoordsBinary(const char* fileName, int nParts)"<< std::endl;
+      std::cerr << "File:"<< fileName << std::endl;
+      std::cerr << "The particles' attributes in the file and in the bunch are different."<< std::endl;
+      std::cerr << "File nDim="<< params_arr[1] <<" attributes size="<< params_arr[2] << std::endl;
+      std::cerr << "Bunch nDim="<< nDim <<" attributes size="<< attributesSize << std::endl;
+      params_arr[5] = 1;
+    }
+  }
+
+  if(size_MPI > 1){
+    ORBIT_MPI_Bcast(params_arr,6,MPI_INT,0,pyComm_Local->comm);
+    ORBIT_MPI_Bcast(&dataOffset,1,MPI_LONG_LONG_INT,0,pyComm_Local->comm);
+  }
+
+  if(params_arr[5] > 0){
+    ORBIT_MPI_Finalize("The Bunch::readBunchCoordsBinary. Stop.");
+  }
+
+  int nPartsFile = params_arr[0];
+  int capacityFile = params_arr[4];
+  int nRead = nPartsFile;
+  if(nParts >= 0 && nParts < nRead) nRead = nParts;
+
+  //every CPU reads its own contiguous slice
+  int nLocal = nRead/size_MPI;
+  int nRem = nRead % size_MPI;
+  int indStart = rank_MPI*nLocal + ((rank_MPI < nRem) ? rank_MPI : nRem);
+  if(rank_MPI < nRem) nLocal++;
+
+  //the slices are defined by the user
+  if(nLocalParts >= 0){
+    nLocal = nLocalParts;
+    indStart = 0;
+    int nReadLocal = nLocal;
+    if(size_MPI > 1){
+      int buff_index0 = 0;
+      int buff_index1 = 0;
+      int* nSizeArr     = BufferStore::getBufferStore()->getFreeIntArr(buff_index0,size_MPI);
+      int* nSizeArr_MPI = BufferStore::getBufferStore()->getFreeIntArr(buff_index1,size_MPI);
+      for(int i = 0; i < size_MPI; i++){
+        nSizeArr[i] = 0;
+        if(i == rank_MPI){nSizeArr[i] = nLocal;}
+      }
+      ORBIT_MPI_Allreduce(nSizeArr,nSizeArr_MPI,size_MPI,MPI_INT,MPI_SUM,pyComm_Local->comm);
+      nReadLocal = 0;
+      for(int i = 0; i < size_MPI; i++){
+        if(i < rank_MPI) indStart += nSizeArr_MPI[i];
+        nReadLocal += nSizeArr_MPI[i];
+      }
+      BufferStore::getBufferStore()->setUnusedIntArr(buff_index0);
+      BufferStore::getBufferStore()->setUnusedIntArr(buff_index1);
+    }
+    if(nReadLocal > nPartsFile){
+      if(rank_MPI == 0){
+        std::cerr << "The Bunch::readBunchCoordsBinary(const char* fileName, int nParts, int nLocalParts)"<< std::endl;
+        std::cerr << "File:"<< fileName << " has only "<< nPartsFile << " particles."<< std::endl;
+        std::cerr << "The requested number of particles:"<< nReadLocal << std::endl;
+      }
+      ORBIT_MPI_Finalize("The Bunch::readBunchCoordsBinary. Stop.");
+    }
+  }
+
+  compress();
+  coordSlab();
+  int nStart = nSize;
+  nNew = nSize + nLocal;
+  resize();
+
+  MPI_File fh;
+  int res = ORBIT_MPI_File_open(pyComm_Local->comm,fileName,MPI_MODE_RDONLY,&fh);
+  if(res == MPI_SUCCESS){
+    MPI_Offset offset = dataOffset + ((MPI_Offset) indStart)*nDim*sizeof(double);
+    res = accessBunchBinaryData(fh,offset,arrCoordSlab + ((long long) nStart)*nDim,((long long) nLocal)*nDim,0,
+                                pyComm_Local->comm,size_MPI);
+    if(attributesSize > 0){
+      offset = dataOffset + ((MPI_Offset) capacityFile)*nDim*sizeof(double);
+      offset += ((MPI_Offset) indStart)*attributesSize*sizeof(double);
+      int res_attr = accessBunchBinaryData(fh,offset,arrAttrSlab + ((long long) nStart)*attributesSize,
+                                           ((long long) nLocal)*attributesSize,0,pyComm_Local->comm,size_MPI);
+      if(res_attr != MPI_SUCCESS) res = res_attr;
+    }
+    ORBIT_MPI_File_close(&fh);
+  }
+
+  if(res != MPI_SUCCESS){
+    if(rank_MPI == 0){
+      std::cerr << "The Bunch::readBunchCoordsBinary(const char* fileName, int nParts)"<< std::endl;
+      std::cerr << "Can not read the data from file:"<< fileName<< std::endl;
+    }
+    ORBIT_MPI_Finalize("The Bunch::readBunchCoordsBinary. Stop.");
+  }
+
+  for(int i = nStart; i < nNew; i++){
+    arrFlag[i] = 1;
+  }
+  nSize = nNew;
+
+  return getSizeGlobal();
+}
+
+int Bunch::readBunchCoordsBinary(const char* fileName, int nParts)
+{
+  return readBunchCoordsBinary(fileName, nParts, -1);
+}
+
+int Bunch::readBunchCoordsBinary(const char* fileName)
+{
+  return readBunchCoordsBinary(fileName, -1, -1);
+}
+
+///////////////////////////////////////////////////////////////////////////
+//
+// NAME
+//    Bunch::mapToFile, Bunch::mapFromFile, Bunch::syncMappedFile,
+//    Bunch::unmapFile
+//
+// DESCRIPTION
+//    The coordinates and particles' attributes slabs can be kept in the
+//    memory-mapped file instead of the heap. The file has the layout of
+//    the binary bunch file (see dumpBunchBinary) with the data arrays of
+//    the bunch capacity size, so the operating system pages the data in
+//    and out during the tracking, and the bunch can be larger than
+//    the physical memory.
+//    After syncMappedFile() the file is a consistent snapshot of the bunch.
+//    It can be read by readBunch(...), or mapped again by mapFromFile(...)
+//    without reading the data. The header is updated only by
+//    syncMappedFile() (it is called by mapToFile, unmapFile and the
+//    destructor).
+//    Each CPU maps its own file, so the file names should be different
+//    for different CPUs.
+//
+///////////////////////////////////////////////////////////////////////////
+
+void Bunch::allocateSlabs(int capacity, int attrSize, double*& coordSlabNew, double*& attrSlabNew)
+{
+  if(mapFileName.size() == 0){
+    coordSlabNew = new double[(size_t) capacity*nDim];
+    attrSlabNew = NULL;
+    if(attrSize > 0) attrSlabNew = new double[(size_t) capacity*attrSize];
+    return;
+  }
+
+  //the new file is created next to the old one, and it will replace it
+  std::string fileName = mapFileName;
+  if(mapPtr != NULL) fileName += ".tmp";
+
+  long long size = mapDataOffset + ((long long) capacity)*(nDim + attrSize)*sizeof(double);
+  void* ptr = MAP_FAILED;
+  int fd = open(fileName.c_str(), O_RDWR | O_CREAT | O_TRUNC, 0644);
+  if(fd >= 0){
+    if(ftruncate(fd,(off_t) size) == 0){
+      ptr = mmap(NULL,(size_t) size,PROT_READ | PROT_WRITE,MAP_SHARED,fd,0);
+    }
+    close(fd);
+  }
+  if(ptr == MAP_FAILED){
+    std::cerr << "The Bunch::allocateSlabs(...) rank="<< rank_MPI << std::endl;
+    std::cerr << "Can not create the memory-mapped file:"<< fileName << std::endl;
+    std::cerr << "File size:"<< size << std::endl;
+    ORBIT_MPI_Finalize("The Bunch::allocateSlabs. Stop.");
+  }
+  //the tracking goes through the particles in order
+  madvise(ptr,(size_t) size,MADV_SEQUENTIAL);
+
+  mapPtrNew = (char*) ptr;
+  mapSizeNew = size;
+  coordSlabNew = (double*) (mapPtrNew + mapDataOffset);
+  attrSlabNew = NULL;
+  if(attrSize > 0) attrSlabNew = coordSlabNew + ((long long) capacity)*nDim;
+}
+
+void Bunch::releaseSlabs(double* coordSlabOld, double* attrSlabOld)
+{
+  if(mapPtr == NULL){
+    delete [] coordSlabOld;
+    if(attrSlabOld != NULL) delete [] attrSlabOld;
+  }
+  else{
+    munmap(mapPtr,(size_t) mapSize);
+    if(mapPtrNew != NULL){
+      std::string fileName = mapFileName + ".tmp";
+      rename(fileName.c_str(),mapFileName.c_str());
+    }
+  }
+  mapPtr = mapPtrNew;
+  mapSize = mapSizeNew;
+  mapPtrNew = NULL;
+  mapSizeNew = 0;
+}
+
+void Bunch::mapToFile(const char* fileName)
+{
+  checkBufferExports("Bunch::mapToFile(...)");
+  if(coordPrecision == 32){
+    if(rank_MPI == 0){
+      std::cerr << "Bunch::mapToFile(const char* fileName)" << std::endl;
+      std::cerr << "The memory-mapped file can not be used with the float32 coordinates." << std::endl;
+    }
+    ORBIT_MPI_Finalize("Bunch::mapToFile - float32 coordinates. Stop.");
+  }
+  compress();
+  if(mapPtr != NULL) syncMappedFile();
+  long long dataOffset = 0;
+  makeBinaryHeader(nSize,nTotalSize,dataOffset);
+  mapFileName = std::string(fileName);
+  //there is a space for more attributes in the header
+  mapDataOffset = dataOffset + BUNCH_BINARY_ALIGNMENT;
+  reallocateMemory(nTotalSize,attributesSize,attributesSize,attributesSize);
+  syncMappedFile();
+}
+
+int Bunch::mapFromFile(const char* fileName)
+{
+  checkBufferExports("Bunch::mapFromFile(...)");
+  if(coordPrecision == 32){
+    if(rank_MPI == 0){
+      std::cerr << "Bunch::mapFromFile(const char* fileName)" << std::endl;
+      std::cerr << "The memory-mapped file can not be used with the float32 coordinates." << std::endl;
+    }
+    ORBIT_MPI_Finalize("Bunch::mapFromFile - float32 coordinates. Stop.");
+  }
+  if(mapPtr != NULL){
+    unmapFile();
+  }
+  deleteAllParticles();
+  initBunchAttributes(fileName);
+  readParticleAttributes(fileName);
+
+  //nParts, nDim, attrSize, endianMarker, capacity
+  int params_arr[5] = {0,0,0,0,0};
+  long long dataOffset = 0;
+  int error_ind = readBunchBinaryDataParams(fileName,params_arr,dataOffset);
+  if(error_ind == 0){
+    if(params_arr[3] != BUNCH_BINARY_ENDIAN_MARKER) error_ind = 1;
+    if(params_arr[1] != nDim || params_arr[2] != attributesSize) error_ind = 1;
+    if(params_arr[4] < params_arr[0] || params_arr[4] <= 0) error_ind = 1;
+  }
+  void* ptr = MAP_FAILED;
+  long long size = dataOffset + ((long long) params_arr[4])*(nDim + attributesSize)*sizeof(double);
+  if(error_ind == 0){
+    int fd = open(fileName, O_RDWR);
+    if(fd >= 0){
+      struct stat file_stat;
+      if(fstat(fd,&file_stat) == 0 && ((long long) file_stat.st_size) >= size){
+        ptr = mmap(NULL,(size_t) size,PROT_READ | PROT_WRITE,MAP_SHARED,fd,0);
+      }
+      close(fd);
+    }
+  }
+  if(ptr == MAP_FAILED){
+    std::cerr << "The Bunch::mapFromFile(const char* fileName) rank="<< rank_MPI << std::endl;
+    std::cerr << "File:"<< fileName << " can not be mapped."<< std::endl;
+    std::cerr << "It should be the binary bunch file with the same particles' attributes."<< std::endl;
+    ORBIT_MPI_Finalize("The Bunch::mapFromFile. Stop.");
+  }
+  madvise(ptr,(size_t) size,MADV_SEQUENTIAL);
+
+  //the old heap memory is replaced by the file
+  releaseSlabs(arrCoordSlab,arrAttrSlab);
+  mapFileName = std::string(fileName);
+  mapPtr = (char*) ptr;
+  mapSize = size;
+  mapDataOffset = dataOffset;
+
+  nTotalSize = params_arr[4];
+  nSize = params_arr[0];
+  nNew = nSize;
+  needOfCompress = 0;
+  nChunk = (int) (nNew*0.2);
+  if(nChunk < nChunkMin) nChunk = nChunkMin;
+
+  delete [] arrFlag;
+  arrFlag = new int[nTotalSize];
+  for(int i = 0; i < nTotalSize; i++){
+    arrFlag[i] = 0;
+    if(i < nSize) arrFlag[i] = 1;
+  }
+
+  arrCoordSlab = (double*) (mapPtr + mapDataOffset);
+  arrAttrSlab = NULL;
+  if(attributesSize > 0) arrAttrSlab = arrCoordSlab + ((long long) nTotalSize)*nDim;
+  setRecordsPointers(attributesSize);
+
+  if(arrCoordSoA != NULL){
+    delete [] arrCoordSoA;
+    arrCoordSoA = new double[(size_t) nTotalSize*nDim];
+    coordSoAIsActive = 0;
+  }
+  coordEpoch++;
+
+  return getSizeGlobal();
+}
+
+void Bunch::syncMappedFile()
+{
+  if(mapPtr == NULL) return;
+  compress();
+  coordSlab();
+  long long dataOffset = mapDataOffset;
+  std::string header = makeBinaryHeader(nSize,nTotalSize,dataOffset);
+  if(dataOffset != mapDataOffset){
+    //the header does not fit, the new file will be created
+    checkBufferExports("Bunch::syncMappedFile()");
+    mapDataOffset = dataOffset + BUNCH_BINARY_ALIGNMENT;
+    reallocateMemory(nTotalSize,attributesSize,attributesSize,attributesSize);
+    dataOffset = mapDataOffset;
+    header = makeBinaryHeader(nSize,nTotalSize,dataOffset);
+  }
+  std::memcpy(mapPtr,header.data(),mapDataOffset);
+  msync(mapPtr,(size_t) mapSize,MS_SYNC);
+}
+
+void Bunch::unmapFile()
+{
+  if(mapPtr == NULL) return;
+  checkBufferExports("Bunch::unmapFile()");
+  syncMappedFile();
+  mapFileName.clear();
+  reallocateMemory(nTotalSize,attributesSize,attributesSize,attributesSize);
+}
+
+std::string Bunch::getMappedFileName()
+{
+  return mapFileName;
+}
+
 void Bunch::deleteAllParticles()
 {
+    coordEpoch++;
     for(int i = 0; i < nNew; i++){
         arrFlag[i] = 0; //dead
     }
@@ -1447,9 +2946,14 @@ SyncPart* Bunch::getSyncPart(){
 //methods related to the particle attribute buckets
 //--------------------------------------------------
 double& Bunch::getParticleAttributeVal(int ind, int attr_ind){
+    coordEpoch++;
     return arrAttr[ind][attr_ind];
 }
 
+int Bunch::getParticleAttributesSize(){
+    return attributesSize;
+}
+
 void Bunch::addParticleAttributes(
     const std::string att_name,
     std::map<std::string,double> part_attr_dict)
@@ -1494,25 +2998,10 @@ void Bunch::addParticleAttributes(ParticleAttributes* attr){
         return;
     }
 
+    coordEpoch++;
     attrCntrMap[attr->name()] = attr;
     int attr_length = attr->getAttSize();
-    if(attrCntrSize == 0){
-        arrAttr =  new double*[nTotalSize];
-        for(int i=0; i < nTotalSize; i++){
-            arrAttr[i] = new double[attr_length];
-        }
-    }
-    else{
-        double* tmp_arr = NULL;
-        for(int i=0; i < nTotalSize; i++){
-            tmp_arr = arrAttr[i];
-            arrAttr[i] = new double[attr_length+attributesSize];
-            for(int j = 0; j < attributesSize; j++){
-                arrAttr[i][j] = tmp_arr[j];
-            }
-            delete [] tmp_arr;
-        }
-    }
+    resizeAttributes(attributesSize + attr_length, attributesSize, attributesSize);
 
     attr->setAttrShift(attributesSize);
     attrCntrSizeMap[attr->name()] = attr->getAttSize();
@@ -1549,6 +3038,7 @@ void Bunch::removeParticleAttributes(const std::string name){
 ParticleAttributes* Bunch::removeParticleAttributesWithoutDelete(const std::string name){
     if(attrCntrSizeMap.count(name) == 0) return NULL;
 
+    coordEpoch++;
     ParticleAttributes* attr = attrCntrMap[name];
     int attr_length = attr->getAttSize();
     int lowInd = attrCntrLowIndMap[name];
@@ -1567,30 +3057,7 @@ ParticleAttributes* Bunch::removeParticleAttributesWithoutDelete(const std::stri
         ORBIT_MPI_Finalize();
     }
 
-    if(newAttributesSize > 0){
-        double* tmp_arr = NULL;
-        int aInd = 0;
-        for(int i=0; i < nTotalSize; i++){
-            tmp_arr = arrAttr[i];
-            arrAttr[i] = new double[newAttributesSize];
-            aInd = 0;
-            for(int j = 0; j < lowInd; j++){
-                arrAttr[i][aInd] = tmp_arr[j];
-                aInd++;
-            }
-            for(int j = uppInd; j < attributesSize; j++){
-                arrAttr[i][aInd] = tmp_arr[j];
-                aInd++;
-            }
-            delete [] tmp_arr;
-        }
-    }
-    else{
-        for(int i=0; i < nTotalSize; i++){
-            delete [] arrAttr[i];
-        }
-        delete [] arrAttr;
-    }
+    resizeAttributes(newAttributesSize, lowInd, uppInd);
 
     attributesSize = newAttributesSize;
     attrCntrSize--;
@@ -1625,8 +3092,15 @@ ParticleAttributes* Bunch::removeParticleAttributesWithoutDelete(const std::stri
 }
 
 
+ParticleAttributes* Bunch::findParticleAttributes(const std::string& name){
+    std::map<std::string,ParticleAttributes*>::iterator pos = attrCntrMap.find(name);
+    if(pos == attrCntrMap.end()) return NULL;
+    return pos->second;
+}
+
 ParticleAttributes* Bunch::getParticleAttributes(const std::string name){
-    if(attrCntrSizeMap.count(name) == 0) {
+    ParticleAttributes* attr = findParticleAttributes(name);
+    if(attr == NULL) {
         if(rank_MPI == 0){
             std::cerr << "ParticleAttributes* Bunch::getParticleAttributes(const string name)"<< std::endl;
             std::cerr << "There is no ParticleAttributes with this name."<< std::endl;
@@ -1635,7 +3109,7 @@ ParticleAttributes* Bunch::getParticleAttributes(const std::string name){
         ORBIT_MPI_Finalize();
         return NULL;
     }
-    return attrCntrMap[name];
+    return attr;
 }
 
 void Bunch::getParticleAttributesNames(std::vector<std::string>& names){
@@ -1690,6 +3164,7 @@ void  Bunch::setMPI_Comm_Local(pyORBIT_MPI_Comm* pyComm_Local){
     wrap_orbit_mpi_comm::freeMPI_Comm(this->pyComm_Local);
     this->pyComm_Local = pyComm_Local;
     Py_INCREF((PyObject *) this->pyComm_Local);
+    coordEpoch++;
   if(iMPIini > 0){
     ORBIT_MPI_Comm_size(pyComm_Local->comm, &size_MPI);
     ORBIT_MPI_Comm_rank(pyComm_Local->comm, &rank_MPI);
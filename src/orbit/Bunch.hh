@@ -44,6 +44,9 @@ using namespace std;
 
 #ifndef BUNCH_H
 #define BUNCH_H
+
+class BunchStatistics;
+
 ///////////////////////////////////////////////////////////////////////////
 //
 // CLASS NAME
@@ -86,6 +89,84 @@ public:
 	//This can speed up operations with coordinates
   double** coordArr();
 
+  //returns the pointer to the contiguous [Capacity][6D] coordinates array
+  //the values order is : [index*6 + (x,px,y,py,z,pz)]
+  //It is the same memory that is used by coordArr() and coordPartArr()
+  double* coordSlab();
+
+  //returns the pointer to the [Capacity] array of particles' flags
+  int* flagArr();
+
+  //the layout of the coordinates storage
+  //0 - array of structures (AoS) [index][x,px,y,py,z,pz], default
+  //1 - structure of arrays (SoA) [x,px,y,py,z,pz][index]
+  //In the SoA layout the AoS copy is synchronized on demand when
+  //coordArr(), coordPartArr() or coordSlab() are called. It is a
+  //transposition of the whole bunch, and it is repeated by the next
+  //component request. The TEAPOT, space charge, aperture, diagnostics,
+  //RF cavity and impedance nodes use dispatchCoordRows() or
+  //readCoordRows() and keep the SoA copy. The number of the transpositions
+  //back to AoS is returned by getCoordToAoSCount().
+  void setCoordLayout(int layout);
+  int getCoordLayout();
+
+  //returns the pointer to the first value of the coordinate component
+  //(0-5 for x,px,y,py,z,pz). The distance between values of the
+  //neighbouring particles is returned by getCoordComponentStride().
+  //The stride should be requested after the components.
+  double* coordComponentArr(int component);
+  int getCoordComponentStride();
+
+  //the precision of the coordinates storage in bits
+  //64 - double, default
+  //32 - float, the coordinates are kept in the float [Capacity][6D] array.
+  //The double array is restored on demand when any of the double accessors
+  //above is called, and the float array is restored by coordFloatSlab().
+  //The nodes that work with the current storage (readCoordRows(),
+  //dispatchCoordRows(), currentCoordVal()) do not restore the double array.
+  //The float32 storage is available only for the AoS layout and
+  //without the memory-mapped file.
+  void setCoordPrecision(int bits);
+  int getCoordPrecision();
+
+  //returns the pointer to the contiguous float [Capacity][6D] coordinates
+  //array or NULL if the bunch keeps the coordinates as double. The kernels
+  //should do all arithmetic in double and store the results back as float.
+  //NULL is also returned while the bunch memory is exported to Python buffers.
+  float* coordFloatSlab();
+
+  //returns the pointer to the float coordinates array if it keeps the current
+  //values and NULL otherwise. Unlike coordFloatSlab() it never converts the
+  //storage, so it is used by readCoordRows() for the consumers that only read
+  //the coordinates (space charge binning, apertures, diagnostics).
+  float* currentCoordFloatSlab();
+
+  //returns the AoS double** coordinates array if it keeps the current values
+  //and NULL otherwise. Unlike coordArr() it never converts the storage and does
+  //not mark the coordinates as changed, so the cached statistics stay valid.
+  //It is used by readCoordRows() for the consumers that only read the coordinates.
+  double** currentCoordArr();
+
+  //returns 1 if the contiguous SoA components keep the current values,
+  //so coordComponentArr() can be read without the transposition.
+  int coordComponentsAreCurrent();
+
+  //returns the value of the coordinate component (0-5 for x,px,y,py,z,pz)
+  //from the storage that keeps the current values without any conversion.
+  //It is used by the consumers that read the coordinates particle by particle.
+  double currentCoordVal(int index, int component);
+
+  //returns the number of the coordinates storage conversions since the bunch
+  //creation: float32 <-> double, and SoA <-> AoS transpositions. Each of them
+  //is a pass over the whole bunch, and the float32 expansion allocates
+  //the double arrays. It should stay constant during the tracking if all
+  //nodes of the lattice work with the current storage.
+  long long getCoordConversionCount();
+  //returns the number of the SoA to AoS transpositions of the coordinates since
+  //the bunch creation. If it grows during the tracking of the SoA bunch, some
+  //node uses coordArr(), coordPartArr() or coordSlab(), and the AoS layout
+  //could be faster.
+  long long getCoordToAoSCount();
 	//wrap longitudinal coordinates assuming the certain ring length
 	void ringwrap(double ring_length);
 
@@ -107,6 +188,34 @@ public:
 	//removes the dead particles from bunch.
   void compress();
 
+  //adds nParts macro-particles at once, the coordinates are in the [nParts][6] array
+  //or in the 6 arrays x,px,y,py,z,pz with nParts values each.
+  //The memory is reallocated only once.
+  //Returns the index of the first new particle.
+  int addParticles(int nParts, const double* coords);
+  int addParticles(int nParts, const double* const* coordComponents);
+
+  //removes all macro-particles with non-zero mask[index] values (the mask
+  //size is getTotalCount()) in one pass keeping the order of the rest.
+  //The removed particles and their attributes are added to the lostBunch
+  //if it is not NULL. Returns the number of removed particles.
+  int deleteParticles(const int* mask, Bunch* lostBunch);
+
+  //moves particles with their attributes between CPUs of the bunch communicator
+  //if the relative excess of particles on the most loaded CPU over the average
+  //is larger than tolerance. Returns the global number of moved particles
+  //or -1 if the memory exported to Python buffers prevents the rebalancing.
+  int rebalance(double tolerance);
+
+  //changes the order of macro-particles and their attributes: the new
+  //particle with index i is the old particle with index order[i].
+  //The order array is a permutation of 0...(getSize()-1).
+  void reorderParticles(const int* order);
+
+  //sorts macro-particles and their attributes by the keys (one key for each
+  //particle of the compressed bunch). The order of particles with equal keys is kept.
+  void sortParticles(const unsigned long long* keys);
+
   double getMass();                // GeV
   double getClassicalRadius();     // m
   double getCharge();              // sign and value in abs(e-charge) only
@@ -138,6 +247,21 @@ public:
   //returns total number of macro particles, alive and dead
   int getTotalCount();
 
+  //returns the global statistics of the macro-particles: the number of particles,
+  //the macro-size, the first and second moments, and the extrema of the coordinates.
+  //They are calculated in one pass and one MPI reduction. It is a collective operation.
+  //The result is kept by the bunch and shared by all users.
+  BunchStatistics* getStatistics();
+
+  //returns the statistics from the latest getStatistics() call without any
+  //calculations and communications. It is used by the methods that are called
+  //right after getStatistics() when the bunch did not change.
+  BunchStatistics* getStatisticsFromMemory();
+
+  //returns the counter that is changed by any method that can change the coordinates,
+  //flags, or attributes of the particles, including the methods returning pointers.
+  long long getCoordEpoch();
+
   //return the capacity of the container
   int getCapacity();
 
@@ -152,6 +276,22 @@ public:
 																	std::map<std::string,std::map<std::string,double> >& part_attr_dicts);
   void readParticleAttributes(const char* fileName);
 
+  //binary bunch files. Each CPU writes and reads its own part of the data with MPI-IO.
+  //The header of the file can be read by initBunchAttributes and readParticleAttributes.
+  void dumpBunchBinary(const char* fileName);
+  int readBunchCoordsBinary(const char* fileName, int nParts);
+  //nLocalParts >= 0 - the number of particles read by this CPU
+  int readBunchCoordsBinary(const char* fileName, int nParts, int nLocalParts);
+  int readBunchCoordsBinary(const char* fileName);
+
+  //the coordinates and attributes can be kept in the memory-mapped binary bunch file.
+  //The file is a snapshot of the bunch after syncMappedFile(). Each CPU needs its own file.
+  void mapToFile(const char* fileName);
+  int mapFromFile(const char* fileName);
+  void syncMappedFile();
+  void unmapFile();
+  std::string getMappedFileName();
+
   void deleteAllParticles();
 
   //methods related to the attribute buckets
@@ -160,6 +300,9 @@ public:
   void removeParticleAttributes(const std::string name);
   void removeAllParticleAttributes();
   ParticleAttributes* getParticleAttributes(const std::string name);
+  //returns the particle attributes with this name or NULL if there is no such attributes.
+  //The pointer can be kept and used in loops instead of the name lookup.
+  ParticleAttributes* findParticleAttributes(const std::string& name);
   void getParticleAttributesNames(std::vector<std::string>& names);
 
   //this can be used for reading and writing the coordinates
@@ -190,6 +333,17 @@ public:
 	//copy particles and particles attributes
 	void addParticlesTo(Bunch* bunch);
 
+  //returns the number of doubles in all particle attributes of one particle
+  int getParticleAttributesSize();
+
+  //methods related to the export of the bunch memory into Python buffers.
+  //The memory cannot be reallocated while there are exports.
+  void addBufferExport();
+  void releaseBufferExport();
+  int getBufferExportsCount();
+  //returns 1 if nParts particles can be added without the reallocation of the exported memory
+  int canAddParticles(int nParts);
+
 	//Parallel case
 	pyORBIT_MPI_Comm* getMPI_Comm_Local();
 	void setMPI_Comm_Local(pyORBIT_MPI_Comm* pyComm_Local);
@@ -207,13 +361,30 @@ private:
   //---------------------------------------
 
   friend class ParticleAttributes;
+  friend class BunchStatistics;
 
   //methods related to the particles attribute buckets
   void addParticleAttributes(ParticleAttributes* attr);
 
   void resize();
+  void resizeAttributes(int newAttributesSize, int lowInd, int uppInd);
+  void reallocateMemory(int newCapacity, int newAttributesSize, int lowInd, int uppInd);
+  void copyAttributes(double* attrSlabNew, int newAttributesSize, int lowInd, int uppInd, int nCopy);
+  void setRecordsPointers(int attrSize);
+  void setAttrRecordsPointers(int attrSize);
+  void allocateSlabs(int capacity, int attrSize, double*& coordSlabNew, double*& attrSlabNew);
+  void releaseSlabs(double* coordSlabOld, double* attrSlabOld);
+  void checkBufferExports(const char* method_name);
+  void syncCoordToAoS();
+  double& coordVal(int index, int component);
+  void syncCoordToSoA();
+  void compactCoordToFloat();
+  void expandCoordToDouble();
+  void printHeader(std::ostream& Out);
+  std::string makeBinaryHeader(int nParts, int capacity, long long& dataOffset);
   void FinalizeExecution();
   void attrInit(int particle_index);
+  int appendParticleSlots(int nParts);
 
   //remove particle attributes without deleting it
   //It is used inside the memorize and restore particle attributes routines
@@ -230,6 +401,7 @@ private:
 protected:
 
   double** arrAttr;
+  double* arrAttrSlab;
   double mass;
   double charge;
   double classicalRadius;
@@ -254,6 +426,45 @@ protected:
   int* arrFlag;
   double** arrCoord;
 
+  //contiguous memory for the coordinates. The arrCoord keeps pointers inside it.
+  double* arrCoordSlab;
+
+  //the coordinates storage layout and the [nDim][Capacity] memory for SoA layout.
+  //coordSoAIsActive > 0 means that the SoA copy keeps the current values.
+  int coordLayout;
+  double* arrCoordSoA;
+  int coordSoAIsActive;
+
+  //the precision of the coordinates (64 or 32 bits) and the float [Capacity][6D] memory.
+  //coordFloatIsActive > 0 means that the float copy keeps the current values
+  //and the double arrays arrCoordSlab and arrCoord are released.
+  int coordPrecision;
+  float* arrCoordFloat;
+  int coordFloatIsActive;
+
+  //the number of the coordinates storage conversions
+  long long nCoordConversions;
+
+  //the number of the SoA to AoS transpositions
+  long long nCoordToAoS;
+
+  //the memory-mapped file with the coordinates and attributes slabs.
+  //mapPtr is NULL if the slabs are on the heap.
+  std::string mapFileName;
+  char* mapPtr;
+  long long mapSize;
+  long long mapDataOffset;
+  char* mapPtrNew;
+  long long mapSizeNew;
+
+  //number of the Python buffers that use the bunch memory
+  int nBufferExports;
+
+  //the counter of the possible changes of the particles' data and the
+  //statistics of the particles that was calculated at one of the counter values
+  long long coordEpoch;
+  BunchStatistics* statistics;
+
   //need of compress
   int needOfCompress;
 
@@ -292,6 +503,128 @@ protected:
 
 };
 
+///////////////////////////////////////////////////////////////////////////
+//
+// CLASS NAME
+//    BunchFloatCoordRows
+//
+// DESCRIPTION
+//    The [index][x,px,y,py,z,pz] access to the float coordinates array
+//    returned by Bunch::coordFloatSlab(). The same kernel code can be used
+//    for this class and the double** array from Bunch::coordArr(). The float
+//    values are converted to double in the arithmetic expressions.
+//
+///////////////////////////////////////////////////////////////////////////
+
+class BunchFloatCoordRows
+{
+public:
+  BunchFloatCoordRows(float* slab_in): slab(slab_in) {}
+  float* operator[](int index) const { return slab + (size_t) index*6; }
+private:
+  float* slab;
+};
+
+///////////////////////////////////////////////////////////////////////////
+//
+// CLASS NAME
+//    BunchCoordComponentRows
+//
+// DESCRIPTION
+//    The [index][x,px,y,py,z,pz] access to the coordinate components
+//    returned by Bunch::coordComponentArr(). It can be used by the kernels
+//    only if isContiguous() returns 1, it is so for the SoA layout. The
+//    components are contiguous arrays, so the compiler can vectorize the
+//    loops over the particles with this access.
+//
+///////////////////////////////////////////////////////////////////////////
+
+class BunchCoordComponentRows
+{
+public:
+  class Row
+  {
+  public:
+    Row(double* const* comps_in, int index_in): comps(comps_in), index(index_in) {}
+    double& operator[](int component) const { return comps[component][index]; }
+  private:
+    double* const* comps;
+    int index;
+  };
+
+  BunchCoordComponentRows(Bunch* bunch){
+    for(int i = 0; i < 6; i++){ comps[i] = bunch->coordComponentArr(i);}
+    stride = bunch->getCoordComponentStride();
+  }
+  Row operator[](int index) const { return Row(comps, index); }
+  int isContiguous() const { return (stride == 1); }
+private:
+  double* comps[6];
+  int stride;
+};
+
+///////////////////////////////////////////////////////////////////////////
+//
+// FUNCTION NAME
+//    dispatchCoordRows
+//
+// DESCRIPTION
+//    Calls f(arr) with the fastest [index][x,px,y,py,z,pz] access to the
+//    bunch coordinates: the BunchFloatCoordRows for the float32 storage,
+//    the BunchCoordComponentRows for the contiguous SoA components, and
+//    the double** array from Bunch::coordArr() otherwise. The function f
+//    should be a template (e.g. a generic lambda) accepting all of them.
+//
+///////////////////////////////////////////////////////////////////////////
+
+template<class RowsFunction>
+inline void dispatchCoordRows(Bunch* bunch, RowsFunction f)
+{
+  float* arrFloat = bunch->coordFloatSlab();
+  if(arrFloat != NULL){
+    f(BunchFloatCoordRows(arrFloat));
+    return;
+  }
+  if(bunch->getCoordLayout() == 1){
+    BunchCoordComponentRows comps(bunch);
+    if(comps.isContiguous()){
+      f(comps);
+      return;
+    }
+  }
+  f(bunch->coordArr());
+}
+
+///////////////////////////////////////////////////////////////////////////
+//
+// FUNCTION NAME
+//    readCoordRows
+//
+// DESCRIPTION
+//    Calls f(arr) with the [index][x,px,y,py,z,pz] access to the storage
+//    that keeps the current values of the bunch coordinates: the float32
+//    array, the SoA components, or the AoS double** array. Unlike
+//    dispatchCoordRows() it never converts or transposes the storage, so
+//    it should be used by the consumers that only read the coordinates.
+//    The function f should not change the coordinates.
+//
+///////////////////////////////////////////////////////////////////////////
+
+template<class RowsFunction>
+inline void readCoordRows(Bunch* bunch, RowsFunction f)
+{
+  float* arrFloat = bunch->currentCoordFloatSlab();
+  if(arrFloat != NULL){
+    f(BunchFloatCoordRows(arrFloat));
+    return;
+  }
+  if(bunch->coordComponentsAreCurrent() > 0){
+    f(BunchCoordComponentRows(bunch));
+    return;
+  }
+  f(bunch->currentCoordArr());
+}
+
 ///////////////////////////////////////////////////////////////////////////
 //
 // END OF FILE
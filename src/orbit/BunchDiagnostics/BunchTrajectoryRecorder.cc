@@ -0,0 +1,223 @@
+#include "BunchTrajectoryRecorder.hh"
+#include "ParticleAttributes.hh"
+
+#include <iostream>
+#include <cstring>
+#include <map>
+
+//the size of the file header in bytes and the size of one record
+#define TRAJECTORY_FILE_HEADER_SIZE 64
+#define TRAJECTORY_FILE_VERSION 1
+#define TRAJECTORY_RECORD_SIZE (2*sizeof(int) + 6*sizeof(double))
+#define TRAJECTORY_ENDIAN_MARKER 0x01020304
+
+/** Constructor */
+BunchTrajectoryRecorder::BunchTrajectoryRecorder(const char* fileName_in, int batchSize_in): CppPyWrapper(NULL)
+{
+	fileName = std::string(fileName_in);
+	batchSize = batchSize_in;
+	if(batchSize < 1) batchSize = 1;
+	nCalls = 0;
+	nRecordsInFile = 0;
+	fileIsCreated = 0;
+	nScans = 0;
+	sizeGlobalLastScan = -1;
+	comm = MPI_COMM_WORLD;
+}
+
+/** Destructor */
+BunchTrajectoryRecorder::~BunchTrajectoryRecorder()
+{
+	close();
+}
+
+void BunchTrajectoryRecorder::setParticleIds(const std::vector<int>& ids)
+{
+	partIds = ids;
+	partIndexes.assign(partIds.size(),-1);
+	sizeGlobalLastScan = -1;
+}
+
+int BunchTrajectoryRecorder::getNumberOfParticleIds(){ return (int) partIds.size();}
+
+int BunchTrajectoryRecorder::getParticleId(int index){ return partIds[index];}
+
+long long BunchTrajectoryRecorder::getNumberOfRecordsInFile(){ return nRecordsInFile;}
+
+int BunchTrajectoryRecorder::getNumberOfScans(){ return nScans;}
+
+/** Adds the coordinates of the selected particles to the buffer */
+void BunchTrajectoryRecorder::recordBunch(Bunch* bunch, int turn)
+{
+	comm = bunch->getMPI_Comm_Local()->comm;
+	int size_MPI = bunch->getMPI_Size();
+
+	ParticleAttributes* idAttr = bunch->findParticleAttributes("ParticleIdNumber");
+	if(idAttr == NULL){
+		if(bunch->getMPI_Rank() == 0){
+			std::cerr << "BunchTrajectoryRecorder::recordBunch(Bunch* bunch, int turn)" << std::endl;
+			std::cerr << "The bunch does not have the ParticleIdNumber particle attributes." << std::endl;
+		}
+		ORBIT_MPI_Finalize("BunchTrajectoryRecorder::recordBunch - no ParticleIdNumber attributes. Stop.");
+	}
+	double* idArr = idAttr->attColumn(0);
+	int stride = idAttr->getColumnStride();
+	int* flagArr = bunch->flagArr();
+	int nTotal = bunch->getTotalCount();
+
+	//the cached indexes are checked, and the bunch is scanned again
+	//if any of them is wrong on any CPU or the number of particles changed
+	int nInvalid = 0;
+	for(int k = 0, n = partIds.size(); k < n; k++){
+		int ind = partIndexes[k];
+		if(ind < 0) continue;
+		if(ind >= nTotal || flagArr[ind] == 0 || ((int) idArr[ind*stride]) != partIds[k]){
+			nInvalid++;
+		}
+	}
+	int buff[2] = {nInvalid,bunch->getSize()};
+	int buff_MPI[2] = {nInvalid,bunch->getSize()};
+	if(size_MPI > 1){
+		ORBIT_MPI_Allreduce(buff,buff_MPI,2,MPI_INT,MPI_SUM,comm);
+	}
+	if(buff_MPI[0] > 0 || buff_MPI[1] != sizeGlobalLastScan){
+		scanBunch(bunch,idArr,stride);
+		sizeGlobalLastScan = buff_MPI[1];
+	}
+
+	//the coordinates are read from the current storage to avoid the conversion of the whole bunch
+	double coords[6];
+	for(int k = 0, n = partIds.size(); k < n; k++){
+		int ind = partIndexes[k];
+		if(ind < 0) continue;
+		for(int j = 0; j < 6; j++){
+			coords[j] = bunch->currentCoordVal(ind,j);
+		}
+		size_t pos = records.size();
+		records.resize(pos + TRAJECTORY_RECORD_SIZE);
+		char* rec = &records[pos];
+		std::memcpy(rec,&turn,sizeof(int));
+		std::memcpy(rec + sizeof(int),&partIds[k],sizeof(int));
+		std::memcpy(rec + 2*sizeof(int),coords,6*sizeof(double));
+	}
+
+	nCalls++;
+	if(nCalls >= batchSize){
+		flush();
+	}
+}
+
+/** Finds the indexes of the selected particles in the bunch */
+void BunchTrajectoryRecorder::scanBunch(Bunch* bunch, double* idArr, int stride)
+{
+	std::map<int,int> idToK;
+	for(int k = 0, n = partIds.size(); k < n; k++){
+		idToK[partIds[k]] = k;
+		partIndexes[k] = -1;
+	}
+	int* flagArr = bunch->flagArr();
+	std::map<int,int>::iterator pos;
+	for(int i = 0, n = bunch->getTotalCount(); i < n; i++){
+		if(flagArr[i] == 0) continue;
+		pos = idToK.find((int) idArr[i*stride]);
+		if(pos != idToK.end()){
+			partIndexes[pos->second] = i;
+		}
+	}
+	nScans++;
+}
+
+/** Writes the buffered records to the file */
+void BunchTrajectoryRecorder::flush()
+{
+	int size_MPI = 1;
+	int rank_MPI = 0;
+	int iMPIini = 0;
+	ORBIT_MPI_Initialized(&iMPIini);
+	if(iMPIini > 0){
+		ORBIT_MPI_Comm_size(comm,&size_MPI);
+		ORBIT_MPI_Comm_rank(comm,&rank_MPI);
+	}
+
+	//the records of the CPUs follow each other in the order of ranks
+	int nRecords = (int) (records.size()/TRAJECTORY_RECORD_SIZE);
+	long long nRecordsBefore = 0;
+	long long nRecordsGlobal = nRecords;
+	if(size_MPI > 1){
+		std::vector<int> nRecordsArr(size_MPI,0);
+		std::vector<int> nRecordsArr_MPI(size_MPI,0);
+		nRecordsArr[rank_MPI] = nRecords;
+		ORBIT_MPI_Allreduce(&nRecordsArr[0],&nRecordsArr_MPI[0],size_MPI,MPI_INT,MPI_SUM,comm);
+		nRecordsGlobal = 0;
+		for(int i = 0; i < size_MPI; i++){
+			if(i < rank_MPI) nRecordsBefore += nRecordsArr_MPI[i];
+			nRecordsGlobal += nRecordsArr_MPI[i];
+		}
+	}
+	if(nRecordsGlobal == 0 && fileIsCreated > 0){
+		nCalls = 0;
+		return;
+	}
+
+	MPI_File fh;
+	MPI_Status statusMPI;
+	int res = ORBIT_MPI_File_open(comm,fileName.c_str(),MPI_MODE_RDWR | MPI_MODE_CREATE,&fh);
+	if(res != MPI_SUCCESS){
+		if(rank_MPI == 0){
+			std::cerr << "BunchTrajectoryRecorder::flush()" << std::endl;
+			std::cerr << "Can not open file:" << fileName << std::endl;
+		}
+		ORBIT_MPI_Finalize("BunchTrajectoryRecorder::flush(). Stop.");
+	}
+	if(fileIsCreated == 0){
+		ORBIT_MPI_File_set_size(fh,0);
+		fileIsCreated = 1;
+	}
+
+	MPI_Offset offset = TRAJECTORY_FILE_HEADER_SIZE + (nRecordsInFile + nRecordsBefore)*TRAJECTORY_RECORD_SIZE;
+	char* buff = NULL;
+	if(nRecords > 0) buff = &records[0];
+	res = ORBIT_MPI_File_write_at_all(fh,offset,buff,nRecords*TRAJECTORY_RECORD_SIZE,MPI_BYTE,&statusMPI);
+
+	nRecordsInFile += nRecordsGlobal;
+	if(rank_MPI == 0 && res == MPI_SUCCESS){
+		writeHeader(fh);
+	}
+	ORBIT_MPI_File_close(&fh);
+
+	if(res != MPI_SUCCESS){
+		if(rank_MPI == 0){
+			std::cerr << "BunchTrajectoryRecorder::flush()" << std::endl;
+			std::cerr << "Can not write to file:" << fileName << std::endl;
+		}
+		ORBIT_MPI_Finalize("BunchTrajectoryRecorder::flush(). Stop.");
+	}
+
+	records.clear();
+	nCalls = 0;
+}
+
+/** Writes the buffered records */
+void BunchTrajectoryRecorder::close()
+{
+	if(records.size() > 0 || nCalls > 0){
+		flush();
+	}
+}
+
+/** Writes the file header with the current number of records */
+void BunchTrajectoryRecorder::writeHeader(MPI_File fh)
+{
+	char header[TRAJECTORY_FILE_HEADER_SIZE];
+	std::memset(header,0,TRAJECTORY_FILE_HEADER_SIZE);
+	int version = TRAJECTORY_FILE_VERSION;
+	int recordSize = TRAJECTORY_RECORD_SIZE;
+	int endianMarker = TRAJECTORY_ENDIAN_MARKER;
+	std::memcpy(header,"ORBITTRJ",8);
+	std::memcpy(header + 8,&version,sizeof(int));
+	std::memcpy(header + 12,&recordSize,sizeof(int));
+	std::memcpy(header + 16,&nRecordsInFile,sizeof(long long));
+	std::memcpy(header + 24,&endianMarker,sizeof(int));
+	MPI_Status statusMPI;
+	ORBIT_MPI_File_write_at(fh,0,header,TRAJECTORY_FILE_HEADER_SIZE,MPI_BYTE,&statusMPI);
+}
@@ -0,0 +1,101 @@
+#ifndef BUNCH_TRAJECTORY_RECORDER_H
+#define BUNCH_TRAJECTORY_RECORDER_H
+
+//MPI Function Wrappers
+#include "orbit_mpi.hh"
+
+//pyORBIT utils
+#include "CppPyWrapper.hh"
+
+#include "Bunch.hh"
+
+#include <string>
+#include <vector>
+
+using namespace std;
+
+/**
+  The BunchTrajectoryRecorder class records the 6D coordinates of the selected
+  macro-particles (by the ParticleIdNumber attribute) turn by turn. The records
+  are kept in the buffer and written to the binary file in batches. The indexes of
+  the selected particles in the bunch are cached, so the cost of the recording is
+  proportional to the number of the selected particles. The whole bunch is scanned
+  again only when the cached indexes are not valid anymore (particles were lost,
+  sorted, or moved to another CPU) or when the global number of particles changed.
+
+  The binary file has the header of 64 bytes:
+  "ORBITTRJ" (8 chars), version (int32), record size in bytes (int32),
+  number of records (int64), endian marker 0x01020304 (int32), and zeros.
+  Each record is turn (int32), ParticleIdNumber (int32), x,xp,y,yp,z,dE (6 doubles).
+  The records of one batch are ordered by CPU rank and then by the turn.
+*/
+
+class BunchTrajectoryRecorder: public OrbitUtils::CppPyWrapper
+{
+	public:
+
+		/** Constructor. batchSize is the number of recordBunch(...) calls between the file writes. */
+		BunchTrajectoryRecorder(const char* fileName, int batchSize);
+
+		/** Destructor. Writes the buffered records by calling close(). */
+		virtual ~BunchTrajectoryRecorder();
+
+		/** Sets the ParticleIdNumber values of the particles to record. */
+		void setParticleIds(const std::vector<int>& ids);
+
+		/** Returns the number of the selected particles. */
+		int getNumberOfParticleIds();
+
+		/** Returns the ParticleIdNumber value of the selected particle with the index. */
+		int getParticleId(int index);
+
+		/** Adds the coordinates of the selected particles to the buffer.
+		    It is a collective operation for all CPUs of the bunch communicator. */
+		void recordBunch(Bunch* bunch, int turn);
+
+		/** Writes the buffered records to the file. It is a collective operation. */
+		void flush();
+
+		/** Writes the buffered records. After close() the new records will be appended to the file. */
+		void close();
+
+		/** Returns the number of records written to the file. */
+		long long getNumberOfRecordsInFile();
+
+		/** Returns the number of the whole bunch scans for the particles' indexes. */
+		int getNumberOfScans();
+
+	private:
+
+		/** Finds the indexes of the selected particles in the bunch. */
+		void scanBunch(Bunch* bunch, double* idArr, int stride);
+
+		/** Writes the file header with the current number of records. */
+		void writeHeader(MPI_File fh);
+
+	private:
+
+		std::string fileName;
+		int batchSize;
+
+		//the selected particles' ids and their cached indexes in the bunch (-1 means not on this CPU)
+		std::vector<int> partIds;
+		std::vector<int> partIndexes;
+
+		//the records buffer and the number of recordBunch(...) calls since the last write
+		std::vector<char> records;
+		int nCalls;
+
+		long long nRecordsInFile;
+		int fileIsCreated;
+		int nScans;
+
+		//the global number of particles at the last scan
+		int sizeGlobalLastScan;
+
+		//the communicator of the last recorded bunch
+		MPI_Comm comm;
+};
+
+#endif
+//endif for BUNCH_TRAJECTORY_RECORDER_H
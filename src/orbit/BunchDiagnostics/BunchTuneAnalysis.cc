@@ -39,7 +39,6 @@ void BunchTuneAnalysis::analyzeBunch(Bunch* bunch){
 	bunch->compress();
 	SyncPart* syncPart = bunch->getSyncPart();
 	double beta = syncPart->getBeta();
-	double** part_coord_arr = bunch->coordArr();
 
 	if(!bunch->hasParticleAttributes("ParticlePhaseAttributes")){
 		cerr<<"adding particle phase information attribute\n";
@@ -53,51 +52,63 @@ void BunchTuneAnalysis::analyzeBunch(Bunch* bunch){
 		bunch->addParticleAttributes("ParticlePhaseAttributes", tunemap);
 	}
 
-	if(bunch->hasParticleAttributes("ParticlePhaseAttributes")){
-		for (int i=0; i < bunch->getSize(); i++)
+	//the attributes are resolved once, the values are accessed through the columns
+	ParticleAttributes* phaseAttr = bunch->findParticleAttributes("ParticlePhaseAttributes");
+	if(phaseAttr != NULL){
+		int stride = phaseAttr->getColumnStride();
+		double* xPhaseArr = phaseAttr->attColumn(0);
+		double* yPhaseArr = phaseAttr->attColumn(1);
+		double* xTuneArr = phaseAttr->attColumn(2);
+		double* yTuneArr = phaseAttr->attColumn(3);
+		double* xActionArr = phaseAttr->attColumn(4);
+		double* yActionArr = phaseAttr->attColumn(5);
+		readCoordRows(bunch, [&](auto part_coord_arr)
 		{
-			double x = part_coord_arr[i][0];
-			double xp = part_coord_arr[i][1];
-			double y = part_coord_arr[i][2];
-			double yp = part_coord_arr[i][3];
-			double Etot = syncPart->getEnergy() + syncPart->getMass();
-			double dpp = 1/(beta*beta)*part_coord_arr[i][5]/Etot;
+			for (int i=0; i < bunch->getSize(); i++)
+			{
+				double x = part_coord_arr[i][0];
+				double xp = part_coord_arr[i][1];
+				double y = part_coord_arr[i][2];
+				double yp = part_coord_arr[i][3];
+				double Etot = syncPart->getEnergy() + syncPart->getMass();
+				double dpp = 1/(beta*beta)*part_coord_arr[i][5]/Etot;
 
-			double xval = (x - etax * dpp)/sqrt(betax);
-			double xpval = (xp - etapx * dpp) * sqrt(betax) + xval * alphax;
-			double yval = y / sqrt(betay);
-			double ypval = (yp + y * alphay/betay) * sqrt(betay);
+				double xval = (x - etax * dpp)/sqrt(betax);
+				double xpval = (xp - etapx * dpp) * sqrt(betax) + xval * alphax;
+				double yval = y / sqrt(betay);
+				double ypval = (yp + y * alphay/betay) * sqrt(betay);
 
-			double angle = atan2(xpval, xval);
-			if(angle < 0.) angle += (2.0*OrbitConst::PI);
-			double xPhase = angle;
-			double xPhaseOld = bunch->getParticleAttributes("ParticlePhaseAttributes")->attValue(i,0);
-			double xTune = (xPhaseOld - xPhase) / (2.0*OrbitConst::PI);
-			if(xTune < 0.) xTune += 1.;
-			bunch->getParticleAttributes("ParticlePhaseAttributes")->attValue(i, 0) = xPhase;
-			bunch->getParticleAttributes("ParticlePhaseAttributes")->attValue(i, 2) = xTune;
+				double angle = atan2(xpval, xval);
+				if(angle < 0.) angle += (2.0*OrbitConst::PI);
+				double xPhase = angle;
+				double xPhaseOld = xPhaseArr[i*stride];
+				double xTune = (xPhaseOld - xPhase) / (2.0*OrbitConst::PI);
+				if(xTune < 0.) xTune += 1.;
+				xPhaseArr[i*stride] = xPhase;
+				xTuneArr[i*stride] = xTune;
 
-			angle = atan2(ypval, yval);
-			if(angle < 0.) angle += (2.0*OrbitConst::PI);
-			double yPhase = angle;
-			double yPhaseOld = bunch->getParticleAttributes("ParticlePhaseAttributes")->attValue(i,1);
-			double yTune = (yPhaseOld - yPhase) / (2.0*OrbitConst::PI);
-			if(yTune < 0.) yTune += 1.;
-			bunch->getParticleAttributes("ParticlePhaseAttributes")->attValue(i, 1) = yPhase;
-			bunch->getParticleAttributes("ParticlePhaseAttributes")->attValue(i, 3) = yTune;
+				angle = atan2(ypval, yval);
+				if(angle < 0.) angle += (2.0*OrbitConst::PI);
+				double yPhase = angle;
+				double yPhaseOld = yPhaseArr[i*stride];
+				double yTune = (yPhaseOld - yPhase) / (2.0*OrbitConst::PI);
+				if(yTune < 0.) yTune += 1.;
+				yPhaseArr[i*stride] = yPhase;
+				yTuneArr[i*stride] = yTune;
 
-			double xcanonical = x - etax * dpp;
-			double ycanonical = y;
-			double xpfac = xp - etapx * dpp;
-			double ypfac = yp;
-			double pxcanonical =  xpfac + xcanonical * (alphax/betax);
-			double pycanonical =  ypfac + ycanonical * (alphay/betay);
-			double xAction = xcanonical  *  xcanonical / betax + pxcanonical * pxcanonical * betax;
-			double yAction = ycanonical  *  ycanonical / betay + pycanonical * pycanonical * betay;
+				double xcanonical = x - etax * dpp;
+				double ycanonical = y;
+				double xpfac = xp - etapx * dpp;
+				double ypfac = yp;
+				double pxcanonical =  xpfac + xcanonical * (alphax/betax);
+				double pycanonical =  ypfac + ycanonical * (alphay/betay);
+				double xAction = xcanonical  *  xcanonical / betax + pxcanonical * pxcanonical * betax;
+				double yAction = ycanonical  *  ycanonical / betay + pycanonical * pycanonical * betay;
 
-			bunch->getParticleAttributes("ParticlePhaseAttributes")->attValue(i, 4) = xAction;
-			bunch->getParticleAttributes("ParticlePhaseAttributes")->attValue(i, 5) = yAction;
-			}
+				xActionArr[i*stride] = xAction;
+				yActionArr[i*stride] = yAction;
+				}
+		});
 	}
 
 }
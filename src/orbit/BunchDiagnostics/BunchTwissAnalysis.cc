@@ -7,6 +7,7 @@
 
 #include "ParticleMacroSize.hh"
 #include "SyncPart.hh"
+#include "BunchStatistics.hh"
 
 /** Constructor */
 BunchTwissAnalysis::BunchTwissAnalysis(): CppPyWrapper(NULL)
@@ -48,86 +49,19 @@ BunchTwissAnalysis::~BunchTwissAnalysis()
 /** Performs the Twiss analysis of the bunch */
 void BunchTwissAnalysis::analyzeBunch(Bunch* bunch){
 
-	//initialization
-	for(int i = 0; i < 6; i++){
-		avg_arr[i] = 0.;
-	}
+	//the sums and the MPI reduction are done by the bunch statistics
+	BunchStatistics* stats = bunch->getStatistics();
+	count = stats->getCount();
+	total_macrosize = stats->getWeight();
 
 	for(int i = 0; i < 6; i++){
-		for(int j = 0; j < 6; j++){
-			corr_arr[i+6*j] = 0.;
-		}
-	}
-	count = 0;
-	total_macrosize = 0.;
-
-	bunch->compress();
-	double m_size = 0.;
-	int nParts = bunch->getSize();
-	count += nParts;
-	double** part_coord_arr = bunch->coordArr();
-	int has_msize = bunch->hasParticleAttributes("macrosize");
-	if(has_msize > 0){
-		ParticleMacroSize* macroSizeAttr = (ParticleMacroSize*) bunch->getParticleAttributes("macrosize");
-		double m_size = 0.;
-		for(int ip = 0; ip < nParts; ip++){
-			m_size = macroSizeAttr->macrosize(ip);
-			total_macrosize += m_size;
-			for(int i = 0; i < 6; i++){
-				avg_arr[i] += m_size*part_coord_arr[ip][i];
-			}
-
-			for(int i = 0; i < 6; i++){
-				for(int j = 0; j < i+1; j++){
-					corr_arr[i+6*j] += m_size*part_coord_arr[ip][i]*part_coord_arr[ip][j];
-				}
-			}
-		}
-	} else {
-		m_size = 1.0;
-		for(int ip = 0; ip < nParts; ip++){
-			for(int i = 0; i < 6; i++){
-				avg_arr[i] += part_coord_arr[ip][i];
-			}
-
-			for(int i = 0; i < 6; i++){
-				for(int j = 0; j < i+1; j++){
-					corr_arr[i+6*j] += part_coord_arr[ip][i]*part_coord_arr[ip][j];
-				}
-			}
-		}
-		total_macrosize += nParts*m_size;
-		for(int i = 0; i < 6; i++){
-			avg_arr[i] *= m_size;
-		}
-		for(int i = 0; i < 6; i++){
-			for(int j = 0; j < i+1; j++){
-				corr_arr[i+6*j] *= m_size;
-			}
-		}
+		avg_arr[i] = stats->getAverage(i);
 	}
 
-	int count_MPI = 0;
-	ORBIT_MPI_Allreduce(&count,&count_MPI,1,MPI_INT,MPI_SUM,bunch->getMPI_Comm_Local()->comm);
-	count = count_MPI;
-
-	double total_macrosize_MPI = 0.;
-	ORBIT_MPI_Allreduce(&total_macrosize,&total_macrosize_MPI,1,MPI_DOUBLE,MPI_SUM,bunch->getMPI_Comm_Local()->comm);
-	total_macrosize = total_macrosize_MPI;
-
-	ORBIT_MPI_Allreduce(avg_arr,avg_arr_MPI,6,MPI_DOUBLE,MPI_SUM,bunch->getMPI_Comm_Local()->comm);
-	ORBIT_MPI_Allreduce(corr_arr,corr_arr_MPI,36,MPI_DOUBLE,MPI_SUM,bunch->getMPI_Comm_Local()->comm);
-
-	if(fabs(total_macrosize) > 0.){
-		for(int i = 0; i < 6; i++){
-			avg_arr[i] = avg_arr_MPI[i]/total_macrosize;
-		}
-
-		for(int i = 0; i < 6; i++){
-			for(int j = 0; j < i+1; j++){
-				corr_arr[i+6*j] = corr_arr_MPI[i+6*j]/total_macrosize;
-				corr_arr[j+6*i] = corr_arr_MPI[i+6*j]/total_macrosize;
-			}
+	for(int i = 0; i < 6; i++){
+		for(int j = 0; j < i+1; j++){
+			corr_arr[i+6*j] = stats->getMoment(i,j);
+			corr_arr[j+6*i] = corr_arr[i+6*j];
 		}
 	}
 
@@ -159,8 +93,8 @@ void BunchTwissAnalysis::computeBunchMoments(Bunch* bunch, int order, int disper
 	total_macrosize = 0; //Total macrosize (can different than number of macroparticles if m_size is specified)
 	int nParts = bunch->getSize();
 	double total_macrosize_MPI = 0.;
-	double** part_coord_arr = bunch->coordArr();
 	int has_msize = bunch->hasParticleAttributes("macrosize");
+	//the coordinates are read by currentCoordVal(...) from the current storage without conversions
 
 	analyzeBunch(bunch);
 
@@ -169,20 +103,20 @@ void BunchTwissAnalysis::computeBunchMoments(Bunch* bunch, int order, int disper
 			ParticleMacroSize* macroSizeAttr = (ParticleMacroSize*) bunch->getParticleAttributes("macrosize");
 			double m_size = 0.;
 			for(int ip = 0; ip < nParts; ip++){
-				m_size = macroSizeAttr->macrosize(ip);
+				m_size = macroSizeAttr->readMacrosize(ip);
 				total_macrosize += m_size;
 				if (dispersionflag > 0) {
-					dispterm = getDispersion(0) * part_coord_arr[ip][5] / (bunch_kinenergy + bunch_mass) / (bunch_beta*bunch_beta);
+					dispterm = getDispersion(0) * bunch->currentCoordVal(ip,5) / (bunch_kinenergy + bunch_mass) / (bunch_beta*bunch_beta);
 				}
-				xAvg += m_size*(part_coord_arr[ip][0] - dispterm);
+				xAvg += m_size*(bunch->currentCoordVal(ip,0) - dispterm);
 			}
 		} else {
 			m_size = 1.0;
 			for(int ip = 0; ip < nParts; ip++){
 				if (dispersionflag > 0) {
-					dispterm = getDispersion(0) * part_coord_arr[ip][5] / (bunch_kinenergy + bunch_mass) / (bunch_beta*bunch_beta);
+					dispterm = getDispersion(0) * bunch->currentCoordVal(ip,5) / (bunch_kinenergy + bunch_mass) / (bunch_beta*bunch_beta);
 				}
-				xAvg += part_coord_arr[ip][0] - dispterm;
+				xAvg += bunch->currentCoordVal(ip,0) - dispterm;
 			}
 			total_macrosize += nParts*m_size;
 			xAvg *= m_size;
@@ -231,11 +165,11 @@ void BunchTwissAnalysis::computeBunchMoments(Bunch* bunch, int order, int disper
 		double m_size = 0.;
 		for(int ip = 0; ip < nParts; ip++){
 
-			m_size = macroSizeAttr->macrosize(ip);
+			m_size = macroSizeAttr->readMacrosize(ip);
 			total_macrosize += m_size;
 
 			if (dispersionflag > 0) {
-				dispterm = getDispersion(0) * part_coord_arr[ip][5] / (bunch_kinenergy + bunch_mass) / (bunch_beta*bunch_beta);
+				dispterm = getDispersion(0) * bunch->currentCoordVal(ip,5) / (bunch_kinenergy + bunch_mass) / (bunch_beta*bunch_beta);
 			}
 
 			if(emitnormflag > 0){
@@ -248,10 +182,10 @@ void BunchTwissAnalysis::computeBunchMoments(Bunch* bunch, int order, int disper
 			}
 
 			for(i = 0; i < _order; i++)
-                momX[i+1] = momX[i]*m_size*((part_coord_arr[ip][0] - dispterm) - xAvg);
+                momX[i+1] = momX[i]*m_size*((bunch->currentCoordVal(ip,0) - dispterm) - xAvg);
 
 			for(i = 0; i< _order; i++)
-                momY[i+1] = momY[i]*m_size*(part_coord_arr[ip][2] - yAvg);
+                momY[i+1] = momY[i]*m_size*(bunch->currentCoordVal(ip,2) - yAvg);
 
 			for(j = 0; j<_order; j++)
 				for(i=0 ; i< _order+1-j; i++){
@@ -265,7 +199,7 @@ void BunchTwissAnalysis::computeBunchMoments(Bunch* bunch, int order, int disper
 		for(int ip = 0; ip < nParts; ip++){
 
 			if (dispersionflag > 0) {
-				dispterm = getDispersion(0) * part_coord_arr[ip][5] / (bunch_kinenergy + bunch_mass) / (bunch_beta*bunch_beta);
+				dispterm = getDispersion(0) * bunch->currentCoordVal(ip,5) / (bunch_kinenergy + bunch_mass) / (bunch_beta*bunch_beta);
 			}
 
 			if(emitnormflag > 0){
@@ -278,10 +212,10 @@ void BunchTwissAnalysis::computeBunchMoments(Bunch* bunch, int order, int disper
 			}
 
 			for(i = 0; i < _order; i++)
-                momX[i+1] = momX[i]*((part_coord_arr[ip][0] - dispterm) - xAvg);
+                momX[i+1] = momX[i]*((bunch->currentCoordVal(ip,0) - dispterm) - xAvg);
 
 			for(i = 0; i< _order; i++)
-                momY[i+1] = momY[i]*(part_coord_arr[ip][2] - yAvg);
+                momY[i+1] = momY[i]*(bunch->currentCoordVal(ip,2) - yAvg);
 
 			for(j = 0; j<_order; j++)
 				for(i=0 ; i< _order+1-j; i++)
@@ -0,0 +1,205 @@
+#include "orbit_mpi.hh"
+#include "pyORBIT_Object.hh"
+
+#include "wrap_bunch_trajectory_recorder.hh"
+#include "wrap_bunch.hh"
+
+#include <iostream>
+#include <vector>
+
+#include "BunchTrajectoryRecorder.hh"
+
+namespace wrap_bunch_trajectory_recorder{
+
+#ifdef __cplusplus
+extern "C" {
+#endif
+
+	/**
+	    Constructor for python class wrapping c++ BunchTrajectoryRecorder instance.
+      It never will be called directly.
+	*/
+	static PyObject* BunchTrajectoryRecorder_new(PyTypeObject *type, PyObject *args, PyObject *kwds){
+		pyORBIT_Object* self;
+		self = (pyORBIT_Object *) type->tp_alloc(type, 0);
+		self->cpp_obj = NULL;
+		return (PyObject *) self;
+	}
+
+  /** This is implementation of the __init__ method: BunchTrajectoryRecorder(fileName[, batchSize = 100]) */
+  static int BunchTrajectoryRecorder_init(pyORBIT_Object *self, PyObject *args, PyObject *kwds){
+		const char* fileName = NULL;
+		int batchSize = 100;
+		if(!PyArg_ParseTuple(args,"s|i:__init__",&fileName,&batchSize)){
+			ORBIT_MPI_Finalize("BunchTrajectoryRecorder - BunchTrajectoryRecorder(fileName[, batchSize]) - parameters are needed.");
+		}
+		self->cpp_obj =  new BunchTrajectoryRecorder(fileName,batchSize);
+	  ((BunchTrajectoryRecorder*) self->cpp_obj)->setPyWrapper((PyObject*) self);
+    return 0;
+  }
+
+  /** Sets the ParticleIdNumber values of the particles to record */
+  static PyObject* BunchTrajectoryRecorder_setParticleIds(PyObject *self, PyObject *args){
+	  BunchTrajectoryRecorder* cpp_recorder = (BunchTrajectoryRecorder*)((pyORBIT_Object*) self)->cpp_obj;
+		PyObject* pyIds;
+		if(!PyArg_ParseTuple(args,"O:setParticleIds",&pyIds)){
+			ORBIT_MPI_Finalize("BunchTrajectoryRecorder - setParticleIds([id0,id1,...]) - parameter is needed.");
+		}
+		PyObject* pySeq = PySequence_Fast(pyIds,"BunchTrajectoryRecorder - setParticleIds(ids) - ids should be a sequence.");
+		if(pySeq == NULL){
+			ORBIT_MPI_Finalize("BunchTrajectoryRecorder - setParticleIds(ids) - ids should be a sequence.");
+		}
+		std::vector<int> ids;
+		for(int i = 0, n = PySequence_Fast_GET_SIZE(pySeq); i < n; i++){
+			ids.push_back((int) PyLong_AsLong(PySequence_Fast_GET_ITEM(pySeq,i)));
+		}
+		Py_DECREF(pySeq);
+		if(PyErr_Occurred()){
+			ORBIT_MPI_Finalize("BunchTrajectoryRecorder - setParticleIds(ids) - ids should be integers.");
+		}
+		cpp_recorder->setParticleIds(ids);
+		Py_INCREF(Py_None);
+		return Py_None;
+  }
+
+  /** Returns the tuple with the ParticleIdNumber values of the particles to record */
+  static PyObject* BunchTrajectoryRecorder_getParticleIds(PyObject *self, PyObject *args){
+	  BunchTrajectoryRecorder* cpp_recorder = (BunchTrajectoryRecorder*)((pyORBIT_Object*) self)->cpp_obj;
+		int n = cpp_recorder->getNumberOfParticleIds();
+		PyObject* pyIds = PyTuple_New(n);
+		for(int i = 0; i < n; i++){
+			PyTuple_SET_ITEM(pyIds,i,Py_BuildValue("i",cpp_recorder->getParticleId(i)));
+		}
+		return pyIds;
+  }
+
+ /** Adds the coordinates of the selected particles to the buffer */
+  static PyObject* BunchTrajectoryRecorder_recordBunch(PyObject *self, PyObject *args){
+	  BunchTrajectoryRecorder* cpp_recorder = (BunchTrajectoryRecorder*)((pyORBIT_Object*) self)->cpp_obj;
+		PyObject* pyBunch;
+		int turn = 0;
+		if(!PyArg_ParseTuple(args,"Oi:recordBunch",&pyBunch,&turn)){
+			ORBIT_MPI_Finalize("BunchTrajectoryRecorder - recordBunch(Bunch bunch, int turn) - parameters are needed.");
+		}
+		PyObject* pyORBIT_Bunch_Type = wrap_orbit_bunch::getBunchType("Bunch");
+		if(!PyObject_IsInstance(pyBunch,pyORBIT_Bunch_Type)){
+			ORBIT_MPI_Finalize("BunchTrajectoryRecorder - recordBunch(Bunch bunch, int turn) - method needs a Bunch.");
+		}
+		Bunch* cpp_bunch = (Bunch*) ((pyORBIT_Object*)pyBunch)->cpp_obj;
+		cpp_recorder->recordBunch(cpp_bunch,turn);
+		Py_INCREF(Py_None);
+		return Py_None;
+  }
+
+  /** Writes the buffered records to the file */
+  static PyObject* BunchTrajectoryRecorder_flush(PyObject *self, PyObject *args){
+	  BunchTrajectoryRecorder* cpp_recorder = (BunchTrajectoryRecorder*)((pyORBIT_Object*) self)->cpp_obj;
+		cpp_recorder->flush();
+		Py_INCREF(Py_None);
+		return Py_None;
+  }
+
+  /** Writes the buffered records if there are any */
+  static PyObject* BunchTrajectoryRecorder_close(PyObject *self, PyObject *args){
+	  BunchTrajectoryRecorder* cpp_recorder = (BunchTrajectoryRecorder*)((pyORBIT_Object*) self)->cpp_obj;
+		cpp_recorder->close();
+		Py_INCREF(Py_None);
+		return Py_None;
+  }
+
+  /** Returns the number of records written to the file */
+  static PyObject* BunchTrajectoryRecorder_getNumberOfRecordsInFile(PyObject *self, PyObject *args){
+	  BunchTrajectoryRecorder* cpp_recorder = (BunchTrajectoryRecorder*)((pyORBIT_Object*) self)->cpp_obj;
+		return Py_BuildValue("L",cpp_recorder->getNumberOfRecordsInFile());
+  }
+
+  /** Returns the number of the whole bunch scans for the particles' indexes */
+  static PyObject* BunchTrajectoryRecorder_getNumberOfScans(PyObject *self, PyObject *args){
+	  BunchTrajectoryRecorder* cpp_recorder = (BunchTrajectoryRecorder*)((pyORBIT_Object*) self)->cpp_obj;
+		return Py_BuildValue("i",cpp_recorder->getNumberOfScans());
+  }
+
+  //--------------------------------------------------------------
+  //destructor for python BunchTrajectoryRecorder class (__del__ method).
+  //---------------------------------------------------------------
+  static void BunchTrajectoryRecorder_del(pyORBIT_Object* self){
+		delete ((BunchTrajectoryRecorder*)self->cpp_obj);
+		self->ob_base.ob_type->tp_free((PyObject*)self);
+  }
+
+	// defenition of the methods of the python BunchTrajectoryRecorder wrapper class
+	// they will be vailable from python level
+  static PyMethodDef BunchTrajectoryRecorderClassMethods[] = {
+		{ "setParticleIds", BunchTrajectoryRecorder_setParticleIds, METH_VARARGS,"Sets the ParticleIdNumber values of the particles to record."},
+		{ "getParticleIds", BunchTrajectoryRecorder_getParticleIds, METH_VARARGS,"Returns the tuple with the ParticleIdNumber values of the particles to record."},
+		{ "recordBunch", BunchTrajectoryRecorder_recordBunch, METH_VARARGS,"Records the coordinates of the selected particles - recordBunch(bunch,turn)."},
+		{ "flush", BunchTrajectoryRecorder_flush, METH_VARARGS,"Writes the buffered records to the file."},
+		{ "close", BunchTrajectoryRecorder_close, METH_VARARGS,"Writes the buffered records to the file if there are any."},
+		{ "getNumberOfRecordsInFile", BunchTrajectoryRecorder_getNumberOfRecordsInFile, METH_VARARGS,"Returns the number of records written to the file."},
+		{ "getNumberOfScans", BunchTrajectoryRecorder_getNumberOfScans, METH_VARARGS,"Returns the number of the whole bunch scans for the particles' indexes."},
+		{NULL}
+  };
+
+	// defenition of the memebers of the python BunchTrajectoryRecorder wrapper class
+	// they will be vailable from python level
+	static PyMemberDef BunchTrajectoryRecorderClassMembers [] = {
+		{NULL}
+	};
+
+	//new python BunchTrajectoryRecorder wrapper type definition
+	static PyTypeObject pyORBIT_BunchTrajectoryRecorder_Type = {
+		PyVarObject_HEAD_INIT(NULL, 0)
+		"BunchTrajectoryRecorder", /*tp_name*/
+		sizeof(pyORBIT_Object), /*tp_basicsize*/
+		0, /*tp_itemsize*/
+		(destructor) BunchTrajectoryRecorder_del , /*tp_dealloc*/
+		0, /*tp_print*/
+		0, /*tp_getattr*/
+		0, /*tp_setattr*/
+		0, /*tp_compare*/
+		0, /*tp_repr*/
+		0, /*tp_as_number*/
+		0, /*tp_as_sequence*/
+		0, /*tp_as_mapping*/
+		0, /*tp_hash */
+		0, /*tp_call*/
+		0, /*tp_str*/
+		0, /*tp_getattro*/
+		0, /*tp_setattro*/
+		0, /*tp_as_buffer*/
+		Py_TPFLAGS_DEFAULT | Py_TPFLAGS_BASETYPE, /*tp_flags*/
+		"The BunchTrajectoryRecorder python wrapper", /* tp_doc */
+		0, /* tp_traverse */
+		0, /* tp_clear */
+		0, /* tp_richcompare */
+		0, /* tp_weaklistoffset */
+		0, /* tp_iter */
+		0, /* tp_iternext */
+		BunchTrajectoryRecorderClassMethods, /* tp_methods */
+		BunchTrajectoryRecorderClassMembers, /* tp_members */
+		0, /* tp_getset */
+		0, /* tp_base */
+		0, /* tp_dict */
+		0, /* tp_descr_get */
+		0, /* tp_descr_set */
+		0, /* tp_dictoffset */
+		(initproc) BunchTrajectoryRecorder_init, /* tp_init */
+		0, /* tp_alloc */
+		BunchTrajectoryRecorder_new, /* tp_new */
+	};
+
+	//--------------------------------------------------
+	//Initialization of the pyBunchTrajectoryRecorder class
+	//--------------------------------------------------
+  void initbunchtrajectoryrecorder(PyObject* module){
+		if (PyType_Ready(&pyORBIT_BunchTrajectoryRecorder_Type) < 0) return;
+		Py_INCREF(&pyORBIT_BunchTrajectoryRecorder_Type);
+		PyModule_AddObject(module, "BunchTrajectoryRecorder", (PyObject *)&pyORBIT_BunchTrajectoryRecorder_Type);
+	}
+
+#ifdef __cplusplus
+}
+#endif
+
+
+}
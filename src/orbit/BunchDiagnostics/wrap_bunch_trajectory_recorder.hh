@@ -0,0 +1,18 @@
+#ifndef WRAP_BUNCH_TRAJECTORY_RECORDER_HH_
+#define WRAP_BUNCH_TRAJECTORY_RECORDER_HH_
+
+#include "Python.h"
+
+#ifdef __cplusplus
+extern "C" {
+#endif
+
+  namespace wrap_bunch_trajectory_recorder{
+    void initbunchtrajectoryrecorder(PyObject* module);
+  }
+
+#ifdef __cplusplus
+}
+#endif
+
+#endif /*WRAP_BUNCH_TRAJECTORY_RECORDER_HH_*/
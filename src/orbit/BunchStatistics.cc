@@ -0,0 +1,251 @@
+//////////////////////////////// -*- C++ -*- //////////////////////////////
+//
+// FILE NAME
+//    BunchStatistics.cc
+//
+// CREATED
+//    10/18/2026
+//
+// DESCRIPTION
+//    Source code for the global statistics of the macro-particles in the bunch.
+//
+///////////////////////////////////////////////////////////////////////////
+
+#include "BunchStatistics.hh"
+#include "Bunch.hh"
+
+#include <iostream>
+#include <cfloat>
+
+//the layout of the sums array
+#define STAT_COUNT 0
+#define STAT_WEIGHT 1
+#define STAT_SUM 2
+#define STAT_SUM2 8
+#define STAT_NEG_MIN 29
+#define STAT_MAX 35
+#define STAT_SIZE 41
+
+//index of the sum of x_i*x_j products for j <= i
+#define STAT_SUM2_INDEX(i,j) (STAT_SUM2 + (i)*((i)+1)/2 + (j))
+
+/** The reduction operation for the sums arrays: the sum for the count, weight,
+    and sums of coordinates, and the maximum for the negated minima and maxima. */
+static void bunchStatisticsReduce(void* in, void* inout, int* len, MPI_Datatype* datatype)
+{
+	double* in_arr = (double*) in;
+	double* inout_arr = (double*) inout;
+	for(int k = 0; k < *len; k++){
+		double* a = in_arr + k*STAT_SIZE;
+		double* b = inout_arr + k*STAT_SIZE;
+		for(int i = 0; i < STAT_NEG_MIN; i++){
+			b[i] += a[i];
+		}
+		for(int i = STAT_NEG_MIN; i < STAT_SIZE; i++){
+			if(a[i] > b[i]) b[i] = a[i];
+		}
+	}
+}
+
+/** Constructor */
+BunchStatistics::BunchStatistics(Bunch* bunch_in)
+{
+	bunch = bunch_in;
+	localSums = new double[STAT_SIZE];
+	globalSums = new double[STAT_SIZE];
+	for(int i = 0; i < STAT_SIZE; i++){
+		localSums[i] = 0.;
+		globalSums[i] = 0.;
+	}
+	localEpoch = -1;
+	nPasses = 0;
+	nReductions = 0;
+}
+
+/** Destructor */
+BunchStatistics::~BunchStatistics()
+{
+	delete [] localSums;
+	delete [] globalSums;
+}
+
+/** Calculates the statistics for the current state of the bunch */
+void BunchStatistics::update()
+{
+	bunch->compress();
+	int localIsChanged = 0;
+	if(localEpoch < 0 || localEpoch != bunch->coordEpoch || bunch->nBufferExports > 0){
+		calculateLocalSums();
+		localEpoch = bunch->coordEpoch;
+		//the exported memory can be changed without the bunch methods
+		if(bunch->nBufferExports > 0) localEpoch = -1;
+		localIsChanged = 1;
+	}
+	if(bunch->size_MPI > 1){
+		reduceLocalSums();
+	}
+	else if(localIsChanged > 0){
+		for(int i = 0; i < STAT_SIZE; i++){
+			globalSums[i] = localSums[i];
+		}
+	}
+	bunch->sizeGlobal = (int) globalSums[STAT_COUNT];
+}
+
+/** Calculates the local sums from the bunch arrays */
+void BunchStatistics::calculateLocalSums()
+{
+	for(int i = 0; i < STAT_NEG_MIN; i++){
+		localSums[i] = 0.;
+	}
+	for(int i = 0; i < 6; i++){
+		localSums[STAT_NEG_MIN + i] = -DBL_MAX;
+		localSums[STAT_MAX + i] = -DBL_MAX;
+	}
+
+	const double* mArr = NULL;
+	int mStride = 0;
+	if(bunch->attrCntrLowIndMap.count("macrosize") > 0 && bunch->arrAttrSlab != NULL){
+		mArr = bunch->arrAttrSlab + bunch->attrCntrLowIndMap["macrosize"];
+		mStride = bunch->attributesSize;
+	}
+
+	//the coordinates are read from the array that keeps the current values
+	int nDim = bunch->nDim;
+	if(bunch->coordFloatIsActive > 0){
+		addParticles(bunch->arrCoordFloat,nDim,1,mArr,mStride);
+	}
+	else if(bunch->coordSoAIsActive > 0){
+		addParticles(bunch->arrCoordSoA,1,bunch->nTotalSize,mArr,mStride);
+	}
+	else{
+		addParticles(bunch->arrCoordSlab,nDim,1,mArr,mStride);
+	}
+	nPasses++;
+}
+
+/** Adds the particles to the local sums */
+template<class T> void BunchStatistics::addParticles(const T* arr, int rowStride, int compStride,
+                                                     const double* mArr, int mStride)
+{
+	int nParts = bunch->nSize;
+	double* avg_arr = localSums + STAT_SUM;
+	double* corr_arr = localSums + STAT_SUM2;
+	double* min_arr = localSums + STAT_NEG_MIN;
+	double* max_arr = localSums + STAT_MAX;
+	double x[6];
+	double m_size = 1.0;
+	double total_macrosize = 0.;
+	for(int ip = 0; ip < nParts; ip++){
+		const T* row = arr + ((long long) ip)*rowStride;
+		for(int i = 0; i < 6; i++){
+			x[i] = row[i*compStride];
+			if(-x[i] > min_arr[i]) min_arr[i] = -x[i];
+			if(x[i] > max_arr[i]) max_arr[i] = x[i];
+		}
+		if(mArr != NULL){
+			m_size = mArr[((long long) ip)*mStride];
+			total_macrosize += m_size;
+			for(int i = 0; i < 6; i++){
+				avg_arr[i] += m_size*x[i];
+			}
+			for(int i = 0, k = 0; i < 6; i++){
+				for(int j = 0; j < i+1; j++, k++){
+					corr_arr[k] += m_size*x[i]*x[j];
+				}
+			}
+		}
+		else{
+			for(int i = 0; i < 6; i++){
+				avg_arr[i] += x[i];
+			}
+			for(int i = 0, k = 0; i < 6; i++){
+				for(int j = 0; j < i+1; j++, k++){
+					corr_arr[k] += x[i]*x[j];
+				}
+			}
+		}
+	}
+	if(mArr == NULL) total_macrosize = nParts;
+	localSums[STAT_COUNT] = nParts;
+	localSums[STAT_WEIGHT] = total_macrosize;
+}
+
+/** The MPI data type of the sums array and the reduction operation. The sums
+    array is one element of this type, so the MPI library cannot split it between
+    the reduction calls. They are created once by the first reduction (the static
+    local variable initialization is thread-safe) and freed by ORBIT_MPI_Finalize. */
+class BunchStatisticsMPI
+{
+public:
+	BunchStatisticsMPI(){
+		ORBIT_MPI_Type_contiguous(STAT_SIZE,MPI_DOUBLE,&statType);
+		ORBIT_MPI_Type_commit(&statType);
+		ORBIT_MPI_Op_create(bunchStatisticsReduce,1,&statOp);
+		ORBIT_MPI_Add_finalize_function(BunchStatisticsMPI::free);
+	}
+
+	static BunchStatisticsMPI& instance(){
+		static BunchStatisticsMPI statMPI;
+		return statMPI;
+	}
+
+	static void free(){
+		BunchStatisticsMPI& statMPI = instance();
+		ORBIT_MPI_Op_free(&statMPI.statOp);
+		ORBIT_MPI_Type_free(&statMPI.statType);
+	}
+
+	MPI_Datatype statType;
+	MPI_Op statOp;
+};
+
+/** Performs the fused MPI reduction of the local sums */
+void BunchStatistics::reduceLocalSums()
+{
+	BunchStatisticsMPI& statMPI = BunchStatisticsMPI::instance();
+	ORBIT_MPI_Allreduce(localSums,globalSums,1,statMPI.statType,statMPI.statOp,bunch->getMPI_Comm_Local()->comm);
+	nReductions++;
+}
+
+int BunchStatistics::getCount(){ return (int) globalSums[STAT_COUNT];}
+
+double BunchStatistics::getWeight(){ return globalSums[STAT_WEIGHT];}
+
+double BunchStatistics::getMacroSize(){
+	if(bunch->hasParticleAttributes("macrosize") > 0) return globalSums[STAT_WEIGHT];
+	return globalSums[STAT_COUNT]*bunch->getMacroSize();
+}
+
+double BunchStatistics::getAverage(int ic){
+	if(ic < 0 || ic > 5 || globalSums[STAT_WEIGHT] == 0.) return 0.;
+	return globalSums[STAT_SUM + ic]/globalSums[STAT_WEIGHT];
+}
+
+double BunchStatistics::getMoment(int ic, int jc){
+	if(ic < 0 || ic > 5 || jc < 0 || jc > 5 || globalSums[STAT_WEIGHT] == 0.) return 0.;
+	if(jc > ic){
+		int tmp = ic;
+		ic = jc;
+		jc = tmp;
+	}
+	return globalSums[STAT_SUM2_INDEX(ic,jc)]/globalSums[STAT_WEIGHT];
+}
+
+double BunchStatistics::getCorrelation(int ic, int jc){
+	return (getMoment(ic,jc) - getAverage(ic)*getAverage(jc));
+}
+
+double BunchStatistics::getMin(int ic){
+	if(ic < 0 || ic > 5) return 0.;
+	return -globalSums[STAT_NEG_MIN + ic];
+}
+
+double BunchStatistics::getMax(int ic){
+	if(ic < 0 || ic > 5) return 0.;
+	return globalSums[STAT_MAX + ic];
+}
+
+int BunchStatistics::getNumberOfPasses(){ return nPasses;}
+
+int BunchStatistics::getNumberOfReductions(){ return nReductions;}
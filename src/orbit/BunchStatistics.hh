@@ -0,0 +1,122 @@
+//////////////////////////////// -*- C++ -*- //////////////////////////////
+//
+// FILE NAME
+//    BunchStatistics.hh
+//
+// CREATED
+//    10/18/2026
+//
+// DESCRIPTION
+//    The global statistics of the macro-particles in the bunch: the number of
+//    particles, the macro-size, the first and second moments, and the extrema
+//    of the coordinates. All of them are calculated in one pass over the local
+//    particles and one MPI reduction. The instance is kept by the bunch, so all
+//    users of the statistics at the same lattice position can share it.
+//
+///////////////////////////////////////////////////////////////////////////
+
+#ifndef BUNCH_STATISTICS_H
+#define BUNCH_STATISTICS_H
+
+#include "orbit_mpi.hh"
+
+class Bunch;
+
+///////////////////////////////////////////////////////////////////////////
+//
+// CLASS NAME
+//    BunchStatistics
+//
+// DESCRIPTION
+//    The instance is created and updated by Bunch::getStatistics().
+//    The local sums are calculated again only if Bunch::getCoordEpoch()
+//    changed since the last pass, or if the bunch memory is exported to
+//    Python buffers. In the non-parallel case the result is ready after
+//    this check. In the parallel case the update is always collective,
+//    because the particles can be changed on some CPUs only, and all CPUs
+//    should make the same decision about the reduction. The count, the sums,
+//    and the extrema are reduced by one MPI_Allreduce with the user-defined
+//    operation instead of the separate reductions of each bunch analysis.
+//
+///////////////////////////////////////////////////////////////////////////
+
+class BunchStatistics
+{
+public:
+
+  /** Constructor. */
+  BunchStatistics(Bunch* bunch);
+
+  /** Destructor. */
+  virtual ~BunchStatistics();
+
+  /** Calculates the statistics for the current state of the bunch. It is a collective operation. */
+  void update();
+
+  /** Returns the global number of macro-particles. */
+  int getCount();
+
+  /** Returns the sum of the particles' macro-sizes if the bunch has "macrosize"
+      particle attributes or the number of particles otherwise. The averages and
+      moments are normalized by this weight. */
+  double getWeight();
+
+  /** Returns the total macro-size of the particles. */
+  double getMacroSize();
+
+  /** Returns the average of the coordinate with the index 0-5 (x,xp,y,yp,z,dE). */
+  double getAverage(int ic);
+
+  /** Returns the second moment <x_ic*x_jc> of the coordinates. */
+  double getMoment(int ic, int jc);
+
+  /** Returns the correlation <x_ic*x_jc> - <x_ic>*<x_jc> of the coordinates. */
+  double getCorrelation(int ic, int jc);
+
+  /** Returns the minimal value of the coordinate. It is DBL_MAX for the empty bunch. */
+  double getMin(int ic);
+
+  /** Returns the maximal value of the coordinate. It is -DBL_MAX for the empty bunch. */
+  double getMax(int ic);
+
+  /** Returns the number of the passes over the local particles. */
+  int getNumberOfPasses();
+
+  /** Returns the number of the MPI reductions. */
+  int getNumberOfReductions();
+
+private:
+
+  /** Calculates the local sums from the bunch arrays without changing the bunch epoch. */
+  void calculateLocalSums();
+
+  /** Adds the particles to the local sums. The coordinate j of the particle i is arr[i*rowStride + j*compStride]. */
+  template<class T> void addParticles(const T* arr, int rowStride, int compStride,
+                                      const double* mArr, int mStride);
+
+  /** Performs the fused MPI reduction of the local sums. */
+  void reduceLocalSums();
+
+private:
+
+  Bunch* bunch;
+
+  //count, weight, 6 sums, 21 sums of products (j <= i), 6 negated minima, 6 maxima
+  double* localSums;
+  double* globalSums;
+
+  //the bunch epoch of the local sums, -1 means they should be calculated again
+  long long localEpoch;
+
+  int nPasses;
+  int nReductions;
+};
+
+///////////////////////////////////////////////////////////////////////////
+//
+// END OF FILE
+//
+///////////////////////////////////////////////////////////////////////////
+
+#endif
+//endif for BUNCH_STATISTICS_H
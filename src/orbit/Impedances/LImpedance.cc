@@ -91,7 +91,7 @@ void LImpedance::assignImpedanceValue(int n, double real, double imag)
 
 void LImpedance::trackBunch(Bunch* bunch)
 {
-  int nPartsGlobal = bunch->getSizeGlobal();
+  int nPartsGlobal = bunch->getStatistics()->getCount();
   if(nPartsGlobal < _nMacrosMin) return;
 
 // Bin the particles
@@ -99,7 +99,7 @@ void LImpedance::trackBunch(Bunch* bunch)
   double zmin, zmax;
   double realPart, imagPart;
 
-  bunchExtremaCalc->getExtremaZ(bunch, zmin, zmax);
+  bunchExtremaCalc->getExtremaZ(bunch->getStatisticsFromMemory(), zmin, zmax);
   double zextra = (_length - (zmax - zmin)) / 2.0;
   zmax += zextra;
   zmin  = zmax - _length;
@@ -156,22 +156,24 @@ void LImpedance::trackBunch(Bunch* bunch)
   double philocal;
   double z;
   double phi[bunch->getSize()];
-  double** coords = bunch->coordArr();
-  for (int j = 0; j < bunch->getSize(); j++)
+  dispatchCoordRows(bunch, [&](auto coords)
   {
-    z = bunch->z(j);
-    philocal = (z / _length) * 2 * OrbitConst::PI;
-
-// Handle cases where the longitudinal coordinate is
-// outside of the user-specified length
-
-  if(philocal < -OrbitConst::PI) philocal += 2 * OrbitConst::PI;
-  if(philocal >  OrbitConst::PI) philocal -= 2 * OrbitConst::PI;
-
-  double dE = _kick(philocal) * (-1e-9) *
-              bunch->getCharge() * charge2current;
-  coords[j][5] += dE;
-  }
+    for (int j = 0; j < bunch->getSize(); j++)
+    {
+      z = coords[j][4];
+      philocal = (z / _length) * 2 * OrbitConst::PI;
+
+  // Handle cases where the longitudinal coordinate is
+  // outside of the user-specified length
+
+    if(philocal < -OrbitConst::PI) philocal += 2 * OrbitConst::PI;
+    if(philocal >  OrbitConst::PI) philocal -= 2 * OrbitConst::PI;
+
+    double dE = _kick(philocal) * (-1e-9) *
+                bunch->getCharge() * charge2current;
+    coords[j][5] += dE;
+    }
+  });
 }
 
 
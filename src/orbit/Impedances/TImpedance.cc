@@ -242,7 +242,7 @@ void TImpedance::assignImpedanceY(int n,
 void TImpedance::trackBunch(Bunch* bunch)
 {
   bunch->compress();
-  int nPartsGlobal = bunch->getSizeGlobal();
+  int nPartsGlobal = bunch->getStatistics()->getCount();
   if(nPartsGlobal < _nMacrosMin) return;
 
   SyncPart* sp = bunch->getSyncPart();
@@ -261,7 +261,7 @@ void TImpedance::trackBunch(Bunch* bunch)
   int n, i;
   double zmin, zmax;
 
-  bunchExtremaCalc->getExtremaZ(bunch, zmin, zmax);
+  bunchExtremaCalc->getExtremaZ(bunch->getStatisticsFromMemory(), zmin, zmax);
   double zextra = (_length - (zmax - zmin)) / 2.0;
   zmax += zextra;
   zmin  = zmax - _length;
@@ -282,7 +282,6 @@ void TImpedance::trackBunch(Bunch* bunch)
 
   double twopi = 2.0 * OrbitConst::PI;
   double macrophase;
-  double** part_coord_arr = bunch->coordArr();
 
   // FFT harmonics for X
 
@@ -301,11 +300,14 @@ void TImpedance::trackBunch(Bunch* bunch)
 
     _prepareToKick();
 
-    for(i = 0; i < bunch->getSize(); i++)
+    dispatchCoordRows(bunch, [&](auto part_coord_arr)
     {
-      macrophase = twopi * (part_coord_arr[i][4] - zmin) / _length;
-      part_coord_arr[i][1] += _kick(macrophase);
-    }
+      for(i = 0; i < bunch->getSize(); i++)
+      {
+        macrophase = twopi * (part_coord_arr[i][4] - zmin) / _length;
+        part_coord_arr[i][1] += _kick(macrophase);
+      }
+    });
   }
   // end X dimension
 
@@ -326,11 +328,14 @@ void TImpedance::trackBunch(Bunch* bunch)
 
     _prepareToKick();
 
-    for(i = 0; i < bunch->getSize(); i++)
+    dispatchCoordRows(bunch, [&](auto part_coord_arr)
     {
-      macrophase = twopi * (part_coord_arr[i][4] - zmin) / _length;
-      part_coord_arr[i][3] += _kick(macrophase);
-    }
+      for(i = 0; i < bunch->getSize(); i++)
+      {
+        macrophase = twopi * (part_coord_arr[i][4] - zmin) / _length;
+        part_coord_arr[i][3] += _kick(macrophase);
+      }
+    });
   }
   // end Y dimension
 
@@ -44,10 +44,24 @@ double& ParticleAttributes::attValue(int particle_index, int att_index){
   return bunch_->getParticleAttributeVal(particle_index, attr_ind_shift_ + att_index);
 }
 
+double ParticleAttributes::readAttValue(int particle_index, int att_index){
+  return bunch_->arrAttr[particle_index][attr_ind_shift_ + att_index];
+}
+
 double* ParticleAttributes::attArr(int particle_index){
   return &bunch_->getParticleAttributeVal(particle_index, attr_ind_shift_);
 }
 
+double* ParticleAttributes::attColumn(int att_index){
+  if(bunch_->arrAttrSlab == NULL) return NULL;
+  bunch_->coordEpoch++;
+  return bunch_->arrAttrSlab + attr_ind_shift_ + att_index;
+}
+
+int ParticleAttributes::getColumnStride(){
+  return bunch_->getParticleAttributesSize();
+}
+
 int ParticleAttributes::getAttSize(){
   return size;
 }
@@ -57,9 +57,23 @@ public:
   //returns the attribute value with particular index for particular particle
   double& attValue(int particle_index, int att_index);
 
+  //returns the attribute value for reading only. Unlike attValue() it does not
+  //mark the bunch as changed, so the cached bunch statistics stay valid.
+  double readAttValue(int particle_index, int att_index);
+
   //returns the attribute array for particular particle
   double* attArr(int particle_index);
 
+  //returns the pointer to the attribute with index att_index of the first
+  //particle. The values for the next particles are getColumnStride() doubles
+  //apart. The pointer is valid until the bunch memory is reallocated
+  //(adding particles or attributes).
+  double* attColumn(int att_index);
+
+  //returns the distance in doubles between the attribute values of the
+  //neighbouring particles
+  int getColumnStride();
+
   //returns the size of the attrubute bucket
   virtual int getAttSize();
 
@@ -33,3 +33,7 @@ ParticleMacroSize::~ParticleMacroSize()
 double& ParticleMacroSize::macrosize(int particle_index){
   return attValue(particle_index,0);
 }
+
+double ParticleMacroSize::readMacrosize(int particle_index){
+  return readAttValue(particle_index,0);
+}
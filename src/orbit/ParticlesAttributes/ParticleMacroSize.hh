@@ -35,6 +35,9 @@ public:
 
   double& macrosize(int particle_index);
 
+  //returns the macrosize for reading only without marking the bunch as changed
+  double readMacrosize(int particle_index);
+
 };
 
 ///////////////////////////////////////////////////////////////////////////
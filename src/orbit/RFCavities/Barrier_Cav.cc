@@ -104,30 +104,32 @@ void Barrier_Cav::trackBunch(Bunch* bunch)
 
   bunch->compress();
   SyncPart* syncPart = bunch->getSyncPart();
-  double** arr = bunch->coordArr();
 
-  for(int i = 0; i < bunch->getSize(); i++)
+  dispatchCoordRows(bunch, [&](auto arr)
   {
-    phase = -ZtoPhi * arr[i][4];
-    if(phase < -OrbitConst::PI) phase += 2.0 * OrbitConst::PI;
-    if(phase >  OrbitConst::PI) phase -= 2.0 * OrbitConst::PI;
-
-    dERF = 0.0;
-
-    if((phase > RFPhasep - dRFPhasep) &&
-       (phase < RFPhasep + dRFPhasep))
-    {
-        arg = OrbitConst::PI * (phase - RFPhasep) / (2.0 * dRFPhasep);
-        dERF = RFVoltage * cos(arg);
-    }
-
-    if((phase > RFPhasem - dRFPhasem) &&
-       (phase < RFPhasem + dRFPhasem))
+    for(int i = 0; i < bunch->getSize(); i++)
     {
-        arg = OrbitConst::PI * (phase - RFPhasem) / (2.0 * dRFPhasem);
-        dERF = -RFVoltage * cos(arg);
+      phase = -ZtoPhi * arr[i][4];
+      if(phase < -OrbitConst::PI) phase += 2.0 * OrbitConst::PI;
+      if(phase >  OrbitConst::PI) phase -= 2.0 * OrbitConst::PI;
+
+      dERF = 0.0;
+
+      if((phase > RFPhasep - dRFPhasep) &&
+         (phase < RFPhasep + dRFPhasep))
+      {
+          arg = OrbitConst::PI * (phase - RFPhasep) / (2.0 * dRFPhasep);
+          dERF = RFVoltage * cos(arg);
+      }
+
+      if((phase > RFPhasem - dRFPhasem) &&
+         (phase < RFPhasem + dRFPhasem))
+      {
+          arg = OrbitConst::PI * (phase - RFPhasem) / (2.0 * dRFPhasem);
+          dERF = -RFVoltage * cos(arg);
+      }
+
+      arr[i][5] += dERF;
     }
-
-    arr[i][5] += dERF;
-  }
+  });
 }
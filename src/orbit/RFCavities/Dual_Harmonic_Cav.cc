@@ -120,12 +120,14 @@ void Dual_Harmonic_Cav::trackBunch(Bunch* bunch)
 
   bunch->compress();
   SyncPart* syncPart = bunch->getSyncPart();
-  double** arr = bunch->coordArr();
 
-  for(int i = 0; i < bunch->getSize(); i++)
+  dispatchCoordRows(bunch, [&](auto arr)
   {
-    phase = -ZtoPhi * arr[i][4] * RFHNum ;
-	 dERF  = bunch->getCharge()* RFVoltage * (sin(phase) - sin(RFPhase) - RatioVoltage * ( sin(RFPhase + RatioRFHNum * (phase - RFPhase))  - sin(RFPhase2) ));
-    arr[i][5] += dERF;
-  }
+    for(int i = 0; i < bunch->getSize(); i++)
+    {
+      phase = -ZtoPhi * arr[i][4] * RFHNum ;
+  	 dERF  = bunch->getCharge()* RFVoltage * (sin(phase) - sin(RFPhase) - RatioVoltage * ( sin(RFPhase + RatioRFHNum * (phase - RFPhase))  - sin(RFPhase2) ));
+      arr[i][5] += dERF;
+    }
+  });
 }
@@ -108,20 +108,23 @@ void Frequency_Cav::trackBunch(Bunch* bunch)
 
   double x, y, r, rp, d_phi;
   double I0, I1;
-  for(int i = 0; i < bunch->getSize(); i++)
+  dispatchCoordRows(bunch, [&](auto arr)
   {
-    x  = bunch->x(i);
-    y  = bunch->y(i);
-    r  = sqrt(x * x + y * y);
-    I0 = bessi0(kr * r);
-    I1 = bessi1(kr * r);
-
-    //longitudinal-energy part
-    d_phi        = -bunch->z(i) * ZtoPhi;
-    bunch->dE(i) =  bunch->dE(i) - chargeE0TLsin * d_phi;
-
-    //transverse focusing
-    bunch->xp(i) =  bunch->xp(i) * adbtc_dmp + d_rp * x;
-    bunch->yp(i) =  bunch->yp(i) * adbtc_dmp + d_rp * y;
-  }
+    for(int i = 0; i < bunch->getSize(); i++)
+    {
+      x  = arr[i][0];
+      y  = arr[i][2];
+      r  = sqrt(x * x + y * y);
+      I0 = bessi0(kr * r);
+      I1 = bessi1(kr * r);
+
+      //longitudinal-energy part
+      d_phi        = -arr[i][4] * ZtoPhi;
+      arr[i][5] =  arr[i][5] - chargeE0TLsin * d_phi;
+
+      //transverse focusing
+      arr[i][1] =  arr[i][1] * adbtc_dmp + d_rp * x;
+      arr[i][3] =  arr[i][3] * adbtc_dmp + d_rp * y;
+    }
+  });
 }
@@ -90,7 +90,6 @@ void Harmonic_Cav::trackBunch(Bunch* bunch)
 
   bunch->compress();
   SyncPart* syncPart = bunch->getSyncPart();
-  double** arr = bunch->coordArr();
 
   double mass     = bunch->getMass();
   double enew     = mass + syncPart->getEnergy();
@@ -103,12 +102,15 @@ void Harmonic_Cav::trackBunch(Bunch* bunch)
   double betaold  = pow(betaold2, 0.5);
   double adiabat  = gammaold * betaold / (gammanew * betanew);
 
-  for(int i = 0; i < bunch->getSize(); i++)
+  dispatchCoordRows(bunch, [&](auto arr)
   {
-    phase = -ZtoPhi * arr[i][4];
-    dERF  = bunch->getCharge()* RFVoltage * sin(RFHNum * phase + RFPhase);
-    arr[i][5] += dERF - dESync;
-    arr[i][1] *= adiabat;
-    arr[i][3] *= adiabat;
-  }
+    for(int i = 0; i < bunch->getSize(); i++)
+    {
+      phase = -ZtoPhi * arr[i][4];
+      dERF  = bunch->getCharge()* RFVoltage * sin(RFHNum * phase + RFPhase);
+      arr[i][5] += dERF - dESync;
+      arr[i][1] *= adiabat;
+      arr[i][3] *= adiabat;
+    }
+  });
 }
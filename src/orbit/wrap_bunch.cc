@@ -12,11 +12,13 @@
 #include "wrap_syncpart.hh"
 #include "wrap_bunch_twiss_analysis.hh"
 #include "wrap_bunch_tune_analysis.hh"
+#include "wrap_bunch_trajectory_recorder.hh"
 #include "wrap_synch_part_redefinition_z_de.hh"
 
 #include "pyORBIT_Object.hh"
 
 #include "Bunch.hh"
+#include "BunchStatistics.hh"
 #include "ParticleAttributesFactory.hh"
 
 namespace wrap_orbit_bunch{
@@ -101,6 +103,20 @@ namespace wrap_orbit_bunch{
     return Py_None;
   }
 
+  //Sets the BufferError and returns 0 if the bunch memory is exported to
+  //Python buffers and it should be reallocated to add nParts particles.
+  //nParts < 0 is for the methods that reallocate the memory anyway.
+  //Like bytearray, the bunch refuses to move the exported memory.
+  static int checkBufferExports(Bunch* cpp_bunch, int nParts, const char* method_name){
+    int nExports = cpp_bunch->getBufferExportsCount();
+    if(nExports == 0) return 1;
+    if(nParts >= 0 && cpp_bunch->canAddParticles(nParts) == 1) return 1;
+    PyErr_Format(PyExc_BufferError,
+      "PyBunch - %s - the bunch memory is used by %d Python buffers (memoryview, numpy arrays etc.), release them first.",
+      method_name,nExports);
+    return 0;
+  }
+
   //---------------------------------------------------------------
   //
   // add and remove particles, compress etc.
@@ -119,6 +135,7 @@ namespace wrap_orbit_bunch{
     if(!PyArg_ParseTuple(args,"dddddd:coordinates",&x,&xp,&y,&yp,&z,&zp)){
       error("PyBunch - addParticle - cannot parse arguments! It should be (x,xp,y,yp,z,zp)");
     }
+    if(!checkBufferExports(cpp_bunch,1,"addParticle")) return NULL;
     int ind = cpp_bunch->addParticle(x,xp,y,yp,z,zp);
     return Py_BuildValue("i",ind);
   }
@@ -177,6 +194,220 @@ namespace wrap_orbit_bunch{
     return Py_None;
   }
 
+  //Copies numbers from the Python buffer (numpy array) or the nested
+  //sequence into the vector. Returns 0 if the object cannot be converted.
+  static int pyNumbersToVector(PyObject* pyObj, std::vector<double>& vals){
+    Py_buffer view;
+    if(PyObject_GetBuffer(pyObj,&view,PyBUF_FORMAT | PyBUF_C_CONTIGUOUS) == 0){
+      std::string format(view.format != NULL ? view.format : "B");
+      if(format == "d" || format == "<d" || format == "=d" || format == "@d"){
+        double* arr = (double*) view.buf;
+        vals.insert(vals.end(),arr,arr + view.len/sizeof(double));
+        PyBuffer_Release(&view);
+        return 1;
+      }
+      PyBuffer_Release(&view);
+    }
+    else{
+      PyErr_Clear();
+    }
+    if(PyNumber_Check(pyObj) && !PySequence_Check(pyObj)){
+      double val = PyFloat_AsDouble(pyObj);
+      if(PyErr_Occurred()){
+        PyErr_Clear();
+        return 0;
+      }
+      vals.push_back(val);
+      return 1;
+    }
+    PyObject* pySeq = PySequence_Fast(pyObj,"");
+    if(pySeq == NULL){
+      PyErr_Clear();
+      return 0;
+    }
+    int res = 1;
+    for(Py_ssize_t i = 0, n = PySequence_Fast_GET_SIZE(pySeq); i < n && res == 1; i++){
+      res = pyNumbersToVector(PySequence_Fast_GET_ITEM(pySeq,i),vals);
+    }
+    Py_DECREF(pySeq);
+    return res;
+  }
+
+  //Returns 1 if the object is the boolean numpy array or a sequence of bools
+  static int isPyBoolMask(PyObject* pyObj){
+    Py_buffer view;
+    if(PyObject_GetBuffer(pyObj,&view,PyBUF_FORMAT) == 0){
+      int res = 0;
+      if(view.format != NULL && std::string(view.format) == "?") res = 1;
+      PyBuffer_Release(&view);
+      return res;
+    }
+    PyErr_Clear();
+    if(!PySequence_Check(pyObj) || PySequence_Size(pyObj) <= 0) return 0;
+    PyObject* pyItem = PySequence_GetItem(pyObj,0);
+    if(pyItem == NULL){
+      PyErr_Clear();
+      return 0;
+    }
+    int res = PyBool_Check(pyItem) ? 1 : 0;
+    Py_DECREF(pyItem);
+    return res;
+  }
+
+  //adds many particles to the Bunch object at once
+  //  (coords) - the [n][6] array or the sequence of (x,xp,y,yp,z,zp)
+  //  (x,xp,y,yp,z,zp) - 6 arrays with the same length
+  //returns the index of the first new particle
+  //this is implementation of the addParticles(...) method
+  static PyObject* Bunch_addParticles(PyObject *self, PyObject *args){
+    Bunch* cpp_bunch = (Bunch*) ((pyORBIT_Object *) self)->cpp_obj;
+    int nVars = PyTuple_Size(args);
+    if(nVars == 1){
+      std::vector<double> coords;
+      if(!pyNumbersToVector(PyTuple_GetItem(args,0),coords) || coords.size() % 6 != 0){
+        error("PyBunch - addParticles(coords) - coords should be the [n][6] array");
+      }
+      int nParts = coords.size()/6;
+      if(!checkBufferExports(cpp_bunch,nParts,"addParticles")) return NULL;
+      int ind = cpp_bunch->addParticles(nParts,coords.data());
+      return Py_BuildValue("i",ind);
+    }
+    if(nVars == 6){
+      std::vector<double> components[6];
+      const double* comp_ptrs[6];
+      for(int j = 0; j < 6; j++){
+        if(!pyNumbersToVector(PyTuple_GetItem(args,j),components[j]) ||
+           components[j].size() != components[0].size()){
+          error("PyBunch - addParticles(x,xp,y,yp,z,zp) - 6 arrays of the same length are needed");
+        }
+        comp_ptrs[j] = components[j].data();
+      }
+      if(!checkBufferExports(cpp_bunch,(int) components[0].size(),"addParticles")) return NULL;
+      int ind = cpp_bunch->addParticles((int) components[0].size(),comp_ptrs);
+      return Py_BuildValue("i",ind);
+    }
+    error("PyBunch - addParticles(coords) or addParticles(x,xp,y,yp,z,zp)");
+    Py_INCREF(Py_None);
+    return Py_None;
+  }
+
+  //removes many particles from the Bunch object in one compression pass
+  //  (mask_or_indices[,lostbunch]) - the boolean mask with getTotalCount() size
+  //  or the particles' indices. The removed particles are added to the lostbunch.
+  //returns the number of removed particles
+  //this is implementation of the deleteParticles(...) method
+  static PyObject* Bunch_deleteParticles(PyObject *self, PyObject *args){
+    Bunch* cpp_bunch = (Bunch*) ((pyORBIT_Object *) self)->cpp_obj;
+    PyObject* pyMask = NULL;
+    PyObject* pyLostBunch = NULL;
+    //NO NEW OBJECT CREATED BY PyArg_ParseTuple! NO NEED OF Py_DECREF()
+    if(!PyArg_ParseTuple(args,"O|O:deleteParticles",&pyMask,&pyLostBunch)){
+      error("PyBunch - deleteParticles(mask_or_indices[,lostbunch]) - parameters are needed");
+    }
+    Bunch* cpp_lost_bunch = NULL;
+    if(pyLostBunch != NULL && pyLostBunch != Py_None){
+      if(!PyObject_IsInstance(pyLostBunch,(PyObject*) self->ob_type)){
+        error("PyBunch - deleteParticles(mask_or_indices,lostbunch) - lostbunch should be a Bunch");
+      }
+      cpp_lost_bunch = (Bunch*) ((pyORBIT_Object *) pyLostBunch)->cpp_obj;
+      if(cpp_lost_bunch == cpp_bunch){
+        error("PyBunch - deleteParticles(mask_or_indices,lostbunch) - lostbunch should be another Bunch");
+      }
+    }
+    int nTotal = cpp_bunch->getTotalCount();
+    int isMask = isPyBoolMask(pyMask);
+    std::vector<double> vals;
+    if(!pyNumbersToVector(pyMask,vals)){
+      error("PyBunch - deleteParticles(mask_or_indices[,lostbunch]) - cannot parse the mask or indices");
+    }
+    std::vector<int> mask(nTotal,0);
+    if(isMask == 1){
+      if((int) vals.size() != nTotal){
+        error("PyBunch - deleteParticles(mask[,lostbunch]) - the mask size should be getTotalCount()");
+      }
+      for(int i = 0; i < nTotal; i++){
+        if(vals[i] != 0.) mask[i] = 1;
+      }
+    }
+    else{
+      for(int i = 0, n = vals.size(); i < n; i++){
+        int ind = (int) vals[i];
+        if(ind < 0 || ind >= nTotal){
+          error("PyBunch - deleteParticles(indices[,lostbunch]) - the index is out of range");
+        }
+        mask[ind] = 1;
+      }
+    }
+    if(cpp_lost_bunch != NULL){
+      //the lost bunch gets the particles' attributes of this bunch if it does not have them
+      int nParts = 0;
+      for(int i = 0; i < nTotal; i++){
+        nParts += mask[i];
+      }
+      std::vector<std::string> names;
+      cpp_bunch->getParticleAttributesNames(names);
+      for(int i = 0, n = names.size(); i < n; i++){
+        if(cpp_lost_bunch->hasParticleAttributes(names[i]) <= 0) nParts = -1;
+      }
+      if(!checkBufferExports(cpp_lost_bunch,nParts,"deleteParticles(mask_or_indices,lostbunch)")) return NULL;
+    }
+    int nLost = cpp_bunch->deleteParticles(mask.data(),cpp_lost_bunch);
+    return Py_BuildValue("i",nLost);
+  }
+
+  //moves particles between CPUs if the load imbalance is larger than tolerance
+  //  () or (tolerance) - the default tolerance is 0.1
+  //returns the global number of moved particles
+  //this is implementation of the rebalance(...) method
+  static PyObject* Bunch_rebalance(PyObject *self, PyObject *args){
+    Bunch* cpp_bunch = (Bunch*) ((pyORBIT_Object *) self)->cpp_obj;
+    double tolerance = 0.1;
+    //NO NEW OBJECT CREATED BY PyArg_ParseTuple! NO NEED OF Py_DECREF()
+    if(!PyArg_ParseTuple(args,"|d:rebalance",&tolerance)){
+      error("PyBunch - rebalance([tolerance]) - the tolerance should be a number");
+    }
+    int nMoved = cpp_bunch->rebalance(tolerance);
+    if(nMoved < 0){
+      PyErr_SetString(PyExc_BufferError,
+        "PyBunch - rebalance - the bunch memory is used by Python buffers (memoryview, numpy arrays etc.) on one of CPUs, release them first.");
+      return NULL;
+    }
+    return Py_BuildValue("i",nMoved);
+  }
+
+  //changes the order of macro-particles: the new particle i is the old particle order[i]
+  //  (order) - the permutation of indices 0...(getSize()-1) of the compressed bunch
+  //this is implementation of the reorderParticles(...) method
+  static PyObject* Bunch_reorderParticles(PyObject *self, PyObject *args){
+    Bunch* cpp_bunch = (Bunch*) ((pyORBIT_Object *) self)->cpp_obj;
+    PyObject* pyOrder = NULL;
+    //NO NEW OBJECT CREATED BY PyArg_ParseTuple! NO NEED OF Py_DECREF()
+    if(!PyArg_ParseTuple(args,"O:reorderParticles",&pyOrder)){
+      error("PyBunch - reorderParticles(order) - the order of particles is needed");
+    }
+    std::vector<double> vals;
+    if(!pyNumbersToVector(pyOrder,vals)){
+      error("PyBunch - reorderParticles(order) - cannot parse the order of particles");
+    }
+    cpp_bunch->compress();
+    int nParts = cpp_bunch->getSize();
+    if((int) vals.size() != nParts){
+      error("PyBunch - reorderParticles(order) - the order size should be getSize()");
+    }
+    std::vector<int> order(nParts);
+    std::vector<char> used(nParts,0);
+    for(int i = 0; i < nParts; i++){
+      order[i] = (int) vals[i];
+      if(order[i] < 0 || order[i] >= nParts || used[order[i]] != 0){
+        error("PyBunch - reorderParticles(order) - the order should be a permutation of 0...(getSize()-1)");
+      }
+      used[order[i]] = 1;
+    }
+    if(nParts > 0) cpp_bunch->reorderParticles(order.data());
+    Py_INCREF(Py_None);
+    return Py_None;
+  }
+
   //---------------------------------------------------------------
   //
   // related to the macro-particles' coordinates
@@ -203,7 +434,7 @@ namespace wrap_orbit_bunch{
         if(!PyArg_ParseTuple(args,"i:x",&index)){
           error("PyBunch - x(index) - index is needed");
         }
-        val = cpp_bunch->x(index);
+        val = cpp_bunch->currentCoordVal(index,0);
       }
       else{
         //NO NEW OBJECT CREATED BY PyArg_ParseTuple! NO NEED OF Py_DECREF()
@@ -242,7 +473,7 @@ namespace wrap_orbit_bunch{
         if(!PyArg_ParseTuple(args,"i:y",&index)){
           error("PyBunch - y(index) - index is needed");
         }
-        val = cpp_bunch->y(index);
+        val = cpp_bunch->currentCoordVal(index,2);
       }
       else{
         //NO NEW OBJECT CREATED BY PyArg_ParseTuple! NO NEED OF Py_DECREF()
@@ -281,7 +512,7 @@ namespace wrap_orbit_bunch{
         if(!PyArg_ParseTuple(args,"i:z",&index)){
           error("PyBunch - z(index) - index is needed");
         }
-        val = cpp_bunch->z(index);
+        val = cpp_bunch->currentCoordVal(index,4);
       }
       else{
         //NO NEW OBJECT CREATED BY PyArg_ParseTuple! NO NEED OF Py_DECREF()
@@ -321,7 +552,7 @@ namespace wrap_orbit_bunch{
         if(!PyArg_ParseTuple(args,"i:px",&index)){
           error("PyBunch - px(index) - index is needed");
         }
-        val = cpp_bunch->px(index);
+        val = cpp_bunch->currentCoordVal(index,1);
       }
       else{
         //NO NEW OBJECT CREATED BY PyArg_ParseTuple! NO NEED OF Py_DECREF()
@@ -360,7 +591,7 @@ namespace wrap_orbit_bunch{
         if(!PyArg_ParseTuple(args,"i:py",&index)){
           error("PyBunch - py(index) - index is needed");
         }
-        val = cpp_bunch->py(index);
+        val = cpp_bunch->currentCoordVal(index,3);
       }
       else{
         //NO NEW OBJECT CREATED BY PyArg_ParseTuple! NO NEED OF Py_DECREF()
@@ -399,7 +630,7 @@ namespace wrap_orbit_bunch{
         if(!PyArg_ParseTuple(args,"i:pz",&index)){
           error("PyBunch - pz(index) - index is needed");
         }
-        val = cpp_bunch->pz(index);
+        val = cpp_bunch->currentCoordVal(index,5);
       }
       else{
         //NO NEW OBJECT CREATED BY PyArg_ParseTuple! NO NEED OF Py_DECREF()
@@ -763,6 +994,7 @@ namespace wrap_orbit_bunch{
       error("PyBunch - addPartAttr(name, [param_dict]) - a particle attr. name are needed");
     }
     std::string attr_name_str(attr_name);
+    if(cpp_bunch->hasParticleAttributes(attr_name_str) == 0 && !checkBufferExports(cpp_bunch,-1,"addPartAttr")) return NULL;
         std::map<std::string,double> part_attr_dict;
         if(py_attrParamsDict != NULL){
             if(!PyDict_Check(py_attrParamsDict)){
@@ -793,6 +1025,7 @@ namespace wrap_orbit_bunch{
       error("PyBunch - removePartAttr(name) - pyBunch object and a particle attr. name are needed");
     }
     std::string attr_name_str(attr_name);
+    if(cpp_bunch->hasParticleAttributes(attr_name_str) == 1 && !checkBufferExports(cpp_bunch,-1,"removePartAttr")) return NULL;
     cpp_bunch->removeParticleAttributes(attr_name_str);
     Py_INCREF(Py_None);
     return Py_None;
@@ -801,6 +1034,7 @@ namespace wrap_orbit_bunch{
   //Removes all particles' attributes from the bunch
   static PyObject* Bunch_removeAllPartAttr(PyObject *self, PyObject *args){
         Bunch* cpp_bunch = (Bunch*) ((pyORBIT_Object *) self)->cpp_obj;
+    if(cpp_bunch->getParticleAttributesSize() > 0 && !checkBufferExports(cpp_bunch,-1,"removeAllPartAttr")) return NULL;
     cpp_bunch->removeAllParticleAttributes();
     Py_INCREF(Py_None);
     return Py_None;
@@ -861,6 +1095,7 @@ namespace wrap_orbit_bunch{
   //temporary removes and memorizes all particles' attributes names
   static PyObject* Bunch_clearAllPartAttrAndMemorize(PyObject *self, PyObject *args){
         Bunch* cpp_bunch = (Bunch*) ((pyORBIT_Object *) self)->cpp_obj;
+    if(cpp_bunch->getParticleAttributesSize() > 0 && !checkBufferExports(cpp_bunch,-1,"clearAllPartAttrAndMemorize")) return NULL;
     cpp_bunch->clearAllParticleAttributesAndMemorize();
     Py_INCREF(Py_None);
     return Py_None;
@@ -869,6 +1104,7 @@ namespace wrap_orbit_bunch{
   //restores all particles' attributes names from memory
   static PyObject* Bunch_restoreAllPartAttrFromMemory(PyObject *self, PyObject *args){
         Bunch* cpp_bunch = (Bunch*) ((pyORBIT_Object *) self)->cpp_obj;
+    if(!checkBufferExports(cpp_bunch,-1,"restoreAllPartAttrFromMemory")) return NULL;
     cpp_bunch->restoreAllParticleAttributesFromMemory();
     Py_INCREF(Py_None);
     return Py_None;
@@ -945,6 +1181,7 @@ namespace wrap_orbit_bunch{
     if(!PyArg_ParseTuple(args,"s:readPartAttr",&file_name)){
       error("PyBunch - readPartAttr(fileName) - pyBunch object and file name are needed");
     }
+    if(!checkBufferExports(cpp_bunch,-1,"readPartAttr")) return NULL;
     cpp_bunch->readParticleAttributes(file_name);
     Py_INCREF(Py_None);
     return Py_None;
@@ -1056,7 +1293,17 @@ namespace wrap_orbit_bunch{
   //
   //----------------------------------------------------------------
 
-  //Prints bunch into the std::cout stream
+  //Returns 1 if the bunch file should be in the binary format (.bin extension)
+  static int isBinaryBunchFileName(const char* file_name){
+    std::string name(file_name);
+    std::string ext(".bin");
+    if(name.size() <= ext.size()) return 0;
+    if(name.compare(name.size() - ext.size(),ext.size(),ext) == 0) return 1;
+    return 0;
+  }
+
+  //Prints bunch into the std::cout stream or the file.
+  //The file with the .bin extension will be in the binary format.
   static PyObject* Bunch_dumpBunch(PyObject *self, PyObject *args){
         Bunch* cpp_bunch = (Bunch*) ((pyORBIT_Object *) self)->cpp_obj;
     //if nVars == 0 dumpBunchs into std::cout
@@ -1072,7 +1319,12 @@ namespace wrap_orbit_bunch{
         if(!PyArg_ParseTuple(args,"s:dumpBunch",&file_name)){
           error("PyBunch - dumpBunch(fileName) - a new value are needed");
         }
-        cpp_bunch->print(file_name);
+        if(isBinaryBunchFileName(file_name)){
+          cpp_bunch->dumpBunchBinary(file_name);
+        }
+        else{
+          cpp_bunch->print(file_name);
+        }
       }
     }
     else{
@@ -1091,6 +1343,7 @@ namespace wrap_orbit_bunch{
     int nVars = PyTuple_Size(args);
     const char* file_name = NULL;
     int nParts = 0;
+    if(!checkBufferExports(cpp_bunch,-1,"readBunch")) return NULL;
     if(nVars == 1 ||  nVars == 2){
       if(nVars == 1){
         //NO NEW OBJECT CREATED BY PyArg_ParseTuple! NO NEED OF Py_DECREF()
@@ -1099,7 +1352,12 @@ namespace wrap_orbit_bunch{
         }
                 cpp_bunch->initBunchAttributes(file_name);
                 cpp_bunch->readParticleAttributes(file_name);
-        cpp_bunch->readBunchCoords(file_name);
+        if(isBinaryBunchFileName(file_name)){
+          cpp_bunch->readBunchCoordsBinary(file_name);
+        }
+        else{
+          cpp_bunch->readBunchCoords(file_name);
+        }
       }
       else{
         //NO NEW OBJECT CREATED BY PyArg_ParseTuple! NO NEED OF Py_DECREF()
@@ -1108,9 +1366,28 @@ namespace wrap_orbit_bunch{
         }
                 cpp_bunch->initBunchAttributes(file_name);
                 cpp_bunch->readParticleAttributes(file_name);
-        cpp_bunch->readBunchCoords(file_name,nParts);
+        if(isBinaryBunchFileName(file_name)){
+          cpp_bunch->readBunchCoordsBinary(file_name,nParts);
+        }
+        else{
+          cpp_bunch->readBunchCoords(file_name,nParts);
+        }
       }
     }
+    else if(nVars == 3){
+      //the binary file only: every CPU reads nLocalParts particles
+      int nLocalParts = -1;
+      //NO NEW OBJECT CREATED BY PyArg_ParseTuple! NO NEED OF Py_DECREF()
+      if(!PyArg_ParseTuple(args,"sii:read",&file_name,&nParts,&nLocalParts)){
+        error("PyBunch - readBunch(fileName,nParts,nLocalParts) - file name, and numbers of particles are needed");
+      }
+      if(!isBinaryBunchFileName(file_name)){
+        error("PyBunch - readBunch(fileName,nParts,nLocalParts) - only for the binary .bin files");
+      }
+      cpp_bunch->initBunchAttributes(file_name);
+      cpp_bunch->readParticleAttributes(file_name);
+      cpp_bunch->readBunchCoordsBinary(file_name,nParts,nLocalParts);
+    }
     else{
       error("PyBunch. You should call readBunch(file_name) or readBunch(file_name,nParts)");
     }
@@ -1127,6 +1404,7 @@ namespace wrap_orbit_bunch{
             error("PyBunch - copyEmptyBunchTo(pyBunch) - target pyBunch object is needed");
         }
         Bunch* cpp_target_bunch = (Bunch*) ((pyORBIT_Object *) pyBunch_Target)->cpp_obj;
+        if(!checkBufferExports(cpp_target_bunch,-1,"copyEmptyBunchTo")) return NULL;
         cpp_bunch->copyEmptyBunchTo(cpp_target_bunch);
     Py_INCREF(Py_None);
     return Py_None;
@@ -1141,6 +1419,7 @@ namespace wrap_orbit_bunch{
             error("PyBunch - copyBunchTo(pyBunch) - target pyBunch object is needed");
         }
         Bunch* cpp_target_bunch = (Bunch*) ((pyORBIT_Object *) pyBunch_Target)->cpp_obj;
+        if(!checkBufferExports(cpp_target_bunch,-1,"copyBunchTo")) return NULL;
         cpp_bunch->copyBunchTo(cpp_target_bunch);
         Py_INCREF(Py_None);
     return Py_None;
@@ -1156,11 +1435,400 @@ namespace wrap_orbit_bunch{
             error("PyBunch - addParticlesTo(pyBunch) - target pyBunch object is needed");
         }
         Bunch* cpp_target_bunch =(Bunch*) ((pyORBIT_Object *) pyBunch_Target)->cpp_obj ;
+        if(!checkBufferExports(cpp_target_bunch,cpp_bunch->getSize(),"addParticlesTo")) return NULL;
         cpp_bunch->addParticlesTo(cpp_target_bunch);
         Py_INCREF(Py_None);
     return Py_None;
   }
 
+  //---------------------------------------------------------------
+  //
+  // Python buffer protocol (memoryview, numpy arrays) support.
+  // The buffers give the direct access to the bunch memory.
+  //
+  //----------------------------------------------------------------
+
+  //types of the bunch arrays that can be exported into Python buffers
+  static const int BUNCH_COORD_ARR = 0;
+  static const int BUNCH_FLAG_ARR = 1;
+  static const int BUNCH_PART_ATTR_ARR = 2;
+  static const int BUNCH_PART_ATTR_COLUMN = 3;
+
+  //The helper class for the export of the coordinates, flags, or
+  //particles' attributes array. It keeps the reference to the python Bunch.
+  //The column is the attribute index for the attribute column export.
+  typedef struct {
+    PyObject_HEAD
+    PyObject* pyBunch;
+    PyObject* pyAttrName;
+    int arrType;
+    int column;
+  } pyBunchArrayView;
+
+  //fills the Py_buffer structure for the bunch array of the particular type
+  static int fillBunchBuffer(PyObject* exporter, Bunch* cpp_bunch, Py_buffer* view, int flags, int arrType, PyObject* pyAttrName, int column){
+    if(view == NULL){
+      PyErr_SetString(PyExc_BufferError,"PyBunch - buffer - NULL view in getbuffer.");
+      return -1;
+    }
+    int nParts = cpp_bunch->getSize();
+    int nCols = 1;
+    int itemsize = sizeof(double);
+    int rowStride = 0;
+    int readonly = 0;
+    void* buf = NULL;
+    const char* format = "d";
+    if(arrType == BUNCH_COORD_ARR){
+      nCols = 6;
+      rowStride = 6*sizeof(double);
+      buf = (void*) cpp_bunch->coordSlab();
+    }
+    if(arrType == BUNCH_FLAG_ARR){
+      itemsize = sizeof(int);
+      rowStride = sizeof(int);
+      readonly = 1;
+      format = "i";
+      buf = (void*) cpp_bunch->flagArr();
+    }
+    if(arrType == BUNCH_PART_ATTR_ARR || arrType == BUNCH_PART_ATTR_COLUMN){
+      std::string attr_name_str(PyUnicode_AsUTF8(pyAttrName));
+      ParticleAttributes* partAttr = cpp_bunch->findParticleAttributes(attr_name_str);
+      if(partAttr == NULL){
+        PyErr_Format(PyExc_BufferError,"PyBunch - buffer - there is no particles' attributes with name: %s",attr_name_str.c_str());
+        return -1;
+      }
+      if(arrType == BUNCH_PART_ATTR_COLUMN && column >= partAttr->getAttSize()){
+        PyErr_Format(PyExc_BufferError,"PyBunch - buffer - the attributes %s have no index %d",attr_name_str.c_str(),column);
+        return -1;
+      }
+      nCols = partAttr->getAttSize();
+      rowStride = partAttr->getColumnStride()*sizeof(double);
+      buf = (void*) partAttr->attColumn(0);
+      if(arrType == BUNCH_PART_ATTR_COLUMN){
+        nCols = 1;
+        buf = (void*) partAttr->attColumn(column);
+      }
+    }
+    if(readonly == 1 && (flags & PyBUF_WRITABLE) == PyBUF_WRITABLE){
+      PyErr_SetString(PyExc_BufferError,"PyBunch - buffer - the flags array is read-only.");
+      return -1;
+    }
+    int ndim = 2;
+    if(arrType == BUNCH_FLAG_ARR || arrType == BUNCH_PART_ATTR_COLUMN) ndim = 1;
+    int contiguous = 0;
+    if(rowStride == nCols*itemsize) contiguous = 1;
+    if(contiguous == 0 && (flags & PyBUF_STRIDES) != PyBUF_STRIDES){
+      PyErr_SetString(PyExc_BufferError,"PyBunch - buffer - the array is not contiguous, strides are needed.");
+      return -1;
+    }
+    //shape and strides are kept in the internal memory of the buffer
+    Py_ssize_t* shape_strides = (Py_ssize_t*) PyMem_Malloc(4*sizeof(Py_ssize_t));
+    if(shape_strides == NULL){
+      PyErr_NoMemory();
+      return -1;
+    }
+    shape_strides[0] = nParts;
+    shape_strides[1] = nCols;
+    shape_strides[2] = rowStride;
+    shape_strides[3] = itemsize;
+    view->buf = buf;
+    view->obj = exporter;
+    Py_INCREF(exporter);
+    view->len = ((Py_ssize_t) nParts)*nCols*itemsize;
+    view->itemsize = itemsize;
+    view->readonly = readonly;
+    view->ndim = ndim;
+    view->format = NULL;
+    if((flags & PyBUF_FORMAT) == PyBUF_FORMAT) view->format = const_cast<char*>(format);
+    view->shape = NULL;
+    if((flags & PyBUF_ND) == PyBUF_ND) view->shape = shape_strides;
+    view->strides = NULL;
+    if((flags & PyBUF_STRIDES) == PyBUF_STRIDES) view->strides = shape_strides + 2;
+    view->suboffsets = NULL;
+    view->internal = (void*) shape_strides;
+    cpp_bunch->addBufferExport();
+    return 0;
+  }
+
+  //the Bunch class itself exports the coordinates array [nParts][6]
+  static int Bunch_getbuffer(PyObject* self, Py_buffer* view, int flags){
+    Bunch* cpp_bunch = (Bunch*) ((pyORBIT_Object *) self)->cpp_obj;
+    return fillBunchBuffer(self,cpp_bunch,view,flags,BUNCH_COORD_ARR,NULL,0);
+  }
+
+  static void Bunch_releasebuffer(PyObject* self, Py_buffer* view){
+    Bunch* cpp_bunch = (Bunch*) ((pyORBIT_Object *) self)->cpp_obj;
+    PyMem_Free(view->internal);
+    cpp_bunch->releaseBufferExport();
+  }
+
+  static PyBufferProcs BunchBufferProcs = {
+    (getbufferproc) Bunch_getbuffer,
+    (releasebufferproc) Bunch_releasebuffer
+  };
+
+  static int BunchArrayView_getbuffer(PyObject* self, Py_buffer* view, int flags){
+    pyBunchArrayView* pyView = (pyBunchArrayView*) self;
+    Bunch* cpp_bunch = (Bunch*) ((pyORBIT_Object *) pyView->pyBunch)->cpp_obj;
+    return fillBunchBuffer(self,cpp_bunch,view,flags,pyView->arrType,pyView->pyAttrName,pyView->column);
+  }
+
+  static void BunchArrayView_releasebuffer(PyObject* self, Py_buffer* view){
+    pyBunchArrayView* pyView = (pyBunchArrayView*) self;
+    Bunch* cpp_bunch = (Bunch*) ((pyORBIT_Object *) pyView->pyBunch)->cpp_obj;
+    PyMem_Free(view->internal);
+    cpp_bunch->releaseBufferExport();
+  }
+
+  static void BunchArrayView_del(pyBunchArrayView* self){
+    Py_XDECREF(self->pyBunch);
+    Py_XDECREF(self->pyAttrName);
+    self->ob_base.ob_type->tp_free((PyObject*)self);
+  }
+
+  static PyBufferProcs BunchArrayViewBufferProcs = {
+    (getbufferproc) BunchArrayView_getbuffer,
+    (releasebufferproc) BunchArrayView_releasebuffer
+  };
+
+  static PyTypeObject pyORBIT_BunchArrayView_Type = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    "BunchArrayView", /*tp_name*/
+    sizeof(pyBunchArrayView), /*tp_basicsize*/
+    0, /*tp_itemsize*/
+    (destructor) BunchArrayView_del, /*tp_dealloc*/
+    0, /*tp_print*/
+    0, /*tp_getattr*/
+    0, /*tp_setattr*/
+    0, /*tp_compare*/
+    0, /*tp_repr*/
+    0, /*tp_as_number*/
+    0, /*tp_as_sequence*/
+    0, /*tp_as_mapping*/
+    0, /*tp_hash */
+    0, /*tp_call*/
+    0, /*tp_str*/
+    0, /*tp_getattro*/
+    0, /*tp_setattro*/
+    &BunchArrayViewBufferProcs, /*tp_as_buffer*/
+    Py_TPFLAGS_DEFAULT, /*tp_flags*/
+    "The exporter of the Bunch arrays into Python buffers", /* tp_doc */
+  };
+
+  //returns the memoryview for the bunch array of the particular type
+  static PyObject* makeBunchMemoryView(PyObject* pyBunch, int arrType, PyObject* pyAttrName, int column){
+    pyBunchArrayView* pyView = PyObject_New(pyBunchArrayView,&pyORBIT_BunchArrayView_Type);
+    if(pyView == NULL) return NULL;
+    Py_INCREF(pyBunch);
+    Py_XINCREF(pyAttrName);
+    pyView->pyBunch = pyBunch;
+    pyView->pyAttrName = pyAttrName;
+    pyView->arrType = arrType;
+    pyView->column = column;
+    PyObject* memView = PyMemoryView_FromObject((PyObject*) pyView);
+    Py_DECREF(pyView);
+    return memView;
+  }
+
+  //Returns the memoryview with the [nParts][6] shape for the coordinates
+  //of the macro-particles. There is no copy of the data.
+  //this is implementation of the coordArr() method
+  static PyObject* Bunch_coordArr(PyObject *self, PyObject *args){
+    return makeBunchMemoryView(self,BUNCH_COORD_ARR,NULL,0);
+  }
+
+  //Returns the read-only memoryview with the [nParts] shape for the flags
+  //of the macro-particles. There is no copy of the data.
+  //this is implementation of the flagArr() method
+  static PyObject* Bunch_flagArr(PyObject *self, PyObject *args){
+    return makeBunchMemoryView(self,BUNCH_FLAG_ARR,NULL,0);
+  }
+
+  //Returns the memoryview with the [nParts][attr. size] shape for
+  //the particles' attributes with a particular name. There is no copy of the data.
+  //this is implementation of the partAttrArr(attr_name) method
+  static PyObject* Bunch_partAttrArr(PyObject *self, PyObject *args){
+    Bunch* cpp_bunch = (Bunch*) ((pyORBIT_Object *) self)->cpp_obj;
+    PyObject* pyAttrName = NULL;
+    //NO NEW OBJECT CREATED BY PyArg_ParseTuple! NO NEED OF Py_DECREF()
+    if(!PyArg_ParseTuple(args,"U:partAttrArr",&pyAttrName)){
+      error("PyBunch - partAttrArr(attr_name) - a particles' attr. name is needed");
+    }
+    std::string attr_name_str(PyUnicode_AsUTF8(pyAttrName));
+    if(cpp_bunch->hasParticleAttributes(attr_name_str) == 0){
+      error("PyBunch - partAttrArr(attr_name) - there is no particles' attributes with this name");
+    }
+    return makeBunchMemoryView(self,BUNCH_PART_ATTR_ARR,pyAttrName,0);
+  }
+
+  //Returns the memoryview with the [nParts] shape for one column (attribute index)
+  //of the particles' attributes with a particular name. There is no copy of the data.
+  //The name is resolved once, so the view can be used in loops over particles.
+  //this is implementation of the partAttrColumn(attr_name[,index]) method
+  static PyObject* Bunch_partAttrColumn(PyObject *self, PyObject *args){
+    Bunch* cpp_bunch = (Bunch*) ((pyORBIT_Object *) self)->cpp_obj;
+    PyObject* pyAttrName = NULL;
+    int column = 0;
+    //NO NEW OBJECT CREATED BY PyArg_ParseTuple! NO NEED OF Py_DECREF()
+    if(!PyArg_ParseTuple(args,"U|i:partAttrColumn",&pyAttrName,&column)){
+      error("PyBunch - partAttrColumn(attr_name[,index]) - a particles' attr. name is needed");
+    }
+    std::string attr_name_str(PyUnicode_AsUTF8(pyAttrName));
+    ParticleAttributes* partAttr = cpp_bunch->findParticleAttributes(attr_name_str);
+    if(partAttr == NULL){
+      error("PyBunch - partAttrColumn(attr_name[,index]) - there is no particles' attributes with this name");
+    }
+    if(column < 0 || column >= partAttr->getAttSize()){
+      error("PyBunch - partAttrColumn(attr_name[,index]) - the index is out of range");
+    }
+    return makeBunchMemoryView(self,BUNCH_PART_ATTR_COLUMN,pyAttrName,column);
+  }
+
+  //Sets or returns the layout of the coordinates storage
+  //0 - AoS [nParts][6D], 1 - SoA [6D][nParts]
+  //this is implementation of the coordLayout([layout]) method
+  static PyObject* Bunch_coordLayout(PyObject *self, PyObject *args){
+    Bunch* cpp_bunch = (Bunch*) ((pyORBIT_Object *) self)->cpp_obj;
+    int nVars = PyTuple_Size(args);
+    int layout = 0;
+    if(nVars == 1){
+      //NO NEW OBJECT CREATED BY PyArg_ParseTuple! NO NEED OF Py_DECREF()
+      if(!PyArg_ParseTuple(args,"i:coordLayout",&layout)){
+        error("PyBunch - coordLayout(layout) - layout 0 (AoS) or 1 (SoA) is needed");
+      }
+      cpp_bunch->setCoordLayout(layout);
+    }
+    else if(nVars != 0){
+      error("PyBunch. You should call coordLayout() or coordLayout(layout)");
+    }
+    return Py_BuildValue("i",cpp_bunch->getCoordLayout());
+  }
+
+  //Sets or returns the precision of the coordinates storage in bits
+  //64 - double, 32 - float
+  //this is implementation of the coordPrecision([bits]) method
+  static PyObject* Bunch_coordPrecision(PyObject *self, PyObject *args){
+    Bunch* cpp_bunch = (Bunch*) ((pyORBIT_Object *) self)->cpp_obj;
+    int nVars = PyTuple_Size(args);
+    int bits = 64;
+    if(nVars == 1){
+      //NO NEW OBJECT CREATED BY PyArg_ParseTuple! NO NEED OF Py_DECREF()
+      if(!PyArg_ParseTuple(args,"i:coordPrecision",&bits)){
+        error("PyBunch - coordPrecision(bits) - bits 64 (double) or 32 (float) is needed");
+      }
+      cpp_bunch->setCoordPrecision(bits);
+    }
+    else if(nVars != 0){
+      error("PyBunch. You should call coordPrecision() or coordPrecision(bits)");
+    }
+    return Py_BuildValue("i",cpp_bunch->getCoordPrecision());
+  }
+
+  //Returns the number of the coordinates storage conversions since the bunch creation:
+  //float32 <-> double and SoA <-> AoS. It should stay constant during the tracking.
+  //this is implementation of the coordConversions() method
+  static PyObject* Bunch_coordConversions(PyObject *self, PyObject *args){
+    Bunch* cpp_bunch = (Bunch*) ((pyORBIT_Object *) self)->cpp_obj;
+    return Py_BuildValue("L",cpp_bunch->getCoordConversionCount());
+  }
+
+  //Returns the number of the SoA to AoS transpositions of the coordinates since the bunch
+  //creation. If it grows during the tracking of the SoA bunch, some node needs the AoS rows.
+  //this is implementation of the coordToAoSConversions() method
+  static PyObject* Bunch_coordToAoSConversions(PyObject *self, PyObject *args){
+    Bunch* cpp_bunch = (Bunch*) ((pyORBIT_Object *) self)->cpp_obj;
+    return Py_BuildValue("L",cpp_bunch->getCoordToAoSCount());
+  }
+
+  //Returns the dictionary with the global statistics of the bunch: "count", "weight",
+  //"macrosize", tuples "avg", "min", "max" with 6 values, the 6x6 tuple "moments" with
+  //<x_i*x_j> values, and the counters "nPasses", "nReductions" of the calculations.
+  //It is a collective operation.
+  //this is implementation of the getStatistics() method
+  static PyObject* Bunch_getStatistics(PyObject *self, PyObject *args){
+    Bunch* cpp_bunch = (Bunch*) ((pyORBIT_Object *) self)->cpp_obj;
+    BunchStatistics* stats = cpp_bunch->getStatistics();
+    PyObject* py_avg = PyTuple_New(6);
+    PyObject* py_min = PyTuple_New(6);
+    PyObject* py_max = PyTuple_New(6);
+    PyObject* py_moments = PyTuple_New(6);
+    for(int i = 0; i < 6; i++){
+      PyTuple_SET_ITEM(py_avg,i,Py_BuildValue("d",stats->getAverage(i)));
+      PyTuple_SET_ITEM(py_min,i,Py_BuildValue("d",stats->getMin(i)));
+      PyTuple_SET_ITEM(py_max,i,Py_BuildValue("d",stats->getMax(i)));
+      PyObject* py_row = PyTuple_New(6);
+      for(int j = 0; j < 6; j++){
+        PyTuple_SET_ITEM(py_row,j,Py_BuildValue("d",stats->getMoment(i,j)));
+      }
+      PyTuple_SET_ITEM(py_moments,i,py_row);
+    }
+    PyObject* resDict = Py_BuildValue("{s:i,s:d,s:d,s:N,s:N,s:N,s:N,s:i,s:i}",
+      "count",stats->getCount(),
+      "weight",stats->getWeight(),
+      "macrosize",stats->getMacroSize(),
+      "avg",py_avg,
+      "moments",py_moments,
+      "min",py_min,
+      "max",py_max,
+      "nPasses",stats->getNumberOfPasses(),
+      "nReductions",stats->getNumberOfReductions());
+    return resDict;
+  }
+
+  //mapToFile(fileName) - keeps coordinates and attributes in the memory-mapped file
+  static PyObject* Bunch_mapToFile(PyObject *self, PyObject *args){
+    Bunch* cpp_bunch = (Bunch*) ((pyORBIT_Object *) self)->cpp_obj;
+    const char* file_name = NULL;
+    //NO NEW OBJECT CREATED BY PyArg_ParseTuple! NO NEED OF Py_DECREF()
+    if(!PyArg_ParseTuple(args,"s:mapToFile",&file_name)){
+      error("PyBunch - mapToFile(fileName) - the file name is needed");
+    }
+    if(!checkBufferExports(cpp_bunch,-1,"mapToFile")) return NULL;
+    cpp_bunch->mapToFile(file_name);
+    Py_INCREF(Py_None);
+    return Py_None;
+  }
+
+  //mapFromFile(fileName) - maps the binary bunch file and returns the global number of particles
+  static PyObject* Bunch_mapFromFile(PyObject *self, PyObject *args){
+    Bunch* cpp_bunch = (Bunch*) ((pyORBIT_Object *) self)->cpp_obj;
+    const char* file_name = NULL;
+    //NO NEW OBJECT CREATED BY PyArg_ParseTuple! NO NEED OF Py_DECREF()
+    if(!PyArg_ParseTuple(args,"s:mapFromFile",&file_name)){
+      error("PyBunch - mapFromFile(fileName) - the file name is needed");
+    }
+    if(!checkBufferExports(cpp_bunch,-1,"mapFromFile")) return NULL;
+    return Py_BuildValue("i",cpp_bunch->mapFromFile(file_name));
+  }
+
+  //syncMappedFile() - writes the header and flushes the memory-mapped file
+  static PyObject* Bunch_syncMappedFile(PyObject *self, PyObject *args){
+    Bunch* cpp_bunch = (Bunch*) ((pyORBIT_Object *) self)->cpp_obj;
+    cpp_bunch->syncMappedFile();
+    Py_INCREF(Py_None);
+    return Py_None;
+  }
+
+  //unmapFile() - moves coordinates and attributes back to the heap
+  static PyObject* Bunch_unmapFile(PyObject *self, PyObject *args){
+    Bunch* cpp_bunch = (Bunch*) ((pyORBIT_Object *) self)->cpp_obj;
+    if(cpp_bunch->getMappedFileName().size() > 0 && !checkBufferExports(cpp_bunch,-1,"unmapFile")) return NULL;
+    cpp_bunch->unmapFile();
+    Py_INCREF(Py_None);
+    return Py_None;
+  }
+
+  //mappedFileName() - returns the name of the memory-mapped file or None
+  static PyObject* Bunch_mappedFileName(PyObject *self, PyObject *args){
+    Bunch* cpp_bunch = (Bunch*) ((pyORBIT_Object *) self)->cpp_obj;
+    std::string file_name = cpp_bunch->getMappedFileName();
+    if(file_name.size() == 0){
+      Py_INCREF(Py_None);
+      return Py_None;
+    }
+    return Py_BuildValue("s",file_name.c_str());
+  }
+
   //-----------------------------------------------------
   //destructor for python Bunch class
   //-----------------------------------------------------
@@ -1182,7 +1850,11 @@ namespace wrap_orbit_bunch{
     { "deleteParticle",                 Bunch_deleteParticle                ,METH_VARARGS,"Removes macro-particle from the bunch and call compress inside"},
     { "deleteParticleFast",             Bunch_deleteParticleFast            ,METH_VARARGS,"Removes macro-particle from the bunch very fast"},
     { "deleteAllParticles",             Bunch_deleteAllParticles            ,METH_VARARGS,"Removes all macro-particles from the bunch"},
+    { "addParticles",                   Bunch_addParticles                  ,METH_VARARGS,"Adds macro-particles addParticles(coords[n][6]) or addParticles(x,xp,y,yp,z,zp) at once. Returns the index of the first one."},
+    { "deleteParticles",                Bunch_deleteParticles               ,METH_VARARGS,"Removes macro-particles deleteParticles(mask_or_indices[,lostbunch]) in one pass and moves them into the lost bunch"},
     { "compress",                       Bunch_compress                      ,METH_VARARGS,"Compress the bunch"},
+    { "rebalance",                      Bunch_rebalance                     ,METH_VARARGS,"Moves particles between CPUs rebalance([tolerance=0.1]) if max(n)/<n> - 1 > tolerance. Returns the number of moved particles."},
+    { "reorderParticles",               Bunch_reorderParticles              ,METH_VARARGS,"Changes the order of particles reorderParticles(order), the new particle i is the old particle order[i]"},
     { "x",                              Bunch_x                             ,METH_VARARGS,"Set x(index,value) or get x(index) coordinate"},
     { "y",                              Bunch_y                             ,METH_VARARGS,"Set y(index,value) or get y(index) coordinate"},
     { "z",                              Bunch_z                             ,METH_VARARGS,"Set z(index,value) or get z(index) coordinate"},
@@ -1225,11 +1897,25 @@ namespace wrap_orbit_bunch{
     { "getSizeGlobalFromMemory",        Bunch_getSizeGlobalFromMemory       ,METH_VARARGS,"Returns number of macro-particles in all CPUs from memory"},
     { "getTotalCount",                  Bunch_getTotalCount                 ,METH_VARARGS,"Returns number of all particles - alive,dead,new"},
     { "getCapacity",                    Bunch_getCapacity                   ,METH_VARARGS,"Returns the capacity of the bunch-contaiter"},
-    { "dumpBunch",                      Bunch_dumpBunch                     ,METH_VARARGS,"Prints the bunch info into a standart output stream or file"},
-    { "readBunch",                      Bunch_readBunch                     ,METH_VARARGS,"Reads the bunch info from a file"},
+    { "dumpBunch",                      Bunch_dumpBunch                     ,METH_VARARGS,"Prints the bunch info into a standart output stream or file (binary for .bin extension)"},
+    { "readBunch",                      Bunch_readBunch                     ,METH_VARARGS,"Reads the bunch info from a file (binary for .bin extension) readBunch(fileName[,nParts[,nLocalParts]])"},
     { "copyEmptyBunchTo",               Bunch_copyEmptyBunchTo              ,METH_VARARGS,"Copy bunch attrubutes and structure to another bunch"},
     { "copyBunchTo",                    Bunch_copyBunchTo                   ,METH_VARARGS,"Copy bunch all info including particles coordinates and attributes to another bunch"},
     { "addParticlesTo",                 Bunch_addParticlesTo                ,METH_VARARGS,"Copy particles coordinates from one bunch to another"},
+    { "coordArr",                       Bunch_coordArr                      ,METH_VARARGS,"Returns memoryview [nParts][6] of the coordinates without copying"},
+    { "flagArr",                        Bunch_flagArr                       ,METH_VARARGS,"Returns read-only memoryview [nParts] of the particles' flags"},
+    { "partAttrArr",                    Bunch_partAttrArr                   ,METH_VARARGS,"Returns memoryview [nParts][attr. size] of the particles' attr. without copying"},
+    { "partAttrColumn",                 Bunch_partAttrColumn                ,METH_VARARGS,"Returns memoryview [nParts] of one column partAttrColumn(attr_name[,index=0]) of the particles' attr. without copying"},
+    { "coordLayout",                    Bunch_coordLayout                   ,METH_VARARGS,"Sets coordLayout(layout) or returns coordLayout() - 0 for AoS and 1 for SoA storage"},
+    { "coordPrecision",                 Bunch_coordPrecision                ,METH_VARARGS,"Sets coordPrecision(bits) or returns coordPrecision() - 64 for double and 32 for float storage"},
+    { "coordConversions",               Bunch_coordConversions              ,METH_VARARGS,"Returns the number of the coordinates storage conversions (float32 <-> double, SoA <-> AoS) since the bunch creation"},
+    { "coordToAoSConversions",          Bunch_coordToAoSConversions         ,METH_VARARGS,"Returns the number of the SoA to AoS transpositions of the coordinates since the bunch creation"},
+    { "getStatistics",                  Bunch_getStatistics                 ,METH_VARARGS,"Returns the dictionary with the global count, macro-size, averages, second moments, and extrema of the coordinates"},
+    { "mapToFile",                      Bunch_mapToFile                     ,METH_VARARGS,"Keeps coordinates and attributes in the memory-mapped binary file mapToFile(fileName). Each CPU needs its own file."},
+    { "mapFromFile",                    Bunch_mapFromFile                   ,METH_VARARGS,"Maps the binary bunch file mapFromFile(fileName) without reading and returns the global number of particles"},
+    { "syncMappedFile",                 Bunch_syncMappedFile                ,METH_VARARGS,"Flushes the memory-mapped file. After that it is a consistent snapshot of the bunch."},
+    { "unmapFile",                      Bunch_unmapFile                     ,METH_VARARGS,"Moves coordinates and attributes from the memory-mapped file back to the memory"},
+    { "mappedFileName",                 Bunch_mappedFileName                ,METH_VARARGS,"Returns the name of the memory-mapped file or None"},
     {NULL,NULL}
     //--------------------------------------------------------
     // class Bunch wrapper                        STOP
@@ -1262,7 +1948,7 @@ namespace wrap_orbit_bunch{
         0, /*tp_str*/
         0, /*tp_getattro*/
         0, /*tp_setattro*/
-        0, /*tp_as_buffer*/
+        &BunchBufferProcs, /*tp_as_buffer*/
         Py_TPFLAGS_DEFAULT | Py_TPFLAGS_BASETYPE, /*tp_flags*/
         "The Bunch python wrapper", /* tp_doc */
         0, /* tp_traverse */
@@ -1303,6 +1989,7 @@ extern "C" {
   PyMODINIT_FUNC initbunch(void) {
       //check that the Bunch wrapper is ready
       if(PyType_Ready(&pyORBIT_Bunch_Type) < 0) return NULL;
+      if(PyType_Ready(&pyORBIT_BunchArrayView_Type) < 0) return NULL;
       Py_INCREF(&pyORBIT_Bunch_Type);
       PyObject* module = PyModule_Create(&cModPyDem);
       PyModule_AddObject(module, "Bunch", (PyObject *)&pyORBIT_Bunch_Type);
@@ -1310,6 +1997,7 @@ extern "C" {
       wrap_orbit_syncpart::initsyncpart(module);
       wrap_bunch_twiss_analysis::initbunchtwissanalysis(module);
       wrap_bunch_tune_analysis::initbunchtuneanalysis(module);
+      wrap_bunch_trajectory_recorder::initbunchtrajectoryrecorder(module);
       wrap_synch_part_redefinition::initsynchpartredefinition(module);
       return module;
   }
@@ -251,27 +251,29 @@ void Grid1D::binBunch(Bunch* bunch, int axis_ind)
 
   double m_size;
   bunch->compress();
-  double** part_coord_arr = bunch->coordArr();
-  int has_msize = bunch->hasParticleAttributes("macrosize");
-  if(has_msize > 0)
+  readCoordRows(bunch, [&](auto part_coord_arr)
   {
-    ParticleMacroSize* macroSizeAttr =
-            (ParticleMacroSize*) bunch->getParticleAttributes("macrosize");
-    m_size = 0.;
-    for(int i = 0; i < bunch->getSize(); i++)
+    int has_msize = bunch->hasParticleAttributes("macrosize");
+    if(has_msize > 0)
     {
-      m_size = macroSizeAttr->macrosize(i);
-      binValue(m_size, part_coord_arr[i][axis_ind]);
+      ParticleMacroSize* macroSizeAttr =
+              (ParticleMacroSize*) bunch->getParticleAttributes("macrosize");
+      m_size = 0.;
+      for(int i = 0; i < bunch->getSize(); i++)
+      {
+        m_size = macroSizeAttr->readMacrosize(i);
+        binValue(m_size, part_coord_arr[i][axis_ind]);
+      }
     }
-  }
-  else
-  {
-    m_size = bunch->getMacroSize();
-    for(int i = 0; i < bunch->getSize(); i++)
+    else
     {
-      binValue(m_size, part_coord_arr[i][axis_ind]);
+      m_size = bunch->getMacroSize();
+      for(int i = 0; i < bunch->getSize(); i++)
+      {
+        binValue(m_size, part_coord_arr[i][axis_ind]);
+      }
     }
-  }
+  });
 }
 
 /**
@@ -300,27 +302,29 @@ void Grid1D::binBunchSmoothed(Bunch* bunch, int axis_ind)
 
   double m_size;
   bunch->compress();
-  double** part_coord_arr = bunch->coordArr();
-  int has_msize = bunch->hasParticleAttributes("macrosize");
-  if(has_msize > 0)
+  readCoordRows(bunch, [&](auto part_coord_arr)
   {
-    ParticleMacroSize* macroSizeAttr =
-            (ParticleMacroSize*) bunch->getParticleAttributes("macrosize");
-    m_size = 0.;
-    for(int i = 0; i < bunch->getSize(); i++)
+    int has_msize = bunch->hasParticleAttributes("macrosize");
+    if(has_msize > 0)
     {
-      m_size = macroSizeAttr->macrosize(i);
-      binValueSmoothed(m_size, part_coord_arr[i][axis_ind]);
+      ParticleMacroSize* macroSizeAttr =
+              (ParticleMacroSize*) bunch->getParticleAttributes("macrosize");
+      m_size = 0.;
+      for(int i = 0; i < bunch->getSize(); i++)
+      {
+        m_size = macroSizeAttr->readMacrosize(i);
+        binValueSmoothed(m_size, part_coord_arr[i][axis_ind]);
+      }
     }
-  }
-  else
-  {
-    m_size = bunch->getMacroSize();
-    for(int i = 0; i < bunch->getSize(); i++)
+    else
     {
-      binValueSmoothed(m_size, part_coord_arr[i][axis_ind]);
+      m_size = bunch->getMacroSize();
+      for(int i = 0; i < bunch->getSize(); i++)
+      {
+        binValueSmoothed(m_size, part_coord_arr[i][axis_ind]);
+      }
     }
-  }
+  });
 }
 
 /** Bins the Bunch along the longitudinal coordinate giving each macroparticle
@@ -344,11 +348,13 @@ void Grid1D::binBunchByParticle(Bunch* bunch, int axis_ind)
 	}
 
   bunch->compress();
-  double** part_coord_arr = bunch->coordArr();
-  for(int i = 0; i < bunch->getSize(); i++)
+  readCoordRows(bunch, [&](auto part_coord_arr)
   {
-    binValue(1.0, part_coord_arr[i][axis_ind]);
-  }
+    for(int i = 0; i < bunch->getSize(); i++)
+    {
+      binValue(1.0, part_coord_arr[i][axis_ind]);
+    }
+  });
 }
 
 
@@ -372,11 +378,13 @@ void Grid1D::binBunchSmoothedByParticle(Bunch* bunch, int axis_ind)
 	}
 
   bunch->compress();
-  double** part_coord_arr = bunch->coordArr();
-  for(int i = 0; i < bunch->getSize(); i++)
+  readCoordRows(bunch, [&](auto part_coord_arr)
   {
-    binValueSmoothed(1.0, part_coord_arr[i][axis_ind]);
-  }
+    for(int i = 0; i < bunch->getSize(); i++)
+    {
+      binValueSmoothed(1.0, part_coord_arr[i][axis_ind]);
+    }
+  });
 }
 
 
@@ -390,12 +398,14 @@ void Grid1D::binBunchMoment(int propindex, Bunch* bunch, double* Moment)
     Moment[i] = 0.0;
   }
   bunch->compress();
-  double** part_coord_arr = bunch->coordArr();
-  for(int i = 0; i < bunch->getSize(); i++)
+  readCoordRows(bunch, [&](auto part_coord_arr)
   {
-    property = part_coord_arr[i][propindex];
-    binMoment(property, part_coord_arr[i][4], Moment);
-  }
+    for(int i = 0; i < bunch->getSize(); i++)
+    {
+      property = part_coord_arr[i][propindex];
+      binMoment(property, part_coord_arr[i][4], Moment);
+    }
+  });
 }
 
 
@@ -409,12 +419,14 @@ void Grid1D::binBunchSmoothedMoment(int propindex, Bunch* bunch, double* Moment)
     Moment[i] = 0.0;
   }
   bunch->compress();
-  double** part_coord_arr = bunch->coordArr();
-  for(int i = 0; i < bunch->getSize(); i++)
+  readCoordRows(bunch, [&](auto part_coord_arr)
   {
-    property = part_coord_arr[i][propindex];
-    binMomentSmoothed(property, part_coord_arr[i][4], Moment);
-  }
+    for(int i = 0; i < bunch->getSize(); i++)
+    {
+      property = part_coord_arr[i][propindex];
+      binMomentSmoothed(property, part_coord_arr[i][4], Moment);
+    }
+  });
 }
 
 
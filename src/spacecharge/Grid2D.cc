@@ -5,6 +5,7 @@
 #include "BufferStore.hh"
 
 #include <iostream>
+#include <vector>
 
 using namespace OrbitUtils;
 
@@ -119,22 +120,24 @@ void Grid2D::binBunch(Bunch* bunch){
   */
 void Grid2D::binBunch(Bunch* bunch, int ind0, int ind1){
 	bunch->compress();
-	double** part_coord_arr = bunch->coordArr();
-	int has_msize = bunch->hasParticleAttributes("macrosize");
-	if(has_msize > 0){
-		ParticleMacroSize* macroSizeAttr = (ParticleMacroSize*) bunch->getParticleAttributes("macrosize");
-		double m_size = 0.;
-		for(int i = 0, n = bunch->getSize(); i < n; i++){
-			m_size = macroSizeAttr->macrosize(i);
+	readCoordRows(bunch, [&](auto part_coord_arr)
+	{
+		int has_msize = bunch->hasParticleAttributes("macrosize");
+		if(has_msize > 0){
+			ParticleMacroSize* macroSizeAttr = (ParticleMacroSize*) bunch->getParticleAttributes("macrosize");
+			double m_size = 0.;
+			for(int i = 0, n = bunch->getSize(); i < n; i++){
+				m_size = macroSizeAttr->readMacrosize(i);
+				binValue(m_size,part_coord_arr[i][ind0],part_coord_arr[i][ind1]);
+			}
+			return;
+		}
+		double m_size = bunch->getMacroSize();
+		int nParts = bunch->getSize();
+		for(int i = 0; i < nParts; i++){
 			binValue(m_size,part_coord_arr[i][ind0],part_coord_arr[i][ind1]);
 		}
-		return;
-	}
-	double m_size = bunch->getMacroSize();
-	int nParts = bunch->getSize();
-	for(int i = 0; i < nParts; i++){
-		binValue(m_size,part_coord_arr[i][ind0],part_coord_arr[i][ind1]);
-	}
+	});
 }
 
 /** Bins the value into the 2D grid */
@@ -174,23 +177,64 @@ void Grid2D::binBunchBilinear(Bunch* bunch){
   */
 void Grid2D::binBunchBilinear(Bunch* bunch, int ind0, int ind1){
 	bunch->compress();
-	double** part_coord_arr = bunch->coordArr();
-	int nParts = bunch->getSize();
-	int has_msize = bunch->hasParticleAttributes("macrosize");
-	if(has_msize > 0){
-		ParticleMacroSize* macroSizeAttr = (ParticleMacroSize*) bunch->getParticleAttributes("macrosize");
-			double m_size = 0.;
-			for(int i = 0, n = bunch->getSize(); i < n; i++){
-				m_size = macroSizeAttr->macrosize(i);
+	readCoordRows(bunch, [&](auto part_coord_arr)
+	{
+		int nParts = bunch->getSize();
+		int has_msize = bunch->hasParticleAttributes("macrosize");
+		if(has_msize > 0){
+			ParticleMacroSize* macroSizeAttr = (ParticleMacroSize*) bunch->getParticleAttributes("macrosize");
+				double m_size = 0.;
+				for(int i = 0, n = bunch->getSize(); i < n; i++){
+					m_size = macroSizeAttr->readMacrosize(i);
+					binValueBilinear(m_size,part_coord_arr[i][ind0],part_coord_arr[i][ind1]);
+				}
+				return;
+			}
+			double m_size = bunch->getMacroSize();
+			for(int i = 0; i < nParts; i++){
+				//cerr<<"i = "<<i;
 				binValueBilinear(m_size,part_coord_arr[i][ind0],part_coord_arr[i][ind1]);
 			}
-			return;
-		}
-		double m_size = bunch->getMacroSize();
+	});
+}
+
+/** Spreads the lower 32 bits of the index to the even bits of the Morton key */
+static unsigned long long mortonSpread2D(unsigned long long ind){
+	ind &= 0x00000000FFFFFFFFULL;
+	ind = (ind | (ind << 16)) & 0x0000FFFF0000FFFFULL;
+	ind = (ind | (ind << 8))  & 0x00FF00FF00FF00FFULL;
+	ind = (ind | (ind << 4))  & 0x0F0F0F0F0F0F0F0FULL;
+	ind = (ind | (ind << 2))  & 0x3333333333333333ULL;
+	ind = (ind | (ind << 1))  & 0x5555555555555555ULL;
+	return ind;
+}
+
+/** Sorts the macro-particles of the bunch by the grid cells using X and Y coordinates */
+void Grid2D::sortBunch(Bunch* bunch, int keyType){
+	this->sortBunch(bunch,0,2,keyType);
+}
+
+/** Sorts the macro-particles of the bunch by the grid cells using coordinate indexes ind0 and ind1 */
+void Grid2D::sortBunch(Bunch* bunch, int ind0, int ind1, int keyType){
+	bunch->compress();
+	int nParts = bunch->getSize();
+	if(nParts < 2) return;
+	std::vector<unsigned long long> keys(nParts);
+	int iX, iY;
+	double xFract, yFract;
+	readCoordRows(bunch, [&](auto part_coord_arr)
+	{
 		for(int i = 0; i < nParts; i++){
-			//cerr<<"i = "<<i;
-			binValueBilinear(m_size,part_coord_arr[i][ind0],part_coord_arr[i][ind1]);
+			getIndAndFracX(part_coord_arr[i][ind0],iX,xFract);
+			getIndAndFracY(part_coord_arr[i][ind1],iY,yFract);
+			if(keyType == 1){
+				keys[i] = mortonSpread2D(iX) | (mortonSpread2D(iY) << 1);
+			} else {
+				keys[i] = ((unsigned long long) iX)*ySize_ + iY;
+			}
 		}
+	});
+	bunch->sortParticles(keys.data());
 }
 
 /** Bilinear bin of the value into the 2D grid */
@@ -74,6 +74,17 @@ public:
 	/** Bilinear bin of the value into the 2D grid */
 	void binValueBilinear(double value, double x, double y);
 
+	/** Sorts the macro-particles of the bunch by the grid cells using X and Y coordinates.
+	    The particles in the same or neighbouring cells will be close in memory,
+	    and binning and gradient calculations will use the cache better.
+	    keyType = 0 - the row-major order of cells (as in the grid array),
+	    keyType = 1 - the Morton (Z-curve) order.
+	*/
+	void sortBunch(Bunch* bunch, int keyType);
+
+  /** Sorts the macro-particles of the bunch by the grid cells using coordinate indexes ind0 and ind1. */
+  void sortBunch(Bunch* bunch, int ind0, int ind1, int keyType);
+
 	/** Calculates gradient at a position (x,y) */
 	void calcGradient(double x, double y, double& ex, double& ey);
 
@@ -20,6 +20,7 @@
 #include "Grid3D.hh"
 
 #include <iostream>
+#include <vector>
 
 using namespace OrbitUtils;
 
@@ -281,26 +282,28 @@ double Grid3D::getValueOnGrid(int ix, int iy, int iz){
 void Grid3D::binBunch(Bunch* bunch,double lambda){
 	double z;
 	bunch->compress();
-	double** part_coord_arr = bunch->coordArr();
-	int has_msize = bunch->hasParticleAttributes("macrosize");
-	if(has_msize > 0){
-		ParticleMacroSize* macroSizeAttr = (ParticleMacroSize*) bunch->getParticleAttributes("macrosize");
-		double m_size = 0.;
-		for(int i = 0, n = bunch->getSize(); i < n; i++){
-			m_size = macroSizeAttr->macrosize(i);
+	readCoordRows(bunch, [&](auto part_coord_arr)
+	{
+		int has_msize = bunch->hasParticleAttributes("macrosize");
+		if(has_msize > 0){
+			ParticleMacroSize* macroSizeAttr = (ParticleMacroSize*) bunch->getParticleAttributes("macrosize");
+			double m_size = 0.;
+			for(int i = 0, n = bunch->getSize(); i < n; i++){
+				m_size = macroSizeAttr->readMacrosize(i);
+				z = part_coord_arr[i][4];
+				if(longWrapping != 0) z = remainder(z,lambda);
+				this->binValue(m_size,part_coord_arr[i][0],part_coord_arr[i][2],z);
+			}
+			return;
+		}
+		double m_size = bunch->getMacroSize();
+		int nParts = bunch->getSize();
+		for(int i = 0; i < nParts; i++){
 			z = part_coord_arr[i][4];
 			if(longWrapping != 0) z = remainder(z,lambda);
 			this->binValue(m_size,part_coord_arr[i][0],part_coord_arr[i][2],z);
 		}
-		return;
-	}
-	double m_size = bunch->getMacroSize();
-	int nParts = bunch->getSize();
-	for(int i = 0; i < nParts; i++){
-		z = part_coord_arr[i][4];
-		if(longWrapping != 0) z = remainder(z,lambda);
-		this->binValue(m_size,part_coord_arr[i][0],part_coord_arr[i][2],z);
-	}
+	});
 }
 
 
@@ -310,6 +313,41 @@ void Grid3D::binBunch(Bunch* bunch){
 	this->binBunch(bunch,0.);
 }
 
+/** Spreads the lower 21 bits of the index to every third bit of the Morton key */
+static unsigned long long mortonSpread3D(unsigned long long ind){
+	ind &= 0x00000000001FFFFFULL;
+	ind = (ind | (ind << 32)) & 0x001F00000000FFFFULL;
+	ind = (ind | (ind << 16)) & 0x001F0000FF0000FFULL;
+	ind = (ind | (ind << 8))  & 0x100F00F00F00F00FULL;
+	ind = (ind | (ind << 4))  & 0x10C30C30C30C30C3ULL;
+	ind = (ind | (ind << 2))  & 0x1249249249249249ULL;
+	return ind;
+}
+
+/** Sorts the macro-particles of the bunch by the grid cells. */
+void Grid3D::sortBunch(Bunch* bunch, int keyType){
+	bunch->compress();
+	int nParts = bunch->getSize();
+	if(nParts < 2) return;
+	std::vector<unsigned long long> keys(nParts);
+	int iX, iY, iZ;
+	double xFrac, yFrac, zFrac;
+	readCoordRows(bunch, [&](auto part_coord_arr)
+	{
+		for(int i = 0; i < nParts; i++){
+			getGridIndAndFrac(part_coord_arr[i][0],iX,xFrac,part_coord_arr[i][2],iY,yFrac,part_coord_arr[i][4],iZ,zFrac);
+			if(iZ < 0) iZ = 0;
+			if(iZ >= nZ_) iZ = nZ_ - 1;
+			if(keyType == 1){
+				keys[i] = mortonSpread3D(iX) | (mortonSpread3D(iY) << 1) | (mortonSpread3D(iZ) << 2);
+			} else {
+				keys[i] = (((unsigned long long) iZ)*nX_ + iX)*nY_ + iY;
+			}
+		}
+	});
+	bunch->sortParticles(keys.data());
+}
+
 /** Bins the value into the grid 3D assuming a wrapped longitudinal direction */
 void Grid3D::binValue(double macroSize, double x, double y, double z)
 {
@@ -532,6 +570,23 @@ void Grid3D::calcGradient(double x,double& gradX,
 }
 
 
+/** Sets to 1 the flags of the z-planes used by the interpolation at the position z */
+void Grid3D::markPlanesZ(double z, int* planeFlags)
+{
+  int iX, iY, iZ;
+  double xFrac, yFrac, zFrac;
+  getGridIndAndFrac(xMin_, iX, xFrac, yMin_, iY, yFrac, z, iZ, zFrac);
+  if( nZ_ < 3){
+    for(int i = 0; i < nZ_; i++){
+      planeFlags[i] = 1;
+    }
+    return;
+  }
+  planeFlags[(iZ - 1 + nZ_) % nZ_] = 1;
+  planeFlags[iZ] = 1;
+  planeFlags[(iZ + 1) % nZ_] = 1;
+}
+
 /** Calculates value at the point with coordinates x,y,z */
 double Grid3D::getValue(double x,double y,double z)
 {
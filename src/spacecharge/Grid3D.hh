@@ -142,11 +142,23 @@ public:
   /** Bins the value onto grid */
   void binValue(double macroSize, double x, double y, double z);
 
+  /** Sorts the macro-particles of the bunch by the grid cells.
+	    The particles in the same or neighbouring cells will be close in memory,
+	    and binning and gradient calculations will use the cache better.
+	    keyType = 0 - the row-major order of cells (as in the 3D array [z][x][y]),
+	    keyType = 1 - the Morton (Z-curve) order.
+  */
+	void sortBunch(Bunch* bunch, int keyType);
+
   /** Calculates gradient of Arr3D. gradX = gradient_x(Arr3D), and so on */
   void calcGradient(double x,double& gradX,
 	      double y,double& gradY,
 		    double z,double& gradZ);
 
+  /** Sets to 1 the flags of the z-planes used by the interpolation at the position z.
+      The array of the flags should have the size equal to the number of z-planes. */
+  void markPlanesZ(double z, int* planeFlags);
+
   /** Calculates value at the point with coordinates x,y,z */
   double getValue(double x,double y,double z);
 
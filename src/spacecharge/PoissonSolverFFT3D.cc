@@ -48,6 +48,22 @@ void PoissonSolverFFT3D::init(int xSize, int ySize, int zSize,
 		ORBIT_MPI_Finalize();
   }
 
+  //the FFT arrays are allocated and the Green function is calculated
+  //at the first solution for the new grid
+  greensF_ = NULL;
+  in_ = NULL;
+  in_res_ = NULL;
+  out_green_ = NULL;
+  out_ = NULL;
+  out_res_ = NULL;
+  greenF_defined_ = 0;
+}
+
+/** Allocates the FFT arrays and plans if they do not exist yet */
+void PoissonSolverFFT3D::_initFFT()
+{
+  if(in_ != NULL) return;
+
   greensF_ = new double**[xSize2_];
   for(int ix = 0; ix < xSize2_ ; ix++) {
 		greensF_[ix] =  new double* [ySize2_];
@@ -67,9 +83,6 @@ void PoissonSolverFFT3D::init(int xSize, int ySize, int zSize,
   planForward_greenF_ = fftw_plan_dft_r2c_3d(xSize2_ , ySize2_ , zSize2_ , in_,  out_green_, FFTW_ESTIMATE);
   planForward_        = fftw_plan_dft_r2c_3d(xSize2_ , ySize2_ , zSize2_ , in_,  out_,       FFTW_ESTIMATE);
   planBackward_       = fftw_plan_dft_c2r_3d(xSize2_ , ySize2_ , zSize2_ , out_res_, in_res_,FFTW_ESTIMATE);
-
-  //define FFT of the Green fuction
-  _defineGreenF();
 }
 
 // Destructor
@@ -78,6 +91,7 @@ PoissonSolverFFT3D::~PoissonSolverFFT3D()
 
 	//std::cerr<<"debug PoissonSolverFFT3D::~PoissonSolverFFT3D() start! "<<std::endl;
   //delete Green function and FFT input and output arrays
+  if(in_ == NULL) return;
 
   for(int ix = 0; ix < xSize2_ ; ix++) {
 		for(int iy = 0; iy < ySize2_ ; iy++) {
@@ -121,21 +135,21 @@ void PoissonSolverFFT3D::setGridX(double xMin, double xMax){
 	xMin_ = xMin;
 	xMax_ = xMax;
 	dx_ = (xMax_ - xMin_)/(xSize_ -1);
-	_defineGreenF();
+	greenF_defined_ = 0;
 }
 
 void PoissonSolverFFT3D::setGridY(double yMin, double yMax){
 	yMin_ = yMin;
 	yMax_ = yMax;
 	dy_ = (yMax_ - yMin_)/(ySize_ -1);
-	_defineGreenF();
+	greenF_defined_ = 0;
 }
 
 void PoissonSolverFFT3D::setGridZ(double zMin, double zMax){
 	zMin_ = zMin;
 	zMax_ = zMax;
 	dz_ = (zMax_ - zMin_)/zSize_;
-	_defineGreenF();
+	greenF_defined_ = 0;
 }
 
 void PoissonSolverFFT3D::setGridXYZ(double xMin, double xMax, double yMin, double yMax, double zMin, double zMax){
@@ -148,7 +162,7 @@ void PoissonSolverFFT3D::setGridXYZ(double xMin, double xMax, double yMin, doubl
 	zMin_ = zMin;
 	zMax_ = zMax;
 	dz_ = (zMax_ - zMin_)/zSize_;
-	_defineGreenF();
+	greenF_defined_ = 0;
 }
 
 /** Updates the Green function FFT */
@@ -156,50 +170,56 @@ void PoissonSolverFFT3D::updateGreenFunction(){
 	this->_defineGreenF();
 }
 
-// Defines the FFT of the Green Function: field = Q/r^2, potential = Q/r
-void PoissonSolverFFT3D::_defineGreenF()
+/** Returns the Green function for the grid steps iX, iY, iZ between the charge and the point,
+    where the steps are not more than the half of the twice extended grid */
+double PoissonSolverFFT3D::_greenF(int iX, int iY, int iZ)
 {
   double rTransY, rTransX, rTransZ, rTot, rTotExt;
   double externalPhi,rTransZ_tmp;
   double rTransY2, rTransX2, rTransZ2;
+
+	rTransZ = iZ * dz_;
+	rTransZ2 = rTransZ*rTransZ;
+	rTransY = iY * dy_;
+	rTransY2 = rTransY*rTransY;
+	rTransX = iX * dx_;
+	rTransX2 = rTransX*rTransX;
+	rTot = sqrt(rTransX2 + rTransY2 + rTransZ2);
+
+	externalPhi = 0.;
+	if(nBunches_ != 0){
+		for (int iBunch = -nBunches_/2; iBunch <= nBunches_/2; iBunch++){
+			if(iBunch == 0){
+				continue;
+			}
+			rTransZ_tmp = rTransZ + iBunch*lambda_;
+			rTotExt = sqrt(rTransX2 + rTransY2 + rTransZ_tmp*rTransZ_tmp);
+			//this is protection for iX, iY, = 0, iZ = zSize2_/2, and iBunch = -1
+			//Rememeber, here we do not have control over lambda value
+			if(rTotExt > 1.0e-10) externalPhi += 1.0/rTotExt;
+		}
+	}
+
+	if(iX != 0 || iY != 0 || iZ != 0){
+		return 1./rTot + externalPhi;
+	}
+	return externalPhi;
+}
+
+// Defines the FFT of the Green Function: field = Q/r^2, potential = Q/r
+void PoissonSolverFFT3D::_defineGreenF()
+{
   int i, j, k, iY , iX, iZ;
 
+	_initFFT();
+
 	for (iZ = 0; iZ <= zSize2_/2; iZ++)
 	{
-		rTransZ = iZ * dz_;
-		rTransZ2 = rTransZ*rTransZ;
-
 		for (iY = 0; iY <= ySize2_/2; iY++)
 		{
-			rTransY = iY * dy_;
-			rTransY2 = rTransY*rTransY;
-
 			for (iX = 0; iX <= xSize2_/2; iX++)
 			{
-				rTransX = iX * dx_;
-				rTransX2 = rTransX*rTransX;
-				rTot = sqrt(rTransX2 + rTransY2 + rTransZ2);
-
-				externalPhi = 0.;
-				if(nBunches_ != 0){
-					for (int iBunch = -nBunches_/2; iBunch <= nBunches_/2; iBunch++){
-						if(iBunch == 0){
-							continue;
-						}
-						rTransZ_tmp = rTransZ + iBunch*lambda_;
-						rTotExt = sqrt(rTransX2 + rTransY2 + rTransZ_tmp*rTransZ_tmp);
-						//this is protection for iX, iY, = 0, iZ = zSize2_/2, and iBunch = -1
-						//Rememeber, here we do not have control over lambda value
-						if(rTotExt > 1.0e-10) externalPhi += 1.0/rTotExt;
-					}
-				}
-
-				if(iX != 0 || iY != 0 || iZ != 0){
-					greensF_[iX][iY][iZ] = 1./rTot + externalPhi;
-				}
-				else{
-					greensF_[iX][iY][iZ] = externalPhi;
-				}
+				greensF_[iX][iY][iZ] = _greenF(iX,iY,iZ);
 			}
 
 			for (iX = xSize2_/2+1; iX < xSize2_; iX++)
@@ -244,9 +264,11 @@ void PoissonSolverFFT3D::_defineGreenF()
 				  in_[k + zSize2_*j + zSize2_*ySize2_*i] = 0.0;
 			  }
 
+	greenF_defined_ = 1;
 }
 
-void PoissonSolverFFT3D::findPotential(Grid3D* rhoGrid,Grid3D*  phiGrid)
+/** Stops the execution if the grids do not correspond to the grid of the solver */
+void PoissonSolverFFT3D::_checkGrids(Grid3D* rhoGrid,Grid3D*  phiGrid)
 {
 	double shape_diff_limit = 0.0000001;
 	//check sizes of the grids
@@ -299,6 +321,15 @@ void PoissonSolverFFT3D::findPotential(Grid3D* rhoGrid,Grid3D*  phiGrid)
 		}
 		ORBIT_MPI_Finalize();
   }
+}
+
+void PoissonSolverFFT3D::findPotential(Grid3D* rhoGrid,Grid3D*  phiGrid)
+{
+	_checkGrids(rhoGrid,phiGrid);
+
+	if(greenF_defined_ == 0){
+		_defineGreenF();
+	}
 
 	double*** rhosc = rhoGrid->getArr3D();
 	double*** phisc = phiGrid->getArr3D();
@@ -77,9 +77,18 @@ class PoissonSolverFFT3D: public PoissonSolver3D
 			double yMin, double yMax,
 			double zMin, double zMax);
 
+		//allocate the FFT arrays and plans
+		void _initFFT();
+
 		//define green functions table
 		void _defineGreenF();
 
+		//the Green function for the grid steps between the charge and the point
+		double _greenF(int iX, int iY, int iZ);
+
+		//check that the grids correspond to the grid of the solver
+		void _checkGrids(Grid3D* rhoGrid,Grid3D*  phiGrid);
+
 	protected:
 
 		//Twice extended grid size to use convolution method
@@ -101,6 +110,9 @@ class PoissonSolverFFT3D: public PoissonSolver3D
 		fftw_plan planForward_;
 		fftw_plan planBackward_;
 
+		//It is 0 if the Green function FFT should be calculated again for the new grid
+		int greenF_defined_;
+
 		//Number of bunches from both sides that should be taken into account.
 		//It defines the how many components we will add to Green function.
 		//This number will be an even number.
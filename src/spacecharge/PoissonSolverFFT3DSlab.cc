@@ -0,0 +1,418 @@
+/////////////////////////////////////////////////////////////////////////////
+//
+// FILE NAME
+//   PoissonSolverFFT3DSlab.cc
+//
+// DESCRIPTION
+//   The distributed FFT convolution Poisson solver for the 3D space charge.
+//   The rho and phi z-planes and the z-planes of the Green function are
+//   divided into slabs among CPUs. Each CPU makes the 2D FFTs of its planes,
+//   and the all-to-all exchange moves the results to the owners of the
+//   longitudinal lines, where the 1D FFTs along z and the convolution with
+//   the Green function are done. The backward transformation goes the same
+//   way back. The charge of each CPU is sent only to the owners of the
+//   z-planes with this charge, and each CPU receives the potential only in
+//   the z-planes needed for the interpolation at its macro-particles.
+//
+/////////////////////////////////////////////////////////////////////////////
+
+#include "PoissonSolverFFT3DSlab.hh"
+
+#include <iostream>
+#include <cstring>
+#include <algorithm>
+
+using namespace OrbitUtils;
+
+/** Divides n elements into nParts contiguous parts of almost equal sizes */
+static void blockPartition(int n, int nParts, vector<int>& start, vector<int>& count){
+	start.resize(nParts);
+	count.resize(nParts);
+	for(int i = 0; i < nParts; i++){
+		start[i] = (int)(((long long) n)*i/nParts);
+		count[i] = (int)(((long long) n)*(i+1)/nParts) - start[i];
+	}
+}
+
+// Constructor
+PoissonSolverFFT3DSlab::PoissonSolverFFT3DSlab(int xSize, int ySize, int zSize): PoissonSolverFFT3D(xSize,ySize,zSize)
+{
+	planeIn_ = NULL;
+	nRanks_ = 0;
+	rank_ = -1;
+	slabGreenF_defined_ = 0;
+}
+
+PoissonSolverFFT3DSlab::PoissonSolverFFT3DSlab(int xSize, int ySize, int zSize,
+	double xMin, double xMax,
+	double yMin, double yMax,
+	double zMin, double zMax): PoissonSolverFFT3D(xSize,ySize,zSize,xMin,xMax,yMin,yMax,zMin,zMax)
+{
+	planeIn_ = NULL;
+	nRanks_ = 0;
+	rank_ = -1;
+	slabGreenF_defined_ = 0;
+}
+
+// Destructor
+PoissonSolverFFT3DSlab::~PoissonSolverFFT3DSlab()
+{
+	_freeSlabs();
+}
+
+void PoissonSolverFFT3DSlab::_freeSlabs()
+{
+	if(planeIn_ == NULL) return;
+	fftw_destroy_plan(planForward2D_);
+	fftw_destroy_plan(planBackward2D_);
+	if(planForwardZ_ != NULL){
+		fftw_destroy_plan(planForwardZ_);
+		fftw_destroy_plan(planBackwardZ_);
+	}
+	fftw_free(planeIn_);
+	fftw_free(planeOut_);
+	fftw_free(slab_);
+	fftw_free(lines_);
+	fftw_free(greenLines_);
+	planeIn_ = NULL;
+	slabGreenF_defined_ = 0;
+}
+
+void PoissonSolverFFT3DSlab::_initSlabs(MPI_Comm comm)
+{
+	int nRanks = 1;
+	int rank = 0;
+	ORBIT_MPI_Comm_size(comm, &nRanks);
+	ORBIT_MPI_Comm_rank(comm, &rank);
+	if(planeIn_ != NULL && comm == comm_ && nRanks == nRanks_ && rank == rank_) return;
+
+	_freeSlabs();
+	comm_ = comm;
+	nRanks_ = nRanks;
+	rank_ = rank;
+
+	//the 2D FFT of the real transverse plane has ySize2_/2+1 values along y
+	planeSize_ = xSize2_*(ySize2_/2+1);
+	blockPartition(zSize_, nRanks_, zStart_, zCount_);
+	blockPartition(zSize2_, nRanks_, greenStart_, greenCount_);
+	blockPartition(planeSize_, nRanks_, lineStart_, lineCount_);
+
+	masks_.resize(2*nRanks_*zSize_);
+	localMasks_.resize(2*nRanks_*zSize_);
+	sendCounts_.resize(nRanks_);
+	sendDispls_.resize(nRanks_);
+	recvCounts_.resize(nRanks_);
+	recvDispls_.resize(nRanks_);
+
+	int nPlanes = max(zCount_[rank_], greenCount_[rank_]);
+	int nLines = lineCount_[rank_];
+	planeIn_    = (double *) fftw_malloc(sizeof(double) * xSize2_ * ySize2_);
+	planeOut_   = (fftw_complex *) fftw_malloc(sizeof(fftw_complex) * planeSize_);
+	slab_       = (fftw_complex *) fftw_malloc(sizeof(fftw_complex) * max(1, nPlanes*planeSize_));
+	lines_      = (fftw_complex *) fftw_malloc(sizeof(fftw_complex) * max(1, nLines*zSize2_));
+	greenLines_ = (fftw_complex *) fftw_malloc(sizeof(fftw_complex) * max(1, nLines*zSize2_));
+	phiSlab_.resize(zCount_[rank_]*xSize_*ySize_);
+
+	planForward2D_  = fftw_plan_dft_r2c_2d(xSize2_, ySize2_, planeIn_, planeOut_, FFTW_ESTIMATE);
+	planBackward2D_ = fftw_plan_dft_c2r_2d(xSize2_, ySize2_, planeOut_, planeIn_, FFTW_ESTIMATE);
+	planForwardZ_ = NULL;
+	planBackwardZ_ = NULL;
+	if(nLines > 0){
+		planForwardZ_  = fftw_plan_many_dft(1, &zSize2_, nLines, lines_, NULL, 1, zSize2_,
+		                                    lines_, NULL, 1, zSize2_, FFTW_FORWARD, FFTW_ESTIMATE);
+		planBackwardZ_ = fftw_plan_many_dft(1, &zSize2_, nLines, lines_, NULL, 1, zSize2_,
+		                                    lines_, NULL, 1, zSize2_, FFTW_BACKWARD, FFTW_ESTIMATE);
+	}
+}
+
+// Defines the FFT of the Green Function on the local lines
+void PoissonSolverFFT3DSlab::_defineSlabGreenF()
+{
+	int p, iX, iY, iZ;
+	for(p = 0; p < greenCount_[rank_]; p++){
+		iZ = greenStart_[rank_] + p;
+		if(iZ > zSize2_/2) iZ = zSize2_ - iZ;
+		for(iX = 0; iX <= xSize2_/2; iX++){
+			for(iY = 0; iY <= ySize2_/2; iY++){
+				planeIn_[iY + ySize2_*iX] = _greenF(iX,iY,iZ);
+			}
+			for(iY = ySize2_/2+1; iY < ySize2_; iY++){
+				planeIn_[iY + ySize2_*iX] = planeIn_[ySize2_ - iY + ySize2_*iX];
+			}
+		}
+		for(iX = xSize2_/2+1; iX < xSize2_; iX++){
+			for(iY = 0; iY < ySize2_; iY++){
+				planeIn_[iY + ySize2_*iX] = planeIn_[iY + ySize2_*(xSize2_ - iX)];
+			}
+		}
+		fftw_execute(planForward2D_);
+		memcpy(slab_ + p*planeSize_, planeOut_, sizeof(fftw_complex)*planeSize_);
+	}
+
+	_planesToLines(greenStart_, greenCount_, greenLines_);
+	if(planForwardZ_ != NULL){
+		fftw_execute_dft(planForwardZ_, greenLines_, greenLines_);
+	}
+
+	slabGreenF_defined_ = 1;
+	greenDx_ = dx_;
+	greenDy_ = dy_;
+	greenDz_ = dz_;
+	greenNBunches_ = nBunches_;
+	greenLambda_ = lambda_;
+}
+
+void PoissonSolverFFT3DSlab::_prepareExchange()
+{
+	int nSend = 0;
+	int nRecv = 0;
+	for(int r = 0; r < nRanks_; r++){
+		sendDispls_[r] = nSend;
+		recvDispls_[r] = nRecv;
+		nSend += sendCounts_[r];
+		nRecv += recvCounts_[r];
+	}
+	if((int) sendBuff_.size() < nSend) sendBuff_.resize(nSend);
+	if((int) recvBuff_.size() < nRecv) recvBuff_.resize(nRecv);
+}
+
+void PoissonSolverFFT3DSlab::_exchange()
+{
+	if(nRanks_ == 1){
+		if(sendCounts_[0] > 0){
+			memcpy(recvBuff_.data(), sendBuff_.data(), sizeof(double)*sendCounts_[0]);
+		}
+		return;
+	}
+	ORBIT_MPI_Alltoallv(sendBuff_.data(), sendCounts_.data(), sendDispls_.data(), MPI_DOUBLE,
+	                    recvBuff_.data(), recvCounts_.data(), recvDispls_.data(), MPI_DOUBLE, comm_);
+}
+
+void PoissonSolverFFT3DSlab::_planesToLines(vector<int>& planeStart, vector<int>& planeCount, fftw_complex* lines)
+{
+	int nLines = lineCount_[rank_];
+	int nPlanes = planeCount[rank_];
+	int p, l, r, iZ;
+	for(r = 0; r < nRanks_; r++){
+		sendCounts_[r] = 2*nPlanes*lineCount_[r];
+		recvCounts_[r] = 2*planeCount[r]*nLines;
+	}
+	_prepareExchange();
+
+	double* buff;
+	for(r = 0; r < nRanks_; r++){
+		buff = sendBuff_.data() + sendDispls_[r];
+		for(p = 0; p < nPlanes; p++){
+			memcpy(buff, slab_ + p*planeSize_ + lineStart_[r], sizeof(fftw_complex)*lineCount_[r]);
+			buff += 2*lineCount_[r];
+		}
+	}
+
+	_exchange();
+
+	//the z-planes that are not sent are the zero padding
+	for(l = 0; l < nLines*zSize2_; l++){
+		lines[l][0] = 0.;
+		lines[l][1] = 0.;
+	}
+	for(r = 0; r < nRanks_; r++){
+		buff = recvBuff_.data() + recvDispls_[r];
+		for(p = 0; p < planeCount[r]; p++){
+			iZ = planeStart[r] + p;
+			for(l = 0; l < nLines; l++){
+				lines[iZ + zSize2_*l][0] = buff[0];
+				lines[iZ + zSize2_*l][1] = buff[1];
+				buff += 2;
+			}
+		}
+	}
+}
+
+void PoissonSolverFFT3DSlab::_linesToPlanes()
+{
+	int nLines = lineCount_[rank_];
+	int nPlanes = zCount_[rank_];
+	int p, l, r, iZ;
+	for(r = 0; r < nRanks_; r++){
+		sendCounts_[r] = 2*zCount_[r]*nLines;
+		recvCounts_[r] = 2*nPlanes*lineCount_[r];
+	}
+	_prepareExchange();
+
+	double* buff;
+	for(r = 0; r < nRanks_; r++){
+		buff = sendBuff_.data() + sendDispls_[r];
+		for(p = 0; p < zCount_[r]; p++){
+			iZ = zStart_[r] + p;
+			for(l = 0; l < nLines; l++){
+				buff[0] = lines_[iZ + zSize2_*l][0];
+				buff[1] = lines_[iZ + zSize2_*l][1];
+				buff += 2;
+			}
+		}
+	}
+
+	_exchange();
+
+	for(r = 0; r < nRanks_; r++){
+		buff = recvBuff_.data() + recvDispls_[r];
+		for(p = 0; p < nPlanes; p++){
+			memcpy(slab_ + p*planeSize_ + lineStart_[r], buff, sizeof(fftw_complex)*lineCount_[r]);
+			buff += 2*lineCount_[r];
+		}
+	}
+}
+
+void PoissonSolverFFT3DSlab::findPotential(Grid3D* rhoGrid,Grid3D*  phiGrid, int* phiPlanes, pyORBIT_MPI_Comm* pyComm)
+{
+	_checkGrids(rhoGrid,phiGrid);
+
+	_initSlabs(pyComm->comm);
+
+	if(slabGreenF_defined_ == 0 || greenDx_ != dx_ || greenDy_ != dy_ || greenDz_ != dz_ ||
+		 greenNBunches_ != nBunches_ || greenLambda_ != lambda_){
+		_defineSlabGreenF();
+	}
+
+	double*** rhosc = rhoGrid->getArr3D();
+	double*** phisc = phiGrid->getArr3D();
+
+	int nXY = xSize_*ySize_;
+	int nPlanes = zCount_[rank_];
+	int nLines = lineCount_[rank_];
+	int i, j, k, p, r, n;
+	double* buff;
+
+	//the masks of the z-planes with the local charge and with the needed potential
+	std::fill(localMasks_.begin(), localMasks_.end(), 0);
+	int* hasRho = localMasks_.data() + rank_*zSize_;
+	int* needPhi = localMasks_.data() + (nRanks_ + rank_)*zSize_;
+	for(k = 0; k < zSize_; k++){
+		for(i = 0; i < xSize_ && hasRho[k] == 0; i++){
+			for(j = 0; j < ySize_; j++){
+				if(rhosc[k][i][j] != 0.){
+					hasRho[k] = 1;
+					break;
+				}
+			}
+		}
+	}
+	for(k = 0; k < zSize_; k++){
+		needPhi[k] = phiPlanes[k];
+	}
+	if(nRanks_ > 1){
+		ORBIT_MPI_Allreduce(localMasks_.data(), masks_.data(), 2*nRanks_*zSize_, MPI_INT, MPI_SUM, comm_);
+	}
+	else{
+		masks_ = localMasks_;
+	}
+
+	//send the local charge to the owners of the z-planes
+	for(r = 0; r < nRanks_; r++){
+		sendCounts_[r] = 0;
+		for(k = zStart_[r]; k < zStart_[r] + zCount_[r]; k++){
+			sendCounts_[r] += hasRho[k]*nXY;
+		}
+		recvCounts_[r] = 0;
+		for(k = zStart_[rank_]; k < zStart_[rank_] + nPlanes; k++){
+			recvCounts_[r] += masks_[r*zSize_ + k]*nXY;
+		}
+	}
+	_prepareExchange();
+	for(r = 0; r < nRanks_; r++){
+		buff = sendBuff_.data() + sendDispls_[r];
+		for(k = zStart_[r]; k < zStart_[r] + zCount_[r]; k++){
+			if(hasRho[k] == 0) continue;
+			for(i = 0; i < xSize_; i++){
+				for(j = 0; j < ySize_; j++){
+					*buff++ = rhosc[k][i][j];
+				}
+			}
+		}
+	}
+	_exchange();
+
+	//sum the charge and do the 2D FFT of the local planes
+	for(p = 0; p < nPlanes; p++){
+		k = zStart_[rank_] + p;
+		for(i = 0, n = xSize2_*ySize2_; i < n; i++){
+			planeIn_[i] = 0.;
+		}
+		for(r = 0; r < nRanks_; r++){
+			if(masks_[r*zSize_ + k] == 0) continue;
+			buff = recvBuff_.data() + recvDispls_[r];
+			for(i = 0; i < xSize_; i++){
+				for(j = 0; j < ySize_; j++){
+					planeIn_[j + ySize2_*i] += *buff++;
+				}
+			}
+			recvDispls_[r] += nXY;
+		}
+		fftw_execute(planForward2D_);
+		memcpy(slab_ + p*planeSize_, planeOut_, sizeof(fftw_complex)*planeSize_);
+	}
+
+	//do the FFT along z and the convolution with the FFT of the Green's function
+	_planesToLines(zStart_, zCount_, lines_);
+	if(planForwardZ_ != NULL){
+		fftw_execute(planForwardZ_);
+		double re, im;
+		for(i = 0, n = nLines*zSize2_; i < n; i++){
+			re = lines_[i][0];
+			im = lines_[i][1];
+			lines_[i][0] = re*greenLines_[i][0] - im*greenLines_[i][1];
+			lines_[i][1] = re*greenLines_[i][1] + im*greenLines_[i][0];
+		}
+		fftw_execute(planBackwardZ_);
+	}
+	_linesToPlanes();
+
+	//do the backward 2D FFT of the local planes
+	double scale_coeff = dx_/rhoGrid->getStepX();
+	double denom =  scale_coeff/ (xSize2_*ySize2_*zSize2_);
+	for(p = 0; p < nPlanes; p++){
+		memcpy(planeOut_, slab_ + p*planeSize_, sizeof(fftw_complex)*planeSize_);
+		fftw_execute(planBackward2D_);
+		for(i = 0; i < xSize_; i++){
+			for(j = 0; j < ySize_; j++){
+				phiSlab_[j + ySize_*(i + xSize_*p)] = denom * planeIn_[j + ySize2_*i];
+			}
+		}
+	}
+
+	//send the potential to the CPUs that need it
+	for(r = 0; r < nRanks_; r++){
+		sendCounts_[r] = 0;
+		for(k = zStart_[rank_]; k < zStart_[rank_] + nPlanes; k++){
+			sendCounts_[r] += masks_[(nRanks_ + r)*zSize_ + k]*nXY;
+		}
+		recvCounts_[r] = 0;
+		for(k = zStart_[r]; k < zStart_[r] + zCount_[r]; k++){
+			recvCounts_[r] += needPhi[k]*nXY;
+		}
+	}
+	_prepareExchange();
+	for(r = 0; r < nRanks_; r++){
+		buff = sendBuff_.data() + sendDispls_[r];
+		for(p = 0; p < nPlanes; p++){
+			k = zStart_[rank_] + p;
+			if(masks_[(nRanks_ + r)*zSize_ + k] == 0) continue;
+			memcpy(buff, phiSlab_.data() + p*nXY, sizeof(double)*nXY);
+			buff += nXY;
+		}
+	}
+	_exchange();
+
+	phiGrid->setZero();
+	for(r = 0; r < nRanks_; r++){
+		buff = recvBuff_.data() + recvDispls_[r];
+		for(k = zStart_[r]; k < zStart_[r] + zCount_[r]; k++){
+			if(needPhi[k] == 0) continue;
+			for(i = 0; i < xSize_; i++){
+				for(j = 0; j < ySize_; j++){
+					phisc[k][i][j] = *buff++;
+				}
+			}
+		}
+	}
+}
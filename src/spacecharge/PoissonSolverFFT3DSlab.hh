@@ -0,0 +1,132 @@
+//This class is a distributed Poisson Solver based on FFT convolution
+
+#ifndef SC_POISSON_SOLVER_FFT_3D_SLAB_H
+#define SC_POISSON_SOLVER_FFT_3D_SLAB_H
+
+#include <vector>
+
+#include "PoissonSolverFFT3D.hh"
+
+using namespace std;
+
+/**
+  The PoissonSolverFFT3DSlab class calculates electrostatic potential
+  of a 3D charge distribution using 3D FFT approach distributed among
+  CPUs of the MPI communicator. The twice extended grid is divided into
+  z-slabs for the 2D FFTs in the transverse planes and into groups of
+  the longitudinal lines for the 1D FFTs along z. The data are moved
+  between these two decompositions by the all-to-all MPI exchanges.
+  Each CPU keeps only its parts of the FFT arrays and the Green function.
+  The findPotential(rhoGrid,phiGrid) method of the parent class is not
+  distributed.
+*/
+
+class PoissonSolverFFT3DSlab: public PoissonSolverFFT3D
+{
+	public:
+
+		/** Constructor with sizes only*/
+		PoissonSolverFFT3DSlab(int xSize, int ySize, int zSize);
+
+		/** Constructor wit sizes and limits */
+		PoissonSolverFFT3DSlab(int xSize, int ySize, int zSize,
+			double xMin, double xMax,
+			double yMin, double yMax,
+			double zMin, double zMax);
+
+		/** Destructor */
+		virtual ~PoissonSolverFFT3DSlab();
+
+		using PoissonSolverFFT3D::findPotential;
+
+		/** Solves the Poisson problem distributed among CPUs of the communicator.
+		The rhoGrid on each CPU has the charge of the local macro-particles only.
+		The phiPlanes array has zSize flags of the z-planes where the potential is
+		needed on this CPU. After the solution the phiGrid has the potential only
+		in these planes, and the other planes are set to zero.
+		*/
+		void findPotential(Grid3D* rhoGrid,Grid3D*  phiGrid, int* phiPlanes, pyORBIT_MPI_Comm* pyComm);
+
+	protected:
+
+		//divide the grids among CPUs of the communicator
+		void _initSlabs(MPI_Comm comm);
+
+		//free the slab arrays and plans
+		void _freeSlabs();
+
+		//define the FFT of the Green function on the local lines
+		void _defineSlabGreenF();
+
+		//move the local transverse planes to the local longitudinal lines
+		void _planesToLines(vector<int>& planeStart, vector<int>& planeCount, fftw_complex* lines);
+
+		//move the first zSize_ points of the local lines to the local planes
+		void _linesToPlanes();
+
+		//calculate the displacements and sizes of the exchange buffers
+		void _prepareExchange();
+
+		//all-to-all exchange of the buffers
+		void _exchange();
+
+	protected:
+
+		//communicator, number of CPUs, and rank of this CPU
+		MPI_Comm comm_;
+		int nRanks_;
+		int rank_;
+
+		//the number of the complex values of the 2D FFT of the transverse plane
+		int planeSize_;
+
+		//the starts and counts of the z-planes of rho and phi for each CPU
+		vector<int> zStart_;
+		vector<int> zCount_;
+
+		//the starts and counts of the z-planes of the Green function for each CPU
+		vector<int> greenStart_;
+		vector<int> greenCount_;
+
+		//the starts and counts of the longitudinal lines for each CPU
+		vector<int> lineStart_;
+		vector<int> lineCount_;
+
+		//the masks of the z-planes with the charge and with the needed potential
+		//for each CPU, [0,nRanks_*zSize_) - charge, [nRanks_*zSize_,2*nRanks_*zSize_) - potential
+		vector<int> masks_;
+		vector<int> localMasks_;
+
+		//the FFT arrays of one transverse plane, local planes, and local lines
+		double* planeIn_;
+		fftw_complex* planeOut_;
+		fftw_complex* slab_;
+		fftw_complex* lines_;
+		fftw_complex* greenLines_;
+
+		//the local z-planes of the potential
+		vector<double> phiSlab_;
+
+		fftw_plan planForward2D_;
+		fftw_plan planBackward2D_;
+		fftw_plan planForwardZ_;
+		fftw_plan planBackwardZ_;
+
+		//the exchange buffers and the numbers of doubles for each CPU
+		vector<double> sendBuff_;
+		vector<double> recvBuff_;
+		vector<int> sendCounts_;
+		vector<int> sendDispls_;
+		vector<int> recvCounts_;
+		vector<int> recvDispls_;
+
+		//the parameters of the Green function on the local lines
+		int slabGreenF_defined_;
+		double greenDx_;
+		double greenDy_;
+		double greenDz_;
+		int greenNBunches_;
+		double greenLambda_;
+};
+//end of SC_POISSON_SOLVER_FFT_3D_SLAB_H ifdef
+#endif
@@ -30,6 +30,7 @@ SpaceChargeCalc2p5D::SpaceChargeCalc2p5D(int xSize, int ySize, int zSize, double
 	phiGrid = new Grid2D(xSize, ySize);
 	zGrid = new Grid1D(zSize);
 	bunchExtremaCalc = new BunchExtremaCalculator();
+	setSortingPeriod(0,0);
 }
 
 SpaceChargeCalc2p5D::SpaceChargeCalc2p5D(int xSize, int ySize, int zSize): CppPyWrapper(NULL)
@@ -40,6 +41,7 @@ SpaceChargeCalc2p5D::SpaceChargeCalc2p5D(int xSize, int ySize, int zSize): CppPy
 	phiGrid = new Grid2D(xSize, ySize);
 	zGrid = new Grid1D(zSize);
 	bunchExtremaCalc = new BunchExtremaCalculator();
+	setSortingPeriod(0,0);
 }
 
 SpaceChargeCalc2p5D::~SpaceChargeCalc2p5D(){
@@ -74,9 +76,44 @@ Grid1D* SpaceChargeCalc2p5D::getLongGrid(){
 	return zGrid;
 }
 
+void SpaceChargeCalc2p5D::setSortingPeriod(int nCalls, int keyType){
+	sortPeriod = nCalls;
+	sortKeyType = keyType;
+	sortCount = 0;
+	for(int i = 0; i < 4; i++){
+		sortGridLimits[i] = 0.;
+	}
+}
+
+int SpaceChargeCalc2p5D::getSortingPeriod(){
+	return sortPeriod;
+}
+
+int SpaceChargeCalc2p5D::getSortingKeyType(){
+	return sortKeyType;
+}
+
+void SpaceChargeCalc2p5D::sortBunch(Bunch* bunch){
+	if(sortPeriod <= 0) return;
+	double limits[4] = {rhoGrid->getMinX(),rhoGrid->getMaxX(),rhoGrid->getMinY(),rhoGrid->getMaxY()};
+	double steps[4] = {rhoGrid->getStepX(),rhoGrid->getStepX(),rhoGrid->getStepY(),rhoGrid->getStepY()};
+	int gridChanged = 0;
+	for(int i = 0; i < 4; i++){
+		if(fabs(limits[i] - sortGridLimits[i]) > steps[i]) gridChanged = 1;
+	}
+	if(sortCount % sortPeriod == 0 || gridChanged == 1){
+		rhoGrid->sortBunch(bunch,sortKeyType);
+		sortCount = 0;
+		for(int i = 0; i < 4; i++){
+			sortGridLimits[i] = limits[i];
+		}
+	}
+	sortCount++;
+}
+
 void SpaceChargeCalc2p5D::trackBunch(Bunch* bunch, double length, BaseBoundary2D* boundary){
 
-	int nPartsGlobal = bunch->getSizeGlobal();
+	int nPartsGlobal = bunch->getStatistics()->getCount();
 	if(nPartsGlobal < 2) return;
 
 	double totalMacrosize = 0.;
@@ -102,21 +139,24 @@ void SpaceChargeCalc2p5D::trackBunch(Bunch* bunch, double length, BaseBoundary2D
 	double Lfactor = 0.;
 	double x,y,z,ex,ey,ez;
 
-	for (int i = 0, n = bunch->getSize(); i < n; i++){
-		x = bunch->x(i);
-		y = bunch->y(i);
-		z = bunch->z(i);
-
-		if(boundary == NULL || (boundary != NULL && boundary->isInside(x,y) == BaseBoundary2D::IS_INSIDE)){
-			phiGrid->calcGradient(x,y,ex,ey);
-			//std::cout<<" debug ip="<<i<<" x="<<x<<" y="<<y<<" z="<<z<<" ex="<<ex<<" ey="<<ey<<" ez="<<ez<<" rho_z="<< zGrid->getValue(z) <<std::endl;
-			Lfactor = - zGrid->getValue(z) * factor;
-			//std::cerr<<" debug zgrid="<<zGrid->getValue(z)<<" lfactor="<<Lfactor;
-			bunch->xp(i) += ex * Lfactor;
-			bunch->yp(i) += ey * Lfactor;
-			//std::cerr<<" xp="<<bunch->xp(i)<<" yp="<<bunch->yp(i);
+	dispatchCoordRows(bunch, [&](auto arr)
+	{
+		for (int i = 0, n = bunch->getSize(); i < n; i++){
+			x = arr[i][0];
+			y = arr[i][2];
+			z = arr[i][4];
+
+			if(boundary == NULL || (boundary != NULL && boundary->isInside(x,y) == BaseBoundary2D::IS_INSIDE)){
+				phiGrid->calcGradient(x,y,ex,ey);
+				//std::cout<<" debug ip="<<i<<" x="<<x<<" y="<<y<<" z="<<z<<" ex="<<ex<<" ey="<<ey<<" ez="<<ez<<" rho_z="<< zGrid->getValue(z) <<std::endl;
+				Lfactor = - zGrid->getValue(z) * factor;
+				//std::cerr<<" debug zgrid="<<zGrid->getValue(z)<<" lfactor="<<Lfactor;
+				arr[i][1] += ex * Lfactor;
+				arr[i][3] += ey * Lfactor;
+				//std::cerr<<" xp="<<arr[i][1]<<" yp="<<arr[i][3];
+			}
 		}
-	}
+	});
 }
 
 void SpaceChargeCalc2p5D::bunchAnalysis(Bunch* bunch, double& totalMacrosize, BaseBoundary2D* boundary){
@@ -125,7 +165,7 @@ void SpaceChargeCalc2p5D::bunchAnalysis(Bunch* bunch, double& totalMacrosize, Ba
 
 	if(boundary == NULL){
 
-		bunchExtremaCalc->getExtremaXYZ(bunch, xMin, xMax, yMin, yMax, zMin, zMax);
+		bunchExtremaCalc->getExtremaXYZ(bunch->getStatisticsFromMemory(), xMin, xMax, yMin, yMax, zMin, zMax);
 
 		//check if the beam size is not zero
 		if( xMin >=  xMax || yMin >=  yMax || zMin >=  zMax){
@@ -179,7 +219,7 @@ void SpaceChargeCalc2p5D::bunchAnalysis(Bunch* bunch, double& totalMacrosize, Ba
 
 		xy_ratio = (xMax - xMin)/(yMax - yMin);
 
-		bunchExtremaCalc->getExtremaZ(bunch, zMin, zMax);
+		bunchExtremaCalc->getExtremaZ(bunch->getStatisticsFromMemory(), zMin, zMax);
 
 		//check if the beam size is not zero
 		if(zMin >=  zMax){
@@ -220,6 +260,7 @@ void SpaceChargeCalc2p5D::bunchAnalysis(Bunch* bunch, double& totalMacrosize, Ba
 	rhoGrid->setZero();
 	zGrid->setZero();
 
+	this->sortBunch(bunch);
 	rhoGrid->binBunch(bunch);
 	zGrid->binBunch(bunch);
 
@@ -49,10 +49,26 @@ public:
 	/** Returns the 1D grid with a longitudinal density. **/
 	Grid1D* getLongGrid();
 
+	/** Sets the sorting of macro-particles by the rho grid cells before binning.
+	    The bunch is sorted every nCalls calls of trackBunch(...) and when the grid
+	    moved more than one grid step since the last sorting. nCalls = 0 switches
+	    the sorting off (default). keyType = 0 - row-major order, 1 - Morton order.
+	*/
+	void setSortingPeriod(int nCalls, int keyType);
+
+	/** Returns the period of the bunch sorting. 0 means no sorting. */
+	int getSortingPeriod();
+
+	/** Returns the key type of the bunch sorting. */
+	int getSortingKeyType();
+
 private:
 	/** Analyses the bunch and does bining. */
  void bunchAnalysis(Bunch* bunch, double& totalMacrosize, BaseBoundary2D* boundary);
 
+	/** Sorts the bunch by the rho grid cells if it is time to do it. */
+	void sortBunch(Bunch* bunch);
+
 protected:
 	PoissonSolverFFT2D* poissonSolver;
 	Grid2D* rhoGrid;
@@ -61,6 +77,12 @@ protected:
 	OrbitUtils::BunchExtremaCalculator* bunchExtremaCalc;
 
 	double xy_ratio;
+
+	//the bunch sorting parameters and the grid limits at the last sorting
+	int sortPeriod;
+	int sortKeyType;
+	int sortCount;
+	double sortGridLimits[4];
 };
 //end of SC_SPACECHARGE_CALC_2P5D_H
 #endif
@@ -109,7 +109,7 @@ Grid1D* SpaceChargeCalc2p5Drb::getLongDerivativeGrid(){
 
 void SpaceChargeCalc2p5Drb::trackBunch(Bunch* bunch, double length, double pipe_radius){
 
-	int nPartsGlobal = bunch->getSizeGlobal();
+	int nPartsGlobal = bunch->getStatistics()->getCount();
 	if(nPartsGlobal < 2) return;
 
 	//calculate max and min of X,Y,Z coordinates, a_bunch**2 = 2*<r^2> for the bunch
@@ -143,35 +143,38 @@ void SpaceChargeCalc2p5Drb::trackBunch(Bunch* bunch, double length, double pipe_
 	//std::cout<<" debug long_sc_factor_in="<<long_sc_factor_in<<" long_sc_factor_out="<<long_sc_factor_out<<std::endl;
 	//std::cout<<" debug long_sc_factor="<<long_sc_factor<<std::endl;
 	//std::cout<<" debug z="<<zGrid->getMaxZ()*0.5<<" derivat="<<zDerivGrid->getValue(zGrid->getMaxZ()*0.5)<<std::endl;
-	for (int i = 0, n = bunch->getSize(); i < n; i++){
-		x = bunch->x(i);
-		y = bunch->y(i);
-		z = bunch->z(i);
-		r2 = (x - x_center)*(x -x_center)  + (y - y_center)*(y - y_center);
-
-		phiGrid->calcGradient(x,y,ex,ey);
-    ez = zDerivGrid->getValue(z);
-		//std::cout<<"debug ip="<<i<<" x="<<x<<" y="<<y<<" z="<<z<<" ex="<<ex<<" ey="<<ey<<" ez="<<ez<<" rho_z="<< zGrid->getValue(z) <<std::endl;
-
-		Lfactor = - zGrid->getValue(z) * factor;
-
-		bunch->xp(i) += ex * Lfactor;
-		bunch->yp(i) += ey * Lfactor;
-
-		if(r2 <= a_bunch_2){
-			long_sc_coeff = long_sc_factor_in - r2/a_bunch_2;
-		} else {
-			long_sc_coeff = long_sc_factor_out - log(r2);
+	dispatchCoordRows(bunch, [&](auto arr)
+	{
+		for (int i = 0, n = bunch->getSize(); i < n; i++){
+			x = arr[i][0];
+			y = arr[i][2];
+			z = arr[i][4];
+			r2 = (x - x_center)*(x -x_center)  + (y - y_center)*(y - y_center);
+
+			phiGrid->calcGradient(x,y,ex,ey);
+	    ez = zDerivGrid->getValue(z);
+			//std::cout<<"debug ip="<<i<<" x="<<x<<" y="<<y<<" z="<<z<<" ex="<<ex<<" ey="<<ey<<" ez="<<ez<<" rho_z="<< zGrid->getValue(z) <<std::endl;
+
+			Lfactor = - zGrid->getValue(z) * factor;
+
+			arr[i][1] += ex * Lfactor;
+			arr[i][3] += ey * Lfactor;
+
+			if(r2 <= a_bunch_2){
+				long_sc_coeff = long_sc_factor_in - r2/a_bunch_2;
+			} else {
+				long_sc_coeff = long_sc_factor_out - log(r2);
+			}
+			arr[i][5] += ez*long_sc_factor*long_sc_coeff;
 		}
-		bunch->dE(i) += ez*long_sc_factor*long_sc_coeff;
-	}
+	});
 }
 
 void SpaceChargeCalc2p5Drb::bunchAnalysis(Bunch* bunch, double& totalMacrosize, double& x_c, double& y_c, double& a_bunch){
 
 	double xMin, xMax, yMin, yMax, zMin, zMax;
 
-	bunchExtremaCalc->getExtremaXYZ(bunch, xMin, xMax, yMin, yMax, zMin, zMax);
+	bunchExtremaCalc->getExtremaXYZ(bunch->getStatisticsFromMemory(), xMin, xMax, yMin, yMax, zMin, zMax);
 
 	//check if the beam size is not zero
   if( xMin >=  xMax || yMin >=  yMax || zMin >=  zMax){
@@ -12,14 +12,15 @@
 // DESCRIPTION
 // This class calculates the space charge kicks for bunch using 3D Poisson Solver.
 // The solver implements FFT convolution algorithm to calculate the potential in
-// the coordinate system where the bunch is resting. The solver is not parallel in the
-// sense of efficiency, but it is working correctly, and particles can are distributed
-// among CPUs (not by the solver).
+// the coordinate system where the bunch is resting. By default the solver is not parallel
+// in the sense of efficiency, but it is working correctly, and particles can are distributed
+// among CPUs (not by the solver). With the distributed solver the FFT convolution is divided
+// among CPUs in z-slabs, and the charge density is not summed on all CPUs.
 //
 /////////////////////////////////////////////////////////////////////////////
 
 #include "Grid3D.hh"
-#include "PoissonSolverFFT3D.hh"
+#include "PoissonSolverFFT3DSlab.hh"
 #include "SpaceChargeCalc3D.hh"
 #include "BufferStore.hh"
 #include "OrbitConst.hh"
@@ -34,7 +35,7 @@ SpaceChargeCalc3D::SpaceChargeCalc3D(int xSize, int ySize, int zSize): CppPyWrap
 {
 	xy_ratio = 1.0;
 	xz_ratio = 1.0;
-	poissonSolver = new PoissonSolverFFT3D(xSize, ySize, zSize, -xy_ratio, xy_ratio, -1./xy_ratio, 1./xy_ratio, -1./xz_ratio, 1./xz_ratio);
+	poissonSolver = new PoissonSolverFFT3DSlab(xSize, ySize, zSize, -xy_ratio, xy_ratio, -1./xy_ratio, 1./xy_ratio, -1./xz_ratio, 1./xz_ratio);
 	rhoGrid = new Grid3D(xSize, ySize, zSize);
 	rhoGrid->setGridX(poissonSolver->getMinX(),poissonSolver->getMaxX());
 	rhoGrid->setGridY(poissonSolver->getMinY(),poissonSolver->getMaxY());
@@ -56,6 +57,12 @@ SpaceChargeCalc3D::SpaceChargeCalc3D(int xSize, int ySize, int zSize): CppPyWrap
 	// The frequency of the bunch arrivals in Hz. It defines by the RFQ frequency.
 	// The non-zero is setup by default to avoid division on zero
 	frequency_ = 402.5e+6;
+
+	//no sorting of the macro-particles by default
+	setSortingPeriod(0,0);
+
+	//the Poisson solver is not distributed by default
+	distributedSolver = 0;
 }
 
 SpaceChargeCalc3D::~SpaceChargeCalc3D(){
@@ -97,9 +104,56 @@ double SpaceChargeCalc3D::getFrequencyOfBunches(){
 	return frequency_;
 }
 
+void SpaceChargeCalc3D::setSortingPeriod(int nCalls, int keyType){
+	sortPeriod = nCalls;
+	sortKeyType = keyType;
+	sortCount = 0;
+	for(int i = 0; i < 6; i++){
+		sortGridLimits[i] = 0.;
+	}
+}
+
+int SpaceChargeCalc3D::getSortingPeriod(){
+	return sortPeriod;
+}
+
+int SpaceChargeCalc3D::getSortingKeyType(){
+	return sortKeyType;
+}
+
+void SpaceChargeCalc3D::setDistributedSolver(int useDistributedSolver){
+	distributedSolver = useDistributedSolver;
+}
+
+int SpaceChargeCalc3D::getDistributedSolver(){
+	return distributedSolver;
+}
+
+void SpaceChargeCalc3D::sortBunch(Bunch* bunch){
+	if(sortPeriod <= 0) return;
+	double limits[6] = {rhoGrid->getMinX(),rhoGrid->getMaxX(),
+	                    rhoGrid->getMinY(),rhoGrid->getMaxY(),
+	                    rhoGrid->getMinZ(),rhoGrid->getMaxZ()};
+	double steps[6] = {rhoGrid->getStepX(),rhoGrid->getStepX(),
+	                   rhoGrid->getStepY(),rhoGrid->getStepY(),
+	                   rhoGrid->getStepZ(),rhoGrid->getStepZ()};
+	int gridChanged = 0;
+	for(int i = 0; i < 6; i++){
+		if(fabs(limits[i] - sortGridLimits[i]) > steps[i]) gridChanged = 1;
+	}
+	if(sortCount % sortPeriod == 0 || gridChanged == 1){
+		rhoGrid->sortBunch(bunch,sortKeyType);
+		sortCount = 0;
+		for(int i = 0; i < 6; i++){
+			sortGridLimits[i] = limits[i];
+		}
+	}
+	sortCount++;
+}
+
 void SpaceChargeCalc3D::trackBunch(Bunch* bunch, double length){
 
-	int nPartsGlobal = bunch->getSizeGlobal();
+	int nPartsGlobal = bunch->getStatistics()->getCount();
 	if(nPartsGlobal < 2) return;
 
 	//calculate max and min of X,Y,Z, bin paricles and set up limits for rhoGrid, phiGrid
@@ -112,9 +166,6 @@ void SpaceChargeCalc3D::trackBunch(Bunch* bunch, double length){
 		this->bunchAnalysis(bunch);
 	}
 
-	//calculate phiGrid with potential. The z-coordinate is in the center of mass coordinate system
-	poissonSolver->findPotential(rhoGrid,phiGrid);
-
 	SyncPart* syncPart = bunch->getSyncPart();
 	double gamma = syncPart->getGamma();
 	double beta = syncPart->getBeta();
@@ -122,29 +173,54 @@ void SpaceChargeCalc3D::trackBunch(Bunch* bunch, double length){
 	//distance between bunches in the center of mass of the bunch
 	double lambda_cm = OrbitConst::c*beta*gamma/frequency_;
 
-	double trans_factor =  length*bunch->getClassicalRadius()/(pow(beta,2)*pow(gamma,2));
-	double long_factor =  length*bunch->getClassicalRadius()*bunch->getMass();
-
 	double x,y,z,ex,ey,ez;
 
 	double z_center = (phiGrid->getMaxZ() + phiGrid->getMinZ())/2.0;
 
-	for (int i = 0, n = bunch->getSize(); i < n; i++){
-		x = bunch->x(i);
-		y = bunch->y(i);
-		z = (bunch->z(i) - z_center)*gamma + z_center;
+	//calculate phiGrid with potential. The z-coordinate is in the center of mass coordinate system
+	//The distributed solver sums the charge from all CPUs by itself, and it returns
+	//the potential only in the z-planes needed for the local macro-particles.
+	if(distributedSolver == 1){
+		phiPlanes.assign(phiGrid->getSizeZ(),0);
+		readCoordRows(bunch, [&](auto arr)
+		{
+			for (int i = 0, n = bunch->getSize(); i < n; i++){
+				z = (arr[i][4] - z_center)*gamma + z_center;
+				if(nExtBunches > 0){
+					z = remainder(z,lambda_cm);
+				}
+				phiGrid->markPlanesZ(z,phiPlanes.data());
+			}
+		});
+		poissonSolver->findPotential(rhoGrid,phiGrid,phiPlanes.data(),bunch->getMPI_Comm_Local());
+	}
+	else{
+		rhoGrid->synchronizeMPI(bunch->getMPI_Comm_Local());
+		poissonSolver->findPotential(rhoGrid,phiGrid);
+	}
+
+	double trans_factor =  length*bunch->getClassicalRadius()/(pow(beta,2)*pow(gamma,2));
+	double long_factor =  length*bunch->getClassicalRadius()*bunch->getMass();
 
-		if(nExtBunches > 0){
-			z = remainder(z,lambda_cm);
+	dispatchCoordRows(bunch, [&](auto arr)
+	{
+		for (int i = 0, n = bunch->getSize(); i < n; i++){
+			x = arr[i][0];
+			y = arr[i][2];
+			z = (arr[i][4] - z_center)*gamma + z_center;
+
+			if(nExtBunches > 0){
+				z = remainder(z,lambda_cm);
+			}
+
+			phiGrid->calcGradient(x,ex,y,ey,z,ez);
+			//std::cout<<"debug ip="<<i<<" x="<<x<<" y="<<y<<" z="<<z<<" ex="<<ex<<" ey="<<ey<<" ez="<<ez<<" rho_z="<< zGrid->getValue(z) <<std::endl;
+			//calculate momentum kicks
+			arr[i][1] += -ex * trans_factor;
+			arr[i][3] += -ey * trans_factor;
+			arr[i][5] += -ez * long_factor;
 		}
-
-		phiGrid->calcGradient(x,ex,y,ey,z,ez);
-		//std::cout<<"debug ip="<<i<<" x="<<x<<" y="<<y<<" z="<<z<<" ex="<<ex<<" ey="<<ey<<" ez="<<ez<<" rho_z="<< zGrid->getValue(z) <<std::endl;
-		//calculate momentum kicks
-		bunch->xp(i) += -ex * trans_factor;
-		bunch->yp(i) += -ey * trans_factor;
-		bunch->dE(i) += -ez * long_factor;
-	}
+	});
 }
 
 void SpaceChargeCalc3D::bunchAnalysis(Bunch* bunch){
@@ -153,7 +229,7 @@ void SpaceChargeCalc3D::bunchAnalysis(Bunch* bunch){
 
 	double xMin, xMax, yMin, yMax, zMin, zMax;
 
-	bunchExtremaCalc->getExtremaXYZ(bunch, xMin, xMax, yMin, yMax, zMin, zMax);
+	bunchExtremaCalc->getExtremaXYZ(bunch->getStatisticsFromMemory(), xMin, xMax, yMin, yMax, zMin, zMax);
 
 	//we are not going to account for neighboring bunches here
 	rhoGrid->setLongWrapping(0);
@@ -236,8 +312,8 @@ void SpaceChargeCalc3D::bunchAnalysis(Bunch* bunch){
 
 	//bin rho&z Bunch to the Grid
 	rhoGrid->setZero();
+	this->sortBunch(bunch);
 	rhoGrid->binBunch(bunch);
-	rhoGrid->synchronizeMPI(bunch->getMPI_Comm_Local());
 
 	//after binning we have to move to the the center of mass of the bunch
 	center = (zMax + zMin)/2.0;
@@ -254,7 +330,7 @@ void SpaceChargeCalc3D::wrappedBunchAnalysis(Bunch* bunch){
 
 	double xMin, xMax, yMin, yMax, zMin, zMax;
 
-	bunchExtremaCalc->getExtremaXYZ(bunch, xMin, xMax, yMin, yMax, zMin, zMax);
+	bunchExtremaCalc->getExtremaXYZ(bunch->getStatisticsFromMemory(), xMin, xMax, yMin, yMax, zMin, zMax);
 
 	//we will account for neighboring bunches here
 	rhoGrid->setLongWrapping(1);
@@ -311,8 +387,8 @@ void SpaceChargeCalc3D::wrappedBunchAnalysis(Bunch* bunch){
 
 	//bin rho&z Bunch to the Grid
 	rhoGrid->setZero();
+	this->sortBunch(bunch);
 	rhoGrid->binBunch(bunch,lambda);
-	rhoGrid->synchronizeMPI(bunch->getMPI_Comm_Local());
 
 	//after binning we have to rescale the z-coordinate to the center-of-mass system
 	center = (zMax + zMin)/2.0;
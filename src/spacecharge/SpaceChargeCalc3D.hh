@@ -1,9 +1,10 @@
 /**
  This class calculates the space charge kicks for bunch using 3D Poisson Solver.
  The solver implements FFT convolution algorithm to calculate the potential in
- the coordinate system where the bunch is resting. The solver is not parallel in the
- sense of efficiency, but it is working correctly, and particles can are distributed
- among CPUs (not by the solver).
+ the coordinate system where the bunch is resting. By default the solver is not parallel
+ in the sense of efficiency, but it is working correctly, and particles can are distributed
+ among CPUs (not by the solver). With the distributed solver the FFT convolution is divided
+ among CPUs in z-slabs, and the charge density is not summed on all CPUs.
 */
 
 #ifndef SC_SPACECHARGE_CALC_3D_H
@@ -15,6 +16,7 @@
 
 #include <cstdlib>
 #include <cmath>
+#include <vector>
 
 //ORBIT bunch
 #include "Bunch.hh"
@@ -24,7 +26,7 @@
 #include "BunchExtremaCalculator.hh"
 
 #include "Grid3D.hh"
-#include "PoissonSolverFFT3D.hh"
+#include "PoissonSolverFFT3DSlab.hh"
 
 using namespace std;
 
@@ -65,6 +67,31 @@ public:
 	/** Get frequency of the arrivals of the bunches */
 	double getFrequencyOfBunches();
 
+	/** Sets the sorting of macro-particles by the rho grid cells before binning.
+	    The bunch is sorted every nCalls calls of trackBunch(...) and when the grid
+	    moved more than one grid step since the last sorting. nCalls = 0 switches
+	    the sorting off (default). keyType = 0 - row-major order, 1 - Morton order.
+	*/
+	void setSortingPeriod(int nCalls, int keyType);
+
+	/** Returns the period of the bunch sorting. 0 means no sorting. */
+	int getSortingPeriod();
+
+	/** Returns the key type of the bunch sorting. */
+	int getSortingKeyType();
+
+	/** Sets the usage of the Poisson solver distributed among CPUs in z-slabs.
+	    With the distributed solver the rho grid of each CPU keeps only the charge of
+	    the local macro-particles, and the phi grid keeps the potential only in the
+	    z-planes needed for the local macro-particles. The rho grid is not summed
+	    over CPUs, so getRhoGrid() returns only the local charge in this mode.
+	    0 - off (default), 1 - on.
+	*/
+	void setDistributedSolver(int useDistributedSolver);
+
+	/** Returns 1 if the distributed Poisson solver is used and 0 otherwise. */
+	int getDistributedSolver();
+
 private:
 
 	/** Analyses the bunch and does binning. */
@@ -73,8 +100,11 @@ private:
 	/** Analyses the bunch and does binning in the case of accounting for neighboring bunches */
  	void wrappedBunchAnalysis(Bunch* bunch);
 
+	/** Sorts the bunch by the rho grid cells if it is time to do it. */
+	void sortBunch(Bunch* bunch);
+
 protected:
-	PoissonSolverFFT3D* poissonSolver;
+	PoissonSolverFFT3DSlab* poissonSolver;
 	Grid3D* rhoGrid;
 	Grid3D* phiGrid;
 	OrbitUtils::BunchExtremaCalculator* bunchExtremaCalc;
@@ -94,6 +124,17 @@ protected:
 
 	//The frequency of the bunch arrivals in Hz. It defines by the RFQ frequency.
 	double frequency_;
+
+	//the bunch sorting parameters and the grid limits at the last sorting
+	int sortPeriod;
+	int sortKeyType;
+	int sortCount;
+	double sortGridLimits[6];
+
+	//1 if the Poisson solver is distributed among CPUs, and
+	//the flags of the z-planes of the potential needed for the local macro-particles
+	int distributedSolver;
+	std::vector<int> phiPlanes;
 };
 //end of SC_SPACECHARGE_CALC_3D_H
 #endif
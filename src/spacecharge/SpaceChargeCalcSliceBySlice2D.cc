@@ -65,7 +65,7 @@ Grid3D* SpaceChargeCalcSliceBySlice2D::getPhiGrid(){
 
 void SpaceChargeCalcSliceBySlice2D::trackBunch(Bunch* bunch, double length, BaseBoundary2D* boundary){
 
-	int nPartsGlobal = bunch->getSizeGlobal();
+	int nPartsGlobal = bunch->getStatistics()->getCount();
 	if(nPartsGlobal < 2) return;
 
 	double totalMacrosize = 0.;
@@ -101,18 +101,21 @@ void SpaceChargeCalcSliceBySlice2D::trackBunch(Bunch* bunch, double length, Base
 
 	double x,y,z,ex,ey,ez;
 
-	for (int i = 0, n = bunch->getSize(); i < n; i++){
-		x = bunch->x(i);
-		y = bunch->y(i);
-		z = bunch->z(i);
+	dispatchCoordRows(bunch, [&](auto arr)
+	{
+		for (int i = 0, n = bunch->getSize(); i < n; i++){
+			x = arr[i][0];
+			y = arr[i][2];
+			z = arr[i][4];
 
-		if(boundary == NULL || (boundary != NULL && boundary->isInside(x,y) == BaseBoundary2D::IS_INSIDE)){
-			phiGrid3D->calcGradient(x,ex,y,ey,z,ez);
+			if(boundary == NULL || (boundary != NULL && boundary->isInside(x,y) == BaseBoundary2D::IS_INSIDE)){
+				phiGrid3D->calcGradient(x,ex,y,ey,z,ez);
 
-			bunch->xp(i) -= ex * factor;
-			bunch->yp(i) -= ey * factor;
+				arr[i][1] -= ex * factor;
+				arr[i][3] -= ey * factor;
+			}
 		}
-	}
+	});
 }
 
 void SpaceChargeCalcSliceBySlice2D::bunchAnalysis(Bunch* bunch, double& totalMacrosize, BaseBoundary2D* boundary){
@@ -121,7 +124,7 @@ void SpaceChargeCalcSliceBySlice2D::bunchAnalysis(Bunch* bunch, double& totalMac
 
 	if(boundary == NULL){
 
-		bunchExtremaCalc->getExtremaXYZ(bunch, xMin, xMax, yMin, yMax, zMin, zMax);
+		bunchExtremaCalc->getExtremaXYZ(bunch->getStatisticsFromMemory(), xMin, xMax, yMin, yMax, zMin, zMax);
 
 		//check if the beam size is not zero
 		if( xMin >=  xMax || yMin >=  yMax || zMin >=  zMax){
@@ -175,7 +178,7 @@ void SpaceChargeCalcSliceBySlice2D::bunchAnalysis(Bunch* bunch, double& totalMac
 
 		xy_ratio = (xMax - xMin)/(yMax - yMin);
 
-		bunchExtremaCalc->getExtremaZ(bunch, zMin, zMax);
+		bunchExtremaCalc->getExtremaZ(bunch->getStatisticsFromMemory(), zMin, zMax);
 
 		//check if the beam size is not zero
 		if(zMin >=  zMax){
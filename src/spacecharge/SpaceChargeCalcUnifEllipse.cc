@@ -80,16 +80,19 @@ void SpaceChargeCalcUnifEllipse::trackBunch(Bunch* bunch, double length){
 	double long_factor =  length*bunch->getClassicalRadius()*bunch->getMass();
 
 	double x,y,z,ex,ey,ez;
-	for (int i = 0, n = bunch->getSize(); i < n; i++){
-		x = bunch->x(i) - x_center;
-		y = bunch->y(i) - y_center;
-		z = (bunch->z(i) - z_center)*gamma;
-		this->calculateField(x,y,z,ex,ey,ez);
-		//calculate momentum kicks
-		bunch->xp(i) += ex * trans_factor;
-		bunch->yp(i) += ey * trans_factor;
-		bunch->dE(i) += ez * long_factor;
-	}
+	dispatchCoordRows(bunch, [&](auto arr)
+	{
+		for (int i = 0, n = bunch->getSize(); i < n; i++){
+			x = arr[i][0] - x_center;
+			y = arr[i][2] - y_center;
+			z = (arr[i][4] - z_center)*gamma;
+			this->calculateField(x,y,z,ex,ey,ez);
+			//calculate momentum kicks
+			arr[i][1] += ex * trans_factor;
+			arr[i][3] += ey * trans_factor;
+			arr[i][5] += ez * long_factor;
+		}
+	});
 }
 
 /** Analyses the bunch and sets up the ellipsoid filed sources */
@@ -105,42 +108,43 @@ void SpaceChargeCalcUnifEllipse::bunchAnalysis(Bunch* bunch){
 	}
 
 	//caluclate limits and averages
-	double** partArr=bunch->coordArr();
-	double* coordArr = NULL;
+	double coordArr[6];
 	bunch->compress();
-	double** part_coord_arr = bunch->coordArr();
 	int has_msize = bunch->hasParticleAttributes("macrosize");
-	if(has_msize > 0){
-		ParticleMacroSize* macroSizeAttr = (ParticleMacroSize*) bunch->getParticleAttributes("macrosize");
-		double m_size = 0.;
-		for(int ip = 0, n = bunch->getSize(); ip < n; ip++){
-			m_size = macroSizeAttr->macrosize(ip);
-			coordArr = partArr[ip];
-			coord_avg[0] += m_size*coordArr[0];
-			coord_avg[1] += m_size*coordArr[2];
-			coord_avg[2] += m_size*coordArr[4];
-			coord_avg[3] += m_size*coordArr[0]*coordArr[0];
-			coord_avg[4] += m_size*coordArr[2]*coordArr[2];
-			coord_avg[5] += m_size*coordArr[4]*coordArr[4];
-			coord_avg[6] += m_size;
-		}
-	} else {
-		double m_size = bunch->getMacroSize();
-		int nParts = bunch->getSize();
-		coord_avg[6] = m_size*nParts;
-		for(int ip = 0; ip < nParts; ip++){
-			coordArr = partArr[ip];
-			coord_avg[0] += coordArr[0];
-			coord_avg[1] += coordArr[2];
-			coord_avg[2] += coordArr[4];
-			coord_avg[3] += coordArr[0]*coordArr[0];
-			coord_avg[4] += coordArr[2]*coordArr[2];
-			coord_avg[5] += coordArr[4]*coordArr[4];
-		}
-		for (int i = 0; i < 6; i++){
-			coord_avg[i] *= m_size;
+	readCoordRows(bunch, [&](auto partArr)
+	{
+		if(has_msize > 0){
+			ParticleMacroSize* macroSizeAttr = (ParticleMacroSize*) bunch->getParticleAttributes("macrosize");
+			double m_size = 0.;
+			for(int ip = 0, n = bunch->getSize(); ip < n; ip++){
+				m_size = macroSizeAttr->readMacrosize(ip);
+				for(int j = 0; j < 6; j++) coordArr[j] = partArr[ip][j];
+				coord_avg[0] += m_size*coordArr[0];
+				coord_avg[1] += m_size*coordArr[2];
+				coord_avg[2] += m_size*coordArr[4];
+				coord_avg[3] += m_size*coordArr[0]*coordArr[0];
+				coord_avg[4] += m_size*coordArr[2]*coordArr[2];
+				coord_avg[5] += m_size*coordArr[4]*coordArr[4];
+				coord_avg[6] += m_size;
+			}
+		} else {
+			double m_size = bunch->getMacroSize();
+			int nParts = bunch->getSize();
+			coord_avg[6] = m_size*nParts;
+			for(int ip = 0; ip < nParts; ip++){
+				for(int j = 0; j < 6; j++) coordArr[j] = partArr[ip][j];
+				coord_avg[0] += coordArr[0];
+				coord_avg[1] += coordArr[2];
+				coord_avg[2] += coordArr[4];
+				coord_avg[3] += coordArr[0]*coordArr[0];
+				coord_avg[4] += coordArr[2]*coordArr[2];
+				coord_avg[5] += coordArr[4]*coordArr[4];
+			}
+			for (int i = 0; i < 6; i++){
+				coord_avg[i] *= m_size;
+			}
 		}
-	}
+	});
 
 	//calculates sum over all  CPUs
 	ORBIT_MPI_Allreduce(coord_avg,coord_avg_out,7,MPI_DOUBLE,MPI_SUM,bunch->getMPI_Comm_Local()->comm);
@@ -208,30 +212,33 @@ void SpaceChargeCalcUnifEllipse::bunchAnalysis(Bunch* bunch){
 
 	double pos = 0.;
 	int pos_index = 0;
-	if(has_msize > 0){
-		ParticleMacroSize* macroSizeAttr = (ParticleMacroSize*) bunch->getParticleAttributes("macrosize");
-		double m_size = 0.;
-		for(int ip = 0, n = bunch->getSize(); ip < n; ip++){
-			m_size = macroSizeAttr->macrosize(ip);
-			coordArr = partArr[ip];
-			pos = sqrt(coordArr[0]*coordArr[0]/a2_ellips + coordArr[2]*coordArr[2]/b2_ellips + coordArr[4]*coordArr[4]/c2_ellips);
-			pos_index = int(pos*nEllipses);
-			if(pos_index < 0) pos_index = 0;
-			if(pos_index >= nEllipses) pos_index = nEllipses - 1;
-			macroSizesEll_arr[pos_index] += m_size;
-		}
-	} else {
-		double m_size = bunch->getMacroSize();
-		int nParts = bunch->getSize();
-		for(int ip = 0, n = bunch->getSize(); ip < n; ip++){
-			coordArr = partArr[ip];
-			pos = sqrt(coordArr[0]*coordArr[0]/a2_ellips + coordArr[2]*coordArr[2]/b2_ellips + coordArr[4]*coordArr[4]/c2_ellips);
-			pos_index = int(pos*nEllipses) - 1;
-			if(pos_index < 0) pos_index = 0;
-			if(pos_index >= nEllipses) pos_index = nEllipses - 1;
-			macroSizesEll_arr[pos_index] += m_size;
+	readCoordRows(bunch, [&](auto partArr)
+	{
+		if(has_msize > 0){
+			ParticleMacroSize* macroSizeAttr = (ParticleMacroSize*) bunch->getParticleAttributes("macrosize");
+			double m_size = 0.;
+			for(int ip = 0, n = bunch->getSize(); ip < n; ip++){
+				m_size = macroSizeAttr->readMacrosize(ip);
+				for(int j = 0; j < 6; j++) coordArr[j] = partArr[ip][j];
+				pos = sqrt(coordArr[0]*coordArr[0]/a2_ellips + coordArr[2]*coordArr[2]/b2_ellips + coordArr[4]*coordArr[4]/c2_ellips);
+				pos_index = int(pos*nEllipses);
+				if(pos_index < 0) pos_index = 0;
+				if(pos_index >= nEllipses) pos_index = nEllipses - 1;
+				macroSizesEll_arr[pos_index] += m_size;
+			}
+		} else {
+			double m_size = bunch->getMacroSize();
+			int nParts = bunch->getSize();
+			for(int ip = 0, n = bunch->getSize(); ip < n; ip++){
+				for(int j = 0; j < 6; j++) coordArr[j] = partArr[ip][j];
+				pos = sqrt(coordArr[0]*coordArr[0]/a2_ellips + coordArr[2]*coordArr[2]/b2_ellips + coordArr[4]*coordArr[4]/c2_ellips);
+				pos_index = int(pos*nEllipses) - 1;
+				if(pos_index < 0) pos_index = 0;
+				if(pos_index >= nEllipses) pos_index = nEllipses - 1;
+				macroSizesEll_arr[pos_index] += m_size;
+			}
 		}
-	}
+	});
 	//calculates sum over all  CPUs
 	ORBIT_MPI_Allreduce(macroSizesEll_arr,macroSizesEll_MPI_arr,nEllipses,MPI_DOUBLE,MPI_SUM,bunch->getMPI_Comm_Local()->comm);
 	for(int ie = 0; ie < nEllipses; ie++){
@@ -76,7 +76,7 @@ Grid1D* SpaceChargeForceCalc2p5D::getLongGrid(){
 void SpaceChargeForceCalc2p5D::trackBunch(Bunch* bunch, double length){
 
 
-	int nPartsGlobal = bunch->getSizeGlobal();
+	int nPartsGlobal = bunch->getStatistics()->getCount();
 	if(nPartsGlobal < 2) return;
 
 	double totalMacrosize = 0.;
@@ -95,26 +95,29 @@ void SpaceChargeForceCalc2p5D::trackBunch(Bunch* bunch, double length){
 	double Lfactor = 0.;
 	double x,y,z,fx,fy;
 
-	for (int i = 0, n = bunch->getSize(); i < n; i++){
-		x = bunch->x(i);
-		y = bunch->y(i);
-		z = bunch->z(i);
+	dispatchCoordRows(bunch, [&](auto arr)
+	{
+		for (int i = 0, n = bunch->getSize(); i < n; i++){
+			x = arr[i][0];
+			y = arr[i][2];
+			z = arr[i][4];
 
-		forceGridX->interpolateBilinear(x,y,fx);
-		forceGridY->interpolateBilinear(x,y,fy);
+			forceGridX->interpolateBilinear(x,y,fx);
+			forceGridY->interpolateBilinear(x,y,fy);
 
-		//Lfactor = - zGrid->getValue(z) * factor;
-		Lfactor =  zGrid->getValue(z) * factor;
-		bunch->xp(i) += fx * Lfactor;
-		bunch->yp(i) += fy * Lfactor;
-	}
+			//Lfactor = - zGrid->getValue(z) * factor;
+			Lfactor =  zGrid->getValue(z) * factor;
+			arr[i][1] += fx * Lfactor;
+			arr[i][3] += fy * Lfactor;
+		}
+	});
 }
 
 void SpaceChargeForceCalc2p5D::bunchAnalysis(Bunch* bunch, double& totalMacrosize){
 
 	double xMin, xMax, yMin, yMax, zMin, zMax;
 
-	bunchExtremaCalc->getExtremaXYZ(bunch, xMin, xMax, yMin, yMax, zMin, zMax);
+	bunchExtremaCalc->getExtremaXYZ(bunch->getStatisticsFromMemory(), xMin, xMax, yMin, yMax, zMin, zMax);
 
 	//bunchExtremaCalc->getXY_NRMS(bunch, N, xMin, xMax, yMin, yMax, zMin, zMax);
 
@@ -294,6 +294,30 @@ extern "C" {
     return Py_None;
 	}
 
+	//sortBunch(Bunch* bunch, [keyType, ind0, ind1]), keyType = 0 (row-major) or 1 (Morton), by default ind0 = 0, ind1 = 2 (XY) plane
+  static PyObject* Grid2D_sortBunch(PyObject *self, PyObject *args){
+    pyORBIT_Object* pyGrid2D = (pyORBIT_Object*) self;
+		Grid2D* cpp_Grid2D = (Grid2D*) pyGrid2D->cpp_obj;
+		PyObject* pyBunch;
+		int keyType = 0;
+		int ind0 = 0;
+		int ind1 = 2;
+		if(!PyArg_ParseTuple(args,"O|iii:sortBunch",&pyBunch,&keyType,&ind0,&ind1)){
+			ORBIT_MPI_Finalize("PyGrid2D - sortBunch(Bunch* bunch, [keyType,ind0,ind1]) - parameter are needed.");
+		}
+		PyObject* pyORBIT_Bunch_Type = wrap_orbit_bunch::getBunchType("Bunch");
+		if(!PyObject_IsInstance(pyBunch,pyORBIT_Bunch_Type)){
+			ORBIT_MPI_Finalize("PyGrid2D - sortBunch(Bunch* bunch, [keyType,ind0,ind1]) - method needs a Bunch.");
+		}
+		if((keyType != 0 && keyType != 1) || ind0 < 0 || ind1 < 0 || ind0 > 5 || ind1 > 5){
+			ORBIT_MPI_Finalize("PyGrid2D - sortBunch(Bunch* bunch, [keyType,ind0,ind1]) - keyType should be 0 or 1, indexes 0-5.");
+		}
+		Bunch* cpp_bunch = (Bunch*) ((pyORBIT_Object*)pyBunch)->cpp_obj;
+		cpp_Grid2D->sortBunch(cpp_bunch,ind0,ind1,keyType);
+		Py_INCREF(Py_None);
+    return Py_None;
+	}
+
 	//binValue(double value, double x, double y)
   static PyObject* Grid2D_binValue(PyObject *self, PyObject *args){
     pyORBIT_Object* pyGrid2D = (pyORBIT_Object*) self;
@@ -382,6 +406,7 @@ extern "C" {
 		{ "binValueBilinear",     Grid2D_binValueBilinear,     METH_VARARGS,"bins the value into the 2D mesh bi-linearly"},
 		{ "binBunch",             Grid2D_binBunch,             METH_VARARGS,"bins the Bunch instance into the 2D mesh (XY plane by default)"},
 		{ "binBunchBilinear",     Grid2D_binBunchBilinear,     METH_VARARGS,"bins the Bunch instance into the 2D mesh bi-linearly (XY plane by default)"},
+		{ "sortBunch",            Grid2D_sortBunch,            METH_VARARGS,"sorts the Bunch particles by the grid cells, keyType 0 - row-major, 1 - Morton (XY plane by default)"},
 		{ "calcGradient",         Grid2D_calcGradient,         METH_VARARGS,"returns gradient as (gx,gy) for point (x,y) calculated by 9-points weighting scheme"},
 		{ "calcGradientBilinear", Grid2D_calcGradientBilinear, METH_VARARGS,"returns gradient as (gx,gy) for point (x,y) calculated bi-linerly"},
 		{ "synchronizeMPI",       Grid2D_synchronizeMPI,       METH_VARARGS,"synchronize through the MPI communicator"},
@@ -282,6 +282,28 @@ extern "C" {
     return Py_None;
 	}
 
+	//sortBunch(Bunch* bunch [,keyType]), keyType = 0 (row-major) or 1 (Morton)
+  static PyObject* Grid3D_sortBunch(PyObject *self, PyObject *args){
+    pyORBIT_Object* pyGrid3D = (pyORBIT_Object*) self;
+		Grid3D* cpp_Grid3D = (Grid3D*) pyGrid3D->cpp_obj;
+		PyObject* pyBunch;
+		int keyType = 0;
+		if(!PyArg_ParseTuple(args,"O|i:sortBunch",&pyBunch,&keyType)){
+			ORBIT_MPI_Finalize("PyGrid3D - sortBunch(Bunch* bunch [,keyType]) - parameters are needed.");
+		}
+		PyObject* pyORBIT_Bunch_Type = wrap_orbit_bunch::getBunchType("Bunch");
+		if(!PyObject_IsInstance(pyBunch,pyORBIT_Bunch_Type)){
+			ORBIT_MPI_Finalize("PyGrid3D - sortBunch(Bunch* bunch [,keyType]) - method needs a Bunch.");
+		}
+		if(keyType != 0 && keyType != 1){
+			ORBIT_MPI_Finalize("PyGrid3D - sortBunch(Bunch* bunch [,keyType]) - keyType should be 0 (row-major) or 1 (Morton).");
+		}
+		Bunch* cpp_bunch = (Bunch*) ((pyORBIT_Object*)pyBunch)->cpp_obj;
+		cpp_Grid3D->sortBunch(cpp_bunch,keyType);
+		Py_INCREF(Py_None);
+    return Py_None;
+	}
+
 	//binValue(double value, double x, double y, double z)
   static PyObject* Grid3D_binValue(PyObject *self, PyObject *args){
     pyORBIT_Object* pyGrid3D = (pyORBIT_Object*) self;
@@ -342,6 +364,7 @@ extern "C" {
 		{ "getMaxZ",        Grid3D_getMaxZ,        METH_VARARGS,"returns the max grid point in Z dir."},
 		{ "binValue",       Grid3D_binValue,       METH_VARARGS,"bins the value into the 3D mesh"},
 		{ "binBunch",       Grid3D_binBunch,       METH_VARARGS,"bins the Bunch into the 3D mesh"},
+		{ "sortBunch",      Grid3D_sortBunch,      METH_VARARGS,"sorts the Bunch particles by the grid cells, keyType 0 - row-major, 1 - Morton"},
 		{ "calcGradient",   Grid3D_calcGradient,   METH_VARARGS,"returns gradient as (gx,gy,gz) for point (x,y,z)"},
 		{ "longWrapping",   Grid3D_longWrapping,   METH_VARARGS,"set/get isWrapping variable defining long. wrapping policy"},
 		{ "synchronizeMPI", Grid3D_synchronizeMPI, METH_VARARGS,"synchronize through the MPI communicator"},
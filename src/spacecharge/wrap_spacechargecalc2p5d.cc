@@ -157,6 +157,30 @@ extern "C" {
 		return Py_None;
   }
 
+  //setSortingPeriod(int nCalls[, int keyType = 0]) sets the period of the bunch sorting by the grid cells
+  static PyObject* SpaceChargeCalc2p5D_setSortingPeriod(PyObject *self, PyObject *args){
+		pyORBIT_Object* pySpaceChargeCalc2p5D = (pyORBIT_Object*) self;
+		SpaceChargeCalc2p5D* cpp_SpaceChargeCalc2p5D = (SpaceChargeCalc2p5D*) pySpaceChargeCalc2p5D->cpp_obj;
+		int nCalls;
+		int keyType = 0;
+		if(!PyArg_ParseTuple(args,"i|i:setSortingPeriod",&nCalls,&keyType)){
+			ORBIT_MPI_Finalize("PySpaceChargeCalc2p5D.setSortingPeriod(nCalls[,keyType]) - method needs parameters.");
+		}
+		if(keyType != 0 && keyType != 1){
+			ORBIT_MPI_Finalize("PySpaceChargeCalc2p5D.setSortingPeriod(nCalls[,keyType]) - keyType should be 0 (row-major) or 1 (Morton).");
+		}
+		cpp_SpaceChargeCalc2p5D->setSortingPeriod(nCalls,keyType);
+		Py_INCREF(Py_None);
+		return Py_None;
+  }
+
+  //getSortingPeriod() returns (nCalls,keyType) of the bunch sorting by the grid cells
+  static PyObject* SpaceChargeCalc2p5D_getSortingPeriod(PyObject *self, PyObject *args){
+		pyORBIT_Object* pySpaceChargeCalc2p5D = (pyORBIT_Object*) self;
+		SpaceChargeCalc2p5D* cpp_SpaceChargeCalc2p5D = (SpaceChargeCalc2p5D*) pySpaceChargeCalc2p5D->cpp_obj;
+		return Py_BuildValue("(ii)",cpp_SpaceChargeCalc2p5D->getSortingPeriod(),cpp_SpaceChargeCalc2p5D->getSortingKeyType());
+  }
+
   //-----------------------------------------------------
   //destructor for python SpaceChargeCalc2p5D class (__del__ method).
   //-----------------------------------------------------
@@ -175,6 +199,8 @@ extern "C" {
 		{ "getRhoGrid",  SpaceChargeCalc2p5D_getRhoGrid, METH_VARARGS,"returns the Grid2D with a space charge density"},
 		{ "getPhiGrid",  SpaceChargeCalc2p5D_getPhiGrid, METH_VARARGS,"returns the Grid2D with a space charge potential"},
 		{ "getLongGrid", SpaceChargeCalc2p5D_getLongGrid, METH_VARARGS,"returns the Grid1D with a longitudinal space charge density"},
+		{ "setSortingPeriod", SpaceChargeCalc2p5D_setSortingPeriod, METH_VARARGS,"sets the bunch sorting by grid cells - setSortingPeriod(nCalls[,keyType]), 0 - off"},
+		{ "getSortingPeriod", SpaceChargeCalc2p5D_getSortingPeriod, METH_VARARGS,"returns (nCalls,keyType) of the bunch sorting by grid cells"},
 		{NULL}
   };
 
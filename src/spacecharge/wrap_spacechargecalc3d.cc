@@ -46,6 +46,7 @@ extern "C" {
 	}
 
   //Grid3D* getRhoGrid() returns the 3D grid with charge density
+  //With the distributed solver the grid keeps only the charge of the local macro-particles
   static PyObject* SpaceChargeCalc3D_getRhoGrid(PyObject *self, PyObject *args){
 		pyORBIT_Object* pySpaceChargeCalc3D = (pyORBIT_Object*) self;
 		SpaceChargeCalc3D* cpp_SpaceChargeCalc3D = (SpaceChargeCalc3D*) pySpaceChargeCalc3D->cpp_obj;
@@ -154,6 +155,54 @@ extern "C" {
 		return Py_BuildValue("d",ratioLimit);;
   }
 
+  //setSortingPeriod(int nCalls[, int keyType = 0]) sets the period of the bunch sorting by the grid cells
+  static PyObject* SpaceChargeCalc3D_setSortingPeriod(PyObject *self, PyObject *args){
+		pyORBIT_Object* pySpaceChargeCalc3D = (pyORBIT_Object*) self;
+		SpaceChargeCalc3D* cpp_SpaceChargeCalc3D = (SpaceChargeCalc3D*) pySpaceChargeCalc3D->cpp_obj;
+		int nCalls;
+		int keyType = 0;
+		if(!PyArg_ParseTuple(args,"i|i:setSortingPeriod",&nCalls,&keyType)){
+			ORBIT_MPI_Finalize("PySpaceChargeCalc3D.setSortingPeriod(nCalls[,keyType]) - method needs parameters.");
+		}
+		if(keyType != 0 && keyType != 1){
+			ORBIT_MPI_Finalize("PySpaceChargeCalc3D.setSortingPeriod(nCalls[,keyType]) - keyType should be 0 (row-major) or 1 (Morton).");
+		}
+		cpp_SpaceChargeCalc3D->setSortingPeriod(nCalls,keyType);
+		Py_INCREF(Py_None);
+		return Py_None;
+  }
+
+  //getSortingPeriod() returns (nCalls,keyType) of the bunch sorting by the grid cells
+  static PyObject* SpaceChargeCalc3D_getSortingPeriod(PyObject *self, PyObject *args){
+		pyORBIT_Object* pySpaceChargeCalc3D = (pyORBIT_Object*) self;
+		SpaceChargeCalc3D* cpp_SpaceChargeCalc3D = (SpaceChargeCalc3D*) pySpaceChargeCalc3D->cpp_obj;
+		return Py_BuildValue("(ii)",cpp_SpaceChargeCalc3D->getSortingPeriod(),cpp_SpaceChargeCalc3D->getSortingKeyType());
+  }
+
+  //setDistributedSolver(int use) switches on (1) or off (0) the Poisson solver distributed among CPUs
+  //The rho grid is not summed over CPUs in this mode, so getRhoGrid() returns the local charge only
+  static PyObject* SpaceChargeCalc3D_setDistributedSolver(PyObject *self, PyObject *args){
+		pyORBIT_Object* pySpaceChargeCalc3D = (pyORBIT_Object*) self;
+		SpaceChargeCalc3D* cpp_SpaceChargeCalc3D = (SpaceChargeCalc3D*) pySpaceChargeCalc3D->cpp_obj;
+		int useDistributedSolver;
+		if(!PyArg_ParseTuple(args,"i:setDistributedSolver",&useDistributedSolver)){
+			ORBIT_MPI_Finalize("PySpaceChargeCalc3D.setDistributedSolver(use) - method needs a parameter.");
+		}
+		if(useDistributedSolver != 0 && useDistributedSolver != 1){
+			ORBIT_MPI_Finalize("PySpaceChargeCalc3D.setDistributedSolver(use) - use should be 0 (off) or 1 (on).");
+		}
+		cpp_SpaceChargeCalc3D->setDistributedSolver(useDistributedSolver);
+		Py_INCREF(Py_None);
+		return Py_None;
+  }
+
+  //getDistributedSolver() returns 1 if the distributed Poisson solver is used and 0 otherwise
+  static PyObject* SpaceChargeCalc3D_getDistributedSolver(PyObject *self, PyObject *args){
+		pyORBIT_Object* pySpaceChargeCalc3D = (pyORBIT_Object*) self;
+		SpaceChargeCalc3D* cpp_SpaceChargeCalc3D = (SpaceChargeCalc3D*) pySpaceChargeCalc3D->cpp_obj;
+		return Py_BuildValue("i",cpp_SpaceChargeCalc3D->getDistributedSolver());
+  }
+
   //-----------------------------------------------------
   //destructor for python SpaceChargeCalc3D class (__del__ method).
   //-----------------------------------------------------
@@ -171,10 +220,14 @@ extern "C" {
 		{ "trackBunch",     SpaceChargeCalc3D_trackBunch,    METH_VARARGS,"track the bunch - trackBunch(pyBunch,length,pipe_radius)"},
  		{ "numExtBunches",  SpaceChargeCalc3D_numExtBunches, METH_VARARGS,"set/get number of neighboring bunches"},
  		{ "freqOfBunches",  SpaceChargeCalc3D_freqOfBunches, METH_VARARGS,"set/get frequency of bunches in Hz"},
-		{ "getRhoGrid",     SpaceChargeCalc3D_getRhoGrid,    METH_VARARGS,"returns the Grid3D with a space charge density"},
+		{ "getRhoGrid",     SpaceChargeCalc3D_getRhoGrid,    METH_VARARGS,"returns the Grid3D with a space charge density (only the local charge with the distributed solver)"},
 		{ "getPhiGrid",     SpaceChargeCalc3D_getPhiGrid,    METH_VARARGS,"returns the Grid3D with a space charge potential"},
 		{ "setRatioLimit",	SpaceChargeCalc3D_setRatioLimit, METH_VARARGS,"sets the ratio change of x to y and x to z to recalculate Green Functions."},
 		{ "getRatioLimit",	SpaceChargeCalc3D_getRatioLimit, METH_VARARGS,"returns the ratio change of x to y and x to z to recalculate Green Functions."},
+		{ "setSortingPeriod", SpaceChargeCalc3D_setSortingPeriod, METH_VARARGS,"sets the bunch sorting by grid cells - setSortingPeriod(nCalls[,keyType]), 0 - off"},
+		{ "getSortingPeriod", SpaceChargeCalc3D_getSortingPeriod, METH_VARARGS,"returns (nCalls,keyType) of the bunch sorting by grid cells"},
+		{ "setDistributedSolver", SpaceChargeCalc3D_setDistributedSolver, METH_VARARGS,"sets the Poisson solver distributed among CPUs in z-slabs - setDistributedSolver(use), 0 - off. The rho grid then keeps only the local charge."},
+		{ "getDistributedSolver", SpaceChargeCalc3D_getDistributedSolver, METH_VARARGS,"returns 1 if the Poisson solver is distributed among CPUs and 0 otherwise"},
 		{NULL}
   };
 
@@ -0,0 +1,97 @@
+/////////////////////////////////////////////////////////////////////////////
+//
+// FILE NAME
+//   LatticeExecutor.cc
+//
+// CREATED
+//   10/18/2026
+//
+// DESCRIPTION
+//   Tracks the bunch through the flat schedule of the lattice steps
+//   for many turns. The steps are the element programs, the turn
+//   counters, and the steps performed by the Python wrapper instance.
+//
+/////////////////////////////////////////////////////////////////////////////
+#include "LatticeExecutor.hh"
+
+using namespace teapot_base;
+
+//the types of the schedule steps
+#define STEP_PROGRAM 0
+#define STEP_TURN_COUNTER 1
+#define STEP_PYTHON 2
+
+LatticeExecutor::LatticeExecutor(PyObject* py_wrapperIn)
+{
+    setPyWrapper(py_wrapperIn);
+    nPythonSteps = 0;
+    turnEndCall = 0;
+}
+
+LatticeExecutor::~LatticeExecutor()
+{
+}
+
+void LatticeExecutor::addElementProgram(ElementProgram* program)
+{
+    Step step = {STEP_PROGRAM, program, -1};
+    steps.push_back(step);
+}
+
+void LatticeExecutor::addTurnCounter()
+{
+    Step step = {STEP_TURN_COUNTER, NULL, -1};
+    steps.push_back(step);
+}
+
+int LatticeExecutor::addPythonStep()
+{
+    Step step = {STEP_PYTHON, NULL, nPythonSteps};
+    steps.push_back(step);
+    nPythonSteps++;
+    return step.pyIndex;
+}
+
+int LatticeExecutor::getNumberOfSteps(){ return (int) steps.size();}
+
+void LatticeExecutor::clear()
+{
+    steps.clear();
+    nPythonSteps = 0;
+}
+
+void LatticeExecutor::setTurnEndCall(int turnEndCall){ this->turnEndCall = turnEndCall;}
+
+int LatticeExecutor::getTurnEndCall(){ return turnEndCall;}
+
+int LatticeExecutor::track(Bunch* bunch, int nTurns)
+{
+    PyObject* py_wrp = getPyWrapper();
+    PyObject* py_bunch = bunch->getPyWrapper();
+    OrbitUtils::AttributesBucket* bunchAttributes = bunch->getBunchAttributes();
+    int nSteps = (int) steps.size();
+    for(int turn = 0; turn < nTurns; turn++){
+        for(int i = 0; i < nSteps; i++){
+            Step& step = steps[i];
+            if(step.type == STEP_PROGRAM){
+                step.program->track(bunch);
+            }
+            else if(step.type == STEP_TURN_COUNTER){
+                if(bunchAttributes->hasIntAttribute("TurnNumber") != 0){
+                    bunchAttributes->intVal("TurnNumber", bunchAttributes->intVal("TurnNumber") + 1);
+                }
+            }
+            else{
+                PyObject* res = PyObject_CallMethod(py_wrp,const_cast<char*>("trackStep"),const_cast<char*>("Oi"),py_bunch,step.pyIndex);
+                if(res == NULL) return 0;
+                Py_DECREF(res);
+            }
+        }
+        if(turnEndCall != 0){
+            PyObject* res = PyObject_CallMethod(py_wrp,const_cast<char*>("trackTurnEnd"),const_cast<char*>("Oi"),py_bunch,turn);
+            if(res == NULL) return 0;
+            Py_DECREF(res);
+        }
+    }
+    return 1;
+}
@@ -0,0 +1,78 @@
+/////////////////////////////////////////////////////////////////////////////
+//
+// FILE NAME
+//   LatticeExecutor.hh
+//
+// CREATED
+//   10/18/2026
+//
+// DESCRIPTION
+//   Tracks the bunch through the flat schedule of the lattice steps
+//   for many turns. The steps are the element programs, the turn
+//   counters, and the steps performed by the Python wrapper instance.
+//
+/////////////////////////////////////////////////////////////////////////////
+#ifndef TEAPOT_BASE_LATTICE_EXECUTOR_H
+#define TEAPOT_BASE_LATTICE_EXECUTOR_H
+
+#include "Python.h"
+
+#include <vector>
+
+#include "Bunch.hh"
+#include "CppPyWrapper.hh"
+#include "teapotbase.hh"
+
+namespace teapot_base
+{
+    /** The LatticeExecutor keeps the schedule of the lattice steps and
+        tracks the bunch through this schedule turn after turn without the
+        Python code between the native steps. The Python step with index
+        i calls the trackStep(bunch,i) method of the Python wrapper, and
+        at the end of each turn the trackTurnEnd(bunch,turn) method is
+        called if it is switched on. */
+    class LatticeExecutor: public OrbitUtils::CppPyWrapper
+    {
+    public:
+        LatticeExecutor(PyObject* py_wrapperIn);
+        virtual ~LatticeExecutor();
+
+        /** Adds the element program step. The program is not owned by the executor. */
+        void addElementProgram(ElementProgram* program);
+
+        /** Adds the step that increases the "TurnNumber" bunch attribute if it exists. */
+        void addTurnCounter();
+
+        /** Adds the Python step and returns its index. */
+        int addPythonStep();
+
+        /** Returns the number of steps in the schedule. */
+        int getNumberOfSteps();
+
+        /** Removes all steps from the schedule. */
+        void clear();
+
+        /** Switches on or off the call of the trackTurnEnd method after each turn. */
+        void setTurnEndCall(int turnEndCall);
+        int getTurnEndCall();
+
+        /** Tracks the bunch for nTurns turns. Returns 0 if the Python
+            method raised the exception, and 1 otherwise. */
+        int track(Bunch* bunch, int nTurns);
+
+    private:
+
+        struct Step
+        {
+            int type;
+            ElementProgram* program;
+            int pyIndex;
+        };
+
+        std::vector<Step> steps;
+        int nPythonSteps;
+        int turnEndCall;
+    };
+}
+
+#endif
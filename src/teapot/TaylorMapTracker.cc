@@ -0,0 +1,274 @@
+/////////////////////////////////////////////////////////////////////////////
+//
+// FILE NAME
+//   TaylorMapTracker.cc
+//
+// CREATED
+//   10/18/2026
+//
+// DESCRIPTION
+//   Tracks the bunch through the truncated power series (Taylor) map.
+//   The map is applied explicitly as the polynomial of the 6D coordinates,
+//   or symplectically through the derivatives of the generating function
+//   F2(q,P) with the Newton solution of the implicit equations.
+//
+/////////////////////////////////////////////////////////////////////////////
+#include "orbit_mpi.hh"
+#include "TaylorMapTracker.hh"
+#include "teapotbase.hh"
+
+#include <cmath>
+#include <algorithm>
+
+using namespace teapot_base;
+
+//the number of the generating function derivatives columns
+#define N_GEN_COLUMNS 15
+
+TaylorMapTracker::TaylorMapTracker()
+{
+    parents.push_back(-1);
+    variables.push_back(-1);
+    for(int i = 0; i < 36; i++)
+    {
+        inMatrix[i] = 0.;
+        outMatrix[i] = 0.;
+    }
+    for(int i = 0; i < 6; i++)
+    {
+        inMatrix[i * 6 + i] = 1.0;
+        outMatrix[i * 6 + i] = 1.0;
+    }
+    maxIterations = 20;
+    tolerance = 1.0e-15;
+    nMapMonomials = 0;
+    for(int i = 0; i < 3; i++) nGenMonomials[i] = 0;
+}
+
+TaylorMapTracker::~TaylorMapTracker()
+{
+}
+
+void TaylorMapTracker::setMonomials(const std::vector<int>& parents, const std::vector<int>& variables)
+{
+    if(parents.size() != variables.size() || parents.size() == 0 || parents[0] != -1)
+    {
+        ORBIT_MPI_Finalize("TaylorMapTracker::setMonomials: the monomial 0 should be 1, and the tables should have the same size.");
+    }
+    for(int k = 1; k < (int) parents.size(); k++)
+    {
+        if(parents[k] < 0 || parents[k] >= k || variables[k] < 0 || variables[k] > 5)
+        {
+            ORBIT_MPI_Finalize("TaylorMapTracker::setMonomials: the parent monomial should be before the monomial.");
+        }
+    }
+    this->parents = parents;
+    this->variables = variables;
+    mapCoeffs.clear();
+    genCoeffs.clear();
+    nMapMonomials = 0;
+    for(int i = 0; i < 3; i++) nGenMonomials[i] = 0;
+}
+
+int TaylorMapTracker::getNumberOfMonomials(){ return (int) parents.size();}
+
+int TaylorMapTracker::getNumberOfUsedMonomials(const std::vector<double>& coeffs, int nColumns, int colStart, int colStop)
+{
+    int nMonomials = (int) (coeffs.size() / nColumns);
+    while(nMonomials > 1)
+    {
+        const double* c = &coeffs[(nMonomials - 1) * nColumns];
+        bool isZero = true;
+        for(int j = colStart; j < colStop; j++)
+        {
+            if(c[j] != 0.) isZero = false;
+        }
+        if(!isZero) break;
+        nMonomials--;
+    }
+    return nMonomials;
+}
+
+void TaylorMapTracker::setMap(const std::vector<double>& coeffs)
+{
+    if(coeffs.size() != 6 * parents.size())
+    {
+        ORBIT_MPI_Finalize("TaylorMapTracker::setMap: the size of the coefficients array should be 6*nMonomials.");
+    }
+    mapCoeffs = coeffs;
+    nMapMonomials = getNumberOfUsedMonomials(mapCoeffs, 6, 0, 6);
+}
+
+void TaylorMapTracker::setGeneratingFunction(const std::vector<double>& coeffs)
+{
+    if(coeffs.size() != 0 && coeffs.size() != N_GEN_COLUMNS * parents.size())
+    {
+        ORBIT_MPI_Finalize("TaylorMapTracker::setGeneratingFunction: the size of the coefficients array should be 15*nMonomials.");
+    }
+    genCoeffs = coeffs;
+    //the derivatives have the lower degrees than the generating function
+    //itself, so the sums are stopped at the last non-zero monomial
+    for(int i = 0; i < 3; i++) nGenMonomials[i] = 0;
+    if(genCoeffs.size() != 0)
+    {
+        nGenMonomials[0] = getNumberOfUsedMonomials(genCoeffs, N_GEN_COLUMNS, 0, 3);
+        nGenMonomials[1] = getNumberOfUsedMonomials(genCoeffs, N_GEN_COLUMNS, 3, 6);
+        nGenMonomials[2] = getNumberOfUsedMonomials(genCoeffs, N_GEN_COLUMNS, 6, N_GEN_COLUMNS);
+    }
+}
+
+int TaylorMapTracker::isSymplectic(){ return (int) (genCoeffs.size() != 0);}
+
+void TaylorMapTracker::setMatrices(const std::vector<double>& inMatrix, const std::vector<double>& outMatrix)
+{
+    if(inMatrix.size() != 36 || outMatrix.size() != 36)
+    {
+        ORBIT_MPI_Finalize("TaylorMapTracker::setMatrices: the matrices should have 36 elements.");
+    }
+    for(int i = 0; i < 36; i++)
+    {
+        this->inMatrix[i] = inMatrix[i];
+        this->outMatrix[i] = outMatrix[i];
+    }
+}
+
+void TaylorMapTracker::setNewtonParameters(int maxIterations, double tolerance)
+{
+    this->maxIterations = maxIterations;
+    this->tolerance = tolerance;
+}
+
+void TaylorMapTracker::evaluateMonomials(const double* u, double* monomials, int nMonomials)
+{
+    const int* parent = parents.data();
+    const int* variable = variables.data();
+    monomials[0] = 1.0;
+    for(int k = 1; k < nMonomials; k++)
+    {
+        monomials[k] = monomials[parent[k]] * u[variable[k]];
+    }
+}
+
+int TaylorMapTracker::trackPoint(double* coords, double* monomials)
+{
+    double u[6], v[6];
+    for(int i = 0; i < 6; i++)
+    {
+        u[i] = 0.;
+        for(int j = 0; j < 6; j++) u[i] += inMatrix[i * 6 + j] * coords[j];
+    }
+
+    //the polynomial map - the result or the initial guess of the new momenta
+    evaluateMonomials(u, monomials, nMapMonomials);
+    for(int j = 0; j < 6; j++) v[j] = 0.;
+    for(int k = 0; k < nMapMonomials; k++)
+    {
+        const double* c = &mapCoeffs[k * 6];
+        double m = monomials[k];
+        for(int j = 0; j < 6; j++) v[j] += c[j] * m;
+    }
+
+    int nIterations = 0;
+    if(genCoeffs.size() != 0)
+    {
+        //the variables of the generating function (q0,P0,q1,P1,q2,P2)
+        double w[6];
+        for(int i = 0; i < 3; i++)
+        {
+            w[2 * i] = u[2 * i];
+            w[2 * i + 1] = v[2 * i + 1];
+        }
+        int nQ = nGenMonomials[0];
+        int nP = nGenMonomials[1];
+        int nQP = nGenMonomials[2];
+        double res[N_GEN_COLUMNS] = {0.};
+        for(int iter = 0; iter < maxIterations; iter++)
+        {
+            //dF/dq and d2F/dq/dP for the current P
+            evaluateMonomials(w, monomials, std::max(nQ, nQP));
+            for(int j = 0; j < N_GEN_COLUMNS; j++) res[j] = 0.;
+            for(int k = 0; k < nQ; k++)
+            {
+                const double* g = &genCoeffs[k * N_GEN_COLUMNS];
+                double m = monomials[k];
+                for(int j = 0; j < 3; j++) res[j] += g[j] * m;
+            }
+            for(int k = 0; k < nQP; k++)
+            {
+                const double* g = &genCoeffs[k * N_GEN_COLUMNS];
+                double m = monomials[k];
+                for(int j = 6; j < N_GEN_COLUMNS; j++) res[j] += g[j] * m;
+            }
+            //Newton step for dF/dq(q,P) - p = 0 with the Jacobian d2F/dq/dP
+            double r0 = res[0] - u[1];
+            double r1 = res[1] - u[3];
+            double r2 = res[2] - u[5];
+            double* a = &res[6];
+            double det = a[0] * (a[4] * a[8] - a[5] * a[7]) -
+                         a[1] * (a[3] * a[8] - a[5] * a[6]) +
+                         a[2] * (a[3] * a[7] - a[4] * a[6]);
+            double d0 = (r0 * (a[4] * a[8] - a[5] * a[7]) -
+                         a[1] * (r1 * a[8] - a[5] * r2) +
+                         a[2] * (r1 * a[7] - a[4] * r2)) / det;
+            double d1 = (a[0] * (r1 * a[8] - a[5] * r2) -
+                         r0 * (a[3] * a[8] - a[5] * a[6]) +
+                         a[2] * (a[3] * r2 - r1 * a[6])) / det;
+            double d2 = (a[0] * (a[4] * r2 - r1 * a[7]) -
+                         a[1] * (a[3] * r2 - r1 * a[6]) +
+                         r0 * (a[3] * a[7] - a[4] * a[6])) / det;
+            w[1] -= d0;
+            w[3] -= d1;
+            w[5] -= d2;
+            nIterations = iter + 1;
+            double dMax = std::max(std::fabs(d0), std::max(std::fabs(d1), std::fabs(d2)));
+            double pMax = std::max(std::fabs(w[1]), std::max(std::fabs(w[3]), std::fabs(w[5])));
+            if(dMax <= tolerance * (1.0 + pMax)) break;
+        }
+        //the new coordinates Q = dF/dP(q,P) for the final P
+        evaluateMonomials(w, monomials, nP);
+        for(int j = 3; j < 6; j++) res[j] = 0.;
+        for(int k = 0; k < nP; k++)
+        {
+            const double* g = &genCoeffs[k * N_GEN_COLUMNS];
+            double m = monomials[k];
+            for(int j = 3; j < 6; j++) res[j] += g[j] * m;
+        }
+        for(int i = 0; i < 3; i++)
+        {
+            v[2 * i] = res[3 + i];
+            v[2 * i + 1] = w[2 * i + 1];
+        }
+    }
+
+    for(int i = 0; i < 6; i++)
+    {
+        coords[i] = 0.;
+        for(int j = 0; j < 6; j++) coords[i] += outMatrix[i * 6 + j] * v[j];
+    }
+    return nIterations;
+}
+
+void TaylorMapTracker::track(Bunch* bunch)
+{
+    if(mapCoeffs.size() != 6 * parents.size())
+    {
+        ORBIT_MPI_Finalize("TaylorMapTracker::track: the map coefficients are not defined.");
+    }
+    int nParts = bunch->getSize();
+    double** arr = bunch->coordArr();
+    int nMonomials = (int) parents.size();
+#ifdef _OPENMP
+    int nThreads = getNumberOfThreads();
+    #pragma omp parallel if(nThreads > 1 && nParts >= 1000) num_threads(nThreads)
+#endif
+    {
+        std::vector<double> monomials(nMonomials);
+#ifdef _OPENMP
+        #pragma omp for schedule(static)
+#endif
+        for(int ip = 0; ip < nParts; ip++)
+        {
+            trackPoint(arr[ip], monomials.data());
+        }
+    }
+}
@@ -0,0 +1,93 @@
+/////////////////////////////////////////////////////////////////////////////
+//
+// FILE NAME
+//   TaylorMapTracker.hh
+//
+// CREATED
+//   10/18/2026
+//
+// DESCRIPTION
+//   Tracks the bunch through the truncated power series (Taylor) map.
+//   The map is applied explicitly as the polynomial of the 6D coordinates,
+//   or symplectically through the derivatives of the generating function
+//   F2(q,P) with the Newton solution of the implicit equations.
+//
+/////////////////////////////////////////////////////////////////////////////
+#ifndef TEAPOT_BASE_TAYLOR_MAP_TRACKER_H
+#define TEAPOT_BASE_TAYLOR_MAP_TRACKER_H
+
+#include <vector>
+
+#include "Bunch.hh"
+
+namespace teapot_base
+{
+    /** The TaylorMapTracker keeps the coefficients of the polynomials over
+        the table of the 6D monomials. The monomial k is the product of the
+        monomial parent[k] and the coordinate variable[k], and the monomial 0
+        is 1. The coordinates are transformed by the input matrix A before
+        the map and by the output matrix B after the map.
+        In the explicit mode u' = B * P(A * x) where P is the polynomial map.
+        In the symplectic mode the polynomial map gives the initial guess for
+        the new momenta, and the new coordinates are found from the equations
+        p = dF/dq(q,P) and Q = dF/dP(q,P) for the generating function F.
+        The canonical pairs are (u0,u1), (u2,u3), (u4,u5). */
+    class TaylorMapTracker
+    {
+    public:
+        TaylorMapTracker();
+        virtual ~TaylorMapTracker();
+
+        /** Sets the table of the monomials. The parent of the monomial 0 is -1. */
+        void setMonomials(const std::vector<int>& parents, const std::vector<int>& variables);
+
+        /** Returns the number of monomials. */
+        int getNumberOfMonomials();
+
+        /** Sets the coefficients [monomial][6] of the polynomial map. */
+        void setMap(const std::vector<double>& coeffs);
+
+        /** Sets the coefficients [monomial][15] of the generating function derivatives
+            dF/dq_i (i=0,1,2), dF/dP_i (i=0,1,2), and d2F/dq_i/dP_j (index 6+3*i+j).
+            The empty vector switches off the symplectic mode. */
+        void setGeneratingFunction(const std::vector<double>& coeffs);
+
+        /** Returns 1 if the generating function is used and 0 otherwise. */
+        int isSymplectic();
+
+        /** Sets the input and output 6x6 matrices in the row-major order. */
+        void setMatrices(const std::vector<double>& inMatrix, const std::vector<double>& outMatrix);
+
+        /** Sets the maximal number of the Newton iterations and the tolerance. */
+        void setNewtonParameters(int maxIterations, double tolerance);
+
+        /** Tracks the bunch through the map. */
+        void track(Bunch* bunch);
+
+        /** Tracks one 6D point through the map. Returns the number of the Newton
+            iterations in the symplectic mode and 0 in the explicit mode. */
+        int trackPoint(double* coords, double* monomials);
+
+    private:
+
+        void evaluateMonomials(const double* u, double* monomials, int nMonomials);
+
+        //the number of the monomials without the trailing zero coefficients
+        int getNumberOfUsedMonomials(const std::vector<double>& coeffs, int nColumns, int colStart, int colStop);
+
+        std::vector<int> parents;
+        std::vector<int> variables;
+        std::vector<double> mapCoeffs;
+        std::vector<double> genCoeffs;
+        double inMatrix[36];
+        double outMatrix[36];
+        int maxIterations;
+        double tolerance;
+
+        //the numbers of the used monomials for the map, dF/dq, dF/dP, and d2F/dq/dP
+        int nMapMonomials;
+        int nGenMonomials[3];
+    };
+}
+
+#endif
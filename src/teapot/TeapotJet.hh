@@ -0,0 +1,157 @@
+/////////////////////////////////////////////////////////////////////////////
+//
+// FILE NAME
+//   TeapotJet.hh
+//
+// DESCRIPTION
+//   The first order jets for the forward mode automatic differentiation
+//   of the teapot_base tracking functions. The jet keeps the value of the
+//   variable and its derivatives over N parameters. The value and the
+//   derivatives can be the jets themselves, so the Jet<Jet<double,1>,6>
+//   keeps also the derivatives of the value and of the first derivatives
+//   over one more parameter.
+//
+/////////////////////////////////////////////////////////////////////////////
+#ifndef TEAPOT_BASE_JET_H
+#define TEAPOT_BASE_JET_H
+
+#include <cmath>
+
+namespace teapot_base
+{
+    //the functions of the jets are overloads of the standard functions
+    using std::sin;
+    using std::cos;
+
+    template<class T, int N>
+    class Jet
+    {
+    public:
+        T v;
+        T d[N];
+
+        Jet(): v(0.)
+        {
+            for(int i = 0; i < N; i++) d[i] = 0.;
+        }
+
+        Jet(double value): v(value)
+        {
+            for(int i = 0; i < N; i++) d[i] = 0.;
+        }
+
+        Jet& operator+=(const Jet& b){ *this = *this + b; return *this;}
+        Jet& operator-=(const Jet& b){ *this = *this - b; return *this;}
+        Jet& operator*=(const Jet& b){ *this = *this * b; return *this;}
+        Jet& operator/=(const Jet& b){ *this = *this / b; return *this;}
+    };
+
+    /** Returns the value of the variable without derivatives. */
+    inline double jetValue(double a){ return a;}
+
+    template<class T, int N>
+    inline double jetValue(const Jet<T, N>& a){ return jetValue(a.v);}
+
+    template<class T, int N>
+    inline Jet<T, N> operator-(const Jet<T, N>& a)
+    {
+        Jet<T, N> r;
+        r.v = -a.v;
+        for(int i = 0; i < N; i++) r.d[i] = -a.d[i];
+        return r;
+    }
+
+    template<class T, int N>
+    inline Jet<T, N> operator+(const Jet<T, N>& a, const Jet<T, N>& b)
+    {
+        Jet<T, N> r;
+        r.v = a.v + b.v;
+        for(int i = 0; i < N; i++) r.d[i] = a.d[i] + b.d[i];
+        return r;
+    }
+
+    template<class T, int N>
+    inline Jet<T, N> operator-(const Jet<T, N>& a, const Jet<T, N>& b)
+    {
+        Jet<T, N> r;
+        r.v = a.v - b.v;
+        for(int i = 0; i < N; i++) r.d[i] = a.d[i] - b.d[i];
+        return r;
+    }
+
+    template<class T, int N>
+    inline Jet<T, N> operator*(const Jet<T, N>& a, const Jet<T, N>& b)
+    {
+        Jet<T, N> r;
+        r.v = a.v * b.v;
+        for(int i = 0; i < N; i++) r.d[i] = a.d[i] * b.v + a.v * b.d[i];
+        return r;
+    }
+
+    template<class T, int N>
+    inline Jet<T, N> operator/(const Jet<T, N>& a, const Jet<T, N>& b)
+    {
+        Jet<T, N> r;
+        r.v = a.v / b.v;
+        for(int i = 0; i < N; i++) r.d[i] = (a.d[i] - r.v * b.d[i]) / b.v;
+        return r;
+    }
+
+    template<class T, int N>
+    inline Jet<T, N> operator+(const Jet<T, N>& a, double b){ return a + Jet<T, N>(b);}
+
+    template<class T, int N>
+    inline Jet<T, N> operator+(double a, const Jet<T, N>& b){ return Jet<T, N>(a) + b;}
+
+    template<class T, int N>
+    inline Jet<T, N> operator-(const Jet<T, N>& a, double b){ return a - Jet<T, N>(b);}
+
+    template<class T, int N>
+    inline Jet<T, N> operator-(double a, const Jet<T, N>& b){ return Jet<T, N>(a) - b;}
+
+    template<class T, int N>
+    inline Jet<T, N> operator*(const Jet<T, N>& a, double b)
+    {
+        Jet<T, N> r;
+        r.v = a.v * b;
+        for(int i = 0; i < N; i++) r.d[i] = a.d[i] * b;
+        return r;
+    }
+
+    template<class T, int N>
+    inline Jet<T, N> operator*(double a, const Jet<T, N>& b){ return b * a;}
+
+    template<class T, int N>
+    inline Jet<T, N> operator/(const Jet<T, N>& a, double b)
+    {
+        Jet<T, N> r;
+        r.v = a.v / b;
+        for(int i = 0; i < N; i++) r.d[i] = a.d[i] / b;
+        return r;
+    }
+
+    template<class T, int N>
+    inline Jet<T, N> operator/(double a, const Jet<T, N>& b){ return Jet<T, N>(a) / b;}
+
+    template<class T, int N>
+    inline Jet<T, N> sin(const Jet<T, N>& a)
+    {
+        Jet<T, N> r;
+        r.v = sin(a.v);
+        T cs = cos(a.v);
+        for(int i = 0; i < N; i++) r.d[i] = cs * a.d[i];
+        return r;
+    }
+
+    template<class T, int N>
+    inline Jet<T, N> cos(const Jet<T, N>& a)
+    {
+        Jet<T, N> r;
+        r.v = cos(a.v);
+        T sn = -sin(a.v);
+        for(int i = 0; i < N; i++) r.d[i] = sn * a.d[i];
+        return r;
+    }
+}  //end of namespace teapot_base
+
+#endif  //TEAPOT_BASE_JET_H
@@ -0,0 +1,197 @@
+/////////////////////////////////////////////////////////////////////////////
+//
+// FILE NAME
+//   TeapotTps.hh
+//
+// DESCRIPTION
+//   The truncated power series of the 6D coordinates for the extraction
+//   of the Taylor maps from the teapot_base tracking functions. The series
+//   keeps the coefficients of all monomials up to the order of the map.
+//   The table of the products of the monomials is given by the caller,
+//   so the numbering of the monomials is the same as in the Python
+//   orbit.taylor_map.MonomialTable class. The series have the same
+//   operations as the first order jets in TeapotJet.hh.
+//
+/////////////////////////////////////////////////////////////////////////////
+#ifndef TEAPOT_BASE_TPS_H
+#define TEAPOT_BASE_TPS_H
+
+#include <cmath>
+#include <vector>
+
+namespace teapot_base
+{
+    //the product of the monomials prodI[k] and prodJ[k] is the monomial
+    //prodK[k], the pairs with the degree above the order are not included,
+    //and the monomial 0 is 1
+    class TpsTable
+    {
+    public:
+        int nMonomials;
+        std::vector<int> prodI;
+        std::vector<int> prodJ;
+        std::vector<int> prodK;
+    };
+
+    class Tps
+    {
+    public:
+        std::vector<double> c;
+
+        Tps(): c(table()->nMonomials, 0.) {}
+
+        Tps(double value): c(table()->nMonomials, 0.)
+        {
+            c[0] = value;
+        }
+
+        Tps& operator+=(const Tps& b);
+        Tps& operator-=(const Tps& b);
+        Tps& operator*=(const Tps& b);
+        Tps& operator/=(const Tps& b);
+
+        /** The table of the monomials of the series created in this thread. */
+        static const TpsTable*& table()
+        {
+            static thread_local const TpsTable* tpsTable = NULL;
+            return tpsTable;
+        }
+    };
+
+    /** Returns the value of the series at the zero point. */
+    inline double jetValue(const Tps& a){ return a.c[0];}
+
+    inline bool isZero(const Tps& a)
+    {
+        for(int i = 0, n = (int) a.c.size(); i < n; i++)
+        {
+            if(a.c[i] != 0.) return false;
+        }
+        return true;
+    }
+
+    inline Tps operator-(const Tps& a)
+    {
+        Tps r(a);
+        for(int i = 0, n = (int) r.c.size(); i < n; i++) r.c[i] = -r.c[i];
+        return r;
+    }
+
+    inline Tps operator+(const Tps& a, const Tps& b)
+    {
+        Tps r(a);
+        for(int i = 0, n = (int) r.c.size(); i < n; i++) r.c[i] += b.c[i];
+        return r;
+    }
+
+    inline Tps operator-(const Tps& a, const Tps& b)
+    {
+        Tps r(a);
+        for(int i = 0, n = (int) r.c.size(); i < n; i++) r.c[i] -= b.c[i];
+        return r;
+    }
+
+    inline Tps operator*(const Tps& a, const Tps& b)
+    {
+        const TpsTable* table = Tps::table();
+        const int* prodI = table->prodI.data();
+        const int* prodJ = table->prodJ.data();
+        const int* prodK = table->prodK.data();
+        Tps r;
+        for(int k = 0, n = (int) table->prodK.size(); k < n; k++)
+        {
+            r.c[prodK[k]] += a.c[prodI[k]] * b.c[prodJ[k]];
+        }
+        return r;
+    }
+
+    inline Tps operator+(const Tps& a, double b)
+    {
+        Tps r(a);
+        r.c[0] += b;
+        return r;
+    }
+
+    inline Tps operator+(double a, const Tps& b){ return b + a;}
+
+    inline Tps operator-(const Tps& a, double b){ return a + (-b);}
+
+    inline Tps operator-(double a, const Tps& b){ return (-b) + a;}
+
+    inline Tps operator*(const Tps& a, double b)
+    {
+        Tps r(a);
+        for(int i = 0, n = (int) r.c.size(); i < n; i++) r.c[i] *= b;
+        return r;
+    }
+
+    inline Tps operator*(double a, const Tps& b){ return b * a;}
+
+    inline Tps operator/(const Tps& a, double b){ return a * (1.0 / b);}
+
+    //returns f(a0 + h) = sum of f_k * h^k for the constant part a0 of the series,
+    //coeff(k) returns f_k = f^(k)(a0)/k!, and the powers of h are zero above the order
+    template<class Coeff>
+    inline Tps tpsFunction(const Tps& a, Coeff coeff)
+    {
+        Tps h(a);
+        h.c[0] = 0.;
+        Tps r(coeff(0));
+        Tps hk(1.0);
+        for(int k = 1; ; k++)
+        {
+            hk = hk * h;
+            if(isZero(hk)) break;
+            r += hk * coeff(k);
+        }
+        return r;
+    }
+
+    inline Tps sin(const Tps& a)
+    {
+        double sn = std::sin(a.c[0]);
+        double cs = std::cos(a.c[0]);
+        double fact = 1.0;
+        return tpsFunction(a, [&](int k)
+        {
+            if(k > 0) fact *= k;
+            double d[4] = {sn, cs, -sn, -cs};
+            return d[k % 4] / fact;
+        });
+    }
+
+    inline Tps cos(const Tps& a)
+    {
+        double sn = std::sin(a.c[0]);
+        double cs = std::cos(a.c[0]);
+        double fact = 1.0;
+        return tpsFunction(a, [&](int k)
+        {
+            if(k > 0) fact *= k;
+            double d[4] = {cs, -sn, -cs, sn};
+            return d[k % 4] / fact;
+        });
+    }
+
+    inline Tps operator/(const Tps& a, const Tps& b)
+    {
+        //1/(b0 + h) = sum of (-1)^k h^k / b0^(k+1)
+        double inv = 1.0 / b.c[0];
+        double coeff_k = inv;
+        Tps bInv = tpsFunction(b, [&](int k)
+        {
+            if(k > 0) coeff_k *= -inv;
+            return coeff_k;
+        });
+        return a * bInv;
+    }
+
+    inline Tps operator/(double a, const Tps& b){ return Tps(a) / b;}
+
+    inline Tps& Tps::operator+=(const Tps& b){ *this = *this + b; return *this;}
+    inline Tps& Tps::operator-=(const Tps& b){ *this = *this - b; return *this;}
+    inline Tps& Tps::operator*=(const Tps& b){ *this = *this * b; return *this;}
+    inline Tps& Tps::operator/=(const Tps& b){ *this = *this / b; return *this;}
+}  //end of namespace teapot_base
+
+#endif  //TEAPOT_BASE_TPS_H
@@ -35,13 +35,191 @@
 #include "OrbitConst.hh"
 #include "Bunch.hh"
 #include "SyncPart.hh"
-
-#include <complex>
+#include "simd_clones.hh"
+#include "TeapotJet.hh"
+#include "TeapotTps.hh"
+#include "orbit_mpi.hh"
+
+#include <functional>
+#include <algorithm>
+#include <cstring>
+
+//the particle loops of the kernels are split between the OpenMP threads
+//if the module is built with OpenMP and more than one thread is requested.
+//The threads are used only for the bunches with at least
+//TEAPOT_THREADS_MIN_PARTICLES particles.
+#define TEAPOT_THREADS_MIN_PARTICLES 1000
+
+#ifdef _OPENMP
+#define TEAPOT_PRAGMA(x) _Pragma(#x)
+#define TEAPOT_PARALLEL_FOR(n, clauses) \
+    TEAPOT_PRAGMA(omp parallel for if(teapot_base::nThreads > 1 && (n) >= TEAPOT_THREADS_MIN_PARTICLES) \
+                  num_threads(teapot_base::nThreads) schedule(static) clauses)
+#else
+#define TEAPOT_PARALLEL_FOR(n, clauses)
+#endif
 
 namespace teapot_base
 {
     static double* factorial = NULL;
 
+    //the number of threads for the particle loops, 1 by default,
+    //so the MPI runs with one process per core are not oversubscribed
+    static int nThreads = 1;
+
+    void setNumberOfThreads(int n)
+    {
+        if(n < 1) n = 1;
+#ifndef _OPENMP
+        n = 1;
+#endif
+        nThreads = n;
+    }
+
+    int getNumberOfThreads()
+    {
+        return nThreads;
+    }
+
+    //the particles [0,nParts) are split into the blocks [i_start,i_stop),
+    //one block for each thread, and kernel(i_start,i_stop) is called for them
+    template<class BlockKernel>
+    static void forEachBlock(int nParts, BlockKernel kernel)
+    {
+        int nBlocks = 1;
+        if(nParts >= TEAPOT_THREADS_MIN_PARTICLES) nBlocks = nThreads;
+        TEAPOT_PARALLEL_FOR(nParts, )
+        for(int ib = 0; ib < nBlocks; ib++)
+        {
+            int i_start = (int) (((long long) nParts) * ib / nBlocks);
+            int i_stop  = (int) (((long long) nParts) * (ib + 1) / nBlocks);
+            kernel(i_start, i_stop);
+        }
+    }
+
+    //the tracking function gives the loops over the particles to the sweep
+    //as kernel(i_start,i_stop), and the BunchSweep applies them at once
+    class BunchSweep
+    {
+    public:
+        BunchSweep(int nParts_in): nParts(nParts_in) {}
+        template<class BlockKernel> void add(BlockKernel kernel){ forEachBlock(nParts, kernel);}
+    private:
+        int nParts;
+    };
+
+    //the ProgramSweep keeps the kernels of several tracking functions and
+    //applies all of them to one block of particles before the next block
+    class ProgramSweep
+    {
+    public:
+        template<class BlockKernel> void add(BlockKernel kernel){ kernels.push_back(kernel);}
+
+        void reserve(int nKernels){ kernels.reserve(nKernels);}
+
+        void run(int nParts, int blockSize)
+        {
+            if(kernels.size() == 0) return;
+            forEachBlock(nParts, [&](int i_start, int i_stop)
+            {
+                for(int ib_start = i_start; ib_start < i_stop; ib_start += blockSize)
+                {
+                    int ib_stop = std::min(ib_start + blockSize, i_stop);
+                    for(int k = 0, nk = (int) kernels.size(); k < nk; k++)
+                    {
+                        kernels[k](ib_start, ib_stop);
+                    }
+                }
+            });
+        }
+    private:
+        std::vector<std::function<void(int, int)> > kernels;
+    };
+
+    //the [index][x,px,y,py,z,pz] access to the coordinates of one particle
+    //of the Jet type, the tracking functions with these rows and the JetSweep
+    //give the transport matrix as the derivatives of the coordinates
+    template<class T>
+    class JetRows
+    {
+    public:
+        JetRows(T* coords_in): coords(coords_in) {}
+        T* operator[](int index) const { return coords; }
+    private:
+        T* coords;
+    };
+
+    //the sweep that runs the particle loop at once for the one particle of the JetRows
+    class JetSweep
+    {
+    public:
+        template<class BlockKernel> void add(BlockKernel kernel){ kernel(0, 1);}
+    };
+
+    //the type of the arithmetic in the particle loops: double for the rows
+    //of the bunch coordinates (also for the float32 ones) and the Jet type
+    //for the JetRows
+    template<class CoordRows>
+    struct RowsScalar
+    {
+        typedef double type;
+    };
+
+    template<class T>
+    struct RowsScalar<JetRows<T> >
+    {
+        typedef T type;
+    };
+
+    //the complex numbers with the double or Jet real and imaginary parts,
+    //the operations are the same as for std::complex, but without the checks
+    //for NaN
+    template<class T>
+    struct RowsComplex
+    {
+        T re;
+        T im;
+        RowsComplex(const T& re_in, const T& im_in): re(re_in), im(im_in) {}
+    };
+
+    template<class T>
+    static inline RowsComplex<T> operator+(const RowsComplex<T>& a, const RowsComplex<T>& b)
+    {
+        return RowsComplex<T>(a.re + b.re, a.im + b.im);
+    }
+
+    template<class T>
+    static inline RowsComplex<T> operator-(const RowsComplex<T>& a, const RowsComplex<T>& b)
+    {
+        return RowsComplex<T>(a.re - b.re, a.im - b.im);
+    }
+
+    template<class T>
+    static inline RowsComplex<T> operator*(const RowsComplex<T>& a, const RowsComplex<T>& b)
+    {
+        return RowsComplex<T>(a.re * b.re - a.im * b.im, a.re * b.im + a.im * b.re);
+    }
+
+    template<class T>
+    static inline RowsComplex<T> operator*(double a, const RowsComplex<T>& b)
+    {
+        return RowsComplex<T>(a * b.re, a * b.im);
+    }
+
+    //the multiplication by the constant complex number (c_re,c_im)
+    template<class T>
+    static inline RowsComplex<T> multConst(double c_re, double c_im, const RowsComplex<T>& b)
+    {
+        return RowsComplex<T>(c_re * b.re - c_im * b.im, c_re * b.im + c_im * b.re);
+    }
+
+    //the multiplication by the imaginary unit
+    template<class T>
+    static inline RowsComplex<T> multI(const RowsComplex<T>& b)
+    {
+        return RowsComplex<T>(-b.im, b.re);
+    }
+
     void init_factorial()
     {
         if(factorial == NULL)
@@ -77,27 +255,42 @@ namespace teapot_base
 //
 ///////////////////////////////////////////////////////////////////////////
 
-void rotatexy(Bunch* bunch, double anglexy)
+template<class CoordRows, class Sweep>
+static void rotatexy_rows(Bunch* bunch, CoordRows arr, Sweep& sweep, double anglexy,
+                          const double* coeffs = NULL)
 {
-    double xtemp, pxtemp, ytemp, pytemp;
-    double cs = cos(anglexy);
-    double sn = sin(anglexy);
+    //the cosine and sine of the angle can be calculated beforehand
+    double cs = (coeffs != NULL) ? coeffs[0] : cos(anglexy);
+    double sn = (coeffs != NULL) ? coeffs[1] : sin(anglexy);
 
     //coordinate array [part. index][x,xp,y,yp,z,dE]
-    double** arr = bunch->coordArr();
+    typedef typename RowsScalar<CoordRows>::type Scalar;
 
-    for(int i = 0; i < bunch->getSize(); i++)
+    sweep.add([=](int i_start, int i_stop)
     {
-        xtemp  = arr[i][0];
-        pxtemp = arr[i][1];
-        ytemp  = arr[i][2];
-        pytemp = arr[i][3];
+        Scalar xtemp, pxtemp, ytemp, pytemp;
+        for(int i = i_start; i < i_stop; i++)
+        {
+            xtemp  = arr[i][0];
+            pxtemp = arr[i][1];
+            ytemp  = arr[i][2];
+            pytemp = arr[i][3];
+
+            arr[i][0] =  cs * xtemp  - sn * ytemp;
+            arr[i][1] =  cs * pxtemp - sn * pytemp;
+            arr[i][2] =  sn * xtemp  + cs * ytemp;
+            arr[i][3] =  sn * pxtemp + cs * pytemp;
+        }
+    });
+}
 
-        arr[i][0] =  cs * xtemp  - sn * ytemp;
-        arr[i][1] =  cs * pxtemp - sn * pytemp;
-        arr[i][2] =  sn * xtemp  + cs * ytemp;
-        arr[i][3] =  sn * pxtemp + cs * pytemp;
-    }
+void rotatexy(Bunch* bunch, double anglexy)
+{
+    BunchSweep sweep(bunch->getSize());
+    dispatchCoordRows(bunch, [&](auto arr)
+    {
+        rotatexy_rows(bunch, arr, sweep, anglexy);
+    });
 }
 
 ///////////////////////////////////////////////////////////////////////////
@@ -117,17 +310,15 @@ void rotatexy(Bunch* bunch, double anglexy)
 //
 ///////////////////////////////////////////////////////////////////////////
 
-void drifti(Bunch* bunch, int i, double length)
+//the length depends on the coordinates for the wedges, so it can be of the Jet type
+template<class CoordRows, class Length>
+static inline void drift_particle(CoordRows arr, int i, const Length& length,
+                                  double gamma2i, double dp_p_coeff)
 {
-    double KNL, phifac, dp_p;
-
-    SyncPart* syncPart = bunch->getSyncPart();
-
-    double gamma2i = 1.0 / (syncPart->getGamma() * syncPart->getGamma());
-    double dp_p_coeff = 1.0 / (syncPart->getMomentum() * syncPart->getBeta());
+    typedef typename RowsScalar<CoordRows>::type Scalar;
+    Scalar KNL, phifac, dp_p;
 
     //coordinate array [part. index][x,xp,y,yp,z,dE]
-    double** arr = bunch->coordArr();
 
     dp_p = arr[i][5] * dp_p_coeff;
     KNL  = 1.0 / (1.0 + dp_p);
@@ -139,6 +330,25 @@ void drifti(Bunch* bunch, int i, double length)
     arr[i][4] -= length * phifac;
 }
 
+template<class CoordRows>
+static void drifti_rows(Bunch* bunch, CoordRows arr, int i, double length)
+{
+    SyncPart* syncPart = bunch->getSyncPart();
+
+    double gamma2i = 1.0 / (syncPart->getGamma() * syncPart->getGamma());
+    double dp_p_coeff = 1.0 / (syncPart->getMomentum() * syncPart->getBeta());
+
+    drift_particle(arr, i, length, gamma2i, dp_p_coeff);
+}
+
+void drifti(Bunch* bunch, int i, double length)
+{
+    dispatchCoordRows(bunch, [&](auto arr)
+    {
+        drifti_rows(bunch, arr, i, length);
+    });
+}
+
 ///////////////////////////////////////////////////////////////////////////
 // NAME
 //   drift
@@ -155,10 +365,31 @@ void drifti(Bunch* bunch, int i, double length)
 //
 ///////////////////////////////////////////////////////////////////////////
 
-void drift(Bunch* bunch, double length)
+template<class CoordRows>
+ORBIT_SIMD_CLONES
+static void drift_block(CoordRows arr, int i_start, int i_stop,
+                        double length, double gamma2i, double dp_p_coeff)
 {
-    double KNL, phifac, dp_p;
+    typedef typename RowsScalar<CoordRows>::type Scalar;
+    Scalar KNL, phifac, dp_p;
+
+    ORBIT_SIMD_IVDEP
+    for(int i = i_start; i < i_stop; i++)
+    {
+        dp_p = arr[i][5] * dp_p_coeff;
+        KNL  = 1.0 / (1.0 + dp_p);
+        arr[i][0] += KNL * length * arr[i][1];
+        arr[i][2] += KNL * length * arr[i][3];
+        phifac = (arr[i][1] * arr[i][1] + arr[i][3] * arr[i][3] +
+                  dp_p * dp_p * gamma2i) / 2.0;
+        phifac = (phifac * KNL - dp_p * gamma2i) * KNL;
+        arr[i][4] -= length * phifac;
+    }
+}
 
+template<class CoordRows, class Sweep>
+static void drift_rows(Bunch* bunch, CoordRows arr, Sweep& sweep, double length)
+{
     SyncPart* syncPart = bunch->getSyncPart();
 
     double v = OrbitConst::c * syncPart->getBeta();
@@ -168,19 +399,20 @@ void drift(Bunch* bunch, double length)
     double dp_p_coeff = 1.0 / (syncPart->getMomentum() * syncPart->getBeta());
 
     //coordinate array [part. index][x,xp,y,yp,z,dE]
-    double** arr = bunch->coordArr();
 
-    for(int i = 0; i < bunch->getSize(); i++)
+    sweep.add([=](int i_start, int i_stop)
     {
-        dp_p = arr[i][5] * dp_p_coeff;
-        KNL  = 1.0 / (1.0 + dp_p);
-        arr[i][0] += KNL * length * arr[i][1];
-        arr[i][2] += KNL * length * arr[i][3];
-        phifac = (arr[i][1] * arr[i][1] + arr[i][3] * arr[i][3] +
-                  dp_p * dp_p * gamma2i) / 2.0;
-        phifac = (phifac * KNL - dp_p * gamma2i) * KNL;
-        arr[i][4] -= length * phifac;
-    }
+        drift_block(arr, i_start, i_stop, length, gamma2i, dp_p_coeff);
+    });
+}
+
+void drift(Bunch* bunch, double length)
+{
+    BunchSweep sweep(bunch->getSize());
+    dispatchCoordRows(bunch, [&](auto arr)
+    {
+        drift_rows(bunch, arr, sweep, length);
+    });
 }
 
 ///////////////////////////////////////////////////////////////////////////
@@ -199,16 +431,28 @@ void drift(Bunch* bunch, double length)
 //
 ///////////////////////////////////////////////////////////////////////////
 
-void wrapbunch(Bunch* bunch, double length)
+template<class CoordRows, class Sweep>
+static void wrapbunch_rows(Bunch* bunch, CoordRows arr, Sweep& sweep, double length)
 {
 	//coordinate array [part. index][x,xp,y,yp,z,dE]
-	double** arr = bunch->coordArr();
 
-	for(int i = 0; i < bunch->getSize(); i++)
-		{
-			if(arr[i][4] < -length/2.0) arr[i][4] += length;
-			if(arr[i][4] > length/2.0) arr[i][4] -= length;
-		}
+	sweep.add([=](int i_start, int i_stop)
+	{
+		for(int i = i_start; i < i_stop; i++)
+			{
+				if(jetValue(arr[i][4]) < -length/2.0) arr[i][4] += length;
+				if(jetValue(arr[i][4]) > length/2.0) arr[i][4] -= length;
+			}
+	});
+}
+
+void wrapbunch(Bunch* bunch, double length)
+{
+    BunchSweep sweep(bunch->getSize());
+    dispatchCoordRows(bunch, [&](auto arr)
+    {
+        wrapbunch_rows(bunch, arr, sweep, length);
+    });
 }
 
 ///////////////////////////////////////////////////////////////////////////
@@ -229,34 +473,57 @@ void wrapbunch(Bunch* bunch, double length)
 //
 ///////////////////////////////////////////////////////////////////////////
 
-void kick(Bunch* bunch, double kx, double ky, double kE, int useCharge)
+template<class CoordRows>
+ORBIT_SIMD_CLONES
+static void kick_block(CoordRows arr, int i_start, int i_stop,
+                       double kx, double ky, double kE)
 {
-
-    //coordinate array [part. index][x,xp,y,yp,z,dE]
-    double** arr = bunch->coordArr();
     if(kx != 0.)
     {
-        for(int i = 0; i < bunch->getSize(); i++)
+        ORBIT_SIMD_IVDEP
+        for(int i = i_start; i < i_stop; i++)
         {
             arr[i][1] += kx;
         }
     }
     if(ky != 0.)
     {
-        for(int i = 0; i < bunch->getSize(); i++)
+        ORBIT_SIMD_IVDEP
+        for(int i = i_start; i < i_stop; i++)
         {
             arr[i][3] += ky;
         }
     }
     if(kE != 0.)
     {
-        for(int i = 0; i < bunch->getSize(); i++)
+        ORBIT_SIMD_IVDEP
+        for(int i = i_start; i < i_stop; i++)
         {
             arr[i][5] += kE;
         }
     }
 }
 
+template<class CoordRows, class Sweep>
+static void kick_rows(Bunch* bunch, CoordRows arr, Sweep& sweep, double kx, double ky, double kE, int useCharge)
+{
+
+    //coordinate array [part. index][x,xp,y,yp,z,dE]
+    sweep.add([=](int i_start, int i_stop)
+    {
+        kick_block(arr, i_start, i_stop, kx, ky, kE);
+    });
+}
+
+void kick(Bunch* bunch, double kx, double ky, double kE, int useCharge)
+{
+    BunchSweep sweep(bunch->getSize());
+    dispatchCoordRows(bunch, [&](auto arr)
+    {
+        kick_rows(bunch, arr, sweep, kx, ky, kE, useCharge);
+    });
+}
+
 ///////////////////////////////////////////////////////////////////////////
 // NAME
 //   multpi
@@ -277,42 +544,49 @@ void kick(Bunch* bunch, double kx, double ky, double kE, int useCharge)
 //
 ///////////////////////////////////////////////////////////////////////////
 
-void multpi(Bunch* bunch, int i, int pole, double kl, int skew, int useCharge)
+//the strength depends on the coordinates for the wedges, so it can be of the Jet type
+template<class CoordRows, class Strength>
+static void multpi_rows(Bunch* bunch, CoordRows arr, int i, int pole, const Strength& kl, int skew, int useCharge)
 {
     if(bunch->getCharge() == 0.){
     	return;
     }
 
-    double klc = kl;
-    std::complex<double> z, zn;
-    double kl1;
+    typedef typename RowsScalar<CoordRows>::type Scalar;
+    Strength kl1 = kl / factorial[pole];
 
     //coordinate array [part. index][x,xp,y,yp,z,dE]
-    double** arr = bunch->coordArr();
 
-    kl1 = klc / factorial[pole];
-    z = std::complex<double>(arr[i][0], arr[i][2]);
+    RowsComplex<Scalar> z(arr[i][0], arr[i][2]);
 
     // take power of z to the n
-    zn = std::complex<double>(1.0, 0.0);
+    RowsComplex<Scalar> zn(1.0, 0.0);
     for (int k = 0; k < pole; k++)
     {
-        zn *= z;
+        zn = zn * z;
     }
 
     // MAD Conventions on signs of multipole terms
     if(skew)
     {
-        arr[i][1] += kl1 * std::imag(zn);
-        arr[i][3] += kl1 * std::real(zn);
+        arr[i][1] += kl1 * zn.im;
+        arr[i][3] += kl1 * zn.re;
     }
     else
     {
-        arr[i][1] -= kl1 * std::real(zn);
-        arr[i][3] += kl1 * std::imag(zn);
+        arr[i][1] -= kl1 * zn.re;
+        arr[i][3] += kl1 * zn.im;
     }
 }
 
+void multpi(Bunch* bunch, int i, int pole, double kl, int skew, int useCharge)
+{
+    dispatchCoordRows(bunch, [&](auto arr)
+    {
+        multpi_rows(bunch, arr, i, pole, kl, skew, useCharge);
+    });
+}
+
 ///////////////////////////////////////////////////////////////////////////
 // NAME
 //   multp
@@ -333,44 +607,84 @@ void multpi(Bunch* bunch, int i, int pole, double kl, int skew, int useCharge)
 //
 ///////////////////////////////////////////////////////////////////////////
 
-void multp(Bunch* bunch, int pole, double kl, int skew, int useCharge)
+//the power of z is calculated in the loop over k < POLE, it is unrolled
+//for the fixed POLE, and the pole parameter is used if POLE is -1
+template<int POLE, class CoordRows>
+ORBIT_SIMD_CLONES
+static void multp_block(CoordRows arr, int i_start, int i_stop,
+                        int pole, double kl1, int skew)
+{
+    typedef typename RowsScalar<CoordRows>::type Scalar;
+    Scalar x, y, zn_re, zn_im, zn_tmp;
+    int n_pow = (POLE >= 0) ? POLE : pole;
+
+    ORBIT_SIMD_IVDEP
+    for(int i = i_start; i < i_stop; i++)
+    {
+        x = arr[i][0];
+        y = arr[i][2];
+
+        // take power of z = x + i*y to the n
+        // the operations are the same as for std::complex, but without
+        // the checks for NaN, so the loop can be vectorized
+        zn_re = 1.0;
+        zn_im = 0.0;
+        for (int k = 0; k < n_pow; k++)
+        {
+            zn_tmp = zn_re * x - zn_im * y;
+            zn_im  = zn_re * y + zn_im * x;
+            zn_re  = zn_tmp;
+        }
+
+        // MAD Conventions on signs of multipole terms
+        if(skew)
+        {
+            arr[i][1] += kl1 * zn_im;
+            arr[i][3] += kl1 * zn_re;
+        }
+        else
+        {
+            arr[i][1] -= kl1 * zn_re;
+            arr[i][3] += kl1 * zn_im;
+        }
+    }
+}
+
+template<class CoordRows, class Sweep>
+static void multp_rows(Bunch* bunch, CoordRows arr, Sweep& sweep, int pole, double kl, int skew, int useCharge)
 {
     if(bunch->getCharge() == 0.){
     	return;
     }
 
     double klc = kl;
-    std::complex<double> z, zn;
     double kl1;
 
     //coordinate array [part. index][x,xp,y,yp,z,dE]
-    double** arr = bunch->coordArr();
 
     kl1 = klc / factorial[pole];
 
-    for(int i = 0; i < bunch->getSize(); i++)
+    sweep.add([=](int i_start, int i_stop)
     {
-        z = std::complex<double>(arr[i][0], arr[i][2]);
-
-        // take power of z to the n
-        zn = std::complex<double>(1.0, 0.0);
-        for (int k = 0; k < pole; k++)
+        switch(pole)
         {
-            zn *= z;
+            case 0: multp_block<0>(arr, i_start, i_stop, pole, kl1, skew); break;
+            case 1: multp_block<1>(arr, i_start, i_stop, pole, kl1, skew); break;
+            case 2: multp_block<2>(arr, i_start, i_stop, pole, kl1, skew); break;
+            case 3: multp_block<3>(arr, i_start, i_stop, pole, kl1, skew); break;
+            case 4: multp_block<4>(arr, i_start, i_stop, pole, kl1, skew); break;
+            default: multp_block<-1>(arr, i_start, i_stop, pole, kl1, skew);
         }
+    });
+}
 
-        // MAD Conventions on signs of multipole terms
-        if(skew)
-        {
-            arr[i][1] += kl1 * std::imag(zn);
-            arr[i][3] += kl1 * std::real(zn);
-        }
-        else
-        {
-            arr[i][1] -= kl1 * std::real(zn);
-            arr[i][3] += kl1 * std::imag(zn);
-        }
-    }
+void multp(Bunch* bunch, int pole, double kl, int skew, int useCharge)
+{
+    BunchSweep sweep(bunch->getSize());
+    dispatchCoordRows(bunch, [&](auto arr)
+    {
+        multp_rows(bunch, arr, sweep, pole, kl, skew, useCharge);
+    });
 }
 
 ///////////////////////////////////////////////////////////////////////////
@@ -392,14 +706,16 @@ void multp(Bunch* bunch, int pole, double kl, int skew, int useCharge)
 //
 ///////////////////////////////////////////////////////////////////////////
 
-void multpfringeIN(Bunch* bunch, int pole, double kl, int skew, int useCharge)
+//the sign is -1 for the entrance and +1 for the exit fringe field
+template<class CoordRows, class Sweep>
+static void multpfringe_rows(Bunch* bunch, CoordRows arr, Sweep& sweep, int pole, double kl, int skew, int useCharge,
+                             double sign)
 {
     if(bunch->getCharge() == 0.){
     	return;
     }
 
     double klc = kl;
-    std::complex<double> rootm1 = std::complex<double>(0.0, 1.0);
 
     SyncPart* syncPart = bunch->getSyncPart();
 
@@ -409,81 +725,88 @@ void multpfringeIN(Bunch* bunch, int pole, double kl, int skew, int useCharge)
     int l   = pole + 1;
     int lp1 = pole + 2;
     int lp2 = pole + 3;
-    std::complex<double> cxlm1 = std::complex<double>(lm1, 0.0);
-    std::complex<double> cxl   = std::complex<double>(l  , 0.0);
-    std::complex<double> cxlp1 = std::complex<double>(lp1, 0.0);
-    std::complex<double> cxlp2 = std::complex<double>(lp2, 0.0);
 
     double klfactlp1 = klc / (4.0 * factorial[lp1]);
 
     // MAD Conventions on signs of multipole terms
 
-    std::complex<double> kterm;
-    if(skew)
-    {
-        kterm = std::complex<double>(0.0, klfactlp1);
-    }
-    else
-    {
-        kterm = std::complex<double>(klfactlp1, 0.0);
-    }
-
-    double dp_p, KNL;
+    double k_re = skew ? 0.0 : sign * klfactlp1;
+    double k_im = skew ? sign * klfactlp1 : 0.0;
 
     //coordinate array [part. index][x,xp,y,yp,z,dE]
-    double** arr = bunch->coordArr();
+    typedef typename RowsScalar<CoordRows>::type Scalar;
+    typedef RowsComplex<Scalar> Complex;
 
-    for(int i = 0; i < bunch->getSize(); i++)
+    sweep.add([=](int i_start, int i_stop)
     {
-        double x = arr[i][0];
-        double y = arr[i][2];
-        std::complex<double> z = std::complex<double>(x, y);
-        double px = arr[i][1];
-        double py = arr[i][3];
-        dp_p = arr[i][5] * dp_p_coeff;
-        KNL  = 1.0 / (1.0 + dp_p);
+        Scalar dp_p, KNL;
+        for(int i = i_start; i < i_stop; i++)
+        {
+            Scalar x = arr[i][0];
+            Scalar y = arr[i][2];
+            Complex z(x, y);
+            Scalar px = arr[i][1];
+            Scalar py = arr[i][3];
+            dp_p = arr[i][5] * dp_p_coeff;
+            KNL  = 1.0 / (1.0 + dp_p);
 
-        // take power of z to the lm1, l
+            // take power of z to the lm1, l
 
-        std::complex<double> zlm1 = std::complex<double>(1., 0.);
-        for (int k = 0; k < lm1; k++)
-        {
-            zlm1 = zlm1 * z;
+            Complex zlm1(1., 0.);
+            for (int k = 0; k < lm1; k++)
+            {
+                zlm1 = zlm1 * z;
+            }
+            Complex zl = zlm1 * z;
+
+            Complex fxterm(l * x, -lp2 * y);
+            Complex dxfxterm = l * (fxterm + z);
+            Complex dyfxterm = multI(l * fxterm - lp2 * z);
+            Complex fyterm(l * y, lp2 * x);
+            Complex dxfyterm = l * fyterm + multI(lp2 * z);
+            Complex dyfyterm = l * (multI(fyterm) + z);
+
+            Scalar fxcx   = (multConst(k_re, k_im, zl)   * fxterm).re;
+            Scalar dxfxcx = (multConst(k_re, k_im, zlm1) * dxfxterm).re;
+            Scalar dyfxcx = (multConst(k_re, k_im, zlm1) * dyfxterm).re;
+            Scalar fycx   = (multConst(k_re, k_im, zl)   * fyterm).re;
+            Scalar dxfycx = (multConst(k_re, k_im, zlm1) * dxfyterm).re;
+            Scalar dyfycx = (multConst(k_re, k_im, zlm1) * dyfyterm).re;
+
+            arr[i][0] -= fxcx * KNL;
+            arr[i][2] -= fycx * KNL;
+
+            Scalar M11 = 1.0 - dxfxcx * KNL;
+            Scalar M12 =     - dxfycx * KNL;
+            Scalar M21 =     - dyfxcx * KNL;
+            Scalar M22 = 1.0 - dyfycx * KNL;
+            Scalar detM = M11 * M22 - M12 * M21;
+
+            Scalar pxnew = ( M22 * px - M12 * py) / detM;
+            Scalar pynew = (-M21 * px + M11 * py) / detM;
+
+            arr[i][1] = pxnew;
+            arr[i][3] = pynew;
+
+            arr[i][4] -= (pxnew * fxcx + pynew * fycx) *
+                         KNL * KNL;
         }
-        std::complex<double> zl = zlm1 * z;
-
-        std::complex<double> fxterm   = std::complex<double>(l * x, -lp2 * y);
-        std::complex<double> dxfxterm = cxl * (fxterm + z);
-        std::complex<double> dyfxterm = rootm1 * (cxl * fxterm - cxlp2 * z);
-        std::complex<double> fyterm   = std::complex<double>(l * y, lp2 * x);
-        std::complex<double> dxfyterm = cxl * fyterm + rootm1 * cxlp2 * z;
-        std::complex<double> dyfyterm = cxl * (rootm1 * fyterm + z);
-
-        std::complex<double> fxcx   = -kterm * zl   * fxterm;
-        std::complex<double> dxfxcx = -kterm * zlm1 * dxfxterm;
-        std::complex<double> dyfxcx = -kterm * zlm1 * dyfxterm;
-        std::complex<double> fycx   = -kterm * zl   * fyterm;
-        std::complex<double> dxfycx = -kterm * zlm1 * dxfyterm;
-        std::complex<double> dyfycx = -kterm * zlm1 * dyfyterm;
-
-        arr[i][0] -= std::real(fxcx) * KNL;
-        arr[i][2] -= std::real(fycx) * KNL;
-
-        double M11 = 1.0 - std::real(dxfxcx) * KNL;
-        double M12 =     - std::real(dxfycx) * KNL;
-        double M21 =     - std::real(dyfxcx) * KNL;
-        double M22 = 1.0 - std::real(dyfycx) * KNL;
-        double detM = M11 * M22 - M12 * M21;
-
-        double pxnew = ( M22 * px - M12 * py) / detM;
-        double pynew = (-M21 * px + M11 * py) / detM;
-
-        arr[i][1] = pxnew;
-        arr[i][3] = pynew;
-
-        arr[i][4] -= (pxnew * std::real(fxcx) + pynew * std::real(fycx)) *
-                     KNL * KNL;
-    }
+    });
+}
+
+template<class CoordRows, class Sweep>
+static void multpfringeIN_rows(Bunch* bunch, CoordRows arr, Sweep& sweep, int pole, double kl, int skew, int useCharge)
+{
+    multpfringe_rows(bunch, arr, sweep, pole, kl, skew, useCharge, -1.0);
+}
+
+void multpfringeIN(Bunch* bunch, int pole, double kl, int skew, int useCharge)
+{
+    BunchSweep sweep(bunch->getSize());
+    dispatchCoordRows(bunch, [&](auto arr)
+    {
+        multpfringeIN_rows(bunch, arr, sweep, pole, kl, skew, useCharge);
+    });
 }
 
 ///////////////////////////////////////////////////////////////////////////
@@ -505,98 +828,19 @@ void multpfringeIN(Bunch* bunch, int pole, double kl, int skew, int useCharge)
 //
 ///////////////////////////////////////////////////////////////////////////
 
-void multpfringeOUT(Bunch* bunch, int pole, double kl, int skew, int useCharge)
+template<class CoordRows, class Sweep>
+static void multpfringeOUT_rows(Bunch* bunch, CoordRows arr, Sweep& sweep, int pole, double kl, int skew, int useCharge)
 {
-    if(bunch->getCharge() == 0.){
-    	return;
-    }
-
-    double klc = kl;
-    std::complex<double> rootm1 = std::complex<double>(0.0, 1.0);
-
-    SyncPart* syncPart = bunch->getSyncPart();
-
-    double dp_p_coeff = 1.0 / (syncPart->getMomentum() * syncPart->getBeta());
-
-    int lm1 = pole;
-    int l   = pole + 1;
-    int lp1 = pole + 2;
-    int lp2 = pole + 3;
-    std::complex<double> cxlm1 = std::complex<double>(lm1, 0.0);
-    std::complex<double> cxl   = std::complex<double>(l  , 0.0);
-    std::complex<double> cxlp1 = std::complex<double>(lp1, 0.0);
-    std::complex<double> cxlp2 = std::complex<double>(lp2, 0.0);
-
-    double klfactlp1 = klc / (4.0 * factorial[lp1]);
-
-    // MAD Conventions on signs of multipole terms
-
-    std::complex<double> kterm;
-    if(skew)
-    {
-        kterm = std::complex<double>(0.0, klfactlp1);
-    }
-    else
-    {
-        kterm = std::complex<double>(klfactlp1, 0.0);
-    }
-
-    double dp_p, KNL;
-
-    //coordinate array [part. index][x,xp,y,yp,z,dE]
-    double** arr = bunch->coordArr();
+    multpfringe_rows(bunch, arr, sweep, pole, kl, skew, useCharge, 1.0);
+}
 
-    for(int i = 0; i < bunch->getSize(); i++)
+void multpfringeOUT(Bunch* bunch, int pole, double kl, int skew, int useCharge)
+{
+    BunchSweep sweep(bunch->getSize());
+    dispatchCoordRows(bunch, [&](auto arr)
     {
-        double x = arr[i][0];
-        double y = arr[i][2];
-        std::complex<double> z = std::complex<double>(x, y);
-        double px = arr[i][1];
-        double py = arr[i][3];
-        dp_p = arr[i][5] * dp_p_coeff;
-        KNL  = 1.0 / (1.0 + dp_p);
-
-        // take power of z to the lm1, l
-
-        std::complex<double> zlm1 = std::complex<double>(1., 0.);
-        for (int k = 0; k < lm1; k++)
-        {
-            zlm1 = zlm1 * z;
-        }
-        std::complex<double> zl = zlm1 * z;
-
-        std::complex<double> fxterm   = std::complex<double>(l * x, -lp2 * y);
-        std::complex<double> dxfxterm = cxl * (fxterm + z);
-        std::complex<double> dyfxterm = rootm1 * (cxl * fxterm - cxlp2 * z);
-        std::complex<double> fyterm   = std::complex<double>(l * y, lp2 * x);
-        std::complex<double> dxfyterm = cxl * fyterm + rootm1 * cxlp2 * z;
-        std::complex<double> dyfyterm = cxl * (rootm1 * fyterm + z);
-
-        std::complex<double> fxcx   = kterm * zl   * fxterm;
-        std::complex<double> dxfxcx = kterm * zlm1 * dxfxterm;
-        std::complex<double> dyfxcx = kterm * zlm1 * dyfxterm;
-        std::complex<double> fycx   = kterm * zl   * fyterm;
-        std::complex<double> dxfycx = kterm * zlm1 * dxfyterm;
-        std::complex<double> dyfycx = kterm * zlm1 * dyfyterm;
-
-        arr[i][0] -= std::real(fxcx) * KNL;
-        arr[i][2] -= std::real(fycx) * KNL;
-
-        double M11 = 1.0 - std::real(dxfxcx) * KNL;
-        double M12 =     - std::real(dxfycx) * KNL;
-        double M21 =     - std::real(dyfxcx) * KNL;
-        double M22 = 1.0 - std::real(dyfycx) * KNL;
-        double detM = M11 * M22 - M12 * M21;
-
-        double pxnew = ( M22 * px - M12 * py) / detM;
-        double pynew = (-M21 * px + M11 * py) / detM;
-
-        arr[i][1] = pxnew;
-        arr[i][3] = pynew;
-
-        arr[i][4] -= (pxnew * std::real(fxcx) + pynew * std::real(fycx)) *
-                     KNL * KNL;
-    }
+        multpfringeOUT_rows(bunch, arr, sweep, pole, kl, skew, useCharge);
+    });
 }
 
 ////////////////////////////
@@ -617,87 +861,164 @@ void multpfringeOUT(Bunch* bunch, int pole, double kl, int skew, int useCharge)
 //
 ///////////////////////////////////////////////////////////////////////////
 
-void quad1(Bunch* bunch, double length, double kq, int useCharge)
+template<class CoordRows>
+ORBIT_SIMD_CLONES
+static void quad1_block(CoordRows arr, int i_start, int i_stop,
+                        double m11, double m12, double m21, double m22,
+                        double m33, double m34, double m43, double m44,
+                        double length, double gamma2i, double dp_p_coeff)
 {
-    if(kq == 0. || bunch->getCharge() == 0.)
+    typedef typename RowsScalar<CoordRows>::type Scalar;
+    Scalar dp_p, x_init, xp_init, y_init, yp_init;
+
+    ORBIT_SIMD_IVDEP
+    for(int i = i_start; i < i_stop; i++)
     {
-        drift(bunch,length);
-        return;
-    }
+        dp_p    = arr[i][5] * dp_p_coeff;
+        x_init  = arr[i][0];
+        xp_init = arr[i][1];
+        y_init  = arr[i][2];
+        yp_init = arr[i][3];
 
-    double kqc = kq;
+        arr[i][0]  = x_init * m11 + xp_init * m12;
+        arr[i][1]  = x_init * m21 + xp_init * m22;
+        arr[i][2]  = y_init * m33 + yp_init * m34;
+        arr[i][3]  = y_init * m43 + yp_init * m44;
+        arr[i][4] += dp_p * gamma2i * length;
+    }
+}
 
-    double x_init, xp_init, y_init, yp_init;
+/** Calculates the elements m11,m12,m21,m22,m33,m34,m43,m44
+    of the transport matrix of the linear part of the quad. */
+static void quad1_coefficients(double length, double kq, double* m)
+{
     double sqrt_kq, kqlength;
     double cx, sx, cy, sy;
-    double m11 = 0., m12 = 0., m21 = 0., m22 = 0.;
-    double m33 = 0., m34 = 0., m43 = 0., m44 = 0.;
-
-    SyncPart* syncPart = bunch->getSyncPart();
-
-    double v = OrbitConst::c * syncPart->getBeta();
-    if(length > 0.)
-    {
-        syncPart->setTime(syncPart->getTime() + length / v);
-    }
-
-    double gamma2i = 1.0 / (syncPart->getGamma() * syncPart->getGamma());
-    double dp_p_coeff = 1.0 /(syncPart->getMomentum() * syncPart->getBeta());
-
-    if(kqc > 0.)
+    for(int i = 0; i < 8; i++) m[i] = 0.;
+    if(kq > 0.)
     {
-        sqrt_kq  = pow(kqc, 0.5);
+        sqrt_kq  = pow(kq, 0.5);
         kqlength = sqrt_kq * length;
         cx = cos(kqlength);
         sx = sin(kqlength);
         cy = cosh(kqlength);
         sy = sinh(kqlength);
-        m11 = cx;
-        m12 = sx / sqrt_kq;
-        m21 = -sx * sqrt_kq;
-        m22 = cx;
-        m33 = cy;
-        m34 = sy / sqrt_kq;
-        m43 = sy * sqrt_kq;
-        m44 = cy;
+        m[0] = cx;
+        m[1] = sx / sqrt_kq;
+        m[2] = -sx * sqrt_kq;
+        m[3] = cx;
+        m[4] = cy;
+        m[5] = sy / sqrt_kq;
+        m[6] = sy * sqrt_kq;
+        m[7] = cy;
     }
-    else if(kqc < 0.)
+    else if(kq < 0.)
     {
-        sqrt_kq  = pow(-kqc, 0.5);
+        sqrt_kq  = pow(-kq, 0.5);
         kqlength = sqrt_kq * length;
         cx = cosh(kqlength);
         sx = sinh(kqlength);
         cy = cos(kqlength);
         sy = sin(kqlength);
-        m11 = cx;
-        m12 = sx / sqrt_kq;
-        m21 = sx * sqrt_kq;
-        m22 = cx;
-        m33 = cy;
-        m34 = sy / sqrt_kq;
-        m43 = -sy * sqrt_kq;
-        m44 = cy;
+        m[0] = cx;
+        m[1] = sx / sqrt_kq;
+        m[2] = sx * sqrt_kq;
+        m[3] = cx;
+        m[4] = cy;
+        m[5] = sy / sqrt_kq;
+        m[6] = -sy * sqrt_kq;
+        m[7] = cy;
     }
+}
 
-    double dp_p;
+//the cache of the quad transport matrices for the direct quad1 calls, the
+//element programs keep the coefficients of all their operations themselves.
+//Only quad1 has it: its matrix needs pow, cos, sin, cosh, and sinh, while the
+//direct bend, solenoid, and fringe calls compute at most a few cos and sin
+//or only arithmetic, so a lookup would not be cheaper.
+struct Quad1CoefficientsEntry
+{
+    unsigned long long length_bits;
+    unsigned long long kq_bits;
+    int valid;
+    double m[8];
+};
 
-    //coordinate array [part. index][x,xp,y,yp,z,dE]
-    double** arr = bunch->coordArr();
+static const int QUAD1_CACHE_SIZE = 256;
 
-    for(int i = 0; i < bunch->getSize(); i++)
+//returns the matrix coefficients for exactly these length and kq values
+static const double* quad1_cached_coefficients(double length, double kq)
+{
+    static thread_local Quad1CoefficientsEntry cache[QUAD1_CACHE_SIZE];
+    unsigned long long length_bits, kq_bits;
+    std::memcpy(&length_bits, &length, sizeof(double));
+    std::memcpy(&kq_bits, &kq, sizeof(double));
+    unsigned long long key = (length_bits ^ (kq_bits * 0x9E3779B97F4A7C15ULL)) * 0xBF58476D1CE4E5B9ULL;
+    Quad1CoefficientsEntry& entry = cache[(key >> 56) % QUAD1_CACHE_SIZE];
+    if(!entry.valid || entry.length_bits != length_bits || entry.kq_bits != kq_bits)
     {
-        dp_p    = arr[i][5] * dp_p_coeff;
-        x_init  = arr[i][0];
-        xp_init = arr[i][1];
-        y_init  = arr[i][2];
-        yp_init = arr[i][3];
+        quad1_coefficients(length, kq, entry.m);
+        entry.length_bits = length_bits;
+        entry.kq_bits = kq_bits;
+        entry.valid = 1;
+    }
+    return entry.m;
+}
 
-        arr[i][0]  = x_init * m11 + xp_init * m12;
-        arr[i][1]  = x_init * m21 + xp_init * m22;
-        arr[i][2]  = y_init * m33 + yp_init * m34;
-        arr[i][3]  = y_init * m43 + yp_init * m44;
-        arr[i][4] += dp_p * gamma2i * length;
+template<class CoordRows, class Sweep>
+static void quad1_rows(Bunch* bunch, CoordRows arr, Sweep& sweep, double length, double kq,
+                       const double* coeffs = NULL)
+{
+    if(kq == 0. || bunch->getCharge() == 0.)
+    {
+        drift_rows(bunch, arr, sweep, length);
+        return;
+    }
+
+    SyncPart* syncPart = bunch->getSyncPart();
+
+    double v = OrbitConst::c * syncPart->getBeta();
+    //the negative steps of the higher order splitting move the time back
+    if(length != 0.)
+    {
+        syncPart->setTime(syncPart->getTime() + length / v);
+    }
+
+    double gamma2i = 1.0 / (syncPart->getGamma() * syncPart->getGamma());
+    double dp_p_coeff = 1.0 /(syncPart->getMomentum() * syncPart->getBeta());
+
+    //the transport matrix depends only on the length and strength
+    double m_local[8];
+    const double* m = coeffs;
+    if(m == NULL)
+    {
+        quad1_coefficients(length, kq, m_local);
+        m = m_local;
+    }
+    double m11 = m[0], m12 = m[1], m21 = m[2], m22 = m[3];
+    double m33 = m[4], m34 = m[5], m43 = m[6], m44 = m[7];
+
+    //coordinate array [part. index][x,xp,y,yp,z,dE]
+
+    sweep.add([=](int i_start, int i_stop)
+    {
+        quad1_block(arr, i_start, i_stop, m11, m12, m21, m22, m33, m34, m43, m44, length, gamma2i, dp_p_coeff);
+    });
+}
+
+void quad1(Bunch* bunch, double length, double kq, int useCharge)
+{
+    BunchSweep sweep(bunch->getSize());
+    //the zero strength or charge is a drift, and it does not need the matrix
+    const double* coeffs = NULL;
+    if(kq != 0. && bunch->getCharge() != 0.)
+    {
+        coeffs = quad1_cached_coefficients(length, kq);
     }
+    dispatchCoordRows(bunch, [&](auto arr)
+    {
+        quad1_rows(bunch, arr, sweep, length, kq, coeffs);
+    });
 }
 
 ///////////////////////////////////////////////////////////////////////////
@@ -716,20 +1037,16 @@ void quad1(Bunch* bunch, double length, double kq, int useCharge)
 //
 ///////////////////////////////////////////////////////////////////////////
 
-void quad2(Bunch* bunch, double length)
+template<class CoordRows>
+ORBIT_SIMD_CLONES
+static void quad2_block(CoordRows arr, int i_start, int i_stop,
+                        double length, double gamma2i, double dp_p_coeff)
 {
-    double KNL, phifac;
-
-    SyncPart* syncPart = bunch->getSyncPart();
+    typedef typename RowsScalar<CoordRows>::type Scalar;
+    Scalar dp_p, KNL, phifac;
 
-    double gamma2i = 1.0 / (syncPart->getGamma() * syncPart->getGamma());
-    double dp_p_coeff = 1.0 / (syncPart->getMomentum() * syncPart->getBeta());
-    double dp_p;
-
-    //coordinate array [part. index][x,xp,y,yp,z,dE]
-    double** arr = bunch->coordArr();
-
-    for(int i = 0; i < bunch->getSize(); i++)
+    ORBIT_SIMD_IVDEP
+    for(int i = i_start; i < i_stop; i++)
     {
         dp_p = arr[i][5] * dp_p_coeff;
         KNL = 1.0 / (1.0 + dp_p);
@@ -743,6 +1060,31 @@ void quad2(Bunch* bunch, double length)
     }
 }
 
+template<class CoordRows, class Sweep>
+static void quad2_rows(Bunch* bunch, CoordRows arr, Sweep& sweep, double length)
+{
+    SyncPart* syncPart = bunch->getSyncPart();
+
+    double gamma2i = 1.0 / (syncPart->getGamma() * syncPart->getGamma());
+    double dp_p_coeff = 1.0 / (syncPart->getMomentum() * syncPart->getBeta());
+
+    //coordinate array [part. index][x,xp,y,yp,z,dE]
+
+    sweep.add([=](int i_start, int i_stop)
+    {
+        quad2_block(arr, i_start, i_stop, length, gamma2i, dp_p_coeff);
+    });
+}
+
+void quad2(Bunch* bunch, double length)
+{
+    BunchSweep sweep(bunch->getSize());
+    dispatchCoordRows(bunch, [&](auto arr)
+    {
+        quad2_rows(bunch, arr, sweep, length);
+    });
+}
+
 ////////////////////////////
 // NAME
 //   quad3
@@ -781,57 +1123,75 @@ void quad3(Bunch* bunch, double length, double kq, int useCharge)
 //
 ///////////////////////////////////////////////////////////////////////////
 
-void quadfringeIN(Bunch* bunch, double kq, int useCharge)
+//the sign is +1 for the entrance and -1 for the exit fringe field
+template<class CoordRows, class Sweep>
+static void quadfringe_rows(Bunch* bunch, CoordRows arr, Sweep& sweep, double kq, int useCharge, double sign)
 {
     if(bunch->getCharge() == 0.){
     	return;
     }
 
     double kqc = kq;
-    double KNL, x_init, xp_init, y_init, yp_init, detM;
 
     SyncPart* syncPart = bunch->getSyncPart();
 
     double dp_p_coeff = 1.0 / (syncPart->getMomentum() * syncPart->getBeta());
-    double dp_p;
 
     //coordinate array [part. index][x,xp,y,yp,z,dE]
-    double** arr = bunch->coordArr();
+    typedef typename RowsScalar<CoordRows>::type Scalar;
 
-    for(int i = 0; i < bunch->getSize(); i++)
+    sweep.add([=](int i_start, int i_stop)
     {
-        dp_p    = arr[i][5] * dp_p_coeff;
-        KNL     = 1.0 / (1.0 + dp_p);
-        x_init  = arr[i][0];
-        xp_init = arr[i][1];
-        y_init  = arr[i][2];
-        yp_init = arr[i][3];
-        detM = 1.0 - pow(((kqc * KNL / 4.) *
-                          (x_init * x_init - y_init * y_init)), 2);
-
-
-        arr[i][0] += (kqc * KNL / 12.) * x_init *
-                     (x_init * x_init + 3. * y_init * y_init);
-
-        arr[i][1] -= (kqc * KNL / 4.) *
-                     (xp_init * (x_init * x_init + y_init * y_init) -
-                      2. * yp_init * x_init * y_init);
-        arr[i][1] /= detM;
-
-        arr[i][2] -= (kqc * KNL / 12.) * y_init *
-                     (y_init * y_init + 3. * x_init * x_init);
+        Scalar dp_p, KNL, x_init, xp_init, y_init, yp_init, detM_root, detM;
+        for(int i = i_start; i < i_stop; i++)
+        {
+            dp_p    = arr[i][5] * dp_p_coeff;
+            KNL     = 1.0 / (1.0 + dp_p);
+            x_init  = arr[i][0];
+            xp_init = arr[i][1];
+            y_init  = arr[i][2];
+            yp_init = arr[i][3];
+            detM_root = (kqc * KNL / 4.) * (x_init * x_init - y_init * y_init);
+            detM = 1.0 - detM_root * detM_root;
+
+            arr[i][0] += sign * (kqc * KNL / 12.) * x_init *
+                         (x_init * x_init + 3. * y_init * y_init);
+
+            arr[i][1] -= sign * (kqc * KNL / 4.) *
+                         (xp_init * (x_init * x_init + y_init * y_init) -
+                          2. * yp_init * x_init * y_init);
+            arr[i][1] /= detM;
+
+            arr[i][2] -= sign * (kqc * KNL / 12.) * y_init *
+                         (y_init * y_init + 3. * x_init * x_init);
+
+            arr[i][3] -= sign * (kqc * KNL / 4.) *
+                         (-yp_init * (x_init * x_init + y_init * y_init) +
+                          2. * xp_init * x_init * y_init);
+            arr[i][3] /= detM;
+
+            arr[i][4] += sign * (kqc * KNL * KNL / 12.) *
+                         (xp_init * x_init *
+                          (x_init * x_init + 3. * y_init * y_init) -
+                          yp_init * y_init *
+                          (y_init * y_init + 3. * x_init * x_init));
+        }
+    });
+}
 
-        arr[i][3] -= (kqc * KNL / 4.) *
-                     (-yp_init * (x_init * x_init + y_init * y_init) +
-                      2. * xp_init * x_init * y_init);
-        arr[i][3] /= detM;
+template<class CoordRows, class Sweep>
+static void quadfringeIN_rows(Bunch* bunch, CoordRows arr, Sweep& sweep, double kq, int useCharge)
+{
+    quadfringe_rows(bunch, arr, sweep, kq, useCharge, 1.0);
+}
 
-        arr[i][4] += (kqc * KNL * KNL / 12.) *
-                     (xp_init * x_init *
-                      (x_init * x_init + 3. * y_init * y_init) -
-                      yp_init * y_init *
-                      (y_init * y_init + 3. * x_init * x_init));
-    }
+void quadfringeIN(Bunch* bunch, double kq, int useCharge)
+{
+    BunchSweep sweep(bunch->getSize());
+    dispatchCoordRows(bunch, [&](auto arr)
+    {
+        quadfringeIN_rows(bunch, arr, sweep, kq, useCharge);
+    });
 }
 
 ///////////////////////////////////////////////////////////////////////////
@@ -851,56 +1211,19 @@ void quadfringeIN(Bunch* bunch, double kq, int useCharge)
 //
 ///////////////////////////////////////////////////////////////////////////
 
-void quadfringeOUT(Bunch* bunch, double kq, int useCharge)
+template<class CoordRows, class Sweep>
+static void quadfringeOUT_rows(Bunch* bunch, CoordRows arr, Sweep& sweep, double kq, int useCharge)
 {
-    if(bunch->getCharge() == 0.){
-    	return;
-    }
-
-    double kqc = kq;
-    double KNL, x_init, xp_init, y_init, yp_init, detM;
-
-    SyncPart* syncPart = bunch->getSyncPart();
-
-    double dp_p_coeff = 1.0 / (syncPart->getMomentum() * syncPart->getBeta());
-    double dp_p;
-
-    //coordinate array [part. index][x,xp,y,yp,z,dE]
-    double** arr = bunch->coordArr();
+    quadfringe_rows(bunch, arr, sweep, kq, useCharge, -1.0);
+}
 
-    for(int i = 0; i < bunch->getSize(); i++)
+void quadfringeOUT(Bunch* bunch, double kq, int useCharge)
+{
+    BunchSweep sweep(bunch->getSize());
+    dispatchCoordRows(bunch, [&](auto arr)
     {
-        dp_p    = arr[i][5] * dp_p_coeff;
-        KNL     = 1.0 / (1.0 + dp_p);
-        x_init  = arr[i][0];
-        xp_init = arr[i][1];
-        y_init  = arr[i][2];
-        yp_init = arr[i][3];
-        detM = 1.0 - pow(((kqc * KNL / 4.) *
-                          (x_init * x_init - y_init * y_init)), 2);
-
-        arr[i][0] -= (kqc * KNL / 12.) * x_init *
-                     (x_init * x_init + 3. * y_init * y_init);
-
-        arr[i][1] += (kqc * KNL / 4.) *
-                     (xp_init * (x_init * x_init + y_init * y_init) -
-                      2. * yp_init * x_init * y_init);
-        arr[i][1] /= detM;
-
-        arr[i][2] += (kqc * KNL / 12.) * y_init *
-                     (y_init * y_init + 3. * x_init * x_init);
-
-        arr[i][3] += (kqc * KNL / 4.) *
-                     (-yp_init * (x_init * x_init + y_init * y_init) +
-                      2. * xp_init * x_init * y_init);
-        arr[i][3] /= detM;
-
-        arr[i][4] -= (kqc * KNL * KNL / 12.) *
-                     (xp_init * x_init *
-                      (x_init * x_init + 3. * y_init * y_init) -
-                      yp_init * y_init *
-                      (y_init * y_init + 3. * x_init * x_init));
-    }
+        quadfringeOUT_rows(bunch, arr, sweep, kq, useCharge);
+    });
 }
 
 ///////////////////////////////////////////////////////////////////////////
@@ -920,50 +1243,63 @@ void quadfringeOUT(Bunch* bunch, double kq, int useCharge)
 //
 ///////////////////////////////////////////////////////////////////////////
 
-void wedgerotate(Bunch* bunch, double e, int frinout)
+template<class CoordRows, class Sweep>
+static void wedgerotate_rows(Bunch* bunch, CoordRows arr, Sweep& sweep, double e, int frinout,
+                             const double* coeffs = NULL)
 {
     double cs, sn;
-    double xp_temp, p0_temp, p0;
 
     SyncPart* syncPart = bunch->getSyncPart();
 
     double dp_p_coeff = 1.0 / (syncPart->getMomentum() * syncPart->getBeta());
-    double dp_p;
 
-    cs = cos(e);
-    sn = sin(e);
+    cs = (coeffs != NULL) ? coeffs[0] : cos(e);
+    sn = (coeffs != NULL) ? coeffs[1] : sin(e);
 
     //coordinate array [part. index][x,xp,y,yp,z,dE]
-    double** arr = bunch->coordArr();
+    typedef typename RowsScalar<CoordRows>::type Scalar;
 
-    for(int i = 0; i < bunch->getSize(); i++)
+    sweep.add([=](int i_start, int i_stop)
     {
-        if(frinout == 0)
+        Scalar dp_p, xp_temp, p0_temp, p0;
+        for(int i = i_start; i < i_stop; i++)
         {
-            dp_p    = arr[i][5] * dp_p_coeff;
-            xp_temp = arr[i][1];
-            p0_temp = 1.0 + dp_p;
-
-            arr[i][0] /=  cs;
-            arr[i][1]  =  xp_temp * cs + p0_temp * sn;
-            p0         = -xp_temp * sn + p0_temp * cs;
-            dp_p       =  p0 - 1.0;
-            arr[i][4]  =  (-arr[i][0] * sn + arr[i][4]) * cs;
-        }
-        else
-        {
-            dp_p = arr[i][5] * dp_p_coeff;
-            p0   = 1.0 + dp_p;
-
-            arr[i][4]  = arr[i][0] * sn + arr[i][4] / cs;
-            arr[i][0] *= cs;
-            xp_temp    = arr[i][1] * cs - p0 * sn;
-            p0_temp    = arr[i][1] * sn + p0 * cs;
-            arr[i][1]  = xp_temp;
-            dp_p       = p0_temp - 1.0;
+            if(frinout == 0)
+            {
+                dp_p    = arr[i][5] * dp_p_coeff;
+                xp_temp = arr[i][1];
+                p0_temp = 1.0 + dp_p;
+
+                arr[i][0] /=  cs;
+                arr[i][1]  =  xp_temp * cs + p0_temp * sn;
+                p0         = -xp_temp * sn + p0_temp * cs;
+                dp_p       =  p0 - 1.0;
+                arr[i][4]  =  (-arr[i][0] * sn + arr[i][4]) * cs;
+            }
+            else
+            {
+                dp_p = arr[i][5] * dp_p_coeff;
+                p0   = 1.0 + dp_p;
+
+                arr[i][4]  = arr[i][0] * sn + arr[i][4] / cs;
+                arr[i][0] *= cs;
+                xp_temp    = arr[i][1] * cs - p0 * sn;
+                p0_temp    = arr[i][1] * sn + p0 * cs;
+                arr[i][1]  = xp_temp;
+                dp_p       = p0_temp - 1.0;
+            }
+            arr[i][5] = dp_p / dp_p_coeff;
         }
-        arr[i][5] = dp_p / dp_p_coeff;
-    }
+    });
+}
+
+void wedgerotate(Bunch* bunch, double e, int frinout)
+{
+    BunchSweep sweep(bunch->getSize());
+    dispatchCoordRows(bunch, [&](auto arr)
+    {
+        wedgerotate_rows(bunch, arr, sweep, e, frinout);
+    });
 }
 
 ///////////////////////////////////////////////////////////////////////////
@@ -983,36 +1319,50 @@ void wedgerotate(Bunch* bunch, double e, int frinout)
 //
 ///////////////////////////////////////////////////////////////////////////
 
-void wedgedrift(Bunch* bunch, double e, int inout)
+template<class CoordRows, class Sweep>
+static void wedgedrift_rows(Bunch* bunch, CoordRows arr, Sweep& sweep, double e, int inout,
+                            const double* coeffs = NULL)
 {
-    double ct, tn;
-    double s;
+    double ct;
 
     SyncPart* syncPart = bunch->getSyncPart();
 
+    double gamma2i = 1.0 / (syncPart->getGamma() * syncPart->getGamma());
     double dp_p_coeff = 1.0 / (syncPart->getMomentum() * syncPart->getBeta());
-    double dp_p;
 
-    ct = cos(e) / sin(e);
+    ct = (coeffs != NULL) ? coeffs[0] : cos(e) / sin(e);
 
     //coordinate array [part. index][x,xp,y,yp,z,dE]
-    double** arr = bunch->coordArr();
+    typedef typename RowsScalar<CoordRows>::type Scalar;
 
-    for(int i = 0; i < bunch->getSize(); i++)
+    sweep.add([=](int i_start, int i_stop)
     {
-        if(inout == 0)
+        Scalar dp_p, tn, s;
+        for(int i = i_start; i < i_stop; i++)
         {
-            dp_p = arr[i][5] * dp_p_coeff;
-            tn   = arr[i][1] / (1.0 + dp_p);
-            s    = arr[i][0] / (ct - tn);
-        }
-        else
-        {
-            s    = arr[i][0] / ct;
+            if(inout == 0)
+            {
+                dp_p = arr[i][5] * dp_p_coeff;
+                tn   = arr[i][1] / (1.0 + dp_p);
+                s    = arr[i][0] / (ct - tn);
+            }
+            else
+            {
+                s    = arr[i][0] / ct;
+            }
+
+            drift_particle(arr, i, s, gamma2i, dp_p_coeff);
         }
+    });
+}
 
-        drifti(bunch, i, s);
-    }
+void wedgedrift(Bunch* bunch, double e, int inout)
+{
+    BunchSweep sweep(bunch->getSize());
+    dispatchCoordRows(bunch, [&](auto arr)
+    {
+        wedgedrift_rows(bunch, arr, sweep, e, inout);
+    });
 }
 
 ///////////////////////////////////////////////////////////////////////////
@@ -1034,49 +1384,63 @@ void wedgedrift(Bunch* bunch, double e, int inout)
 //
 ///////////////////////////////////////////////////////////////////////////
 
-void wedgebend(Bunch* bunch, double e, int inout, double rho, int nsteps)
+template<class CoordRows, class Sweep>
+static void wedgebend_rows(Bunch* bunch, CoordRows arr, Sweep& sweep, double e, int inout, double rho, int nsteps,
+                           const double* coeffs = NULL)
 {
-    double ct, tn;
-    double s, sm, sm2;
+    double ct;
     int nst;
 
     SyncPart* syncPart = bunch->getSyncPart();
 
+    double gamma2i = 1.0 / (syncPart->getGamma() * syncPart->getGamma());
     double dp_p_coeff = 1.0 / (syncPart->getMomentum() * syncPart->getBeta());
-    double dp_p;
 
     nst = nsteps / 2;
     if(nst < 1) nst = 1;
-    ct = cos(e) / sin(e);
+    ct = (coeffs != NULL) ? coeffs[0] : cos(e) / sin(e);
 
     //coordinate array [part. index][x,xp,y,yp,z,dE]
-    double** arr = bunch->coordArr();
+    typedef typename RowsScalar<CoordRows>::type Scalar;
 
-    for(int i = 0; i < bunch->getSize(); i++)
+    sweep.add([=](int i_start, int i_stop)
     {
-        if(inout == 0)
-        {
-            s    = -arr[i][0] / ct;
-        }
-        else
+        Scalar dp_p, tn, s, sm, sm2;
+        for(int i = i_start; i < i_stop; i++)
         {
-            dp_p =  arr[i][5] * dp_p_coeff;
-            tn   =  arr[i][1] / (1.0 + dp_p);
-            s    = -arr[i][0] / (ct + tn);
-        }
+            if(inout == 0)
+            {
+                s    = -arr[i][0] / ct;
+            }
+            else
+            {
+                dp_p =  arr[i][5] * dp_p_coeff;
+                tn   =  arr[i][1] / (1.0 + dp_p);
+                s    = -arr[i][0] / (ct + tn);
+            }
 
-        sm  = s / nst;
-        sm2 = sm / 2.0;
+            sm  = s / nst;
+            sm2 = sm / 2.0;
 
-        drifti(bunch, i, sm2);
-        arr[i][1] -= sm / rho;
-        for(int j  = 1; j < nst; j++)
-        {
-            drifti(bunch, i, sm);
+            drift_particle(arr, i, sm2, gamma2i, dp_p_coeff);
             arr[i][1] -= sm / rho;
+            for(int j  = 1; j < nst; j++)
+            {
+                drift_particle(arr, i, sm, gamma2i, dp_p_coeff);
+                arr[i][1] -= sm / rho;
+            }
+            drift_particle(arr, i, sm2, gamma2i, dp_p_coeff);
         }
-        drifti(bunch, i, sm2);
-    }
+    });
+}
+
+void wedgebend(Bunch* bunch, double e, int inout, double rho, int nsteps)
+{
+    BunchSweep sweep(bunch->getSize());
+    dispatchCoordRows(bunch, [&](auto arr)
+    {
+        wedgebend_rows(bunch, arr, sweep, e, inout, rho, nsteps);
+    });
 }
 
 ///////////////////////////////////////////////////////////////////////////
@@ -1096,9 +1460,35 @@ void wedgebend(Bunch* bunch, double e, int inout, double rho, int nsteps)
 //
 ///////////////////////////////////////////////////////////////////////////
 
-void bend1(Bunch* bunch, double length, double th)
+template<class CoordRows>
+ORBIT_SIMD_CLONES
+static void bend1_block(CoordRows arr, int i_start, int i_stop,
+                        double m11, double m12, double m16,
+                        double m21, double m22, double m26,
+                        double m51, double m52, double m56,
+                        double length, double dp_p_coeff)
+{
+    typedef typename RowsScalar<CoordRows>::type Scalar;
+    Scalar dp_p, x_init, xp_init;
+
+    ORBIT_SIMD_IVDEP
+    for(int i = i_start; i < i_stop; i++)
+    {
+        dp_p   = arr[i][5] * dp_p_coeff;
+        x_init = arr[i][0];
+        xp_init = arr[i][1];
+
+        arr[i][0]  = x_init * m11 + xp_init * m12 + dp_p * m16;
+        arr[i][1]  = x_init * m21 + xp_init * m22 + dp_p * m26;
+        arr[i][2] += length * arr[i][3];
+        arr[i][4] += x_init * m51 + xp_init * m52 + dp_p * m56;
+    }
+}
+
+template<class CoordRows, class Sweep>
+static void bend1_rows(Bunch* bunch, CoordRows arr, Sweep& sweep, double length, double th,
+                       const double* coeffs = NULL)
 {
-    double x_init, xp_init;
     double cx, sx, rho;
     double m11, m12, m16;
     double m21, m22, m26;
@@ -1107,18 +1497,18 @@ void bend1(Bunch* bunch, double length, double th)
     SyncPart* syncPart = bunch->getSyncPart();
 
     double v = OrbitConst::c * syncPart->getBeta();
-    if(length > 0.)
+    //the negative steps of the higher order splitting move the time back
+    if(length != 0.)
     {
 	   syncPart->setTime( syncPart->getTime() + length/v);
     }
 
     double betasq = syncPart->getBeta() * syncPart->getBeta();
     double dp_p_coeff = 1.0 / (syncPart->getMomentum() * syncPart->getBeta());
-    double dp_p;
 
     rho = length / th;
-    cx  = cos(th);
-    sx  = sin(th);
+    cx  = (coeffs != NULL) ? coeffs[0] : cos(th);
+    sx  = (coeffs != NULL) ? coeffs[1] : sin(th);
     m11 = cx;
     m12 = rho * sx;
     m16 = rho * (1.0 - cx);
@@ -1130,19 +1520,20 @@ void bend1(Bunch* bunch, double length, double th)
     m56 = -betasq * length + rho * sx;
 
     //coordinate array [part. index][x,xp,y,yp,z,dE]
-    double** arr = bunch->coordArr();
 
-    for(int i = 0; i < bunch->getSize(); i++)
+    sweep.add([=](int i_start, int i_stop)
     {
-        dp_p   = arr[i][5] * dp_p_coeff;
-        x_init = arr[i][0];
-        xp_init = arr[i][1];
+        bend1_block(arr, i_start, i_stop, m11, m12, m16, m21, m22, m26, m51, m52, m56, length, dp_p_coeff);
+    });
+}
 
-        arr[i][0]  = x_init * m11 + xp_init * m12 + dp_p * m16;
-        arr[i][1]  = x_init * m21 + xp_init * m22 + dp_p * m26;
-        arr[i][2] += length * arr[i][3];
-        arr[i][4] += x_init * m51 + xp_init * m52 + dp_p * m56;
-    }
+void bend1(Bunch* bunch, double length, double th)
+{
+    BunchSweep sweep(bunch->getSize());
+    dispatchCoordRows(bunch, [&](auto arr)
+    {
+        bend1_rows(bunch, arr, sweep, length, th);
+    });
 }
 
 ///////////////////////////////////////////////////////////////////////////
@@ -1161,20 +1552,16 @@ void bend1(Bunch* bunch, double length, double th)
 //
 ///////////////////////////////////////////////////////////////////////////
 
-void bend2(Bunch* bunch, double length)
+template<class CoordRows>
+ORBIT_SIMD_CLONES
+static void bend2_block(CoordRows arr, int i_start, int i_stop,
+                        double length, double gamma2i, double dp_p_coeff)
 {
-    double KNL, phifac;
+    typedef typename RowsScalar<CoordRows>::type Scalar;
+    Scalar dp_p, KNL, phifac;
 
-    SyncPart* syncPart = bunch->getSyncPart();
-
-    double gamma2i = 1.0 / (syncPart->getGamma() * syncPart->getGamma());
-    double dp_p_coeff = 1.0 / (syncPart->getMomentum() * syncPart->getBeta());
-    double dp_p;
-
-    //coordinate array [part. index][x,xp,y,yp,z,dE]
-    double** arr = bunch->coordArr();
-
-    for(int i = 0; i < bunch->getSize(); i++)
+    ORBIT_SIMD_IVDEP
+    for(int i = i_start; i < i_stop; i++)
     {
         dp_p = arr[i][5] * dp_p_coeff;
         KNL = 1.0 / (1.0 + dp_p);
@@ -1188,6 +1575,31 @@ void bend2(Bunch* bunch, double length)
     }
 }
 
+template<class CoordRows, class Sweep>
+static void bend2_rows(Bunch* bunch, CoordRows arr, Sweep& sweep, double length)
+{
+    SyncPart* syncPart = bunch->getSyncPart();
+
+    double gamma2i = 1.0 / (syncPart->getGamma() * syncPart->getGamma());
+    double dp_p_coeff = 1.0 / (syncPart->getMomentum() * syncPart->getBeta());
+
+    //coordinate array [part. index][x,xp,y,yp,z,dE]
+
+    sweep.add([=](int i_start, int i_stop)
+    {
+        bend2_block(arr, i_start, i_stop, length, gamma2i, dp_p_coeff);
+    });
+}
+
+void bend2(Bunch* bunch, double length)
+{
+    BunchSweep sweep(bunch->getSize());
+    dispatchCoordRows(bunch, [&](auto arr)
+    {
+        bend2_rows(bunch, arr, sweep, length);
+    });
+}
+
 ///////////////////////////////////////////////////////////////////////////
 // NAME
 //   bend3
@@ -1205,20 +1617,16 @@ void bend2(Bunch* bunch, double length)
 //
 ///////////////////////////////////////////////////////////////////////////
 
-void bend3(Bunch* bunch, double th)
+template<class CoordRows>
+ORBIT_SIMD_CLONES
+static void bend3_block(CoordRows arr, int i_start, int i_stop,
+                        double th, double gamma2i, double dp_p_coeff)
 {
-    double KNL, phifac;
-
-    SyncPart* syncPart = bunch->getSyncPart();
-
-    double gamma2i = 1.0 / (syncPart->getGamma() * syncPart->getGamma());
-    double dp_p_coeff = 1.0 / (syncPart->getMomentum() * syncPart->getBeta());
-    double dp_p;
+    typedef typename RowsScalar<CoordRows>::type Scalar;
+    Scalar dp_p, KNL, phifac;
 
-    //coordinate array [part. index][x,xp,y,yp,z,dE]
-    double** arr = bunch->coordArr();
-
-    for(int i = 0; i < bunch->getSize(); i++)
+    ORBIT_SIMD_IVDEP
+    for(int i = i_start; i < i_stop; i++)
     {
         dp_p = arr[i][5] * dp_p_coeff;
         KNL  = 1.0 / (1.0 + dp_p);
@@ -1231,6 +1639,31 @@ void bend3(Bunch* bunch, double th)
     }
 }
 
+template<class CoordRows, class Sweep>
+static void bend3_rows(Bunch* bunch, CoordRows arr, Sweep& sweep, double th)
+{
+    SyncPart* syncPart = bunch->getSyncPart();
+
+    double gamma2i = 1.0 / (syncPart->getGamma() * syncPart->getGamma());
+    double dp_p_coeff = 1.0 / (syncPart->getMomentum() * syncPart->getBeta());
+
+    //coordinate array [part. index][x,xp,y,yp,z,dE]
+
+    sweep.add([=](int i_start, int i_stop)
+    {
+        bend3_block(arr, i_start, i_stop, th, gamma2i, dp_p_coeff);
+    });
+}
+
+void bend3(Bunch* bunch, double th)
+{
+    BunchSweep sweep(bunch->getSize());
+    dispatchCoordRows(bunch, [&](auto arr)
+    {
+        bend3_rows(bunch, arr, sweep, th);
+    });
+}
+
 ///////////////////////////////////////////////////////////////////////////
 // NAME
 //   bend4
@@ -1248,19 +1681,16 @@ void bend3(Bunch* bunch, double th)
 //
 ///////////////////////////////////////////////////////////////////////////
 
-void bend4(Bunch* bunch, double th)
+template<class CoordRows>
+ORBIT_SIMD_CLONES
+static void bend4_block(CoordRows arr, int i_start, int i_stop,
+                        double th, double dp_p_coeff)
 {
-    double KNL, phifac, xfac;
-
-    SyncPart* syncPart = bunch->getSyncPart();
+    typedef typename RowsScalar<CoordRows>::type Scalar;
+    Scalar dp_p, KNL, phifac, xfac;
 
-    double dp_p_coeff = 1.0 / (syncPart->getMomentum() * syncPart->getBeta());
-    double dp_p;
-
-    //coordinate array [part. index][x,xp,y,yp,z,dE]
-    double** arr = bunch->coordArr();
-
-    for(int i = 0; i < bunch->getSize(); i++)
+    ORBIT_SIMD_IVDEP
+    for(int i = i_start; i < i_stop; i++)
     {
         dp_p = arr[i][5] * dp_p_coeff;
         KNL  = 1.0 / (1.0 + dp_p);
@@ -1273,6 +1703,30 @@ void bend4(Bunch* bunch, double th)
     }
 }
 
+template<class CoordRows, class Sweep>
+static void bend4_rows(Bunch* bunch, CoordRows arr, Sweep& sweep, double th)
+{
+    SyncPart* syncPart = bunch->getSyncPart();
+
+    double dp_p_coeff = 1.0 / (syncPart->getMomentum() * syncPart->getBeta());
+
+    //coordinate array [part. index][x,xp,y,yp,z,dE]
+
+    sweep.add([=](int i_start, int i_stop)
+    {
+        bend4_block(arr, i_start, i_stop, th, dp_p_coeff);
+    });
+}
+
+void bend4(Bunch* bunch, double th)
+{
+    BunchSweep sweep(bunch->getSize());
+    dispatchCoordRows(bunch, [&](auto arr)
+    {
+        bend4_rows(bunch, arr, sweep, th);
+    });
+}
+
 ///////////////////////////////////////////////////////////////////////////
 // NAME
 //   bendfringeIN
@@ -1289,25 +1743,45 @@ void bend4(Bunch* bunch, double th)
 //
 ///////////////////////////////////////////////////////////////////////////
 
-void bendfringeIN(Bunch* bunch, double rho)
+//the sign is +1 for the entrance and -1 for the exit fringe field
+template<class CoordRows, class Sweep>
+static void bendfringe_rows(Bunch* bunch, CoordRows arr, Sweep& sweep, double rho, double sign)
 {
     SyncPart* syncPart = bunch->getSyncPart();
 
     double dp_p_coeff = 1.0 / (syncPart->getMomentum() * syncPart->getBeta());
-    double dp_p, KNL;
 
     //coordinate array [part. index][x,xp,y,yp,z,dE]
-    double** arr = bunch->coordArr();
+    typedef typename RowsScalar<CoordRows>::type Scalar;
 
-    for(int i = 0; i < bunch->getSize(); i++)
+    sweep.add([=](int i_start, int i_stop)
     {
-        dp_p    = arr[i][5] * dp_p_coeff;
-        KNL  = 1.0 / (1.0 + dp_p);
+        Scalar dp_p, KNL;
+        for(int i = i_start; i < i_stop; i++)
+        {
+            dp_p    = arr[i][5] * dp_p_coeff;
+            KNL  = 1.0 / (1.0 + dp_p);
 
-        arr[i][0] += KNL * arr[i][2] * arr[i][2] / (2. * rho);
-        arr[i][3] -= KNL * arr[i][1] * arr[i][2] / rho;
-        arr[i][4] += KNL * KNL * arr[i][1] * arr[i][2] * arr[i][2] / (2. * rho);
-    }
+            arr[i][0] += sign * KNL * arr[i][2] * arr[i][2] / (2. * rho);
+            arr[i][3] -= sign * KNL * arr[i][1] * arr[i][2] / rho;
+            arr[i][4] += sign * KNL * KNL * arr[i][1] * arr[i][2] * arr[i][2] / (2. * rho);
+        }
+    });
+}
+
+template<class CoordRows, class Sweep>
+static void bendfringeIN_rows(Bunch* bunch, CoordRows arr, Sweep& sweep, double rho)
+{
+    bendfringe_rows(bunch, arr, sweep, rho, 1.0);
+}
+
+void bendfringeIN(Bunch* bunch, double rho)
+{
+    BunchSweep sweep(bunch->getSize());
+    dispatchCoordRows(bunch, [&](auto arr)
+    {
+        bendfringeIN_rows(bunch, arr, sweep, rho);
+    });
 }
 
 ///////////////////////////////////////////////////////////////////////////
@@ -1326,25 +1800,19 @@ void bendfringeIN(Bunch* bunch, double rho)
 //
 ///////////////////////////////////////////////////////////////////////////
 
-void bendfringeOUT(Bunch* bunch, double rho)
+template<class CoordRows, class Sweep>
+static void bendfringeOUT_rows(Bunch* bunch, CoordRows arr, Sweep& sweep, double rho)
 {
-    SyncPart* syncPart = bunch->getSyncPart();
-
-    double dp_p_coeff = 1.0 / (syncPart->getMomentum() * syncPart->getBeta());
-    double dp_p, KNL;
-
-    //coordinate array [part. index][x,xp,y,yp,z,dE]
-    double** arr = bunch->coordArr();
+    bendfringe_rows(bunch, arr, sweep, rho, -1.0);
+}
 
-    for(int i = 0; i < bunch->getSize(); i++)
+void bendfringeOUT(Bunch* bunch, double rho)
+{
+    BunchSweep sweep(bunch->getSize());
+    dispatchCoordRows(bunch, [&](auto arr)
     {
-        dp_p    = arr[i][5] * dp_p_coeff;
-        KNL  = 1.0 / (1.0 + dp_p);
-
-        arr[i][0] -= KNL * arr[i][2] * arr[i][2] / (2. * rho);
-        arr[i][3] += KNL * arr[i][1] * arr[i][2] / rho;
-        arr[i][4] -= KNL * KNL * arr[i][1] * arr[i][2] * arr[i][2] / (2. * rho);
-    }
+        bendfringeOUT_rows(bunch, arr, sweep, rho);
+    });
 }
 
 ///////////////////////////////////////////////////////////////////////////
@@ -1364,17 +1832,16 @@ void bendfringeOUT(Bunch* bunch, double rho)
 //
 ///////////////////////////////////////////////////////////////////////////
 
-void soln(Bunch* bunch, double length, double B, int useCharge)
+template<class CoordRows, class Sweep>
+static void soln_rows(Bunch* bunch, CoordRows arr, Sweep& sweep, double length, double B, int useCharge)
 {
     //if solenoid field in [T] is zero we have just a drift
     if(abs(B) < 1.0e-100 || bunch->getCharge() == 0.){
-    	drift(bunch,length);
+    	drift_rows(bunch, arr, sweep, length);
     	return;
     }
 
     double Bc = B * bunch->getCharge();
-    double KNL, phase, cs, sn;
-    double cu, cpu, u_init, pu_init, u, pu, phifac;
 
     SyncPart* syncPart = bunch->getSyncPart();
 
@@ -1386,39 +1853,51 @@ void soln(Bunch* bunch, double length, double B, int useCharge)
 
     double gamma2i = 1.0 / (syncPart->getGamma() * syncPart->getGamma());
     double dp_p_coeff = 1.0 / (syncPart->getMomentum() * syncPart->getBeta());
-    double dp_p;
 
     //coordinate array [part. index][x,xp,y,yp,z,dE]
-    double** arr = bunch->coordArr();
+    typedef typename RowsScalar<CoordRows>::type Scalar;
 
-    for(int i = 0; i < bunch->getSize(); i++)
+    sweep.add([=](int i_start, int i_stop)
     {
-        dp_p = arr[i][5] * dp_p_coeff;
-        KNL  = 1.0 / (1.0 + dp_p);
+        Scalar dp_p, KNL, phase, cs, sn, cu, cpu, u_init, pu_init, u, pu, phifac;
+        for(int i = i_start; i < i_stop; i++)
+        {
+            dp_p = arr[i][5] * dp_p_coeff;
+            KNL  = 1.0 / (1.0 + dp_p);
+
+            cu      =  arr[i][2] / 2.     - arr[i][1] / Bc;
+            cpu     =  arr[i][0] * Bc / 2. + arr[i][3];
+            u_init  =  arr[i][2] / 2.     + arr[i][1] / Bc;
+            pu_init = -arr[i][0] * Bc / 2. + arr[i][3];
+            phase = KNL * Bc * length;
+            cs = cos(phase);
+            sn = sin(phase);
+
+            u =   u_init * cs     + pu_init * sn / Bc;
+            pu = -u_init * Bc * sn + pu_init * cs;
+
+            arr[i][0] = (-pu + cpu) / Bc;
+            arr[i][1] = 0.5 * (u - cu) * Bc;
+            arr[i][2] = u + cu;
+            arr[i][3] = 0.5 * (pu + cpu);
+
+            phifac = (pu_init * pu_init +
+                      Bc * Bc * u_init * u_init +
+                      dp_p * dp_p * gamma2i
+                     ) / 2.0;
+            phifac = (phifac * KNL - dp_p * gamma2i) * KNL;
+            arr[i][4] -= length * phifac;
+        }
+    });
+}
 
-        cu      =  arr[i][2] / 2.     - arr[i][1] / Bc;
-        cpu     =  arr[i][0] * Bc / 2. + arr[i][3];
-        u_init  =  arr[i][2] / 2.     + arr[i][1] / Bc;
-        pu_init = -arr[i][0] * Bc / 2. + arr[i][3];
-        phase = KNL * Bc * length;
-        cs = cos(phase);
-        sn = sin(phase);
-
-        u =   u_init * cs     + pu_init * sn / Bc;
-        pu = -u_init * Bc * sn + pu_init * cs;
-
-        arr[i][0] = (-pu + cpu) / Bc;
-        arr[i][1] = 0.5 * (u - cu) * Bc;
-        arr[i][2] = u + cu;
-        arr[i][3] = 0.5 * (pu + cpu);
-
-        phifac = (pu_init * pu_init +
-                  Bc * Bc * u_init * u_init +
-                  dp_p * dp_p * gamma2i
-                 ) / 2.0;
-        phifac = (phifac * KNL - dp_p * gamma2i) * KNL;
-        arr[i][4] -= length * phifac;
-    }
+void soln(Bunch* bunch, double length, double B, int useCharge)
+{
+    BunchSweep sweep(bunch->getSize());
+    dispatchCoordRows(bunch, [&](auto arr)
+    {
+        soln_rows(bunch, arr, sweep, length, B, useCharge);
+    });
 }
 
 ///////////////////////////////////////////////////////////////////////////
@@ -1444,65 +1923,85 @@ void soln(Bunch* bunch, double length, double B, int useCharge)
 //
 ///////////////////////////////////////////////////////////////////////////
 
-void wedgebendCF(Bunch* bunch, double e, int inout,
+template<class CoordRows, class Sweep>
+static void wedgebendCF_rows(Bunch* bunch, CoordRows arr, Sweep& sweep, double e, int inout,
                  double rho,
                  int vecnum,
                  std::vector<int>& pole,
                  std::vector<double>& kl,
                  std::vector<int>& skew,
-                 int nsteps, int useCharge)
+                 int nsteps, int useCharge,
+                 const double* coeffs = NULL)
 {
-    double ct, tn;
-    double s, sm, sm2, klint;
+    double ct;
     int nst;
 
     SyncPart* syncPart = bunch->getSyncPart();
 
+    double gamma2i = 1.0 / (syncPart->getGamma() * syncPart->getGamma());
     double dp_p_coeff = 1.0 / (syncPart->getMomentum() * syncPart->getBeta());
-    double dp_p;
 
     nst = nsteps / 2;
     if(nst < 1) nst = 1;
-    ct = cos(e) / sin(e);
+    ct = (coeffs != NULL) ? coeffs[0] : cos(e) / sin(e);
 
     //coordinate array [part. index][x,xp,y,yp,z,dE]
-    double** arr = bunch->coordArr();
+    typedef typename RowsScalar<CoordRows>::type Scalar;
 
-    for(int i = 0; i < bunch->getSize(); i++)
+    sweep.add([=](int i_start, int i_stop)
     {
-        if(inout == 0)
+        Scalar dp_p, tn, s, sm, sm2, klint;
+        for(int i = i_start; i < i_stop; i++)
         {
-            s = -arr[i][0] / ct;
-        }
-        else
-        {
-            dp_p =  arr[i][5] * dp_p_coeff;
-            tn   =  arr[i][1] / (1.0 + dp_p);
-            s    = -arr[i][0] / (ct + tn);
-        }
+            if(inout == 0)
+            {
+                s = -arr[i][0] / ct;
+            }
+            else
+            {
+                dp_p =  arr[i][5] * dp_p_coeff;
+                tn   =  arr[i][1] / (1.0 + dp_p);
+                s    = -arr[i][0] / (ct + tn);
+            }
 
-        sm = s / nst;
-        sm2 = sm / 2.0;
+            sm = s / nst;
+            sm2 = sm / 2.0;
 
-        drifti(bunch, i, sm2);
-        arr[i][1] -= sm / rho;
-        for (int l = 0; l < vecnum; l++)
-        {
-            klint = kl[l] * sm;
-            multpi(bunch, i, pole[l], klint, skew[l], useCharge);
-        }
-        for(int j = 1; j < nst; j++)
-        {
-            drifti(bunch, i, sm);
+            drift_particle(arr, i, sm2, gamma2i, dp_p_coeff);
             arr[i][1] -= sm / rho;
             for (int l = 0; l < vecnum; l++)
             {
                 klint = kl[l] * sm;
-                multpi(bunch, i, pole[l], klint, skew[l], useCharge);
+                multpi_rows(bunch, arr, i, pole[l], klint, skew[l], useCharge);
+            }
+            for(int j = 1; j < nst; j++)
+            {
+                drift_particle(arr, i, sm, gamma2i, dp_p_coeff);
+                arr[i][1] -= sm / rho;
+                for (int l = 0; l < vecnum; l++)
+                {
+                    klint = kl[l] * sm;
+                    multpi_rows(bunch, arr, i, pole[l], klint, skew[l], useCharge);
+                }
             }
+            drift_particle(arr, i, sm2, gamma2i, dp_p_coeff);
         }
-        drifti(bunch, i, sm2);
-    }
+    });
+}
+
+void wedgebendCF(Bunch* bunch, double e, int inout,
+                 double rho,
+                 int vecnum,
+                 std::vector<int>& pole,
+                 std::vector<double>& kl,
+                 std::vector<int>& skew,
+                 int nsteps, int useCharge)
+{
+    BunchSweep sweep(bunch->getSize());
+    dispatchCoordRows(bunch, [&](auto arr)
+    {
+        wedgebendCF_rows(bunch, arr, sweep, e, inout, rho, vecnum, pole, kl, skew, nsteps, useCharge);
+    });
 }
 
 ///////////////////////////////////////////////////////////////////////////
@@ -1524,12 +2023,12 @@ void wedgebendCF(Bunch* bunch, double e, int inout,
 //
 ///////////////////////////////////////////////////////////////////////////
 
-void RingRF(Bunch* bunch, double ring_length, int harmonic_numb,
+template<class CoordRows, class Sweep>
+static void RingRF_rows(Bunch* bunch, CoordRows arr, Sweep& sweep, double ring_length, int harmonic_numb,
             double voltage, double phase_s, int useCharge)
 {
     double charge = +1.0;
     if(useCharge == 1) charge = bunch->getCharge();
-    double deltaV = 0.;
     double coeff  = charge;
 
     double Factor = 0.;
@@ -1554,16 +2053,306 @@ void RingRF(Bunch* bunch, double ring_length, int harmonic_numb,
     double xp_yp_coeff = p_synch_in/p_synch_out;
 
     //coordinate array [part. index][x,xp,y,yp,z,dE]
-    double** arr = bunch->coordArr();
+    typedef typename RowsScalar<CoordRows>::type Scalar;
+
+    sweep.add([=](int i_start, int i_stop)
+    {
+        Scalar deltaV;
+        for(int i = i_start; i < i_stop; i++)
+        {
+            deltaV = voltage * ( sin(harmonic_numb*Factor*arr[i][4] + phase_s));
+            arr[i][5] += coeff * deltaV;
+
+            arr[i][1] *= xp_yp_coeff;
+            arr[i][3] *= xp_yp_coeff;
+        }
+    });
+}
+
+void RingRF(Bunch* bunch, double ring_length, int harmonic_numb,
+            double voltage, double phase_s, int useCharge)
+{
+    BunchSweep sweep(bunch->getSize());
+    dispatchCoordRows(bunch, [&](auto arr)
+    {
+        RingRF_rows(bunch, arr, sweep, ring_length, harmonic_numb, voltage, phase_s, useCharge);
+    });
+}
+
+///////////////////////////////////////////////////////////////////////////
+// NAME
+//   ElementProgram
+//
+// DESCRIPTION
+//   The sequence of the tracking functions that is applied to the bunch
+//   block by block. Each function of the sequence gives its particle loop
+//   to the ProgramSweep instead of running it, and the sweep runs all loops
+//   for one block of particles before the next block.
+//
+///////////////////////////////////////////////////////////////////////////
+
+enum ElementProgramOperationType
+{
+    OP_ROTATEXY, OP_DRIFT, OP_WRAPBUNCH, OP_KICK, OP_MULTP, OP_MULTPFRINGEIN, OP_MULTPFRINGEOUT,
+    OP_QUAD1, OP_QUAD2, OP_QUADFRINGEIN, OP_QUADFRINGEOUT, OP_WEDGEROTATE, OP_WEDGEDRIFT,
+    OP_WEDGEBEND, OP_BEND1, OP_BEND2, OP_BEND3, OP_BEND4, OP_BENDFRINGEIN, OP_BENDFRINGEOUT,
+    OP_SOLN, OP_WEDGEBENDCF, OP_RINGRF
+};
+
+ElementProgram::ElementProgram()
+{
+    blockSize = 512;
+}
 
-    for(int i = 0; i < bunch->getSize(); i++)
+ElementProgram::~ElementProgram()
+{
+}
+
+void ElementProgram::add(int type, const std::vector<double>& d, const std::vector<int>& n,
+                         const std::vector<double>& c)
+{
+    Operation op;
+    op.type = type;
+    op.d = d;
+    op.n = n;
+    op.c = c;
+    operations.push_back(op);
+}
+
+void ElementProgram::rotatexy(double anglexy){ add(OP_ROTATEXY, {anglexy}, {}, {cos(anglexy), sin(anglexy)});}
+void ElementProgram::drift(double length){ add(OP_DRIFT, {length}, {});}
+void ElementProgram::wrapbunch(double length){ add(OP_WRAPBUNCH, {length}, {});}
+void ElementProgram::kick(double kx, double ky, double kE, int useCharge){ add(OP_KICK, {kx, ky, kE}, {useCharge});}
+void ElementProgram::multp(int pole, double kl, int skew, int useCharge){ add(OP_MULTP, {kl}, {pole, skew, useCharge});}
+void ElementProgram::multpfringeIN(int pole, double kl, int skew, int useCharge){ add(OP_MULTPFRINGEIN, {kl}, {pole, skew, useCharge});}
+void ElementProgram::multpfringeOUT(int pole, double kl, int skew, int useCharge){ add(OP_MULTPFRINGEOUT, {kl}, {pole, skew, useCharge});}
+void ElementProgram::quad1(double length, double kq, int useCharge)
+{
+    std::vector<double> m(8);
+    quad1_coefficients(length, kq, m.data());
+    add(OP_QUAD1, {length, kq}, {}, m);
+}
+
+void ElementProgram::quad2(double length){ add(OP_QUAD2, {length}, {});}
+void ElementProgram::quadfringeIN(double kq, int useCharge){ add(OP_QUADFRINGEIN, {kq}, {useCharge});}
+void ElementProgram::quadfringeOUT(double kq, int useCharge){ add(OP_QUADFRINGEOUT, {kq}, {useCharge});}
+void ElementProgram::wedgerotate(double e, int frinout){ add(OP_WEDGEROTATE, {e}, {frinout}, {cos(e), sin(e)});}
+void ElementProgram::wedgedrift(double e, int inout){ add(OP_WEDGEDRIFT, {e}, {inout}, {cos(e) / sin(e)});}
+void ElementProgram::wedgebend(double e, int inout, double rho, int nsteps){ add(OP_WEDGEBEND, {e, rho}, {inout, nsteps}, {cos(e) / sin(e)});}
+void ElementProgram::bend1(double length, double th){ add(OP_BEND1, {length, th}, {}, {cos(th), sin(th)});}
+void ElementProgram::bend2(double length){ add(OP_BEND2, {length}, {});}
+void ElementProgram::bend3(double th){ add(OP_BEND3, {th}, {});}
+void ElementProgram::bend4(double th){ add(OP_BEND4, {th}, {});}
+void ElementProgram::bendfringeIN(double rho){ add(OP_BENDFRINGEIN, {rho}, {});}
+void ElementProgram::bendfringeOUT(double rho){ add(OP_BENDFRINGEOUT, {rho}, {});}
+void ElementProgram::soln(double length, double B, int useCharge){ add(OP_SOLN, {length, B}, {useCharge});}
+
+void ElementProgram::wedgebendCF(double e, int inout, double rho, int vecnum,
+                                 std::vector<int>& pole, std::vector<double>& kl, std::vector<int>& skew,
+                                 int nsteps, int useCharge)
+{
+    add(OP_WEDGEBENDCF, {e, rho}, {inout, vecnum, nsteps, useCharge}, {cos(e) / sin(e)});
+    operations.back().poles = pole;
+    operations.back().kls = kl;
+    operations.back().skews = skew;
+}
+
+void ElementProgram::RingRF(double ring_length, int harmonic_numb, double voltage, double phase_s, int useCharge)
+{
+    add(OP_RINGRF, {ring_length, voltage, phase_s}, {harmonic_numb, useCharge});
+}
+
+int ElementProgram::getNumberOfOperations(){ return (int) operations.size();}
+
+void ElementProgram::clear(){ operations.clear();}
+
+void ElementProgram::setBlockSize(int blockSize_in)
+{
+    blockSize = blockSize_in;
+    if(blockSize < 1) blockSize = 1;
+}
+
+int ElementProgram::getBlockSize(){ return blockSize;}
+
+template<class CoordRows, class Sweep>
+void ElementProgram::sweepOperations(Bunch* bunch, CoordRows arr, Sweep& sweep)
+{
+    for(int k = 0, nOps = (int) operations.size(); k < nOps; k++)
     {
-        deltaV = voltage * ( sin(harmonic_numb*Factor*arr[i][4] + phase_s));
-        arr[i][5] += coeff * deltaV;
+        Operation& op = operations[k];
+        std::vector<double>& d = op.d;
+        std::vector<int>& n = op.n;
+        const double* c = op.c.empty() ? NULL : op.c.data();
+        switch(op.type)
+        {
+            case OP_ROTATEXY: rotatexy_rows(bunch, arr, sweep, d[0], c); break;
+            case OP_DRIFT: drift_rows(bunch, arr, sweep, d[0]); break;
+            case OP_WRAPBUNCH: wrapbunch_rows(bunch, arr, sweep, d[0]); break;
+            case OP_KICK: kick_rows(bunch, arr, sweep, d[0], d[1], d[2], n[0]); break;
+            case OP_MULTP: multp_rows(bunch, arr, sweep, n[0], d[0], n[1], n[2]); break;
+            case OP_MULTPFRINGEIN: multpfringeIN_rows(bunch, arr, sweep, n[0], d[0], n[1], n[2]); break;
+            case OP_MULTPFRINGEOUT: multpfringeOUT_rows(bunch, arr, sweep, n[0], d[0], n[1], n[2]); break;
+            case OP_QUAD1: quad1_rows(bunch, arr, sweep, d[0], d[1], c); break;
+            case OP_QUAD2: quad2_rows(bunch, arr, sweep, d[0]); break;
+            case OP_QUADFRINGEIN: quadfringeIN_rows(bunch, arr, sweep, d[0], n[0]); break;
+            case OP_QUADFRINGEOUT: quadfringeOUT_rows(bunch, arr, sweep, d[0], n[0]); break;
+            case OP_WEDGEROTATE: wedgerotate_rows(bunch, arr, sweep, d[0], n[0], c); break;
+            case OP_WEDGEDRIFT: wedgedrift_rows(bunch, arr, sweep, d[0], n[0], c); break;
+            case OP_WEDGEBEND: wedgebend_rows(bunch, arr, sweep, d[0], n[0], d[1], n[1], c); break;
+            case OP_BEND1: bend1_rows(bunch, arr, sweep, d[0], d[1], c); break;
+            case OP_BEND2: bend2_rows(bunch, arr, sweep, d[0]); break;
+            case OP_BEND3: bend3_rows(bunch, arr, sweep, d[0]); break;
+            case OP_BEND4: bend4_rows(bunch, arr, sweep, d[0]); break;
+            case OP_BENDFRINGEIN: bendfringeIN_rows(bunch, arr, sweep, d[0]); break;
+            case OP_BENDFRINGEOUT: bendfringeOUT_rows(bunch, arr, sweep, d[0]); break;
+            case OP_SOLN: soln_rows(bunch, arr, sweep, d[0], d[1], n[0]); break;
+            case OP_WEDGEBENDCF:
+                wedgebendCF_rows(bunch, arr, sweep, d[0], n[0], d[1], n[1], op.poles, op.kls, op.skews, n[2], n[3], c);
+                break;
+            case OP_RINGRF: RingRF_rows(bunch, arr, sweep, d[0], n[0], d[1], d[2], n[1]); break;
+        }
+    }
+}
 
-        arr[i][1] *= xp_yp_coeff;
-        arr[i][3] *= xp_yp_coeff;
+template<class CoordRows>
+void ElementProgram::trackRows(Bunch* bunch, CoordRows arr)
+{
+    //the functions update the synchronous particle in the order of the
+    //sequence, and their particle loops are collected by the sweep
+    ProgramSweep sweep;
+    sweep.reserve((int) operations.size());
+    sweepOperations(bunch, arr, sweep);
+    sweep.run(bunch->getSize(), blockSize);
+}
+
+void ElementProgram::track(Bunch* bunch)
+{
+    dispatchCoordRows(bunch, [&](auto arr)
+    {
+        trackRows(bunch, arr);
+    });
+}
+
+template<class T>
+void ElementProgram::trackJet(Bunch* bunch, T* coords)
+{
+    //the same tracking functions are applied to the one particle with the
+    //Jet coordinates, and the synchronous particle is changed by them as
+    //by the usual tracking
+    JetRows<T> arr(coords);
+    JetSweep sweep;
+    sweepOperations(bunch, arr, sweep);
+}
+
+void ElementProgram::trackMatrix(Bunch* bunch, OrbitUtils::Matrix* mtrx, OrbitUtils::Matrix* dmtrx)
+{
+    int nRows = mtrx->rows();
+    if(nRows != mtrx->columns() || nRows < 6 || nRows > 7)
+    {
+        ORBIT_MPI_Finalize("ElementProgram::trackMatrix: Matrix is the wrong size.");
+    }
+    if(dmtrx != NULL && (dmtrx->rows() != nRows || dmtrx->columns() != nRows))
+    {
+        ORBIT_MPI_Finalize("ElementProgram::trackMatrix: Matrix of derivatives is the wrong size.");
+    }
+    double** arr = mtrx->getArray();
+    //the point of the 6x6 matrix is the origin
+    if(dmtrx == NULL)
+    {
+        Jet<double, 6> coords[6];
+        for(int i = 0; i < 6; i++)
+        {
+            coords[i].v = (nRows == 7) ? arr[i][6] : 0.;
+            for(int j = 0; j < 6; j++) coords[i].d[j] = arr[i][j];
+        }
+        trackJet(bunch, coords);
+        for(int i = 0; i < 6; i++)
+        {
+            for(int j = 0; j < 6; j++) arr[i][j] = coords[i].d[j];
+            if(nRows == 7) arr[i][6] = coords[i].v;
+        }
+    }
+    else
+    {
+        //the derivatives over dE of the initial point are the second parameter of the jet
+        double** darr = dmtrx->getArray();
+        Jet<Jet<double, 1>, 6> coords[6];
+        for(int i = 0; i < 6; i++)
+        {
+            coords[i].v.v = (nRows == 7) ? arr[i][6] : 0.;
+            coords[i].v.d[0] = arr[i][5];
+            for(int j = 0; j < 6; j++)
+            {
+                coords[i].d[j].v = arr[i][j];
+                coords[i].d[j].d[0] = darr[i][j];
+            }
+        }
+        trackJet(bunch, coords);
+        for(int i = 0; i < 6; i++)
+        {
+            for(int j = 0; j < 6; j++)
+            {
+                arr[i][j] = coords[i].d[j].v;
+                darr[i][j] = coords[i].d[j].d[0];
+            }
+            if(nRows == 7)
+            {
+                arr[i][6] = coords[i].v.v;
+                darr[i][6] = coords[i].v.d[0];
+            }
+        }
+        if(nRows == 7)
+        {
+            for(int j = 0; j < 7; j++) darr[6][j] = 0.;
+        }
+    }
+    if(nRows == 7)
+    {
+        for(int j = 0; j < 6; j++) arr[6][j] = 0.;
+        arr[6][6] = 1.0;
+    }
+}
+
+void ElementProgram::trackTaylorMap(Bunch* bunch, const std::vector<int>& prodI, const std::vector<int>& prodJ,
+                                    const std::vector<int>& prodK, std::vector<double>& coeffs)
+{
+    int nMonomials = (int) coeffs.size() / 6;
+    if(nMonomials < 7 || (int) coeffs.size() != 6 * nMonomials)
+    {
+        ORBIT_MPI_Finalize("ElementProgram::trackTaylorMap: the size of the coefficients array is wrong.");
+    }
+    if(prodI.size() != prodK.size() || prodJ.size() != prodK.size())
+    {
+        ORBIT_MPI_Finalize("ElementProgram::trackTaylorMap: the sizes of the monomials product table are wrong.");
+    }
+    for(int k = 0, n = (int) prodK.size(); k < n; k++)
+    {
+        if(prodI[k] < 0 || prodI[k] >= nMonomials || prodJ[k] < 0 || prodJ[k] >= nMonomials ||
+           prodK[k] < 0 || prodK[k] >= nMonomials)
+        {
+            ORBIT_MPI_Finalize("ElementProgram::trackTaylorMap: the monomials product table is wrong.");
+        }
+    }
+    TpsTable table;
+    table.nMonomials = nMonomials;
+    table.prodI = prodI;
+    table.prodJ = prodJ;
+    table.prodK = prodK;
+    const TpsTable* tablePrev = Tps::table();
+    Tps::table() = &table;
+    {
+        std::vector<Tps> coords(6);
+        for(int i = 0; i < 6; i++)
+        {
+            for(int k = 0; k < nMonomials; k++) coords[i].c[k] = coeffs[6 * k + i];
+        }
+        trackJet(bunch, coords.data());
+        for(int i = 0; i < 6; i++)
+        {
+            for(int k = 0; k < nMonomials; k++) coeffs[6 * k + i] = coords[i].c[k];
+        }
     }
+    Tps::table() = tablePrev;
 }
 
 }  //end of namespace teapot_base
@@ -24,12 +24,20 @@
 #define TEAPOT_BASE_H
 
 #include "Bunch.hh"
+#include "Matrix.hh"
+
+#include <vector>
 
 namespace teapot_base
 {
     void init_factorial();
     void delete_factorial();
 
+    /** Sets the number of OpenMP threads for the particle loops. It is 1 by default,
+        and it is always 1 if the module is built without OpenMP. */
+    void setNumberOfThreads(int n);
+    int getNumberOfThreads();
+
     void rotatexy(Bunch* bunch, double anglexy);
 
     void drifti(Bunch* bunch, int i, double length);
@@ -75,6 +83,110 @@ namespace teapot_base
                      int nsteps, int useCharge);
 
     void RingRF(Bunch* bunch, double ring_length, int harmonic_numb, double voltage, double phase_s, int useCharge);
+
+    /** The sequence of the tracking functions above with their parameters.
+        The methods with the names of these functions add them to the end of
+        the sequence. The track(bunch) method applies all functions to one
+        block of particles before the next block, so the bunch goes through
+        the memory once for the whole sequence. The synchronous particle
+        parameters are taken at the moment of tracking, and the results are
+        the same as for the separate calls of these functions. The cos, sin,
+        and transport matrix coefficients that do not depend on the energy
+        are calculated once when the function is added. */
+    class ElementProgram
+    {
+    public:
+        ElementProgram();
+        virtual ~ElementProgram();
+
+        void rotatexy(double anglexy);
+        void drift(double length);
+        void wrapbunch(double length);
+        void kick(double kx, double ky, double kE, int useCharge);
+        void multp(int pole, double kl, int skew, int useCharge);
+        void multpfringeIN(int pole, double kl, int skew, int useCharge);
+        void multpfringeOUT(int pole, double kl, int skew, int useCharge);
+        void quad1(double length, double kq, int useCharge);
+        void quad2(double length);
+        void quadfringeIN(double kq, int useCharge);
+        void quadfringeOUT(double kq, int useCharge);
+        void wedgerotate(double e, int frinout);
+        void wedgedrift(double e, int inout);
+        void wedgebend(double e, int inout, double rho, int nsteps);
+        void bend1(double length, double th);
+        void bend2(double length);
+        void bend3(double th);
+        void bend4(double th);
+        void bendfringeIN(double rho);
+        void bendfringeOUT(double rho);
+        void soln(double length, double B, int useCharge);
+        void wedgebendCF(double e, int inout, double rho, int vecnum,
+                         std::vector<int>& pole, std::vector<double>& kl, std::vector<int>& skew,
+                         int nsteps, int useCharge);
+        void RingRF(double ring_length, int harmonic_numb, double voltage, double phase_s, int useCharge);
+
+        /** Returns the number of functions in the sequence. */
+        int getNumberOfOperations();
+
+        /** Removes all functions from the sequence. */
+        void clear();
+
+        /** Sets the number of particles in the block. It is 512 by default. */
+        void setBlockSize(int blockSize);
+        int getBlockSize();
+
+        /** Tracks the bunch through all functions of the sequence. */
+        void track(Bunch* bunch);
+
+        /** Tracks the linear map given by the 6x6 or 7x7 matrix through all functions
+            of the sequence. The 7x7 matrix has the coordinates of the point in the last
+            column, and the matrix of the 6x6 part is the derivative of the functions at
+            this point calculated by the forward automatic differentiation. If dmtrx is
+            not NULL, it keeps the derivatives of the elements of mtrx over the dE
+            coordinate of the initial point, and they are tracked too. The synchronous
+            particle is changed as by the track(bunch) method, and the bunch particles
+            are not used. */
+        void trackMatrix(Bunch* bunch, OrbitUtils::Matrix* mtrx, OrbitUtils::Matrix* dmtrx = NULL);
+
+        /** Tracks the truncated power series map through all functions of the sequence.
+            The coefficients [monomial][6] of the map are replaced by the coefficients of
+            the functions composed with the map. The product of the monomials prodI[k] and
+            prodJ[k] is the monomial prodK[k], and the pairs with the degree above the
+            order of the map are not included. The synchronous particle is changed as by
+            the track(bunch) method, and the bunch particles are not used. */
+        void trackTaylorMap(Bunch* bunch, const std::vector<int>& prodI, const std::vector<int>& prodJ,
+                            const std::vector<int>& prodK, std::vector<double>& coeffs);
+
+    private:
+
+        struct Operation
+        {
+            int type;
+            std::vector<double> d;
+            std::vector<int> n;
+            std::vector<int> poles;
+            std::vector<double> kls;
+            std::vector<int> skews;
+            //the coefficients that depend only on the parameters (cos, sin, matrix elements)
+            std::vector<double> c;
+        };
+
+        void add(int type, const std::vector<double>& d, const std::vector<int>& n,
+                 const std::vector<double>& c = std::vector<double>());
+
+        //calls the tracking functions of the sequence with the sweep that
+        //collects (ProgramSweep) or runs at once (JetSweep) their particle loops
+        template<class CoordRows, class Sweep> void sweepOperations(Bunch* bunch, CoordRows arr, Sweep& sweep);
+
+        template<class CoordRows> void trackRows(Bunch* bunch, CoordRows arr);
+
+        template<class T> void trackJet(Bunch* bunch, T* coords);
+
+    private:
+
+        std::vector<Operation> operations;
+        int blockSize;
+    };
 }
 
 #endif  //TEAPOT_BASE_H
@@ -0,0 +1,704 @@
+#include "orbit_mpi.hh"
+#include "pyORBIT_Object.hh"
+
+#include "wrap_element_program.hh"
+#include "wrap_teapotbase.hh"
+#include "wrap_bunch.hh"
+#include "wrap_utils.hh"
+
+#include <vector>
+
+#include "teapotbase.hh"
+
+using namespace teapot_base;
+using namespace OrbitUtils;
+
+namespace wrap_teapotbase_element_program
+{
+    void error(const char* msg){ ORBIT_MPI_Finalize(msg); }
+
+    //reads the Python sequence of numbers into the vector
+    template<class T>
+    static void readSequence(PyObject* pySeq, std::vector<T>& vec, const char* msg)
+    {
+        if(!PySequence_Check(pySeq))
+        {
+            error(msg);
+        }
+        int size = PySequence_Size(pySeq);
+        vec.resize(size);
+        for(int i = 0; i < size; i++)
+        {
+            PyObject* pyVal = PySequence_GetItem(pySeq, i);
+            vec[i] = (T) PyFloat_AsDouble(pyVal);
+            Py_XDECREF(pyVal);
+        }
+        if(PyErr_Occurred() != NULL)
+        {
+            error(msg);
+        }
+    }
+
+#ifdef __cplusplus
+extern "C"
+{
+#endif
+
+    //---------------------------------------------------------
+    //Python ElementProgram class definition
+    //---------------------------------------------------------
+
+    //Constructor for python class wrapping ElementProgram instance
+    //It never will be called directly
+    static PyObject* ElementProgram_new(PyTypeObject *type,
+                                        PyObject *args, PyObject *kwds)
+    {
+        pyORBIT_Object* self;
+        self = (pyORBIT_Object *) type->tp_alloc(type, 0);
+        self->cpp_obj = NULL;
+        return (PyObject *) self;
+    }
+
+    //Initializator for python ElementProgram class (implementation of the __init__ )
+    static int ElementProgram_init(pyORBIT_Object *self,
+                                   PyObject *args, PyObject *kwds)
+    {
+        self->cpp_obj = new ElementProgram();
+        return 0;
+    }
+
+    //-----------------------------------------------------
+    //Destructor for python ElementProgram class (__del__ method).
+    //-----------------------------------------------------
+    static void ElementProgram_del(pyORBIT_Object* self)
+    {
+        delete ((ElementProgram*)self->cpp_obj);
+        self->ob_base.ob_type->tp_free((PyObject*)self);
+    }
+
+    //The methods below have the same parameters as the teapot_base functions,
+    //so the TEAPOT nodes can add their functions to the program
+
+    //Adds the rotation around the z axis, the bunch parameter is not used
+    static PyObject* ElementProgram_rotatexy(PyObject *self, PyObject *args)
+    {
+        ElementProgram* cpp_ElementProgram = (ElementProgram*) ((pyORBIT_Object*) self)->cpp_obj;
+        PyObject* pyBunch;
+        double anglexy;
+        if(!PyArg_ParseTuple(args, "Od:rotatexy", &pyBunch, &anglexy))
+        {
+            error("ElementProgram - rotatexy(bunch, anglexy) - cannot parse arguments!");
+        }
+        cpp_ElementProgram->rotatexy(anglexy);
+        Py_INCREF(Py_None);
+        return Py_None;
+    }
+
+    //Adds the drift, the bunch parameter is not used
+    static PyObject* ElementProgram_drift(PyObject *self, PyObject *args)
+    {
+        ElementProgram* cpp_ElementProgram = (ElementProgram*) ((pyORBIT_Object*) self)->cpp_obj;
+        PyObject* pyBunch;
+        double length;
+        if(!PyArg_ParseTuple(args, "Od:drift", &pyBunch, &length))
+        {
+            error("ElementProgram - drift(bunch, length) - cannot parse arguments!");
+        }
+        cpp_ElementProgram->drift(length);
+        Py_INCREF(Py_None);
+        return Py_None;
+    }
+
+    //Adds the longitudinal wrapping of the particles, the bunch parameter is not used
+    static PyObject* ElementProgram_wrapbunch(PyObject *self, PyObject *args)
+    {
+        ElementProgram* cpp_ElementProgram = (ElementProgram*) ((pyORBIT_Object*) self)->cpp_obj;
+        PyObject* pyBunch;
+        double length;
+        if(!PyArg_ParseTuple(args, "Od:wrapbunch", &pyBunch, &length))
+        {
+            error("ElementProgram - wrapbunch(bunch, length) - cannot parse arguments!");
+        }
+        cpp_ElementProgram->wrapbunch(length);
+        Py_INCREF(Py_None);
+        return Py_None;
+    }
+
+    //Adds the kick, the bunch parameter is not used
+    static PyObject* ElementProgram_kick(PyObject *self, PyObject *args)
+    {
+        ElementProgram* cpp_ElementProgram = (ElementProgram*) ((pyORBIT_Object*) self)->cpp_obj;
+        PyObject* pyBunch;
+        double kx, ky, kE;
+        int useCharge = 1;
+        if(!PyArg_ParseTuple(args, "Oddd|i:kick", &pyBunch, &kx, &ky, &kE, &useCharge))
+        {
+            error("ElementProgram - kick(bunch, kx, ky, kE, useCharge) - cannot parse arguments!");
+        }
+        cpp_ElementProgram->kick(kx, ky, kE, useCharge);
+        Py_INCREF(Py_None);
+        return Py_None;
+    }
+
+    //Adds the multipole kick, the bunch parameter is not used
+    static PyObject* ElementProgram_multp(PyObject *self, PyObject *args)
+    {
+        ElementProgram* cpp_ElementProgram = (ElementProgram*) ((pyORBIT_Object*) self)->cpp_obj;
+        PyObject* pyBunch;
+        int pole, skew, useCharge = 1;
+        double kl;
+        if(!PyArg_ParseTuple(args, "Oidi|i:multp", &pyBunch, &pole, &kl, &skew, &useCharge))
+        {
+            error("ElementProgram - multp(bunch, pole, kl, skew, useCharge) - cannot parse arguments!");
+        }
+        cpp_ElementProgram->multp(pole, kl, skew, useCharge);
+        Py_INCREF(Py_None);
+        return Py_None;
+    }
+
+    //Adds the multipole entrance fringe field, the bunch parameter is not used
+    static PyObject* ElementProgram_multpfringeIN(PyObject *self, PyObject *args)
+    {
+        ElementProgram* cpp_ElementProgram = (ElementProgram*) ((pyORBIT_Object*) self)->cpp_obj;
+        PyObject* pyBunch;
+        int pole, skew, useCharge = 1;
+        double kl;
+        if(!PyArg_ParseTuple(args, "Oidi|i:multpfringeIN", &pyBunch, &pole, &kl, &skew, &useCharge))
+        {
+            error("ElementProgram - multpfringeIN(bunch, pole, kl, skew, useCharge) - cannot parse arguments!");
+        }
+        cpp_ElementProgram->multpfringeIN(pole, kl, skew, useCharge);
+        Py_INCREF(Py_None);
+        return Py_None;
+    }
+
+    //Adds the multipole exit fringe field, the bunch parameter is not used
+    static PyObject* ElementProgram_multpfringeOUT(PyObject *self, PyObject *args)
+    {
+        ElementProgram* cpp_ElementProgram = (ElementProgram*) ((pyORBIT_Object*) self)->cpp_obj;
+        PyObject* pyBunch;
+        int pole, skew, useCharge = 1;
+        double kl;
+        if(!PyArg_ParseTuple(args, "Oidi|i:multpfringeOUT", &pyBunch, &pole, &kl, &skew, &useCharge))
+        {
+            error("ElementProgram - multpfringeOUT(bunch, pole, kl, skew, useCharge) - cannot parse arguments!");
+        }
+        cpp_ElementProgram->multpfringeOUT(pole, kl, skew, useCharge);
+        Py_INCREF(Py_None);
+        return Py_None;
+    }
+
+    //Adds the linear part of the quad, the bunch parameter is not used
+    static PyObject* ElementProgram_quad1(PyObject *self, PyObject *args)
+    {
+        ElementProgram* cpp_ElementProgram = (ElementProgram*) ((pyORBIT_Object*) self)->cpp_obj;
+        PyObject* pyBunch;
+        double length, kq;
+        int useCharge = 1;
+        if(!PyArg_ParseTuple(args, "Odd|i:quad1", &pyBunch, &length, &kq, &useCharge))
+        {
+            error("ElementProgram - quad1(bunch, length, kq, useCharge) - cannot parse arguments!");
+        }
+        cpp_ElementProgram->quad1(length, kq, useCharge);
+        Py_INCREF(Py_None);
+        return Py_None;
+    }
+
+    //Adds the non-linear part of the quad, the bunch parameter is not used
+    static PyObject* ElementProgram_quad2(PyObject *self, PyObject *args)
+    {
+        ElementProgram* cpp_ElementProgram = (ElementProgram*) ((pyORBIT_Object*) self)->cpp_obj;
+        PyObject* pyBunch;
+        double length;
+        if(!PyArg_ParseTuple(args, "Od:quad2", &pyBunch, &length))
+        {
+            error("ElementProgram - quad2(bunch, length) - cannot parse arguments!");
+        }
+        cpp_ElementProgram->quad2(length);
+        Py_INCREF(Py_None);
+        return Py_None;
+    }
+
+    //Adds the quad entrance fringe field, the bunch parameter is not used
+    static PyObject* ElementProgram_quadfringeIN(PyObject *self, PyObject *args)
+    {
+        ElementProgram* cpp_ElementProgram = (ElementProgram*) ((pyORBIT_Object*) self)->cpp_obj;
+        PyObject* pyBunch;
+        double kq;
+        int useCharge = 1;
+        if(!PyArg_ParseTuple(args, "Od|i:quadfringeIN", &pyBunch, &kq, &useCharge))
+        {
+            error("ElementProgram - quadfringeIN(bunch, kq, useCharge) - cannot parse arguments!");
+        }
+        cpp_ElementProgram->quadfringeIN(kq, useCharge);
+        Py_INCREF(Py_None);
+        return Py_None;
+    }
+
+    //Adds the quad exit fringe field, the bunch parameter is not used
+    static PyObject* ElementProgram_quadfringeOUT(PyObject *self, PyObject *args)
+    {
+        ElementProgram* cpp_ElementProgram = (ElementProgram*) ((pyORBIT_Object*) self)->cpp_obj;
+        PyObject* pyBunch;
+        double kq;
+        int useCharge = 1;
+        if(!PyArg_ParseTuple(args, "Od|i:quadfringeOUT", &pyBunch, &kq, &useCharge))
+        {
+            error("ElementProgram - quadfringeOUT(bunch, kq, useCharge) - cannot parse arguments!");
+        }
+        cpp_ElementProgram->quadfringeOUT(kq, useCharge);
+        Py_INCREF(Py_None);
+        return Py_None;
+    }
+
+    //Adds the wedge rotation, the bunch parameter is not used
+    static PyObject* ElementProgram_wedgerotate(PyObject *self, PyObject *args)
+    {
+        ElementProgram* cpp_ElementProgram = (ElementProgram*) ((pyORBIT_Object*) self)->cpp_obj;
+        PyObject* pyBunch;
+        double e;
+        int frinout;
+        if(!PyArg_ParseTuple(args, "Odi:wedgerotate", &pyBunch, &e, &frinout))
+        {
+            error("ElementProgram - wedgerotate(bunch, e, frinout) - cannot parse arguments!");
+        }
+        cpp_ElementProgram->wedgerotate(e, frinout);
+        Py_INCREF(Py_None);
+        return Py_None;
+    }
+
+    //Adds the wedge drift, the bunch parameter is not used
+    static PyObject* ElementProgram_wedgedrift(PyObject *self, PyObject *args)
+    {
+        ElementProgram* cpp_ElementProgram = (ElementProgram*) ((pyORBIT_Object*) self)->cpp_obj;
+        PyObject* pyBunch;
+        double e;
+        int inout;
+        if(!PyArg_ParseTuple(args, "Odi:wedgedrift", &pyBunch, &e, &inout))
+        {
+            error("ElementProgram - wedgedrift(bunch, e, inout) - cannot parse arguments!");
+        }
+        cpp_ElementProgram->wedgedrift(e, inout);
+        Py_INCREF(Py_None);
+        return Py_None;
+    }
+
+    //Adds the wedge bend, the bunch parameter is not used
+    static PyObject* ElementProgram_wedgebend(PyObject *self, PyObject *args)
+    {
+        ElementProgram* cpp_ElementProgram = (ElementProgram*) ((pyORBIT_Object*) self)->cpp_obj;
+        PyObject* pyBunch;
+        double e, rho;
+        int inout, nsteps;
+        if(!PyArg_ParseTuple(args, "Odidi:wedgebend", &pyBunch, &e, &inout, &rho, &nsteps))
+        {
+            error("ElementProgram - wedgebend(bunch, e, inout, rho, nsteps) - cannot parse arguments!");
+        }
+        cpp_ElementProgram->wedgebend(e, inout, rho, nsteps);
+        Py_INCREF(Py_None);
+        return Py_None;
+    }
+
+    //Adds the linear part of the bend, the bunch parameter is not used
+    static PyObject* ElementProgram_bend1(PyObject *self, PyObject *args)
+    {
+        ElementProgram* cpp_ElementProgram = (ElementProgram*) ((pyORBIT_Object*) self)->cpp_obj;
+        PyObject* pyBunch;
+        double length, th;
+        if(!PyArg_ParseTuple(args, "Odd:bend1", &pyBunch, &length, &th))
+        {
+            error("ElementProgram - bend1(bunch, length, th) - cannot parse arguments!");
+        }
+        cpp_ElementProgram->bend1(length, th);
+        Py_INCREF(Py_None);
+        return Py_None;
+    }
+
+    //Adds the kinetic part of the bend, the bunch parameter is not used
+    static PyObject* ElementProgram_bend2(PyObject *self, PyObject *args)
+    {
+        ElementProgram* cpp_ElementProgram = (ElementProgram*) ((pyORBIT_Object*) self)->cpp_obj;
+        PyObject* pyBunch;
+        double length;
+        if(!PyArg_ParseTuple(args, "Od:bend2", &pyBunch, &length))
+        {
+            error("ElementProgram - bend2(bunch, length) - cannot parse arguments!");
+        }
+        cpp_ElementProgram->bend2(length);
+        Py_INCREF(Py_None);
+        return Py_None;
+    }
+
+    //Adds the non-linear curvature part of the bend, the bunch parameter is not used
+    static PyObject* ElementProgram_bend3(PyObject *self, PyObject *args)
+    {
+        ElementProgram* cpp_ElementProgram = (ElementProgram*) ((pyORBIT_Object*) self)->cpp_obj;
+        PyObject* pyBunch;
+        double th;
+        if(!PyArg_ParseTuple(args, "Od:bend3", &pyBunch, &th))
+        {
+            error("ElementProgram - bend3(bunch, th) - cannot parse arguments!");
+        }
+        cpp_ElementProgram->bend3(th);
+        Py_INCREF(Py_None);
+        return Py_None;
+    }
+
+    //Adds the energy part of the bend, the bunch parameter is not used
+    static PyObject* ElementProgram_bend4(PyObject *self, PyObject *args)
+    {
+        ElementProgram* cpp_ElementProgram = (ElementProgram*) ((pyORBIT_Object*) self)->cpp_obj;
+        PyObject* pyBunch;
+        double th;
+        if(!PyArg_ParseTuple(args, "Od:bend4", &pyBunch, &th))
+        {
+            error("ElementProgram - bend4(bunch, th) - cannot parse arguments!");
+        }
+        cpp_ElementProgram->bend4(th);
+        Py_INCREF(Py_None);
+        return Py_None;
+    }
+
+    //Adds the bend entrance fringe field, the bunch parameter is not used
+    static PyObject* ElementProgram_bendfringeIN(PyObject *self, PyObject *args)
+    {
+        ElementProgram* cpp_ElementProgram = (ElementProgram*) ((pyORBIT_Object*) self)->cpp_obj;
+        PyObject* pyBunch;
+        double rho;
+        if(!PyArg_ParseTuple(args, "Od:bendfringeIN", &pyBunch, &rho))
+        {
+            error("ElementProgram - bendfringeIN(bunch, rho) - cannot parse arguments!");
+        }
+        cpp_ElementProgram->bendfringeIN(rho);
+        Py_INCREF(Py_None);
+        return Py_None;
+    }
+
+    //Adds the bend exit fringe field, the bunch parameter is not used
+    static PyObject* ElementProgram_bendfringeOUT(PyObject *self, PyObject *args)
+    {
+        ElementProgram* cpp_ElementProgram = (ElementProgram*) ((pyORBIT_Object*) self)->cpp_obj;
+        PyObject* pyBunch;
+        double rho;
+        if(!PyArg_ParseTuple(args, "Od:bendfringeOUT", &pyBunch, &rho))
+        {
+            error("ElementProgram - bendfringeOUT(bunch, rho) - cannot parse arguments!");
+        }
+        cpp_ElementProgram->bendfringeOUT(rho);
+        Py_INCREF(Py_None);
+        return Py_None;
+    }
+
+    //Adds the solenoid, the bunch parameter is not used
+    static PyObject* ElementProgram_soln(PyObject *self, PyObject *args)
+    {
+        ElementProgram* cpp_ElementProgram = (ElementProgram*) ((pyORBIT_Object*) self)->cpp_obj;
+        PyObject* pyBunch;
+        double length, B;
+        int useCharge = 1;
+        if(!PyArg_ParseTuple(args, "Odd|i:soln", &pyBunch, &length, &B, &useCharge))
+        {
+            error("ElementProgram - soln(bunch, length, B, useCharge) - cannot parse arguments!");
+        }
+        cpp_ElementProgram->soln(length, B, useCharge);
+        Py_INCREF(Py_None);
+        return Py_None;
+    }
+
+    //Adds the ring RF cavity, the bunch parameter is not used
+    static PyObject* ElementProgram_RingRF(PyObject *self, PyObject *args)
+    {
+        ElementProgram* cpp_ElementProgram = (ElementProgram*) ((pyORBIT_Object*) self)->cpp_obj;
+        PyObject* pyBunch;
+        double ring_length, voltage, phase_s;
+        int harmonic_numb, useCharge = 1;
+        if(!PyArg_ParseTuple(args, "Odidd|i:RingRF", &pyBunch, &ring_length, &harmonic_numb, &voltage, &phase_s, &useCharge))
+        {
+            error("ElementProgram - RingRF(bunch, ring_length, harmonic_numb, voltage, phase_s, useCharge) - cannot parse arguments!");
+        }
+        cpp_ElementProgram->RingRF(ring_length, harmonic_numb, voltage, phase_s, useCharge);
+        Py_INCREF(Py_None);
+        return Py_None;
+    }
+
+    //Adds the wedge of the combined function bend, the bunch parameter is not used
+    static PyObject* ElementProgram_wedgebendCF(PyObject *self, PyObject *args)
+    {
+        ElementProgram* cpp_ElementProgram = (ElementProgram*) ((pyORBIT_Object*) self)->cpp_obj;
+        PyObject* pyBunch;
+        double e, rho;
+        int inout, vecnum, nsteps;
+        std::vector<int> poleV;
+        std::vector<double> klV;
+        std::vector<int> skewV;
+        PyObject* polePySeq;
+        PyObject* klPySeq;
+        PyObject* skewPySeq;
+        int useCharge = 1;
+        if(!PyArg_ParseTuple(args, "OdidiOOOi|i:wedgebendCF",
+                             &pyBunch, &e, &inout, &rho, &vecnum,
+                             &polePySeq, &klPySeq, &skewPySeq, &nsteps, &useCharge))
+        {
+            error("ElementProgram - wedgebendCF - cannot parse arguments!");
+        }
+        if(!PySequence_Check(polePySeq) ||
+           !PySequence_Check(klPySeq) ||
+           !PySequence_Check(skewPySeq))
+        {
+            error("ElementProgram - wedgebendCF - sequences with poles, kls, or skews are wrong!");
+        }
+        if((PySequence_Size(polePySeq) != vecnum) ||
+           (PySequence_Size(klPySeq)   != vecnum) ||
+           (PySequence_Size(skewPySeq) != vecnum))
+        {
+            error("ElementProgram - wedgebendCF - size of sequences with poles, kls or skews are wrong!");
+        }
+        for(int i = 0; i < vecnum; i++)
+        {
+            PyObject* polePy = PySequence_GetItem(polePySeq,i);
+            PyObject* klPy = PySequence_GetItem(klPySeq,i);
+            PyObject* skewPy = PySequence_GetItem(skewPySeq,i);
+            PyObject* tuplePy = Py_BuildValue("(OOO)",polePy,klPy,skewPy);
+            double kl;
+            int pole, skew;
+            if(!PyArg_ParseTuple(tuplePy, "idi", &pole, &kl, &skew))
+            {
+                error("ElementProgram - wedgebendCF - values in poles,kls or skews are wrong!");
+            }
+            poleV.push_back(pole);
+            klV.push_back(kl);
+            skewV.push_back(skew);
+            Py_DECREF(tuplePy);
+            Py_DECREF(polePy);
+            Py_DECREF(klPy);
+            Py_DECREF(skewPy);
+        }
+        cpp_ElementProgram->wedgebendCF(e, inout, rho, vecnum, poleV, klV, skewV, nsteps, useCharge);
+        Py_INCREF(Py_None);
+        return Py_None;
+    }
+
+    //Returns the number of functions in the program
+    static PyObject* ElementProgram_getNumberOfOperations(PyObject *self, PyObject *args)
+    {
+        ElementProgram* cpp_ElementProgram = (ElementProgram*) ((pyORBIT_Object*) self)->cpp_obj;
+        return Py_BuildValue("i", cpp_ElementProgram->getNumberOfOperations());
+    }
+
+    //Removes all functions from the program
+    static PyObject* ElementProgram_clear(PyObject *self, PyObject *args)
+    {
+        ElementProgram* cpp_ElementProgram = (ElementProgram*) ((pyORBIT_Object*) self)->cpp_obj;
+        cpp_ElementProgram->clear();
+        Py_INCREF(Py_None);
+        return Py_None;
+    }
+
+    //Sets or returns the number of particles in the block
+    static PyObject* ElementProgram_blockSize(PyObject *self, PyObject *args)
+    {
+        ElementProgram* cpp_ElementProgram = (ElementProgram*) ((pyORBIT_Object*) self)->cpp_obj;
+        int nArgs = PyTuple_Size(args);
+        if(nArgs == 1)
+        {
+            int blockSize;
+            if(!PyArg_ParseTuple(args, "i:blockSize", &blockSize))
+            {
+                error("ElementProgram - blockSize(n) - cannot parse arguments!");
+            }
+            cpp_ElementProgram->setBlockSize(blockSize);
+        }
+        return Py_BuildValue("i", cpp_ElementProgram->getBlockSize());
+    }
+
+    //Tracks the bunch through all functions of the program
+    static PyObject* ElementProgram_track(PyObject *self, PyObject *args)
+    {
+        ElementProgram* cpp_ElementProgram = (ElementProgram*) ((pyORBIT_Object*) self)->cpp_obj;
+        PyObject* pyBunch;
+        if(!PyArg_ParseTuple(args, "O:track", &pyBunch))
+        {
+            error("ElementProgram - track(bunch) - cannot parse arguments!");
+        }
+        PyObject* pyBunchType = wrap_orbit_bunch::getBunchType("Bunch");
+        if(!PyObject_IsInstance(pyBunch, pyBunchType))
+        {
+            error("ElementProgram - track(bunch) - the parameter should be a Bunch!");
+        }
+        cpp_ElementProgram->track((Bunch*) ((pyORBIT_Object*) pyBunch)->cpp_obj);
+        Py_INCREF(Py_None);
+        return Py_None;
+    }
+
+    //Tracks the transport matrix and its derivatives over dE through all functions of the program
+    static PyObject* ElementProgram_trackMatrix(PyObject *self, PyObject *args)
+    {
+        ElementProgram* cpp_ElementProgram = (ElementProgram*) ((pyORBIT_Object*) self)->cpp_obj;
+        PyObject* pyBunch;
+        PyObject* pyMatrix;
+        PyObject* pyDerivMatrix = NULL;
+        if(!PyArg_ParseTuple(args, "OO|O:trackMatrix", &pyBunch, &pyMatrix, &pyDerivMatrix))
+        {
+            error("ElementProgram - trackMatrix(bunch, matrix[, derivativeMatrix]) - cannot parse arguments!");
+        }
+        PyObject* pyBunchType = wrap_orbit_bunch::getBunchType("Bunch");
+        PyObject* pyORBIT_Matrix_Type = wrap_orbit_utils::getOrbitUtilsType("Matrix");
+        if(!PyObject_IsInstance(pyBunch, pyBunchType) || !PyObject_IsInstance(pyMatrix, pyORBIT_Matrix_Type))
+        {
+            error("ElementProgram - trackMatrix(bunch, matrix[, derivativeMatrix]) - the parameters should be a Bunch and a Matrix!");
+        }
+        Matrix* dmtrx = NULL;
+        if(pyDerivMatrix != NULL && pyDerivMatrix != Py_None)
+        {
+            if(!PyObject_IsInstance(pyDerivMatrix, pyORBIT_Matrix_Type))
+            {
+                error("ElementProgram - trackMatrix(bunch, matrix[, derivativeMatrix]) - the derivatives should be a Matrix!");
+            }
+            dmtrx = (Matrix*) ((pyORBIT_Object*) pyDerivMatrix)->cpp_obj;
+        }
+        cpp_ElementProgram->trackMatrix((Bunch*) ((pyORBIT_Object*) pyBunch)->cpp_obj,
+                                        (Matrix*) ((pyORBIT_Object*) pyMatrix)->cpp_obj, dmtrx);
+        Py_INCREF(Py_None);
+        return Py_None;
+    }
+
+    //Tracks the Taylor map [monomial][6] given as a flat sequence through all functions of the program
+    static PyObject* ElementProgram_trackTaylorMap(PyObject *self, PyObject *args)
+    {
+        ElementProgram* cpp_ElementProgram = (ElementProgram*) ((pyORBIT_Object*) self)->cpp_obj;
+        PyObject* pyBunch;
+        PyObject* pyProdI;
+        PyObject* pyProdJ;
+        PyObject* pyProdK;
+        PyObject* pyCoeffs;
+        const char* msg = "ElementProgram - trackTaylorMap(bunch, prodI, prodJ, prodK, coeffs) - cannot parse arguments!";
+        if(!PyArg_ParseTuple(args, "OOOOO:trackTaylorMap", &pyBunch, &pyProdI, &pyProdJ, &pyProdK, &pyCoeffs))
+        {
+            error(msg);
+        }
+        PyObject* pyBunchType = wrap_orbit_bunch::getBunchType("Bunch");
+        if(!PyObject_IsInstance(pyBunch, pyBunchType))
+        {
+            error("ElementProgram - trackTaylorMap(bunch, prodI, prodJ, prodK, coeffs) - the first parameter should be a Bunch!");
+        }
+        std::vector<int> prodI, prodJ, prodK;
+        std::vector<double> coeffs;
+        readSequence(pyProdI, prodI, msg);
+        readSequence(pyProdJ, prodJ, msg);
+        readSequence(pyProdK, prodK, msg);
+        readSequence(pyCoeffs, coeffs, msg);
+        cpp_ElementProgram->trackTaylorMap((Bunch*) ((pyORBIT_Object*) pyBunch)->cpp_obj, prodI, prodJ, prodK, coeffs);
+        PyObject* pyRes = PyTuple_New(coeffs.size());
+        for(int i = 0; i < (int) coeffs.size(); i++)
+        {
+            PyTuple_SET_ITEM(pyRes, i, PyFloat_FromDouble(coeffs[i]));
+        }
+        return pyRes;
+    }
+
+    // defenition of the methods of the python ElementProgram wrapper class
+    // they will be vailable from python level
+    static PyMethodDef ElementProgramClassMethods[] =
+    {
+        { "rotatexy",          ElementProgram_rotatexy,          METH_VARARGS, "Adds the rotation around the z axis"},
+        { "drift",             ElementProgram_drift,             METH_VARARGS, "Adds the drift"},
+        { "wrapbunch",         ElementProgram_wrapbunch,         METH_VARARGS, "Adds the longitudinal wrapping of the particles"},
+        { "kick",              ElementProgram_kick,              METH_VARARGS, "Adds the kick"},
+        { "multp",             ElementProgram_multp,             METH_VARARGS, "Adds the multipole kick"},
+        { "multpfringeIN",     ElementProgram_multpfringeIN,     METH_VARARGS, "Adds the multipole entrance fringe field"},
+        { "multpfringeOUT",    ElementProgram_multpfringeOUT,    METH_VARARGS, "Adds the multipole exit fringe field"},
+        { "quad1",             ElementProgram_quad1,             METH_VARARGS, "Adds the linear part of the quad"},
+        { "quad2",             ElementProgram_quad2,             METH_VARARGS, "Adds the non-linear part of the quad"},
+        { "quadfringeIN",      ElementProgram_quadfringeIN,      METH_VARARGS, "Adds the quad entrance fringe field"},
+        { "quadfringeOUT",     ElementProgram_quadfringeOUT,     METH_VARARGS, "Adds the quad exit fringe field"},
+        { "wedgerotate",       ElementProgram_wedgerotate,       METH_VARARGS, "Adds the wedge rotation"},
+        { "wedgedrift",        ElementProgram_wedgedrift,        METH_VARARGS, "Adds the wedge drift"},
+        { "wedgebend",         ElementProgram_wedgebend,         METH_VARARGS, "Adds the wedge bend"},
+        { "bend1",             ElementProgram_bend1,             METH_VARARGS, "Adds the linear part of the bend"},
+        { "bend2",             ElementProgram_bend2,             METH_VARARGS, "Adds the kinetic part of the bend"},
+        { "bend3",             ElementProgram_bend3,             METH_VARARGS, "Adds the non-linear curvature part of the bend"},
+        { "bend4",             ElementProgram_bend4,             METH_VARARGS, "Adds the energy part of the bend"},
+        { "bendfringeIN",      ElementProgram_bendfringeIN,      METH_VARARGS, "Adds the bend entrance fringe field"},
+        { "bendfringeOUT",     ElementProgram_bendfringeOUT,     METH_VARARGS, "Adds the bend exit fringe field"},
+        { "soln",              ElementProgram_soln,              METH_VARARGS, "Adds the solenoid"},
+        { "RingRF",            ElementProgram_RingRF,            METH_VARARGS, "Adds the ring RF cavity"},
+        { "wedgebendCF",        ElementProgram_wedgebendCF,        METH_VARARGS, "Adds the wedge of the combined function bend"},
+        { "getNumberOfOperations", ElementProgram_getNumberOfOperations, METH_NOARGS, "Returns the number of functions in the program"},
+        { "clear",              ElementProgram_clear,              METH_NOARGS,  "Removes all functions from the program"},
+        { "blockSize",          ElementProgram_blockSize,          METH_VARARGS, "Sets or returns the number of particles in the block"},
+        { "track",              ElementProgram_track,              METH_VARARGS, "Tracks the bunch through all functions of the program"},
+        { "trackMatrix",        ElementProgram_trackMatrix,        METH_VARARGS, "Tracks the transport matrix and its derivatives over dE through all functions of the program"},
+        { "trackTaylorMap",     ElementProgram_trackTaylorMap,     METH_VARARGS, "Tracks the Taylor map through all functions of the program and returns its coefficients"},
+        {NULL}
+    };
+
+    // Definition of the memebers of the python ElementProgram wrapper class
+    // They will be vailable from python level
+    static PyMemberDef ElementProgramClassMembers [] =
+    {
+        {NULL}
+    };
+
+    //New python ElementProgram wrapper type definition
+    static PyTypeObject pyORBIT_ElementProgram_Type =
+    {
+        PyVarObject_HEAD_INIT(NULL, 0)
+        "ElementProgram", /*tp_name*/
+        sizeof(pyORBIT_Object), /*tp_basicsize*/
+        0, /*tp_itemsize*/
+        (destructor) ElementProgram_del , /*tp_dealloc*/
+        0, /*tp_print*/
+        0, /*tp_getattr*/
+        0, /*tp_setattr*/
+        0, /*tp_compare*/
+        0, /*tp_repr*/
+        0, /*tp_as_number*/
+        0, /*tp_as_sequence*/
+        0, /*tp_as_mapping*/
+        0, /*tp_hash */
+        0, /*tp_call*/
+        0, /*tp_str*/
+        0, /*tp_getattro*/
+        0, /*tp_setattro*/
+        0, /*tp_as_buffer*/
+        Py_TPFLAGS_DEFAULT | Py_TPFLAGS_BASETYPE, /*tp_flags*/
+        "The ElementProgram python wrapper", /* tp_doc */
+        0, /* tp_traverse */
+        0, /* tp_clear */
+        0, /* tp_richcompare */
+        0, /* tp_weaklistoffset */
+        0, /* tp_iter */
+        0, /* tp_iternext */
+        ElementProgramClassMethods, /* tp_methods */
+        ElementProgramClassMembers, /* tp_members */
+        0, /* tp_getset */
+        0, /* tp_base */
+        0, /* tp_dict */
+        0, /* tp_descr_get */
+        0, /* tp_descr_set */
+        0, /* tp_dictoffset */
+        (initproc) ElementProgram_init, /* tp_init */
+        0, /* tp_alloc */
+        ElementProgram_new, /* tp_new */
+    };
+
+    //--------------------------------------------------
+    //Initialization function of the pyElementProgram class
+    //It will be called from teapot_base wrapper initialization
+    //--------------------------------------------------
+    void initElementProgram(PyObject* module)
+    {
+        if (PyType_Ready(&pyORBIT_ElementProgram_Type) < 0) return;
+        Py_INCREF(&pyORBIT_ElementProgram_Type);
+        PyModule_AddObject(module, "ElementProgram",
+                           (PyObject *)&pyORBIT_ElementProgram_Type);
+    }
+
+    PyTypeObject* getElementProgramType(){ return &pyORBIT_ElementProgram_Type;}
+
+#ifdef __cplusplus
+}
+#endif
+
+//end of namespace wrap_teapotbase_element_program
+}
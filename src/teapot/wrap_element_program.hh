@@ -0,0 +1,23 @@
+#ifndef WRAP_ELEMENT_PROGRAM_H
+#define WRAP_ELEMENT_PROGRAM_H
+
+#include "Python.h"
+
+#ifdef __cplusplus
+extern "C"
+{
+#endif
+
+namespace wrap_teapotbase_element_program
+{
+    void initElementProgram(PyObject* module);
+
+    /** Returns the ElementProgram python type. */
+    PyTypeObject* getElementProgramType();
+}
+
+#ifdef __cplusplus
+}
+#endif
+
+#endif
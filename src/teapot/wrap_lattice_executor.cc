@@ -0,0 +1,227 @@
+#include "orbit_mpi.hh"
+#include "pyORBIT_Object.hh"
+
+#include "wrap_lattice_executor.hh"
+#include "wrap_element_program.hh"
+#include "wrap_teapotbase.hh"
+#include "wrap_bunch.hh"
+
+#include "LatticeExecutor.hh"
+
+using namespace teapot_base;
+
+namespace wrap_teapotbase_lattice_executor
+{
+    void error(const char* msg){ ORBIT_MPI_Finalize(msg); }
+
+#ifdef __cplusplus
+extern "C"
+{
+#endif
+
+    //---------------------------------------------------------
+    //Python LatticeExecutor class definition
+    //---------------------------------------------------------
+
+    //Constructor for python class wrapping LatticeExecutor instance
+    //It never will be called directly
+    static PyObject* LatticeExecutor_new(PyTypeObject *type,
+                                         PyObject *args, PyObject *kwds)
+    {
+        pyORBIT_Object* self;
+        self = (pyORBIT_Object *) type->tp_alloc(type, 0);
+        self->cpp_obj = NULL;
+        return (PyObject *) self;
+    }
+
+    //Initializator for python LatticeExecutor class (implementation of the __init__ )
+    //The Python subclass implements the trackStep(bunch,index) and trackTurnEnd(bunch,turn) methods
+    static int LatticeExecutor_init(pyORBIT_Object *self,
+                                    PyObject *args, PyObject *kwds)
+    {
+        self->cpp_obj = new LatticeExecutor((PyObject*) self);
+        return 0;
+    }
+
+    //-----------------------------------------------------
+    //Destructor for python LatticeExecutor class (__del__ method).
+    //-----------------------------------------------------
+    static void LatticeExecutor_del(pyORBIT_Object* self)
+    {
+        delete ((LatticeExecutor*)self->cpp_obj);
+        self->ob_base.ob_type->tp_free((PyObject*)self);
+    }
+
+    //Adds the element program step. The Python level should keep the reference to the program.
+    static PyObject* LatticeExecutor_addElementProgram(PyObject *self, PyObject *args)
+    {
+        LatticeExecutor* cpp_LatticeExecutor = (LatticeExecutor*) ((pyORBIT_Object*) self)->cpp_obj;
+        PyObject* pyProgram;
+        if(!PyArg_ParseTuple(args, "O:addElementProgram", &pyProgram))
+        {
+            error("LatticeExecutor - addElementProgram(program) - cannot parse arguments!");
+        }
+        if(!PyObject_TypeCheck(pyProgram, wrap_teapotbase_element_program::getElementProgramType()))
+        {
+            error("LatticeExecutor - addElementProgram(program) - the parameter should be an ElementProgram!");
+        }
+        cpp_LatticeExecutor->addElementProgram((ElementProgram*) ((pyORBIT_Object*) pyProgram)->cpp_obj);
+        Py_INCREF(Py_None);
+        return Py_None;
+    }
+
+    //Adds the step that increases the TurnNumber bunch attribute
+    static PyObject* LatticeExecutor_addTurnCounter(PyObject *self, PyObject *args)
+    {
+        LatticeExecutor* cpp_LatticeExecutor = (LatticeExecutor*) ((pyORBIT_Object*) self)->cpp_obj;
+        cpp_LatticeExecutor->addTurnCounter();
+        Py_INCREF(Py_None);
+        return Py_None;
+    }
+
+    //Adds the Python step and returns its index for the trackStep method
+    static PyObject* LatticeExecutor_addPythonStep(PyObject *self, PyObject *args)
+    {
+        LatticeExecutor* cpp_LatticeExecutor = (LatticeExecutor*) ((pyORBIT_Object*) self)->cpp_obj;
+        return Py_BuildValue("i", cpp_LatticeExecutor->addPythonStep());
+    }
+
+    //Returns the number of steps in the schedule
+    static PyObject* LatticeExecutor_getNumberOfSteps(PyObject *self, PyObject *args)
+    {
+        LatticeExecutor* cpp_LatticeExecutor = (LatticeExecutor*) ((pyORBIT_Object*) self)->cpp_obj;
+        return Py_BuildValue("i", cpp_LatticeExecutor->getNumberOfSteps());
+    }
+
+    //Removes all steps from the schedule
+    static PyObject* LatticeExecutor_clear(PyObject *self, PyObject *args)
+    {
+        LatticeExecutor* cpp_LatticeExecutor = (LatticeExecutor*) ((pyORBIT_Object*) self)->cpp_obj;
+        cpp_LatticeExecutor->clear();
+        Py_INCREF(Py_None);
+        return Py_None;
+    }
+
+    //Sets or returns the flag of the trackTurnEnd method call after each turn
+    static PyObject* LatticeExecutor_turnEndCall(PyObject *self, PyObject *args)
+    {
+        LatticeExecutor* cpp_LatticeExecutor = (LatticeExecutor*) ((pyORBIT_Object*) self)->cpp_obj;
+        int nVars = PyTuple_Size(args);
+        if(nVars == 1)
+        {
+            int turnEndCall;
+            if(!PyArg_ParseTuple(args, "i:turnEndCall", &turnEndCall))
+            {
+                error("LatticeExecutor - turnEndCall([0 or 1]) - cannot parse arguments!");
+            }
+            cpp_LatticeExecutor->setTurnEndCall(turnEndCall);
+        }
+        return Py_BuildValue("i", cpp_LatticeExecutor->getTurnEndCall());
+    }
+
+    //Tracks the bunch through the schedule for nTurns turns
+    static PyObject* LatticeExecutor_track(PyObject *self, PyObject *args)
+    {
+        LatticeExecutor* cpp_LatticeExecutor = (LatticeExecutor*) ((pyORBIT_Object*) self)->cpp_obj;
+        PyObject* pyBunch;
+        int nTurns = 1;
+        if(!PyArg_ParseTuple(args, "O|i:track", &pyBunch, &nTurns))
+        {
+            error("LatticeExecutor - track(bunch[, nTurns]) - cannot parse arguments!");
+        }
+        PyObject* pyBunchType = wrap_orbit_bunch::getBunchType("Bunch");
+        if(!PyObject_IsInstance(pyBunch, pyBunchType))
+        {
+            error("LatticeExecutor - track(bunch[, nTurns]) - the parameter should be a Bunch!");
+        }
+        //the exception of the Python step goes to the caller
+        if(cpp_LatticeExecutor->track((Bunch*) ((pyORBIT_Object*) pyBunch)->cpp_obj, nTurns) == 0)
+        {
+            return NULL;
+        }
+        Py_INCREF(Py_None);
+        return Py_None;
+    }
+
+    // defenition of the methods of the python LatticeExecutor wrapper class
+    // they will be vailable from python level
+    static PyMethodDef LatticeExecutorClassMethods[] =
+    {
+        { "addElementProgram", LatticeExecutor_addElementProgram, METH_VARARGS, "Adds the element program step"},
+        { "addTurnCounter",    LatticeExecutor_addTurnCounter,    METH_NOARGS,  "Adds the step that increases the TurnNumber bunch attribute"},
+        { "addPythonStep",     LatticeExecutor_addPythonStep,     METH_NOARGS,  "Adds the Python step and returns its index"},
+        { "getNumberOfSteps",  LatticeExecutor_getNumberOfSteps,  METH_NOARGS,  "Returns the number of steps in the schedule"},
+        { "clear",             LatticeExecutor_clear,             METH_NOARGS,  "Removes all steps from the schedule"},
+        { "turnEndCall",       LatticeExecutor_turnEndCall,       METH_VARARGS, "Sets or returns the flag of the trackTurnEnd method call"},
+        { "track",             LatticeExecutor_track,             METH_VARARGS, "Tracks the bunch through the schedule for nTurns turns"},
+        {NULL}
+    };
+
+    // Definition of the memebers of the python LatticeExecutor wrapper class
+    // They will be vailable from python level
+    static PyMemberDef LatticeExecutorClassMembers [] =
+    {
+        {NULL}
+    };
+
+    //New python LatticeExecutor wrapper type definition
+    static PyTypeObject pyORBIT_LatticeExecutor_Type =
+    {
+        PyVarObject_HEAD_INIT(NULL, 0)
+        "LatticeExecutor", /*tp_name*/
+        sizeof(pyORBIT_Object), /*tp_basicsize*/
+        0, /*tp_itemsize*/
+        (destructor) LatticeExecutor_del , /*tp_dealloc*/
+        0, /*tp_print*/
+        0, /*tp_getattr*/
+        0, /*tp_setattr*/
+        0, /*tp_compare*/
+        0, /*tp_repr*/
+        0, /*tp_as_number*/
+        0, /*tp_as_sequence*/
+        0, /*tp_as_mapping*/
+        0, /*tp_hash */
+        0, /*tp_call*/
+        0, /*tp_str*/
+        0, /*tp_getattro*/
+        0, /*tp_setattro*/
+        0, /*tp_as_buffer*/
+        Py_TPFLAGS_DEFAULT | Py_TPFLAGS_BASETYPE, /*tp_flags*/
+        "The LatticeExecutor python wrapper", /* tp_doc */
+        0, /* tp_traverse */
+        0, /* tp_clear */
+        0, /* tp_richcompare */
+        0, /* tp_weaklistoffset */
+        0, /* tp_iter */
+        0, /* tp_iternext */
+        LatticeExecutorClassMethods, /* tp_methods */
+        LatticeExecutorClassMembers, /* tp_members */
+        0, /* tp_getset */
+        0, /* tp_base */
+        0, /* tp_dict */
+        0, /* tp_descr_get */
+        0, /* tp_descr_set */
+        0, /* tp_dictoffset */
+        (initproc) LatticeExecutor_init, /* tp_init */
+        0, /* tp_alloc */
+        LatticeExecutor_new, /* tp_new */
+    };
+
+    //--------------------------------------------------
+    //Initialization function of the pyLatticeExecutor class
+    //It will be called from teapot_base wrapper initialization
+    //--------------------------------------------------
+    void initLatticeExecutor(PyObject* module)
+    {
+        if (PyType_Ready(&pyORBIT_LatticeExecutor_Type) < 0) return;
+        Py_INCREF(&pyORBIT_LatticeExecutor_Type);
+        PyModule_AddObject(module, "LatticeExecutor",
+                           (PyObject *)&pyORBIT_LatticeExecutor_Type);
+    }
+
+#ifdef __cplusplus
+}
+#endif
+
+//end of namespace wrap_teapotbase_lattice_executor
+}
@@ -0,0 +1,20 @@
+#ifndef WRAP_LATTICE_EXECUTOR_H
+#define WRAP_LATTICE_EXECUTOR_H
+
+#include "Python.h"
+
+#ifdef __cplusplus
+extern "C"
+{
+#endif
+
+namespace wrap_teapotbase_lattice_executor
+{
+    void initLatticeExecutor(PyObject* module);
+}
+
+#ifdef __cplusplus
+}
+#endif
+
+#endif
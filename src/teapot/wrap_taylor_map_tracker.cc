@@ -0,0 +1,281 @@
+#include "orbit_mpi.hh"
+#include "pyORBIT_Object.hh"
+
+#include "wrap_taylor_map_tracker.hh"
+#include "wrap_teapotbase.hh"
+#include "wrap_bunch.hh"
+
+#include <vector>
+
+#include "TaylorMapTracker.hh"
+
+using namespace teapot_base;
+
+namespace wrap_teapotbase_taylor_map_tracker
+{
+    void error(const char* msg){ ORBIT_MPI_Finalize(msg); }
+
+    //Copies the numbers from the Python sequence into the vector
+    static void readSequence(PyObject* pySeq, std::vector<double>& vec, const char* msg)
+    {
+        if(!PySequence_Check(pySeq))
+        {
+            error(msg);
+        }
+        int size = PySequence_Size(pySeq);
+        vec.resize(size);
+        for(int i = 0; i < size; i++)
+        {
+            PyObject* pyVal = PySequence_GetItem(pySeq, i);
+            vec[i] = PyFloat_AsDouble(pyVal);
+            Py_XDECREF(pyVal);
+        }
+        if(PyErr_Occurred() != NULL)
+        {
+            error(msg);
+        }
+    }
+
+#ifdef __cplusplus
+extern "C"
+{
+#endif
+
+    //---------------------------------------------------------
+    //Python TaylorMapTracker class definition
+    //---------------------------------------------------------
+
+    //Constructor for python class wrapping TaylorMapTracker instance
+    //It never will be called directly
+    static PyObject* TaylorMapTracker_new(PyTypeObject *type,
+                                          PyObject *args, PyObject *kwds)
+    {
+        pyORBIT_Object* self;
+        self = (pyORBIT_Object *) type->tp_alloc(type, 0);
+        self->cpp_obj = NULL;
+        return (PyObject *) self;
+    }
+
+    //Initializator for python TaylorMapTracker class (implementation of the __init__ )
+    static int TaylorMapTracker_init(pyORBIT_Object *self,
+                                     PyObject *args, PyObject *kwds)
+    {
+        self->cpp_obj = new TaylorMapTracker();
+        return 0;
+    }
+
+    //-----------------------------------------------------
+    //Destructor for python TaylorMapTracker class (__del__ method).
+    //-----------------------------------------------------
+    static void TaylorMapTracker_del(pyORBIT_Object* self)
+    {
+        delete ((TaylorMapTracker*)self->cpp_obj);
+        self->ob_base.ob_type->tp_free((PyObject*)self);
+    }
+
+    //Sets the table of the monomials setMonomials(parents, variables)
+    static PyObject* TaylorMapTracker_setMonomials(PyObject *self, PyObject *args)
+    {
+        TaylorMapTracker* cpp_TaylorMapTracker = (TaylorMapTracker*) ((pyORBIT_Object*) self)->cpp_obj;
+        PyObject* pyParents;
+        PyObject* pyVariables;
+        const char* msg = "TaylorMapTracker - setMonomials(parents, variables) - cannot parse arguments!";
+        if(!PyArg_ParseTuple(args, "OO:setMonomials", &pyParents, &pyVariables))
+        {
+            error(msg);
+        }
+        std::vector<double> parents_d, variables_d;
+        readSequence(pyParents, parents_d, msg);
+        readSequence(pyVariables, variables_d, msg);
+        std::vector<int> parents(parents_d.size()), variables(variables_d.size());
+        for(int i = 0; i < (int) parents_d.size(); i++) parents[i] = (int) parents_d[i];
+        for(int i = 0; i < (int) variables_d.size(); i++) variables[i] = (int) variables_d[i];
+        cpp_TaylorMapTracker->setMonomials(parents, variables);
+        Py_INCREF(Py_None);
+        return Py_None;
+    }
+
+    //Returns the number of monomials
+    static PyObject* TaylorMapTracker_getNumberOfMonomials(PyObject *self, PyObject *args)
+    {
+        TaylorMapTracker* cpp_TaylorMapTracker = (TaylorMapTracker*) ((pyORBIT_Object*) self)->cpp_obj;
+        return Py_BuildValue("i", cpp_TaylorMapTracker->getNumberOfMonomials());
+    }
+
+    //Sets the coefficients [monomial][6] of the polynomial map as a flat sequence
+    static PyObject* TaylorMapTracker_setMap(PyObject *self, PyObject *args)
+    {
+        TaylorMapTracker* cpp_TaylorMapTracker = (TaylorMapTracker*) ((pyORBIT_Object*) self)->cpp_obj;
+        PyObject* pyCoeffs;
+        const char* msg = "TaylorMapTracker - setMap(coeffs) - cannot parse arguments!";
+        if(!PyArg_ParseTuple(args, "O:setMap", &pyCoeffs))
+        {
+            error(msg);
+        }
+        std::vector<double> coeffs;
+        readSequence(pyCoeffs, coeffs, msg);
+        cpp_TaylorMapTracker->setMap(coeffs);
+        Py_INCREF(Py_None);
+        return Py_None;
+    }
+
+    //Sets the coefficients [monomial][15] of the generating function derivatives as a flat sequence
+    static PyObject* TaylorMapTracker_setGeneratingFunction(PyObject *self, PyObject *args)
+    {
+        TaylorMapTracker* cpp_TaylorMapTracker = (TaylorMapTracker*) ((pyORBIT_Object*) self)->cpp_obj;
+        PyObject* pyCoeffs;
+        const char* msg = "TaylorMapTracker - setGeneratingFunction(coeffs) - cannot parse arguments!";
+        if(!PyArg_ParseTuple(args, "O:setGeneratingFunction", &pyCoeffs))
+        {
+            error(msg);
+        }
+        std::vector<double> coeffs;
+        readSequence(pyCoeffs, coeffs, msg);
+        cpp_TaylorMapTracker->setGeneratingFunction(coeffs);
+        Py_INCREF(Py_None);
+        return Py_None;
+    }
+
+    //Returns 1 if the generating function is used and 0 otherwise
+    static PyObject* TaylorMapTracker_isSymplectic(PyObject *self, PyObject *args)
+    {
+        TaylorMapTracker* cpp_TaylorMapTracker = (TaylorMapTracker*) ((pyORBIT_Object*) self)->cpp_obj;
+        return Py_BuildValue("i", cpp_TaylorMapTracker->isSymplectic());
+    }
+
+    //Sets the input and output 6x6 matrices as the flat sequences in the row-major order
+    static PyObject* TaylorMapTracker_setMatrices(PyObject *self, PyObject *args)
+    {
+        TaylorMapTracker* cpp_TaylorMapTracker = (TaylorMapTracker*) ((pyORBIT_Object*) self)->cpp_obj;
+        PyObject* pyInMatrix;
+        PyObject* pyOutMatrix;
+        const char* msg = "TaylorMapTracker - setMatrices(inMatrix, outMatrix) - cannot parse arguments!";
+        if(!PyArg_ParseTuple(args, "OO:setMatrices", &pyInMatrix, &pyOutMatrix))
+        {
+            error(msg);
+        }
+        std::vector<double> inMatrix, outMatrix;
+        readSequence(pyInMatrix, inMatrix, msg);
+        readSequence(pyOutMatrix, outMatrix, msg);
+        cpp_TaylorMapTracker->setMatrices(inMatrix, outMatrix);
+        Py_INCREF(Py_None);
+        return Py_None;
+    }
+
+    //Sets the maximal number of the Newton iterations and the tolerance
+    static PyObject* TaylorMapTracker_setNewtonParameters(PyObject *self, PyObject *args)
+    {
+        TaylorMapTracker* cpp_TaylorMapTracker = (TaylorMapTracker*) ((pyORBIT_Object*) self)->cpp_obj;
+        int maxIterations;
+        double tolerance;
+        if(!PyArg_ParseTuple(args, "id:setNewtonParameters", &maxIterations, &tolerance))
+        {
+            error("TaylorMapTracker - setNewtonParameters(maxIterations, tolerance) - cannot parse arguments!");
+        }
+        cpp_TaylorMapTracker->setNewtonParameters(maxIterations, tolerance);
+        Py_INCREF(Py_None);
+        return Py_None;
+    }
+
+    //Tracks the bunch through the map
+    static PyObject* TaylorMapTracker_track(PyObject *self, PyObject *args)
+    {
+        TaylorMapTracker* cpp_TaylorMapTracker = (TaylorMapTracker*) ((pyORBIT_Object*) self)->cpp_obj;
+        PyObject* pyBunch;
+        if(!PyArg_ParseTuple(args, "O:track", &pyBunch))
+        {
+            error("TaylorMapTracker - track(bunch) - cannot parse arguments!");
+        }
+        PyObject* pyBunchType = wrap_orbit_bunch::getBunchType("Bunch");
+        if(!PyObject_IsInstance(pyBunch, pyBunchType))
+        {
+            error("TaylorMapTracker - track(bunch) - the parameter should be a Bunch!");
+        }
+        cpp_TaylorMapTracker->track((Bunch*) ((pyORBIT_Object*) pyBunch)->cpp_obj);
+        Py_INCREF(Py_None);
+        return Py_None;
+    }
+
+    // defenition of the methods of the python TaylorMapTracker wrapper class
+    // they will be vailable from python level
+    static PyMethodDef TaylorMapTrackerClassMethods[] =
+    {
+        { "setMonomials",          TaylorMapTracker_setMonomials,          METH_VARARGS, "Sets the table of the monomials setMonomials(parents, variables)"},
+        { "getNumberOfMonomials",  TaylorMapTracker_getNumberOfMonomials,  METH_NOARGS,  "Returns the number of monomials"},
+        { "setMap",                TaylorMapTracker_setMap,                METH_VARARGS, "Sets the coefficients [monomial][6] of the polynomial map"},
+        { "setGeneratingFunction", TaylorMapTracker_setGeneratingFunction, METH_VARARGS, "Sets the coefficients [monomial][15] of the generating function derivatives"},
+        { "isSymplectic",          TaylorMapTracker_isSymplectic,          METH_NOARGS,  "Returns 1 if the generating function is used and 0 otherwise"},
+        { "setMatrices",           TaylorMapTracker_setMatrices,           METH_VARARGS, "Sets the input and output 6x6 matrices"},
+        { "setNewtonParameters",   TaylorMapTracker_setNewtonParameters,   METH_VARARGS, "Sets the maximal number of the Newton iterations and the tolerance"},
+        { "track",                 TaylorMapTracker_track,                 METH_VARARGS, "Tracks the bunch through the map"},
+        {NULL}
+    };
+
+    // Definition of the memebers of the python TaylorMapTracker wrapper class
+    // They will be vailable from python level
+    static PyMemberDef TaylorMapTrackerClassMembers [] =
+    {
+        {NULL}
+    };
+
+    //New python TaylorMapTracker wrapper type definition
+    static PyTypeObject pyORBIT_TaylorMapTracker_Type =
+    {
+        PyVarObject_HEAD_INIT(NULL, 0)
+        "TaylorMapTracker", /*tp_name*/
+        sizeof(pyORBIT_Object), /*tp_basicsize*/
+        0, /*tp_itemsize*/
+        (destructor) TaylorMapTracker_del , /*tp_dealloc*/
+        0, /*tp_print*/
+        0, /*tp_getattr*/
+        0, /*tp_setattr*/
+        0, /*tp_compare*/
+        0, /*tp_repr*/
+        0, /*tp_as_number*/
+        0, /*tp_as_sequence*/
+        0, /*tp_as_mapping*/
+        0, /*tp_hash */
+        0, /*tp_call*/
+        0, /*tp_str*/
+        0, /*tp_getattro*/
+        0, /*tp_setattro*/
+        0, /*tp_as_buffer*/
+        Py_TPFLAGS_DEFAULT | Py_TPFLAGS_BASETYPE, /*tp_flags*/
+        "The TaylorMapTracker python wrapper", /* tp_doc */
+        0, /* tp_traverse */
+        0, /* tp_clear */
+        0, /* tp_richcompare */
+        0, /* tp_weaklistoffset */
+        0, /* tp_iter */
+        0, /* tp_iternext */
+        TaylorMapTrackerClassMethods, /* tp_methods */
+        TaylorMapTrackerClassMembers, /* tp_members */
+        0, /* tp_getset */
+        0, /* tp_base */
+        0, /* tp_dict */
+        0, /* tp_descr_get */
+        0, /* tp_descr_set */
+        0, /* tp_dictoffset */
+        (initproc) TaylorMapTracker_init, /* tp_init */
+        0, /* tp_alloc */
+        TaylorMapTracker_new, /* tp_new */
+    };
+
+    //--------------------------------------------------
+    //Initialization function of the pyTaylorMapTracker class
+    //It will be called from teapot_base wrapper initialization
+    //--------------------------------------------------
+    void initTaylorMapTracker(PyObject* module)
+    {
+        if (PyType_Ready(&pyORBIT_TaylorMapTracker_Type) < 0) return;
+        Py_INCREF(&pyORBIT_TaylorMapTracker_Type);
+        PyModule_AddObject(module, "TaylorMapTracker",
+                           (PyObject *)&pyORBIT_TaylorMapTracker_Type);
+    }
+
+#ifdef __cplusplus
+}
+#endif
+
+//end of namespace wrap_teapotbase_taylor_map_tracker
+}
@@ -0,0 +1,20 @@
+#ifndef WRAP_TAYLOR_MAP_TRACKER_H
+#define WRAP_TAYLOR_MAP_TRACKER_H
+
+#include "Python.h"
+
+#ifdef __cplusplus
+extern "C"
+{
+#endif
+
+namespace wrap_teapotbase_taylor_map_tracker
+{
+    void initTaylorMapTracker(PyObject* module);
+}
+
+#ifdef __cplusplus
+}
+#endif
+
+#endif
@@ -7,6 +7,9 @@
 
 #include "wrap_teapotbase.hh"
 #include "wrap_matrix_generator.hh"
+#include "wrap_element_program.hh"
+#include "wrap_lattice_executor.hh"
+#include "wrap_taylor_map_tracker.hh"
 
 namespace wrap_teapotbase
 {
@@ -483,6 +486,24 @@ extern "C"
         return Py_None;
     }
 
+    //Sets the number of OpenMP threads for the particle loops
+    static PyObject* wrap_setNumberOfThreads(PyObject *self, PyObject *args)
+    {
+        int nThreads;
+        if(!PyArg_ParseTuple(args, "i:setNumberOfThreads", &nThreads))
+        {
+            error("teapotbase - setNumberOfThreads(nThreads) - cannot parse arguments!");
+        }
+        teapot_base::setNumberOfThreads(nThreads);
+        return Py_BuildValue("i", teapot_base::getNumberOfThreads());
+    }
+
+    //Returns the number of OpenMP threads for the particle loops
+    static PyObject* wrap_getNumberOfThreads(PyObject *self, PyObject *args)
+    {
+        return Py_BuildValue("i", teapot_base::getNumberOfThreads());
+    }
+
     static PyMethodDef teapotbaseMethods[] =
     {
             {"rotatexy",         wrap_rotatexy,       METH_VARARGS, "Rotates bunch around z axis "},
@@ -510,6 +531,8 @@ extern "C"
             {"soln",             wrap_soln,           METH_VARARGS, "Integration through a solenoid "},
             {"wedgebendCF",      wrap_wedgebendCF,    METH_VARARGS, "Straight bends particles through wedge for Combined Function non-SBEND "},
             {"RingRF",           wrap_RingRF,         METH_VARARGS, "Tracking particles through a simple ring RF cavity."},
+            {"setNumberOfThreads",    wrap_setNumberOfThreads,    METH_VARARGS, "Sets the number of OpenMP threads for the particle loops and returns the accepted number"},
+            {"getNumberOfThreads",    wrap_getNumberOfThreads,    METH_NOARGS,  "Returns the number of OpenMP threads for the particle loops"},
             { NULL, NULL }
     };
 
@@ -528,6 +551,9 @@ extern "C"
         d = PyModule_GetDict(m);
         teapot_base::init_factorial();
         wrap_teapotbase_matrix_generator::initMatrixGenerator(m);
+        wrap_teapotbase_element_program::initElementProgram(m);
+        wrap_teapotbase_lattice_executor::initLatticeExecutor(m);
+        wrap_teapotbase_taylor_map_tracker::initTaylorMapTracker(m);
         return m;
     }
 
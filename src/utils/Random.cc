@@ -17,6 +17,7 @@
 
 #include "Random.hh"
 #include <random>
+#include <sstream>
 
 using namespace OrbitUtils;
 
@@ -31,3 +32,15 @@ void Random::seed(int seed){
 double Random::ran1(){
 	return ((double) mt() / (mt.max()));
 }
+
+/** The state of the generator can be saved and restored to continue the same sequence. */
+std::string Random::getState(){
+	std::ostringstream out;
+	out << mt;
+	return out.str();
+}
+
+void Random::setState(const std::string& state){
+	std::istringstream in(state);
+	in >> mt;
+}
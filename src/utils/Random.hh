@@ -19,6 +19,7 @@
 #include <complex>
 #include <cmath>
 #include <iostream>
+#include <string>
 
 /**
   This class is a methods to create random numbers
@@ -34,6 +35,12 @@ namespace OrbitUtils
 
 		/** The method calculates a random number between 0 and 1 */
 		static double ran1();
+
+		/** Returns the state of the random generator as a string */
+		static std::string getState();
+
+		/** Restores the state of the random generator from the getState() string */
+		static void setState(const std::string& state);
 	};
 }
 
@@ -39,47 +39,21 @@ void BunchExtremaCalculator::getExtremaXYZ(Bunch* bunch,
 	double& yMin, double& yMax,
 	double& zMin, double& zMax)
 {
+	getExtremaXYZ(bunch->getStatistics(), xMin, xMax, yMin, yMax, zMin, zMax);
+}
 
-	int buff_index0 = 0;
-	int buff_index1 = 0;
-	double* gridLimArr  = BufferStore::getBufferStore()->getFreeDoubleArr(buff_index0,6);
-	double* gridLimArr_out = BufferStore::getBufferStore()->getFreeDoubleArr(buff_index1,6);
-	for (int i = 0; i < 3; i++){
-		gridLimArr[2*i] = DBL_MAX;
-		gridLimArr[2*i+1] = -DBL_MAX;
-	}
-
-	double** partArr=bunch->coordArr();
-	double* coordArr = NULL;
-	for (int ip = 0, n = bunch->getSize(); ip < n; ip++){
-		coordArr = partArr[ip];
-		if(coordArr[0] < gridLimArr[0]) gridLimArr[0] = coordArr[0];
-		if(coordArr[0] > gridLimArr[1]) gridLimArr[1] = coordArr[0];
-		if(coordArr[2] < gridLimArr[2]) gridLimArr[2] = coordArr[2];
-		if(coordArr[2] > gridLimArr[3]) gridLimArr[3] = coordArr[2];
-		if(coordArr[4] < gridLimArr[4]) gridLimArr[4] = coordArr[4];
-		if(coordArr[4] > gridLimArr[5]) gridLimArr[5] = coordArr[4];
-	}
-
-	gridLimArr[0] = - gridLimArr[0];
-	gridLimArr[2] = - gridLimArr[2];
-	gridLimArr[4] = - gridLimArr[4];
-
-	ORBIT_MPI_Allreduce(gridLimArr,gridLimArr_out,6,MPI_DOUBLE,MPI_MAX,bunch->getMPI_Comm_Local()->comm);
-
-	gridLimArr_out[0] = - gridLimArr_out[0];
-	gridLimArr_out[2] = - gridLimArr_out[2];
-	gridLimArr_out[4] = - gridLimArr_out[4];
-
-  xMin = gridLimArr_out[0];
-  xMax = gridLimArr_out[1];
-  yMin = gridLimArr_out[2];
-  yMax = gridLimArr_out[3];
-  zMin = gridLimArr_out[4];
-  zMax = gridLimArr_out[5];
-
-	OrbitUtils::BufferStore::getBufferStore()->setUnusedDoubleArr(buff_index0);
-	OrbitUtils::BufferStore::getBufferStore()->setUnusedDoubleArr(buff_index1);
+/** The method returns the extrema of x, y, z from the calculated statistics of the bunch. */
+void BunchExtremaCalculator::getExtremaXYZ(BunchStatistics* stats,
+	double& xMin, double& xMax,
+	double& yMin, double& yMax,
+	double& zMin, double& zMax)
+{
+  xMin = stats->getMin(0);
+  xMax = stats->getMax(0);
+  yMin = stats->getMin(2);
+  yMax = stats->getMax(2);
+  zMin = stats->getMin(4);
+  zMax = stats->getMax(4);
 }
 
 /** The method calculates the extrema of the particles coordinates xp, yp, dE in the bunch. */
@@ -88,96 +62,44 @@ void BunchExtremaCalculator::getExtremaXpYpdE(Bunch* bunch,
 	double& ypMin, double& ypMax,
 	double& dE_Min, double& dE_Max)
 {
-
-	int buff_index0 = 0;
-	int buff_index1 = 0;
-	double* gridLimArr  = BufferStore::getBufferStore()->getFreeDoubleArr(buff_index0,6);
-	double* gridLimArr_out = BufferStore::getBufferStore()->getFreeDoubleArr(buff_index1,6);
-	for (int i = 0; i < 3; i++){
-		gridLimArr[2*i] = DBL_MAX;
-		gridLimArr[2*i+1] = -DBL_MAX;
-	}
-
-	double** partArr=bunch->coordArr();
-	double* coordArr = NULL;
-	for (int ip = 0, n = bunch->getSize(); ip < n; ip++){
-		coordArr = partArr[ip];
-		if(coordArr[1] < gridLimArr[0]) gridLimArr[0] = coordArr[1];
-		if(coordArr[1] > gridLimArr[1]) gridLimArr[1] = coordArr[1];
-		if(coordArr[3] < gridLimArr[2]) gridLimArr[2] = coordArr[3];
-		if(coordArr[3] > gridLimArr[3]) gridLimArr[3] = coordArr[3];
-		if(coordArr[5] < gridLimArr[4]) gridLimArr[4] = coordArr[5];
-		if(coordArr[5] > gridLimArr[5]) gridLimArr[5] = coordArr[5];
-	}
-
-	gridLimArr[0] = - gridLimArr[0];
-	gridLimArr[2] = - gridLimArr[2];
-	gridLimArr[4] = - gridLimArr[4];
-
-	ORBIT_MPI_Allreduce(gridLimArr,gridLimArr_out,6,MPI_DOUBLE,MPI_MAX,bunch->getMPI_Comm_Local()->comm);
-
-	gridLimArr_out[0] = - gridLimArr_out[0];
-	gridLimArr_out[2] = - gridLimArr_out[2];
-	gridLimArr_out[4] = - gridLimArr_out[4];
-
-  xpMin = gridLimArr_out[0];
-  xpMax = gridLimArr_out[1];
-  ypMin = gridLimArr_out[2];
-  ypMax = gridLimArr_out[3];
-  dE_Min = gridLimArr_out[4];
-  dE_Max = gridLimArr_out[5];
-
-	OrbitUtils::BufferStore::getBufferStore()->setUnusedDoubleArr(buff_index0);
-	OrbitUtils::BufferStore::getBufferStore()->setUnusedDoubleArr(buff_index1);
+	BunchStatistics* stats = bunch->getStatistics();
+  xpMin = stats->getMin(1);
+  xpMax = stats->getMax(1);
+  ypMin = stats->getMin(3);
+  ypMax = stats->getMax(3);
+  dE_Min = stats->getMin(5);
+  dE_Max = stats->getMax(5);
 }
 
 /** The method calculates the z extrema of the particles coordinates in the bunch. */
 void BunchExtremaCalculator::getExtremaZ(Bunch* bunch,
 	double& zMin, double& zMax)
 {
-	int buff_index0 = 0;
-	int buff_index1 = 0;
-	double* gridLimArr  = BufferStore::getBufferStore()->getFreeDoubleArr(buff_index0,2);
-	double* gridLimArr_out = BufferStore::getBufferStore()->getFreeDoubleArr(buff_index1,2);
-	gridLimArr[0] = DBL_MAX;
-	gridLimArr[1] = -DBL_MAX;
-
-	double** partArr=bunch->coordArr();
-	double* coordArr = NULL;
-	for (int ip = 0, n = bunch->getSize(); ip < n; ip++){
-		coordArr = partArr[ip];
-		if(coordArr[4] < gridLimArr[0]) gridLimArr[0] = coordArr[4];
-		if(coordArr[4] > gridLimArr[1]) gridLimArr[1] = coordArr[4];
-	}
-
-	gridLimArr[0] = - gridLimArr[0];
-
-	ORBIT_MPI_Allreduce(gridLimArr,gridLimArr_out,2,MPI_DOUBLE,MPI_MAX,bunch->getMPI_Comm_Local()->comm);
-
-	gridLimArr_out[0] = - gridLimArr_out[0];
-
-  zMin = gridLimArr_out[0];
-  zMax = gridLimArr_out[1];
+	getExtremaZ(bunch->getStatistics(), zMin, zMax);
+}
 
-	OrbitUtils::BufferStore::getBufferStore()->setUnusedDoubleArr(buff_index0);
-	OrbitUtils::BufferStore::getBufferStore()->setUnusedDoubleArr(buff_index1);
+/** The method returns the z extrema from the calculated statistics of the bunch. */
+void BunchExtremaCalculator::getExtremaZ(BunchStatistics* stats,
+	double& zMin, double& zMax)
+{
+  zMin = stats->getMin(4);
+  zMax = stats->getMax(4);
 }
 
 /** The method calculates the sqrt(x**2+y**2) extrema of the particles coordinates in the bunch. */
 void BunchExtremaCalculator::getExtremaR(Bunch* bunch, double& rMax)
 {
-	double** partArr=bunch->coordArr();
-	double* coordArr = NULL;
-
 	double x_avg = 0.;
 	double y_avg = 0.;
 	int nParts = bunch->getSizeGlobal();
 
-	for (int ip = 0, n = bunch->getSize(); ip < n; ip++){
-		coordArr = partArr[ip];
-		x_avg += coordArr[0];
-		y_avg += coordArr[2];
-	}
+	readCoordRows(bunch, [&](auto partArr)
+	{
+		for (int ip = 0, n = bunch->getSize(); ip < n; ip++){
+			x_avg += partArr[ip][0];
+			y_avg += partArr[ip][2];
+		}
+	});
 
 	double x_avg_global = 0.;
 	double y_avg_global = 0.;
@@ -197,11 +119,13 @@ void BunchExtremaCalculator::getExtremaR(Bunch* bunch, double& rMax)
 	double rMax_global = 0.;
 	rMax = 0.;
 
-	for (int ip = 0, n = bunch->getSize(); ip < n; ip++){
-		coordArr = partArr[ip];
-		rMax = sqrt(pow(coordArr[0] - x_avg,2.0) + pow(coordArr[2] - y_avg,2.0));
-		if(rMax > rMax_local) rMax_local = rMax;
-	}
+	readCoordRows(bunch, [&](auto partArr)
+	{
+		for (int ip = 0, n = bunch->getSize(); ip < n; ip++){
+			rMax = sqrt(pow(partArr[ip][0] - x_avg,2.0) + pow(partArr[ip][2] - y_avg,2.0));
+			if(rMax > rMax_local) rMax_local = rMax;
+		}
+	});
 
 	ORBIT_MPI_Allreduce(&rMax_local,&rMax_global,1,MPI_DOUBLE,MPI_MAX,bunch->getMPI_Comm_Local()->comm);
 
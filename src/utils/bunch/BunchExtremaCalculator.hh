@@ -19,6 +19,7 @@
 
 //ORBIT bunch
 #include "Bunch.hh"
+#include "BunchStatistics.hh"
 
 namespace OrbitUtils{
 
@@ -50,6 +51,16 @@ namespace OrbitUtils{
 			void getExtremaZ(Bunch* bunch,
 				double& zMin, double& zMax);
 
+			/** The method returns the extrema of x, y, z from the calculated statistics of the bunch. */
+			void getExtremaXYZ(BunchStatistics* stats,
+				double& xMin, double& xMax,
+				double& yMin, double& yMax,
+				double& zMin, double& zMax);
+
+			/** The method returns the z extrema from the calculated statistics of the bunch. */
+			void getExtremaZ(BunchStatistics* stats,
+				double& zMin, double& zMax);
+
 			/** The method calculates the sqrt(x**2+y**2) extrema of the particles coordinates in the bunch. */
 			void getExtremaR(Bunch* bunch, double& rMax);
 
@@ -6,6 +6,7 @@
 #include "wrap_bunch.hh"
 
 #include <iostream>
+#include <string>
 
 #include "Matrix.hh"
 #include "PhaseVector.hh"
@@ -112,6 +113,46 @@ extern "C" {
 		return Py_BuildValue("(i,i)",cpp_Matrix->rows(),cpp_Matrix->columns());
   }
 
+	//  getValues() - returns the tuple with all elements of the matrix row by row
+	//  getValues(buffer) - copies the elements into the writable buffer of doubles
+  static PyObject* Matrix_getValues(PyObject *self, PyObject *args){
+    pyORBIT_Object* pyMatrix = (pyORBIT_Object*) self;
+		Matrix* cpp_Matrix = (Matrix*) pyMatrix->cpp_obj;
+		int n = cpp_Matrix->rows();
+		int m = cpp_Matrix->columns();
+		double** arr = cpp_Matrix->getArray();
+		PyObject* pyIn = NULL;
+		if(!PyArg_ParseTuple(args,"|O:getValues",&pyIn)){
+			error("PyMatrix - getValues([buffer]) - cannot parse arguments.");
+		}
+		if(pyIn == NULL){
+			PyObject* pyTuple = PyTuple_New(n*m);
+			for(int i = 0; i < n; i++){
+				for(int j = 0; j < m; j++){
+					PyTuple_SET_ITEM(pyTuple, i*m + j, PyFloat_FromDouble(arr[i][j]));
+				}
+			}
+			return pyTuple;
+		}
+		Py_buffer view;
+		if(PyObject_GetBuffer(pyIn, &view, PyBUF_WRITABLE | PyBUF_C_CONTIGUOUS | PyBUF_FORMAT) != 0){
+			error("PyMatrix - getValues(buffer) - the buffer should be writable and contiguous.");
+		}
+		if(view.format == NULL || std::string(view.format) != "d" || view.len < (Py_ssize_t) (n*m*sizeof(double))){
+			PyBuffer_Release(&view);
+			error("PyMatrix - getValues(buffer) - the buffer should have n*m doubles.");
+		}
+		double* values = (double*) view.buf;
+		for(int i = 0; i < n; i++){
+			for(int j = 0; j < m; j++){
+				values[i*m + j] = arr[i][j];
+			}
+		}
+		PyBuffer_Release(&view);
+		Py_INCREF(Py_None);
+    return Py_None;
+  }
+
 	//  copy() - returns the new Matrix that is equal to the parent one
   static PyObject* Matrix_copy(PyObject *self, PyObject *args){
     pyORBIT_Object* pyMatrix = (pyORBIT_Object*) self;
@@ -292,6 +333,7 @@ extern "C" {
     { "size",       Matrix_size      ,METH_VARARGS,"Returns tuple with (n,m)"},
     { "get",        Matrix_get_set   ,METH_VARARGS,"Returns valuie(i,j)"},
     { "set",        Matrix_get_set   ,METH_VARARGS,"Sets the new value to (i,j) element - set (i,j,val)"},
+    { "getValues",  Matrix_getValues ,METH_VARARGS,"Returns tuple with all elements of the matrix row by row or copies them into the buffer"},
     { "copy",       Matrix_copy      ,METH_VARARGS,"Returns the copy of the matrix"},
     { "copyTo",     Matrix_copyTo    ,METH_VARARGS,"Copy the matrix to the target matrix"},
     { "transpose",  Matrix_transpose ,METH_VARARGS,"Returns a new transposed matrix."},
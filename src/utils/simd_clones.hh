@@ -0,0 +1,24 @@
+//This is a macro-definition for the kernels compiled for several
+//instruction sets. The version for the CPU is selected at load time.
+//The floating point contraction is off in the C++ standard mode, so the
+//results of all versions are the same.
+#ifndef ORBIT_UTILS_SIMD_CLONES_
+#define ORBIT_UTILS_SIMD_CLONES_
+
+#if defined(__GNUC__) && !defined(__clang__) && defined(__x86_64__) && defined(__linux__)
+#define ORBIT_SIMD_CLONES __attribute__((target_clones("avx512f", "avx2", "default")))
+#else
+#define ORBIT_SIMD_CLONES
+#endif
+
+//The iterations of the next loop are independent, and the arrays in the
+//loop do not overlap, so the loop is vectorized without run-time checks.
+#if defined(__clang__)
+#define ORBIT_SIMD_IVDEP _Pragma("clang loop vectorize(assume_safety)")
+#elif defined(__GNUC__)
+#define ORBIT_SIMD_IVDEP _Pragma("GCC ivdep")
+#else
+#define ORBIT_SIMD_IVDEP
+#endif
+
+#endif /*ORBIT_UTILS_SIMD_CLONES_*/
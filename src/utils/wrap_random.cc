@@ -38,9 +38,29 @@ namespace wrap_random
 			return Py_BuildValue("d", Random::ran1());
 		}
 
+		static PyObject *random_getState(PyObject *self, PyObject *args)
+		{
+			std::string state = Random::getState();
+			return Py_BuildValue("s", state.c_str());
+		}
+
+		static PyObject *random_setState(PyObject *self, PyObject *args)
+		{
+			const char *state = NULL;
+			if (!PyArg_ParseTuple(args, "s:setState", &state))
+			{
+				error("setState(state) - the state string is needed.");
+			}
+			Random::setState(std::string(state));
+			Py_INCREF(Py_None);
+			return Py_None;
+		}
+
 		static PyMethodDef RandomModuleMethods[] = {
 			{"seed", random_seed, METH_VARARGS, "seed(n) seed the random number generator."},
 			{"ran1", random_ran1, METH_VARARGS, "ran1() - generate a random number uniformly distributed between 0 and 1."},
+			{"getState", random_getState, METH_VARARGS, "getState() - returns the state of the random number generator as a string."},
+			{"setState", random_setState, METH_VARARGS, "setState(state) - restores the state of the random number generator."},
 			{NULL, NULL, 0, NULL} /* Sentinel */
 		};
 
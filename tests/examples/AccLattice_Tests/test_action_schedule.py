@@ -0,0 +1,234 @@
+# -----------------------------------------------------------
+# The lattice keeps the flat schedules of the trackActions steps
+# for its nodes. The actions should see the same nodes, parent
+# nodes, active parts, and path lengths as with the recursive
+# trackActions(...) method of the nodes. The schedules are
+# built again after the structure of the nodes is changed.
+# -----------------------------------------------------------
+from orbit.lattice import AccLattice, AccNode, AccActionsContainer
+
+
+def makeLattice():
+    lattice = AccLattice("lattice")
+    for ind in range(3):
+        node = AccNode("node" + str(ind))
+        node.setLength(1.0 + ind)
+        node.setnParts(ind + 1)
+        lattice.addNode(node)
+    node = lattice.getNodes()[2]
+    node.addChildNode(AccNode("entrance"), AccNode.ENTRANCE)
+    node.addChildNode(AccNode("exit"), AccNode.EXIT)
+    child = AccNode("child")
+    child.setLength(0.5)
+    child.setnParts(2)
+    child.addChildNode(AccNode("grandchild"), AccNode.BODY, 1, AccNode.AFTER)
+    node.addChildNode(child, AccNode.BODY, 1, AccNode.BEFORE)
+    node.addChildNode(AccNode("after"), AccNode.BODY, 2, AccNode.AFTER)
+    lattice.initialize()
+    return lattice
+
+
+def makeActions(places):
+    records = []
+    actions = AccActionsContainer("records")
+    for place in places:
+
+        def action(paramsDict, place=place):
+            node = paramsDict["node"]
+            parentNode = paramsDict["parentNode"]
+            parentPart = None
+            if isinstance(parentNode, AccNode):
+                parentPart = parentNode.getActivePartIndex()
+            records.append((place, node.getName(), parentNode.getName(), node.getActivePartIndex(), parentPart, paramsDict["path_length"]))
+
+        actions.addAction(action, place)
+    return actions, records
+
+
+def trackRecursive(lattice, actions):
+    paramsDict = {"path_length": 0.0}
+    for node in lattice.getNodes():
+        paramsDict["node"] = node
+        paramsDict["parentNode"] = lattice
+        node.trackActions(actions, paramsDict)
+    return paramsDict["path_length"]
+
+
+def test_action_schedule():
+    lattice = makeLattice()
+    places = (AccNode.ENTRANCE, AccNode.BODY, AccNode.EXIT)
+    actions, expected = makeActions(places)
+    expected_length = trackRecursive(lattice, actions)
+    actions, records = makeActions(places)
+    paramsDict = {}
+    lattice.trackActions(actions, paramsDict)
+    assert records == expected
+    assert paramsDict["path_length"] == expected_length
+    assert len(records) == sum([len(lattice.getActionSchedule(node)) for node in lattice.getNodes()])
+
+    # the steps without actions are skipped, but the path length is the same
+    actions, records = makeActions((AccNode.BODY,))
+    paramsDict = {}
+    lattice.trackActions(actions, paramsDict)
+    assert records == [record for record in expected if record[0] == AccNode.BODY]
+    assert paramsDict["path_length"] == expected_length
+
+    # the part of the lattice
+    actions, records = makeActions(places)
+    lattice.trackActions(actions, {}, 1, 1)
+    assert set([record[1] for record in records]) == set(["node1"])
+
+
+def test_action_schedule_changes():
+    lattice = makeLattice()
+    node = lattice.getNodes()[0]
+    schedule = lattice.getActionSchedule(node)
+    assert lattice.getActionSchedule(node) is schedule
+
+    # the new child node, the new length, and the new node
+    node.addChildNode(AccNode("new child"), AccNode.EXIT)
+    lattice.getNodes()[1].setLength(5.0)
+    lattice.addNode(AccNode("new node"))
+    assert lattice.getActionSchedule(node) is not schedule
+    places = (AccNode.ENTRANCE, AccNode.BODY, AccNode.EXIT)
+    actions, expected = makeActions(places)
+    expected_length = trackRecursive(lattice, actions)
+    actions, records = makeActions(places)
+    paramsDict = {}
+    lattice.trackActions(actions, paramsDict)
+    assert records == expected
+    assert paramsDict["path_length"] == expected_length == 9.5
+    assert "new child" in [record[1] for record in records]
+    assert records[-1][1] == "new node"
+
+
+def test_action_schedule_final_parts():
+    # the active parts are the same as after the recursive method
+    # also for the steps without actions
+    lattice = makeLattice()
+    actions, records = makeActions(())
+    trackRecursive(lattice, actions)
+    expected = [node.getActivePartIndex() for node in lattice.getNodes()]
+    for node in lattice.getNodes():
+        node.setActivePartIndex(node.getnParts() - 1)
+    for places in ((), (AccNode.BODY,)):
+        actions, records = makeActions(places)
+        lattice.trackActions(actions, {})
+        assert [node.getActivePartIndex() for node in lattice.getNodes()] == expected == [-1, -1, -1]
+        child = lattice.getNodes()[2].getChildNodes(AccNode.BODY, 1, AccNode.BEFORE)[0]
+        assert child.getActivePartIndex() == -1
+
+
+def test_action_schedule_child_insert_remove():
+    # the child nodes are inserted and removed after initialize()
+    lattice = makeLattice()
+    places = (AccNode.ENTRANCE, AccNode.BODY, AccNode.EXIT)
+    node = lattice.getNodes()[2]
+    lattice.trackActions(makeActions(places)[0], {})
+
+    node.insertChildNode(0, AccNode("first"), AccNode.ENTRANCE)
+    node.removeChildNode(node.getChildNodes(AccNode.EXIT)[0], AccNode.EXIT)
+    node.insertChildNode(0, AccNode("body"), AccNode.BODY, 2, AccNode.AFTER)
+    actions, expected = makeActions(places)
+    trackRecursive(lattice, actions)
+    actions, records = makeActions(places)
+    lattice.trackActions(actions, {})
+    assert records == expected
+    names = [record[1] for record in records]
+    assert names.index("first") < names.index("entrance")
+    assert names.index("body") < names.index("after")
+    assert "exit" not in names
+
+
+def test_action_schedule_direct_list_change():
+    # the direct changes of the children list are used after initialize()
+    lattice = makeLattice()
+    places = (AccNode.ENTRANCE,)
+    node = lattice.getNodes()[2]
+    lattice.trackActions(makeActions(places)[0], {})
+    node.getChildNodes(AccNode.ENTRANCE).append(AccNode("appended"))
+    lattice.initialize()
+    actions, records = makeActions(places)
+    lattice.trackActions(actions, {})
+    assert "appended" in [record[1] for record in records]
+
+
+def test_action_schedule_two_lattices():
+    # the change of one lattice keeps the schedules of another lattice
+    lattice = makeLattice()
+    other = makeLattice()
+    node = lattice.getNodes()[0]
+    other_node = other.getNodes()[0]
+    other_schedule = other.getActionSchedule(other_node)
+    epoch = other.getStructureEpoch()
+    node.addChildNode(AccNode("new child"), AccNode.EXIT)
+    lattice.getNodes()[2].getChildNodes(AccNode.ENTRANCE)[0].setLength(1.0)
+    assert other.getStructureEpoch() == epoch
+    assert other.getActionSchedule(other_node) is other_schedule
+    assert "new child" in [step[0].getName() for step in lattice.getActionSchedule(node)]
+
+    # the sublattice shares the nodes with the lattice
+    sublattice = lattice.getSubLattice(0, 1)
+    schedule = lattice.getActionSchedule(node)
+    sub_schedule = sublattice.getActionSchedule(node)
+    node.removeChildNode(node.getChildNodes(AccNode.EXIT)[0], AccNode.EXIT)
+    assert lattice.getActionSchedule(node) is not schedule
+    assert sublattice.getActionSchedule(node) is not sub_schedule
+    assert other.getActionSchedule(other_node) is other_schedule
+
+
+class RecordingNode(AccNode):
+    """
+    The node with its own trackActions(...) method.
+    """
+
+    def trackActions(self, actionsContainer, paramsDict={}):
+        paramsDict["own trackActions"] = paramsDict.get("own trackActions", 0) + 1
+        AccNode.trackActions(self, actionsContainer, paramsDict)
+
+
+def test_action_schedule_own_track_actions():
+    # the nodes with their own trackActions(...) method are tracked by this method
+    lattice = makeLattice()
+    node = RecordingNode("own")
+    node.setLength(2.0)
+    node.addChildNode(AccNode("own child"), AccNode.ENTRANCE)
+    lattice.addNode(node, 1)
+    lattice.getNodes()[3].addChildNode(RecordingNode("own exit"), AccNode.EXIT)
+    lattice.initialize()
+    places = (AccNode.ENTRANCE, AccNode.BODY, AccNode.EXIT)
+    actions, expected = makeActions(places)
+    expected_params = {"path_length": 0.0}
+    for latticeNode in lattice.getNodes():
+        expected_params["node"] = latticeNode
+        expected_params["parentNode"] = lattice
+        latticeNode.trackActions(actions, expected_params)
+    actions, records = makeActions(places)
+    paramsDict = {}
+    lattice.trackActions(actions, paramsDict)
+    assert records == expected
+    assert paramsDict["path_length"] == expected_params["path_length"] == 8.5
+    assert paramsDict["own trackActions"] == expected_params["own trackActions"] == 2
+
+
+def test_action_schedule_error_nodes():
+    from orbit.py_linac.errors.ErrorNodesAndControllersLib import ErrorCntrlCoordDisplacement
+
+    lattice = makeLattice()
+    node = lattice.getNodes()[2]
+    places = (AccNode.ENTRANCE, AccNode.EXIT)
+    lattice.trackActions(makeActions(places)[0], {})
+    errCntrl = ErrorCntrlCoordDisplacement("displacement")
+    errCntrl.setLattice(lattice)
+    errCntrl.setOneNodeParent(node)
+    actions, records = makeActions(places)
+    lattice.trackActions(actions, {})
+    names = [record[1] for record in records if record[0] == AccNode.ENTRANCE]
+    assert names.count("ErrNode:CoordDisp:Entr:node2") == 1
+    assert names.index("ErrNode:CoordDisp:Entr:node2") < names.index("entrance")
+    assert names.count("ErrNode:CoordDisp:Exit:node2") == 1
+
+    errCntrl.cleanParentNodes()
+    actions, records = makeActions(places)
+    lattice.trackActions(actions, {})
+    assert [record[1] for record in records if record[1].startswith("ErrNode")] == []
@@ -0,0 +1,159 @@
+# -----------------------------------------------------------
+# The MATRIX_Lattice optics functions are calculated for all
+# matrix nodes at once with the numpy arrays of the matrices.
+# The periodic Twiss parameters and dispersion should be the
+# same at the start and at the end of the ring, and they should
+# be the same as the results of the node by node tracking.
+# The arrays should follow the changes of the matrices and of
+# the nodes of the lattice.
+# -----------------------------------------------------------
+import math
+
+import numpy as np
+
+from orbit.core.bunch import Bunch
+from orbit.core.orbit_utils import Matrix
+from orbit.teapot import teapot, TEAPOT_MATRIX_Lattice
+from orbit.matrix_lattice import BaseMATRIX
+
+
+def makeRing():
+    ring = teapot.TEAPOT_Ring("ring")
+    for cell in range(8):
+        drift = teapot.DriftTEAPOT("drift%d" % cell)
+        drift.setLength(1.5)
+        ring.addNode(drift)
+        quad = teapot.QuadTEAPOT("quad%d" % cell)
+        quad.setLength(0.5)
+        quad.setParam("kq", 0.5 * (-1) ** cell)
+        quad.setnParts(4)
+        ring.addNode(quad)
+        bend = teapot.BendTEAPOT("bend%d" % cell)
+        bend.setLength(2.0)
+        bend.setParam("theta", math.pi / 4)
+        bend.setParam("ea1", 0.0)
+        bend.setParam("ea2", 0.0)
+        bend.setnParts(4)
+        ring.addNode(bend)
+    ring.initialize()
+    return ring
+
+
+def makeMatrixLattice():
+    bunch = Bunch()
+    bunch.getSyncParticle().kinEnergy(1.0)
+    return TEAPOT_MATRIX_Lattice(makeRing(), bunch)
+
+
+def test_matrix_values():
+    matrix = Matrix(3, 3)
+    for i in range(3):
+        for j in range(3):
+            matrix.set(i, j, 10.0 * i + j)
+    values = np.array(matrix.getValues())
+    buffer = np.zeros(9)
+    matrix.getValues(buffer)
+    assert np.all(values == np.arange(9) + 7.0 * (np.arange(9) // 3))
+    assert np.all(buffer == values)
+
+
+def test_cumulative_matrices():
+    lattice = makeMatrixLattice()
+    (lengths, matrices) = lattice.getMatrixArrays()
+    assert len(lengths) == len([node for node in lattice.getNodes() if isinstance(node, BaseMATRIX)])
+    products = lattice.getCumulativeMatrices()
+    product = np.eye(7)
+    for ind in range(len(lengths)):
+        product = matrices[ind].dot(product)
+        assert np.abs(products[ind + 1] - product).max() < 1.0e-12
+    oneTurnMatrix = np.array(lattice.getOneTurnMatrix().getValues()).reshape((7, 7))
+    assert np.abs(products[-1] - oneTurnMatrix).max() < 1.0e-12
+    assert abs(lattice.getPositionArray()[-1] - lattice.getLength()) < 1.0e-12
+
+
+def test_ring_optics_arrays():
+    lattice = makeMatrixLattice()
+    res_dict = lattice.getRingParametersDict()
+    arrays = lattice.getRingOpticsArrays()
+    for direction in ("x", "y"):
+        # the periodic functions
+        assert abs(arrays["beta " + direction][-1] - arrays["beta " + direction][0]) < 1.0e-9
+        assert abs(arrays["alpha " + direction][-1] - arrays["alpha " + direction][0]) < 1.0e-9
+        assert abs(arrays["beta " + direction][0] - res_dict["beta " + direction + " [m]"]) < 1.0e-12
+        # the fractional tune is the phase advance of the ring
+        tune = arrays["phase " + direction][-1]
+        frac_tune = res_dict["fractional tune " + direction]
+        assert abs((tune - frac_tune) - round(tune - frac_tune)) < 1.0e-9
+        assert np.all(arrays["beta " + direction] > 0.0)
+    assert abs(arrays["dispersion x"][-1] - arrays["dispersion x"][0]) < 1.0e-9
+    assert np.abs(arrays["dispersion y"]).max() < 1.0e-12
+
+    # the lists of the old tracking methods are made from the same arrays
+    (mu_arr, alpha_arr, beta_arr) = lattice.getRingTwissDataX()
+    (disp_arr, disp_p_arr) = lattice.getRingDispersionDataX()
+    # the Twiss parameters are not repeated for the nodes with zero length
+    (lengths, matrices) = lattice.getMatrixArrays()
+    indices = [0] + [ind + 1 for ind in range(len(lengths)) if lengths[ind] > 0.0]
+    assert len(beta_arr) == len(indices)
+    assert len(disp_arr) == len(arrays["dispersion x"])
+    for ind in range(len(beta_arr)):
+        assert beta_arr[ind][1] == arrays["beta x"][indices[ind]]
+        assert mu_arr[ind][1] == arrays["phase x"][indices[ind]]
+    for ind in range(len(disp_arr)):
+        assert disp_p_arr[ind][1] == arrays["dispersion prime x"][ind]
+
+
+def test_orbit_arrays():
+    lattice = makeMatrixLattice()
+    z0 = [1.0e-3, 1.0e-4, -1.0e-3, 2.0e-4, 0.0, 0.0]
+    (positions, coords) = lattice.getOrbitArrays(z0)
+    (lengths, matrices) = lattice.getMatrixArrays()
+    z = np.array(z0 + [1.0])
+    for ind in range(len(lengths)):
+        z = matrices[ind].dot(z)
+        assert np.abs(coords[ind + 1] - z[:6]).max() < 1.0e-15
+    (orbitX, orbitY) = lattice.getRingOrbit(z0)
+    assert orbitX[-1] == (positions[-1], coords[-1, 0], coords[-1, 1])
+    assert orbitY[0] == (0.0, z0[2], z0[3])
+
+
+def test_arrays_after_matrix_change():
+    lattice = makeMatrixLattice()
+    beta_x = lattice.getRingOpticsArrays()["beta x"]
+    # the arrays follow the matrices changed in place
+    matrixNode = [node for node in lattice.getNodes() if isinstance(node, BaseMATRIX)][0]
+    matrix = matrixNode.getMatrix()
+    matrix.set(1, 0, matrix.get(1, 0) - 0.01)
+    (lengths, matrices) = lattice.getMatrixArrays()
+    assert matrices[0][1][0] == matrix.get(1, 0)
+    (pos_arr, coords) = lattice.getOrbitArrays([1.0e-3, 0.0, 0.0, 0.0, 0.0, 0.0])
+    assert abs(coords[1][1] - 1.0e-3 * matrix.get(1, 0)) < 1.0e-15
+    # the one turn matrix is recalculated explicitly
+    lattice.makeOneTurnMatrix()
+    new_beta_x = lattice.getRingOpticsArrays()["beta x"]
+    assert np.abs(new_beta_x - beta_x).max() > 1.0e-3
+    (mu_arr, alpha_arr, beta_arr) = lattice.getRingTwissDataX()
+    assert beta_arr[-1][1] == new_beta_x[-1]
+
+
+def test_arrays_after_node_changes():
+    lattice = makeMatrixLattice()
+    (lengths, matrices) = lattice.getMatrixArrays()
+    n_nodes = len(lengths)
+    # the new node is in the arrays without makeOneTurnMatrix()
+    matrixNode = BaseMATRIX("new matrix")
+    matrixNode.setLength(2.0)
+    matrixNode.getMatrix().unit()
+    matrixNode.getMatrix().set(0, 1, 2.0)
+    lattice.addNode(matrixNode)
+    (lengths, matrices) = lattice.getMatrixArrays()
+    assert len(lengths) == n_nodes + 1
+    assert lengths[-1] == 2.0 and matrices[-1][0][1] == 2.0
+    (mu_arr, alpha_arr, beta_arr) = lattice.trackTwissData(0.0, 1.0, "x")
+    assert abs(beta_arr[-1][1] - lattice.getTwissArrays(0.0, 1.0, "x")[3][-1]) < 1.0e-12
+    # the new list of the nodes
+    lattice.setNodes([matrixNode])
+    (lengths, matrices) = lattice.getMatrixArrays()
+    assert len(lengths) == 1
+    (orbitX, orbitY) = lattice.trackOrbit([0.0, 1.0e-3, 0.0, 0.0, 0.0, 0.0])
+    assert abs(orbitX[-1][1] - 2.0e-3) < 1.0e-15
@@ -0,0 +1,146 @@
+# -----------------------------------------------------------
+# The TEAPOT_MATRIX_Lattice rebuild() calculates again only the
+# matrices of the TEAPOT nodes that have been changed, and the
+# one turn matrix is updated through the segment tree of the
+# matrix products. The result should be the same as the one of
+# the rebuild of all matrices.
+# -----------------------------------------------------------
+import math
+
+import numpy as np
+
+from orbit.core.bunch import Bunch
+from orbit.teapot import teapot, TEAPOT_MATRIX_Lattice
+from orbit.matrix_lattice import BaseMATRIX
+
+
+class ConstantWaveform:
+    def __init__(self, strength):
+        self.strength = strength
+
+    def getStrength(self):
+        return self.strength
+
+
+def makeRing(fringe=False):
+    ring = teapot.TEAPOT_Ring("ring")
+    for cell in range(6):
+        drift = teapot.DriftTEAPOT("drift%d" % cell)
+        drift.setLength(1.5)
+        ring.addNode(drift)
+        quad = teapot.QuadTEAPOT("quad%d" % cell)
+        quad.setLength(0.5)
+        quad.setParam("kq", 0.5 * (-1) ** cell)
+        quad.setnParts(4)
+        quad.setUsageFringeFieldIN(fringe)
+        quad.setUsageFringeFieldOUT(fringe)
+        ring.addNode(quad)
+        bend = teapot.BendTEAPOT("bend%d" % cell)
+        bend.setLength(2.0)
+        bend.setParam("theta", math.pi / 3)
+        bend.setParam("ea1", 0.0)
+        bend.setParam("ea2", 0.0)
+        bend.setnParts(4)
+        bend.setUsageFringeFieldIN(fringe)
+        bend.setUsageFringeFieldOUT(fringe)
+        ring.addNode(bend)
+    ring.initialize()
+    return ring
+
+
+def makeMatrixLattice(ring):
+    bunch = Bunch()
+    bunch.getSyncParticle().kinEnergy(1.0)
+    return TEAPOT_MATRIX_Lattice(ring, bunch)
+
+
+def getOneTurnMatrix(lattice):
+    return np.array(lattice.getOneTurnMatrix().getValues()).reshape((7, 7))
+
+
+def getMatrices(lattice):
+    matrices = []
+    for node in lattice.getNodes():
+        if isinstance(node, BaseMATRIX):
+            matrices.append(np.array(node.getMatrix().getValues()))
+    return np.array(matrices)
+
+
+def test_rebuild_changed_nodes():
+    ring = makeRing()
+    lattice = makeMatrixLattice(ring)
+    matrices = getMatrices(lattice)
+    # nothing is changed
+    lattice.rebuild()
+    assert np.all(getMatrices(lattice) == matrices)
+
+    quad = ring.getNodeForName("quad2")
+    quad.setParam("kq", 0.55)
+    lattice.rebuild()
+    new_matrices = getMatrices(lattice)
+    changed = [node.getParam("matrix_parent_teapot_node") for node in lattice.getNodes() if isinstance(node, BaseMATRIX)]
+    changed = np.array([teapotNode is quad for teapotNode in changed])
+    assert np.all(new_matrices[~changed] == matrices[~changed])
+    assert np.abs(new_matrices[changed] - matrices[changed]).max() > 1.0e-3
+    oneTurnMatrix = getOneTurnMatrix(lattice)
+
+    # the same result as the rebuild of all matrices
+    lattice.rebuild(onlyChanged=False)
+    assert np.abs(getOneTurnMatrix(lattice) - oneTurnMatrix).max() < 1.0e-14
+    assert np.all(getMatrices(lattice) == new_matrices)
+
+
+def test_rebuild_in_place_changes():
+    ring = makeRing()
+    lattice = makeMatrixLattice(ring)
+    oneTurnMatrix = getOneTurnMatrix(lattice)
+    # the in-place changes of the lists of the parameters
+    bend = ring.getNodeForName("bend0")
+    bend.getParam("kls").append(0.1)
+    bend.getParam("poles").append(1)
+    bend.getParam("skews").append(0)
+    lattice.rebuild()
+    changedMatrix = getOneTurnMatrix(lattice)
+    assert np.abs(changedMatrix - oneTurnMatrix).max() > 1.0e-3
+    bend.getParam("kls")[0] = 0.2
+    lattice.rebuild()
+    assert np.abs(getOneTurnMatrix(lattice) - changedMatrix).max() > 1.0e-3
+    changedMatrix = getOneTurnMatrix(lattice)
+    lattice.rebuild(onlyChanged=False)
+    assert np.abs(getOneTurnMatrix(lattice) - changedMatrix).max() < 1.0e-14
+    # the node marked as changed with the same parameters
+    matrices = getMatrices(lattice)
+    bend.markDirty()
+    lattice.rebuild()
+    assert np.all(getMatrices(lattice) == matrices)
+
+    # the waveform with the new strength
+    quad = ring.getNodeForName("quad1")
+    waveform = ConstantWaveform(1.0)
+    quad.setWaveform(waveform)
+    lattice.rebuild()
+    oneTurnMatrix = getOneTurnMatrix(lattice)
+    waveform.strength = 1.1
+    lattice.rebuild()
+    assert np.abs(getOneTurnMatrix(lattice) - oneTurnMatrix).max() > 1.0e-3
+    matrices = getMatrices(lattice)
+    lattice.rebuild(onlyChanged=False)
+    assert np.all(getMatrices(lattice) == matrices)
+
+
+def test_rebuild_with_fringe_fields():
+    ring = makeRing(fringe=True)
+    lattice = makeMatrixLattice(ring)
+    oneTurnMatrix = getOneTurnMatrix(lattice)
+    ring.getNodeForName("quad0").setParam("kq", 0.45)
+    lattice.rebuild()
+    changedMatrix = getOneTurnMatrix(lattice)
+    assert np.abs(changedMatrix - oneTurnMatrix).max() > 1.0e-3
+    lattice.rebuild(onlyChanged=False)
+    assert np.abs(getOneTurnMatrix(lattice) - changedMatrix).max() < 1.0e-14
+    # the new energy changes all matrices
+    lattice.rebuild(1.5)
+    assert lattice.getKinEnergy() == 1.5
+    matrices = getMatrices(lattice)
+    lattice.rebuild(onlyChanged=False)
+    assert np.all(getMatrices(lattice) == matrices)
@@ -0,0 +1,58 @@
+# -----------------------------------------------------------
+# The partAttrColumn(name[,index]) method returns the view of
+# one column of the particles' attributes. The name is resolved
+# once, and the values can be read and changed in loops without
+# the per-particle name lookups.
+# -----------------------------------------------------------
+import math
+import pytest
+import numpy as np
+
+from orbit.core.bunch import BunchTuneAnalysis
+from orbit.bunch_utils import ParticleIdNumber
+
+
+def test_attr_column_views(make_gaussian_bunch):
+    b = make_gaussian_bunch(50, seed=11)
+    b.addPartAttr("macrosize")
+    b.addPartAttr("ParticleInitialCoordinates")
+    with b.partAttrColumn("ParticleInitialCoordinates", 3) as col:
+        assert col.shape == (50,)
+        assert col.strides == (b.partAttrArr("ParticleInitialCoordinates").strides[0],)
+        for i in range(50):
+            col[i] = 0.5 * i
+    for i in range(50):
+        assert b.partAttrValue("ParticleInitialCoordinates", i, 3) == 0.5 * i
+        assert b.partAttrValue("ParticleInitialCoordinates", i, 2) == 0.0
+    b.partAttrValue("macrosize", 7, 0, 3.0)
+    assert np.asarray(b.partAttrColumn("macrosize"))[7] == 3.0
+
+    ParticleIdNumber.addParticleIdNumbers(b)
+    assert list(b.partAttrColumn("ParticleIdNumber")) == [float(i) for i in range(50)]
+
+
+def test_tune_analysis_attributes(make_gaussian_bunch):
+    b = make_gaussian_bunch(200, seed=11)
+    (betax, alphax, etax, etapx, betay, alphay) = (10.0, 0.5, 1.0, 0.1, 8.0, -0.3)
+    tune_calc = BunchTuneAnalysis()
+    tune_calc.assignTwiss(betax, alphax, etax, etapx, betay, alphay)
+    tune_calc.analyzeBunch(b)
+    coords = np.array(b)
+    tune_calc.analyzeBunch(b)
+
+    syncPart = b.getSyncParticle()
+    beta = syncPart.beta()
+    dpp = coords[:, 5] / (beta * beta * (syncPart.kinEnergy() + syncPart.mass()))
+    xval = (coords[:, 0] - etax * dpp) / math.sqrt(betax)
+    xpval = (coords[:, 1] - etapx * dpp) * math.sqrt(betax) + xval * alphax
+    xPhase = np.mod(np.arctan2(xpval, xval), 2 * math.pi)
+    xcan = coords[:, 0] - etax * dpp
+    pxcan = coords[:, 1] - etapx * dpp + xcan * alphax / betax
+    xAction = xcan * xcan / betax + pxcan * pxcan * betax
+
+    phase_attr = np.asarray(b.partAttrArr("ParticlePhaseAttributes"))
+    assert np.allclose(phase_attr[:, 0], xPhase, rtol=1.0e-12)
+    # the coordinates were not changed, so the tunes are zero
+    assert np.allclose(phase_attr[:, 2], 0.0, atol=1.0e-12)
+    assert np.allclose(phase_attr[:, 4], xAction, rtol=1.0e-12)
+    del phase_attr
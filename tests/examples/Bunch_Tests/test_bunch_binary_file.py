@@ -0,0 +1,60 @@
+# -----------------------------------------------------------
+# The bunch dumped into a file with the .bin extension is in
+# the binary format. After reading it back all coordinates,
+# particles' attributes, bunch attributes, and the sync.
+# particle parameters should be exactly the same.
+# -----------------------------------------------------------
+import os
+import pytest
+import numpy as np
+
+from orbit.core.bunch import Bunch
+
+
+def setBunchParams(b):
+    """Sets the parameters and the particles' attributes that should be kept in the file."""
+    b.mass(0.93827231)
+    b.charge(-1.0)
+    b.macroSize(1.234567890123e10)
+    b.getSyncParticle().kinEnergy(1.0123456789123)
+    b.getSyncParticle().time(3.3e-7)
+    b.bunchAttrInt("turn", 5)
+    b.addPartAttr("ParticleIdNumber")
+    b.addPartAttr("macrosize")
+    for ind in range(b.getSize()):
+        b.partAttrValue("ParticleIdNumber", ind, 0, ind)
+        b.partAttrValue("macrosize", ind, 0, 1.0e-3 * ind)
+
+
+def test_binary_dump_and_read(tmp_path, make_gaussian_bunch):
+    file_name = os.path.join(str(tmp_path), "bunch.bin")
+    b = make_gaussian_bunch(1003, 1.0)
+    setBunchParams(b)
+    b.deleteParticleFast(7)
+    b.dumpBunch(file_name)
+    assert b.getSize() == 1002
+
+    b_in = Bunch()
+    b_in.readBunch(file_name)
+    assert b_in.getSize() == 1002
+    assert b_in.mass() == b.mass()
+    assert b_in.charge() == b.charge()
+    assert b_in.macroSize() == b.macroSize()
+    assert b_in.bunchAttrInt("turn") == 5
+    assert b_in.getSyncParticle().kinEnergy() == b.getSyncParticle().kinEnergy()
+    assert b_in.getSyncParticle().time() == b.getSyncParticle().time()
+    assert b_in.getPartAttrNames() == b.getPartAttrNames()
+    assert np.array_equal(np.asarray(b_in), np.asarray(b))
+    for name in b.getPartAttrNames():
+        assert np.array_equal(np.asarray(b_in.partAttrArr(name)), np.asarray(b.partAttrArr(name)))
+
+
+def test_binary_read_part_of_bunch(tmp_path, make_gaussian_bunch):
+    file_name = os.path.join(str(tmp_path), "bunch.bin")
+    b = make_gaussian_bunch(100, 1.0)
+    setBunchParams(b)
+    b.dumpBunch(file_name)
+    b_in = Bunch()
+    b_in.readBunch(file_name, 10)
+    assert b_in.getSize() == 10
+    assert np.array_equal(np.asarray(b_in), np.asarray(b)[:10])
@@ -0,0 +1,115 @@
+# -----------------------------------------------------------
+# Zero-copy views of the Bunch memory.
+# The coordinates, flags and particle attributes are exposed
+# through the Python buffer protocol, so numpy arrays can be
+# built on top of them without copying.
+# -----------------------------------------------------------
+import pytest
+import numpy as np
+
+from orbit.core.bunch import Bunch
+
+
+def makeBunch(nParts):
+    b = Bunch()
+    for ind in range(nParts):
+        b.addParticle(ind, ind + 0.1, ind + 0.2, ind + 0.3, ind + 0.4, ind + 0.5)
+    b.addPartAttr("ParticleIdNumber")
+    b.addPartAttr("ParticleInitialCoordinates")
+    for ind in range(nParts):
+        b.partAttrValue("ParticleIdNumber", ind, 0, 100.0 + ind)
+    return b
+
+
+def test_coord_view():
+    b = makeBunch(20)
+    arr = np.asarray(b)
+    assert arr.shape == (20, 6)
+    assert arr.flags["C_CONTIGUOUS"]
+    assert arr[3, 5] == pytest.approx(3.5)
+    arr[:, 0] *= 2.0
+    assert b.x(7) == pytest.approx(14.0)
+    mv = b.coordArr()
+    assert mv.shape == (20, 6)
+    assert mv[7, 0] == pytest.approx(14.0)
+
+
+def test_flag_view_is_read_only():
+    b = makeBunch(10)
+    b.deleteParticleFast(4)
+    flags = np.asarray(b.flagArr())
+    assert flags.shape == (10,)
+    assert not flags.flags.writeable
+    assert flags[4] == 0
+    assert np.count_nonzero(flags) == 9
+
+
+def test_attribute_view():
+    b = makeBunch(10)
+    ids = np.asarray(b.partAttrArr("ParticleIdNumber"))
+    assert ids.shape == (10, 1)
+    assert ids[5, 0] == pytest.approx(105.0)
+    coords = np.asarray(b.partAttrArr("ParticleInitialCoordinates"))
+    assert coords.shape == (10, 6)
+    coords[2, 3] = 7.0
+    assert b.partAttrValue("ParticleInitialCoordinates", 2, 3) == pytest.approx(7.0)
+
+
+def test_compress_keeps_attributes_aligned():
+    b = makeBunch(25)
+    for ind in range(0, 25, 2):
+        b.deleteParticleFast(ind)
+    b.compress()
+    assert b.getSize() == 12
+    arr = np.asarray(b)
+    ids = np.asarray(b.partAttrArr("ParticleIdNumber"))
+    assert np.allclose(arr[:, 0], np.arange(1, 25, 2))
+    assert np.allclose(ids[:, 0], 100.0 + np.arange(1, 25, 2))
+
+
+def test_attributes_change_without_views():
+    b = makeBunch(10)
+    b.removePartAttr("ParticleIdNumber")
+    coords = np.asarray(b.partAttrArr("ParticleInitialCoordinates"))
+    assert coords.shape == (10, 6)
+    # the views must be released before the bunch is re-allocated
+    del coords
+    for ind in range(100):
+        b.addParticle(1.0, 2.0, 3.0, 4.0, 5.0, 6.0)
+    assert np.asarray(b).shape == (110, 6)
+
+
+def test_growth_with_views_raises_buffer_error():
+    b = makeBunch(10)
+    arr = np.asarray(b)
+    view = memoryview(b)
+    # particles are added while there is a free capacity
+    nAdded = 0
+    with pytest.raises(BufferError):
+        for ind in range(100000):
+            b.addParticle(1.0, 2.0, 3.0, 4.0, 5.0, 6.0)
+            nAdded += 1
+    assert nAdded < b.getCapacity()
+    assert b.getSize() == 10 + nAdded
+    with pytest.raises(BufferError):
+        b.addParticles(np.zeros((100000, 6)))
+    with pytest.raises(BufferError):
+        b.addPartAttr("macrosize")
+    with pytest.raises(BufferError):
+        b.removePartAttr("ParticleIdNumber")
+    with pytest.raises(BufferError):
+        Bunch().copyBunchTo(b)
+    # the bunch and the views are not changed
+    assert b.hasPartAttr("ParticleIdNumber") == 1
+    assert b.hasPartAttr("macrosize") == 0
+    assert arr[3, 5] == pytest.approx(3.5)
+    assert view[7, 0] == pytest.approx(7.0)
+    arr[7, 0] = 17.0
+    assert b.x(7) == pytest.approx(17.0)
+    # the memory can be reallocated after the views are released
+    del arr
+    view.release()
+    b.addParticles(np.zeros((100000, 6)))
+    b.addPartAttr("macrosize")
+    assert b.getSize() == 100010 + nAdded
+    assert b.partAttrValue("ParticleIdNumber", 7, 0) == pytest.approx(107.0)
@@ -0,0 +1,74 @@
+# -----------------------------------------------------------
+# The bulk addParticles(...) and deleteParticles(...) methods
+# should give the same bunch as the one particle versions.
+# The deleted particles with their attributes can be moved
+# into the lost bunch.
+# -----------------------------------------------------------
+import pytest
+import numpy as np
+
+from orbit.core.bunch import Bunch
+
+
+def makeBunch(coords, layout=0):
+    b = Bunch()
+    b.coordLayout(layout)
+    b.addPartAttr("ParticleIdNumber")
+    b.addPartAttr("macrosize")
+    b.addParticles(coords)
+    ids = np.asarray(b.partAttrArr("ParticleIdNumber"))
+    ids[:, 0] = np.arange(b.getSize())
+    return b
+
+
+def test_add_particles():
+    coords = np.random.default_rng(3).normal(size=(500, 6))
+    b_ref = Bunch()
+    for ind in range(500):
+        b_ref.addParticle(*coords[ind])
+    b = Bunch()
+    assert b.addParticles(coords[:100]) == 0
+    assert b.addParticles(coords[100:, 0], coords[100:, 1], coords[100:, 2], coords[100:, 3], coords[100:, 4], coords[100:, 5]) == 100
+    b.addParticles([])
+    assert b.getSize() == 500
+    assert np.array_equal(np.asarray(b), np.asarray(b_ref))
+    b.addParticles([[1.0, 2.0, 3.0, 4.0, 5.0, 6.0]])
+    assert b.x(500) == 1.0 and b.pz(500) == 6.0
+
+
+@pytest.mark.parametrize("layout", [0, 1])
+def test_delete_particles_with_lost_bunch(layout):
+    coords = np.random.default_rng(4).normal(size=(300, 6))
+    b = makeBunch(coords, layout)
+    lost = Bunch()
+    lost.addParticle(0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+    mask = np.abs(coords[:, 0]) > 1.0
+    assert b.deleteParticles(mask, lost) == np.count_nonzero(mask)
+    assert b.getSize() == 300 - np.count_nonzero(mask)
+    assert np.array_equal(np.asarray(b), coords[~mask])
+    ids = np.asarray(b.partAttrArr("ParticleIdNumber"))[:, 0]
+    assert np.array_equal(ids, np.arange(300)[~mask])
+    assert lost.getSize() == 1 + np.count_nonzero(mask)
+    assert lost.hasPartAttr("ParticleIdNumber")
+    assert np.array_equal(np.asarray(lost)[1:], coords[mask])
+    lost_ids = np.asarray(lost.partAttrArr("ParticleIdNumber"))[:, 0]
+    assert np.array_equal(lost_ids[1:], np.arange(300)[mask])
+    del ids, lost_ids
+
+    # the particles' indices instead of the mask
+    assert b.deleteParticles([0, 5, 5, 7]) == 3
+    assert np.array_equal(np.asarray(b), np.delete(coords[~mask], [0, 5, 7], axis=0))
+
+
+def test_delete_particles_float32():
+    coords = np.random.default_rng(5).normal(size=(300, 6)).astype(np.float32).astype(np.float64)
+    b = makeBunch(coords)
+    b.coordPrecision(32)
+    n_conversions = b.coordConversions()
+    lost = Bunch()
+    mask = np.abs(coords[:, 0]) > 0.5
+    assert b.deleteParticles(mask, lost) == np.count_nonzero(mask)
+    # the float32 coordinates are copied into the lost bunch without conversion
+    assert b.coordConversions() == n_conversions
+    assert np.array_equal(np.asarray(lost), coords[mask])
+    assert np.array_equal(np.asarray(b), coords[~mask])
@@ -0,0 +1,137 @@
+# -----------------------------------------------------------
+# The Bunch coordinates can be stored as AoS [index][6D]
+# (default) or SoA [6D][index]. The tracking results should
+# be the same for both layouts. The space charge, aperture,
+# diagnostics, RF and impedance nodes work on the SoA copy
+# without transposing the bunch.
+# -----------------------------------------------------------
+import pytest
+import numpy as np
+
+from orbit.core.bunch import Bunch, BunchTwissAnalysis
+from orbit.core.spacecharge import SpaceChargeCalc2p5D
+from orbit.teapot import teapot
+from orbit.space_charge.sc2p5d import scLatticeModifications
+from orbit.aperture import CircleApertureNode
+from orbit.aperture.ApertureLatticeModifications import addTeapotApertureNode
+from orbit.rf_cavities import RFNode, RFLatticeModifications
+from orbit.impedances import LImpedance_Node
+from orbit.impedances.ImpedanceLatticeModifications import addImpedanceNode
+
+
+def makeBunch(nParts, layout):
+    b = Bunch()
+    b.coordLayout(layout)
+    b.getSyncParticle().kinEnergy(1.0)
+    for ind in range(nParts):
+        b.addParticle(1.0e-3 * ind, 1.0e-4 * ind, -1.0e-3 * ind, 2.0e-4, 1.0e-2 * ind, 1.0e-4 * ind)
+    b.addPartAttr("ParticleIdNumber")
+    for ind in range(nParts):
+        b.partAttrValue("ParticleIdNumber", ind, 0, ind)
+    return b
+
+
+def makeLattice():
+    lattice = teapot.TEAPOT_Lattice("lattice")
+    for ind in range(3):
+        drift = teapot.DriftTEAPOT("drift" + str(ind))
+        drift.setLength(1.0)
+        lattice.addNode(drift)
+        quad = teapot.QuadTEAPOT("quad" + str(ind))
+        quad.setLength(0.5)
+        quad.addParam("kq", 0.5 * (-1) ** ind)
+        lattice.addNode(quad)
+    lattice.initialize()
+    return lattice
+
+
+def test_layout_setting():
+    b = makeBunch(5, 1)
+    assert b.coordLayout() == 1
+    b_copy = Bunch()
+    b.copyBunchTo(b_copy)
+    assert b_copy.coordLayout() == 1
+    assert b_copy.x(3) == pytest.approx(3.0e-3)
+    assert b.coordLayout(0) == 0
+    assert b.x(3) == pytest.approx(3.0e-3)
+
+
+def test_tracking_is_the_same_for_both_layouts():
+    lattice = makeLattice()
+    b_aos = makeBunch(57, 0)
+    b_soa = makeBunch(57, 1)
+    for b in (b_aos, b_soa):
+        for ind in range(0, 57, 3):
+            b.deleteParticleFast(ind)
+        b.compress()
+        lattice.trackBunch(b)
+        for ind in range(100):
+            b.addParticle(1.0, 2.0, 3.0, 4.0, 5.0, 6.0)
+    assert b_soa.getSize() == b_aos.getSize() == 138
+    assert np.array_equal(np.asarray(b_aos), np.asarray(b_soa))
+    ids_aos = np.asarray(b_aos.partAttrArr("ParticleIdNumber"))
+    ids_soa = np.asarray(b_soa.partAttrArr("ParticleIdNumber"))
+    assert np.array_equal(ids_aos, ids_soa)
+
+
+def test_soa_tracking_with_exported_view():
+    lattice = makeLattice()
+    b_aos = makeBunch(20, 0)
+    b_soa = makeBunch(20, 1)
+    arr = np.asarray(b_soa)
+    lattice.trackBunch(b_aos)
+    lattice.trackBunch(b_soa)
+    assert np.array_equal(np.asarray(b_aos), arr)
+
+
+def makeCollectiveLattice():
+    lattice = makeLattice()
+    addTeapotApertureNode(lattice, 0.5, CircleApertureNode(0.05, 0.5))
+    rf_node = RFNode.Harmonic_RFNode(0.05, 0.0, 1.0, 1.0e-5, 0.0, 0.0)
+    RFLatticeModifications.addRFNode(lattice, 2.0, rf_node)
+    impedance_node = LImpedance_Node(lattice.getLength(), 100, 32)
+    impedance_node.assignImpedance([complex(100.0, 10.0)] * 10)
+    addImpedanceNode(lattice, 3.5, impedance_node)
+    calc = SpaceChargeCalc2p5D(64, 64, 10)
+    scLatticeModifications.setSC2p5DAccNodes(lattice, 1.0, calc)
+    return lattice
+
+
+def trackWithCollectiveNodes(layout):
+    lattice = makeCollectiveLattice()
+    b = Bunch()
+    b.coordLayout(layout)
+    b.getSyncParticle().kinEnergy(1.0)
+    b.macroSize(1.0e7)
+    coords = np.random.default_rng(7).normal(size=(5000, 6))
+    b.addParticles(coords * [1.0e-3, 1.0e-4, 1.0e-3, 1.0e-4, 1.0, 1.0e-4])
+    params = {"lostbunch": Bunch()}
+    twiss = BunchTwissAnalysis()
+    lattice.trackBunch(b, params)
+    n_conversions = b.coordConversions()
+    for turn in range(3):
+        lattice.trackBunch(b, params)
+        twiss.analyzeBunch(b)
+    return b, b.coordConversions() - n_conversions
+
+
+def test_soa_collective_nodes_without_transpositions():
+    b_aos, n_conv_aos = trackWithCollectiveNodes(0)
+    b_soa, n_conv_soa = trackWithCollectiveNodes(1)
+    assert n_conv_aos == 0
+    assert n_conv_soa == 0
+    assert b_soa.getSize() == b_aos.getSize()
+    assert np.array_equal(np.asarray(b_aos), np.asarray(b_soa))
+
+
+def test_soa_layout_switching_count(capfd):
+    lattice = makeLattice()
+    b = makeBunch(20, 1)
+    assert b.coordToAoSConversions() == 0
+    for ind in range(10):
+        lattice.trackBunch(b)
+        np.asarray(b)
+    # every coordinates export after the SoA tracking is a transposition
+    assert b.coordToAoSConversions() == 10
+    # the library does not print the advice, it is left to the caller
+    assert capfd.readouterr().err == ""
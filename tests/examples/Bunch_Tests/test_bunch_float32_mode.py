@@ -0,0 +1,196 @@
+# -----------------------------------------------------------
+# The Bunch coordinates can be stored as float32 to halve the
+# memory. The TEAPOT and linac kernels do the arithmetic in
+# double and round the results to float32, so the difference
+# with the double tracking is defined by the float32 rounding
+# of the coordinates after each kernel (relative error ~6e-8
+# per kernel). The accuracy test tracks a FODO ring with bends
+# and sextupoles (about 50 kernel calls per turn). The maximal
+# difference in units of the rms beam size is below 1e-5 after
+# one turn. It grows linearly with the number of turns because
+# of the betatron and synchrotron phase slip of the particles,
+# and after 200 turns it is below 5e-4 for the transverse and
+# below 5e-3 for the longitudinal coordinates.
+# The space charge, aperture, and diagnostics nodes read and
+# kick the float32 coordinates directly, so the ring with
+# these nodes is tracked without any conversion to double.
+# -----------------------------------------------------------
+import math
+import time
+
+import pytest
+import numpy as np
+
+from orbit.core.bunch import Bunch, BunchTwissAnalysis
+from orbit.core.linac import linac_tracking
+from orbit.core.spacecharge import SpaceChargeCalc2p5D
+from orbit.bunch_utils import ParticleIdNumber
+from orbit.teapot import teapot
+from orbit.space_charge.sc2p5d import scLatticeModifications
+from orbit.aperture import CircleApertureNode
+from orbit.aperture.ApertureLatticeModifications import addTeapotApertureNode
+
+
+# the rms sizes of the bunch coordinates
+SCALES = [1.0e-3, 1.0e-4, 1.0e-3, 1.0e-4, 1.0, 1.0e-4]
+
+
+def setPrecision(b, bits):
+    """Sets the precision of the bunch with the numbered particles and the float32 coordinates."""
+    # the same initial coordinates for both precisions
+    arr = np.asarray(b)
+    arr[:] = arr.astype(np.float32)
+    del arr
+    ParticleIdNumber.addParticleIdNumbers(b)
+    b.coordPrecision(bits)
+
+
+def makeRing(nCells=8):
+    lattice = teapot.TEAPOT_Ring("ring")
+    for ind in range(nCells):
+        for name, kq in (("qf", 0.6), ("qd", -0.6)):
+            quad = teapot.QuadTEAPOT(name + str(ind))
+            quad.setLength(0.5)
+            quad.addParam("kq", kq)
+            lattice.addNode(quad)
+            drift = teapot.DriftTEAPOT("drift_" + name + str(ind))
+            drift.setLength(1.0)
+            lattice.addNode(drift)
+            bend = teapot.BendTEAPOT("bend_" + name + str(ind))
+            bend.setLength(1.5)
+            bend.addParam("theta", math.pi / (2 * nCells))
+            lattice.addNode(bend)
+            sext = teapot.MultipoleTEAPOT("sext_" + name + str(ind))
+            sext.setLength(0.0)
+            sext.setParam("poles", [2])
+            sext.setParam("kls", [0.5 * kq])
+            sext.setParam("skews", [0])
+            lattice.addNode(sext)
+    lattice.initialize()
+    return lattice
+
+
+def test_precision_setting(make_gaussian_bunch):
+    b = make_gaussian_bunch(10, SCALES, seed=7)
+    setPrecision(b, 64)
+    x3 = b.x(3)
+    assert b.coordPrecision() == 64
+    assert b.coordPrecision(32) == 32
+    assert b.x(3) == float(np.float32(x3))
+    b_copy = Bunch()
+    b.copyBunchTo(b_copy)
+    assert b_copy.coordPrecision() == 32
+    assert b_copy.x(3) == b.x(3)
+    assert b.coordPrecision(64) == 64
+    assert b.x(3) == float(np.float32(x3))
+
+
+def test_float32_teapot_tracking_accuracy(make_gaussian_bunch):
+    lattice = makeRing()
+    b64 = make_gaussian_bunch(500, SCALES, seed=7)
+    setPrecision(b64, 64)
+    b32 = make_gaussian_bunch(500, SCALES, seed=7)
+    setPrecision(b32, 32)
+    for turn in range(200):
+        lattice.trackBunch(b64)
+        lattice.trackBunch(b32)
+        if turn == 0:
+            diff = np.abs(np.asarray(b32) - np.asarray(b64)).max(axis=0) / np.asarray(b64).std(axis=0)
+            assert np.all(diff < 1.0e-5)
+    assert b32.coordPrecision() == 32
+    arr64 = np.asarray(b64)
+    arr32 = np.asarray(b32)
+    diff = np.abs(arr32 - arr64).max(axis=0) / arr64.std(axis=0)
+    assert np.all(diff[:4] < 5.0e-4)
+    assert diff[4] < 5.0e-3
+    assert diff[5] < 1.0e-5
+    assert b32.getSyncParticle().time() == b64.getSyncParticle().time()
+
+
+def test_float32_linac_tracking_accuracy(make_gaussian_bunch):
+    b64 = make_gaussian_bunch(500, SCALES, seed=7)
+    setPrecision(b64, 64)
+    b32 = make_gaussian_bunch(500, SCALES, seed=7)
+    setPrecision(b32, 32)
+    for b in (b64, b32):
+        for ind in range(100):
+            linac_tracking.quad1(b, 0.1, 5.0 * (-1) ** ind)
+            linac_tracking.drift(b, 0.3)
+            linac_tracking.kick(b, 1.0e-6, -1.0e-6, 1.0e-6)
+    arr64 = np.asarray(b64)
+    arr32 = np.asarray(b32)
+    diff = np.abs(arr32 - arr64).max(axis=0) / arr64.std(axis=0)
+    assert np.all(diff < 1.0e-5)
+
+
+def test_float32_bunch_operations(make_gaussian_bunch):
+    lattice = makeRing(2)
+    b64 = make_gaussian_bunch(57, SCALES, seed=7)
+    setPrecision(b64, 64)
+    b32 = make_gaussian_bunch(57, SCALES, seed=7)
+    setPrecision(b32, 32)
+    for b in (b64, b32):
+        for ind in range(0, 57, 3):
+            b.deleteParticleFast(ind)
+        b.compress()
+        lattice.trackBunch(b)
+        for ind in range(10):
+            b.addParticle(1.0e-3, 0.0, 0.0, 0.0, 0.0, 0.0)
+        lattice.trackBunch(b)
+    assert b32.getSize() == b64.getSize() == 48
+    # the deletion, compression, and new particles keep the float32 storage
+    assert b32.coordConversions() == 1
+    assert np.allclose(np.asarray(b32), np.asarray(b64), rtol=0.0, atol=1.0e-6)
+    ids32 = np.asarray(b32.partAttrArr("ParticleIdNumber"))
+    ids64 = np.asarray(b64.partAttrArr("ParticleIdNumber"))
+    assert np.array_equal(ids32, ids64)
+    del ids32, ids64
+
+    # the exported coordinates stay double, and the tracking uses them
+    arr = np.asarray(b32)
+    x0 = arr[0, 0]
+    lattice.trackBunch(b32)
+    lattice.trackBunch(b64)
+    assert arr[0, 0] != x0
+    assert arr[0, 0] == b32.x(0)
+    del arr
+    lattice.trackBunch(b32)
+    assert b32.x(0) == float(np.float32(b32.x(0)))
+
+
+def trackRingWithSpaceCharge(b, nTurns):
+    lattice = makeRing()
+    addTeapotApertureNode(lattice, 1.0, CircleApertureNode(0.01, 1.0))
+    calc = SpaceChargeCalc2p5D(64, 64, 10)
+    scLatticeModifications.setSC2p5DAccNodes(lattice, 2.0, calc)
+    b.macroSize(1.0e7)
+    params = {"lostbunch": Bunch()}
+    twiss = BunchTwissAnalysis()
+    lattice.trackBunch(b, params)
+    n_conversions = b.coordConversions()
+    time_start = time.perf_counter()
+    for turn in range(nTurns):
+        lattice.trackBunch(b, params)
+        b.ringwrap(1000.0)
+        twiss.analyzeBunch(b)
+        twiss.computeBunchMoments(b, 2, 0, 0)
+    time_tracking = time.perf_counter() - time_start
+    return b, b.coordConversions() - n_conversions, time_tracking
+
+
+def test_float32_space_charge_ring_without_conversions(make_gaussian_bunch):
+    b64 = make_gaussian_bunch(50000, SCALES, seed=7)
+    setPrecision(b64, 64)
+    b32 = make_gaussian_bunch(50000, SCALES, seed=7)
+    setPrecision(b32, 32)
+    b64, n_conv64, time64 = trackRingWithSpaceCharge(b64, 3)
+    b32, n_conv32, time32 = trackRingWithSpaceCharge(b32, 3)
+    # each conversion would allocate the double arrays for the whole bunch
+    assert n_conv32 == 0
+    assert n_conv64 == 0
+    assert b32.coordPrecision() == 32
+    assert b32.getSize() == b64.getSize()
+    # the float32 coordinates do not slow down the space charge nodes
+    assert time32 < 1.5 * time64 + 0.1
+    diff = np.abs(np.asarray(b32) - np.asarray(b64)) / np.asarray(b64).std(axis=0)
+    assert np.all(np.median(diff, axis=0) < 1.0e-2)
@@ -0,0 +1,68 @@
+# -----------------------------------------------------------
+# The Bunch coordinates and particles' attributes can be kept
+# in the memory-mapped binary bunch file. After syncMappedFile()
+# the file is a snapshot of the bunch that can be read by
+# readBunch(...) or mapped again by mapFromFile(...).
+# -----------------------------------------------------------
+import os
+import pytest
+import numpy as np
+
+from orbit.core.bunch import Bunch
+from orbit.bunch_utils import ParticleIdNumber
+from orbit.teapot import teapot
+
+
+def makeLattice():
+    lattice = teapot.TEAPOT_Lattice("lattice")
+    for ind in range(2):
+        drift = teapot.DriftTEAPOT("drift" + str(ind))
+        drift.setLength(1.0)
+        lattice.addNode(drift)
+        quad = teapot.QuadTEAPOT("quad" + str(ind))
+        quad.setLength(0.5)
+        quad.addParam("kq", 0.5 * (-1) ** ind)
+        lattice.addNode(quad)
+    lattice.initialize()
+    return lattice
+
+
+def test_mapped_bunch_tracking_and_snapshot(tmp_path, make_gaussian_bunch):
+    file_name = os.path.join(str(tmp_path), "bunch_map.bin")
+    lattice = makeLattice()
+    b_ref = make_gaussian_bunch(200, seed=2)
+    b = make_gaussian_bunch(200, seed=2)
+    for bunch in (b_ref, b):
+        bunch.bunchAttrInt("turn", 3)
+        ParticleIdNumber.addParticleIdNumbers(bunch)
+    b.mapToFile(file_name)
+    assert b.mappedFileName() == file_name
+    assert os.path.exists(file_name)
+
+    # the file is re-created with the larger capacity
+    for b_tmp in (b_ref, b):
+        for ind in range(1000):
+            b_tmp.addParticle(1.0e-3, 0.0, -1.0e-3, 0.0, 0.0, 0.0)
+        b_tmp.addPartAttr("macrosize")
+        lattice.trackBunch(b_tmp)
+    assert np.array_equal(np.asarray(b), np.asarray(b_ref))
+    b.syncMappedFile()
+
+    b_map = Bunch()
+    assert b_map.mapFromFile(file_name) == 1200
+    assert b_map.bunchAttrInt("turn") == 3
+    assert b_map.getPartAttrNames() == b.getPartAttrNames()
+    assert np.array_equal(np.asarray(b_map), np.asarray(b_ref))
+    ids = np.asarray(b_map.partAttrArr("ParticleIdNumber"))
+    assert np.array_equal(ids, np.asarray(b_ref.partAttrArr("ParticleIdNumber")))
+    del ids
+
+    b_in = Bunch()
+    b_in.readBunch(file_name)
+    assert np.array_equal(np.asarray(b_in), np.asarray(b_ref))
+
+    b.unmapFile()
+    assert b.mappedFileName() is None
+    lattice.trackBunch(b)
+    lattice.trackBunch(b_ref)
+    assert np.array_equal(np.asarray(b), np.asarray(b_ref))
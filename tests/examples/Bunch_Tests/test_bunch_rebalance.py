@@ -0,0 +1,117 @@
+# -----------------------------------------------------------
+# The rebalance(tolerance) method moves macro-particles between
+# CPUs to equalize their numbers. The order of particles over
+# CPUs is preserved. On one CPU the bunch is not changed.
+# The BunchRebalanceTEAPOT node calls it every nTurns turns.
+# The test with several CPUs runs with MPI only:
+# mpirun -np 3 python -m pytest test_bunch_rebalance.py
+# -----------------------------------------------------------
+import pytest
+import numpy as np
+
+from orbit.core import orbit_mpi
+from orbit.core.orbit_mpi import mpi_comm, mpi_datatype, mpi_op
+from orbit.bunch_utils import ParticleIdNumber
+from orbit.teapot import teapot
+
+comm = mpi_comm.MPI_COMM_WORLD
+rank = orbit_mpi.MPI_Comm_rank(comm)
+size = orbit_mpi.MPI_Comm_size(comm)
+
+
+def gatherGlobal(arr, start, nTotal):
+    """
+    Returns the global array with the local arrays of all CPUs in the order of ranks.
+    """
+    arr = np.asarray(arr, dtype=float)
+    arr_global = np.zeros((nTotal,) + arr.shape[1:])
+    arr_global[start : start + len(arr)] = arr
+    arr_global = orbit_mpi.MPI_Allreduce(arr_global.ravel().tolist(), mpi_datatype.MPI_DOUBLE, mpi_op.MPI_SUM, comm)
+    return np.array(arr_global).reshape((nTotal,) + arr.shape[1:])
+
+
+def getStarts(nLocal):
+    """
+    Returns the start indexes of the local slices of all CPUs in the global array.
+    """
+    nSizes = [0] * size
+    nSizes[rank] = nLocal
+    nSizes = orbit_mpi.MPI_Allreduce(nSizes, mpi_datatype.MPI_INT, mpi_op.MPI_SUM, comm)
+    return np.concatenate(([0], np.cumsum(nSizes))).astype(int)
+
+
+@pytest.mark.skipif(size > 1, reason="the bunch is the same only on one CPU")
+def test_rebalance_one_cpu(make_gaussian_bunch):
+    b = make_gaussian_bunch(100, seed=5)
+    ParticleIdNumber.addParticleIdNumbers(b)
+    b.deleteParticleFast(3)
+    assert b.rebalance() == 0
+    assert b.rebalance(0.0) == 0
+    assert b.getSize() == 99
+    ids = np.asarray(b.partAttrArr("ParticleIdNumber"))[:, 0]
+    assert np.array_equal(ids, np.delete(np.arange(100), 3))
+
+
+def test_rebalance_node(make_gaussian_bunch):
+    ring = teapot.TEAPOT_Ring("ring")
+    drift = teapot.DriftTEAPOT("drift")
+    drift.setLength(1.0)
+    ring.addNode(drift)
+    ring.initialize()
+    node = ring.addBunchRebalanceNode(nTurns=2, tolerance=0.05)
+    assert isinstance(node, teapot.BunchRebalanceTEAPOT)
+    assert ring.getNodes()[-1] is node
+
+    b = make_gaussian_bunch(50, seed=5)
+    b_ref = make_gaussian_bunch(50, seed=5)
+    for turn in range(5):
+        ring.trackBunch(b)
+        drift.trackBunch(b_ref)
+    assert node.getParam("count") == 5
+    assert np.array_equal(np.asarray(b), np.asarray(b_ref))
+    assert node.getCheckpointState() == 5
+    node.setCheckpointState(0)
+    assert node.getParam("count") == 0
+
+
+@pytest.mark.skipif(size < 2, reason="needs several CPUs, run with mpirun")
+def test_rebalance_mpi(make_gaussian_bunch):
+    # the CPU 0 has twice as many particles as the others
+    nParts = 60 if rank == 0 else 30
+    b = make_gaussian_bunch(nParts, seed=5 + rank)
+    b.addPartAttr("ParticleIdNumber")
+    b.addPartAttr("ParticleInitialCoordinates")
+    coords = np.array(b)
+    starts = getStarts(nParts)
+    nTotal = starts[-1]
+    with b.partAttrColumn("ParticleIdNumber") as ids:
+        np.asarray(ids)[:] = starts[rank] + np.arange(nParts)
+    for j in range(6):
+        with b.partAttrColumn("ParticleInitialCoordinates", j) as init_coords:
+            np.asarray(init_coords)[:] = coords[:, j]
+    coords_global = gatherGlobal(coords, starts[rank], nTotal)
+
+    # the imbalance is (2 * size / (size + 1) - 1), it is below the tolerance
+    imbalance = 2.0 * size / (size + 1) - 1.0
+    assert b.rebalance(imbalance + 0.01) == 0
+    assert b.getSize() == nParts
+
+    # the particles are moved, the number of moved particles is the same on all CPUs
+    nMoved = b.rebalance(imbalance - 0.01)
+    nNew = [nTotal // size + (1 if i < nTotal % size else 0) for i in range(size)]
+    newStarts = np.concatenate(([0], np.cumsum(nNew)))
+    nKept = sum([max(0, min(starts[i + 1], newStarts[i + 1]) - max(starts[i], newStarts[i])) for i in range(size)])
+    assert nMoved == nTotal - nKept
+    assert b.getSize() == nNew[rank]
+
+    # the particles and their attributes are conserved in the same global order
+    assert b.getSizeGlobal() == nTotal
+    ids = np.asarray(b.partAttrColumn("ParticleIdNumber")).copy()
+    assert np.array_equal(gatherGlobal(ids, newStarts[rank], nTotal), np.arange(nTotal))
+    assert np.array_equal(gatherGlobal(np.array(b), newStarts[rank], nTotal), coords_global)
+    init_coords = np.array([np.asarray(b.partAttrColumn("ParticleInitialCoordinates", j)) for j in range(6)]).T
+    assert np.array_equal(init_coords, np.array(b))
+
+    # the balanced bunch is not changed
+    assert b.rebalance(0.0) == 0
+    assert b.getSize() == nNew[rank]
@@ -0,0 +1,145 @@
+# -----------------------------------------------------------
+# The bunch statistics (count, macro-size, averages, second
+# moments, and extrema) are calculated in one pass over the
+# particles and one MPI reduction. The result is kept by the
+# bunch and calculated again only if the particles could be
+# changed. The BunchTwissAnalysis, BunchExtremaCalculator, and
+# space charge calculators use the same statistics.
+# -----------------------------------------------------------
+import numpy as np
+
+from orbit.core.bunch import Bunch, BunchTwissAnalysis
+from orbit.core.orbit_utils import BunchExtremaCalculator
+from orbit.core import teapot_base
+from orbit.core.spacecharge import Grid2D
+from orbit.teapot import teapot
+
+# the rms sizes and the centroid of the bunch coordinates
+SCALES = [1.0e-3, 1.0e-4, 2.0e-3, 2.0e-4, 1.0, 1.0e-4]
+CENTROID = [1.0e-4, 0.0, -2.0e-4, 0.0, 0.1, 0.0]
+
+
+def checkStatistics(stats, coords, weights):
+    avg = np.average(coords, axis=0, weights=weights)
+    moments = np.einsum("ki,kj,k->ij", coords, coords, weights) / weights.sum()
+    assert stats["count"] == coords.shape[0]
+    assert np.isclose(stats["weight"], weights.sum(), rtol=1.0e-14)
+    assert np.allclose(stats["avg"], avg, rtol=1.0e-12, atol=0.0)
+    assert np.allclose(stats["moments"], moments, rtol=1.0e-12, atol=0.0)
+    assert np.array_equal(stats["min"], coords.min(axis=0))
+    assert np.array_equal(stats["max"], coords.max(axis=0))
+
+
+def test_statistics_values(make_gaussian_bunch):
+    b = make_gaussian_bunch(1000, SCALES, seed=11)
+    np.asarray(b)[:] += CENTROID
+    coords = np.array(b)
+    b.macroSize(1.0e8)
+    stats = b.getStatistics()
+    checkStatistics(stats, coords, np.ones(1000))
+    assert np.isclose(stats["macrosize"], 1000 * 1.0e8)
+
+    # the particles' macro-sizes are used as weights
+    b.addPartAttr("macrosize")
+    weights = np.linspace(1.0, 2.0, 1000)
+    with b.partAttrColumn("macrosize") as msize:
+        for ind in range(1000):
+            msize[ind] = weights[ind]
+    stats = b.getStatistics()
+    checkStatistics(stats, coords, weights)
+    assert np.isclose(stats["macrosize"], weights.sum())
+
+    # the same values for the SoA layout and the float32 coordinates
+    b.removePartAttr("macrosize")
+    b.coordLayout(1)
+    # the zero length drift activates the SoA copy of the coordinates
+    teapot_base.drift(b, 0.0)
+    checkStatistics(b.getStatistics(), coords, np.ones(1000))
+    b.coordLayout(0)
+    b.coordPrecision(32)
+    coords32 = coords.astype(np.float32).astype(np.float64)
+    checkStatistics(b.getStatistics(), coords32, np.ones(1000))
+
+    # the empty bunch
+    stats = Bunch().getStatistics()
+    assert stats["count"] == 0
+    assert stats["avg"] == (0.0,) * 6
+    assert stats["min"][0] > stats["max"][0]
+
+
+def test_statistics_cache(make_gaussian_bunch):
+    b = make_gaussian_bunch(100, SCALES, seed=11)
+    np.asarray(b)[:] += CENTROID
+    coords = np.array(b)
+    nPasses = b.getStatistics()["nPasses"]
+    assert b.getStatistics()["nPasses"] == nPasses
+    assert b.getSize() == 100
+    assert b.getStatistics()["nPasses"] == nPasses
+
+    # the binning only reads the coordinates
+    grid2d = Grid2D(16, 16)
+    grid2d.setGridX(-3.0, 3.0)
+    grid2d.setGridY(-3.0, 3.0)
+    grid2d.binBunch(b)
+    assert b.getStatistics()["nPasses"] == nPasses
+
+    # the changes of the coordinates, particles, and attributes invalidate the result
+    changes = [
+        lambda: b.x(5, 1.0),
+        lambda: b.deleteParticle(3),
+        lambda: b.addParticle(0.0, 0.0, 0.0, 0.0, 0.0, 0.0),
+        lambda: b.addPartAttr("macrosize"),
+        lambda: b.partAttrValue("macrosize", 7, 0, 3.0),
+        lambda: b.macroSize(2.0),
+    ]
+    for change in changes:
+        change()
+        stats = b.getStatistics()
+        nPasses += 1
+        assert stats["nPasses"] == nPasses
+    assert stats["count"] == 100
+    assert stats["max"][0] == 1.0
+    # the new macrosize attributes are zeros
+    assert stats["weight"] == 3.0
+    # the binning reads the macrosizes without changing them
+    grid2d.binBunch(b)
+    assert b.getStatistics()["nPasses"] == nPasses
+
+    # the exported memory can be changed at any time
+    arr = np.asarray(b)
+    b.getStatistics()
+    arr[0, 0] = 2.0
+    assert b.getStatistics()["max"][0] == 2.0
+    del arr
+
+    # the tracking changes the coordinates
+    lattice = teapot.TEAPOT_Lattice("line")
+    drift = teapot.DriftTEAPOT("drift")
+    drift.setLength(1.0)
+    lattice.addNode(drift)
+    lattice.initialize()
+    nPasses = b.getStatistics()["nPasses"]
+    lattice.trackBunch(b)
+    assert b.getStatistics()["nPasses"] == nPasses + 1
+    assert b.getStatistics()["nReductions"] == 0
+
+
+def test_statistics_users(make_gaussian_bunch):
+    b = make_gaussian_bunch(500, SCALES, seed=11)
+    np.asarray(b)[:] += CENTROID
+    coords = np.array(b)
+    stats = b.getStatistics()
+    twiss = BunchTwissAnalysis()
+    twiss.analyzeBunch(b)
+    assert twiss.getGlobalCount() == 500
+    for i in range(6):
+        assert twiss.getAverage(i) == stats["avg"][i]
+        for j in range(6):
+            corr = stats["moments"][i][j] - stats["avg"][i] * stats["avg"][j]
+            assert twiss.getCorrelation(i, j) == corr
+    extrema = BunchExtremaCalculator()
+    (xMin, xMax, yMin, yMax, zMin, zMax) = extrema.extremaXYZ(b)
+    assert (xMin, yMin, zMin) == (stats["min"][0], stats["min"][2], stats["min"][4])
+    assert (xMax, yMax, zMax) == (stats["max"][0], stats["max"][2], stats["max"][4])
+    # nothing was changed, so all users shared one calculation
+    assert b.getStatistics()["nPasses"] == stats["nPasses"]
@@ -0,0 +1,100 @@
+# -----------------------------------------------------------
+# The ring tracking with injection and foil scattering uses
+# Python and C++ random generators. The tracking continued
+# after the restart from the checkpoint should give exactly
+# the same bunch and lost bunch as the uninterrupted run.
+# -----------------------------------------------------------
+import random
+import pytest
+import numpy as np
+
+from orbit.core.bunch import Bunch
+from orbit.core.orbit_utils import random as orbit_random
+from orbit.teapot import teapot
+from orbit.foils import TeapotFoilNode
+from orbit.injection import TeapotInjectionNode, JohoTransverse, UniformLongDistPaint
+
+
+def makeBunches():
+    bunch = Bunch()
+    bunch.mass(0.93827231)
+    bunch.macroSize(1.0e10)
+    bunch.getSyncParticle().kinEnergy(1.0)
+    bunch.bunchAttrInt("TurnNumber", 0)
+    bunch.addPartAttr("ParticleIdNumber")
+    lostbunch = Bunch()
+    lostbunch.addPartAttr("LostParticleAttributes")
+    return (bunch, lostbunch)
+
+
+def makeRing(bunch, lostbunch):
+    ring = teapot.TEAPOT_Ring("ring")
+    for ind in range(4):
+        drift = teapot.DriftTEAPOT("drift" + str(ind))
+        drift.setLength(2.0)
+        ring.addNode(drift)
+        quad = teapot.QuadTEAPOT("quad" + str(ind))
+        quad.setLength(0.5)
+        quad.addParam("kq", 0.3 * (-1) ** ind)
+        ring.addNode(quad)
+    xDist = JohoTransverse(2.0, 0.0, 10.0, 1.0e-5, 0.002)
+    yDist = JohoTransverse(2.0, 0.0, 10.0, 1.0e-5, -0.002)
+    zminFunc = [[0.0, -5.0], [1.0e-3, -4.0]]
+    zmaxFunc = [[0.0, 5.0], [1.0e-3, 6.0]]
+    lDist = UniformLongDistPaint(zminFunc, zmaxFunc, bunch.getSyncParticle(), 0.0, 0.001)
+    injectregion = (-0.05, 0.05, -0.05, 0.05)
+    injection = TeapotInjectionNode(40, bunch, lostbunch, injectregion, xDist, yDist, lDist, name="injection")
+    ring.addNode(injection, 0)
+    foil = TeapotFoilNode(-0.05, 0.05, -0.05, 0.05, 400.0, "foil")
+    ring.addNode(foil, 1)
+    ring.addNode(teapot.TurnCounterTEAPOT())
+    ring.initialize()
+    return ring
+
+
+def trackTurns(ring, bunch, lostbunch, nTurns):
+    paramsDict = {"lostbunch": lostbunch}
+    for turn in range(nTurns):
+        ring.trackBunch(bunch, paramsDict)
+
+
+@pytest.fixture
+def restore_random_states():
+    # the seeds below must not leak into the other tests of the session
+    py_state = random.getstate()
+    orbit_state = orbit_random.getState()
+    try:
+        yield
+    finally:
+        random.setstate(py_state)
+        orbit_random.setState(orbit_state)
+
+
+def test_restart_is_bitwise_identical(tmp_path, restore_random_states):
+    random.seed(10)
+    orbit_random.seed(20)
+    (bunch, lostbunch) = makeBunches()
+    ring = makeRing(bunch, lostbunch)
+    trackTurns(ring, bunch, lostbunch, 3)
+    ring.saveCheckpoint(str(tmp_path), bunch, lostbunch, {"turn": 3})
+    trackTurns(ring, bunch, lostbunch, 4)
+
+    # the new script starts with other random seeds
+    random.seed(1)
+    orbit_random.seed(2)
+    (bunch_rst, lostbunch_rst) = makeBunches()
+    ring_rst = makeRing(bunch_rst, lostbunch_rst)
+    user_state = ring_rst.loadCheckpoint(str(tmp_path), bunch_rst, lostbunch_rst)
+    assert user_state == {"turn": 3}
+    assert bunch_rst.bunchAttrInt("TurnNumber") == 3
+    trackTurns(ring_rst, bunch_rst, lostbunch_rst, 4)
+
+    assert bunch.bunchAttrInt("TurnNumber") == bunch_rst.bunchAttrInt("TurnNumber") == 7
+    assert bunch.getSize() == bunch_rst.getSize() > 0
+    assert np.array_equal(np.asarray(bunch), np.asarray(bunch_rst))
+    ids = np.asarray(bunch.partAttrArr("ParticleIdNumber"))
+    ids_rst = np.asarray(bunch_rst.partAttrArr("ParticleIdNumber"))
+    assert np.array_equal(ids, ids_rst)
+    assert lostbunch.getSize() == lostbunch_rst.getSize()
+    assert np.array_equal(np.asarray(lostbunch), np.asarray(lostbunch_rst))
+    assert bunch.getSyncParticle().time() == bunch_rst.getSyncParticle().time()
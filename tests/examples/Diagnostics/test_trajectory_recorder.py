@@ -0,0 +1,75 @@
+# -----------------------------------------------------------
+# The TeapotTrajectoryRecorderNode records the coordinates of
+# the particles with the selected ParticleIdNumber values turn
+# by turn and writes them to the binary file in batches. The
+# particles are found again after they were lost or reordered.
+# -----------------------------------------------------------
+import os
+
+import numpy as np
+
+from orbit.bunch_utils import ParticleIdNumber
+from orbit.teapot import teapot
+from orbit.diagnostics import TeapotTrajectoryRecorderNode, readTrajectoryFile
+
+script_dir = os.path.dirname(__file__)
+
+
+def makeRing(recorder):
+    lattice = teapot.TEAPOT_Ring("ring")
+    for ind in range(4):
+        quad = teapot.QuadTEAPOT("quad" + str(ind))
+        quad.setLength(0.5)
+        quad.addParam("kq", 0.5 * (-1) ** ind)
+        lattice.addNode(quad)
+        drift = teapot.DriftTEAPOT("drift" + str(ind))
+        drift.setLength(2.0)
+        lattice.addNode(drift)
+    lattice.addNode(recorder)
+    lattice.initialize()
+    return lattice
+
+
+def getCoords(b, partId):
+    ids = list(b.partAttrColumn("ParticleIdNumber"))
+    if float(partId) not in ids:
+        return None
+    ind = ids.index(float(partId))
+    return (b.x(ind), b.xp(ind), b.y(ind), b.yp(ind), b.z(ind), b.dE(ind))
+
+
+def test_trajectory_recorder(make_gaussian_bunch):
+    fileName = os.path.join(script_dir, "trajectories.trj")
+    partIds = [3, 10, 500, 999, 2000]
+    recorder = TeapotTrajectoryRecorderNode(fileName, partIds, batchSize=10)
+    lattice = makeRing(recorder)
+    b = make_gaussian_bunch(1000, seed=5)
+    ParticleIdNumber.addParticleIdNumbers(b)
+    assert recorder.getParticleIds() == tuple(partIds)
+
+    expected = {}
+    for turn in range(25):
+        if turn == 8:
+            # particle 10 is lost
+            mask = np.asarray(b.partAttrColumn("ParticleIdNumber")) == 10.0
+            b.deleteParticles(mask)
+        if turn == 15:
+            b.reorderParticles(list(range(b.getSize() - 1, -1, -1)))
+        lattice.trackBunch(b)
+        for partId in partIds:
+            coords = getCoords(b, partId)
+            if coords is not None:
+                expected.setdefault(partId, []).append((turn, coords))
+    # 2 batches are in the file, the rest is in the buffer
+    assert recorder.recorder.getNumberOfRecordsInFile() == 20 * 3 + 8
+    recorder.close()
+    assert recorder.recorder.getNumberOfRecordsInFile() == 25 * 3 + 8
+    # the bunch was scanned at the first turn, after the loss and after the reordering
+    assert recorder.recorder.getNumberOfScans() == 3
+
+    trajectories = readTrajectoryFile(fileName)
+    assert sorted(trajectories.keys()) == [3, 10, 500, 999]
+    assert len(trajectories[10]) == 8
+    for partId in trajectories:
+        assert trajectories[partId] == expected[partId]
+    os.remove(fileName)
@@ -0,0 +1,65 @@
+# -----------------------------------------------------------
+# The InjectParts class adds the injected and the lost particles
+# to the bunches at once. The particles' attributes should be
+# the same as for the particles added one by one.
+# -----------------------------------------------------------
+import random
+
+import numpy as np
+
+from orbit.core.bunch import Bunch
+from orbit.injection import InjectParts, JohoTransverse, UniformLongDist
+
+
+def makeInjection(nparts):
+    bunch = Bunch()
+    bunch.getSyncParticle().kinEnergy(1.0)
+    for attr_name in ("ParticleIdNumber", "ParticleInitialCoordinates", "TurnNumber"):
+        bunch.addPartAttr(attr_name)
+    bunch.bunchAttrInt("TurnNumber", 7)
+    lostbunch = Bunch()
+    xFunc = JohoTransverse(3.0, 0.06, 10.2, 1.2e-8, 0.0, 0.0, 0.1, 1.5)
+    yFunc = JohoTransverse(3.0, 0.06, 10.8, 1.2e-8, 0.0, 0.0, 0.1, 1.5)
+    lFunc = UniformLongDist(-80.0, 80.0, bunch.getSyncParticle(), 0.1, 0.0005)
+    injectregion = (-0.0004, 0.0004, -0.0004, 0.0004)
+    return InjectParts(nparts, bunch, lostbunch, injectregion, xFunc, yFunc, lFunc)
+
+
+def test_injected_and_lost_attributes():
+    random.seed(5)
+    inject = makeInjection(257)
+    for turn in range(3):
+        inject.addParticles()
+    bunch = inject.bunch
+    lostbunch = inject.lostbunch
+    assert lostbunch.getSize() > 0
+    assert bunch.getSize() + lostbunch.getSize() == 3 * 257
+    # the Ids of the injected particles follow the particles in both bunches
+    ids = np.asarray(bunch.partAttrColumn("ParticleIdNumber"))
+    assert len(np.unique(ids)) == bunch.getSize()
+    assert ids.max() < 3 * 257
+    assert np.all(np.asarray(bunch.partAttrColumn("TurnNumber")) == 7.0)
+    coords = np.array(bunch)
+    for j in range(6):
+        assert np.all(np.asarray(bunch.partAttrColumn("ParticleInitialCoordinates", j)) == coords[:, j])
+    # the lost particles have Id = -1
+    assert lostbunch.hasPartAttr("ParticleIdNumber") == 1
+    assert np.all(np.asarray(lostbunch.partAttrColumn("ParticleIdNumber")) == -1.0)
+    assert np.all(np.asarray(lostbunch.partAttrColumn("TurnNumber")) == 7.0)
+    lost_coords = np.array(lostbunch)
+    for j in range(6):
+        assert np.all(np.asarray(lostbunch.partAttrColumn("ParticleInitialCoordinates", j)) == lost_coords[:, j])
+    assert np.all((np.abs(lost_coords[:, 0]) >= 0.0004) | (np.abs(lost_coords[:, 2]) >= 0.0004))
+
+
+def test_single_particle_methods():
+    inject = makeInjection(1)
+    bunch = inject.bunch
+    lostbunch = inject.lostbunch
+    inject.addInjectedParticle(bunch, 1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 11)
+    inject.addLostParticle(bunch, lostbunch, 1.5, 2.5, 3.5, 4.5, 5.5, 6.5)
+    assert bunch.partAttrValue("ParticleIdNumber", 0, 0) == 11.0
+    assert bunch.partAttrValue("ParticleInitialCoordinates", 0, 5) == 6.0
+    assert lostbunch.partAttrValue("ParticleIdNumber", 0, 0) == -1.0
+    assert lostbunch.partAttrValue("ParticleInitialCoordinates", 0, 2) == 3.5
+    assert lostbunch.partAttrValue("TurnNumber", 0, 0) == 7.0
@@ -0,0 +1,89 @@
+# -----------------------------------------------------------
+# The particles of the bunch can be sorted by the cells of the
+# space charge grid (row-major or Morton order) to make the
+# binning and the gradient calculations cache-friendly.
+# The sorting should not change the space charge kicks.
+# -----------------------------------------------------------
+import pytest
+import numpy as np
+
+from orbit.core.spacecharge import Grid2D, Grid3D
+from orbit.core.spacecharge import SpaceChargeCalc2p5D, SpaceChargeCalc3D
+from orbit.bunch_utils import ParticleIdNumber
+
+
+def getIds(b):
+    return np.asarray(b.partAttrArr("ParticleIdNumber"))[:, 0].astype(int)
+
+
+def test_reorder_particles(make_gaussian_bunch):
+    b = make_gaussian_bunch(100, seed=7)
+    b.macroSize(1.0e10)
+    ParticleIdNumber.addParticleIdNumbers(b)
+    coords = np.array(b)
+    order = np.random.default_rng(8).permutation(100)
+    b.reorderParticles(order)
+    assert np.array_equal(np.asarray(b), coords[order])
+    assert np.array_equal(getIds(b), order)
+
+
+@pytest.mark.parametrize("keyType", [0, 1])
+def test_grid_sort_bunch(keyType, make_gaussian_bunch):
+    b = make_gaussian_bunch(2000, seed=7)
+    b.macroSize(1.0e10)
+    ParticleIdNumber.addParticleIdNumbers(b)
+    coords = np.array(b)
+    grid2d = Grid2D(32, 32)
+    grid2d.setGridX(-3.0e-3, 3.0e-3)
+    grid2d.setGridY(-3.0e-3, 3.0e-3)
+    grid2d.binBunch(b)
+    rho_ref = np.array([[grid2d.getValueOnGrid(ix, iy) for iy in range(32)] for ix in range(32)])
+    grid2d.sortBunch(b, keyType)
+
+    # the same particles with attributes, the deposition differs by the summation order only
+    ids = getIds(b)
+    assert sorted(ids) == list(range(2000))
+    assert np.array_equal(np.asarray(b), coords[ids])
+    grid2d.setZero()
+    grid2d.binBunch(b)
+    rho = np.array([[grid2d.getValueOnGrid(ix, iy) for iy in range(32)] for ix in range(32)])
+    assert np.allclose(rho, rho_ref, rtol=1.0e-12, atol=0.0)
+
+    # the row-major cells are not decreasing
+    if keyType == 0:
+        step = 6.0e-3 / 31
+        cells = [(int((b.x(i) + 3.0e-3) / step + 0.5), int((b.y(i) + 3.0e-3) / step + 0.5)) for i in range(2000)]
+        cells = [(min(max(ix, 1), 30), min(max(iy, 1), 30)) for (ix, iy) in cells]
+        assert cells == sorted(cells)
+
+    grid3d = Grid3D(16, 16, 16)
+    grid3d.setGridX(-3.0e-3, 3.0e-3)
+    grid3d.setGridY(-3.0e-3, 3.0e-3)
+    grid3d.setGridZ(-3.0e-3, 3.0e-3)
+    grid3d.sortBunch(b, keyType)
+    assert np.array_equal(np.asarray(b), coords[getIds(b)])
+
+
+@pytest.mark.parametrize("calc_type", ["2p5D", "3D"])
+def test_sc_calc_sorting(calc_type, make_gaussian_bunch):
+    results = []
+    for period in (0, 2):
+        b = make_gaussian_bunch(5000, seed=7)
+        b.macroSize(1.0e10)
+        ParticleIdNumber.addParticleIdNumbers(b)
+        if calc_type == "2p5D":
+            calc = SpaceChargeCalc2p5D(64, 64, 16)
+        else:
+            calc = SpaceChargeCalc3D(32, 32, 32)
+        assert calc.getSortingPeriod() == (0, 0)
+        calc.setSortingPeriod(period, 1)
+        assert calc.getSortingPeriod() == (period, 1)
+        for step in range(3):
+            calc.trackBunch(b, 0.1)
+        ids = getIds(b)
+        arr = np.empty((5000, 6))
+        arr[ids] = np.asarray(b)
+        results.append((ids, arr))
+    assert np.array_equal(results[0][0], np.arange(5000))
+    assert not np.array_equal(results[1][0], np.arange(5000))
+    assert np.allclose(results[1][1], results[0][1], rtol=1.0e-10, atol=1.0e-12)
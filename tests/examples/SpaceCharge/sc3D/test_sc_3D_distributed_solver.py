@@ -0,0 +1,73 @@
+# -----------------------------------------------------------
+# The 3D space charge calculator can use the Poisson solver
+# distributed among CPUs in z-slabs. The FFT convolution is the
+# same, so the potential and the space charge kicks should be
+# the same as the ones of the not distributed solver up to the
+# rounding errors. With MPI the script can be started by
+# mpirun -np 4 python test_sc_3D_distributed_solver.py
+# -----------------------------------------------------------
+import pytest
+import numpy as np
+
+from orbit.core import orbit_mpi
+from orbit.core.bunch import Bunch
+from orbit.core.spacecharge import SpaceChargeCalc3D
+
+
+def makeBunch(nParts):
+    rank = orbit_mpi.MPI_Comm_rank(orbit_mpi.mpi_comm.MPI_COMM_WORLD)
+    size = orbit_mpi.MPI_Comm_size(orbit_mpi.mpi_comm.MPI_COMM_WORLD)
+    b = Bunch()
+    b.getSyncParticle().kinEnergy(1.0)
+    b.macroSize(1.0e10)
+    coords = np.random.default_rng(11).normal(size=(nParts, 6))
+    coords[:, 0:4] *= 1.0e-3
+    coords[:, 4] *= 2.0e-2
+    coords[:, 5] *= 1.0e-4
+    # each CPU has the particles in its part of the bunch along z
+    coords = coords[np.argsort(coords[:, 4])]
+    b.addParticles(coords[rank * nParts // size : (rank + 1) * nParts // size])
+    return b
+
+
+def getPhi(calc):
+    grid = calc.getPhiGrid()
+    (nX, nY, nZ) = (grid.getSizeX(), grid.getSizeY(), grid.getSizeZ())
+    return np.array([[[grid.getValueOnGrid(ix, iy, iz) for iy in range(nY)] for ix in range(nX)] for iz in range(nZ)])
+
+
+@pytest.mark.parametrize("nExtBunches", [0, 2])
+def test_distributed_solver(nExtBunches):
+    results = []
+    for distributed in (0, 1):
+        b = makeBunch(4000)
+        calc = SpaceChargeCalc3D(16, 16, 24)
+        if nExtBunches > 0:
+            calc.numExtBunches(nExtBunches)
+            calc.freqOfBunches(1.0e9)
+        assert calc.getDistributedSolver() == 0
+        calc.setDistributedSolver(distributed)
+        assert calc.getDistributedSolver() == distributed
+        for step in range(2):
+            calc.trackBunch(b, 0.1)
+        results.append((np.array(b), getPhi(calc)))
+
+    (coords, phi) = results[0]
+    (coords_distributed, phi_distributed) = results[1]
+    kicks = coords - np.array(makeBunch(4000))
+    assert np.abs(kicks[:, 1]).max() > 1.0e-6
+    assert np.allclose(coords_distributed - coords, 0.0, rtol=0.0, atol=1.0e-10 * np.abs(kicks).max())
+
+    # the potential is known only in the z-planes of the local particles
+    planes = np.abs(phi_distributed).max(axis=(1, 2)) > 0.0
+    assert np.any(planes)
+    scale = np.abs(phi).max()
+    assert np.abs(phi_distributed[planes] - phi[planes]).max() < 1.0e-12 * scale
+
+
+if __name__ == "__main__":
+    for nExtBunches in (0, 2):
+        test_distributed_solver(nExtBunches)
+    rank = orbit_mpi.MPI_Comm_rank(orbit_mpi.mpi_comm.MPI_COMM_WORLD)
+    if rank == 0:
+        print("The distributed solver gives the same kicks.")
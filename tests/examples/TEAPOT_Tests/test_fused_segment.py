@@ -0,0 +1,177 @@
+# -----------------------------------------------------------
+# The runs of the TEAPOT nodes are recorded into the element
+# programs, and each program pushes the blocks of particles
+# through all nodes of the run in one pass over the bunch.
+# The coordinates and the synchronous particle time after the
+# fused lattice should be the same as after the usual lattice.
+# -----------------------------------------------------------
+import math
+
+import numpy as np
+
+from orbit.lattice import AccNode
+from orbit.teapot import teapot, getFusedLattice, isFusableNode, FusedSegmentTEAPOT
+from orbit.time_dep.waveform import ConstantMagnetWaveform
+
+# the rms sizes of the bunch coordinates
+SCALES = [1.0e-3, 1.0e-4, 2.0e-3, 2.0e-4, 1.0, 1.0e-4]
+
+
+def makeLattice():
+    lattice = teapot.TEAPOT_Lattice("line")
+    drift = teapot.DriftTEAPOT("drift1")
+    drift.setLength(1.0)
+    lattice.addNode(drift)
+
+    quad = teapot.QuadTEAPOT("quad1")
+    quad.setLength(0.5)
+    quad.setParam("kq", 1.2)
+    quad.setParam("poles", [2, 3])
+    quad.setParam("kls", [0.1, 0.05])
+    quad.setParam("skews", [0, 1])
+    quad.setnParts(4)
+    quad.setTiltAngle(0.01)
+    lattice.addNode(quad)
+
+    mult = teapot.MultipoleTEAPOT("mult1")
+    mult.setLength(0.2)
+    mult.setParam("poles", [2])
+    mult.setParam("kls", [0.3])
+    mult.setParam("skews", [0])
+    lattice.addNode(mult)
+
+    bend = teapot.BendTEAPOT("bend1")
+    bend.setLength(2.0)
+    bend.setParam("theta", math.pi / 16)
+    bend.setParam("ea1", math.pi / 32)
+    bend.setParam("ea2", math.pi / 32)
+    bend.setParam("poles", [1])
+    bend.setParam("kls", [0.01])
+    bend.setParam("skews", [0])
+    bend.setnParts(3)
+    lattice.addNode(bend)
+
+    # the monitor ends the first fused segment
+    monitor = teapot.MonitorTEAPOT("monitor")
+    lattice.addNode(monitor)
+
+    kick = teapot.KickTEAPOT("kick1")
+    kick.setParam("kx", 1.0e-4)
+    kick.setParam("ky", -1.0e-4)
+    lattice.addNode(kick)
+
+    soln = teapot.SolenoidTEAPOT("soln1")
+    soln.setLength(1.0)
+    soln.setParam("B", 0.3)
+    lattice.addNode(soln)
+
+    rf = teapot.RingRFTEAPOT("rf1")
+    rf.setParam("ring_length", 250.0)
+    rf.addRF(1, 1.0e-5, 0.1)
+    lattice.addNode(rf)
+
+    drift = teapot.DriftTEAPOT("drift2")
+    drift.setLength(1.0)
+    lattice.addNode(drift)
+    lattice.initialize()
+    return lattice
+
+
+def test_fused_lattice(make_gaussian_bunch):
+    lattice = makeLattice()
+    fusedLattice = getFusedLattice(lattice)
+    nodes = fusedLattice.getNodes()
+    assert len(nodes) == 3
+    assert isinstance(nodes[0], FusedSegmentTEAPOT) and len(nodes[0].getNodes()) == 4
+    assert nodes[1].getName() == "monitor"
+    assert isinstance(nodes[2], FusedSegmentTEAPOT) and len(nodes[2].getNodes()) == 4
+    assert abs(fusedLattice.getLength() - lattice.getLength()) < 1.0e-12
+
+    for layout, precision in ((0, 64), (1, 64), (0, 32)):
+        b = make_gaussian_bunch(1001, SCALES, seed=5)
+        b_fused = make_gaussian_bunch(1001, SCALES, seed=5)
+        for bunch in (b, b_fused):
+            bunch.coordLayout(layout)
+            bunch.coordPrecision(precision)
+        for turn in range(3):
+            lattice.trackBunch(b)
+            fusedLattice.trackBunch(b_fused)
+        assert np.array_equal(np.array(b_fused), np.array(b))
+        assert b_fused.getSyncParticle().time() == b.getSyncParticle().time()
+
+    # the coefficients of the program do not depend on the energy
+    b = make_gaussian_bunch(1001, SCALES, seed=5)
+    b_fused = make_gaussian_bunch(1001, SCALES, seed=5)
+    for kinEnergy in (1.0, 0.4, 2.5):
+        b.getSyncParticle().kinEnergy(kinEnergy)
+        b_fused.getSyncParticle().kinEnergy(kinEnergy)
+        lattice.trackBunch(b)
+        fusedLattice.trackBunch(b_fused)
+        assert np.array_equal(np.array(b_fused), np.array(b))
+
+    # the block size does not change the results
+    b = make_gaussian_bunch(1001, SCALES, seed=5)
+    b_fused = make_gaussian_bunch(1001, SCALES, seed=5)
+    for node in (nodes[0], nodes[2]):
+        node.getElementProgram().blockSize(7)
+    lattice.trackBunch(b)
+    fusedLattice.trackBunch(b_fused)
+    assert np.array_equal(np.array(b_fused), np.array(b))
+
+
+def test_fused_rebuild(make_gaussian_bunch):
+    lattice = makeLattice()
+    fusedLattice = getFusedLattice(lattice)
+    quad = lattice.getNodeForName("quad1")
+    quad.setParam("kq", -0.8)
+    b = make_gaussian_bunch(100, SCALES, seed=5)
+    b_fused = make_gaussian_bunch(100, SCALES, seed=5)
+    lattice.trackBunch(b)
+    # the program is recorded again with the new parameters
+    fusedLattice.trackBunch(b_fused)
+    assert np.array_equal(np.array(b_fused), np.array(b))
+    program = fusedLattice.getNodes()[0].getElementProgram()
+    fusedLattice.getNodes()[0].rebuild()
+    assert fusedLattice.getNodes()[0].getElementProgram() is program
+    b_fused = make_gaussian_bunch(100, SCALES, seed=5)
+    fusedLattice.trackBunch(b_fused)
+    assert np.array_equal(np.array(b_fused), np.array(b))
+
+    # the in-place changes are seen after markDirty()
+    mult = lattice.getNodeForName("mult1")
+    mult.getParam("kls")[0] *= 2.0
+    mult.markDirty()
+    b = make_gaussian_bunch(100, SCALES, seed=5)
+    b_fused = make_gaussian_bunch(100, SCALES, seed=5)
+    lattice.trackBunch(b)
+    fusedLattice.trackBunch(b_fused)
+    assert np.array_equal(np.array(b_fused), np.array(b))
+
+
+def test_fusable_nodes():
+    lattice = makeLattice()
+    quad = lattice.getNodeForName("quad1")
+    assert isFusableNode(quad)
+
+    # the user fringe field function
+    def fringeIN(node, paramsDict):
+        pass
+
+    quad.setFringeFieldFunctionIN(fringeIN)
+    assert not isFusableNode(quad)
+
+    # the waveform
+    mult = lattice.getNodeForName("mult1")
+    assert isFusableNode(mult)
+    mult.setWaveform(ConstantMagnetWaveform())
+    assert not isFusableNode(mult)
+
+    # the child node that is not a TEAPOT node
+    bend = lattice.getNodeForName("bend1")
+    assert isFusableNode(bend)
+    bend.addChildNode(AccNode("child"), AccNode.ENTRANCE)
+    assert not isFusableNode(bend)
+    assert not isFusableNode(lattice.getNodeForName("monitor"))
+
+    nodes = getFusedLattice(lattice).getNodes()
+    assert [node.getName() for node in nodes[:4]] == ["drift1", "quad1", "mult1", "bend1"]
@@ -0,0 +1,100 @@
+# -----------------------------------------------------------
+# The thick Quad, Multipole, and Bend TEAPOT elements can use
+# the 4th and 6th order Yoshida splitting instead of the usual
+# 2nd order drift-kick-drift steps. The error of the tracking
+# should decrease as the step to the power of the integrator
+# order, and the fused programs should give the same results.
+# -----------------------------------------------------------
+import math
+
+import numpy as np
+
+from orbit.teapot import teapot, getFusedLattice
+from orbit.teapot.teapot import getSplittingCoefficients
+
+# the rms sizes of the bunch coordinates
+SCALES = [3.0e-3, 3.0e-3, 3.0e-3, 3.0e-3, 1.0, 2.0e-3]
+
+
+def makeLattice(nParts, order):
+    lattice = teapot.TEAPOT_Lattice("line")
+    quad = teapot.QuadTEAPOT("quad")
+    quad.setLength(0.5)
+    quad.setParam("kq", 5.0)
+    quad.setParam("poles", [2])
+    quad.setParam("kls", [20.0])
+    quad.setParam("skews", [0])
+    lattice.addNode(quad)
+
+    mult = teapot.MultipoleTEAPOT("mult")
+    mult.setLength(0.5)
+    mult.setParam("poles", [1, 2])
+    mult.setParam("kls", [2.0, 20.0])
+    mult.setParam("skews", [0, 1])
+    lattice.addNode(mult)
+
+    bend = teapot.BendTEAPOT("bend")
+    bend.setLength(1.0)
+    bend.setParam("theta", 0.3)
+    bend.setParam("ea1", 0.1)
+    bend.setParam("ea2", 0.1)
+    bend.setParam("poles", [1])
+    bend.setParam("kls", [0.5])
+    bend.setParam("skews", [0])
+    lattice.addNode(bend)
+
+    for node in lattice.getNodes():
+        node.setParam("integrator_order", order)
+        node.setnParts(nParts)
+    lattice.initialize()
+    return lattice
+
+
+def trackError(b, nParts, order, reference):
+    makeLattice(nParts, order).trackBunch(b)
+    return np.abs(np.array(b) - reference)[:, :4].max()
+
+
+def test_splitting_coefficients():
+    for order, nKicks in ((2, 1), (4, 3), (6, 9)):
+        (drifts, kicks) = getSplittingCoefficients(order)
+        assert len(kicks) == nKicks and len(drifts) == nKicks + 1
+        assert abs(sum(drifts) - 1.0) < 1.0e-14 and abs(sum(kicks) - 1.0) < 1.0e-14
+        assert drifts == drifts[::-1] and kicks == kicks[::-1]
+
+
+def test_integrator_order(make_gaussian_bunch):
+    b = make_gaussian_bunch(200, SCALES, seed=3)
+    makeLattice(201, 6).trackBunch(b)
+    reference = np.array(b)
+
+    errors = {}
+    for nParts, order in ((5, 2), (9, 2), (33, 2), (5, 4), (9, 4), (5, 6), (9, 6)):
+        errors[(nParts, order)] = trackError(make_gaussian_bunch(200, SCALES, seed=3), nParts, order, reference)
+
+    # the error decreases by 2**order when the step is halved
+    for order in (2, 4, 6):
+        ratio = errors[(5, order)] / errors[(9, order)]
+        assert 0.7 * 2**order < ratio < 1.3 * 2**order
+
+    # the 4th order with 9 parts is better than the 2nd order with 33 parts
+    assert errors[(9, 4)] < errors[(33, 2)]
+
+    # the negative steps do not change the time of the synchronous particle
+    b2 = make_gaussian_bunch(200, SCALES, seed=3)
+    makeLattice(5, 2).trackBunch(b2)
+    b4 = make_gaussian_bunch(200, SCALES, seed=3)
+    makeLattice(5, 4).trackBunch(b4)
+    time2 = b2.getSyncParticle().time()
+    assert abs(b4.getSyncParticle().time() - time2) < 1.0e-14 * time2
+
+
+def test_integrator_order_fused(make_gaussian_bunch):
+    lattice = makeLattice(4, 4)
+    fusedLattice = getFusedLattice(lattice)
+    b = make_gaussian_bunch(200, SCALES, seed=3)
+    b_fused = make_gaussian_bunch(200, SCALES, seed=3)
+    lattice.trackBunch(b)
+    fusedLattice.trackBunch(b_fused)
+    assert np.array_equal(np.array(b_fused), np.array(b))
+    assert b_fused.getSyncParticle().time() == b.getSyncParticle().time()
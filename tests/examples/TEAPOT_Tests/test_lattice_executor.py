@@ -0,0 +1,153 @@
+# -----------------------------------------------------------
+# The lattice executor flattens the TEAPOT ring into the schedule
+# of the element programs, turn counters, and Python steps, and
+# tracks the bunch for many turns in the C++ loop. The results
+# should be the same as for the trackBunch(...) method of the
+# ring called once per turn.
+# -----------------------------------------------------------
+import math
+
+import numpy as np
+import pytest
+
+from orbit.lattice import AccNode
+from orbit.teapot import teapot, TEAPOT_LatticeExecutor, getFusedLattice
+
+# the rms sizes of the bunch coordinates
+SCALES = [1.0e-3, 1.0e-4, 2.0e-3, 2.0e-4, 1.0, 1.0e-4]
+
+
+class KickRecorder(teapot.BaseTEAPOT):
+    """The Python node that changes the bunch and records the calls."""
+
+    def __init__(self, name):
+        teapot.BaseTEAPOT.__init__(self, name)
+        self.calls = []
+
+    def track(self, paramsDict):
+        bunch = paramsDict["bunch"]
+        parentNode = paramsDict["parentNode"]
+        self.calls.append((parentNode.getName(), parentNode.getActivePartIndex(), paramsDict["path_length"]))
+        for ind in range(bunch.getSize()):
+            bunch.xp(ind, bunch.xp(ind) + 1.0e-6 * bunch.x(ind))
+
+
+def makeRing():
+    ring = teapot.TEAPOT_Ring("ring")
+    for cell in range(4):
+        drift = teapot.DriftTEAPOT("drift" + str(cell))
+        drift.setLength(2.0)
+        ring.addNode(drift)
+        quad = teapot.QuadTEAPOT("quad" + str(cell))
+        quad.setLength(0.5)
+        quad.setParam("kq", 0.5 * (-1) ** cell)
+        quad.setnParts(2)
+        ring.addNode(quad)
+        bend = teapot.BendTEAPOT("bend" + str(cell))
+        bend.setLength(2.0)
+        bend.setParam("theta", math.pi / 2)
+        bend.setParam("ea1", 0.0)
+        bend.setParam("ea2", 0.0)
+        bend.setnParts(2)
+        ring.addNode(bend)
+    rf = teapot.RingRFTEAPOT("rf")
+    rf.addRF(1, 1.0e-5, 0.1)
+    ring.addNode(rf)
+    # the bunch wrapping nodes and the turn counter as in the readMAD(...) method
+    ring._addChildren()
+    ring.initialize()
+    rf.setParam("ring_length", ring.getLength())
+    # the Python node inside the quad body
+    ring.getNodeForName("quad1").addChildNode(KickRecorder("recorder"), AccNode.BODY, 1, AccNode.BEFORE)
+    return ring
+
+
+def test_lattice_executor(make_gaussian_bunch):
+    ring = makeRing()
+    recorder = ring.getNodeForName("quad1").getChildNodes(AccNode.BODY, 1, AccNode.BEFORE)[0]
+    b = make_gaussian_bunch(200, SCALES, seed=13)
+    b.bunchAttrInt("TurnNumber", 0)
+    for turn in range(5):
+        ring.trackBunch(b, {})
+    expected_calls = recorder.calls
+    recorder.calls = []
+
+    executor = TEAPOT_LatticeExecutor(ring)
+    # the quad1 is split by the recorder, and the turn counter is native
+    assert len(executor.getElementPrograms()) == 2
+    assert executor.getPythonNodes() == [recorder]
+    assert executor.getNumberOfSteps() == 4
+    b_exec = make_gaussian_bunch(200, SCALES, seed=13)
+    b_exec.bunchAttrInt("TurnNumber", 0)
+    turns = []
+    executor.trackBunch(b_exec, 5, turnFunction=lambda bunch, turn: turns.append(turn))
+    assert np.array_equal(np.array(b_exec), np.array(b))
+    assert b_exec.getSyncParticle().time() == b.getSyncParticle().time()
+    assert b_exec.bunchAttrInt("TurnNumber") == b.bunchAttrInt("TurnNumber") == 5
+    assert recorder.calls == expected_calls
+    assert turns == [0, 1, 2, 3, 4]
+
+    # the programs of the fused segments are used as they are
+    fusedExecutor = TEAPOT_LatticeExecutor(getFusedLattice(ring))
+    assert fusedExecutor.getNumberOfSteps() == 6
+    b_fused = make_gaussian_bunch(200, SCALES, seed=13)
+    b_fused.bunchAttrInt("TurnNumber", 0)
+    fusedExecutor.trackBunch(b_fused, 5)
+    assert np.array_equal(np.array(b_fused), np.array(b))
+
+
+def test_lattice_executor_exception(make_gaussian_bunch):
+    ring = makeRing()
+    recorder = ring.getNodeForName("quad1").getChildNodes(AccNode.BODY, 1, AccNode.BEFORE)[0]
+
+    def track(paramsDict):
+        raise ValueError("stop")
+
+    recorder.track = track
+    executor = TEAPOT_LatticeExecutor(ring)
+    b = make_gaussian_bunch(10, SCALES, seed=13)
+    b.bunchAttrInt("TurnNumber", 0)
+    with pytest.raises(ValueError):
+        executor.trackBunch(b, 3)
+
+
+def test_lattice_executor_changes(make_gaussian_bunch):
+    # the schedule is built again after the changes of the nodes
+    ring = makeRing()
+    executor = TEAPOT_LatticeExecutor(ring)
+    quad = ring.getNodeForName("quad0")
+    b = make_gaussian_bunch(200, SCALES, seed=13)
+    b.bunchAttrInt("TurnNumber", 0)
+    b_exec = make_gaussian_bunch(200, SCALES, seed=13)
+    b_exec.bunchAttrInt("TurnNumber", 0)
+    ring.trackBunch(b, {})
+    executor.trackBunch(b_exec, 1)
+
+    # the new strength between the trackBunch(...) calls
+    quad.setParam("kq", 0.6)
+    ring.trackBunch(b, {})
+    executor.trackBunch(b_exec, 1)
+    assert np.array_equal(np.array(b_exec), np.array(b))
+
+    # the strength ramp in the turn function
+    def turnFunction(bunch, turn):
+        quad.setParam("kq", 0.6 + 0.01 * (turn + 1))
+
+    for turn in range(4):
+        ring.trackBunch(b, {})
+        turnFunction(b, turn)
+    quad.setParam("kq", 0.6)
+    turns = []
+    executor.trackBunch(b_exec, 4, turnFunction=lambda bunch, turn: (turns.append(turn), turnFunction(bunch, turn)))
+    assert turns == [0, 1, 2, 3]
+    assert np.array_equal(np.array(b_exec), np.array(b))
+    assert b_exec.bunchAttrInt("TurnNumber") == b.bunchAttrInt("TurnNumber") == 6
+
+    # the removed Python node
+    parent = ring.getNodeForName("quad1")
+    recorder = parent.getChildNodes(AccNode.BODY, 1, AccNode.BEFORE)[0]
+    parent.removeChildNode(recorder, AccNode.BODY, 1, AccNode.BEFORE)
+    ring.trackBunch(b, {})
+    executor.trackBunch(b_exec, 1)
+    assert executor.getPythonNodes() == []
+    assert np.array_equal(np.array(b_exec), np.array(b))
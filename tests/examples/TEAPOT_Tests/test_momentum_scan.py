@@ -0,0 +1,162 @@
+# -----------------------------------------------------------
+# The momentum scan tracks one probe bunch for all momentum
+# offsets through the ring. The on-momentum parameters should
+# be the same as the parameters of the TEAPOT_MATRIX_Lattice,
+# the off-momentum closed orbits should be periodic, and the
+# dispersions should be the derivatives of the closed orbits.
+# -----------------------------------------------------------
+import math
+
+import numpy as np
+
+from orbit.core.bunch import Bunch
+from orbit.core.orbit_utils import Matrix
+from orbit.lattice import AccActionsContainer
+from orbit.teapot import teapot, TEAPOT_MATRIX_Lattice, TEAPOT_MomentumScan, TransferMatrixGenerator
+
+
+class CustomDriftTEAPOT(teapot.DriftTEAPOT):
+    """
+    The drift that cannot be recorded into the element program.
+    """
+
+    pass
+
+
+def makeRing(sextupoles=0.3, driftClass=teapot.DriftTEAPOT):
+    ring = teapot.TEAPOT_Ring("ring")
+    for cell in range(8):
+        drift = driftClass("drift%d" % cell)
+        drift.setLength(1.5)
+        ring.addNode(drift)
+        quad = teapot.QuadTEAPOT("quad%d" % cell)
+        quad.setLength(0.5)
+        quad.setParam("kq", 0.5 * (-1) ** cell)
+        quad.setnParts(4)
+        ring.addNode(quad)
+        sext = teapot.MultipoleTEAPOT("sext%d" % cell)
+        sext.setParam("poles", [2])
+        sext.setParam("kls", [sextupoles * (-1) ** cell])
+        sext.setParam("skews", [0])
+        ring.addNode(sext)
+        bend = teapot.BendTEAPOT("bend%d" % cell)
+        bend.setLength(2.0)
+        bend.setParam("theta", math.pi / 4)
+        bend.setParam("ea1", 0.0)
+        bend.setParam("ea2", 0.0)
+        bend.setnParts(4)
+        ring.addNode(bend)
+    ring.addNode(teapot.MonitorTEAPOT("monitor"))
+    ring.initialize()
+    return ring
+
+
+def makeBunch():
+    bunch = Bunch()
+    bunch.getSyncParticle().kinEnergy(1.0)
+    return bunch
+
+
+def test_on_momentum_parameters():
+    ring = makeRing()
+    res_dict = TEAPOT_MATRIX_Lattice(ring, makeBunch()).getRingParametersDict()
+    scan = TEAPOT_MomentumScan(ring, makeBunch())
+    scan_dict = scan.scan([0.0])
+    assert scan_dict["stable"][0]
+    assert np.abs(scan_dict["closed orbit x"]).max() < 1.0e-15
+    for direction in ("x", "y"):
+        assert abs(scan_dict["fractional tune " + direction][0] - res_dict["fractional tune " + direction]) < 1.0e-9
+        assert abs(scan_dict["alpha " + direction][0] - res_dict["alpha " + direction]) < 1.0e-7
+        assert abs(scan_dict["beta " + direction][0] - res_dict["beta " + direction + " [m]"]) < 1.0e-7
+        assert abs(scan_dict["dispersion " + direction][0] - res_dict["dispersion " + direction + " [m]"]) < 1.0e-7
+        assert abs(scan_dict["dispersion prime " + direction][0] - res_dict["dispersion prime " + direction]) < 1.0e-7
+
+
+def test_off_momentum_orbits():
+    ring = makeRing()
+    scan = TEAPOT_MomentumScan(ring, makeBunch())
+    dp_p_arr = np.linspace(-0.01, 0.01, 21)
+    scan_dict = scan.scan(dp_p_arr)
+    # the passes of the probe bunch for all momentum offsets at once
+    assert scan.getNumberOfPasses() < 10
+    assert np.all(scan_dict["stable"])
+    assert np.abs(scan_dict["closed orbit x"]).max() > 1.0e-3
+
+    # the closed orbits are periodic
+    bunch = makeBunch()
+    syncPart = bunch.getSyncParticle()
+    coords = np.zeros((len(dp_p_arr), 6))
+    coords[:, 0] = scan_dict["closed orbit x"]
+    coords[:, 1] = scan_dict["closed orbit xp"]
+    coords[:, 5] = dp_p_arr * syncPart.momentum() * syncPart.beta()
+    bunch.addParticles(coords)
+    ring.trackBunch(bunch)
+    assert np.abs(np.array(bunch)[:, :2] - coords[:, :2]).max() < 1.0e-10
+
+    # the dispersion is the derivative of the closed orbit
+    step = 1.0e-6
+    for ind in (0, 5, 20):
+        orbits = scan.scan([dp_p_arr[ind] - step, dp_p_arr[ind] + step])["closed orbit x"]
+        dispersion = (orbits[1] - orbits[0]) / (2 * step)
+        assert abs(dispersion - scan_dict["dispersion x"][ind]) < 1.0e-5
+
+    # the Python tracking of the nodes that cannot be recorded gives the same results
+    scan = TEAPOT_MomentumScan(makeRing(driftClass=CustomDriftTEAPOT), makeBunch())
+    python_dict = scan.scan(dp_p_arr)
+    for key in ("closed orbit x", "fractional tune x", "beta y", "dispersion x"):
+        assert np.abs(python_dict[key] - scan_dict[key]).max() < 1.0e-12
+
+
+def getAnalyticTunes(ring, point):
+    """
+    Returns the fractional tunes of the one turn matrix linearized at the 6D point.
+    """
+    bunch = makeBunch()
+    generator = TransferMatrixGenerator()
+    matrix = Matrix(7, 7)
+    matrix.unit()
+    for ind in range(6):
+        matrix.set(ind, 6, point[ind])
+
+    def matrixAction(paramsDict):
+        generator.trackMatrix(paramsDict["node"], paramsDict, matrix)
+
+    accContainer = AccActionsContainer()
+    accContainer.addAction(matrixAction, AccActionsContainer.BODY)
+    ring.trackActions(accContainer, {"bunch": bunch})
+    tunes = []
+    for ind in (0, 2):
+        cos_phi = (matrix.get(ind, ind) + matrix.get(ind + 1, ind + 1)) / 2.0
+        sign = math.copysign(1.0, matrix.get(ind, ind + 1))
+        tunes.append(math.acos(cos_phi) / (2 * math.pi) * sign)
+    return tunes
+
+
+def test_chromaticities():
+    # without the sextupoles the chromaticities are close to the ones of the matrix
+    # lattice, but the matrix lattice does not include the off-momentum closed orbits
+    ring = makeRing(0.0)
+    chromaticities = TEAPOT_MATRIX_Lattice(ring, makeBunch()).getChromaticitiesXY()
+    scan = TEAPOT_MomentumScan(ring, makeBunch())
+    scan_chromaticities = scan.getChromaticitiesXY()
+    print("chromaticities matrix lattice =", chromaticities, " momentum scan =", scan_chromaticities)
+    assert abs(scan_chromaticities[0] - chromaticities[0]) < 0.1 * abs(chromaticities[0])
+
+    # the sextupoles change the tunes of the off-momentum closed orbits
+    ring = makeRing(1.0)
+    scan = TEAPOT_MomentumScan(ring, makeBunch())
+    sext_chromaticities = scan.getChromaticitiesXY()
+    assert abs(sext_chromaticities[0] - scan_chromaticities[0]) > 0.1
+    tunes = scan.scan([-1.0e-4, 0.0, 1.0e-4])["fractional tune x"]
+    assert abs((tunes[2] - tunes[0]) / 2.0e-4 - sext_chromaticities[0]) < 1.0e-12
+
+    # the tunes are the tunes of the exact one turn matrices at the closed orbits
+    syncPart = makeBunch().getSyncParticle()
+    dp_p_arr = [-0.005, 0.005]
+    scan_dict = scan.scan(dp_p_arr)
+    for ind in range(len(dp_p_arr)):
+        point = [scan_dict["closed orbit x"][ind], scan_dict["closed orbit xp"][ind], 0.0, 0.0, 0.0]
+        point.append(dp_p_arr[ind] * syncPart.momentum() * syncPart.beta())
+        tunes = getAnalyticTunes(ring, point)
+        assert abs(scan_dict["fractional tune x"][ind] - tunes[0]) < 1.0e-8
+        assert abs(scan_dict["fractional tune y"][ind] - tunes[1]) < 1.0e-8
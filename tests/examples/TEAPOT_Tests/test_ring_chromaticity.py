@@ -0,0 +1,31 @@
+# -----------------------------------------------------------
+# The chromaticities of the TEAPOT_MATRIX_Lattice are calculated
+# with the fractional tunes of the one turn matrix. The natural
+# chromaticities of the SNS ring without sextupoles should stay
+# the same as the known values.
+# -----------------------------------------------------------
+import os
+
+from orbit.core.bunch import Bunch
+from orbit.teapot import teapot, TEAPOT_MATRIX_Lattice
+
+script_dir = os.path.dirname(__file__)
+SNS_ring_file = os.path.join(script_dir, "..", "Diagnostics", "SNSring_pyOrbitBenchmark.LAT")
+
+
+def test_sns_ring_chromaticities():
+    ring = teapot.TEAPOT_Ring()
+    ring.readMAD(SNS_ring_file, "RING")
+    bunch = Bunch()
+    bunch.mass(0.93827231)
+    bunch.getSyncParticle().kinEnergy(1.0)
+    matrix_lattice = TEAPOT_MATRIX_Lattice(ring, bunch)
+    (chromX, chromY) = matrix_lattice.getChromaticitiesXY()
+    print("SNS ring chromaticities =", chromX, chromY)
+    # the tune after the first nodes gave chromX = -86.6
+    assert abs(chromX - (-7.6329)) < 1.0e-3
+    assert abs(chromY - (-6.5084)) < 1.0e-3
+    # the tunes are the tunes of the one turn matrix
+    res_dict = matrix_lattice.getRingParametersDict()
+    assert abs(res_dict["fractional tune x"] - 0.219969) < 1.0e-5
+    assert abs(res_dict["fractional tune y"] - 0.209406) < 1.0e-5
@@ -0,0 +1,188 @@
+# -----------------------------------------------------------
+# The TEAPOT and linac tracking functions use the vectorized
+# loops for the SoA layout of the coordinates and the same
+# loops over the rows for the default layout. The coordinates
+# after each function should be the same for both layouts and
+# the same as the ones from the scalar formulas of the original
+# per-particle loops that are repeated here with numpy.
+# -----------------------------------------------------------
+import math
+
+import numpy as np
+import pytest
+
+from orbit.core import teapot_base
+from orbit.core.linac import linac_tracking
+
+# the rms sizes of the bunch coordinates
+SCALES = [1.0e-3, 1.0e-4, 2.0e-3, 2.0e-4, 1.0, 1.0e-4]
+
+kernels = [
+    ("drift", lambda b: teapot_base.drift(b, 1.5)),
+    ("kick", lambda b: teapot_base.kick(b, 1.0e-4, -1.0e-4, 1.0e-5)),
+    ("quad1", lambda b: teapot_base.quad1(b, 0.5, 1.2)),
+    ("quad1_defocusing", lambda b: teapot_base.quad1(b, 0.5, -1.2)),
+    ("quad2", lambda b: teapot_base.quad2(b, 0.5)),
+    ("bend1", lambda b: teapot_base.bend1(b, 1.0, 0.1)),
+    ("bend2", lambda b: teapot_base.bend2(b, 1.0)),
+    ("bend3", lambda b: teapot_base.bend3(b, 0.1)),
+    ("bend4", lambda b: teapot_base.bend4(b, 0.1)),
+    ("linac_drift", lambda b: linac_tracking.drift(b, 1.5)),
+    ("linac_quad1", lambda b: linac_tracking.quad1(b, 0.5, 1.2)),
+    ("linac_quad3", lambda b: linac_tracking.quad3(b, 0.5, 0.3)),
+    ("linac_kick", lambda b: linac_tracking.kick(b, 1.0e-4, -1.0e-4, 1.0e-5)),
+]
+for pole in range(7):
+    for skew in (0, 1):
+        kernels.append(("multp" + str(pole) + str(skew), lambda b, pole=pole, skew=skew: teapot_base.multp(b, pole, 0.5, skew)))
+
+
+def test_teapot_simd(make_gaussian_bunch):
+    # the size is not a multiple of the vector length
+    b_rows = make_gaussian_bunch(1001, SCALES, seed=3)
+    b_soa = make_gaussian_bunch(1001, SCALES, seed=3)
+    b_soa.coordLayout(1)
+    for name, kernel in kernels:
+        kernel(b_rows)
+        kernel(b_soa)
+        assert np.array_equal(np.array(b_soa), np.array(b_rows)), name
+
+
+def refParams(b):
+    sp = b.getSyncParticle()
+    gamma2i = 1.0 / (sp.gamma() * sp.gamma())
+    dp_p_coeff = 1.0 / (sp.momentum() * sp.beta())
+    return (gamma2i, dp_p_coeff, sp.beta() * sp.beta())
+
+
+def refDrift(c, b, length):
+    (gamma2i, dp_p_coeff, betasq) = refParams(b)
+    dp_p = c[:, 5] * dp_p_coeff
+    KNL = 1.0 / (1.0 + dp_p)
+    c[:, 0] += KNL * length * c[:, 1]
+    c[:, 2] += KNL * length * c[:, 3]
+    phifac = (c[:, 1] * c[:, 1] + c[:, 3] * c[:, 3] + dp_p * dp_p * gamma2i) / 2.0
+    phifac = (phifac * KNL - dp_p * gamma2i) * KNL
+    c[:, 4] -= length * phifac
+
+
+def refKick(c, b, kx, ky, kE):
+    c[:, 1] += kx
+    c[:, 3] += ky
+    c[:, 5] += kE
+
+
+def refQuad1(c, b, length, kq):
+    (gamma2i, dp_p_coeff, betasq) = refParams(b)
+    sqrt_kq = math.sqrt(abs(kq))
+    kqlength = sqrt_kq * length
+    if kq > 0.0:
+        (cx, sx, cy, sy) = (math.cos(kqlength), math.sin(kqlength), math.cosh(kqlength), math.sinh(kqlength))
+        (m11, m12, m21, m22) = (cx, sx / sqrt_kq, -sx * sqrt_kq, cx)
+        (m33, m34, m43, m44) = (cy, sy / sqrt_kq, sy * sqrt_kq, cy)
+    else:
+        (cx, sx, cy, sy) = (math.cosh(kqlength), math.sinh(kqlength), math.cos(kqlength), math.sin(kqlength))
+        (m11, m12, m21, m22) = (cx, sx / sqrt_kq, sx * sqrt_kq, cx)
+        (m33, m34, m43, m44) = (cy, sy / sqrt_kq, -sy * sqrt_kq, cy)
+    dp_p = c[:, 5] * dp_p_coeff
+    (x, xp, y, yp) = (c[:, 0].copy(), c[:, 1].copy(), c[:, 2].copy(), c[:, 3].copy())
+    c[:, 0] = x * m11 + xp * m12
+    c[:, 1] = x * m21 + xp * m22
+    c[:, 2] = y * m33 + yp * m34
+    c[:, 3] = y * m43 + yp * m44
+    c[:, 4] += dp_p * gamma2i * length
+
+
+def refQuad2(c, b, length):
+    (gamma2i, dp_p_coeff, betasq) = refParams(b)
+    dp_p = c[:, 5] * dp_p_coeff
+    KNL = 1.0 / (1.0 + dp_p)
+    c[:, 0] -= KNL * length * dp_p * c[:, 1]
+    c[:, 2] -= KNL * length * dp_p * c[:, 3]
+    phifac = (c[:, 1] * c[:, 1] + c[:, 3] * c[:, 3] + dp_p * dp_p * gamma2i) / 2.0
+    phifac = (phifac * KNL + dp_p * dp_p * gamma2i) * KNL
+    c[:, 4] -= length * phifac
+
+
+def refBend1(c, b, length, th):
+    (gamma2i, dp_p_coeff, betasq) = refParams(b)
+    rho = length / th
+    (cx, sx) = (math.cos(th), math.sin(th))
+    (m11, m12, m16) = (cx, rho * sx, rho * (1.0 - cx))
+    (m21, m22, m26) = (-sx / rho, cx, sx)
+    (m51, m52, m56) = (-sx, -rho * (1.0 - cx), -betasq * length + rho * sx)
+    dp_p = c[:, 5] * dp_p_coeff
+    (x, xp) = (c[:, 0].copy(), c[:, 1].copy())
+    c[:, 0] = x * m11 + xp * m12 + dp_p * m16
+    c[:, 1] = x * m21 + xp * m22 + dp_p * m26
+    c[:, 2] += length * c[:, 3]
+    c[:, 4] += x * m51 + xp * m52 + dp_p * m56
+
+
+def refBend3(c, b, th):
+    (gamma2i, dp_p_coeff, betasq) = refParams(b)
+    dp_p = c[:, 5] * dp_p_coeff
+    KNL = 1.0 / (1.0 + dp_p)
+    phifac = (c[:, 3] * c[:, 3] + dp_p * dp_p * gamma2i) / 2.0
+    c[:, 1] -= phifac * KNL * th
+    c[:, 2] += KNL * c[:, 3] * c[:, 0] * th
+    phifac = (phifac * KNL - dp_p * gamma2i) * KNL
+    c[:, 4] -= th * phifac * c[:, 0]
+
+
+def refBend4(c, b, th):
+    (gamma2i, dp_p_coeff, betasq) = refParams(b)
+    dp_p = c[:, 5] * dp_p_coeff
+    KNL = 1.0 / (1.0 + dp_p)
+    xfac = 1.0 + KNL * c[:, 1] * th / 2.0
+    phifac = KNL * KNL * c[:, 1] * c[:, 1] / 2.0
+    c[:, 0] *= xfac * xfac
+    c[:, 1] /= xfac
+    c[:, 4] -= th * phifac * c[:, 0]
+
+
+def refMultp(c, b, pole, kl, skew):
+    kl1 = kl / math.factorial(pole)
+    z = c[:, 0] + 1j * c[:, 2]
+    zn = np.ones(len(c), dtype=complex)
+    for k in range(pole):
+        zn *= z
+    if skew:
+        c[:, 1] += kl1 * zn.imag
+        c[:, 3] += kl1 * zn.real
+    else:
+        c[:, 1] -= kl1 * zn.real
+        c[:, 3] += kl1 * zn.imag
+
+
+references = [
+    ("drift", lambda b: teapot_base.drift(b, 1.5), lambda c, b: refDrift(c, b, 1.5)),
+    ("kick", lambda b: teapot_base.kick(b, 1.0e-4, -1.0e-4, 1.0e-5), lambda c, b: refKick(c, b, 1.0e-4, -1.0e-4, 1.0e-5)),
+    ("quad1", lambda b: teapot_base.quad1(b, 0.5, 1.2), lambda c, b: refQuad1(c, b, 0.5, 1.2)),
+    ("quad1_defocusing", lambda b: teapot_base.quad1(b, 0.5, -1.2), lambda c, b: refQuad1(c, b, 0.5, -1.2)),
+    ("quad2", lambda b: teapot_base.quad2(b, 0.5), lambda c, b: refQuad2(c, b, 0.5)),
+    ("bend1", lambda b: teapot_base.bend1(b, 1.0, 0.1), lambda c, b: refBend1(c, b, 1.0, 0.1)),
+    ("bend2", lambda b: teapot_base.bend2(b, 1.0), lambda c, b: refQuad2(c, b, 1.0)),
+    ("bend3", lambda b: teapot_base.bend3(b, 0.1), lambda c, b: refBend3(c, b, 0.1)),
+    ("bend4", lambda b: teapot_base.bend4(b, 0.1), lambda c, b: refBend4(c, b, 0.1)),
+]
+for pole in range(7):
+    for skew in (0, 1):
+        references.append(
+            (
+                "multp" + str(pole) + str(skew),
+                lambda b, pole=pole, skew=skew: teapot_base.multp(b, pole, 0.5, skew),
+                lambda c, b, pole=pole, skew=skew: refMultp(c, b, pole, 0.5, skew),
+            )
+        )
+
+
+@pytest.mark.parametrize("layout", [0, 1])
+def test_teapot_scalar_reference(layout, make_gaussian_bunch):
+    for name, kernel, reference in references:
+        b = make_gaussian_bunch(1001, SCALES, seed=3)
+        b.coordLayout(layout)
+        coords = np.array(b)
+        kernel(b)
+        reference(coords, b)
+        assert np.allclose(np.array(b), coords, rtol=1.0e-13, atol=1.0e-18), name
@@ -0,0 +1,65 @@
+# -----------------------------------------------------------
+# The TEAPOT tracking functions can split the particle loops
+# between OpenMP threads. The coordinates after each function
+# should be the same for one and several threads. If the module
+# is built without OpenMP, the number of threads stays 1.
+# -----------------------------------------------------------
+import numpy as np
+
+from orbit.core import teapot_base
+
+# the rms sizes of the bunch coordinates
+SCALES = [1.0e-3, 1.0e-4, 2.0e-3, 2.0e-4, 1.0, 1.0e-4]
+
+kernels = [
+    ("rotatexy", lambda b: teapot_base.rotatexy(b, 0.1)),
+    ("drift", lambda b: teapot_base.drift(b, 1.5)),
+    ("wrapbunch", lambda b: teapot_base.wrapbunch(b, 1.0)),
+    ("kick", lambda b: teapot_base.kick(b, 1.0e-4, -1.0e-4, 1.0e-5)),
+    ("multp", lambda b: teapot_base.multp(b, 2, 0.5, 0)),
+    ("multpfringeIN", lambda b: teapot_base.multpfringeIN(b, 2, 0.5, 1)),
+    ("multpfringeOUT", lambda b: teapot_base.multpfringeOUT(b, 2, 0.5, 0)),
+    ("quad1", lambda b: teapot_base.quad1(b, 0.5, 1.2)),
+    ("quad2", lambda b: teapot_base.quad2(b, 0.5)),
+    ("quadfringeIN", lambda b: teapot_base.quadfringeIN(b, 1.2)),
+    ("quadfringeOUT", lambda b: teapot_base.quadfringeOUT(b, -1.2)),
+    ("wedgerotate", lambda b: teapot_base.wedgerotate(b, 0.05, 0)),
+    ("wedgedrift", lambda b: teapot_base.wedgedrift(b, 0.05, 1)),
+    ("wedgebend", lambda b: teapot_base.wedgebend(b, 0.05, 1, 10.0, 4)),
+    ("bend1", lambda b: teapot_base.bend1(b, 1.0, 0.1)),
+    ("bend2", lambda b: teapot_base.bend2(b, 1.0)),
+    ("bend3", lambda b: teapot_base.bend3(b, 0.1)),
+    ("bend4", lambda b: teapot_base.bend4(b, 0.1)),
+    ("bendfringeIN", lambda b: teapot_base.bendfringeIN(b, 10.0)),
+    ("bendfringeOUT", lambda b: teapot_base.bendfringeOUT(b, 10.0)),
+    ("soln", lambda b: teapot_base.soln(b, 1.0, 0.3)),
+    ("wedgebendCF", lambda b: teapot_base.wedgebendCF(b, 0.05, 0, 10.0, 2, [1, 2], [0.3, 0.1], [0, 1], 4)),
+    ("RingRF", lambda b: teapot_base.RingRF(b, 250.0, 1, 1.0e-5, 0.1)),
+]
+
+
+def trackBunch(b, nThreads):
+    assert teapot_base.setNumberOfThreads(nThreads) == teapot_base.getNumberOfThreads()
+    results = {}
+    for name, kernel in kernels:
+        kernel(b)
+        results[name] = np.array(b)
+    teapot_base.setNumberOfThreads(1)
+    return results
+
+
+def test_teapot_threads(make_gaussian_bunch):
+    assert teapot_base.getNumberOfThreads() == 1
+    nThreads = teapot_base.setNumberOfThreads(4)
+    assert nThreads in (1, 4)
+    teapot_base.setNumberOfThreads(0)
+    assert teapot_base.getNumberOfThreads() == 1
+    for precision in (64, 32):
+        b = make_gaussian_bunch(20000, SCALES, seed=7)
+        b.coordPrecision(precision)
+        b_threads = make_gaussian_bunch(20000, SCALES, seed=7)
+        b_threads.coordPrecision(precision)
+        expected = trackBunch(b, 1)
+        results = trackBunch(b_threads, 4)
+        for name, kernel in kernels:
+            assert np.array_equal(results[name], expected[name]), name
@@ -0,0 +1,205 @@
+# -----------------------------------------------------------
+# The transport matrices of the TEAPOT nodes are calculated by
+# the automatic differentiation of the recorded element programs.
+# They should be the same as the finite difference matrices of
+# the MatrixGenerator up to the errors of the finite differences,
+# and the derivatives of the matrices over dE should be the same
+# as the differences of the matrices for the shifted dE.
+# -----------------------------------------------------------
+import math
+
+import numpy as np
+
+from orbit.core.bunch import Bunch
+from orbit.core.orbit_utils import Matrix
+from orbit.lattice import AccActionsContainer
+from orbit.teapot import teapot, TEAPOT_MATRIX_Lattice, TransferMatrixGenerator
+
+
+def makeLattice():
+    lattice = teapot.TEAPOT_Lattice("line")
+    quad = teapot.QuadTEAPOT("quad")
+    quad.setLength(0.5)
+    quad.setParam("kq", 2.0)
+    quad.setParam("poles", [2])
+    quad.setParam("kls", [3.0])
+    quad.setParam("skews", [0])
+    quad.setnParts(4)
+    lattice.addNode(quad)
+
+    bend = teapot.BendTEAPOT("bend")
+    bend.setLength(2.0)
+    bend.setParam("theta", 0.3)
+    bend.setParam("ea1", 0.05)
+    bend.setParam("ea2", 0.1)
+    bend.setParam("poles", [1, 2])
+    bend.setParam("kls", [0.01, 0.2])
+    bend.setParam("skews", [0, 0])
+    bend.setnParts(4)
+    lattice.addNode(bend)
+
+    mult = teapot.MultipoleTEAPOT("mult")
+    mult.setLength(0.3)
+    mult.setParam("poles", [2, 3])
+    mult.setParam("kls", [1.0, 5.0])
+    mult.setParam("skews", [0, 1])
+    mult.setnParts(3)
+    lattice.addNode(mult)
+
+    solenoid = teapot.SolenoidTEAPOT("solenoid")
+    solenoid.setLength(1.0)
+    solenoid.setParam("B", 0.5)
+    lattice.addNode(solenoid)
+
+    kick = teapot.KickTEAPOT("kick")
+    kick.setLength(0.1)
+    kick.setParam("kx", 1.0e-3)
+    kick.setParam("ky", -2.0e-3)
+    lattice.addNode(kick)
+
+    lattice.addNode(teapot.MonitorTEAPOT("monitor"))
+
+    quad = teapot.QuadTEAPOT("quad_tilted")
+    quad.setLength(0.5)
+    quad.setParam("kq", -1.5)
+    quad.setnParts(3)
+    quad.setTiltAngle(0.1)
+    lattice.addNode(quad)
+
+    drift = teapot.DriftTEAPOT("drift")
+    drift.setLength(1.0)
+    lattice.addNode(drift)
+    lattice.initialize()
+    return lattice
+
+
+def makeRing():
+    ring = teapot.TEAPOT_Ring("ring")
+    for cell in range(8):
+        drift = teapot.DriftTEAPOT("drift%d" % cell)
+        drift.setLength(1.5)
+        ring.addNode(drift)
+        quad = teapot.QuadTEAPOT("quad%d" % cell)
+        quad.setLength(0.5)
+        quad.setParam("kq", 0.5 * (-1) ** cell)
+        quad.setnParts(4)
+        ring.addNode(quad)
+        sext = teapot.MultipoleTEAPOT("sext%d" % cell)
+        sext.setParam("poles", [2])
+        sext.setParam("kls", [0.3 * (-1) ** cell])
+        sext.setParam("skews", [0])
+        ring.addNode(sext)
+        bend = teapot.BendTEAPOT("bend%d" % cell)
+        bend.setLength(2.0)
+        bend.setParam("theta", math.pi / 4)
+        bend.setParam("ea1", 0.0)
+        bend.setParam("ea2", 0.0)
+        bend.setnParts(4)
+        ring.addNode(bend)
+    ring.initialize()
+    return ring
+
+
+def makeBunch():
+    bunch = Bunch()
+    bunch.getSyncParticle().kinEnergy(1.0)
+    return bunch
+
+
+def getValues(matrix):
+    return np.array(matrix.getValues()).reshape((7, 7))
+
+
+def test_node_matrices():
+    lattice = makeLattice()
+    bunch = makeBunch()
+    generator = TransferMatrixGenerator()
+    syncPart = bunch.getSyncParticle()
+    deviations = []
+
+    def matrixAction(paramsDict):
+        node = paramsDict["node"]
+        time = syncPart.time()
+        matrix = Matrix(7, 7)
+        generator.setAnalytic(False)
+        generator.calculateMatrix(node, paramsDict, matrix)
+        time_fd = syncPart.time()
+        syncPart.time(time)
+        analyticMatrix = Matrix(7, 7)
+        generator.setAnalytic(True)
+        assert generator.isAnalyticNode(node)
+        generator.calculateMatrix(node, paramsDict, analyticMatrix)
+        assert syncPart.time() == time_fd
+        deviations.append(np.abs(getValues(analyticMatrix) - getValues(matrix)).max())
+
+    accContainer = AccActionsContainer()
+    accContainer.addAction(matrixAction, AccActionsContainer.BODY)
+    lattice.trackActions(accContainer, {"bunch": bunch})
+    print("max deviation from the finite difference matrices =", max(deviations))
+    # the finite differences of the bend wedges have the largest errors
+    assert max(deviations) < 1.0e-7
+    assert np.median(deviations) < 1.0e-12
+
+
+def trackMatrix(lattice, dE=0.0):
+    """
+    Returns the matrix and its derivative over dE for the lattice linearized at the dE point.
+    """
+    bunch = makeBunch()
+    generator = TransferMatrixGenerator()
+    matrix = Matrix(7, 7)
+    matrix.unit()
+    matrix.set(5, 6, dE)
+    derivativeMatrix = Matrix(7, 7)
+    derivativeMatrix.zero()
+
+    def matrixAction(paramsDict):
+        generator.trackMatrix(paramsDict["node"], paramsDict, matrix, derivativeMatrix)
+
+    accContainer = AccActionsContainer()
+    accContainer.addAction(matrixAction, AccActionsContainer.BODY)
+    lattice.trackActions(accContainer, {"bunch": bunch})
+    return (getValues(matrix), getValues(derivativeMatrix))
+
+
+def test_derivative_matrix():
+    lattice = makeLattice()
+    (matrix, derivativeMatrix) = trackMatrix(lattice)
+    # the derivatives of the chromatic elements are not zero
+    assert np.abs(np.diag(derivativeMatrix)[:4]).min() > 1.0e-2
+    step = 1.0e-6
+    (matrix_plus, tmp) = trackMatrix(lattice, step)
+    (matrix_minus, tmp) = trackMatrix(lattice, -step)
+    difference = (matrix_plus - matrix_minus) / (2 * step)
+    assert np.abs(difference[:6, :6] - derivativeMatrix[:6, :6]).max() < 1.0e-6
+    # the last column is the point of the linearization
+    assert np.abs(matrix_plus[:6, 6] - matrix[:6, 6] - step * matrix[:6, 5]).max() < 1.0e-9
+    assert np.abs(derivativeMatrix[:6, 6] - matrix[:6, 5]).max() < 1.0e-12
+
+
+def test_matrix_lattice():
+    ring = makeRing()
+    lattice = TEAPOT_MATRIX_Lattice(ring, makeBunch())
+    res_dict = lattice.getRingParametersDict()
+    chromaticities = lattice.getChromaticitiesXY()
+    generator = lattice.getTransferMatrixGenerator()
+    assert generator.isAnalytic()
+
+    # the same lattice with the finite difference matrices
+    generator.setAnalytic(False)
+    lattice.rebuild(onlyChanged=False)
+    res_dict_fd = lattice.getRingParametersDict()
+    chromaticities_fd = lattice.getChromaticitiesXY()
+    for direction in ("x", "y"):
+        assert abs(res_dict["fractional tune " + direction] - res_dict_fd["fractional tune " + direction]) < 1.0e-8
+        assert abs(res_dict["beta " + direction + " [m]"] - res_dict_fd["beta " + direction + " [m]"]) < 1.0e-6
+    print("chromaticities analytic =", chromaticities, " finite differences =", chromaticities_fd)
+    for ind in range(2):
+        assert abs(chromaticities[ind] - chromaticities_fd[ind]) < 1.0e-3 * abs(chromaticities[ind])
+
+    # the chromaticity coefficients are the derivatives of the ring matrix
+    generator.setAnalytic(True)
+    lattice.rebuild(onlyChanged=False)
+    coefficients = lattice.getChromaticityCoefficients()
+    (matrix, derivativeMatrix) = trackMatrix(ring)
+    assert np.abs(np.array(coefficients) - np.diag(derivativeMatrix)[:4]).max() < 1.0e-12
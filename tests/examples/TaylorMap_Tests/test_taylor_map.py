@@ -0,0 +1,219 @@
+# -----------------------------------------------------------
+# The Taylor map of the TEAPOT lattice is tracked through the
+# TEAPOT functions as the truncated power series, or it is fitted
+# to the tracking of the probe bunch. The map of the drift should
+# be equal to the expansion of the analytic drift map. The map
+# should reproduce the element by element tracking, the node
+# with the map should replace the segment of the lattice, and
+# the symplectic mode of the node should be exact for the
+# symplectic polynomial maps up to the terms of the order
+# higher than the order of the map.
+# -----------------------------------------------------------
+import math
+
+import numpy as np
+
+from orbit.core.bunch import Bunch
+from orbit.teapot import teapot
+from orbit.taylor_map import TaylorMap, TaylorMapNode, TaylorMapGenerator, getMonomialTable
+
+
+def makeRing():
+    ring = teapot.TEAPOT_Ring("ring")
+    for cell in range(4):
+        drift = teapot.DriftTEAPOT("drift%d" % cell)
+        drift.setLength(2.0)
+        ring.addNode(drift)
+        quad = teapot.QuadTEAPOT("quad%d" % cell)
+        quad.setLength(0.5)
+        quad.setParam("kq", 0.5 * (-1) ** cell)
+        quad.setParam("poles", [2])
+        quad.setParam("kls", [0.5 * (-1) ** cell])
+        quad.setParam("skews", [0])
+        quad.setnParts(4)
+        ring.addNode(quad)
+        bend = teapot.BendTEAPOT("bend%d" % cell)
+        bend.setLength(2.0)
+        bend.setParam("theta", math.pi / 2)
+        bend.setParam("ea1", 0.0)
+        bend.setParam("ea2", 0.0)
+        bend.setnParts(4)
+        ring.addNode(bend)
+    ring.initialize()
+    return ring
+
+
+def makeBunch(coords):
+    bunch = Bunch()
+    bunch.getSyncParticle().kinEnergy(1.0)
+    bunch.addParticles(coords)
+    return bunch
+
+
+def makeCoords(nParts, scale):
+    rng = np.random.default_rng(7)
+    return rng.uniform(-1.0, 1.0, size=(nParts, 6)) * np.array([5.0e-4, 5.0e-5, 5.0e-4, 5.0e-5, 1.0e-2, 1.0e-4]) * scale
+
+
+def test_monomial_algebra():
+    table = getMonomialTable(6, 3)
+    # 1 + 6 + 21 + 56 monomials, and the lower order table is the beginning
+    assert table.getNumberOfMonomials() == 84
+    assert np.all(getMonomialTable(6, 2).exponents == table.exponents[:28])
+    points = np.random.default_rng(1).normal(size=(5, 6))
+    c0 = np.zeros(84)
+    c1 = np.zeros(84)
+    c0[[0, 1, 8]] = [1.0, 2.0, 3.0]
+    c1[[2, 3]] = [4.0, 5.0]
+    monomials = table.evaluate(points)
+    product = table.mult(c0, c1)
+    assert np.allclose(monomials.dot(product), monomials.dot(c0) * monomials.dot(c1))
+    # the composition of the maps is the tracking through both maps
+    map0 = TaylorMap(3)
+    map1 = TaylorMap(3)
+    coeffs0 = map0.getCoefficients().copy()
+    coeffs1 = map1.getCoefficients().copy()
+    coeffs0[table.indexDict[(2, 0, 0, 0, 0, 0)], 1] = 0.7
+    coeffs1[table.indexDict[(0, 1, 0, 0, 0, 0)], 0] = 1.5
+    map0.setCoefficients(coeffs0)
+    map1.setCoefficients(coeffs1)
+    composition = map0.compose(map1)
+    assert np.allclose(composition.track(points), map0.track(map1.track(points)))
+
+
+def getDriftMap(order, length, syncPart):
+    # the expansion of the TEAPOT drift map with 1/(1 + dp/p) = sum of (-dp/p)^k
+    table = getMonomialTable(6, order)
+    nMonomials = table.getNumberOfMonomials()
+    gamma2i = 1.0 / syncPart.gamma() ** 2
+    variables = np.zeros((6, nMonomials))
+    variables[:, 1:7] = np.eye(6)
+    (x, xp, y, yp, z, dE) = variables
+    dp_p = dE / (syncPart.momentum() * syncPart.beta())
+    knl = np.zeros(nMonomials)
+    power = np.zeros(nMonomials)
+    power[0] = 1.0
+    for k in range(order + 1):
+        knl = knl + power
+        power = -table.mult(power, dp_p)
+    phifac = (table.mult(xp, xp) + table.mult(yp, yp) + gamma2i * table.mult(dp_p, dp_p)) / 2.0
+    phifac = table.mult(table.mult(phifac, knl) - gamma2i * dp_p, knl)
+    coeffs = np.array([x + length * table.mult(knl, xp), xp, y + length * table.mult(knl, yp), yp, z - length * phifac, dE])
+    return coeffs.T
+
+
+def test_drift_taylor_map():
+    order = 4
+    ring = teapot.TEAPOT_Ring("drift")
+    drift = teapot.DriftTEAPOT("drift")
+    drift.setLength(3.0)
+    ring.addNode(drift)
+    ring.initialize()
+    bunch = makeBunch(np.zeros((0, 6)))
+    coeffs = getDriftMap(order, 3.0, bunch.getSyncParticle())
+    scale = np.abs(coeffs).max()
+    generator = TaylorMapGenerator(order)
+    taylorMap = generator.getTaylorMap(ring, bunch)
+    assert generator.isLastMapAnalytic()
+    assert np.abs(taylorMap.getCoefficients() - coeffs).max() < 1.0e-14 * scale
+    # the fitted map is exact in the box of the probe points, but its coefficients
+    # of the highest degree are much less accurate, and they depend on the seed
+    generator.setAnalytic(False)
+    table = taylorMap.getMonomialTable()
+    steps = np.array([generator.getStep(index) for index in range(6)])
+    steps[5] *= bunch.getSyncParticle().kinEnergy()
+    monomialScales = np.prod(steps**table.exponents, axis=1)
+    highest = table.exponents.sum(axis=1) == order
+    errors = []
+    for seed in (1, 2):
+        generator.setSeed(seed)
+        taylorMap = generator.getTaylorMap(ring, bunch)
+        assert not generator.isLastMapAnalytic()
+        delta = np.abs(taylorMap.getCoefficients() - coeffs)
+        assert np.all(np.sum(delta * monomialScales[:, np.newaxis], axis=0) < 1.0e-10 * steps)
+        errors.append(delta[highest].max() / scale)
+    print("errors of the highest degree coefficients of the fitted drift maps =", errors)
+    assert 1.0e-3 < min(errors) and max(errors) < 0.1
+    assert errors[0] != errors[1]
+
+
+def test_taylor_map_extraction():
+    ring = makeRing()
+    coords = makeCoords(100, 1.0)
+    errors = []
+    for order in (2, 3, 4):
+        generator = TaylorMapGenerator(order)
+        taylorMap = generator.getTaylorMap(ring, makeBunch(np.zeros((0, 6))))
+        bunch = makeBunch(coords)
+        ring.trackBunch(bunch)
+        errors.append(np.abs(taylorMap.track(coords) - np.array(bunch)).max())
+    print("errors of the maps for the orders 2,3,4 =", errors)
+    assert errors[1] < errors[0] / 10.0
+    assert errors[2] < errors[1] / 10.0
+    assert errors[2] < 1.0e-9
+
+
+def test_taylor_map_node():
+    ring = makeRing()
+    coords = makeCoords(100, 1.0)
+    bunch0 = makeBunch(coords)
+    ring.trackBunch(bunch0)
+
+    # the node replaces the first two cells of the lattice
+    nodes = ring.getNodes()
+    generator = TaylorMapGenerator(4)
+    node = generator.getTaylorMapNode(ring, makeBunch(np.zeros((0, 6))), 0, 5, symplectic=False)
+    lattice = teapot.TEAPOT_Ring("map ring")
+    lattice.setNodes([node] + nodes[6:])
+    lattice.initialize()
+    assert abs(lattice.getLength() - ring.getLength()) < 1.0e-12
+    bunch1 = makeBunch(coords)
+    lattice.trackBunch(bunch1)
+    assert np.abs(np.array(bunch1) - np.array(bunch0)).max() < 1.0e-9
+    assert abs(bunch1.getSyncParticle().time() - bunch0.getSyncParticle().time()) < 1.0e-15
+
+    # the TEAPOT bend is not exactly symplectic, so the symplectic node is
+    # close to the element by element tracking, but does not coincide with it
+    node.setSymplectic(True)
+    assert node.isSymplectic()
+    bunch2 = makeBunch(coords)
+    lattice.trackBunch(bunch2)
+    assert np.abs(np.array(bunch2) - np.array(bunch0)).max() < 1.0e-5
+
+
+def test_symplectic_tracking():
+    # the symplectic polynomial map - rotations with the sextupole kicks
+    order = 4
+    table = getMonomialTable(6, order)
+    rotation = TaylorMap(order)
+    coeffs = rotation.getCoefficients().copy()
+    matrix = np.eye(6)
+    for ind, mu in enumerate((1.1, 0.7, 0.05)):
+        matrix[2 * ind : 2 * ind + 2, 2 * ind : 2 * ind + 2] = [[math.cos(mu), math.sin(mu)], [-math.sin(mu), math.cos(mu)]]
+    coeffs[1:7] = matrix.T
+    rotation.setCoefficients(coeffs)
+    kick = TaylorMap(order)
+    coeffs = kick.getCoefficients().copy()
+    coeffs[table.indexDict[(2, 0, 0, 0, 0, 0)], 1] = -2.0
+    coeffs[table.indexDict[(0, 0, 2, 0, 0, 0)], 1] = 2.0
+    coeffs[table.indexDict[(1, 0, 1, 0, 0, 0)], 3] = 4.0
+    coeffs[table.indexDict[(0, 0, 0, 0, 2, 0)], 1] = -0.15
+    coeffs[table.indexDict[(1, 0, 0, 0, 1, 0)], 5] = -0.3
+    kick.setCoefficients(coeffs)
+    taylorMap = rotation
+    for ind in range(3):
+        taylorMap = rotation.compose(kick.compose(taylorMap))
+
+    node = TaylorMapNode(taylorMap)
+    node.setSymplectic(True)
+    points = np.random.default_rng(1).normal(size=(50, 6))
+    deviations = []
+    for scale in (1.0e-3, 1.0e-4):
+        bunch = Bunch()
+        bunch.addParticles(points * scale)
+        node.trackBunch(bunch)
+        deviations.append(np.abs(np.array(bunch) - taylorMap.track(points * scale)).max())
+    print("deviations from the explicit map =", deviations)
+    # the deviation is of the order+1 order of the amplitude
+    ratio = deviations[0] / deviations[1]
+    assert 10.0 ** (order + 0.5) < ratio < 10.0 ** (order + 1.5)
@@ -0,0 +1,25 @@
+# -----------------------------------------------------------
+# The fixtures shared by the tests.
+# -----------------------------------------------------------
+import numpy as np
+import pytest
+
+from orbit.core.bunch import Bunch
+
+
+def _makeGaussianBunch(nParts, scales=1.0e-3, seed=1):
+    """
+    Returns the bunch with the 1 GeV synchronous particle and nParts particles
+    with the Gaussian coordinates. The scales are the rms sizes of the
+    (x, xp, y, yp, z, dE) coordinates or one size for all of them.
+    """
+    b = Bunch()
+    b.getSyncParticle().kinEnergy(1.0)
+    coords = np.random.default_rng(seed).normal(size=(nParts, 6)) * scales
+    b.addParticles(coords)
+    return b
+
+
+@pytest.fixture
+def make_gaussian_bunch():
+    return _makeGaussianBunch